@@ -0,0 +1,294 @@
+"""
+Ajuste Omron→4C MUPAI - Re-ajuste de la tabla de conversión con mediciones pareadas
+
+OMRON_HBF516_TO_4C es la ecuación lineal de Siedler & Tinsley (2022)
+tabulada. Con lecturas pareadas propias (Omron HBF-516 y DEXA/4C del mismo
+cliente el mismo día) este módulo la vuelve a ajustar por sexo:
+
+- 'lineal': mínimos cuadrados gc_4c = a + b · gc_omron (la forma original)
+- 'isotonica': regresión isotónica ponderada sobre los valores enteros de
+  Omron (la resolución de la tabla), sin suponer forma pero sin que la
+  conversión pueda bajar cuando sube la lectura. Fuera del rango medido se
+  extrapola desde el borde con la pendiente del ajuste lineal
+
+Las dos emiten la tabla completa (OMRON_MIN-OMRON_MAX) y monótona, para no
+mezclar valores ajustados con los de la tabla base en los bordes.
+
+Los intervalos de confianza son bootstrap por percentiles: los remuestreos se
+hacen por bloques como una matriz de conteos (remuestreo × par) y todas las
+estadísticas salen de operaciones matriciales, sin un ajuste por remuestreo.
+La isotónica usa la fórmula max-min sobre sumas acumuladas
+(f(i) = max_{j≤i} min_{k≥i} media(j..k)), también vectorizada.
+
+guardar_tabla() escribe omron_hbf516_4c_v{N}.json con la versión siguiente a
+la más alta del directorio; motor_calculo.tabla_omron_4c() la carga en
+caliente (sin reiniciar la app ni editar código).
+
+Uso:
+    acumulador = AcumuladorPares()
+    acumulador.agregar(df['sexo'], df['grasa_omron'], df['grasa_referencia'])   # por bloques
+    tabla = ajustar_tabla(acumulador, 'isotonica')
+    guardar_tabla(tabla)
+
+    o desde la línea de comandos:
+    python mupai.py fit-omron --input pares.csv --modelo isotonica
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+from motor_calculo import PATRON_TABLA_OMRON, directorio_tablas_omron, recargar_tablas_omron, tabla_omron_4c
+
+
+# Rango de lecturas Omron que convierte corregir_porcentaje_grasa()
+OMRON_MIN = 4
+OMRON_MAX = 60
+
+# Rango aceptado para la referencia (DEXA/4C); fuera de él el par se descarta
+REFERENCIA_MIN = 2.0
+REFERENCIA_MAX = 70.0
+
+MODELOS = ('lineal', 'isotonica')
+SEXOS = ("Hombre", "Mujer")
+
+REMUESTREOS = 2000
+NIVEL_CONFIANZA = 0.95
+
+# Pares mínimos por sexo para emitir su tabla (con menos sigue la tabla base)
+MUESTRAS_MINIMAS_SEXO = 20
+
+# Tamaño de la matriz de conteos por bloque de remuestreos (remuestreos × pares)
+ELEMENTOS_POR_BLOQUE = 2_000_000
+BLOQUE_REMUESTREO = 250
+
+
+class AcumuladorPares:
+    """Junta los pares (Omron, referencia) por sexo a medida que llegan los bloques del CSV."""
+
+    def __init__(self):
+        self._bloques = {sexo: [] for sexo in SEXOS}
+        self.descartados = 0
+
+    def agregar(self, sexo, omron, referencia):
+        """
+        Agrega un bloque de pares. `sexo` puede ser un valor o un arreglo por par.
+
+        Se descartan los pares sin sexo reconocido, con valores faltantes o con
+        la lectura Omron fuera de OMRON_MIN-OMRON_MAX (la tabla no los convierte).
+
+        Returns:
+            int: pares aceptados
+        """
+        omron = np.asarray(omron, dtype=float).ravel()
+        referencia = np.asarray(referencia, dtype=float).ravel()
+        sexo = np.broadcast_to(np.asarray(sexo, dtype=object), omron.shape)
+        redondeada = np.round(omron)
+        validos = (np.isfinite(omron) & np.isfinite(referencia)
+                   & (redondeada >= OMRON_MIN) & (redondeada <= OMRON_MAX)
+                   & (referencia >= REFERENCIA_MIN) & (referencia <= REFERENCIA_MAX))
+        aceptados = 0
+        for s in SEXOS:
+            mascara = validos & (sexo == s)
+            if mascara.any():
+                self._bloques[s].append((omron[mascara], referencia[mascara]))
+                aceptados += int(mascara.sum())
+        self.descartados += omron.size - aceptados
+        return aceptados
+
+    def muestras(self, sexo):
+        return sum(len(o) for o, _ in self._bloques[sexo])
+
+    def pares(self, sexo):
+        """(omron, referencia) concatenados del sexo."""
+        bloques = self._bloques[sexo]
+        if not bloques:
+            return np.empty(0), np.empty(0)
+        return np.concatenate([o for o, _ in bloques]), np.concatenate([r for _, r in bloques])
+
+
+# ==================== MODELOS (VECTORIZADOS POR REMUESTREO) ====================
+
+def _lineal(conteos, x, y):
+    """
+    Mínimos cuadrados ponderados por fila de `conteos` (m × n).
+
+    Returns:
+        (intercepto, pendiente): arreglos de m
+    """
+    sumas = conteos @ np.column_stack([np.ones_like(x), x, x * x, y, x * y])
+    s, sx, sxx, sy, sxy = sumas.T
+    pendiente = (s * sxy - sx * sy) / (s * sxx - sx * sx)
+    return (sy - pendiente * sx) / s, pendiente
+
+
+def _isotonica(pesos, sumas):
+    """
+    Regresión isotónica ponderada de cada fila (m × b, bins ordenados), con la
+    fórmula max-min sobre sumas acumuladas. Los bins sin peso toman el valor
+    que deja la fórmula (siempre monótono).
+    """
+    m, b = pesos.shape
+    cero = np.zeros((m, 1))
+    acum_pesos = np.hstack([cero, np.cumsum(pesos, axis=1)])
+    acum_sumas = np.hstack([cero, np.cumsum(sumas, axis=1)])
+    # media[:, j, k] = media ponderada de los bins j..k
+    peso_tramo = acum_pesos[:, None, 1:] - acum_pesos[:, :-1, None]
+    suma_tramo = acum_sumas[:, None, 1:] - acum_sumas[:, :-1, None]
+    j, k = np.indices((b, b))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = np.where((j <= k) & (peso_tramo > 0), suma_tramo / peso_tramo, np.nan)
+    # min_{k≥i} media(j..k) para cada i (fmin ignora los tramos vacíos)
+    minimos = np.fmin.accumulate(media[:, :, ::-1], axis=2)[:, :, ::-1]
+    minimos = np.where(j <= k, minimos, np.nan)
+    return np.nanmax(minimos, axis=1)
+
+
+def _interpolar(valores, bins, grilla):
+    """Interpolación lineal de cada fila de `valores` (en `bins`) a los enteros de `grilla`."""
+    if len(bins) == 1:
+        return np.repeat(valores, len(grilla), axis=1)
+    i = np.clip(np.searchsorted(bins, grilla, side='right') - 1, 0, len(bins) - 2)
+    t = (grilla - bins[i]) / (bins[i + 1] - bins[i])
+    return valores[:, i] * (1 - t) + valores[:, i + 1] * t
+
+
+def _conteos_bootstrap(rng, filas, n):
+    """Matriz (filas × n) de veces que cada par entra en cada remuestreo."""
+    indices = rng.integers(0, n, size=(filas, n)) + (np.arange(filas) * n)[:, None]
+    return np.bincount(indices.ravel(), minlength=filas * n).reshape(filas, n).astype(float)
+
+
+def _ajustar_sexo(sexo, omron, referencia, modelo, remuestreos, rng):
+    """Ajuste, tabla e intervalos bootstrap de un sexo."""
+    n = len(omron)
+    orden = np.argsort(np.round(omron), kind='stable')
+    omron, referencia = omron[orden], referencia[orden]
+    redondeada = np.round(omron).astype(int)
+    bins, inicios = np.unique(redondeada, return_index=True)
+    grilla = np.arange(OMRON_MIN, OMRON_MAX + 1)
+    # Distancia de cada valor de la grilla al rango medido (0 dentro de él)
+    fuera = np.minimum(grilla - bins[0], 0) + np.maximum(grilla - bins[-1], 0)
+
+    def estimar(conteos):
+        intercepto, pendiente = _lineal(conteos, omron, referencia)
+        if modelo == 'lineal':
+            tabla = intercepto[:, None] + pendiente[:, None] * grilla
+        else:
+            pesos = np.add.reduceat(conteos, inicios, axis=1)
+            sumas = np.add.reduceat(conteos * referencia, inicios, axis=1)
+            dentro = _interpolar(_isotonica(pesos, sumas), bins, np.clip(grilla, bins[0], bins[-1]))
+            tabla = dentro + pendiente[:, None] * fuera
+        # Una pendiente negativa (datos patológicos) no puede invertir la conversión
+        return intercepto, pendiente, np.maximum.accumulate(tabla, axis=1)
+
+    intercepto, pendiente, tabla = estimar(np.ones((1, n)))
+
+    filas = max(1, min(BLOQUE_REMUESTREO, ELEMENTOS_POR_BLOQUE // n))
+    interceptos, pendientes, tablas = [], [], []
+    for inicio in range(0, remuestreos, filas):
+        i, p, t = estimar(_conteos_bootstrap(rng, min(filas, remuestreos - inicio), n))
+        interceptos.append(i)
+        pendientes.append(p)
+        tablas.append(t)
+    cola = (1 - NIVEL_CONFIANZA) / 2 * 100
+    percentiles = (cola, 100 - cola)
+
+    def intervalo(muestras):
+        return np.nanpercentile(np.concatenate(muestras), percentiles, axis=0)
+
+    ic_intercepto, ic_pendiente, ic_tabla = intervalo(interceptos), intervalo(pendientes), intervalo(tablas)
+
+    # Error de la tabla emitida y de la vigente, tal como las usa el motor (valor Omron redondeado)
+    ajustada = dict(zip(grilla.tolist(), np.round(tabla[0], 1).tolist()))
+    vigente = tabla_omron_4c(sexo)
+    prediccion = np.array([ajustada[v] for v in bins])
+    actual = np.array([vigente[v] for v in bins])
+    repeticiones = np.diff(np.append(inicios, n))
+
+    def rmse(por_bin):
+        return float(np.sqrt(np.mean((referencia - np.repeat(por_bin, repeticiones)) ** 2)))
+
+    return {
+        'muestras': n,
+        'tabla': {str(v): valor for v, valor in ajustada.items()},
+        'ic95': {str(v): [round(float(a), 1), round(float(b), 1)]
+                 for v, a, b in zip(grilla.tolist(), ic_tabla[0], ic_tabla[1])},
+        'lineal': {
+            'intercepto': float(intercepto[0]),
+            'pendiente': float(pendiente[0]),
+            'ic95_intercepto': [float(v) for v in ic_intercepto],
+            'ic95_pendiente': [float(v) for v in ic_pendiente],
+        },
+        'rmse': rmse(prediccion),
+        'rmse_tabla_actual': rmse(actual),
+    }
+
+
+def ajustar_tabla(acumulador, modelo='lineal', remuestreos=REMUESTREOS, semilla=None):
+    """
+    Ajusta la conversión Omron→4C por sexo con intervalos bootstrap.
+
+    Los sexos con menos de MUESTRAS_MINIMAS_SEXO pares no se incluyen (el
+    motor sigue usando la tabla base para ellos).
+
+    Returns:
+        dict: tabla en el formato que carga motor_calculo.recargar_tablas_omron()
+              (sin 'version'; la asigna guardar_tabla())
+    """
+    if modelo not in MODELOS:
+        raise ValueError(f"Modelo desconocido: {modelo} (opciones: {', '.join(MODELOS)})")
+    rng = np.random.default_rng(semilla)
+    sexos = {}
+    for sexo in SEXOS:
+        omron, referencia = acumulador.pares(sexo)
+        if len(omron) >= MUESTRAS_MINIMAS_SEXO:
+            sexos[sexo] = _ajustar_sexo(sexo, omron, referencia, modelo, remuestreos, rng)
+    return {
+        'creado': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'modelo': modelo,
+        'remuestreos': remuestreos,
+        'nivel_confianza': NIVEL_CONFIANZA,
+        'descartados': acumulador.descartados,
+        'sexos': sexos,
+    }
+
+
+# ==================== TABLAS VERSIONADAS ====================
+
+def versiones_tablas(directorio=None):
+    """{versión: ruta} de las tablas del directorio (por defecto el que lee el motor)."""
+    directorio = directorio or directorio_tablas_omron()
+    try:
+        nombres = os.listdir(directorio)
+    except OSError:
+        return {}
+    return {int(m.group(1)): os.path.join(directorio, m.group(0)) for m in map(PATRON_TABLA_OMRON.match, nombres) if m}
+
+
+def guardar_tabla(tabla, directorio=None, fuente=None):
+    """
+    Escribe la tabla como la versión siguiente a la más alta del directorio.
+
+    La escritura es atómica (archivo temporal + os.replace), así que el motor
+    nunca lee una tabla a medias.
+
+    Returns:
+        (version, ruta)
+    """
+    directorio = directorio or directorio_tablas_omron()
+    os.makedirs(directorio, exist_ok=True)
+    version = max(versiones_tablas(directorio), default=0) + 1
+    ruta = os.path.join(directorio, f"omron_hbf516_4c_v{version}.json")
+    contenido = dict(tabla, version=version)
+    if fuente:
+        contenido['fuente'] = fuente
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(contenido, f, ensure_ascii=False, indent=1)
+    os.replace(temporal, ruta)
+    # En este proceso se activa de inmediato; los demás la ven en la próxima revisión
+    recargar_tablas_omron()
+    return version, ruta
@@ -0,0 +1,275 @@
+"""
+Calibración de Masa Muscular MUPAI - Mínimos cuadrados recursivos por dispositivo
+
+estimar_masa_muscular_desde_mlg() usa factores fijos por sexo y nivel, y cada
+evaluación guarda además la lectura de masa muscular del aparato
+(masa_muscular_aparato, % del peso). Este módulo ajusta, por dispositivo
+(metodo_grasa), un modelo lineal sobre caracteristicas_masa_muscular():
+
+    masa muscular (kg) ≈ θ · (1, MLG, MLG·mujer, MLG·avance de nivel)
+
+con mínimos cuadrados recursivos (RLS): cada evaluación guardada actualiza θ
+y la matriz P en O(p²), sin volver a ajustar sobre el histórico. θ arranca en
+los factores de la tabla (COEFICIENTES_INICIALES) con VARIANZA_PREVIA, así
+que con pocas muestras el modelo sigue a la tabla.
+
+El error de calibración es prequential: cada lectura se predice antes de
+usarla para actualizar, con el modelo calibrado y con la tabla, y se
+acumulan RMSE y MAE de ambos. Un dispositivo con MUESTRAS_MINIMAS y menos
+error que la tabla se puede activar en el motor
+(motor_calculo.activar_modelo_masa_muscular), que desde entonces lo usa en
+evaluar_cliente() para ese metodo_grasa.
+
+El estado de cada dispositivo se guarda en SQLite (misma base que
+registro_evaluaciones.py) y se actualiza en una transacción exclusiva.
+
+Uso:
+    calibracion = CalibracionMusculo()
+    calibracion.observar(evaluaciones)       # dicts con peso, mlg, sexo, masa_muscular_aparato...
+    calibracion.informe(), calibracion.activar_en_motor()
+"""
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from motor_calculo import (
+    activar_modelo_masa_muscular, caracteristicas_masa_muscular, estimar_masa_muscular_desde_mlg, safe_float,
+)
+from registro_evaluaciones import RUTA_POR_DEFECTO
+
+
+# θ inicial: la tabla de factores (Hombre 0.37 de la MLG + 0.03 por nivel, Mujer 0.04 menos)
+COEFICIENTES_INICIALES = (0.0, 0.37, -0.04, 0.03)
+
+# Varianza previa de cada coeficiente (en unidades del ruido): intercepto ±5 kg,
+# pendientes ±0.1 kg por kg de MLG
+VARIANZA_PREVIA = (25.0, 0.01, 0.01, 0.01)
+
+# 1.0 = todas las lecturas pesan igual; < 1 sigue la deriva del aparato
+FACTOR_OLVIDO = 1.0
+
+# Lecturas antes de empezar a contar el error (el modelo aún es la tabla)
+MUESTRAS_CALENTAMIENTO = 10
+
+# Lecturas con error medido necesarias para poder activar el modelo
+MUESTRAS_MINIMAS = 30
+
+# Aparato de la lectura cuando la evaluación no trae metodo_grasa
+DISPOSITIVO_POR_DEFECTO = "Omron HBF-516 (BIA)"
+
+
+class CalibradorRLS:
+    """Mínimos cuadrados recursivos: θ y P se actualizan con cada lectura en O(p²)."""
+
+    def __init__(self, coeficientes=COEFICIENTES_INICIALES, varianza_previa=VARIANZA_PREVIA, olvido=FACTOR_OLVIDO):
+        self.theta = [float(c) for c in coeficientes]
+        self.P = [[float(varianza_previa[i]) if i == j else 0.0 for j in range(len(self.theta))]
+                  for i in range(len(self.theta))]
+        self.olvido = olvido
+        self.muestras = 0
+        self.errores = {'n': 0, 'cuadrados': 0.0, 'absolutos': 0.0, 'cuadrados_tabla': 0.0, 'absolutos_tabla': 0.0}
+
+    def predecir(self, x):
+        return sum(t * v for t, v in zip(self.theta, x))
+
+    def actualizar(self, x, y, prediccion_tabla=None):
+        """
+        Incorpora una lectura (x: características, y: kg medidos).
+
+        Returns:
+            float: error a priori (y − predicción antes de actualizar)
+        """
+        error = y - self.predecir(x)
+        if self.muestras >= MUESTRAS_CALENTAMIENTO:
+            self.errores['n'] += 1
+            self.errores['cuadrados'] += error ** 2
+            self.errores['absolutos'] += abs(error)
+            if prediccion_tabla is not None:
+                self.errores['cuadrados_tabla'] += (y - prediccion_tabla) ** 2
+                self.errores['absolutos_tabla'] += abs(y - prediccion_tabla)
+
+        p = len(self.theta)
+        px = [sum(self.P[i][j] * x[j] for j in range(p)) for i in range(p)]
+        ganancia = [v / (self.olvido + sum(a * b for a, b in zip(x, px))) for v in px]
+        self.theta = [t + k * error for t, k in zip(self.theta, ganancia)]
+        # P ← (P − k·(Px)ᵀ) / λ, simétrica: se calcula el triángulo superior y se refleja
+        for i in range(p):
+            for j in range(i, p):
+                self.P[i][j] = self.P[j][i] = (self.P[i][j] - ganancia[i] * px[j]) / self.olvido
+        self.muestras += 1
+        return error
+
+    def informe(self):
+        """RMSE/MAE prequential del modelo y de la tabla (kg) y mejora del RMSE (%)."""
+        e = self.errores
+        n = e['n']
+        rmse = math.sqrt(e['cuadrados'] / n) if n else None
+        rmse_tabla = math.sqrt(e['cuadrados_tabla'] / n) if n else None
+        return {
+            'muestras': self.muestras,
+            'muestras_error': n,
+            'rmse_kg': rmse,
+            'mae_kg': e['absolutos'] / n if n else None,
+            'rmse_tabla_kg': rmse_tabla,
+            'mae_tabla_kg': e['absolutos_tabla'] / n if n else None,
+            'mejora_pct': (1 - rmse / rmse_tabla) * 100 if n and rmse_tabla else None,
+            'coeficientes': tuple(self.theta),
+        }
+
+    def apto(self):
+        """Suficientes lecturas y menos error que la tabla."""
+        r = self.informe()
+        return r['muestras_error'] >= MUESTRAS_MINIMAS and r['rmse_kg'] < r['rmse_tabla_kg']
+
+    def a_dict(self):
+        return {'theta': self.theta, 'P': self.P, 'olvido': self.olvido, 'muestras': self.muestras,
+                'errores': self.errores}
+
+    @classmethod
+    def desde_dict(cls, estado):
+        calibrador = cls(estado['theta'], olvido=estado['olvido'])
+        calibrador.P = estado['P']
+        calibrador.muestras = estado['muestras']
+        calibrador.errores = estado['errores']
+        return calibrador
+
+
+def _numero(valor, defecto=0.0):
+    """safe_float() que además trata NaN (filas de DataFrame) como faltante."""
+    numero = safe_float(valor, defecto)
+    return defecto if math.isnan(numero) else numero
+
+
+def _texto(valor, defecto):
+    return valor if isinstance(valor, str) and valor else defecto
+
+
+def lectura_musculo(evaluacion):
+    """
+    (dispositivo, características, kg medidos, kg de la tabla) de una
+    evaluación, o None si no trae lectura del aparato, peso o MLG.
+    """
+    porcentaje = _numero(evaluacion.get('masa_muscular_aparato'))
+    peso = _numero(evaluacion.get('peso'))
+    mlg = _numero(evaluacion.get('mlg'))
+    if mlg <= 0 and peso > 0:
+        grasa = _numero(evaluacion.get('grasa_corregida'), -1.0)
+        mlg = peso * (1 - grasa / 100) if 0 <= grasa < 100 else 0.0
+    if porcentaje <= 0 or porcentaje >= 100 or peso <= 0 or mlg <= 0:
+        return None
+    sexo = _texto(evaluacion.get('sexo'), 'Hombre')
+    nivel = _texto(evaluacion.get('nivel_entrenamiento'), 'intermedio')
+    return (_texto(evaluacion.get('metodo_grasa'), DISPOSITIVO_POR_DEFECTO),
+            caracteristicas_masa_muscular(mlg, sexo, nivel),
+            porcentaje * peso / 100,
+            estimar_masa_muscular_desde_mlg(mlg, sexo, nivel))
+
+
+class CalibracionMusculo:
+    """Un CalibradorRLS por dispositivo, guardado en SQLite (una conexión por hilo)."""
+
+    def __init__(self, ruta_db=RUTA_POR_DEFECTO):
+        self.ruta_db = ruta_db
+        os.makedirs(os.path.dirname(os.path.abspath(ruta_db)), exist_ok=True)
+        self._local = threading.local()
+        with self._conexion() as con:
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS calibracion_musculo (
+                    dispositivo TEXT PRIMARY KEY,
+                    actualizado REAL NOT NULL,
+                    estado TEXT NOT NULL
+                )
+            """)
+
+    def _conexion(self):
+        con = getattr(self._local, 'conexion', None)
+        if con is None:
+            con = sqlite3.connect(self.ruta_db, timeout=10, isolation_level=None)
+            con.execute("PRAGMA busy_timeout=10000")
+            con.row_factory = sqlite3.Row
+            self._local.conexion = con
+        return con
+
+    def observar(self, evaluaciones):
+        """
+        Actualiza los calibradores con las lecturas de `evaluaciones`.
+
+        Returns:
+            int: lecturas usadas (las que traen masa_muscular_aparato, peso y MLG)
+        """
+        lecturas = [l for l in map(lectura_musculo, evaluaciones) if l is not None]
+        if not lecturas:
+            return 0
+        con = self._conexion()
+        # Leer, actualizar y guardar en una transacción exclusiva: dos envíos a la
+        # vez no pierden lecturas
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            calibradores = {}
+            for dispositivo, x, y, tabla in lecturas:
+                if dispositivo not in calibradores:
+                    calibradores[dispositivo] = self._cargar(con, dispositivo) or CalibradorRLS()
+                calibradores[dispositivo].actualizar(x, y, tabla)
+            ahora = time.time()
+            con.executemany("INSERT OR REPLACE INTO calibracion_musculo (dispositivo, actualizado, estado) "
+                            "VALUES (?, ?, ?)",
+                            [(d, ahora, json.dumps(c.a_dict())) for d, c in calibradores.items()])
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        return len(lecturas)
+
+    @staticmethod
+    def _cargar(con, dispositivo):
+        fila = con.execute("SELECT estado FROM calibracion_musculo WHERE dispositivo = ?", (dispositivo,)).fetchone()
+        return CalibradorRLS.desde_dict(json.loads(fila['estado'])) if fila else None
+
+    def calibrador(self, dispositivo):
+        """CalibradorRLS del dispositivo (None si aún no tiene lecturas)."""
+        return self._cargar(self._conexion(), dispositivo)
+
+    def informe(self):
+        """Por dispositivo: informe() del calibrador, 'dispositivo', 'actualizado' y 'apto'."""
+        filas = self._conexion().execute(
+            "SELECT dispositivo, actualizado, estado FROM calibracion_musculo ORDER BY dispositivo").fetchall()
+        informes = []
+        for fila in filas:
+            calibrador = CalibradorRLS.desde_dict(json.loads(fila['estado']))
+            informes.append(dict(calibrador.informe(), dispositivo=fila['dispositivo'],
+                                 actualizado=fila['actualizado'], apto=calibrador.apto()))
+        return informes
+
+    def activar_en_motor(self):
+        """
+        Activa en motor_calculo los modelos aptos y vuelve a la tabla en los demás.
+
+        Returns:
+            dict: {dispositivo: coeficientes} activados
+        """
+        activos = {}
+        for r in self.informe():
+            coeficientes = r['coeficientes'] if r['apto'] else None
+            activar_modelo_masa_muscular(r['dispositivo'], coeficientes)
+            if coeficientes is not None:
+                activos[r['dispositivo']] = coeficientes
+        return activos
+
+    def reiniciar(self, dispositivo=None):
+        """Descarta la calibración de un dispositivo (o de todos)."""
+        con = self._conexion()
+        if dispositivo is None:
+            con.execute("DELETE FROM calibracion_musculo")
+        else:
+            con.execute("DELETE FROM calibracion_musculo WHERE dispositivo = ?", (dispositivo,))
+
+    def reconstruir(self, evaluaciones):
+        """Vuelve a calibrar desde cero con un histórico (lista de dicts o registro.datos_composicion())."""
+        if hasattr(evaluaciones, 'to_dict'):
+            evaluaciones = evaluaciones.to_dict('records')
+        self.reiniciar()
+        return self.observar(evaluaciones)
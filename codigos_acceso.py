@@ -0,0 +1,235 @@
+"""
+Códigos de Acceso MUPAI - Emisión y canje
+
+Servicio de códigos de acceso de un solo uso, persistido en SQLite para que la
+promesa de "válido para un solo uso" se cumpla entre sesiones, reinicios y
+réplicas de la app (que comparten la base en el mismo volumen).
+
+- Generación con `secrets` (6 caracteres A-Z0-9, como antes)
+- Vencimiento por TTL (TTL_CODIGO_HORAS)
+- Canje atómico: un único UPDATE condicionado marca el código como usado, así
+  dos sesiones que canjean a la vez no pueden entrar ambas
+- Límite de solicitudes por email en una ventana de tiempo
+- Búsqueda O(1) por la clave primaria; en la base se guarda el hash del
+  código, no el código en claro
+
+Uso:
+    servicio = ServicioCodigos('.mupai_sesiones/codigos_acceso.db')
+    codigo, error = servicio.emitir("Ana", "ana@example.com", "8661234567")
+    valido, motivo = servicio.canjear(codigo, "ana@example.com")
+"""
+
+import hashlib
+import os
+import secrets
+import sqlite3
+import string
+import threading
+import time
+
+
+ALFABETO_CODIGO = string.ascii_uppercase + string.digits
+LONGITUD_CODIGO = 6
+
+# El administrador reenvía el código a mano (WhatsApp/email): margen amplio
+TTL_CODIGO_HORAS = 48
+
+# Solicitudes permitidas por email dentro de la ventana
+MAX_SOLICITUDES_POR_EMAIL = 3
+VENTANA_SOLICITUDES_MINUTOS = 60
+
+RUTA_POR_DEFECTO = os.path.join('.mupai_sesiones', 'codigos_acceso.db')
+
+# Motivos devueltos por canjear()
+CANJE_OK = 'ok'
+CANJE_INEXISTENTE = 'inexistente'
+CANJE_USADO = 'usado'
+CANJE_EXPIRADO = 'expirado'
+
+MENSAJES_CANJE = {
+    CANJE_OK: "✅ Acceso autorizado. Bienvenido al sistema MUPAI.",
+    CANJE_INEXISTENTE: "❌ Código incorrecto. Verifica e intenta nuevamente.",
+    CANJE_USADO: "❌ Este código ya fue utilizado. Solicita un nuevo código.",
+    CANJE_EXPIRADO: "❌ Este código expiró. Solicita un nuevo código.",
+}
+
+
+def normalizar_codigo(codigo):
+    return (codigo or '').upper().strip()
+
+
+def normalizar_email(email):
+    return (email or '').lower().strip()
+
+
+def _hash_codigo(codigo):
+    return hashlib.sha256(normalizar_codigo(codigo).encode('utf-8')).hexdigest()
+
+
+def generar_codigo(longitud=LONGITUD_CODIGO):
+    """Código aleatorio criptográficamente seguro."""
+    return ''.join(secrets.choice(ALFABETO_CODIGO) for _ in range(longitud))
+
+
+class ServicioCodigos:
+    """Emisión, canje y purga de códigos de acceso sobre SQLite."""
+
+    def __init__(self, ruta_db=RUTA_POR_DEFECTO, ttl_horas=TTL_CODIGO_HORAS,
+                 max_solicitudes=MAX_SOLICITUDES_POR_EMAIL,
+                 ventana_minutos=VENTANA_SOLICITUDES_MINUTOS, reloj=time.time):
+        self.ruta_db = ruta_db
+        self.ttl_segundos = ttl_horas * 3600
+        self.max_solicitudes = max_solicitudes
+        self.ventana_segundos = ventana_minutos * 60
+        self.reloj = reloj
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(ruta_db)), exist_ok=True)
+        with self._conexion() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS codigos (
+                    hash_codigo TEXT PRIMARY KEY,
+                    email TEXT NOT NULL,
+                    nombre TEXT,
+                    whatsapp TEXT,
+                    creado REAL NOT NULL,
+                    expira REAL NOT NULL,
+                    usado REAL
+                )
+            """)
+            con.execute("CREATE INDEX IF NOT EXISTS idx_codigos_email_creado ON codigos(email, creado)")
+            con.execute("CREATE INDEX IF NOT EXISTS idx_codigos_expira ON codigos(expira)")
+
+    def _conexion(self):
+        con = getattr(self._local, 'conexion', None)
+        if con is None:
+            # isolation_level=None: las transacciones se abren explícitamente
+            con = sqlite3.connect(self.ruta_db, timeout=10, isolation_level=None)
+            con.execute("PRAGMA busy_timeout=10000")
+            self._local.conexion = con
+        return con
+
+    def _insertar_codigo(self, con, email, nombre, whatsapp, ahora):
+        while True:
+            codigo = generar_codigo()
+            try:
+                con.execute(
+                    "INSERT INTO codigos (hash_codigo, email, nombre, whatsapp, creado, expira) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (_hash_codigo(codigo), email, nombre, whatsapp, ahora, ahora + self.ttl_segundos),
+                )
+                return codigo
+            except sqlite3.IntegrityError:
+                # Colisión con un código existente: generar otro
+                continue
+
+    def emitir(self, nombre, email, whatsapp=None):
+        """
+        Emite un código nuevo para el email.
+
+        Returns:
+            (codigo, None) si se emitió, o (None, mensaje) si se excedió el límite
+        """
+        email = normalizar_email(email)
+        ahora = self.reloj()
+        con = self._conexion()
+        # BEGIN IMMEDIATE serializa el conteo y la inserción entre procesos
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            recientes = con.execute(
+                "SELECT COUNT(*) FROM codigos WHERE email = ? AND creado > ?",
+                (email, ahora - self.ventana_segundos),
+            ).fetchone()[0]
+            if recientes >= self.max_solicitudes:
+                con.execute("ROLLBACK")
+                minutos = self.ventana_segundos // 60
+                return None, (f"Demasiadas solicitudes para este email. "
+                              f"Intenta de nuevo en {minutos} minutos.")
+            codigo = self._insertar_codigo(con, email, nombre, whatsapp, ahora)
+            con.execute("COMMIT")
+        except BaseException:
+            if con.in_transaction:
+                con.execute("ROLLBACK")
+            raise
+        return codigo, None
+
+    def canjear(self, codigo, email=None):
+        """
+        Canjea un código de forma atómica (un solo uso).
+
+        Args:
+            codigo: código ingresado (sin distinguir mayúsculas/espacios)
+            email: si se indica, el código debe haber sido emitido para ese email
+
+        Returns:
+            (bool, motivo): motivo en CANJE_OK, CANJE_INEXISTENTE, CANJE_USADO, CANJE_EXPIRADO
+        """
+        hash_codigo = _hash_codigo(codigo)
+        ahora = self.reloj()
+        con = self._conexion()
+        consulta = "UPDATE codigos SET usado = ? WHERE hash_codigo = ? AND usado IS NULL AND expira > ?"
+        parametros = [ahora, hash_codigo, ahora]
+        if email is not None:
+            consulta += " AND email = ?"
+            parametros.append(normalizar_email(email))
+        if con.execute(consulta, parametros).rowcount == 1:
+            return True, CANJE_OK
+
+        fila = con.execute("SELECT email, expira, usado FROM codigos WHERE hash_codigo = ?",
+                           (hash_codigo,)).fetchone()
+        if fila is None or (email is not None and fila[0] != normalizar_email(email)):
+            return False, CANJE_INEXISTENTE
+        if fila[2] is not None:
+            return False, CANJE_USADO
+        return False, CANJE_EXPIRADO
+
+    def solicitudes_pendientes(self, pagina=1, por_pagina=50):
+        """
+        Solicitudes con código vigente sin canjear, más reciente primero.
+
+        Returns:
+            dict: {'filas': [{'email', 'nombre', 'whatsapp', 'creado', 'expira'}], 'total': n}
+        """
+        ahora = self.reloj()
+        con = self._conexion()
+        total = con.execute("SELECT COUNT(*) FROM codigos WHERE usado IS NULL AND expira > ?",
+                            (ahora,)).fetchone()[0]
+        filas = con.execute(
+            "SELECT email, nombre, whatsapp, creado, expira FROM codigos "
+            "WHERE usado IS NULL AND expira > ? ORDER BY expira DESC LIMIT ? OFFSET ?",
+            (ahora, por_pagina, (max(1, pagina) - 1) * por_pagina)).fetchall()
+        columnas = ('email', 'nombre', 'whatsapp', 'creado', 'expira')
+        return {'filas': [dict(zip(columnas, f)) for f in filas], 'total': total}
+
+    def reemitir(self, email):
+        """
+        Acción de administración: invalida los códigos vigentes del email y emite
+        uno nuevo sin aplicar el límite de solicitudes.
+
+        Returns:
+            str: código nuevo, o None si el email no tiene solicitudes
+        """
+        email = normalizar_email(email)
+        ahora = self.reloj()
+        con = self._conexion()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            fila = con.execute("SELECT nombre, whatsapp FROM codigos WHERE email = ? ORDER BY creado DESC LIMIT 1",
+                               (email,)).fetchone()
+            if fila is None:
+                con.execute("ROLLBACK")
+                return None
+            con.execute("UPDATE codigos SET expira = ? WHERE email = ? AND usado IS NULL AND expira > ?",
+                        (ahora, email, ahora))
+            codigo = self._insertar_codigo(con, email, fila[0], fila[1], ahora)
+            con.execute("COMMIT")
+        except BaseException:
+            if con.in_transaction:
+                con.execute("ROLLBACK")
+            raise
+        return codigo
+
+    def purgar(self, retencion_horas=24 * 30):
+        """Elimina códigos vencidos hace más de `retencion_horas`. Returns: filas eliminadas."""
+        limite = self.reloj() - retencion_horas * 3600
+        return self._conexion().execute("DELETE FROM codigos WHERE expira < ?", (limite,)).rowcount
@@ -0,0 +1,311 @@
+"""
+Cola de Emails en Disco - MUPAI
+
+Spool de mensajes salientes para envíos masivos (reenvío de reportes a toda
+la lista de clientes) sin un login SMTP por mensaje.
+
+Estructura del spool:
+    <spool>/pendientes/   mensajes .eml por enviar
+    <spool>/enviando/     mensaje reclamado por el enviador (se recupera tras un fallo)
+    <spool>/enviados/     enviados correctamente
+    <spool>/fallidos/     rechazados definitivamente o sin reintentos
+    <spool>/reintentos/   <archivo>.json con intentos y hora del próximo intento
+    <spool>/resultados.jsonl  un registro por intento (archivo, estado, detalle)
+
+El enviador mantiene una conexión abierta, respeta un presupuesto de mensajes
+por minuto y reanuda lo que quedó en enviando/ si el proceso se interrumpió.
+Un error transitorio no reintenta de inmediato: el mensaje vuelve a pendientes/
+con espera exponencial y el conteo de intentos se guarda en disco, así que un
+reinicio no lo pone a cero.
+Se asume un solo enviador por spool.
+
+Uso:
+    nombre = encolar_mensaje(msg, 'spool/')
+    EnviadorSpool('spool/', password=...).procesar()     # vacía la cola
+    EnviadorSpool('spool/', password=...).ejecutar()     # modo daemon
+    estado_mensaje('spool/', nombre)                     # dónde quedó ese mensaje
+"""
+
+import json
+import os
+import smtplib
+import time
+import uuid
+from datetime import datetime
+from email import message_from_binary_file
+
+
+SMTP_HOST = 'smtp.zoho.com'
+SMTP_PUERTO = 587
+EMAIL_ORIGEN = "administracion@muscleupgym.fitness"
+
+# Presupuesto por defecto, por debajo del límite de Zoho para cuentas estándar
+MENSAJES_POR_MINUTO = 20
+MAX_REINTENTOS = 5
+# Espera antes del reintento n: base * 2**(n-1), con tope (1, 2, 4, 8 min)
+ESPERA_REINTENTO_BASE = 60.0
+ESPERA_REINTENTO_MAXIMA = 3600.0
+
+CARPETAS_SPOOL = ('pendientes', 'enviando', 'enviados', 'fallidos', 'reintentos')
+# Estado de un mensaje según la carpeta en la que está
+ESTADOS_CARPETA = {'pendientes': 'pendiente', 'enviando': 'enviando', 'enviados': 'enviado', 'fallidos': 'fallido'}
+
+
+def preparar_spool(directorio):
+    """Crea la estructura de carpetas del spool si no existe."""
+    for carpeta in CARPETAS_SPOOL:
+        os.makedirs(os.path.join(directorio, carpeta), exist_ok=True)
+
+
+def encolar_mensaje(msg, directorio):
+    """
+    Guarda un mensaje en pendientes/ de forma atómica.
+
+    Args:
+        msg: email.message.Message (p.ej. plantillas_email.construir_mensaje)
+        directorio: raíz del spool
+
+    Returns:
+        str: nombre del archivo encolado
+    """
+    return encolar_bytes(msg.as_bytes(), directorio)
+
+
+def encolar_bytes(contenido, directorio):
+    """Encola un mensaje ya serializado (.eml)."""
+    preparar_spool(directorio)
+    # El prefijo temporal mantiene el orden FIFO al listar
+    nombre = f"{time.time_ns():020d}_{uuid.uuid4().hex[:8]}.eml"
+    temporal = os.path.join(directorio, 'pendientes', f".{nombre}.tmp")
+    with open(temporal, 'wb') as f:
+        f.write(contenido)
+    os.replace(temporal, os.path.join(directorio, 'pendientes', nombre))
+    return nombre
+
+
+def estado_mensaje(directorio, nombre):
+    """
+    Estado de un mensaje encolado, sin tocar el spool (lo puede consultar
+    cualquier proceso mientras el enviador trabaja).
+
+    Returns:
+        dict: 'estado' ('pendiente', 'enviando', 'enviado', 'fallido' o None si
+        no está en el spool), 'intentos' fallidos registrados y 'detalle' del
+        último intento
+    """
+    estado = next((e for carpeta, e in ESTADOS_CARPETA.items()
+                   if os.path.exists(os.path.join(directorio, carpeta, nombre))), None)
+    intentos, detalle = 0, None
+    try:
+        with open(os.path.join(directorio, 'resultados.jsonl'), encoding='utf-8') as f:
+            for linea in f:
+                if nombre in linea:
+                    registro = json.loads(linea)
+                    if registro['archivo'] == nombre:
+                        intentos += registro['estado'] != 'enviado'
+                        detalle = registro['detalle']
+    except FileNotFoundError:
+        pass
+    return {'estado': estado, 'intentos': intentos, 'detalle': detalle}
+
+
+class LimitadorTasa:
+    """
+    Limita el ritmo a N mensajes por minuto espaciando los envíos.
+
+    El reloj y la espera son inyectables para pruebas.
+    """
+
+    def __init__(self, mensajes_por_minuto, reloj=time.monotonic, dormir=time.sleep):
+        self.intervalo = 60.0 / mensajes_por_minuto if mensajes_por_minuto > 0 else 0.0
+        self.reloj = reloj
+        self.dormir = dormir
+        self._siguiente = None
+
+    def esperar_turno(self):
+        ahora = self.reloj()
+        if self._siguiente is not None and ahora < self._siguiente:
+            self.dormir(self._siguiente - ahora)
+            ahora = self._siguiente
+        self._siguiente = ahora + self.intervalo
+
+
+class EnviadorSpool:
+    """Envía los mensajes del spool por una conexión SMTP persistente."""
+
+    def __init__(self, directorio, host=SMTP_HOST, puerto=SMTP_PUERTO, usuario=EMAIL_ORIGEN,
+                 password=None, usar_starttls=True, mensajes_por_minuto=MENSAJES_POR_MINUTO,
+                 max_reintentos=MAX_REINTENTOS, limitador=None, timeout=30,
+                 espera_base=ESPERA_REINTENTO_BASE, espera_maxima=ESPERA_REINTENTO_MAXIMA,
+                 reloj=time.time):
+        self.directorio = directorio
+        self.host = host
+        self.puerto = puerto
+        self.usuario = usuario
+        self.password = password
+        self.usar_starttls = usar_starttls
+        self.max_reintentos = max_reintentos
+        self.limitador = limitador or LimitadorTasa(mensajes_por_minuto)
+        self.timeout = timeout
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        # Reloj de pared: la hora del próximo intento se persiste entre procesos
+        self.reloj = reloj
+        self._conexion = None
+        self.conexiones_abiertas = 0
+        preparar_spool(directorio)
+
+    # ---------- Conexión ----------
+
+    def _conectar(self):
+        conexion = smtplib.SMTP(self.host, self.puerto, timeout=self.timeout)
+        if self.usar_starttls:
+            conexion.starttls()
+        if self.usuario and self.password:
+            conexion.login(self.usuario, self.password)
+        self._conexion = conexion
+        self.conexiones_abiertas += 1
+
+    def _asegurar_conexion(self):
+        if self._conexion is None:
+            self._conectar()
+
+    def cerrar(self):
+        if self._conexion is not None:
+            try:
+                self._conexion.quit()
+            except (smtplib.SMTPException, OSError):
+                self._conexion.close()
+            self._conexion = None
+
+    # ---------- Spool ----------
+
+    def _ruta(self, carpeta, nombre):
+        return os.path.join(self.directorio, carpeta, nombre)
+
+    def _registrar(self, nombre, estado, detalle=None, destinatarios=None):
+        registro = {
+            'archivo': nombre,
+            'estado': estado,
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'destinatarios': destinatarios,
+            'detalle': detalle,
+        }
+        with open(os.path.join(self.directorio, 'resultados.jsonl'), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    def recuperar(self):
+        """Devuelve a pendientes/ los mensajes que quedaron en enviando/ tras un fallo."""
+        recuperados = sorted(os.listdir(os.path.join(self.directorio, 'enviando')))
+        for nombre in recuperados:
+            os.replace(self._ruta('enviando', nombre), self._ruta('pendientes', nombre))
+        return len(recuperados)
+
+    def _leer_reintento(self, nombre):
+        try:
+            with open(self._ruta('reintentos', f"{nombre}.json"), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {'intentos': 0, 'siguiente': 0.0}
+
+    def _programar_reintento(self, nombre, intentos):
+        espera = min(self.espera_base * 2 ** (intentos - 1), self.espera_maxima)
+        ruta = self._ruta('reintentos', f"{nombre}.json")
+        temporal = self._ruta('reintentos', f".{nombre}.tmp")
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({'intentos': intentos, 'siguiente': self.reloj() + espera}, f)
+        os.replace(temporal, ruta)
+
+    def _olvidar_reintento(self, nombre):
+        try:
+            os.remove(self._ruta('reintentos', f"{nombre}.json"))
+        except FileNotFoundError:
+            pass
+
+    def pendientes(self, solo_vencidos=False):
+        """Mensajes en pendientes/ en orden FIFO; con solo_vencidos, omite los que esperan reintento."""
+        nombres = sorted(n for n in os.listdir(os.path.join(self.directorio, 'pendientes'))
+                         if n.endswith('.eml'))
+        if solo_vencidos:
+            ahora = self.reloj()
+            nombres = [n for n in nombres if self._leer_reintento(n)['siguiente'] <= ahora]
+        return nombres
+
+    def _enviar_archivo(self, nombre):
+        """Envía un mensaje reclamado. Returns: 'enviado', 'reintento' o 'fallido'."""
+        ruta = self._ruta('enviando', nombre)
+        with open(ruta, 'rb') as f:
+            msg = message_from_binary_file(f)
+        destinatarios = msg.get_all('To', []) + msg.get_all('Cc', [])
+
+        try:
+            self._asegurar_conexion()
+            try:
+                self._conexion.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                # Conexión cerrada por el servidor entre mensajes: reconectar una vez
+                self._conexion.close()
+                self._conexion = None
+                self._asegurar_conexion()
+                self._conexion.send_message(msg)
+        except smtplib.SMTPRecipientsRefused as e:
+            self._registrar(nombre, 'fallido', f"Destinatarios rechazados: {list(e.recipients)}", destinatarios)
+            os.replace(ruta, self._ruta('fallidos', nombre))
+            self._olvidar_reintento(nombre)
+            return 'fallido'
+        except (smtplib.SMTPException, OSError) as e:
+            codigo = getattr(e, 'smtp_code', None)
+            permanente = codigo is not None and 500 <= codigo < 600
+            intentos = self._leer_reintento(nombre)['intentos'] + 1
+            # Tras un error no se confía en el estado de la sesión
+            self.cerrar()
+            if permanente or intentos >= self.max_reintentos:
+                self._registrar(nombre, 'fallido', str(e), destinatarios)
+                os.replace(ruta, self._ruta('fallidos', nombre))
+                self._olvidar_reintento(nombre)
+                return 'fallido'
+            self._registrar(nombre, 'reintento', str(e), destinatarios)
+            # Programar antes de devolverlo a pendientes/: nunca queda visible sin su espera
+            self._programar_reintento(nombre, intentos)
+            os.replace(ruta, self._ruta('pendientes', nombre))
+            return 'reintento'
+
+        self._registrar(nombre, 'enviado', None, destinatarios)
+        os.replace(ruta, self._ruta('enviados', nombre))
+        self._olvidar_reintento(nombre)
+        return 'enviado'
+
+    def procesar(self, limite=None):
+        """
+        Envía los mensajes pendientes hasta vaciar la cola (o hasta `limite`).
+        Los que esperan reintento se quedan en pendientes/ hasta que venza su espera.
+
+        Returns:
+            dict: conteo por estado {'enviado', 'reintento', 'fallido'}
+        """
+        self.recuperar()
+        conteo = {'enviado': 0, 'reintento': 0, 'fallido': 0}
+        procesados = 0
+        try:
+            while limite is None or procesados < limite:
+                cola = self.pendientes(solo_vencidos=True)
+                if not cola:
+                    break
+                nombre = cola[0]
+                try:
+                    # Reclamar el mensaje; si otro proceso lo tomó, seguir con el siguiente
+                    os.replace(self._ruta('pendientes', nombre), self._ruta('enviando', nombre))
+                except FileNotFoundError:
+                    continue
+                self.limitador.esperar_turno()
+                conteo[self._enviar_archivo(nombre)] += 1
+                procesados += 1
+        finally:
+            self.cerrar()
+        return conteo
+
+    def ejecutar(self, intervalo_sondeo=5.0):
+        """Modo daemon: procesa la cola y espera nuevos mensajes indefinidamente."""
+        while True:
+            self.procesar()
+            time.sleep(intervalo_sondeo)
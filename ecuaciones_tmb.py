@@ -0,0 +1,109 @@
+"""
+Ecuaciones de TMB MUPAI - Ensamble de ecuaciones de metabolismo basal
+
+Calcula a la vez las ecuaciones estándar de tasa metabólica basal (kcal/día)
+con operaciones de arreglos sobre (peso, estatura, edad, sexo, MLG), de modo
+que un cliente o toda la base de clientes cuestan una sola llamada:
+
+- katch_mcardle:   370 + 21.6·MLG (la de calcular_tmb_cunningham(), la que
+                   usa el plan; ver BUG_CRITICO_TMB_CUNNINGHAM.md)
+- cunningham:      500 + 22·MLG (Cunningham 1980)
+- mifflin_st_jeor: 10·peso + 6.25·estatura − 5·edad + 5 (H) / −161 (M)
+- harris_benedict: revisión de Roza & Shizgal (1984)
+
+tmb_ensamble() devuelve el valor de cada ecuación y la dispersión del
+ensamble (media, mínimo, máximo, rango %). La ecuación que alimenta el plan
+la elige la estrategia de motor_calculo.py (etapas "tmb_<ecuación>").
+
+Uso:
+    ensamble = tmb_ensamble(peso=80, estatura=178, edad=30, sexo="Hombre", mlg=65)
+    ensamble['katch_mcardle'], ensamble['rango_pct']
+    df = tmb_ensamble_lote(registro.datos_composicion())
+"""
+
+
+def _katch_mcardle(peso, estatura, edad, hombre, mlg):
+    return 370 + 21.6 * mlg
+
+
+def _cunningham(peso, estatura, edad, hombre, mlg):
+    return 500 + 22 * mlg
+
+
+def _mifflin_st_jeor(peso, estatura, edad, hombre, mlg):
+    import numpy as np
+
+    return 10 * peso + 6.25 * estatura - 5 * edad + np.where(hombre, 5, -161)
+
+
+def _harris_benedict(peso, estatura, edad, hombre, mlg):
+    import numpy as np
+
+    return np.where(hombre,
+                    88.362 + 13.397 * peso + 4.799 * estatura - 5.677 * edad,
+                    447.593 + 9.247 * peso + 3.098 * estatura - 4.330 * edad)
+
+
+# Nombre → ecuación (peso kg, estatura cm, edad años, hombre bool, MLG kg)
+ECUACIONES_TMB = {
+    'katch_mcardle': _katch_mcardle,
+    'cunningham': _cunningham,
+    'mifflin_st_jeor': _mifflin_st_jeor,
+    'harris_benedict': _harris_benedict,
+}
+ECUACION_POR_DEFECTO = 'katch_mcardle'
+
+
+def tmb_ensamble(peso, estatura, edad, sexo, mlg, ecuaciones=None):
+    """
+    TMB de cada ecuación y dispersión del ensamble.
+
+    Acepta escalares o arreglos/Series del mismo largo (un valor por cliente).
+
+    Args:
+        peso, estatura, edad, mlg: kg, cm, años, kg
+        sexo: "Hombre"/"Mujer" (o arreglo de ellos)
+        ecuaciones: nombres de ECUACIONES_TMB a calcular (default todas)
+
+    Returns:
+        dict: {ecuación: TMB} más 'media', 'minimo', 'maximo' y 'rango_pct'
+        ((máx − mín) / media × 100); floats para entrada escalar, arreglos si no
+    """
+    import numpy as np
+
+    entradas = [np.asarray(v, dtype=float) for v in (peso, estatura, edad, mlg)]
+    hombre = np.asarray(sexo) == "Hombre"
+    escalar = all(e.ndim == 0 for e in entradas) and hombre.ndim == 0
+    peso, estatura, edad, mlg = entradas
+
+    nombres = list(ecuaciones or ECUACIONES_TMB)
+    matriz = np.vstack(np.broadcast_arrays(*(np.atleast_1d(ECUACIONES_TMB[n](peso, estatura, edad, hombre, mlg))
+                                             for n in nombres)))
+    media = matriz.mean(axis=0)
+    minimo, maximo = matriz.min(axis=0), matriz.max(axis=0)
+    resultado = dict(zip(nombres, matriz))
+    resultado.update(media=media, minimo=minimo, maximo=maximo,
+                     rango_pct=np.divide((maximo - minimo) * 100, media,
+                                         out=np.zeros_like(media), where=media != 0))
+    if escalar:
+        return {nombre: float(valor[0]) for nombre, valor in resultado.items()}
+    return resultado
+
+
+def tmb_ensamble_lote(clientes, ecuaciones=None):
+    """
+    Ensamble para toda una tabla de clientes en una llamada.
+
+    Args:
+        clientes: DataFrame con columnas peso, estatura, edad, sexo y mlg
+                  (p. ej. RegistroEvaluaciones.datos_composicion())
+
+    Returns:
+        DataFrame (mismo índice) con una columna por ecuación y media,
+        minimo, maximo, rango_pct
+    """
+    import pandas as pd
+
+    columnas = {c: pd.to_numeric(clientes[c], errors='coerce') for c in ('peso', 'estatura', 'edad', 'mlg')}
+    return pd.DataFrame(tmb_ensamble(sexo=clientes['sexo'].to_numpy(), ecuaciones=ecuaciones, **columnas),
+                        index=clientes.index)
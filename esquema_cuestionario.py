@@ -0,0 +1,188 @@
+"""
+Esquema del Cuestionario MUPAI - Compilación de cuestionario.json
+
+El cuestionario se describe en un solo archivo (cuestionario.json): secciones,
+campos, opciones con sus puntos y requisitos. Aquí se compila una vez por
+proceso en:
+
+- campos de seguimiento: un validador por bit (ver progreso_cuestionario.py),
+  con las entradas de las que depende para revalidar solo lo que cambió
+- tablas de puntos por opción (puntos['horas_sueno']['≥8 horas'] → 0)
+- renderizador de secciones para los campos con `tipo` (radio, selectbox, ...)
+- serializador de respuestas para los reportes (lineas_reporte)
+
+Se usa JSON (no YAML) para que cargar el esquema no agregue PyYAML al arranque
+de la app.
+
+Reglas de `requerido`:
+    texto, positivo, marcado          valor no vacío / > 0 / verdadero
+    opcion {vacio}                    seleccionada y distinta del marcador vacío
+    min_caracteres {minimo}           texto de al menos `minimo` caracteres
+    cuenta_minima {minimo}            un bit por elemento hasta `minimo` (dict/lista)
+    claves {claves}                   un bit por clave presente en un dict
+    alguna {de: [reglas]}             cualquiera de las subreglas
+    si {entrada: valor}               solo se exige cuando se cumple la condición
+"""
+
+import json
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+
+RUTA_ESQUEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cuestionario.json')
+
+# nombre: bit; entradas: valores de los que depende; validar(valores) -> bool;
+# paso: indicador de paso (None = ninguno); progreso: cuenta en la barra;
+# etiqueta: texto en faltantes (None = no obligatorio para el envío);
+# grupo: campo expandido en varios bits (cuenta_minima)
+Campo = namedtuple('Campo', 'nombre entradas validar paso progreso etiqueta grupo')
+
+# Tipo de campo → widget de Streamlit
+_WIDGETS = {
+    'radio': 'radio',
+    'selectbox': 'selectbox',
+    'texto': 'text_input',
+    'numero': 'number_input',
+    'casilla': 'checkbox',
+}
+
+
+# ==================== REGLAS ====================
+
+def _texto(valor):
+    return bool(valor) and bool(str(valor).strip())
+
+
+def _positivo(valor):
+    try:
+        return bool(valor) and float(valor) > 0
+    except (TypeError, ValueError):
+        return False
+
+
+_PRUEBAS = {
+    'texto': lambda regla: _texto,
+    'positivo': lambda regla: _positivo,
+    'marcado': lambda regla: bool,
+    'opcion': lambda regla: lambda v: bool(v) and v != regla.get('vacio'),
+    'min_caracteres': lambda regla: lambda v: isinstance(v, str) and len(v.strip()) >= regla['minimo'],
+}
+
+
+def _compilar_regla(regla, entrada):
+    """Regla del esquema → función valores -> bool."""
+    entrada = regla.get('entrada', entrada)
+    if regla['regla'] == 'alguna':
+        subreglas = [_compilar_regla(r, entrada) for r in regla['de']]
+        validar = lambda valores: any(f(valores) for f in subreglas)
+    else:
+        prueba = _PRUEBAS[regla['regla']](regla)
+        validar = lambda valores: prueba(valores.get(entrada))
+    condicion = regla.get('si')
+    if condicion:
+        # Fuera de la condición el campo no aplica y cuenta como completo
+        return lambda valores: (any(valores.get(k) != v for k, v in condicion.items())
+                                or validar(valores))
+    return validar
+
+
+def _entradas_regla(regla, entrada):
+    entradas = [regla.get('entrada', entrada)] if regla['regla'] != 'alguna' else []
+    for subregla in regla.get('de', ()):
+        entradas += _entradas_regla(subregla, entrada)
+    entradas += list(regla.get('si', {}))
+    return entradas
+
+
+def _compilar_campo(campo, paso_seccion):
+    """Campo del esquema → uno o más Campo de seguimiento (uno por bit)."""
+    regla = campo['requerido']
+    clave = campo['clave']
+    entradas = tuple(dict.fromkeys(campo.get('entradas') or _entradas_regla(regla, clave)))
+    entrada = entradas[0]
+    paso = campo.get('paso', paso_seccion)
+    progreso = campo.get('progreso', False)
+    faltante = campo.get('faltante')
+
+    if regla['regla'] == 'cuenta_minima':
+        minimo = regla['minimo']
+        plantilla = faltante.replace('{minimo}', str(minimo)) if faltante else None
+        return [Campo(f"{clave}_{i}", entradas,
+                      lambda valores, i=i: len(valores.get(entrada) or ()) >= i,
+                      paso, progreso, plantilla if i == 1 else None, clave)
+                for i in range(1, minimo + 1)]
+    if regla['regla'] == 'claves':
+        return [Campo(f"{clave}_{k}", entradas,
+                      lambda valores, k=k: bool((valores.get(entrada) or {}).get(k)),
+                      paso, progreso, faltante.format(clave=k) if faltante else None, None)
+                for k in regla['claves']]
+    etiqueta = faltante.format(**regla) if faltante else None
+    return [Campo(clave, entradas, _compilar_regla(regla, clave), paso, progreso, etiqueta, None)]
+
+
+# ==================== ESQUEMA COMPILADO ====================
+
+class EsquemaCompilado:
+    """Esquema del cuestionario listo para usar (se construye con cargar_esquema)."""
+
+    def __init__(self, esquema):
+        self.version = esquema.get('version')
+        self.secciones = {s['id']: s for s in esquema['secciones']}
+        self._campos_por_clave = {}
+        campos = []
+        self.puntos = {}
+        for seccion in esquema['secciones']:
+            for campo in seccion['campos']:
+                self._campos_por_clave[campo['clave']] = campo
+                if 'opciones' in campo:
+                    self.puntos[campo['clave']] = {opcion: puntos for opcion, puntos in campo['opciones']}
+                if 'requerido' in campo:
+                    campos += _compilar_campo(campo, seccion.get('paso'))
+        self.campos = tuple(campos)
+
+    def campo(self, clave):
+        return self._campos_por_clave[clave]
+
+    def opciones(self, clave):
+        """Opciones de un campo en el orden del esquema."""
+        return list(self.puntos[clave])
+
+    def renderizar_seccion(self, id_seccion, st):
+        """
+        Dibuja los campos con `tipo` de una sección.
+
+        Returns:
+            dict: {clave: valor} de cada campo dibujado
+        """
+        valores = {}
+        for campo in self.secciones[id_seccion]['campos']:
+            if 'tipo' not in campo:
+                continue
+            if campo.get('encabezado'):
+                st.markdown(campo['encabezado'])
+            widget = getattr(st, _WIDGETS[campo['tipo']])
+            argumentos = [campo['etiqueta']]
+            if 'opciones' in campo:
+                argumentos.append(self.opciones(campo['clave']))
+            valores[campo['clave']] = widget(*argumentos, help=campo.get('ayuda'),
+                                             key=campo.get('key', campo['clave']))
+        return valores
+
+    def respuestas(self, id_seccion, valores):
+        """Renombra {clave: valor} a las claves de `respuesta` del esquema (p.ej. 'frecuencia')."""
+        return {campo.get('respuesta', campo['clave']): valores.get(campo['clave'])
+                for campo in self.secciones[id_seccion]['campos'] if campo['clave'] in valores}
+
+    def lineas_reporte(self, id_seccion, respuestas, vineta="   • ", sin_dato="No reportado"):
+        """Respuestas de una sección como líneas del reporte ("   • Etiqueta: valor")."""
+        return "\n".join(
+            f"{vineta}{campo['reporte']}: {respuestas.get(campo['clave'], sin_dato)}"
+            for campo in self.secciones[id_seccion]['campos'] if campo.get('reporte'))
+
+
+@lru_cache(maxsize=None)
+def cargar_esquema(ruta=RUTA_ESQUEMA):
+    """Lee y compila el esquema (una vez por proceso y ruta)."""
+    with open(ruta, encoding='utf-8') as f:
+        return EsquemaCompilado(json.load(f))
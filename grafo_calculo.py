@@ -0,0 +1,203 @@
+"""
+Grafo de Cálculo MUPAI - Métricas derivadas calculadas una sola vez
+
+Cada métrica derivada (MLG, TMB, FFMI, WtHR, masa muscular estimada, ...) es
+un nodo con nombre que declara de qué entradas o nodos depende. Los nodos se
+calculan a demanda la primera vez que alguien los lee y se reutilizan
+mientras no cambie la versión de sus dependencias:
+
+- fijar(**entradas): sube la versión solo de las entradas cuyo valor cambió
+- grafo['ffmi']: resuelve el nodo y sus dependencias (una vez por versión)
+- resolver('mlg', 'ffmi', ...): dict con varios nodos para un consumidor
+- calculos: contador de cálculos por nodo (instrumentación)
+
+Si un nodo se recalcula y da el mismo valor, su versión no cambia y los
+nodos que dependen de él no se vuelven a calcular.
+
+En la app el grafo vive en session_state: el render y el envío leen los
+mismos nodos ya resueltos en lugar de repetir calcular_ffmi(), la
+estimación de masa muscular o el WtHR en cada punto de uso.
+
+Uso:
+    grafo = grafo_evaluacion()
+    grafo.fijar(sexo="Hombre", edad=30, peso=80, estatura=178, grasa_corregida=18, ...)
+    grafo['ffmi'], grafo.resolver('mlg', 'tmb')
+"""
+
+import inspect
+from collections import Counter
+
+from grasa_circunferencias import contrastar_grasa
+from motor_calculo import (
+    MODELOS_MASA_MUSCULAR,
+    calcular_bf_operacional,
+    calcular_edad_metabolica,
+    calcular_ffmi,
+    calcular_mlg,
+    calcular_tmb_cunningham,
+    clasificar_bf,
+    clasificar_ffmi,
+    estimar_masa_muscular_desde_mlg,
+    obtener_modo_interpretacion_ffmi,
+)
+
+
+def _iguales(a, b):
+    if a is b:
+        return True
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):
+        return False
+
+
+class GrafoCalculo:
+    """Entradas y nodos derivados con nombre, resueltos a demanda y en caché por versión."""
+
+    def __init__(self):
+        self._nodos = {}        # nombre → (función, dependencias)
+        self._valores = {}
+        self._versiones = {}
+        self._firmas = {}       # nombre → versiones de las dependencias al calcularlo
+        self._resolviendo = set()
+        self.calculos = Counter()
+
+    def nodo(self, nombre=None, dependencias=None):
+        """
+        Decorador: registra una función como nodo. Por defecto el nombre es el
+        de la función y las dependencias son los nombres de sus parámetros.
+        """
+        def registrar(funcion):
+            deps = tuple(dependencias or inspect.signature(funcion).parameters)
+            self._nodos[nombre or funcion.__name__] = (funcion, deps)
+            return funcion
+        return registrar
+
+    def fijar(self, **entradas):
+        """
+        Fija valores de entrada. Solo las que cambiaron invalidan sus nodos.
+
+        Returns:
+            list: nombres de las entradas que cambiaron
+        """
+        cambiadas = []
+        for nombre, valor in entradas.items():
+            if nombre in self._nodos:
+                raise ValueError(f"'{nombre}' es un nodo derivado, no una entrada")
+            if nombre in self._valores and _iguales(self._valores[nombre], valor):
+                continue
+            self._valores[nombre] = valor
+            self._versiones[nombre] = self._versiones.get(nombre, 0) + 1
+            cambiadas.append(nombre)
+        return cambiadas
+
+    def _resolver(self, nombre):
+        """Valor y versión del nodo o entrada, calculándolo si sus dependencias cambiaron."""
+        if nombre not in self._nodos:
+            if nombre not in self._versiones:
+                raise KeyError(f"Entrada sin fijar: '{nombre}'")
+            return self._valores[nombre], self._versiones[nombre]
+        if nombre in self._resolviendo:
+            raise ValueError(f"Ciclo en el grafo de cálculo en '{nombre}'")
+
+        funcion, dependencias = self._nodos[nombre]
+        self._resolviendo.add(nombre)
+        try:
+            resueltas = [self._resolver(d) for d in dependencias]
+        finally:
+            self._resolviendo.discard(nombre)
+        firma = tuple(version for _, version in resueltas)
+        if self._firmas.get(nombre) == firma:
+            return self._valores[nombre], self._versiones[nombre]
+
+        valor = funcion(*(v for v, _ in resueltas))
+        self.calculos[nombre] += 1
+        self._firmas[nombre] = firma
+        if nombre not in self._versiones or not _iguales(self._valores[nombre], valor):
+            self._valores[nombre] = valor
+            self._versiones[nombre] = self._versiones.get(nombre, 0) + 1
+        return valor, self._versiones[nombre]
+
+    def __getitem__(self, nombre):
+        return self._resolver(nombre)[0]
+
+    def get(self, nombre, defecto=None):
+        """Como grafo[nombre], pero devuelve `defecto` si falta alguna entrada."""
+        try:
+            return self[nombre]
+        except KeyError:
+            return defecto
+
+    def resolver(self, *nombres):
+        """dict {nombre: valor} de varios nodos o entradas."""
+        return {nombre: self[nombre] for nombre in nombres}
+
+    def conteos(self):
+        """Cálculos por nodo registrado (0 si nunca se calculó)."""
+        return {nombre: self.calculos[nombre] for nombre in self._nodos}
+
+
+# ==================== GRAFO DE LA EVALUACIÓN ====================
+
+ENTRADAS_EVALUACION = ('sexo', 'edad', 'peso', 'estatura', 'grasa_corregida', 'nivel_entrenamiento',
+                       'circunferencia_cintura', 'circunferencia_cuello', 'circunferencia_cadera',
+                       'masa_muscular_aparato', 'metodo_grasa')
+
+
+def grafo_evaluacion():
+    """Grafo con las métricas derivadas de la evaluación (mismas funciones que motor_calculo.py)."""
+    grafo = GrafoCalculo()
+
+    @grafo.nodo()
+    def mlg(peso, grasa_corregida):
+        return calcular_mlg(peso, grasa_corregida)
+
+    @grafo.nodo()
+    def masa_grasa(peso, mlg):
+        return peso - mlg
+
+    @grafo.nodo()
+    def imc(peso, estatura):
+        return peso / (estatura / 100) ** 2 if estatura > 0 else 0
+
+    @grafo.nodo()
+    def tmb(mlg):
+        return calcular_tmb_cunningham(mlg)
+
+    @grafo.nodo()
+    def ffmi(mlg, estatura):
+        return calcular_ffmi(mlg, estatura) if mlg > 0 and estatura > 0 else None
+
+    @grafo.nodo()
+    def nivel_ffmi(ffmi, sexo):
+        return clasificar_ffmi(ffmi or 0, sexo)
+
+    @grafo.nodo()
+    def modo_ffmi(grasa_corregida, sexo):
+        return obtener_modo_interpretacion_ffmi(grasa_corregida, sexo)
+
+    @grafo.nodo()
+    def wthr(circunferencia_cintura, estatura):
+        return circunferencia_cintura / estatura if circunferencia_cintura and estatura > 0 else None
+
+    @grafo.nodo()
+    def masa_muscular_estimada(mlg, sexo, nivel_entrenamiento, metodo_grasa):
+        # Modelo calibrado del dispositivo si está activo (calibracion_musculo.py), si no la tabla
+        return estimar_masa_muscular_desde_mlg(mlg, sexo, nivel_entrenamiento or 'intermedio',
+                                               MODELOS_MASA_MUSCULAR.get(metodo_grasa))
+
+    @grafo.nodo()
+    def edad_metabolica(edad, grasa_corregida, sexo):
+        return calcular_edad_metabolica(edad, grasa_corregida, sexo)
+
+    @grafo.nodo()
+    def contraste_grasa(grasa_corregida, sexo, estatura, circunferencia_cintura, circunferencia_cuello,
+                        circunferencia_cadera):
+        return contrastar_grasa(grasa_corregida, sexo, estatura, circunferencia_cintura, circunferencia_cuello,
+                                circunferencia_cadera)
+
+    @grafo.nodo()
+    def categoria_bf(grasa_corregida, sexo):
+        return clasificar_bf(calcular_bf_operacional(bf_corr_pct=grasa_corregida)[0], sexo)
+
+    return grafo
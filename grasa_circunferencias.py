@@ -0,0 +1,123 @@
+"""
+Grasa por Circunferencias MUPAI - Segundo canal de % grasa (US Navy / RFM)
+
+Estima el % de grasa con las circunferencias que ya pide el formulario y lo
+contrasta con el valor corregido de corregir_porcentaje_grasa() para detectar
+escaneos de bioimpedancia poco plausibles sin volver a medir:
+
+- grasa_navy(): ecuación de la US Navy (Hodgdon & Beckett 1984), en cm;
+  hombres con cintura y cuello, mujeres además con cadera
+- grasa_rfm(): Relative Fat Mass (Woolcott & Bergman 2018), estatura/cintura
+- contrastar_grasa(): promedio de los canales disponibles, divergencia con
+  el valor corregido y bandera si supera DIVERGENCIA_MAXIMA
+- contrastar_lote(): lo mismo para un DataFrame de evaluaciones
+
+Todas aceptan escalares o arreglos; una medida en 0 o faltante deja el canal
+sin valor (None en escalares, NaN en arreglos).
+
+Uso:
+    contraste = contrastar_grasa(24.0, "Hombre", estatura=178, cintura=84, cuello=38)
+    contraste['implausible'], contraste['aviso']
+"""
+
+
+# Diferencia máxima plausible (puntos de % grasa) entre el valor corregido y
+# las circunferencias: ~2 desviaciones de la diferencia entre dos métodos con
+# error de 3-4 puntos cada uno
+DIVERGENCIA_MAXIMA = 8.0
+
+
+def _arreglos(*valores):
+    import numpy as np
+
+    arreglos = [np.asarray(np.nan if v is None else v, dtype=float) for v in valores]
+    return [np.where(a > 0, a, np.nan) for a in arreglos]
+
+
+def _salida(valor):
+    """Escalar → float o None; arreglo → tal cual."""
+    import numpy as np
+
+    if np.ndim(valor) == 0:
+        return None if np.isnan(valor) else float(valor)
+    return valor
+
+
+def grasa_navy(sexo, estatura, cintura, cuello, cadera=None):
+    """% grasa US Navy (medidas en cm). NaN/None si falta una medida o no aplica el logaritmo."""
+    import numpy as np
+
+    estatura, cintura, cuello, cadera = _arreglos(estatura, cintura, cuello, cadera)
+    hombre = np.asarray(sexo) == "Hombre"
+    with np.errstate(invalid='ignore', divide='ignore'):
+        densidad = np.where(
+            hombre,
+            1.0324 - 0.19077 * np.log10(cintura - cuello) + 0.15456 * np.log10(estatura),
+            1.29579 - 0.35004 * np.log10(cintura + cadera - cuello) + 0.22100 * np.log10(estatura),
+        )
+        grasa = 495 / densidad - 450
+    return _salida(grasa)
+
+
+def grasa_rfm(sexo, estatura, cintura):
+    """Relative Fat Mass: 64 − 20·(estatura/cintura) + 12 en mujeres."""
+    import numpy as np
+
+    estatura, cintura = _arreglos(estatura, cintura)
+    return _salida(64 - 20 * (estatura / cintura) + np.where(np.asarray(sexo) == "Mujer", 12, 0))
+
+
+def contrastar_grasa(grasa_corregida, sexo, estatura, cintura, cuello=None, cadera=None,
+                     umbral=DIVERGENCIA_MAXIMA):
+    """
+    Contrasta el % grasa corregido con el estimado por circunferencias.
+
+    Returns:
+        dict: 'navy', 'rfm', 'circunferencias' (promedio de los disponibles),
+        'divergencia' (corregido − circunferencias), 'implausible' (False si no
+        hay circunferencias) y 'aviso' (texto, "" si es plausible)
+    """
+    import numpy as np
+
+    navy = np.asarray(grasa_navy(sexo, estatura, cintura, cuello, cadera), dtype=float)
+    rfm = np.asarray(grasa_rfm(sexo, estatura, cintura), dtype=float)
+    with np.errstate(invalid='ignore'):
+        canales = np.stack(np.broadcast_arrays(navy, rfm))
+        disponibles = (~np.isnan(canales)).sum(axis=0)
+        circunferencias = np.where(disponibles > 0, np.nansum(canales, axis=0) / np.maximum(disponibles, 1), np.nan)
+    divergencia = np.asarray(grasa_corregida, dtype=float) - circunferencias
+    implausible = np.abs(np.nan_to_num(divergencia)) > umbral
+
+    resultado = {
+        'navy': _salida(navy),
+        'rfm': _salida(rfm),
+        'circunferencias': _salida(circunferencias),
+        'divergencia': _salida(divergencia),
+        'implausible': bool(implausible) if np.ndim(implausible) == 0 else implausible,
+    }
+    if np.ndim(implausible) == 0:
+        resultado['aviso'] = (
+            f"El % grasa corregido ({float(grasa_corregida):.1f}%) difiere {float(divergencia):+.1f} puntos "
+            f"del estimado por circunferencias ({float(circunferencias):.1f}%): revisar la medición"
+            if implausible else "")
+    return resultado
+
+
+def contrastar_lote(evaluaciones, umbral=DIVERGENCIA_MAXIMA):
+    """
+    Contraste para una tabla de evaluaciones en una llamada.
+
+    Args:
+        evaluaciones: DataFrame con sexo, estatura, grasa_corregida,
+                      circunferencia_cintura, circunferencia_cuello y circunferencia_cadera
+
+    Returns:
+        DataFrame (mismo índice): navy, rfm, circunferencias, divergencia, implausible
+    """
+    import pandas as pd
+
+    columna = lambda c: pd.to_numeric(evaluaciones[c], errors='coerce').to_numpy()
+    contraste = contrastar_grasa(columna('grasa_corregida'), evaluaciones['sexo'].to_numpy(),
+                                 columna('estatura'), columna('circunferencia_cintura'),
+                                 columna('circunferencia_cuello'), columna('circunferencia_cadera'), umbral)
+    return pd.DataFrame(contraste, index=evaluaciones.index)
@@ -0,0 +1,1915 @@
+"""
+Motor de Cálculo MUPAI - Composición Corporal y Energía
+
+Este módulo contiene las funciones de cálculo puras (sin Streamlit) del sistema MUPAI.
+Es el único motor: streamlit_app.py las importa de aquí, y las mismas funciones
+se reutilizan fuera de la interfaz (simulaciones, servicios, scripts y tests).
+
+Características principales:
+- Corrección de % de grasa por método (Omron→4C, InBody, Bod Pod, DEXA); la
+  tabla Omron→4C se recarga en caliente desde tablas versionadas (ajuste_omron_4c.py)
+- MLG, TMB (y ensamble de ecuaciones de TMB), FFMI, FMI y edad metabólica
+- PSMF con sistema de tiers
+- Fase nutricional, déficit sugerido y macros del plan tradicional
+- Proyección científica semanal
+- Ajuste del plan por recuperación (IR-SE) como etapa de posproceso
+- Intervalos P10/P50/P90 por error de medición (Monte-Carlo vectorizado)
+- Contraste del % grasa corregido con circunferencias (US Navy / RFM)
+- Macros con restricciones y cierre calórico exacto (optimizador_macros.py)
+- Potencial muscular natural por estatura y estructura ósea (potencial_muscular.py)
+- Masa muscular con modelo calibrado por dispositivo (calibracion_musculo.py)
+
+Las funciones de las fases medidas en el panel de latencias llevan @trazar
+(sin registro activo la llamada es directa).
+"""
+
+import json
+import os
+import re
+import time
+from typing import Dict, Tuple, Optional
+
+from ecuaciones_tmb import ECUACIONES_TMB, tmb_ensamble
+from grasa_circunferencias import contrastar_grasa
+from optimizador_macros import (
+    resolver_ciclaje_4_3, resolver_macros, restricciones_psmf, restricciones_tradicionales,
+)
+from potencial_muscular import potencial_muscular
+from puntuacion_suenyo_estres import clasificar
+from trazas import span, trazar
+
+
+# ============================================================================
+# FUNCIONES AUXILIARES PARA BF Y CATEGORIZACIÓN
+# ============================================================================
+
+def calcular_bf_operacional(
+    bf_corr_pct: Optional[float] = None,
+    bf_measured_pct: Optional[float] = None
+) -> Tuple[float, str]:
+    """
+    Calcula el BF operacional para todos los cálculos posteriores.
+    
+    Args:
+        bf_corr_pct: BF corregido (ej: ajustado a DEXA)
+        bf_measured_pct: BF medido directo
+        
+    Returns:
+        (bf_operational, confiabilidad)
+    """
+    if bf_corr_pct is not None:
+        return float(bf_corr_pct), "alta"
+    elif bf_measured_pct is not None:
+        return float(bf_measured_pct), "media"
+    else:
+        raise ValueError("Se requiere al menos un valor de BF")
+
+
+def clasificar_bf(bf_operational: float, sexo: str) -> str:
+    """
+    Clasifica el BF en una de 5 categorías según sexo.
+    """
+    if sexo.lower() in ["hombre", "masculino", "male", "m"]:
+        if bf_operational <= 8:
+            return "preparacion"
+        elif bf_operational <= 15:
+            return "zona_triple"
+        elif bf_operational <= 21:
+            return "promedio"
+        elif bf_operational < 26:
+            return "sobrepeso"
+        else:
+            return "obesidad"
+    else:  # Mujer
+        if bf_operational <= 14:
+            return "preparacion"
+        elif bf_operational <= 24:
+            return "zona_triple"
+        elif bf_operational <= 33:
+            return "promedio"
+        elif bf_operational < 39:
+            return "sobrepeso"
+        else:
+            return "obesidad"
+
+
+def obtener_nombre_cliente(categoria_interna: str, sexo: str = "Hombre") -> Dict[str, str]:
+    """
+    Convierte categoría interna a nombres amigables para cliente.
+    """
+    nombres = {
+        "preparacion": {
+            "nombre_corto": "Muy Definido",
+            "nombre_completo": "Muy Definido / Nivel de Fisicoculturismo",
+            "icono": "🏆",
+            "descripcion_h": "Estás en nivel de competencia o fisicoculturismo.",
+            "descripcion_m": "Estás en nivel de competencia."
+        },
+        "zona_triple": {
+            "nombre_corto": "Atlético",
+            "nombre_completo": "Atlético",
+            "icono": "🎯",
+            "descripcion_h": "Tu composición corporal es atlética y óptima para rendimiento.",
+            "descripcion_m": "Tu composición corporal es atlética y óptima para rendimiento."
+        },
+        "promedio": {
+            "nombre_corto": "Saludable",
+            "nombre_completo": "Saludable",
+            "icono": "💪",
+            "descripcion_h": "Estás en un rango saludable con oportunidad de mejorar tu definición muscular.",
+            "descripcion_m": "Estás en un rango saludable con oportunidad de mejorar tu composición corporal."
+        },
+        "sobrepeso": {
+            "nombre_corto": "Sobrepeso",
+            "nombre_completo": "Sobrepeso",
+            "icono": "⚠️",
+            "descripcion_h": "Reducir grasa corporal mejorará significativamente tu salud.",
+            "descripcion_m": "Reducir grasa corporal mejorará significativamente tu salud."
+        },
+        "obesidad": {
+            "nombre_corto": "Obesidad",
+            "nombre_completo": "Obesidad",
+            "icono": "🚨",
+            "descripcion_h": "Tu salud se beneficiará de una reducción supervisada.",
+            "descripcion_m": "Tu salud se beneficiará de una reducción supervisada."
+        }
+    }
+    
+    info = nombres.get(categoria_interna, nombres["promedio"])
+    sexo_key = "descripcion_h" if sexo.lower() in ["hombre", "masculino", "male", "m"] else "descripcion_m"
+    
+    return {
+        "nombre_corto": info["nombre_corto"],
+        "nombre_completo": info["nombre_completo"],
+        "icono": info["icono"],
+        "descripcion": info[sexo_key]
+    }
+
+
+# ==================== CONSTANTES ====================
+
+# Tabla de conversión Omron HBF-516 a modelo 4C (Siedler & Tinsley 2022)
+# Formula: gc_4c = 1.226167 + 0.838294 * gc_omron
+OMRON_HBF516_TO_4C = {
+    4: 4.6,
+    5: 5.4,
+    6: 6.3,
+    7: 7.1,
+    8: 7.9,
+    9: 8.8,
+    10: 9.6,
+    11: 10.4,
+    12: 11.3,
+    13: 12.1,
+    14: 13.0,
+    15: 13.8,
+    16: 14.6,
+    17: 15.5,
+    18: 16.3,
+    19: 17.2,
+    20: 18.0,
+    21: 18.8,
+    22: 19.7,
+    23: 20.5,
+    24: 21.3,
+    25: 22.2,
+    26: 23.0,
+    27: 23.9,
+    28: 24.7,
+    29: 25.5,
+    30: 26.4,
+    31: 27.2,
+    32: 28.1,
+    33: 28.9,
+    34: 29.7,
+    35: 30.6,
+    36: 31.4,
+    37: 32.2,
+    38: 33.1,
+    39: 33.9,
+    40: 34.8,
+    41: 35.6,
+    42: 36.4,
+    43: 37.3,
+    44: 38.1,
+    45: 38.9,
+    46: 39.8,
+    47: 40.6,
+    48: 41.5,
+    49: 42.3,
+    50: 43.1,
+    51: 44.0,
+    52: 44.8,
+    53: 45.7,
+    54: 46.5,
+    55: 47.3,
+    56: 48.2,
+    57: 49.0,
+    58: 49.8,
+    59: 50.7,
+    60: 51.5,
+}
+
+# Tablas Omron→4C re-ajustadas con mediciones pareadas (ajuste_omron_4c.py): la
+# versión más alta del directorio reemplaza a OMRON_HBF516_TO_4C para cada sexo
+# que incluya, en los valores Omron que cubra. El directorio se revisa cada
+# INTERVALO_RECARGA_TABLAS segundos, así que una tabla nueva entra sin
+# reiniciar ni editar código.
+DIRECTORIO_TABLAS_OMRON = 'tablas_omron'
+PATRON_TABLA_OMRON = re.compile(r'^omron_hbf516_4c_v(\d+)\.json$')
+INTERVALO_RECARGA_TABLAS = 5.0
+
+_tablas_omron = {'revisado': None, 'firma': None, 'version': None, 'sexos': {}}
+
+
+def directorio_tablas_omron():
+    """Directorio de las tablas versionadas: MUPAI_TABLAS_OMRON o DIRECTORIO_TABLAS_OMRON."""
+    return os.environ.get('MUPAI_TABLAS_OMRON', DIRECTORIO_TABLAS_OMRON)
+
+
+def recargar_tablas_omron():
+    """
+    Vuelve a revisar el directorio de tablas (directorio_tablas_omron()) y
+    carga la versión más alta si cambió.
+
+    Returns:
+        int o None: versión vigente (None = OMRON_HBF516_TO_4C)
+    """
+    directorio = directorio_tablas_omron()
+    _tablas_omron['revisado'] = time.monotonic()
+    try:
+        versiones = {int(m.group(1)): m.group(0) for m in map(PATRON_TABLA_OMRON.match, os.listdir(directorio)) if m}
+    except OSError:
+        versiones = {}
+    if not versiones:
+        _tablas_omron.update(firma=None, version=None, sexos={})
+        return None
+    version = max(versiones)
+    ruta = os.path.join(directorio, versiones[version])
+    try:
+        firma = (ruta, os.stat(ruta).st_mtime_ns)
+    except OSError:
+        return _tablas_omron['version']
+    if firma == _tablas_omron['firma']:
+        return _tablas_omron['version']
+    # La firma se guarda aunque falle la carga: un archivo ilegible se reporta una vez
+    _tablas_omron['firma'] = firma
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            contenido = json.load(f)
+        # Los valores que la tabla no cubra siguen la tabla base; la mezcla se
+        # fuerza monótona para que la conversión nunca baje al subir la lectura
+        sexos = {}
+        for sexo, datos in contenido['sexos'].items():
+            tabla = {**OMRON_HBF516_TO_4C, **{int(omron): float(grasa_4c)
+                                              for omron, grasa_4c in datos['tabla'].items()}}
+            maximo = float('-inf')
+            for omron in sorted(tabla):
+                maximo = tabla[omron] = max(maximo, tabla[omron])
+            sexos[sexo] = tabla
+        _tablas_omron.update(version=version, sexos=sexos)
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        # Una tabla ilegible no detiene las evaluaciones: se conserva la vigente
+        print(f"[MUPAI] No se pudo cargar la tabla Omron→4C {ruta}: {e}")
+    return _tablas_omron['version']
+
+
+def tabla_omron_4c(sexo):
+    """Tabla Omron→4C vigente para `sexo`: la versionada más reciente si lo incluye, si no OMRON_HBF516_TO_4C."""
+    revisado = _tablas_omron['revisado']
+    if revisado is None or time.monotonic() - revisado > INTERVALO_RECARGA_TABLAS:
+        recargar_tablas_omron()
+    return _tablas_omron['sexos'].get(sexo, OMRON_HBF516_TO_4C)
+
+# ==================== FUNCIONES DE VALIDACIÓN ESTRICTA ====================
+def validate_name(name):
+    """
+    Valida que el nombre tenga al menos dos palabras.
+    Retorna (es_válido, mensaje_error)
+    """
+    if not name or not name.strip():
+        return False, "El nombre es obligatorio"
+    
+    # Limpiar espacios extra y dividir en palabras
+    words = name.strip().split()
+    
+    if len(words) < 2:
+        return False, "El nombre debe contener al menos dos palabras (nombre y apellido)"
+    
+    # Verificar que cada palabra tenga al menos 2 caracteres y solo contenga letras y espacios
+    for word in words:
+        if len(word) < 2:
+            return False, "Cada palabra del nombre debe tener al menos 2 caracteres"
+        if not re.match(r'^[a-zA-ZáéíóúÁÉÍÓÚüÜñÑ]+$', word):
+            return False, "El nombre solo puede contener letras y espacios"
+    
+    return True, ""
+
+def validate_phone(phone):
+    """
+    Valida que el teléfono tenga exactamente 10 dígitos.
+    Retorna (es_válido, mensaje_error)
+    """
+    if not phone or not phone.strip():
+        return False, "El teléfono es obligatorio"
+    
+    # Limpiar espacios y caracteres especiales
+    clean_phone = re.sub(r'[^0-9]', '', phone.strip())
+    
+    if len(clean_phone) != 10:
+        return False, "El teléfono debe tener exactamente 10 dígitos"
+    
+    # Verificar que todos sean dígitos
+    if not clean_phone.isdigit():
+        return False, "El teléfono solo puede contener números"
+    
+    return True, ""
+
+def validate_email(email):
+    """
+    Valida que el email tenga formato estándar.
+    Retorna (es_válido, mensaje_error)
+    """
+    if not email or not email.strip():
+        return False, "El email es obligatorio"
+    
+    # Patrón regex para email estándar
+    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    
+    if not re.match(email_pattern, email.strip()):
+        return False, "El email debe tener un formato válido (ejemplo: usuario@dominio.com)"
+    
+    return True, ""
+
+# ==================== FUNCIONES DE CÁLCULO ====================
+
+def safe_float(value, default=0.0):
+    """Safely convert value to float, handling empty strings and None."""
+    try:
+        if value == '' or value is None:
+            return float(default)
+        return float(value)
+    except (ValueError, TypeError):
+        return float(default)
+
+def safe_int(value, default=0):
+    """Safely convert value to int, handling empty strings and None."""
+    try:
+        if value == '' or value is None:
+            return int(default)
+        return int(value)
+    except (ValueError, TypeError):
+        return int(default)
+
+def calcular_tmb_cunningham(mlg):
+    """
+    Calcula el TMB con la fórmula de Katch-McArdle (370 + 21.6·MLG).
+
+    El nombre se conserva por compatibilidad; Cunningham (500 + 22·MLG) y las
+    demás ecuaciones están en ecuaciones_tmb.py.
+    """
+    try:
+        mlg = float(mlg)
+    except (TypeError, ValueError):
+        mlg = 0.0
+    return 370 + (21.6 * mlg)
+
+def calcular_mlg(peso, porcentaje_grasa):
+    """Calcula la Masa Libre de Grasa."""
+    try:
+        peso = float(peso)
+        porcentaje_grasa = float(porcentaje_grasa)
+    except (TypeError, ValueError):
+        peso = 0.0
+        porcentaje_grasa = 0.0
+    return peso * (1 - porcentaje_grasa / 100)
+
+@trazar("motor.grasa_corregida")
+def corregir_porcentaje_grasa(medido, metodo, sexo):
+    """
+    Corrige el porcentaje de grasa según el método de medición.
+    Si el método es Omron HBF-516, convierte a modelo 4C (4-compartment body composition) 
+    usando la fórmula de Siedler & Tinsley (2022): gc_4c = 1.226167 + 0.838294 * gc_omron,
+    o la tabla re-ajustada vigente (tabla_omron_4c). Validación de rango 4%-60%.
+    Si InBody, aplica factor.
+    Si BodPod, aplica factor por sexo.
+    Si DEXA, devuelve el valor medido.
+    """
+    try:
+        medido = float(medido)
+    except (TypeError, ValueError):
+        medido = 0.0
+
+    if metodo == "Omron HBF-516 (BIA)":
+        # Conversión unificada Omron→4C (por sexo solo si hay tabla re-ajustada)
+        # Validar rango: solo convertir si está entre 4% y 60%
+        grasa_redondeada = int(round(medido))
+        
+        # Si está fuera del rango 4%-60%, devolver el valor original
+        if grasa_redondeada < 4 or grasa_redondeada > 60:
+            return medido
+        
+        # Usar tabla de conversión vigente (OMRON_HBF516_TO_4C o la versionada)
+        return tabla_omron_4c(sexo).get(grasa_redondeada, medido)
+    elif metodo == "InBody 270 (BIA profesional)":
+        return medido * 1.02
+    elif metodo == "Bod Pod (Pletismografía)":
+        factor = 1.0 if sexo == "Mujer" else 1.03
+        return medido * factor
+    else:  # DEXA (Gold Standard) u otros
+        return medido
+
+# Avance de nivel en el modelo calibrado de masa muscular (calibracion_musculo.py)
+AVANCE_NIVEL = {'principiante': 0, 'intermedio': 1, 'avanzado': 2, 'élite': 3}
+
+# Dispositivo (metodo_grasa) → coeficientes del modelo calibrado que usa evaluar_cliente()
+MODELOS_MASA_MUSCULAR = {}
+
+
+def caracteristicas_masa_muscular(mlg, sexo, nivel_entrenamiento='intermedio'):
+    """Variables del modelo calibrado de masa muscular: (1, MLG, MLG·mujer, MLG·avance de nivel)."""
+    nivel = nivel_entrenamiento.lower() if nivel_entrenamiento else 'intermedio'
+    return (1.0, mlg, mlg if sexo == 'Mujer' else 0.0, mlg * AVANCE_NIVEL.get(nivel, 1))
+
+
+def activar_modelo_masa_muscular(dispositivo, coeficientes):
+    """Usa los coeficientes calibrados para `dispositivo` en evaluar_cliente() (None vuelve a la tabla)."""
+    if coeficientes is None:
+        MODELOS_MASA_MUSCULAR.pop(dispositivo, None)
+    else:
+        MODELOS_MASA_MUSCULAR[dispositivo] = tuple(float(c) for c in coeficientes)
+
+
+def estimar_masa_muscular_desde_mlg(mlg, sexo, nivel_entrenamiento='intermedio', coeficientes=None):
+    """
+    Estima masa muscular esquelética desde MLG usando factores científicos.
+    
+    MLG incluye: músculo + huesos (~15%) + órganos (~10-15%) + agua (~30%)
+    Músculo esquelético ≈ 35-45% de MLG según nivel de entrenamiento
+    
+    Factores basados en literatura científica:
+    - Wang et al. (2000): distribución de tejidos en MLG
+    - Kim et al. (2002): masa muscular apendicular
+    - Janssen et al. (2000): ecuaciones de predicción
+    
+    Parámetros:
+        mlg: Masa Libre de Grasa en kg
+        sexo: 'Hombre' o 'Mujer'
+        nivel_entrenamiento: 'principiante', 'intermedio' o 'avanzado'
+        coeficientes: modelo calibrado contra el aparato (calibracion_musculo.py)
+                      sobre caracteristicas_masa_muscular(); None usa los factores
+    
+    Retorna:
+        float: Masa muscular estimada en kg
+    """
+    if not mlg or mlg <= 0:
+        return 0.0
+    if coeficientes is not None:
+        return sum(c * x for c, x in zip(coeficientes, caracteristicas_masa_muscular(mlg, sexo, nivel_entrenamiento)))
+    
+    # Factores conservadores por nivel y sexo
+    factores = {
+        'Hombre': {
+            'principiante': 0.37,  # 37% de MLG es músculo
+            'intermedio': 0.40,    # 40% de MLG es músculo
+            'avanzado': 0.43       # 43% de MLG es músculo
+        },
+        'Mujer': {
+            'principiante': 0.33,  # 33% de MLG es músculo
+            'intermedio': 0.36,    # 36% de MLG es músculo  
+            'avanzado': 0.40       # 40% de MLG es músculo
+        }
+    }
+    
+    nivel = nivel_entrenamiento.lower() if nivel_entrenamiento else 'intermedio'
+    factor = factores.get(sexo, factores['Hombre']).get(nivel, 0.38)
+    
+    masa_muscular_estimada = mlg * factor
+    
+    return masa_muscular_estimada
+
+def calcular_ffmi(mlg, estatura_cm):
+    """
+    Calcula el FFMI (Fat-Free Mass Index) y lo normaliza a 1.80m de estatura.
+    
+    El FFMI es un indicador de la masa muscular ajustado por altura que permite
+    comparar el desarrollo muscular entre individuos de diferentes estaturas.
+    
+    PARAMETROS:
+    -----------
+    mlg : float
+        Masa Libre de Grasa (MLG) en kilogramos.
+        Se calcula como: MLG = Peso Total * (1 - Porcentaje_Grasa/100)
+        Representa todo el tejido corporal excepto la grasa (musculos, huesos, organos, agua).
+    
+    estatura_cm : float
+        Estatura del individuo en centimetros.
+    
+    CALCULO:
+    --------
+    1. FFMI Base = MLG / (Estatura_en_metros^2)
+       - Similar al IMC pero usando masa libre de grasa en lugar de peso total
+       - Refleja cuanta masa muscular tiene la persona por unidad de altura al cuadrado
+    
+    2. FFMI Normalizado = FFMI_Base + 6.3 * (1.8 - Estatura_en_metros)
+       - Formula de Kouri et al. (1995) para normalizar a 1.80m de referencia
+       - El factor 6.3 compensa las diferencias naturales de proporcion corporal
+       - Personas mas altas tienden a tener FFMI base mas bajo sin tener menos musculo
+       - La normalizacion permite comparaciones justas entre diferentes estaturas
+    
+    RETORNA:
+    --------
+    float
+        FFMI normalizado a 1.80m de estatura.
+        Valores tipicos:
+        - Hombres: 18-25 (natural), >25 (potencialmente no natural)
+        - Mujeres: 15-21 (natural), >21 (potencialmente no natural)
+    
+    REFERENCIAS:
+    -----------
+    - Kouri EM, et al. (1995). "Fat-free mass index in users and nonusers of 
+      anabolic-androgenic steroids." Clinical Journal of Sport Medicine.
+    """
+    # Validacion y conversion de parametros a valores numericos
+    try:
+        mlg = float(mlg)
+        estatura_m = float(estatura_cm) / 100
+    except (TypeError, ValueError):
+        # Si hay error en la conversion, usar valores por defecto seguros
+        mlg = 0.0
+        estatura_m = 1.80
+    
+    # Validar que la estatura sea positiva, usar 1.80m como fallback
+    if estatura_m <= 0:
+        estatura_m = 1.80
+    
+    # Paso 1: Calcular FFMI base (masa libre de grasa dividida por altura al cuadrado)
+    ffmi = mlg / (estatura_m ** 2)
+    
+    # Paso 2: Normalizar a 1.80m usando la formula de Kouri
+    # Esta normalizacion permite comparar el FFMI entre personas de diferentes alturas
+    ffmi_normalizado = ffmi + 6.3 * (1.8 - estatura_m)
+    
+    return ffmi_normalizado
+
+def clasificar_ffmi(ffmi, sexo):
+    """
+    Clasifica el FFMI (Fat-Free Mass Index) en categorias segun el sexo del usuario.
+    
+    El FFMI refleja el desarrollo muscular y varia significativamente entre hombres
+    y mujeres debido a diferencias biologicas en composicion hormonal, cantidad de
+    testosterona, y distribucion natural de masa muscular.
+    
+    PARAMETROS:
+    -----------
+    ffmi : float
+        Valor de FFMI normalizado calculado previamente.
+    
+    sexo : str
+        "Hombre" o "Mujer" - determina que escala de clasificacion usar.
+    
+    CLASIFICACION PARA HOMBRES:
+    ---------------------------
+    - Bajo (<18):      Desarrollo muscular insuficiente. Tipico en sedentarios o con
+                       nutricion inadecuada. Indica necesidad de entrenamiento de fuerza
+                       y optimizacion nutricional.
+    
+    - Promedio (18-20): Desarrollo muscular normal en poblacion general. Presente en
+                        personas con actividad fisica moderada o principiantes en
+                        entrenamiento de fuerza (0-2 anos de experiencia).
+    
+    - Bueno (20-22):   Buen desarrollo muscular. Alcanzable naturalmente con
+                       entrenamiento de fuerza consistente (2-4 anos) y nutricion
+                       adecuada. Representa un fisico atletico.
+    
+    - Avanzado (22-25): Desarrollo muscular muy avanzado. Requiere anos de entrenamiento
+                        disciplinado (4-8+ anos) y optimizacion de todos los factores
+                        (entrenamiento, nutricion, descanso, genetica favorable).
+                        Limite superior del potencial natural para mayoria.
+    
+    - Elite (>25):     Desarrollo muscular excepcional. Dificil de alcanzar naturalmente.
+                       Puede indicar genetica excepcional o uso de farmacologia.
+                       Valores >26-27 son casi imposibles sin ayuda ergogenica.
+    
+    CLASIFICACION PARA MUJERES:
+    ---------------------------
+    - Bajo (<15):      Desarrollo muscular insuficiente. Requiere entrenamiento de
+                       fuerza y nutricion adecuada para salud y funcionalidad.
+    
+    - Promedio (15-17): Desarrollo muscular normal. Tipico en poblacion femenina
+                        general activa o con entrenamiento basico (0-2 anos).
+    
+    - Bueno (17-19):   Buen desarrollo muscular. Alcanzable con entrenamiento
+                       consistente (2-4 anos) y nutricion optimizada. Fisico atletico.
+    
+    - Avanzado (19-21): Desarrollo muy avanzado. Requiere anos de dedicacion (4-8+ anos).
+                        Limite superior del potencial natural para mayoria de mujeres.
+    
+    - Elite (>21):     Desarrollo excepcional. Raro naturalmente. Puede indicar genetica
+                       superior o uso de farmacologia. Valores >22-23 son altamente
+                       improbables sin ayuda ergogenica.
+    
+    RAZON DE DIFERENCIAS POR SEXO:
+    ------------------------------
+    Los umbrales son aproximadamente 3 puntos mas bajos para mujeres debido a:
+    
+    1. HORMONAS: Las mujeres tienen ~10-20% de la testosterona de los hombres, limitando
+       la capacidad de sintesis proteica y ganancia muscular.
+    
+    2. COMPOSICION: Las mujeres tienen naturalmente 6-11% mas grasa corporal esencial
+       (necesaria para funciones reproductivas), reduciendo el porcentaje de masa magra.
+    
+    3. DISTRIBUCION: Los hombres tienen mayor masa muscular en torso y brazos, mientras
+       que las mujeres tienen distribucion mas uniforme o concentrada en piernas.
+    
+    4. GENETICA: Diferencias en expresion genica relacionada con miogenesis (formacion
+       de tejido muscular) favorecen mayor desarrollo en hombres.
+    
+    RETORNA:
+    --------
+    str
+        Categoria de clasificacion: "Bajo", "Promedio", "Bueno", "Avanzado" o "Elite"
+    
+    REFERENCIAS:
+    -----------
+    - Kouri EM, et al. (1995). Clinical Journal of Sport Medicine.
+    - Schoenfeld BJ, et al. (2020). Sports Medicine - sex differences in training.
+    """
+    # Validar y convertir FFMI a valor numerico
+    try:
+        ffmi = float(ffmi)
+    except (TypeError, ValueError):
+        ffmi = 0.0
+    
+    # Definir umbrales de clasificacion especificos por sexo
+    if sexo == "Hombre":
+        # Umbrales masculinos: reflejan mayor potencial de masa muscular
+        limites = [(18, "Bajo"), (20, "Promedio"), (22, "Bueno"), (25, "Avanzado"), (100, "Élite")]
+    else:
+        # Umbrales femeninos: ajustados ~3 puntos mas bajos por diferencias biologicas
+        limites = [(15, "Bajo"), (17, "Promedio"), (19, "Bueno"), (21, "Avanzado"), (100, "Élite")]
+    
+    # Iterar sobre los limites y retornar la primera clasificacion que aplique
+    for limite, clasificacion in limites:
+        if ffmi < limite:
+            return clasificacion
+    
+    # Si el FFMI supera todos los limites, clasificar como Elite
+    return "Élite"
+
+def calcular_fmi(peso, grasa_corregida, estatura_cm):
+    """
+    Calcula el FMI/BFMI (Fat Mass Index / Body Fat Mass Index).
+    
+    El FMI es un indicador de adiposidad ajustado por altura que complementa
+    al FFMI. Permite evaluar la cantidad de grasa corporal de forma normalizada
+    por la estatura del individuo.
+    
+    PARAMETROS:
+    -----------
+    peso : float
+        Peso total del individuo en kilogramos.
+    
+    grasa_corregida : float
+        Porcentaje de grasa corporal corregido (equivalente DEXA).
+    
+    estatura_cm : float
+        Estatura del individuo en centímetros.
+    
+    CALCULO:
+    --------
+    1. Masa Grasa (kg) = Peso Total * (Porcentaje_Grasa / 100)
+    2. FMI = Masa Grasa / (Estatura_en_metros^2)
+    
+    RETORNA:
+    --------
+    float
+        FMI (índice de masa grasa por altura al cuadrado).
+        Valores de referencia:
+        - Hombres: <3 (bajo), 3-6 (normal), 6-9 (elevado), >9 (muy elevado)
+        - Mujeres: <5 (bajo), 5-9 (normal), 9-13 (elevado), >13 (muy elevado)
+    
+    REFERENCIAS:
+    -----------
+    - Kelly TL, et al. (2009). "Dual energy X-Ray absorptiometry body composition
+      reference values from NHANES." PLoS ONE.
+    """
+    try:
+        peso = float(peso)
+        grasa_corregida = float(grasa_corregida)
+        estatura_m = float(estatura_cm) / 100
+    except (TypeError, ValueError):
+        return 0.0
+    
+    # Validar que la estatura sea positiva
+    if estatura_m <= 0:
+        return 0.0
+    
+    # Calcular masa grasa
+    masa_grasa = peso * (grasa_corregida / 100)
+    
+    # Calcular FMI
+    fmi = masa_grasa / (estatura_m ** 2)
+    
+    return fmi
+
+def obtener_modo_interpretacion_ffmi(grasa_corregida, sexo):
+    """
+    Determina el modo de interpretación del FFMI basado en el porcentaje de grasa
+    corporal corregido y el sexo del usuario.
+    
+    Este sistema controla cómo se interpreta y reporta el FFMI, reconociendo que
+    en casos de adiposidad elevada, la masa libre de grasa puede estar inflada por
+    componentes no musculares (agua corporal, órganos, masa estructural), haciendo
+    que el FFMI pierda validez como proxy de muscularidad atlética.
+    
+    PARAMETROS:
+    -----------
+    grasa_corregida : float
+        Porcentaje de grasa corporal corregido (equivalente DEXA).
+    
+    sexo : str
+        "Hombre" o "Mujer" - determina qué umbrales aplicar.
+    
+    MODOS DE INTERPRETACIÓN:
+    ------------------------
+    GREEN (Verde) - Interpretación válida como muscularidad:
+        - Hombres: 11.9% - 22.7% grasa corporal
+        - Mujeres: 20.8% - 31.0% grasa corporal
+        - El FFMI es un buen indicador de desarrollo muscular
+        - Se muestran clasificaciones atléticas (Bajo-Élite)
+        - Se incluyen módulos de potencial genético
+    
+    AMBER (Ámbar) - Interpretación limitada:
+        - Hombres: >22.7% - 26.5% grasa corporal
+        - Mujeres: >31.0% - 38.2% grasa corporal
+        - El FFMI comienza a ser menos confiable
+        - Se reporta valor numérico con advertencia
+        - Se ocultan o degradan clasificaciones atléticas
+        - Se reducen/ocultan módulos de potencial
+    
+    RED (Rojo) - No aplica clasificación atlética:
+        - Hombres: >26.5% grasa corporal
+        - Mujeres: >38.2% grasa corporal
+        - El FFMI pierde validez como indicador de muscularidad
+        - Se reporta valor pero con explicación clara
+        - No se muestran clasificaciones atléticas
+        - No se muestran módulos de potencial
+    
+    FUNDAMENTO CIENTÍFICO:
+    ---------------------
+    Con adiposidad elevada, la masa libre de grasa (MLG) incluye proporcionalmente
+    más agua corporal, masa de órganos y tejido estructural, no solo músculo. Esto
+    hace que el FFMI se eleve artificialmente y no refleje el desarrollo muscular
+    real. Los umbrales están diseñados para:
+    
+    - GREEN: Rango donde la MLG es principalmente músculo esquelético
+    - AMBER: Zona de transición donde comienza la inflación
+    - RED: Rango donde la inflación es significativa y el FFMI no es interpretable
+    
+    RETORNA:
+    --------
+    str
+        Modo de interpretación: "GREEN", "AMBER" o "RED"
+    
+    REFERENCIAS:
+    -----------
+    - Kouri EM, et al. (1995). Clinical Journal of Sport Medicine.
+    - VanItallie TB, et al. (1990). "Height-normalized indices of body's fat-free
+      mass and fat mass: potentially useful indicators of nutritional status."
+    - Kyle UG, et al. (2004). "Fat-free and fat mass percentiles in 5225 healthy
+      subjects aged 15 to 98 years." Nutrition.
+    """
+    try:
+        grasa = float(grasa_corregida)
+    except (TypeError, ValueError):
+        # Si no se puede determinar, usar GREEN por defecto (conservador)
+        return "GREEN"
+    
+    if sexo == "Hombre":
+        # Umbrales para hombres
+        if 11.9 <= grasa <= 22.7:
+            return "GREEN"
+        elif 22.7 < grasa <= 26.5:
+            return "AMBER"
+        else:  # grasa > 26.5 o grasa < 11.9
+            return "RED"
+    else:  # Mujer
+        # Umbrales para mujeres
+        if 20.8 <= grasa <= 31.0:
+            return "GREEN"
+        elif 31.0 < grasa <= 38.2:
+            return "AMBER"
+        else:  # grasa > 38.2 o grasa < 20.8
+            return "RED"
+
+@trazar("motor.psmf")
+def calculate_psmf(sexo, peso, grasa_corregida, mlg, estatura_cm=None):
+    """
+    Calcula los parámetros para PSMF (Very Low Calorie Diet) actualizada
+    según el nuevo protocolo basado en tiers de adiposidad.
+    
+    Requisitos actualizados con sistema de tiers:
+    - Tier 1 (baja adiposidad): Base = peso total
+    - Tier 2 (adiposidad moderada): Base = MLG
+    - Tier 3 (alta adiposidad): Base = peso ideal (IMC 25)
+    - Proteína según % grasa: 1.8g/kg (<25% grasa) o 1.6g/kg (≥25% grasa)
+    - Grasas según % grasa: 30g/día (<25% grasa) o 50g/día (≥25% grasa)
+    - Calorías objetivo = proteína (g) × multiplicador según % grasa
+    - Multiplicadores: 8.3 (alto % grasa), 9.0 (moderado), 9.5-9.7 (magro)
+    - Carb cap por tier: Tier 1=50g, Tier 2=40g, Tier 3=30g
+    - Carbohidratos: Calculados desde calorías restantes, limitados por carb cap
+    """
+    try:
+        peso = float(peso)
+        grasa_corregida = float(grasa_corregida)
+    except (TypeError, ValueError):
+        peso = 70.0
+        grasa_corregida = 20.0
+    
+    # Determinar elegibilidad para PSMF según sexo y % grasa
+    if sexo == "Hombre" and grasa_corregida > 18:
+        psmf_aplicable = True
+        criterio = "PSMF recomendado por % grasa >18%"
+        calorias_piso_dia = 800
+    elif sexo == "Mujer" and grasa_corregida > 23:
+        psmf_aplicable = True
+        criterio = "PSMF recomendado por % grasa >23%"
+        calorias_piso_dia = 700
+    else:
+        return {"psmf_aplicable": False}
+    
+    if psmf_aplicable:
+        # Calcular variables necesarias
+        if estatura_cm is not None:
+            estatura_m = estatura_cm / 100
+            imc = peso / (estatura_m ** 2)
+            peso_ideal_ref_kg = 25 * (estatura_m ** 2)
+        else:
+            estatura_m = None
+            imc = None
+            peso_ideal_ref_kg = None
+        
+        # DETERMINACIÓN DE TIER basado en adiposidad
+        # Tier 3 predomina - verificar primero
+        if (imc is not None and imc >= 40) or \
+           (sexo == "Hombre" and grasa_corregida >= 35) or \
+           (sexo == "Mujer" and grasa_corregida >= 45):
+            tier = 3
+        # Tier 2
+        elif (sexo == "Hombre" and 25 <= grasa_corregida < 35) or \
+             (sexo == "Mujer" and 35 <= grasa_corregida < 45):
+            tier = 2
+        # Tier 1
+        elif (sexo == "Hombre" and grasa_corregida < 25) or \
+             (sexo == "Mujer" and grasa_corregida < 35):
+            tier = 1
+        else:
+            tier = 1  # Default fallback
+        
+        # ELECCIÓN DE BASE DE PROTEÍNA según tier
+        if tier == 1:
+            base_proteina_kg = peso
+            base_proteina_nombre = "Peso total"
+        elif tier == 2:
+            base_proteina_kg = mlg
+            base_proteina_nombre = "MLG"
+        elif tier == 3:
+            base_proteina_kg = peso_ideal_ref_kg if peso_ideal_ref_kg is not None else mlg
+            base_proteina_nombre = "Peso ideal (IMC 25)"
+        else:
+            base_proteina_kg = peso
+            base_proteina_nombre = "Peso total"
+        
+        # FACTORES DE PROTEÍNA Y GRASAS según % grasa corporal corregida
+        if grasa_corregida < 25:
+            # < 25% grasa: 1.8g/kg proteína + 30g grasas
+            factor_proteina_psmf = 1.8
+            grasa_g_dia = 30.0
+        else:
+            # ≥ 25% grasa: 1.6g/kg proteína + 50g grasas
+            factor_proteina_psmf = 1.6
+            grasa_g_dia = 50.0
+        
+        proteina_g_dia = round(base_proteina_kg * factor_proteina_psmf, 1)
+        
+        # MULTIPLICADOR CALÓRICO según % grasa corporal (para calorías objetivo)
+        if grasa_corregida > 35:  # Alto % grasa - PSMF tradicional
+            multiplicador = 8.3
+            perfil_grasa = "alto % grasa (PSMF tradicional)"
+        elif grasa_corregida >= 25 and sexo == "Hombre":  # Moderado para hombres
+            multiplicador = 9.0
+            perfil_grasa = "% grasa moderado"
+        elif grasa_corregida >= 30 and sexo == "Mujer":  # Moderado para mujeres
+            multiplicador = 9.0
+            perfil_grasa = "% grasa moderado"
+        else:  # Casos más magros - visible abdominals/lower %
+            # Usar 9.6 como punto medio del rango 9.5-9.7
+            multiplicador = 9.6
+            perfil_grasa = "más magro (abdominales visibles)"
+        
+        # CALORÍAS OBJETIVO = proteína (g) × multiplicador
+        kcal_psmf_obj = round(proteina_g_dia * multiplicador, 0)
+        
+        # CARB CAP por tier
+        if tier == 1:
+            carb_cap_g = 50
+        elif tier == 2:
+            carb_cap_g = 40
+        elif tier == 3:
+            carb_cap_g = 30
+        else:
+            carb_cap_g = 50  # Default
+        
+        # CÁLCULO DE CARBOHIDRATOS con cap
+        kcal_prot = 4 * proteina_g_dia
+        kcal_grasa = 9 * grasa_g_dia
+        carbs_g_calculado = max((kcal_psmf_obj - (kcal_prot + kcal_grasa)) / 4, 0)
+        
+        carbs_g = min(carbs_g_calculado, carb_cap_g)
+        carb_cap_aplicado = carbs_g_calculado > carb_cap_g
+        
+        # CALORÍAS FINALES recalculadas por macros
+        calorias_dia = kcal_prot + kcal_grasa + (4 * carbs_g)
+        
+        # Verificar que no esté por debajo del piso mínimo
+        if calorias_dia < calorias_piso_dia:
+            calorias_dia = calorias_piso_dia
+        
+        # Calcular rango de pérdida semanal proyectada (estimación conservadora)
+        if sexo == "Hombre":
+            perdida_semanal_min = 0.8  # kg/semana
+            perdida_semanal_max = 1.2
+        else:  # Mujer
+            perdida_semanal_min = 0.6  # kg/semana
+            perdida_semanal_max = 1.0
+        
+        return {
+            "psmf_aplicable": True,
+            "proteina_g_dia": proteina_g_dia,
+            "grasa_g_dia": grasa_g_dia,
+            "carbs_g_dia": round(carbs_g, 1),
+            "calorias_dia": calorias_dia,
+            "calorias_piso_dia": calorias_piso_dia,
+            "multiplicador": multiplicador,
+            "perfil_grasa": perfil_grasa,
+            "perdida_semanal_kg": (perdida_semanal_min, perdida_semanal_max),
+            "criterio": f"{criterio} - Protocolo con tiers: {perfil_grasa}",
+            # Nuevos campos de explainabilidad
+            "tier_psmf": tier,
+            "base_proteina_usada": base_proteina_nombre,
+            "base_proteina_kg": round(base_proteina_kg, 2),
+            "carb_cap_aplicado_g": carb_cap_g,
+            "carb_cap_fue_aplicado": carb_cap_aplicado,
+            "factor_proteina_psmf": factor_proteina_psmf
+        }
+    else:
+        return {"psmf_aplicable": False}
+
+def sugerir_deficit(porcentaje_grasa, sexo):
+    """Sugiere el déficit calórico recomendado por % de grasa y sexo."""
+    try:
+        porcentaje_grasa = float(porcentaje_grasa)
+    except (TypeError, ValueError):
+        porcentaje_grasa = 0.0
+    rangos_hombre = [
+        (0, 8, 3), (8.1, 10.5, 5), (10.6, 13, 10), (13.1, 15.5, 15),
+        (15.6, 18, 20), (18.1, 20.5, 25), (20.6, 23, 27), (23.1, 25.5, 29),
+        (25.6, 30, 30), (30.1, 32.5, 35), (32.6, 40, 35), (40.1, 45, 40),
+        (45.1, 100, 50)
+    ]
+    rangos_mujer = [
+        (0, 14, 3), (14.1, 16.5, 5), (16.6, 19, 10), (19.1, 21.5, 15),
+        (21.6, 24, 20), (24.1, 26.5, 25), (26.6, 29, 27), (29.1, 31.5, 29),
+        (31.6, 35, 30), (35.1, 40, 30), (40.1, 45, 35), (45.1, 50, 40),
+        (50.1, 100, 50)
+    ]
+    tabla = rangos_hombre if sexo == "Hombre" else rangos_mujer
+    tope = 30
+    limite_extra = 30 if sexo == "Hombre" else 35
+    for minimo, maximo, deficit in tabla:
+        if minimo <= porcentaje_grasa <= maximo:
+            return min(deficit, tope) if porcentaje_grasa <= limite_extra else deficit
+    return 20  # Déficit por defecto
+
+def determinar_fase_nutricional_refinada(grasa_corregida, sexo):
+    """
+    Determina la fase nutricional refinada basada en % de grasa corporal y sexo.
+    Usa la tabla completa de rangos para decisiones más precisas.
+    """
+    try:
+        grasa_corregida = float(grasa_corregida)
+    except (TypeError, ValueError):
+        grasa_corregida = 0.0
+    
+    if sexo == "Hombre":
+        # Rangos refinados para hombres
+        if grasa_corregida < 6:
+            # Muy bajo - competición
+            fase = "Superávit recomendado: 10-15%"
+            porcentaje = 12.5
+        elif grasa_corregida <= 10:
+            # Bajo - atlético
+            fase = "Superávit recomendado: 5-10%"
+            porcentaje = 7.5
+        elif grasa_corregida <= 15:
+            # Fitness/atlético - puede mantener o ligero superávit
+            fase = "Mantenimiento o ligero superávit: 0-5%"
+            porcentaje = 2.5
+        elif grasa_corregida <= 18:
+            # Buena condición - mantenimiento
+            fase = "Mantenimiento"
+            porcentaje = 0
+        else:
+            # Sobrepeso - déficit según tabla
+            deficit_valor = sugerir_deficit(grasa_corregida, sexo)
+            porcentaje = -deficit_valor
+            fase = f"Déficit recomendado: {deficit_valor}%"
+    else:  # Mujer
+        # Rangos refinados para mujeres
+        if grasa_corregida < 12:
+            # Muy bajo - competición
+            fase = "Superávit recomendado: 10-15%"
+            porcentaje = 12.5
+        elif grasa_corregida <= 16:
+            # Bajo - atlético
+            fase = "Superávit recomendado: 5-10%"
+            porcentaje = 7.5
+        elif grasa_corregida <= 20:
+            # Fitness/atlético - puede mantener o ligero superávit
+            fase = "Mantenimiento o ligero superávit: 0-5%"
+            porcentaje = 2.5
+        elif grasa_corregida <= 23:
+            # Buena condición - mantenimiento
+            fase = "Mantenimiento"
+            porcentaje = 0
+        else:
+            # Sobrepeso - déficit según tabla
+            deficit_valor = sugerir_deficit(grasa_corregida, sexo)
+            porcentaje = -deficit_valor
+            fase = f"Déficit recomendado: {deficit_valor}%"
+    
+    return fase, porcentaje
+
+def calcular_edad_metabolica(edad_cronologica, porcentaje_grasa, sexo):
+    """Calcula la edad metabólica ajustada por % de grasa."""
+    try:
+        edad_cronologica = float(edad_cronologica)
+        porcentaje_grasa = float(porcentaje_grasa)
+    except (TypeError, ValueError):
+        edad_cronologica = 18
+        porcentaje_grasa = 0.0
+    if sexo == "Hombre":
+        grasa_ideal = 15
+    else:
+        grasa_ideal = 22
+    diferencia_grasa = porcentaje_grasa - grasa_ideal
+    ajuste_edad = diferencia_grasa * 0.3
+    edad_metabolica = edad_cronologica + ajuste_edad
+    return max(18, min(80, round(edad_metabolica)))
+
+def obtener_geaf(nivel):
+    """Devuelve el factor de actividad física (GEAF) según el nivel."""
+    valores = {
+        "Sedentario": 1.00,
+        "Moderadamente-activo": 1.11,
+        "Activo": 1.25,
+        "Muy-activo": 1.45
+    }
+    return valores.get(nivel, 1.00)
+
+def esta_en_rango_saludable(porcentaje_grasa, sexo):
+    """
+    Determina si el porcentaje de grasa corporal está en rango saludable para ponderar FFMI.
+    
+    Args:
+        porcentaje_grasa: Porcentaje de grasa corporal
+        sexo: "Hombre" o "Mujer"
+    
+    Returns:
+        bool: True si está en rango saludable, False si no
+    """
+    try:
+        grasa = float(porcentaje_grasa)
+    except (TypeError, ValueError):
+        return True  # Si no se puede determinar, usar ponderación normal por seguridad
+    
+    if sexo == "Hombre":
+        return grasa <= 25.0
+    else:  # Mujer
+        return grasa <= 32.0
+
+def obtener_factor_proteina_tradicional(grasa_corregida):
+    """
+    Determina el factor de proteína en g/kg según el porcentaje de grasa corporal corregido
+    para el plan tradicional.
+    
+    Escala de distribución:
+    - Si grasa_corregida >= 35%: 1.6g/kg proteína
+    - Si grasa_corregida entre 25% y 34.9%: 1.8g/kg proteína
+    - Si grasa_corregida entre 15% y 24.9%: 2.0g/kg proteína
+    - Si grasa_corregida entre 4% y 14.9%: 2.2g/kg proteína
+    
+    GRASA: Ahora SIEMPRE 40% TMB (independiente del % grasa corporal)
+    
+    Args:
+        grasa_corregida: Porcentaje de grasa corporal corregido
+    
+    Returns:
+        float: Factor de proteína en g/kg peso corporal
+    """
+    try:
+        grasa = float(grasa_corregida)
+    except (TypeError, ValueError):
+        grasa = 20.0  # Valor por defecto
+    
+    if grasa >= 35:
+        return 1.6
+    elif grasa >= 25:
+        return 1.8
+    elif grasa >= 15:
+        return 2.0
+    else:  # grasa < 15 (includes 4-14.9%)
+        return 2.2
+
+def debe_usar_mlg_para_proteina(sexo, grasa_corregida):
+    """
+    Determina si se debe usar MLG como base para el cálculo de proteína
+    según las reglas 35/42 para alta adiposidad.
+    
+    Reglas:
+    - Hombres: usar MLG si grasa_corregida >= 35%
+    - Mujeres: usar MLG si grasa_corregida >= 42%
+    - De lo contrario: usar peso total
+    
+    Razón: En obesidad alta, usar peso total infla inapropiadamente la proteína.
+    
+    Args:
+        sexo: "Hombre" o "Mujer"
+        grasa_corregida: Porcentaje de grasa corporal corregido
+    
+    Returns:
+        bool: True si se debe usar MLG, False si se debe usar peso total
+    """
+    try:
+        grasa = float(grasa_corregida)
+    except (TypeError, ValueError):
+        return False
+    
+    if sexo == "Hombre" and grasa >= 35:
+        return True
+    elif sexo == "Mujer" and grasa >= 42:
+        return True
+    else:
+        return False
+
+def obtener_porcentaje_grasa_tmb_tradicional(grasa_corregida, sexo):
+    """
+    Determina el porcentaje del TMB/BMR que debe destinarse a grasas para el plan tradicional.
+    
+    NUEVA LÓGICA CIENTÍFICA (implementada según requerimientos):
+    - Fat intake se establece SIEMPRE en 40% del TMB/BMR para CUALQUIER % de grasa corporal
+    - Esto se basa en evidencia científica que demuestra beneficios metabólicos óptimos
+    - La ingesta mínima se garantiza mediante restricción del 20% del TEI (aplicada posteriormente)
+    
+    Referencias científicas:
+    - Hämäläinen et al., 1984: Efectos metabólicos de diferentes ratios de grasas
+    - Volek et al., 1997: Adaptaciones metabólicas al entrenamiento de resistencia
+    - Smith et al., 2011: Optimización de macronutrientes para composición corporal
+    - Riechman et al., 2007: Síntesis proteica y balance energético
+    - Burke et al., 2011: Estrategias nutricionales para deportistas
+    
+    Args:
+        grasa_corregida: Porcentaje de grasa corporal corregido (no utilizado en nueva lógica)
+        sexo: "Hombre" o "Mujer" (no utilizado en nueva lógica)
+    
+    Returns:
+        float: Porcentaje del TMB destinado a grasas (0.40 = 40%)
+    """
+    # Nueva lógica científica: SIEMPRE 40% del TMB/BMR para grasas
+    # independientemente del % de grasa corporal o sexo
+    return 0.40  # 40% TMB (aplicable a todos los usuarios del plan TRADICIONAL)
+
+def calcular_proyeccion_cientifica(sexo, grasa_corregida, nivel_entrenamiento, peso_actual, porcentaje_deficit_superavit):
+    """
+    Calcula la proyección científica realista de ganancia o pérdida de peso semanal y total.
+    
+    Args:
+        sexo: "Hombre" o "Mujer"
+        grasa_corregida: Porcentaje de grasa corporal corregido
+        nivel_entrenamiento: "principiante", "intermedio", "avanzado", "élite"
+        peso_actual: Peso actual en kg
+        porcentaje_deficit_superavit: Porcentaje de déficit (-) o superávit (+)
+    
+    Returns:
+        dict con rango_semanal_pct, rango_semanal_kg, rango_total_6sem_kg, explicacion_textual
+    """
+    try:
+        peso_actual = float(peso_actual)
+        grasa_corregida = float(grasa_corregida)
+        porcentaje = float(porcentaje_deficit_superavit)
+    except (ValueError, TypeError):
+        peso_actual = 70.0
+        grasa_corregida = 20.0
+        porcentaje = 0.0
+    
+    # Rangos científicos según objetivo, sexo y nivel
+    if porcentaje < 0:  # Déficit (pérdida) - valor negativo
+        if sexo == "Hombre":
+            if nivel_entrenamiento in ["principiante", "intermedio"]:
+                rango_pct_min, rango_pct_max = -1.0, -0.5
+            else:  # avanzado, élite
+                rango_pct_min, rango_pct_max = -0.7, -0.3
+        else:  # Mujer
+            if nivel_entrenamiento in ["principiante", "intermedio"]:
+                rango_pct_min, rango_pct_max = -0.8, -0.3
+            else:  # avanzado, élite
+                rango_pct_min, rango_pct_max = -0.6, -0.2
+        
+        # Ajuste por % grasa (personas con más grasa pueden perder más rápido inicialmente)
+        if grasa_corregida > (25 if sexo == "Hombre" else 30):
+            factor_grasa = 1.2  # 20% más rápido
+        elif grasa_corregida < (12 if sexo == "Hombre" else 18):
+            factor_grasa = 0.8  # 20% más conservador
+        else:
+            factor_grasa = 1.0
+        
+        rango_pct_min *= factor_grasa
+        rango_pct_max *= factor_grasa
+        
+        explicacion = f"Con {grasa_corregida:.1f}% de grasa y nivel {nivel_entrenamiento}, se recomienda una pérdida conservadora pero efectiva. {'Nivel alto de grasa permite pérdida inicial más rápida.' if factor_grasa > 1 else 'Nivel bajo de grasa requiere enfoque más conservador.' if factor_grasa < 1 else 'Nivel óptimo de grasa para pérdida sostenible.'}"
+        
+    elif porcentaje > 0:  # Superávit (ganancia) - valor positivo
+        if sexo == "Hombre":
+            if nivel_entrenamiento in ["principiante", "intermedio"]:
+                rango_pct_min, rango_pct_max = 0.2, 0.5
+            else:  # avanzado, élite
+                rango_pct_min, rango_pct_max = 0.1, 0.3
+        else:  # Mujer
+            if nivel_entrenamiento in ["principiante", "intermedio"]:
+                rango_pct_min, rango_pct_max = 0.1, 0.3
+            else:  # avanzado, élite
+                rango_pct_min, rango_pct_max = 0.05, 0.2
+        
+        explicacion = f"Como {sexo.lower()} con nivel {nivel_entrenamiento}, la ganancia muscular será gradual y sostenible. Los principiantes pueden ganar músculo más rápido que los avanzados."
+        
+    else:  # Mantenimiento
+        rango_pct_min, rango_pct_max = -0.1, 0.1
+        explicacion = f"En mantenimiento, el peso debe mantenerse estable con fluctuaciones menores del ±0.1% semanal debido a variaciones normales de hidratación y contenido intestinal."
+    
+    # Convertir porcentajes a kg
+    rango_kg_min = peso_actual * (rango_pct_min / 100)
+    rango_kg_max = peso_actual * (rango_pct_max / 100)
+    
+    # Proyección total 6 semanas
+    rango_total_min_6sem = rango_kg_min * 6
+    rango_total_max_6sem = rango_kg_max * 6
+    
+    return {
+        "rango_semanal_pct": (rango_pct_min, rango_pct_max),
+        "rango_semanal_kg": (rango_kg_min, rango_kg_max),
+        "rango_total_6sem_kg": (rango_total_min_6sem, rango_total_max_6sem),
+        "explicacion_textual": explicacion
+    }
+
+@trazar("motor.macros")
+def calcular_macros_tradicional(ingesta_calorica_tradicional, tmb, sexo, grasa_corregida, peso, mlg):
+    """
+    Función centralizada para calcular macronutrientes del plan tradicional.
+    Garantiza consistencia en todos los cálculos (UI, email, reportes).
+    
+    Lógica de cálculo TRADICIONAL ADAPTABLE:
+    1. PROTEÍNA: Usar MLG si aplica regla 35/42, sino usar peso total
+       - Factor varía según % grasa: 1.6-2.2 g/kg
+    2. GRASA: SIEMPRE 40% del TMB (con restricciones 20-40% TEI)
+    3. CARBOHIDRATOS: Calorías restantes
+    
+    Args:
+        ingesta_calorica_tradicional: Calorías totales del plan tradicional
+        tmb: Tasa metabólica basal
+        sexo: "Hombre" o "Mujer"
+        grasa_corregida: % grasa corporal corregido
+        peso: Peso corporal en kg
+        mlg: Masa libre de grasa en kg
+    
+    Returns:
+        dict: {
+            'proteina_g': gramos de proteína,
+            'proteina_kcal': calorías de proteína,
+            'grasa_g': gramos de grasa,
+            'grasa_kcal': calorías de grasa,
+            'carbo_g': gramos de carbohidratos,
+            'carbo_kcal': calorías de carbohidratos,
+            'base_proteina': 'MLG' o 'Peso total',
+            'factor_proteina': factor usado para proteína
+        }
+    """
+    # 1. PROTEÍNA: Determinar base y calcular
+    usar_mlg = debe_usar_mlg_para_proteina(sexo, grasa_corregida)
+    base_proteina_kg = mlg if usar_mlg else peso
+    base_proteina_nombre = "MLG" if usar_mlg else "Peso total"
+    factor_proteina = obtener_factor_proteina_tradicional(grasa_corregida)
+    
+    proteina_g = round(base_proteina_kg * factor_proteina, 1)
+    proteina_kcal = proteina_g * 4
+    
+    # 2. GRASA: SIEMPRE 40% TMB con restricciones 20-40% TEI
+    grasa_min_kcal = ingesta_calorica_tradicional * 0.20  # Mínimo 20% TEI
+    grasa_max_kcal = ingesta_calorica_tradicional * 0.40  # Máximo 40% TEI
+    porcentaje_grasa_tmb = obtener_porcentaje_grasa_tmb_tradicional(grasa_corregida, sexo)
+    grasa_ideal_kcal = tmb * porcentaje_grasa_tmb  # 40% TMB
+    
+    # Aplicar restricciones
+    grasa_kcal = max(grasa_min_kcal, min(grasa_ideal_kcal, grasa_max_kcal))
+    grasa_g = round(grasa_kcal / 9, 1)
+    
+    # 3. CARBOHIDRATOS: Calorías restantes
+    carbo_kcal = ingesta_calorica_tradicional - proteina_kcal - grasa_kcal
+    carbo_g = round(max(0, carbo_kcal / 4), 1)
+    
+    return {
+        'proteina_g': proteina_g,
+        'proteina_kcal': proteina_kcal,
+        'grasa_g': grasa_g,
+        'grasa_kcal': grasa_kcal,
+        'carbo_g': carbo_g,
+        'carbo_kcal': carbo_kcal,
+        'base_proteina': base_proteina_nombre,
+        'base_proteina_kg': base_proteina_kg,
+        'factor_proteina': factor_proteina,
+        'usar_mlg': usar_mlg
+    }
+
+def calcular_macros_psmf(psmf_recs):
+    """
+    Función centralizada para calcular macronutrientes del plan PSMF.
+    Garantiza consistencia en todos los cálculos (UI, email, reportes).
+    
+    Los cálculos PSMF ya están centralizados en calculate_psmf(),
+    esta función simplemente extrae y formatea los resultados de forma consistente.
+    
+    Args:
+        psmf_recs: Diccionario retornado por calculate_psmf()
+    
+    Returns:
+        dict: {
+            'proteina_g': gramos de proteína,
+            'proteina_kcal': calorías de proteína,
+            'grasa_g': gramos de grasa,
+            'grasa_kcal': calorías de grasa,
+            'carbo_g': gramos de carbohidratos,
+            'carbo_kcal': calorías de carbohidratos,
+            'calorias_dia': calorías totales,
+            'aplicable': bool indicando si PSMF es aplicable
+        }
+    """
+    if not psmf_recs.get('psmf_aplicable', False):
+        return {
+            'proteina_g': 0,
+            'proteina_kcal': 0,
+            'grasa_g': 0,
+            'grasa_kcal': 0,
+            'carbo_g': 0,
+            'carbo_kcal': 0,
+            'calorias_dia': 0,
+            'aplicable': False
+        }
+    
+    proteina_g = psmf_recs.get('proteina_g_dia', 0)
+    grasa_g = psmf_recs.get('grasa_g_dia', 0)
+    carbo_g = psmf_recs.get('carbs_g_dia', 0)
+    
+    # Calcular calorías de cada macro
+    proteina_kcal = proteina_g * 4
+    grasa_kcal = grasa_g * 9
+    carbo_kcal = carbo_g * 4
+    
+    return {
+        'proteina_g': proteina_g,
+        'proteina_kcal': proteina_kcal,
+        'grasa_g': grasa_g,
+        'grasa_kcal': grasa_kcal,
+        'carbo_g': carbo_g,
+        'carbo_kcal': carbo_kcal,
+        'calorias_dia': psmf_recs.get('calorias_dia', 0),
+        'aplicable': True
+    }
+
+def obtener_porcentaje_para_proyeccion(plan_elegido, psmf_recs, GE, porcentaje):
+    """
+    Función centralizada para calcular el porcentaje correcto a usar en proyecciones,
+    garantizando sincronía perfecta entre todas las partes del código.
+    
+    Args:
+        plan_elegido: Plan seleccionado por el usuario
+        psmf_recs: Diccionario con recomendaciones PSMF
+        GE: Gasto energético total
+        porcentaje: Porcentaje tradicional calculado
+    
+    Returns:
+        float: Porcentaje correcto para usar en proyecciones
+    """
+    if plan_elegido and psmf_recs.get("psmf_aplicable") and "PSMF" in str(plan_elegido):
+        # Para PSMF, usar el déficit específico de PSMF
+        deficit_psmf_calc = int((1 - psmf_recs['calorias_dia']/GE) * 100) if GE > 0 else 40
+        return -deficit_psmf_calc  # Negativo para pérdida
+    else:
+        # Para plan tradicional, usar el porcentaje tradicional
+        return porcentaje if porcentaje is not None else 0
+
+# ==================== GASTO ENERGÉTICO ====================
+
+def obtener_factor_eta(grasa_corregida, sexo):
+    """
+    Devuelve el factor ETA (Efecto Térmico de los Alimentos) según % grasa y sexo.
+
+    Rangos (mismos que el paso de ETA en streamlit_app.py):
+    - Hombres: ≤10% → 1.15, 11-20% → 1.12, >20% → 1.10
+    - Mujeres: ≤20% → 1.15, 21-30% → 1.12, >30% → 1.10
+    """
+    try:
+        grasa_corregida = float(grasa_corregida)
+    except (TypeError, ValueError):
+        grasa_corregida = 20.0
+
+    if grasa_corregida <= 10 and sexo == "Hombre":
+        return 1.15
+    elif grasa_corregida <= 20 and sexo == "Mujer":
+        return 1.15
+    elif grasa_corregida <= 20 and sexo == "Hombre":
+        return 1.12
+    elif grasa_corregida <= 30 and sexo == "Mujer":
+        return 1.12
+    return 1.10
+
+def obtener_kcal_sesion(nivel_entrenamiento):
+    """Devuelve el gasto por sesión de fuerza (GEE) según el nivel de entrenamiento."""
+    valores = {
+        "principiante": 300,
+        "intermedio": 350,
+        "avanzado": 400,
+        "élite": 500
+    }
+    return valores.get(nivel_entrenamiento, 300)
+
+def calcular_gasto_energetico(tmb, geaf, eta, kcal_sesion, dias_fuerza):
+    """
+    Calcula el gasto energético total (GE) como promedio ponderado semanal.
+
+    GE_reposo = (TMB × GEAF) × ETA
+    GE_entreno = (TMB × GEAF + GEE_sesión) × ETA
+    GE = [d × GE_entreno + (7-d) × GE_reposo] / 7
+    """
+    dias_fuerza = max(0, min(7, safe_int(dias_fuerza, 0)))
+    ge_reposo = (tmb * geaf) * eta
+    ge_entreno = (tmb * geaf + kcal_sesion) * eta
+    return (dias_fuerza * ge_entreno + (7 - dias_fuerza) * ge_reposo) / 7
+
+# ==================== AJUSTE POR RECUPERACIÓN ====================
+
+# Nivel de recuperación (IR-SE del cuestionario de sueño + estrés) →
+# (tope de déficit %, refeed cada N días, ciclaje 4-3). Con recuperación
+# comprometida se limita el déficit (mismos topes que los guardrails de
+# adaptación metabólica: 25% zona amarilla, 20% zona roja), se acercan los
+# refeeds y se reparte la semana en 4 días bajos y 3 altos.
+AJUSTE_POR_RECUPERACION = {
+    "ALTA": (None, 14, False),
+    "MEDIA": (25, 10, True),
+    "BAJA": (20, 7, True),
+}
+
+# Ciclaje 4-3: días bajos al 80% y días altos compensando el promedio semanal
+CICLAJE_DIAS_LOW = 4
+CICLAJE_FACTOR_LOW = 0.8
+
+
+def ajustar_por_recuperacion(porcentaje, ir_se=None, nivel_recuperacion=None):
+    """
+    Ajusta el déficit del plan según el estado de recuperación.
+
+    Solo actúa en déficit (porcentaje < 0); en mantenimiento o superávit
+    devuelve el mismo porcentaje y sin refeeds ni ciclaje.
+
+    Args:
+        porcentaje: déficit/superávit del plan (negativo = déficit)
+        ir_se: Índice de Recuperación Sueño-Estrés (0-100)
+        nivel_recuperacion: "ALTA", "MEDIA" o "BAJA" (se deriva de ir_se si falta)
+
+    Returns:
+        dict con 'nivel', 'ir_se', 'porcentaje' (ajustado), 'porcentaje_original',
+        'tope_deficit', 'refeed_cada_dias', 'ciclaje_4_3' y 'aviso' (texto o
+        "" si no hubo ajuste); None si no hay datos de recuperación (ir_se
+        None, vacío o NaN, como la celda en blanco de un DataFrame)
+    """
+    if nivel_recuperacion not in AJUSTE_POR_RECUPERACION:
+        valor = safe_float(ir_se, float('nan'))
+        if valor != valor:
+            return None
+        nivel_recuperacion = clasificar(valor)
+    tope, refeed_cada_dias, ciclaje = AJUSTE_POR_RECUPERACION[nivel_recuperacion]
+
+    ajuste = {
+        'nivel': nivel_recuperacion,
+        'ir_se': ir_se,
+        'porcentaje': porcentaje,
+        'porcentaje_original': porcentaje,
+        'tope_deficit': None,
+        'refeed_cada_dias': None,
+        'ciclaje_4_3': False,
+        'aviso': "",
+    }
+    if porcentaje >= 0:
+        return ajuste
+
+    ajuste['refeed_cada_dias'] = refeed_cada_dias
+    ajuste['ciclaje_4_3'] = ciclaje
+    partes = [f"refeed cada {refeed_cada_dias} días"]
+    if tope is not None and -porcentaje > tope:
+        ajuste['porcentaje'] = -tope
+        ajuste['tope_deficit'] = tope
+        partes.insert(0, f"déficit limitado a {tope}% (antes {-porcentaje:g}%)")
+    if ciclaje:
+        partes.append("ciclaje 4-3")
+    if nivel_recuperacion != "ALTA":
+        etiqueta = f"IR-SE {safe_float(ir_se):.0f}, " if ir_se is not None else ""
+        ajuste['aviso'] = f"Recuperación {nivel_recuperacion} ({etiqueta}sueño + estrés): " + ", ".join(partes)
+    return ajuste
+
+
+def calcular_ciclaje_4_3(calorias, proteina_g, grasa_g, dias_low=CICLAJE_DIAS_LOW,
+                         factor_low=CICLAJE_FACTOR_LOW):
+    """
+    Reparte las calorías del plan en días bajos y altos con el mismo promedio
+    semanal. Proteína y grasa constantes; los carbohidratos absorben la diferencia.
+
+    Returns:
+        dict: {'low_days': {...}, 'high_days': {...}} con kcal, dias,
+        protein_g, fat_g y carb_g
+    """
+    dias_high = 7 - dias_low
+    low_kcal = calorias * factor_low
+    high_kcal = (7 * calorias - dias_low * low_kcal) / dias_high
+    fijo_kcal = proteina_g * 4 + grasa_g * 9
+
+    def _dia(kcal, dias):
+        return {'kcal': kcal, 'dias': dias, 'protein_g': proteina_g, 'fat_g': grasa_g,
+                'carb_g': round(max(0, (kcal - fijo_kcal) / 4), 1)}
+
+    return {'low_days': _dia(low_kcal, dias_low), 'high_days': _dia(high_kcal, dias_high)}
+
+
+# ==================== MACROS CON RESTRICCIONES ====================
+
+def calcular_macros_restringidas(ingesta_calorica, tmb, sexo, grasa_corregida, peso, mlg,
+                                 nivel_entrenamiento='intermedio'):
+    """
+    Macros del plan tradicional resueltos con restricciones (ver
+    optimizador_macros.py): piso de proteína de calcular_macros_tradicional(),
+    grasa entre 20-40% de las kcal, banda de carbohidratos de Burke y cierre
+    exacto 4P + 9G + 4C = ingesta.
+
+    Returns:
+        dict con las claves de calcular_macros_tradicional() más 'activas',
+        'relajadas' y 'factible'
+    """
+    macros = calcular_macros_tradicional(ingesta_calorica, tmb, sexo, grasa_corregida, peso, mlg)
+    objetivos, minimos, maximos = restricciones_tradicionales(ingesta_calorica, tmb, peso, macros['proteina_g'],
+                                                              nivel_entrenamiento)
+    r = resolver_macros(ingesta_calorica, objetivos[0], minimos[0], maximos[0])
+    proteina_g, grasa_g, carbo_g = (round(r[c], 1) for c in ('proteina_g', 'grasa_g', 'carbo_g'))
+    return dict(macros, proteina_g=proteina_g, proteina_kcal=proteina_g * 4, grasa_g=grasa_g,
+                grasa_kcal=grasa_g * 9, carbo_g=carbo_g, carbo_kcal=carbo_g * 4,
+                activas=r['activas'], relajadas=r['relajadas'], factible=r['factible'],
+                restricciones=(objetivos[0], minimos[0], maximos[0]))
+
+
+def calcular_macros_restringidas_lote(clientes):
+    """
+    calcular_macros_restringidas() para una tabla de clientes en una pasada.
+
+    Args:
+        clientes: DataFrame con ingesta_calorica, tmb, sexo, grasa_corregida,
+                  peso, mlg y opcionalmente nivel_entrenamiento
+
+    Returns:
+        DataFrame (mismo índice): proteina_g, grasa_g, carbo_g, kcal,
+        activas, relajadas y factible
+    """
+    import numpy as np
+    import pandas as pd
+
+    columna = lambda c: pd.to_numeric(clientes[c], errors='coerce').to_numpy(dtype=float)
+    peso, mlg, grasa = columna('peso'), columna('mlg'), columna('grasa_corregida')
+    usar_mlg = np.array([debe_usar_mlg_para_proteina(s, g) for s, g in zip(clientes['sexo'], grasa)])
+    factor = np.array([obtener_factor_proteina_tradicional(g) for g in grasa])
+    proteina_g = np.round(np.where(usar_mlg, mlg, peso) * factor, 1)
+    niveles = (clientes['nivel_entrenamiento'].fillna('intermedio').to_numpy()
+               if 'nivel_entrenamiento' in clientes else 'intermedio')
+    restricciones = restricciones_tradicionales(columna('ingesta_calorica'), columna('tmb'), peso, proteina_g, niveles)
+    r = resolver_macros(columna('ingesta_calorica'), *restricciones)
+    return pd.DataFrame(r, index=clientes.index)
+
+
+def calcular_macros_psmf_restringidas(psmf_recs):
+    """
+    calcular_macros_psmf() con cierre exacto en calorias_dia: si el piso
+    calórico supera los macros del protocolo, la diferencia va a
+    carbohidratos (hasta el carb cap) y grasa en lugar de quedar fuera del total.
+    """
+    macros = calcular_macros_psmf(psmf_recs)
+    if not macros['aplicable']:
+        return macros
+    r = resolver_macros(*restricciones_psmf(psmf_recs))
+    return dict(macros, proteina_g=r['proteina_g'], proteina_kcal=r['proteina_g'] * 4,
+                grasa_g=round(r['grasa_g'], 1), grasa_kcal=round(r['grasa_g'], 1) * 9,
+                carbo_g=round(r['carbo_g'], 1), carbo_kcal=round(r['carbo_g'], 1) * 4,
+                activas=r['activas'], relajadas=r['relajadas'], factible=r['factible'])
+
+
+# ==================== INCERTIDUMBRE DE MEDICIÓN ====================
+
+# Error estándar de estimación (puntos de % grasa) del valor corregido de cada
+# método frente al modelo 4C. La corrección de corregir_porcentaje_grasa()
+# quita el sesgo, no el error individual.
+ERROR_MEDICION_GRASA = {
+    "Omron HBF-516 (BIA)": 4.0,
+    "InBody 270 (BIA profesional)": 3.5,
+    "Bod Pod (Pletismografía)": 2.5,
+    "DEXA (Gold Standard)": 1.5,
+}
+ERROR_MEDICION_DEFECTO = 3.5
+ERROR_PESO_KG = 0.2
+ERROR_ESTATURA_CM = 0.5
+
+MUESTRAS_INCERTIDUMBRE = 10_000
+PERCENTILES_INCERTIDUMBRE = (10, 50, 90)
+
+
+def propagar_incertidumbre(evaluacion, muestras=MUESTRAS_INCERTIDUMBRE, semilla=None, modelo_error=None):
+    """
+    Propaga el error de medición a las métricas derivadas por Monte-Carlo.
+
+    Se sortean `muestras` valores de % grasa corregido, peso y estatura
+    alrededor de los medidos (normales con el error del método) y se calculan
+    MLG, TMB, FFMI y, si la evaluación trae gasto energético, el GE y la
+    ingesta objetivo, todo en una pasada de arreglos. Las reglas por tramos
+    de % grasa (ETA, fase, tope por recuperación) se evalúan una vez por valor
+    distinto de % grasa redondeado a 0.1, el paso de sus tablas.
+
+    Args:
+        evaluacion: dict de evaluar_cliente() (al menos sexo, peso, estatura,
+                    grasa_corregida y metodo_grasa)
+        muestras: número de sorteos
+        semilla: semilla del generador (resultados reproducibles)
+        modelo_error: {método: error en puntos de % grasa} (default ERROR_MEDICION_GRASA)
+
+    Returns:
+        dict: 'muestras', 'error_grasa' y, por métrica ('grasa_corregida',
+        'mlg', 'tmb', 'ffmi', 'gasto_energetico', 'ingesta_calorica'), un dict
+        {'p10', 'p50', 'p90'}
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(semilla)
+    sexo = evaluacion['sexo']
+    error_grasa = (modelo_error or ERROR_MEDICION_GRASA).get(evaluacion.get('metodo_grasa'),
+                                                               ERROR_MEDICION_DEFECTO)
+    ruido = rng.standard_normal((3, muestras))
+
+    grasa = np.clip(safe_float(evaluacion['grasa_corregida']) + error_grasa * ruido[0], 3.0, 60.0)
+    peso = safe_float(evaluacion['peso']) + ERROR_PESO_KG * ruido[1]
+    estatura_m = (safe_float(evaluacion['estatura']) + ERROR_ESTATURA_CM * ruido[2]) / 100
+
+    # Mismas fórmulas que calcular_mlg, calcular_tmb_cunningham y calcular_ffmi
+    mlg = peso * (1 - grasa / 100)
+    tmb = 370 + 21.6 * mlg
+    metricas = {
+        'grasa_corregida': grasa,
+        'mlg': mlg,
+        'tmb': tmb,
+        'ffmi': mlg / estatura_m ** 2 + 6.3 * (1.8 - estatura_m),
+    }
+
+    if evaluacion.get('geaf') is not None:
+        distintos, posiciones = np.unique(np.round(grasa, 1), return_inverse=True)
+        eta = np.array([obtener_factor_eta(g, sexo) for g in distintos.tolist()])[posiciones]
+        porcentaje = np.array([determinar_fase_nutricional_refinada(g, sexo)[1] for g in distintos.tolist()],
+                              dtype=float)[posiciones]
+        recuperacion = evaluacion.get('recuperacion')
+        if recuperacion:
+            # Pocos porcentajes distintos: el tope se aplica una vez por cada uno
+            niveles, posiciones = np.unique(porcentaje, return_inverse=True)
+            porcentaje = np.array([ajustar_por_recuperacion(p, nivel_recuperacion=recuperacion['nivel'])['porcentaje']
+                                   for p in niveles.tolist()], dtype=float)[posiciones]
+        gasto = calcular_gasto_energetico(tmb, evaluacion['geaf'], eta, evaluacion.get('kcal_sesion', 0),
+                                          evaluacion.get('dias_fuerza', 0))
+        metricas['gasto_energetico'] = gasto
+        metricas['ingesta_calorica'] = gasto * (1 + porcentaje / 100)
+
+    # Percentiles con interpolación lineal (como np.percentile) sobre las filas
+    # ordenadas: ordenar la matriz completa es más rápido que np.percentile
+    ordenadas = np.sort(np.vstack(list(metricas.values())), axis=1)
+    posicion = np.array(PERCENTILES_INCERTIDUMBRE) / 100 * (muestras - 1)
+    abajo = np.floor(posicion).astype(int)
+    arriba = np.minimum(abajo + 1, muestras - 1)
+    cortes = ordenadas[:, abajo] + (ordenadas[:, arriba] - ordenadas[:, abajo]) * (posicion - abajo)
+
+    resultado = {'muestras': muestras, 'error_grasa': error_grasa}
+    for i, nombre in enumerate(metricas):
+        resultado[nombre] = {f"p{p}": float(cortes[i, j]) for j, p in enumerate(PERCENTILES_INCERTIDUMBRE)}
+    return resultado
+
+
+# ==================== ETAPAS DE POSPROCESO ====================
+# Cada etapa recibe (evaluacion, datos) y devuelve la evaluación ajustada
+# (un dict nuevo). La estrategia elige qué etapas se aplican; cada una se mide
+# como span "motor.<etapa>" (ver trazas.py).
+
+def etapa_recuperacion(evaluacion, datos):
+    """Aplica ajustar_por_recuperacion() al plan tradicional y recalcula macros y proyección."""
+    suenyo = datos.get('suenyo_estres_data') or {}
+    ajuste = ajustar_por_recuperacion(
+        evaluacion['porcentaje'],
+        ir_se=datos.get('ir_se', suenyo.get('ir_se')),
+        nivel_recuperacion=datos.get('nivel_recuperacion', suenyo.get('nivel_recuperacion')),
+    )
+    evaluacion = dict(evaluacion, recuperacion=ajuste)
+    if ajuste is None:
+        return evaluacion
+
+    if ajuste['tope_deficit'] is not None:
+        porcentaje = ajuste['porcentaje']
+        ingesta = evaluacion['gasto_energetico'] * (1 + porcentaje / 100)
+        evaluacion.update(
+            porcentaje=porcentaje,
+            fase=f"Déficit recomendado: {-porcentaje}% (tope por recuperación {ajuste['nivel']})",
+            ingesta_calorica=ingesta,
+            macros=calcular_macros_tradicional(ingesta, evaluacion['tmb'], evaluacion['sexo'],
+                                               evaluacion['grasa_corregida'], evaluacion['peso'],
+                                               evaluacion['mlg']),
+            proyeccion=calcular_proyeccion_cientifica(evaluacion['sexo'], evaluacion['grasa_corregida'],
+                                                      evaluacion['nivel_entrenamiento'],
+                                                      evaluacion['peso'], porcentaje),
+        )
+    if ajuste['ciclaje_4_3']:
+        evaluacion['ciclaje_4_3'] = calcular_ciclaje_4_3(evaluacion['ingesta_calorica'],
+                                                         evaluacion['macros']['proteina_g'],
+                                                         evaluacion['macros']['grasa_g'])
+    return evaluacion
+
+
+def etapa_tmb(ecuacion):
+    """
+    Etapa que toma el TMB de `ecuacion` (ver ecuaciones_tmb.py), recalcula
+    gasto energético, ingesta y macros, y agrega el ensamble de ecuaciones
+    como 'tmb_ensamble'.
+    """
+    def etapa(evaluacion, datos):
+        ensamble = tmb_ensamble(evaluacion['peso'], evaluacion['estatura'], evaluacion['edad'],
+                                evaluacion['sexo'], evaluacion['mlg'])
+        tmb = ensamble[ecuacion]
+        gasto = calcular_gasto_energetico(tmb, evaluacion['geaf'], evaluacion['eta'],
+                                          evaluacion['kcal_sesion'], evaluacion['dias_fuerza'])
+        ingesta = gasto * (1 + evaluacion['porcentaje'] / 100)
+        return dict(evaluacion, tmb=tmb, ecuacion_tmb=ecuacion, tmb_ensamble=ensamble,
+                    gasto_energetico=gasto, ingesta_calorica=ingesta,
+                    macros=calcular_macros_tradicional(ingesta, tmb, evaluacion['sexo'],
+                                                       evaluacion['grasa_corregida'], evaluacion['peso'],
+                                                       evaluacion['mlg']))
+    etapa.__name__ = f"etapa_tmb_{ecuacion}"
+    return etapa
+
+
+def etapa_macros_restringidas(evaluacion, datos):
+    """Reemplaza macros, ciclaje 4-3 y macros PSMF por sus versiones con restricciones y cierre exacto."""
+    macros = calcular_macros_restringidas(evaluacion['ingesta_calorica'], evaluacion['tmb'], evaluacion['sexo'],
+                                          evaluacion['grasa_corregida'], evaluacion['peso'], evaluacion['mlg'],
+                                          evaluacion['nivel_entrenamiento'])
+    restricciones = macros.pop('restricciones')
+    evaluacion = dict(evaluacion, macros=macros, macros_psmf=calcular_macros_psmf_restringidas(evaluacion['psmf']))
+    if 'ciclaje_4_3' in evaluacion:
+        evaluacion['ciclaje_4_3'] = resolver_ciclaje_4_3(evaluacion['ingesta_calorica'], *restricciones,
+                                                         dias_low=CICLAJE_DIAS_LOW, factor_low=CICLAJE_FACTOR_LOW)
+    return evaluacion
+
+
+def etapa_incertidumbre(evaluacion, datos):
+    """Agrega los intervalos P10/P50/P90 de propagar_incertidumbre()."""
+    return dict(evaluacion, incertidumbre=propagar_incertidumbre(evaluacion))
+
+
+# Estrategia → etapas de posproceso, en orden
+ETAPAS_POR_ESTRATEGIA = {
+    'tradicional': (etapa_recuperacion,),
+    'con_incertidumbre': (etapa_recuperacion, etapa_incertidumbre),
+    'sin_ajustes': (),
+    'macros_restringidas': (etapa_recuperacion, etapa_macros_restringidas),
+}
+# "tmb_<ecuación>": plan tradicional con el TMB de otra ecuación del ensamble
+ETAPAS_POR_ESTRATEGIA.update({f"tmb_{ecuacion}": (etapa_tmb(ecuacion), etapa_recuperacion)
+                              for ecuacion in ECUACIONES_TMB})
+ESTRATEGIA_POR_DEFECTO = 'tradicional'
+
+
+# ==================== EVALUACIÓN COMPLETA ====================
+
+def evaluar_cliente(datos, estrategia=None):
+    """
+    Ejecuta el flujo de cálculo completo para una evaluación, sin interfaz.
+
+    Reproduce el orden de streamlit_app.py: corrección de grasa → MLG → TMB →
+    índices corporales → gasto energético → fase nutricional → macros → PSMF
+    → proyección, y después las etapas de posproceso de la estrategia.
+
+    Args:
+        datos: dict con 'sexo', 'edad', 'peso', 'estatura', 'grasa_corporal' y
+               opcionalmente 'metodo_grasa', 'nivel_entrenamiento',
+               'nivel_actividad', 'dias_fuerza', 'circunferencia_cintura',
+               'circunferencia_cuello', 'circunferencia_cadera',
+               'circunferencia_muneca', 'circunferencia_tobillo',
+               'ir_se' / 'nivel_recuperacion' (o 'suenyo_estres_data')
+        estrategia: clave de ETAPAS_POR_ESTRATEGIA (default datos['estrategia']
+               o ESTRATEGIA_POR_DEFECTO)
+
+    Returns:
+        dict con todos los resultados derivados (valores serializables)
+    """
+    sexo = datos.get('sexo', 'Hombre')
+    edad = safe_int(datos.get('edad'), 30)
+    peso = safe_float(datos.get('peso'))
+    estatura = safe_float(datos.get('estatura'))
+    grasa_corporal = safe_float(datos.get('grasa_corporal'))
+    metodo_grasa = datos.get('metodo_grasa') or "Omron HBF-516 (BIA)"
+    nivel_entrenamiento = datos.get('nivel_entrenamiento') or 'intermedio'
+    nivel_actividad = datos.get('nivel_actividad') or 'Sedentario'
+    dias_fuerza = safe_int(datos.get('dias_fuerza'), 3)
+    circunferencia_cintura = safe_float(datos.get('circunferencia_cintura'))
+    circunferencia_cuello = safe_float(datos.get('circunferencia_cuello'))
+    circunferencia_cadera = safe_float(datos.get('circunferencia_cadera'))
+
+    grasa_corregida = corregir_porcentaje_grasa(grasa_corporal, metodo_grasa, sexo)
+    mlg = calcular_mlg(peso, grasa_corregida)
+    tmb = calcular_tmb_cunningham(mlg)
+    imc = peso / ((estatura / 100) ** 2) if estatura > 0 else 0.0
+    ffmi = calcular_ffmi(mlg, estatura)
+    wthr = circunferencia_cintura / estatura if circunferencia_cintura > 0 and estatura > 0 else None
+
+    geaf = obtener_geaf(nivel_actividad)
+    eta = obtener_factor_eta(grasa_corregida, sexo)
+    kcal_sesion = obtener_kcal_sesion(nivel_entrenamiento)
+    gasto_energetico = calcular_gasto_energetico(tmb, geaf, eta, kcal_sesion, dias_fuerza)
+
+    fase, porcentaje = determinar_fase_nutricional_refinada(grasa_corregida, sexo)
+    ingesta_calorica = gasto_energetico * (1 + porcentaje / 100)
+    macros = calcular_macros_tradicional(ingesta_calorica, tmb, sexo, grasa_corregida, peso, mlg)
+    psmf_recs = calculate_psmf(sexo, peso, grasa_corregida, mlg, estatura)
+    proyeccion = calcular_proyeccion_cientifica(sexo, grasa_corregida, nivel_entrenamiento, peso, porcentaje)
+
+    bf_operacional, _ = calcular_bf_operacional(bf_corr_pct=grasa_corregida)
+    categoria_bf = clasificar_bf(bf_operacional, sexo)
+
+    evaluacion = {
+        'sexo': sexo,
+        'edad': edad,
+        'peso': peso,
+        'estatura': estatura,
+        'imc': imc,
+        'metodo_grasa': metodo_grasa,
+        'grasa_medida': grasa_corporal,
+        'grasa_corregida': grasa_corregida,
+        'mlg': mlg,
+        'masa_grasa': peso - mlg,
+        'tmb': tmb,
+        'ffmi': ffmi,
+        'nivel_ffmi': clasificar_ffmi(ffmi, sexo),
+        'potencial_muscular': potencial_muscular(sexo, estatura, mlg, grasa_corregida,
+                                                 safe_float(datos.get('circunferencia_muneca')),
+                                                 safe_float(datos.get('circunferencia_tobillo')),
+                                                 nivel_entrenamiento),
+        'modo_ffmi': obtener_modo_interpretacion_ffmi(grasa_corregida, sexo),
+        'fmi': calcular_fmi(peso, grasa_corregida, estatura),
+        'wthr': wthr,
+        'edad_metabolica': calcular_edad_metabolica(edad, grasa_corregida, sexo),
+        'masa_muscular_estimada': estimar_masa_muscular_desde_mlg(mlg, sexo, nivel_entrenamiento,
+                                                                  MODELOS_MASA_MUSCULAR.get(metodo_grasa)),
+        'categoria_bf': categoria_bf,
+        'contraste_grasa': contrastar_grasa(grasa_corregida, sexo, estatura, circunferencia_cintura,
+                                            circunferencia_cuello, circunferencia_cadera),
+        'nivel_entrenamiento': nivel_entrenamiento,
+        'geaf': geaf,
+        'eta': eta,
+        'kcal_sesion': kcal_sesion,
+        'dias_fuerza': dias_fuerza,
+        'gasto_energetico': gasto_energetico,
+        'fase': fase,
+        'porcentaje': porcentaje,
+        'ingesta_calorica': ingesta_calorica,
+        'macros': macros,
+        'psmf': psmf_recs,
+        'proyeccion': proyeccion
+    }
+
+    for etapa in ETAPAS_POR_ESTRATEGIA[estrategia or datos.get('estrategia') or ESTRATEGIA_POR_DEFECTO]:
+        with span(f"motor.{etapa.__name__}"):
+            evaluacion = etapa(evaluacion, datos)
+    return evaluacion
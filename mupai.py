@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""
+MUPAI - Línea de comandos
+
+Evaluación por lotes de las exportaciones de los equipos de composición
+corporal (Omron HBF-516, InBody 270, ...) sin pasar por el formulario.
+
+Uso:
+    python mupai.py evaluate --input scans.csv --method omron --out results.parquet --sexo-letras en
+    python mupai.py evaluate --input scans.xlsx --method inbody --out results.csv --html-dir reportes/
+    python mupai.py report --input results.parquet --out reportes/ --formato eml --tipo ambos
+    python mupai.py send --spool spool/ --encolar reportes/ --por-minuto 20
+    python mupai.py fit-omron --input pares.csv --modelo isotonica
+
+- Lee el archivo en bloques (--chunk-size filas) para no cargarlo entero en memoria
+  (CSV con pandas, .xlsx fila a fila con openpyxl; .xls antiguo sí se carga entero)
+- Aplica la conversión a 4C (corregir_porcentaje_grasa) y el motor completo
+  (motor_calculo.evaluar_cliente) repartiendo los bloques en un pool de procesos
+- Escribe la tabla bloque a bloque en .csv o .parquet (pyarrow) según la extensión
+  de --out, con las mismas columnas en todos los bloques
+- El sexo con una sola letra 'M' es ambiguo (male / mujer): se rechaza salvo
+  que --sexo-letras indique la convención del archivo (en: M/F, es: H/M)
+- Opcionalmente genera un reporte HTML por cliente
+- `report` regenera los reportes de email a partir de evaluaciones guardadas
+  (ver reportes_lote.py)
+- `send` encola .eml y los envía con una sola conexión SMTP y límite de ritmo
+  (ver cola_email.py); la contraseña se lee de la variable ZOHO_PASSWORD
+- `fit-omron` re-ajusta la tabla Omron→4C con lecturas pareadas Omron/DEXA
+  y escribe una versión nueva que el motor carga en caliente
+  (ver ajuste_omron_4c.py)
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+import unicodedata
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from ajuste_omron_4c import MODELOS, REMUESTREOS, AcumuladorPares, ajustar_tabla, guardar_tabla
+from cola_email import EnviadorSpool, encolar_bytes, MENSAJES_POR_MINUTO, SMTP_HOST, SMTP_PUERTO
+from motor_calculo import directorio_tablas_omron, safe_float, evaluar_cliente
+from reportes_lote import (FORMATOS_SALIDA, TIPOS_REPORTE, generar_reportes_lote,
+                           leer_evaluaciones, nombre_archivo_reporte, renderizar_reporte)
+
+
+# ==================== CONFIGURACIÓN ====================
+
+METODOS_CLI = {
+    'omron': "Omron HBF-516 (BIA)",
+    'inbody': "InBody 270 (BIA profesional)",
+    'bodpod': "Bod Pod (Pletismografía)",
+    'dexa': "DEXA (Gold Standard)",
+}
+
+# Alias de columnas de las exportaciones (normalizados: minúsculas, sin acentos
+# ni símbolos) → campo del motor
+ALIAS_COLUMNAS = {
+    'nombre': 'nombre', 'name': 'nombre', 'cliente': 'nombre', 'id': 'nombre', 'userid': 'nombre',
+    'sexo': 'sexo', 'sex': 'sexo', 'gender': 'sexo', 'genero': 'sexo',
+    'edad': 'edad', 'age': 'edad',
+    'peso': 'peso', 'pesokg': 'peso', 'weight': 'peso', 'weightkg': 'peso',
+    'estatura': 'estatura', 'estaturacm': 'estatura', 'height': 'estatura', 'heightcm': 'estatura',
+    'grasacorporal': 'grasa_corporal', 'grasa': 'grasa_corporal', 'bodyfat': 'grasa_corporal',
+    'bodyfatpct': 'grasa_corporal', 'bodyfatpercent': 'grasa_corporal', 'pbf': 'grasa_corporal',
+    'percentbodyfat': 'grasa_corporal', 'fat': 'grasa_corporal',
+    'cintura': 'circunferencia_cintura', 'circunferenciacintura': 'circunferencia_cintura',
+    'waist': 'circunferencia_cintura', 'waistcm': 'circunferencia_cintura',
+    'nivelactividad': 'nivel_actividad', 'actividad': 'nivel_actividad',
+    'nivelentrenamiento': 'nivel_entrenamiento', 'entrenamiento': 'nivel_entrenamiento',
+    'diasfuerza': 'dias_fuerza',
+}
+
+# Alias de columnas de los pares Omron/referencia para `fit-omron`
+ALIAS_PARES = {
+    'sexo': 'sexo', 'sex': 'sexo', 'gender': 'sexo', 'genero': 'sexo',
+    'omron': 'grasa_omron', 'grasaomron': 'grasa_omron', 'omronpct': 'grasa_omron', 'bia': 'grasa_omron',
+    'dexa': 'grasa_referencia', 'grasadexa': 'grasa_referencia', 'dexapct': 'grasa_referencia',
+    '4c': 'grasa_referencia', 'grasa4c': 'grasa_referencia', 'referencia': 'grasa_referencia',
+    'grasareferencia': 'grasa_referencia',
+}
+
+VALORES_SEXO = {
+    'hombre': "Hombre", 'h': "Hombre", 'male': "Hombre", 'masculino': "Hombre",
+    'mujer': "Mujer", 'f': "Mujer", 'female': "Mujer", 'femenino': "Mujer",
+}
+
+# Letras sueltas según la convención del archivo (--sexo-letras); 'm' es Hombre
+# en inglés y Mujer en español, así que sin convención se rechaza
+LETRAS_SEXO = {
+    'en': {'m': "Hombre", 'f': "Mujer"},
+    'es': {'h': "Hombre", 'm': "Mujer"},
+}
+LETRAS_AMBIGUAS = {'m'}
+
+# Campos escalares de la evaluación que pasan a la tabla de salida
+CAMPOS_SALIDA = [
+    'sexo', 'edad', 'peso', 'estatura', 'imc', 'metodo_grasa', 'grasa_medida',
+    'grasa_corregida', 'mlg', 'masa_grasa', 'tmb', 'ffmi', 'nivel_ffmi', 'modo_ffmi',
+    'fmi', 'wthr', 'edad_metabolica', 'masa_muscular_estimada', 'categoria_bf',
+    'nivel_entrenamiento', 'geaf', 'eta', 'gasto_energetico', 'fase', 'porcentaje',
+    'ingesta_calorica',
+]
+
+# Claves escalares de macros y PSMF. Son fijas porque cada bloque se escribe por
+# separado y todos deben tener el mismo esquema (sin PSMF aplicable faltan claves)
+CAMPOS_MACROS = [
+    'proteina_g', 'proteina_kcal', 'grasa_g', 'grasa_kcal', 'carbo_g', 'carbo_kcal',
+    'base_proteina', 'base_proteina_kg', 'factor_proteina', 'usar_mlg',
+]
+CAMPOS_PSMF = [
+    'psmf_aplicable', 'proteina_g_dia', 'grasa_g_dia', 'carbs_g_dia', 'calorias_dia',
+    'calorias_piso_dia', 'multiplicador', 'perfil_grasa', 'criterio', 'tier_psmf',
+    'base_proteina_usada', 'base_proteina_kg', 'carb_cap_aplicado_g', 'carb_cap_fue_aplicado',
+    'factor_proteina_psmf',
+]
+COLUMNAS_SALIDA = (['fila', 'nombre', 'error'] + CAMPOS_SALIDA
+                   + [f"macros_{c}" for c in CAMPOS_MACROS] + [f"psmf_{c}" for c in CAMPOS_PSMF])
+
+# Tipos en .parquet: estas columnas son texto o lógicas, 'fila' entera y el resto float64
+COLUMNAS_TEXTO = {
+    'nombre', 'error', 'sexo', 'metodo_grasa', 'nivel_ffmi', 'modo_ffmi', 'categoria_bf',
+    'nivel_entrenamiento', 'fase', 'macros_base_proteina', 'psmf_perfil_grasa', 'psmf_criterio',
+    'psmf_base_proteina_usada',
+}
+COLUMNAS_LOGICAS = {'macros_usar_mlg', 'psmf_psmf_aplicable', 'psmf_carb_cap_fue_aplicado'}
+
+
+# ==================== LECTURA ====================
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]', '', texto.lower())
+
+
+def normalizar_sexo(valor, letras=None):
+    """
+    "Hombre" / "Mujer" a partir del valor del archivo; con `letras` ('en' o
+    'es') las letras sueltas siguen esa convención. Devuelve el valor original
+    si no se reconoce o si es una letra ambigua sin convención.
+    """
+    clave = _normalizar(valor)
+    if letras:
+        return LETRAS_SEXO[letras].get(clave) or VALORES_SEXO.get(clave, valor)
+    return VALORES_SEXO.get(clave, valor)
+
+
+def sexo_ambiguo(valor):
+    return _normalizar(valor) in LETRAS_AMBIGUAS
+
+
+def mapear_columnas(columnas, alias=ALIAS_COLUMNAS):
+    """Devuelve {columna_original: campo_motor} para las columnas reconocidas."""
+    mapa = {}
+    for columna in columnas:
+        campo = alias.get(_normalizar(columna))
+        if campo and campo not in mapa.values():
+            mapa[columna] = campo
+    return mapa
+
+
+def _bloques_xlsx(ruta, chunk_size):
+    """Itera la primera hoja de un .xlsx en modo read_only, sin cargarla entera."""
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        encabezado = next(filas, None)
+        if encabezado is None:
+            return
+        columnas = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(encabezado)]
+        bloque = []
+        for fila in filas:
+            if all(v is None for v in fila):
+                continue
+            bloque.append(fila)
+            if len(bloque) == chunk_size:
+                yield pd.DataFrame(bloque, columns=columnas)
+                bloque = []
+        if bloque:
+            yield pd.DataFrame(bloque, columns=columnas)
+    finally:
+        libro.close()
+
+
+def leer_bloques(ruta, chunk_size):
+    """Itera el archivo de entrada en bloques de DataFrame."""
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == '.xlsx':
+        yield from _bloques_xlsx(ruta, chunk_size)
+    elif extension == '.xls':
+        # El formato binario antiguo no se puede leer por filas; se parte en memoria
+        df = pd.read_excel(ruta)
+        for inicio in range(0, len(df), chunk_size):
+            yield df.iloc[inicio:inicio + chunk_size]
+    else:
+        yield from pd.read_csv(ruta, chunksize=chunk_size)
+
+
+# ==================== EVALUACIÓN ====================
+
+def fila_a_datos(fila, metodo_grasa, defaults, letras_sexo=None):
+    """Convierte una fila ya mapeada a campos del motor en el dict de evaluar_cliente()."""
+    datos = dict(defaults)
+    datos.update({k: v for k, v in fila.items() if not (isinstance(v, float) and v != v)})
+    datos['sexo'] = normalizar_sexo(datos.get('sexo', ''), letras_sexo)
+    datos['metodo_grasa'] = metodo_grasa
+    return datos
+
+
+def validar_fila(datos):
+    """Validación mínima para no evaluar filas vacías o corruptas."""
+    if datos.get('sexo') not in ("Hombre", "Mujer"):
+        if sexo_ambiguo(datos.get('sexo')):
+            return f"sexo ambiguo ({datos.get('sexo')}): indica --sexo-letras en|es"
+        return "sexo no reconocido"
+    for campo, minimo, maximo in (('peso', 30, 200), ('estatura', 120, 220), ('grasa_corporal', 3, 60)):
+        valor = safe_float(datos.get(campo), 0.0)
+        if not minimo <= valor <= maximo:
+            return f"{campo} fuera de rango ({datos.get(campo)})"
+    return None
+
+
+def aplanar_evaluacion(evaluacion):
+    """Convierte la evaluación anidada en una fila plana para la tabla columnar."""
+    fila = {campo: evaluacion.get(campo) for campo in CAMPOS_SALIDA}
+    for prefijo, claves in (('macros', CAMPOS_MACROS), ('psmf', CAMPOS_PSMF)):
+        valores = evaluacion.get(prefijo) or {}
+        for clave in claves:
+            fila[f"{prefijo}_{clave}"] = valores.get(clave)
+    return fila
+
+
+def evaluar_bloque(filas, metodo_grasa, defaults, html_dir=None, letras_sexo=None):
+    """
+    Evalúa un bloque de filas (se ejecuta en un proceso del pool).
+
+    Si se indica html_dir, el propio proceso escribe el reporte HTML de cada
+    cliente válido (mismo contenido que el email al cliente).
+
+    Returns:
+        list: filas planas para la tabla de salida
+    """
+    salida = []
+    for fila in filas:
+        datos = fila_a_datos(fila, metodo_grasa, defaults, letras_sexo)
+        error = validar_fila(datos)
+        if error:
+            salida.append({'fila': fila.get('_fila'), 'nombre': datos.get('nombre'), 'error': error})
+            continue
+        evaluacion = evaluar_cliente(datos)
+        plano = aplanar_evaluacion(evaluacion)
+        plano.update({'fila': fila.get('_fila'), 'nombre': datos.get('nombre'), 'error': None})
+        salida.append(plano)
+        if html_dir:
+            evaluacion['nombre'] = datos.get('nombre') or f"Fila {plano['fila']}"
+            archivo = nombre_archivo_reporte(plano['fila'], evaluacion, 'cliente', 'html')
+            with open(os.path.join(html_dir, archivo), 'wb') as f:
+                f.write(renderizar_reporte(evaluacion, 'cliente', 'html'))
+    return salida
+
+
+def evaluar_archivo(ruta, metodo_grasa, chunk_size=2000, workers=None, defaults=None, html_dir=None,
+                    letras_sexo=None):
+    """
+    Evalúa el archivo completo repartiendo los bloques entre procesos.
+
+    Se mantienen como máximo 2 bloques por proceso en vuelo para que la
+    memoria no crezca con el tamaño del archivo; el orden se conserva.
+
+    Yields:
+        list de filas de salida por bloque, en orden
+    """
+    defaults = defaults or {}
+    workers = workers or os.cpu_count() or 1
+
+    def bloques():
+        fila_actual = 0
+        for df in leer_bloques(ruta, chunk_size):
+            mapa = mapear_columnas(df.columns)
+            df = df[list(mapa)].rename(columns=mapa)
+            registros = df.to_dict('records')
+            for i, registro in enumerate(registros):
+                registro['_fila'] = fila_actual + i + 1
+            fila_actual += len(registros)
+            yield registros
+
+    if workers == 1:
+        for registros in bloques():
+            yield evaluar_bloque(registros, metodo_grasa, defaults, html_dir, letras_sexo)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        en_vuelo = deque()
+        for registros in bloques():
+            en_vuelo.append(pool.submit(evaluar_bloque, registros, metodo_grasa, defaults, html_dir, letras_sexo))
+            if len(en_vuelo) >= workers * 2:
+                yield en_vuelo.popleft().result()
+        while en_vuelo:
+            yield en_vuelo.popleft().result()
+
+
+# ==================== SALIDA ====================
+
+def esquema_parquet():
+    """Esquema pyarrow de COLUMNAS_SALIDA, el mismo para todos los bloques."""
+    import pyarrow as pa
+
+    def tipo(columna):
+        if columna == 'fila':
+            return pa.int64()
+        if columna in COLUMNAS_TEXTO:
+            return pa.string()
+        if columna in COLUMNAS_LOGICAS:
+            return pa.bool_()
+        return pa.float64()
+
+    return pa.schema([(columna, tipo(columna)) for columna in COLUMNAS_SALIDA])
+
+
+class EscritorTabla:
+    """
+    Escribe la tabla de salida bloque a bloque (.parquet o .csv según la
+    extensión) para que la memoria no crezca con el tamaño del lote.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.parquet = ruta.lower().endswith('.parquet')
+        self.filas = 0
+        self.errores = 0
+        self._escritor = None
+        if self.parquet:
+            try:
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise SystemExit("❌ Para escribir .parquet instala pyarrow (pip install pyarrow) o usa --out *.csv")
+            self._escritor = pq.ParquetWriter(ruta, esquema_parquet())
+
+    def escribir(self, salida):
+        """Añade un bloque (lista de filas planas) al final de la tabla."""
+        df = pd.DataFrame(salida, columns=COLUMNAS_SALIDA)
+        if self.parquet:
+            import pyarrow as pa
+
+            self._escritor.write_table(pa.Table.from_pandas(df, schema=self._escritor.schema, preserve_index=False))
+        else:
+            df.to_csv(self.ruta, mode='a' if self.filas else 'w', header=not self.filas, index=False)
+        self.filas += len(df)
+        self.errores += int(df['error'].notna().sum())
+
+    def cerrar(self):
+        if not self.filas and not self.parquet:
+            # Entrada vacía: CSV con el encabezado y sin filas
+            self.escribir([])
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+# ==================== COMANDOS ====================
+
+def comando_evaluate(args):
+    inicio = time.perf_counter()
+    metodo_grasa = METODOS_CLI[args.method]
+    defaults = {
+        'nivel_actividad': args.actividad,
+        'nivel_entrenamiento': args.entrenamiento,
+        'dias_fuerza': args.dias_fuerza,
+    }
+    if args.html_dir:
+        os.makedirs(args.html_dir, exist_ok=True)
+
+    with EscritorTabla(args.out) as tabla:
+        for salida in evaluar_archivo(args.input, metodo_grasa, args.chunk_size,
+                                      args.workers, defaults, args.html_dir, args.sexo_letras):
+            tabla.escribir(salida)
+
+    print(f"✅ {tabla.filas - tabla.errores} evaluaciones, {tabla.errores} filas con error "
+          f"en {time.perf_counter() - inicio:.2f}s → {args.out}")
+    return 0
+
+
+def comando_report(args):
+    inicio = time.perf_counter()
+    evaluaciones = leer_evaluaciones(args.input)
+    # Las filas con error de `mupai evaluate` no tienen evaluación que reportar
+    evaluaciones = [e for e in evaluaciones if not e.get('error')]
+    tipos = TIPOS_REPORTE if args.tipo == 'ambos' else (args.tipo,)
+
+    def progreso(hechos, total):
+        print(f"\r📄 {hechos}/{total} clientes", end='', flush=True)
+
+    resultado = generar_reportes_lote(evaluaciones, args.out, tipos, args.formato,
+                                      args.workers, progreso)
+    print()
+    for error in resultado['errores']:
+        print(f"⚠️ Cliente {error['indice']} ({error['tipo']}): {error['error']}")
+    print(f"✅ {len(resultado['archivos'])} reportes en {time.perf_counter() - inicio:.2f}s → {args.out}")
+    return 1 if resultado['errores'] else 0
+
+
+def comando_send(args):
+    if args.encolar:
+        archivos = sorted(glob.glob(os.path.join(args.encolar, '*.eml')))
+        for archivo in archivos:
+            with open(archivo, 'rb') as f:
+                encolar_bytes(f.read(), args.spool)
+        print(f"📥 {len(archivos)} mensajes encolados en {args.spool}")
+
+    enviador = EnviadorSpool(args.spool, host=args.host, puerto=args.puerto,
+                             password=os.environ.get('ZOHO_PASSWORD'),
+                             usar_starttls=not args.sin_starttls,
+                             mensajes_por_minuto=args.por_minuto)
+    if args.daemon:
+        enviador.ejecutar()
+        return 0
+    conteo = enviador.procesar()
+    print(f"✅ {conteo['enviado']} enviados, {conteo['reintento']} reintentos, "
+          f"{conteo['fallido']} fallidos (detalle en {os.path.join(args.spool, 'resultados.jsonl')})")
+    return 1 if conteo['fallido'] else 0
+
+
+def comando_fit_omron(args):
+    inicio = time.perf_counter()
+    acumulador = AcumuladorPares()
+    for df in leer_bloques(args.input, args.chunk_size):
+        mapa = mapear_columnas(df.columns, ALIAS_PARES)
+        faltantes = {'sexo', 'grasa_omron', 'grasa_referencia'} - set(mapa.values())
+        if faltantes:
+            raise SystemExit(f"❌ Faltan columnas en {args.input}: {', '.join(sorted(faltantes))}")
+        df = df[list(mapa)].rename(columns=mapa)
+        if args.sexo_letras is None and df['sexo'].map(sexo_ambiguo).any():
+            raise SystemExit(f"❌ Sexo 'M' ambiguo en {args.input} (male / mujer): indica --sexo-letras en|es")
+        sexo = df['sexo'].map(lambda v: normalizar_sexo(v, args.sexo_letras))
+        acumulador.agregar(sexo.to_numpy(), pd.to_numeric(df['grasa_omron'], errors='coerce'),
+                           pd.to_numeric(df['grasa_referencia'], errors='coerce'))
+
+    tabla = ajustar_tabla(acumulador, args.modelo, args.remuestreos, args.semilla)
+    if not tabla['sexos']:
+        print(f"❌ Ningún sexo tiene pares suficientes ({acumulador.descartados} descartados); no se escribe tabla")
+        return 1
+    for sexo, ajuste in tabla['sexos'].items():
+        lineal = ajuste['lineal']
+        print(f"{sexo}: {ajuste['muestras']} pares, gc_4c = {lineal['intercepto']:.3f} + "
+              f"{lineal['pendiente']:.3f}·omron (IC95 pendiente {lineal['ic95_pendiente'][0]:.3f}-"
+              f"{lineal['ic95_pendiente'][1]:.3f}); RMSE {ajuste['rmse']:.2f} vs tabla vigente "
+              f"{ajuste['rmse_tabla_actual']:.2f}")
+    version, ruta = guardar_tabla(tabla, args.out, fuente=os.path.basename(args.input))
+    print(f"✅ Tabla {args.modelo} v{version} ({acumulador.descartados} pares descartados) "
+          f"en {time.perf_counter() - inicio:.2f}s → {ruta}")
+    return 0
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog='mupai', description="MUPAI - herramientas de línea de comandos")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    ev = sub.add_parser('evaluate', help="Evalúa una exportación CSV/Excel de báscula")
+    ev.add_argument('--input', required=True, help="Archivo .csv, .xlsx o .xls")
+    ev.add_argument('--method', required=True, choices=sorted(METODOS_CLI),
+                    help="Equipo de medición (define la conversión a 4C)")
+    ev.add_argument('--out', required=True, help="Salida .csv o .parquet (requiere pyarrow)")
+    ev.add_argument('--html-dir', help="Directorio para reportes HTML por cliente")
+    ev.add_argument('--chunk-size', type=int, default=2000, help="Filas por bloque (default 2000)")
+    ev.add_argument('--workers', type=int, default=None, help="Procesos (default: núcleos de CPU)")
+    ev.add_argument('--actividad', default="Sedentario", help="Nivel de actividad si no viene en el archivo")
+    ev.add_argument('--entrenamiento', default="intermedio", help="Nivel de entrenamiento si no viene en el archivo")
+    ev.add_argument('--dias-fuerza', type=int, default=3, help="Días de fuerza si no viene en el archivo")
+    ev.add_argument('--sexo-letras', choices=sorted(LETRAS_SEXO), default=None,
+                    help="Convención de las letras de sexo: en (M/F) o es (H/M); sin ella 'M' se rechaza")
+    ev.set_defaults(funcion=comando_evaluate)
+
+    rp = sub.add_parser('report', help="Genera los reportes de evaluaciones guardadas")
+    rp.add_argument('--input', required=True, help="Evaluaciones .jsonl, .json, .csv o .parquet")
+    rp.add_argument('--out', required=True, help="Directorio de salida")
+    rp.add_argument('--formato', choices=FORMATOS_SALIDA, default='html', help="html o eml (default html)")
+    rp.add_argument('--tipo', choices=TIPOS_REPORTE + ('ambos',), default='cliente',
+                    help="Reporte cliente, parte2 (interno) o ambos")
+    rp.add_argument('--workers', type=int, default=None, help="Procesos (default: núcleos de CPU)")
+    rp.set_defaults(funcion=comando_report)
+
+    sd = sub.add_parser('send', help="Envía los mensajes del spool de email")
+    sd.add_argument('--spool', required=True, help="Directorio del spool")
+    sd.add_argument('--encolar', help="Directorio con .eml a encolar antes de enviar")
+    sd.add_argument('--por-minuto', type=int, default=MENSAJES_POR_MINUTO,
+                    help=f"Mensajes por minuto (default {MENSAJES_POR_MINUTO})")
+    sd.add_argument('--host', default=SMTP_HOST)
+    sd.add_argument('--puerto', type=int, default=SMTP_PUERTO)
+    sd.add_argument('--sin-starttls', action='store_true', help="No usar STARTTLS (servidor local)")
+    sd.add_argument('--daemon', action='store_true', help="Seguir esperando mensajes nuevos")
+    sd.set_defaults(funcion=comando_send)
+
+    fo = sub.add_parser('fit-omron', help="Re-ajusta la tabla Omron→4C con lecturas pareadas")
+    fo.add_argument('--input', required=True, help="CSV/Excel con sexo, Omron y DEXA/4C por fila")
+    fo.add_argument('--modelo', choices=MODELOS, default='lineal', help="lineal o isotonica (default lineal)")
+    fo.add_argument('--out', default=None,
+                    help=f"Directorio de tablas versionadas (default {directorio_tablas_omron()}, el que lee el motor)")
+    fo.add_argument('--remuestreos', type=int, default=REMUESTREOS,
+                    help=f"Remuestreos bootstrap (default {REMUESTREOS})")
+    fo.add_argument('--chunk-size', type=int, default=50000, help="Filas por bloque (default 50000)")
+    fo.add_argument('--semilla', type=int, default=None, help="Semilla del bootstrap (reproducible)")
+    fo.add_argument('--sexo-letras', choices=sorted(LETRAS_SEXO), default=None,
+                    help="Convención de las letras de sexo: en (M/F) o es (H/M); sin ella 'M' se rechaza")
+    fo.set_defaults(funcion=comando_fit_omron)
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    return args.funcion(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+"""
+Objetivo Inverso MUPAI - Semanas y déficit necesarios para un % grasa o peso meta
+
+Responde "¿cuándo llego a 15%?" con las reglas del propio motor en lugar de
+extrapolar a mano el rango semanal de calcular_proyeccion_cientifica():
+
+- Una grilla de planes candidatos (déficit tradicional 1-35%, superávit
+  1-20% y el PSMF cuando aplica) se simula en paralelo semana a semana con el
+  modelo de proyeccion_semanal.py (Forbes, TMB sobre la MLG de cada semana,
+  termogénesis adaptativa)
+- Plan tradicional: el déficit pedido se limita cada semana al tope
+  interpolado por % grasa de sugerir_deficit_interpolado_v2 (máximo 35%,
+  Murphy 2021), que baja a medida que el cliente se define
+- PSMF: las calorías se recalculan cada semana con los tiers de
+  calculate_psmf(); al dejar de aplicar (≤18% H / ≤23% M) continúa como
+  plan tradicional con el tope del momento
+- Raíz por candidato: primera semana que cruza la meta, interpolada
+  linealmente dentro de la semana
+- Conjunto de Pareto sobre (semanas, déficit medio, MLG perdida)
+- Meta igual a la situación actual: un único resultado "ya alcanzada" (plan
+  de mantenimiento, 0 semanas) sin simular la grilla
+
+Uso:
+    r = resolver_objetivo(85, 25, "Hombre", gasto_energetico=2700, grasa_objetivo=15)
+    r['pareto'][0]['semanas'], r['mas_rapido']['plan']
+    resolver_objetivo(..., grasa_objetivo=15, semanas_objetivo=20)['porcentaje_requerido']
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from proyeccion_semanal import (
+    CONSTANTE_FORBES, KCAL_POR_KG_GRASA, KCAL_POR_KG_MLG, MASA_GRASA_MINIMA_KG,
+    SEMANAS_MAX, TERMOGENESIS_KCAL_POR_KG, _TMB_INTERCEPTO, _TMB_PENDIENTE,
+)
+
+
+# ==================== CONSTANTES DEL SOLUCIONADOR ====================
+
+# Déficit máximo del plan tradicional (Murphy 2021: >35% aumenta la pérdida de MLG)
+DEFICIT_MAXIMO_PCT = 35.0
+
+# Tope de déficit (%) interpolado por % grasa: mismos puntos ancla que
+# sugerir_deficit_interpolado_v2 (spec_11_10_version.py), fuera de rango se
+# usan los extremos
+ANCLAS_TOPE_DEFICIT = {
+    'Hombre': ((10, 15), (15, 20), (20, 25), (25, 30), (40, DEFICIT_MAXIMO_PCT)),
+    'Mujer': ((18, 15), (23, 20), (28, 25), (33, 30), (45, DEFICIT_MAXIMO_PCT)),
+}
+
+# Grillas de planes candidatos (% del gasto)
+GRILLA_DEFICIT = np.arange(1.0, DEFICIT_MAXIMO_PCT + 0.5, 1.0)
+GRILLA_SUPERAVIT = np.arange(1.0, 20.5, 1.0)
+
+# Adherencia al plan (misma media que simular_proyeccion)
+ADHERENCIA = 0.85
+
+# Diferencia (% grasa o kg) por debajo de la cual la meta ya está alcanzada:
+# la mitad del decimal con que se muestran
+META_ALCANZADA = 0.05
+
+# PSMF: elegibilidad y piso calórico por sexo (calculate_psmf)
+GRASA_MINIMA_PSMF = {'Hombre': 18.0, 'Mujer': 23.0}
+PISO_KCAL_PSMF = {'Hombre': 800.0, 'Mujer': 700.0}
+CARB_CAP_POR_TIER = np.array([0.0, 50.0, 40.0, 30.0])      # índice = tier
+
+
+# ==================== REGLAS DEL MOTOR EN ARREGLOS ====================
+
+def tope_deficit(grasa_pct, sexo):
+    """Tope de déficit (%) por % grasa, como sugerir_deficit_interpolado_v2 × 100."""
+    x, y = zip(*ANCLAS_TOPE_DEFICIT['Hombre' if sexo == "Hombre" else 'Mujer'])
+    return np.interp(grasa_pct, x, y)
+
+
+def psmf_vectorizado(sexo, peso, grasa_pct, mlg, estatura_cm=None):
+    """
+    Tier y calorías de calculate_psmf() para arreglos de (peso, % grasa, MLG).
+
+    Returns:
+        (aplicable, tier, calorias_dia): arreglos; tier 0 y calorías NaN
+        donde el PSMF no aplica
+    """
+    peso, grasa, mlg = (np.asarray(v, dtype=float) for v in (peso, grasa_pct, mlg))
+    hombre = sexo == "Hombre"
+    aplicable = grasa > GRASA_MINIMA_PSMF['Hombre' if hombre else 'Mujer']
+
+    if estatura_cm:
+        estatura_m = estatura_cm / 100
+        imc_40 = peso / estatura_m ** 2 >= 40
+        base_tier3 = np.full_like(peso, 25 * estatura_m ** 2)
+    else:
+        imc_40 = np.zeros_like(peso, dtype=bool)
+        base_tier3 = mlg
+    alto, moderado = (35, 25) if hombre else (45, 35)
+    tier = np.where(imc_40 | (grasa >= alto), 3, np.where(grasa >= moderado, 2, 1))
+    base = np.choose(tier - 1, [peso, mlg, base_tier3])
+
+    magro = grasa < 25
+    proteina = np.round(base * np.where(magro, 1.8, 1.6), 1)
+    grasa_g = np.where(magro, 30.0, 50.0)
+    multiplicador = np.where(grasa > 35, 8.3, np.where(grasa >= (25 if hombre else 30), 9.0, 9.6))
+    kcal_objetivo = np.round(proteina * multiplicador, 0)
+    carbos = np.minimum(np.maximum((kcal_objetivo - 4 * proteina - 9 * grasa_g) / 4, 0),
+                        CARB_CAP_POR_TIER[tier])
+    calorias = np.maximum(4 * proteina + 9 * grasa_g + 4 * carbos, PISO_KCAL_PSMF['Hombre' if hombre else 'Mujer'])
+    return aplicable, np.where(aplicable, tier, 0), np.where(aplicable, calorias, np.nan)
+
+
+# ==================== SIMULACIÓN DE LA GRILLA ====================
+
+def _simular_grilla(peso, grasa_corregida, sexo, gasto_energetico, porcentajes, psmf, estatura,
+                    semanas, adherencia):
+    """
+    Avanza todos los candidatos a la vez (una columna por plan).
+
+    Returns:
+        dict de series (semanas + 1, candidatos): peso, grasa_pct, mlg,
+        deficit_pct (efectivo de cada semana), ingesta, tier_psmf
+    """
+    n = len(porcentajes)
+    mlg_inicial = peso * (1 - grasa_corregida / 100)
+    tmb_inicial = _TMB_INTERCEPTO + _TMB_PENDIENTE * mlg_inicial
+    factor_actividad = gasto_energetico / tmb_inicial if tmb_inicial > 0 else 1.0
+
+    peso_t = np.full(n, peso)
+    mlg_t = np.full(n, mlg_inicial)
+    grasa_t = peso_t - mlg_t
+    en_psmf = psmf.copy()
+
+    forma = (semanas + 1, n)
+    series = {clave: np.full(forma, np.nan) for clave in ('peso', 'grasa_pct', 'mlg', 'deficit_pct', 'ingesta')}
+    series['tier_psmf'] = np.zeros(forma, dtype=int)
+    series['peso'][0], series['mlg'][0], series['grasa_pct'][0] = peso_t, mlg_t, grasa_corregida
+
+    for semana in range(semanas):
+        grasa_pct = grasa_t / peso_t * 100
+        gasto_t = (_TMB_INTERCEPTO + _TMB_PENDIENTE * mlg_t) * factor_actividad \
+            - TERMOGENESIS_KCAL_POR_KG * np.maximum(peso - peso_t, 0.0)
+
+        # Tradicional: déficit pedido con el tope del % grasa actual; superávit sin tope
+        porcentaje_t = np.where(porcentajes < 0, -np.minimum(-porcentajes, tope_deficit(grasa_pct, sexo)),
+                                porcentajes)
+        ingesta_t = gasto_t * (1 + porcentaje_t / 100)
+
+        # PSMF con el tier de la semana; al dejar de aplicar pasa a tradicional
+        aplicable, tier, kcal_psmf = psmf_vectorizado(sexo, peso_t, grasa_pct, mlg_t, estatura)
+        en_psmf &= aplicable
+        ingesta_t = np.where(en_psmf, np.minimum(kcal_psmf, gasto_t), ingesta_t)
+        series['tier_psmf'][semana + 1] = np.where(en_psmf, tier, 0)
+
+        ingesta_efectiva = gasto_t + adherencia * (ingesta_t - gasto_t)
+        fraccion_mlg = CONSTANTE_FORBES / (CONSTANTE_FORBES + grasa_t)
+        kcal_por_kg = fraccion_mlg * KCAL_POR_KG_MLG + (1.0 - fraccion_mlg) * KCAL_POR_KG_GRASA
+        delta_peso = 7.0 * (ingesta_efectiva - gasto_t) / kcal_por_kg
+
+        mlg_t = mlg_t + fraccion_mlg * delta_peso
+        grasa_t = np.maximum(grasa_t + (1.0 - fraccion_mlg) * delta_peso, MASA_GRASA_MINIMA_KG)
+        peso_t = mlg_t + grasa_t
+
+        series['peso'][semana + 1] = peso_t
+        series['mlg'][semana + 1] = mlg_t
+        series['grasa_pct'][semana + 1] = grasa_t / peso_t * 100
+        series['deficit_pct'][semana + 1] = (1 - ingesta_t / gasto_t) * 100
+        series['ingesta'][semana + 1] = ingesta_t
+    return series
+
+
+def _cruces(serie, objetivo, bajando):
+    """
+    Raíz por columna: primera semana (fraccionaria) en que la serie alcanza
+    el objetivo; NaN si no lo alcanza dentro del horizonte.
+    """
+    alcanzado = serie <= objetivo if bajando else serie >= objetivo
+    indice = alcanzado.argmax(axis=0)
+    columnas = np.arange(serie.shape[1])
+    anterior = serie[np.maximum(indice - 1, 0), columnas]
+    actual = serie[indice, columnas]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fraccion = np.where(actual != anterior, (anterior - objetivo) / (anterior - actual), 0.0)
+    semanas = np.where(indice > 0, indice - 1 + np.clip(fraccion, 0, 1), 0.0)
+    return np.where(alcanzado.any(axis=0), semanas, np.nan), indice
+
+
+def _pareto(criterios):
+    """Índices no dominados (minimizando cada columna); empates se quedan con el primero."""
+    criterios = np.round(criterios, 6)
+    domina = (criterios[:, None, :] <= criterios[None, :, :]).all(axis=2) \
+        & (criterios[:, None, :] < criterios[None, :, :]).any(axis=2)
+    repetido = np.triu((criterios[:, None, :] == criterios[None, :, :]).all(axis=2), k=1)
+    return np.flatnonzero(~domina.any(axis=0) & ~repetido.any(axis=0))
+
+
+# ==================== SOLUCIONADOR ====================
+
+def resolver_objetivo(peso, grasa_corregida, sexo, gasto_energetico, grasa_objetivo=None,
+                      peso_objetivo=None, estatura=None, semanas_objetivo=None,
+                      semanas_max=SEMANAS_MAX, adherencia=ADHERENCIA) -> Dict:
+    """
+    Semanas y déficit/superávit necesarios para llegar a un % grasa o peso meta.
+
+    Args:
+        peso, grasa_corregida: estado actual (kg, %)
+        sexo: "Hombre" o "Mujer"
+        gasto_energetico: GE total actual (kcal/día)
+        grasa_objetivo / peso_objetivo: la meta (exactamente una de las dos)
+        estatura: cm (tier 3 del PSMF por IMC y peso ideal)
+        semanas_objetivo: si se indica, déficit (o superávit) tradicional que
+            llega justo en ese plazo
+        semanas_max: horizonte de búsqueda
+        adherencia: fracción del déficit/superávit que realmente se cumple
+
+    Returns:
+        dict con:
+            'objetivo': {'tipo', 'valor', 'actual'}
+            'direccion': "pérdida", "ganancia" o "mantenimiento" (meta ya
+                alcanzada: un solo plan 'mantenimiento' a 0 semanas)
+            'alcanzado': True si la meta ya coincide con el valor actual
+            'planes': un dict por candidato (plan, porcentaje, kcal_inicial,
+                semanas (None si no llega), deficit_medio_pct, peso_final,
+                grasa_final, mlg_perdida_kg y, en el PSMF, tiers [(semana, tier)]
+                con tier 0 desde que continúa como tradicional)
+            'pareto': planes no dominados en (semanas, déficit medio, MLG
+                perdida), ordenados por semanas
+            'mas_rapido': el plan que llega antes (None si ninguno llega)
+            'porcentaje_requerido': déficit (−) o superávit (+) tradicional
+                para semanas_objetivo (None si no se pidió o no es alcanzable)
+    """
+    if (grasa_objetivo is None) == (peso_objetivo is None):
+        raise ValueError("Indica exactamente uno: grasa_objetivo o peso_objetivo")
+    peso, grasa_corregida, gasto_energetico = float(peso), float(grasa_corregida), float(gasto_energetico)
+    tipo, valor, actual = (('grasa', float(grasa_objetivo), grasa_corregida) if grasa_objetivo is not None
+                           else ('peso', float(peso_objetivo), peso))
+    if abs(valor - actual) < META_ALCANZADA:
+        return _meta_alcanzada(tipo, valor, actual, peso, grasa_corregida, gasto_energetico, semanas_objetivo)
+    bajando = valor < actual
+    semanas_max = max(1, min(SEMANAS_MAX, int(semanas_max)))
+
+    if bajando:
+        porcentajes = -GRILLA_DEFICIT
+        psmf_aplica = bool(psmf_vectorizado(sexo, [peso], [grasa_corregida],
+                                            [peso * (1 - grasa_corregida / 100)], estatura)[0][0])
+        if psmf_aplica:
+            porcentajes = np.append(porcentajes, -DEFICIT_MAXIMO_PCT)
+    else:
+        porcentajes, psmf_aplica = GRILLA_SUPERAVIT, False
+    psmf = np.zeros(len(porcentajes), dtype=bool)
+    psmf[-1] = psmf_aplica
+
+    series = _simular_grilla(peso, grasa_corregida, sexo, gasto_energetico, porcentajes, psmf, estatura,
+                             semanas_max, adherencia)
+    semanas, indice = _cruces(series['grasa_pct' if tipo == 'grasa' else 'peso'], valor, bajando)
+
+    # Métricas hasta la semana en que se alcanza la meta (o el horizonte)
+    fin = np.where(np.isnan(semanas), semanas_max, np.maximum(indice, 1))
+    columnas = np.arange(len(porcentajes))
+    activas = np.arange(1, semanas_max + 1)[:, None] <= fin
+    deficit_medio = np.where(activas, series['deficit_pct'][1:], 0).sum(axis=0) / fin
+    mlg_perdida = series['mlg'][0] - series['mlg'][fin, columnas]
+
+    planes = []
+    for i, porcentaje in enumerate(porcentajes):
+        plan = {
+            'plan': 'psmf' if psmf[i] else 'tradicional',
+            'porcentaje': float(porcentaje),
+            'kcal_inicial': round(float(series['ingesta'][1, i])),
+            'semanas': None if np.isnan(semanas[i]) else round(float(semanas[i]), 1),
+            'deficit_medio_pct': round(float(deficit_medio[i]), 1),
+            'peso_final': round(float(series['peso'][fin[i], i]), 1),
+            'grasa_final': round(float(series['grasa_pct'][fin[i], i]), 1),
+            'mlg_perdida_kg': round(float(mlg_perdida[i]), 2),
+        }
+        if psmf[i]:
+            tiers = series['tier_psmf'][1:fin[i] + 1, i]
+            cambios = np.flatnonzero(np.diff(tiers, prepend=-1))
+            plan['tiers'] = [(int(c) + 1, int(tiers[c])) for c in cambios]
+        planes.append(plan)
+
+    llegan = np.flatnonzero(~np.isnan(semanas))
+    pareto = []
+    if len(llegan):
+        criterios = np.column_stack([semanas[llegan], np.abs(deficit_medio[llegan]), mlg_perdida[llegan]])
+        pareto = sorted((planes[llegan[i]] for i in _pareto(criterios)), key=lambda p: p['semanas'])
+
+    return {
+        'objetivo': {'tipo': tipo, 'valor': valor, 'actual': actual},
+        'direccion': "pérdida" if bajando else "ganancia",
+        'alcanzado': False,
+        'planes': planes,
+        'pareto': pareto,
+        'mas_rapido': planes[llegan[np.argmin(semanas[llegan])]] if len(llegan) else None,
+        'porcentaje_requerido': _porcentaje_para_semanas(porcentajes[~psmf], semanas[~psmf], semanas_objetivo),
+    }
+
+
+def _meta_alcanzada(tipo, valor, actual, peso, grasa_corregida, gasto_energetico, semanas_objetivo) -> Dict:
+    """Resultado de resolver_objetivo() cuando la meta ya coincide con el valor actual."""
+    plan = {
+        'plan': 'mantenimiento',
+        'porcentaje': 0.0,
+        'kcal_inicial': round(gasto_energetico),
+        'semanas': 0.0,
+        'deficit_medio_pct': 0.0,
+        'peso_final': round(peso, 1),
+        'grasa_final': round(grasa_corregida, 1),
+        'mlg_perdida_kg': 0.0,
+    }
+    return {
+        'objetivo': {'tipo': tipo, 'valor': valor, 'actual': actual},
+        'direccion': "mantenimiento",
+        'alcanzado': True,
+        'planes': [plan],
+        'pareto': [plan],
+        'mas_rapido': plan,
+        'porcentaje_requerido': None if semanas_objetivo is None else 0.0,
+    }
+
+
+def _porcentaje_para_semanas(porcentajes, semanas, semanas_objetivo) -> Optional[float]:
+    """Interpola en la grilla tradicional el porcentaje que llega justo en semanas_objetivo."""
+    if semanas_objetivo is None:
+        return None
+    llegan = ~np.isnan(semanas)
+    if not llegan.any():
+        return None
+    # Con el tope, déficits mayores repiten semanas: se queda el menor de cada plazo
+    plazos, primero = np.unique(semanas[llegan], return_index=True)
+    magnitudes = np.abs(porcentajes[llegan])[primero]
+    if not plazos[0] <= semanas_objetivo <= plazos[-1]:
+        return None
+    return round(float(np.sign(porcentajes[0]) * np.interp(semanas_objetivo, plazos, magnitudes)), 1)
+
+
+def resumir_pareto(resultado) -> List[str]:
+    """Una línea de texto por plan del conjunto de Pareto (para el reporte o el coach)."""
+    unidad = '%' if resultado['objetivo']['tipo'] == 'grasa' else ' kg'
+    if resultado.get('alcanzado'):
+        return [f"Meta ya alcanzada: {resultado['objetivo']['actual']:g}{unidad} "
+                f"({resultado['mas_rapido']['kcal_inicial']} kcal/día de mantenimiento)"]
+    lineas = []
+    for p in resultado['pareto']:
+        nombre = "PSMF" if p['plan'] == 'psmf' else f"{'Déficit' if p['porcentaje'] < 0 else 'Superávit'} {abs(p['porcentaje']):.0f}%"
+        lineas.append(f"{nombre}: {p['semanas']:.1f} semanas hasta {resultado['objetivo']['valor']:g}{unidad} "
+                      f"({p['kcal_inicial']} kcal/día al inicio, MLG {-p['mlg_perdida_kg']:+.1f} kg)")
+    return lineas
@@ -0,0 +1,257 @@
+"""
+Optimizador de Macros MUPAI - Reparto de macros con restricciones y cierre calórico exacto
+
+Reemplaza el "proteína, luego grasa, el resto a carbohidratos" con recortes
+(max(0, ...), max(50, ...), carb caps) que deja totales que no cierran con las
+kcal objetivo (lo que vigila validar_cierre_calorico). Cada cliente es un
+problema pequeño en kcal por macro y = (4P, 9G, 4C):
+
+    minimizar  Σ peso_i · (y_i − objetivo_i)²
+    sujeto a   Σ y_i = kcal                      (cierre exacto)
+               mínimo_i ≤ y_i ≤ máximo_i         (pisos y techos)
+
+La solución es y_i = clip(objetivo_i + ν / peso_i, mínimo_i, máximo_i) con el
+ν que cierra las kcal; ν se busca por bisección para todo el lote a la vez.
+Con los objetivos del plan tradicional (carbohidratos = el resto) y ninguna
+restricción activa, la solución es exactamente calcular_macros_tradicional().
+
+Si las restricciones no caben en las kcal se relajan en orden de RELAJACIONES
+(primero la banda de carbohidratos, luego los techos, luego el piso de
+grasa); el resultado indica qué restricciones quedaron activas y cuáles se
+relajaron. De la banda solo se mueve el límite que no cabe y solo hasta
+donde alcanzan las kcal: en déficit los carbohidratos quedan en el valor
+factible más cercano a la banda, no en el resto.
+
+Uso:
+    r = resolver_macros(kcal, objetivos, minimos, maximos)   # arreglos (n, 3) en gramos
+    r['proteina_g'], r['activas'], r['relajadas'], r['factible']
+"""
+
+# Kcal por gramo: proteína, grasa, carbohidratos
+KCAL_POR_GRAMO = (4.0, 9.0, 4.0)
+MACROS = ('proteina', 'grasa', 'carbos')
+
+# Peso de apartarse de cada objetivo: la proteína es lo último que se mueve
+PESOS_MACROS = (10.0, 3.0, 1.0)
+
+# Banda de carbohidratos (g/kg) por nivel: mínimos de validar_carbos_burke_v2 y
+# máximos de los rangos por carga de entrenamiento de Burke 2011
+BANDA_CARBOS_BURKE = {
+    'principiante': (4.0, 7.0),
+    'intermedio': (5.0, 7.0),
+    'avanzado': (6.0, 10.0),
+    'élite': (7.0, 12.0),
+}
+
+# Techo de proteína (g/kg): meseta del efecto (spec 11/10)
+PROTEINA_MAXIMA_GKG = 3.1
+
+# Grasa entre el 20% y el 40% de las kcal (calcular_macros_tradicional)
+GRASA_FRACCION_TEI = (0.20, 0.40)
+
+
+def _carbos_min_que_cabe(limites, kcal):
+    """Piso de carbohidratos (kcal) bajado solo lo que falta para cerrar con los otros pisos."""
+    import numpy as np
+
+    return np.clip(kcal - limites['proteina_min'] - limites['grasa_min'], 0.0, limites['carbos_min'])
+
+
+def _carbos_max_que_cabe(limites, kcal):
+    """Techo de carbohidratos (kcal) subido solo lo que falta para cerrar con los otros techos."""
+    import numpy as np
+
+    return np.maximum(limites['carbos_max'], kcal - limites['proteina_max'] - limites['grasa_max'])
+
+
+# Orden de relajación cuando no hay solución: (nombre, restricción → nuevo límite o
+# función (límites, kcal) → límite, en kcal)
+RELAJACIONES = (
+    ('banda_carbos', {'carbos_min': _carbos_min_que_cabe, 'carbos_max': _carbos_max_que_cabe}),
+    ('maximos', {'proteina_max': float('inf'), 'grasa_max': float('inf')}),
+    ('grasa_min', {'grasa_min': 0.0}),
+)
+
+# Iteraciones de bisección (ν en kcal; 80 mitades dejan el cierre en ~1e-12 kcal)
+ITERACIONES_BISECCION = 80
+
+
+def _matriz(valores, n):
+    import numpy as np
+
+    return np.broadcast_to(np.asarray(valores, dtype=float), (n, 3)).copy()
+
+
+def _resolver_kcal(kcal, objetivo, minimo, maximo, pesos):
+    """Bisección vectorizada de ν: y = clip(objetivo + ν/peso, mínimo, máximo), Σy = kcal."""
+    import numpy as np
+
+    escala = np.nanmax(np.abs(np.concatenate([objetivo, kcal[:, None]], axis=1)), axis=1) + 1.0
+    bajo = -escala * pesos.max() * 4
+    alto = escala * pesos.max() * 4
+    for _ in range(ITERACIONES_BISECCION):
+        medio = (bajo + alto) / 2
+        suma = np.clip(objetivo + medio[:, None] / pesos, minimo, maximo).sum(axis=1)
+        arriba = suma > kcal
+        alto = np.where(arriba, medio, alto)
+        bajo = np.where(arriba, bajo, medio)
+    nu = (bajo + alto) / 2
+    return np.clip(objetivo + nu[:, None] / pesos, minimo, maximo), nu
+
+
+def resolver_macros(kcal, objetivos, minimos, maximos, pesos=PESOS_MACROS):
+    """
+    Reparte las kcal entre proteína, grasa y carbohidratos con restricciones.
+
+    Acepta un cliente (escalares / listas de 3) o un lote (arreglos (n,) y (n, 3)).
+
+    Args:
+        kcal: kcal objetivo del día
+        objetivos: gramos deseados (proteína, grasa, carbohidratos)
+        minimos / maximos: gramos mínimos y máximos (np.inf = sin techo)
+        pesos: peso de apartarse de cada objetivo
+
+    Returns:
+        dict: 'proteina_g', 'grasa_g', 'carbo_g' y 'kcal' (Σ de los macros),
+        'activas' (por cliente, restricciones en su límite que mueven la
+        solución: 'proteina_min', 'grasa_max', ...), 'relajadas' (por cliente,
+        nombres de RELAJACIONES aplicadas) y 'factible'; escalares y listas
+        para un cliente, arreglos y listas de listas para un lote
+    """
+    import numpy as np
+
+    kcal = np.asarray(kcal, dtype=float)
+    escalar = kcal.ndim == 0
+    kcal = np.atleast_1d(kcal)
+    n = len(kcal)
+    a = np.asarray(KCAL_POR_GRAMO)
+    objetivo = _matriz(objetivos, n) * a
+    limites = {f"{m}_{lado}": columna * a[i]
+               for lado, matriz in (('min', _matriz(minimos, n)), ('max', _matriz(maximos, n)))
+               for i, (m, columna) in enumerate(zip(MACROS, matriz.T))}
+    pesos = np.asarray(pesos, dtype=float)
+
+    def _limites(nivel):
+        actuales = dict(limites)
+        for _, cambios in RELAJACIONES[:nivel]:
+            actuales.update({clave: valor(actuales, kcal) if callable(valor) else np.full(n, valor)
+                             for clave, valor in cambios.items()})
+        return (np.column_stack([actuales[f"{m}_min"] for m in MACROS]),
+                np.column_stack([actuales[f"{m}_max"] for m in MACROS]))
+
+    # Primer nivel de relajación en el que las kcal caben entre Σmínimos y Σmáximos
+    nivel = np.full(n, len(RELAJACIONES) + 1)
+    for k in range(len(RELAJACIONES), -1, -1):
+        minimo, maximo = _limites(k)
+        cabe = (minimo.sum(axis=1) <= kcal + 1e-9) & (kcal <= maximo.sum(axis=1) + 1e-9)
+        nivel = np.where(cabe, k, nivel)
+    factible = nivel <= len(RELAJACIONES)
+
+    minimo, maximo = (np.choose(np.minimum(nivel, len(RELAJACIONES))[:, None], opciones)
+                      for opciones in zip(*(_limites(k) for k in range(len(RELAJACIONES) + 1))))
+    y, nu = _resolver_kcal(kcal, objetivo, minimo, maximo, pesos)
+    # Sin solución: pisos (la proteína nunca baja de su piso)
+    y = np.where(factible[:, None], y, minimo)
+
+    libre = objetivo + nu[:, None] / pesos
+    tolerancia = 1e-6
+    nombres = [f"{m}_{lado}" for m in MACROS for lado in ('min', 'max')]
+    en_limite = np.stack([(np.abs(y - minimo) < tolerancia) & (libre < minimo - tolerancia),
+                          (np.abs(y - maximo) < tolerancia) & (libre > maximo + tolerancia)], axis=2)
+    en_limite = en_limite.reshape(n, 6) & factible[:, None]
+    activas = [[nombres[j] for j in np.flatnonzero(fila)] for fila in en_limite]
+    relajadas = [[nombre for nombre, _ in RELAJACIONES[:min(k, len(RELAJACIONES))]] for k in nivel]
+
+    gramos = y / a
+    resultado = {
+        'proteina_g': gramos[:, 0],
+        'grasa_g': gramos[:, 1],
+        'carbo_g': gramos[:, 2],
+        'kcal': y.sum(axis=1),
+        'activas': activas,
+        'relajadas': relajadas,
+        'factible': factible,
+    }
+    if escalar:
+        return {clave: (valor[0] if isinstance(valor, list) else
+                        bool(valor[0]) if clave == 'factible' else float(valor[0]))
+                for clave, valor in resultado.items()}
+    return resultado
+
+
+def restricciones_tradicionales(kcal, tmb, peso, proteina_g, nivel_entrenamiento='intermedio'):
+    """
+    Objetivos, mínimos y máximos (gramos) del plan tradicional.
+
+    - Proteína: piso = objetivo = base × factor de calcular_macros_tradicional
+      (proteina_g); techo PROTEINA_MAXIMA_GKG × peso
+    - Grasa: objetivo 40% del TMB, entre el 20% y el 40% de las kcal
+    - Carbohidratos: objetivo = el resto; banda BANDA_CARBOS_BURKE × peso
+
+    Acepta escalares o arreglos (nivel_entrenamiento: texto o arreglo de textos).
+
+    Returns:
+        (objetivos, minimos, maximos): arreglos (n, 3)
+    """
+    import numpy as np
+
+    kcal, tmb, peso, proteina_g = np.broadcast_arrays(*(np.atleast_1d(np.asarray(v, dtype=float))
+                                                       for v in (kcal, tmb, peso, proteina_g)))
+    niveles = np.broadcast_to(np.atleast_1d(np.asarray(nivel_entrenamiento, dtype=object)), kcal.shape)
+    banda = np.array([BANDA_CARBOS_BURKE.get(nivel, BANDA_CARBOS_BURKE['intermedio']) for nivel in niveles])
+
+    grasa_min, grasa_max = (kcal * f / 9 for f in GRASA_FRACCION_TEI)
+    grasa_g = np.clip(tmb * 0.40 / 9, grasa_min, grasa_max)
+    carbos_g = (kcal - 4 * proteina_g - 9 * grasa_g) / 4
+    objetivos = np.column_stack([proteina_g, grasa_g, carbos_g])
+    minimos = np.column_stack([proteina_g, grasa_min, banda[:, 0] * peso])
+    maximos = np.column_stack([np.maximum(PROTEINA_MAXIMA_GKG * peso, proteina_g), grasa_max, banda[:, 1] * peso])
+    return objetivos, minimos, maximos
+
+
+def restricciones_psmf(psmf_recs):
+    """
+    Objetivos, mínimos y máximos (gramos) del PSMF de calculate_psmf(): proteína
+    fija, grasa del protocolo como piso y carbohidratos hasta el carb cap del
+    tier; las kcal que el piso calórico agrega sobre los macros van a los
+    carbohidratos y, pasado el cap, a la grasa.
+
+    Returns:
+        (kcal, objetivos, minimos, maximos)
+    """
+    inf = float('inf')
+    proteina = psmf_recs['proteina_g_dia']
+    grasa = psmf_recs['grasa_g_dia']
+    carbos = psmf_recs['carbs_g_dia']
+    return (psmf_recs['calorias_dia'], [proteina, grasa, carbos], [proteina, grasa, 0.0],
+            [proteina, inf, psmf_recs['carb_cap_aplicado_g']])
+
+
+def resolver_ciclaje_4_3(calorias, objetivos, minimos, maximos, dias_low=4, factor_low=0.8):
+    """
+    Ciclaje 4-3 con cierre exacto en cada tipo de día: mismas restricciones
+    que el día promedio, con los carbohidratos absorbiendo la diferencia
+    (objetivo de carbohidratos = el resto de cada día).
+
+    Returns:
+        dict: {'low_days': {...}, 'high_days': {...}} con kcal, dias,
+        protein_g, fat_g, carb_g, activas y relajadas (formato de
+        calcular_ciclaje_4_3)
+    """
+    import numpy as np
+
+    dias_high = 7 - dias_low
+    low_kcal = calorias * factor_low
+    high_kcal = (7 * calorias - dias_low * low_kcal) / dias_high
+    objetivos = np.asarray(objetivos, dtype=float).reshape(3)
+    kcal = np.array([low_kcal, high_kcal])
+    dia_objetivos = np.tile(objetivos, (2, 1))
+    dia_objetivos[:, 2] = (kcal - 4 * objetivos[0] - 9 * objetivos[1]) / 4
+    r = resolver_macros(kcal, dia_objetivos, minimos, maximos)
+
+    def _dia(i, dias):
+        return {'kcal': float(kcal[i]), 'dias': dias, 'protein_g': round(float(r['proteina_g'][i]), 1),
+                'fat_g': round(float(r['grasa_g'][i]), 1), 'carb_g': round(float(r['carbo_g'][i]), 1),
+                'activas': r['activas'][i], 'relajadas': r['relajadas'][i]}
+
+    return {'low_days': _dia(0, dias_low), 'high_days': _dia(1, dias_high)}
@@ -0,0 +1,349 @@
+"""
+Panel de Administración MUPAI
+
+Página de Streamlit (multipágina) para el equipo:
+- Solicitudes de acceso pendientes, con reemisión del código en un clic
+- Evaluaciones completadas: filtros por fecha, sexo, categoría de grasa,
+  elegibilidad PSMF y nivel de recuperación; listado paginado y gráficas
+- Reenvío del reporte al cliente en un clic: se encola en el spool en disco y
+  un único enviador en segundo plano lo manda (ver cola_email.py)
+- Recuperación: percentiles de IR-SE de la población, percentil de un cliente
+  y repuntuación del histórico con otros pesos de sueño/estrés
+- Composición: TMB de toda la base con cada ecuación del ensamble, escaneos
+  con % grasa no plausible frente a las circunferencias (US Navy / RFM) y
+  ranking de clientes por potencial muscular restante
+- Calibración de masa muscular contra la lectura del aparato, por dispositivo,
+  con su error frente a la tabla de factores y activación en el motor
+- Cuarentena: evaluaciones poco plausibles apartadas al registrarse, para
+  liberarlas o descartarlas
+
+Los cálculos sobre todo el registro (composición, repuntuación) se cachean
+con st.cache_data por registro.version(): las pestañas se ejecutan en cada
+rerun y solo se recalculan cuando llegan evaluaciones o cambia el IR-SE.
+
+Protegida con `admin_password` en st.secrets; sin ese secreto la página no se
+muestra. Solo importa los módulos de lógica (no streamlit_app.py).
+"""
+
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+import streamlit as st
+
+from calibracion_musculo import CalibracionMusculo
+from codigos_acceso import RUTA_POR_DEFECTO as RUTA_CODIGOS_ACCESO, ServicioCodigos
+from ecuaciones_tmb import ECUACIONES_TMB, tmb_ensamble_lote
+from grasa_circunferencias import DIVERGENCIA_MAXIMA, contrastar_lote
+from potencial_muscular import ranking_potencial
+from puntuacion_suenyo_estres import PESOS, percentiles_poblacion, rango_percentil, repuntuar_historico
+from registro_evaluaciones import RUTA_POR_DEFECTO as RUTA_EVALUACIONES, POR_PAGINA, RegistroEvaluaciones
+
+
+RUTA_SPOOL_REENVIOS = os.path.join('.mupai_sesiones', 'spool_reenvios')
+# Segundos que el clic espera el resultado de su mensaje antes de dejarlo en cola
+ESPERA_REENVIO = 10.0
+# Solicitudes de acceso por página en la pestaña de solicitudes
+POR_PAGINA_SOLICITUDES = 50
+
+_TODOS = "Todos"
+
+
+@st.cache_resource
+def obtener_servicio_codigos():
+    return ServicioCodigos(os.environ.get("MUPAI_CODIGOS_DB", RUTA_CODIGOS_ACCESO))
+
+
+@st.cache_resource
+def obtener_registro_evaluaciones():
+    return RegistroEvaluaciones(os.environ.get("MUPAI_EVALUACIONES_DB", RUTA_EVALUACIONES))
+
+
+@st.cache_resource
+def obtener_calibracion_musculo():
+    return CalibracionMusculo(os.environ.get("MUPAI_EVALUACIONES_DB", RUTA_EVALUACIONES))
+
+
+@st.cache_resource
+def obtener_enviador_reenvios(spool, password):
+    """Único enviador del spool de reenvíos en el proceso (hilo en segundo plano)."""
+    from cola_email import EnviadorSpool
+
+    hilo = threading.Thread(target=EnviadorSpool(spool, password=password).ejecutar,
+                            kwargs={'intervalo_sondeo': 1.0}, name="mupai-reenvios", daemon=True)
+    hilo.start()
+    return hilo
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def cargar_composicion(_registro, version):
+    """datos_composicion() y lo que se calcula sobre ella, por versión del registro."""
+    todas = _registro.datos_composicion()
+    composicion = todas.dropna(subset=['peso', 'estatura', 'edad', 'mlg'])
+    ensamble = None if composicion.empty else tmb_ensamble_lote(composicion)
+    return {'todas': todas, 'composicion': composicion, 'ensamble': ensamble,
+            'contraste': contrastar_lote(todas),
+            'ranking': ranking_potencial(todas.dropna(subset=['estatura', 'mlg']))}
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cargar_repuntuacion(_registro, version, peso_sueno):
+    """Vista previa de repuntuar_historico() con el peso de sueño del slider."""
+    return repuntuar_historico(_registro, pesos={'sueno': peso_sueno, 'estres': round(1 - peso_sueno, 2)})
+
+
+def reenviar_reporte(evaluacion):
+    """
+    Encola el reporte del cliente para el enviador en segundo plano y espera
+    hasta ESPERA_REENVIO segundos el resultado de ese mensaje (no del resto de
+    la cola).
+
+    Returns:
+        (ok, detalle): ok es None si el mensaje sigue en cola
+    """
+    from cola_email import encolar_bytes, estado_mensaje
+    from reportes_lote import renderizar_reporte
+
+    password = st.secrets.get("zoho_password", "TU_PASSWORD_AQUI")
+    if password == "TU_PASSWORD_AQUI":
+        return False, "Modo desarrollo: sin zoho_password no se envían emails"
+    spool = os.environ.get("MUPAI_SPOOL_REENVIOS", RUTA_SPOOL_REENVIOS)
+    if not obtener_enviador_reenvios(spool, password).is_alive():
+        obtener_enviador_reenvios.clear()
+        obtener_enviador_reenvios(spool, password)
+
+    nombre = encolar_bytes(renderizar_reporte(evaluacion, 'cliente', 'eml'), spool)
+    limite = time.monotonic() + ESPERA_REENVIO
+    estado = estado_mensaje(spool, nombre)
+    while estado['estado'] in ('pendiente', 'enviando') and time.monotonic() < limite:
+        time.sleep(0.5)
+        estado = estado_mensaje(spool, nombre)
+
+    if estado['estado'] == 'enviado':
+        return True, f"Reporte reenviado a {evaluacion.get('email')}"
+    if estado['estado'] == 'fallido':
+        return False, f"No se pudo enviar a {evaluacion.get('email')}: {estado['detalle']}"
+    reintento = f" (intento fallido: {estado['detalle']})" if estado['intentos'] else ""
+    return None, f"Reporte en cola para {evaluacion.get('email')}; se enviará en segundo plano{reintento}"
+
+
+# ==================== ACCESO ====================
+
+st.set_page_config(page_title="MUPAI - Administración", page_icon="🛠️", layout="wide")
+
+try:
+    password_admin = st.secrets.get("admin_password")
+except Exception:
+    password_admin = None
+
+if not password_admin:
+    st.warning("Panel de administración deshabilitado: configura `admin_password` en los secrets.")
+    st.stop()
+
+if not st.session_state.get("admin_autenticado"):
+    ingresado = st.text_input("Contraseña de administración", type="password")
+    if st.button("Entrar"):
+        if ingresado == password_admin:
+            st.session_state.admin_autenticado = True
+            st.rerun()
+        st.error("❌ Contraseña incorrecta")
+    st.stop()
+
+st.title("🛠️ Panel de Administración MUPAI")
+
+servicio_codigos = obtener_servicio_codigos()
+registro = obtener_registro_evaluaciones()
+
+tab_solicitudes, tab_evaluaciones, tab_recuperacion, tab_composicion = st.tabs(
+    ["🔑 Solicitudes de acceso", "📋 Evaluaciones", "🌙 Recuperación (IR-SE)", "🧪 Composición"])
+
+# ==================== SOLICITUDES DE ACCESO ====================
+
+with tab_solicitudes:
+    pagina_solicitudes = st.number_input("Página", min_value=1, value=1, step=1, key="admin_pagina_solicitudes")
+    pendientes = servicio_codigos.solicitudes_pendientes(pagina=int(pagina_solicitudes),
+                                                         por_pagina=POR_PAGINA_SOLICITUDES)
+    paginas_solicitudes = max(1, -(-pendientes['total'] // POR_PAGINA_SOLICITUDES))
+    st.caption(f"{pendientes['total']} solicitudes con código vigente sin usar · "
+               f"página {int(pagina_solicitudes)} de {paginas_solicitudes}")
+    if st.session_state.get("admin_codigo_reemitido"):
+        email_reemitido, codigo_reemitido = st.session_state.admin_codigo_reemitido
+        st.success(f"Nuevo código para {email_reemitido}: **{codigo_reemitido}** (el anterior quedó invalidado)")
+
+    for solicitud in pendientes['filas']:
+        col_datos, col_accion = st.columns([4, 1])
+        with col_datos:
+            st.markdown(f"**{solicitud['nombre'] or '—'}** · {solicitud['email']} · "
+                        f"📱 {solicitud['whatsapp'] or '—'}")
+            st.caption(f"Vence en {max(0, (solicitud['expira'] - servicio_codigos.reloj()) / 3600):.0f} h")
+        with col_accion:
+            if st.button("Reemitir código", key=f"reemitir_{solicitud['email']}"):
+                st.session_state.admin_codigo_reemitido = (solicitud['email'],
+                                                           servicio_codigos.reemitir(solicitud['email']))
+                st.rerun()
+
+# ==================== EVALUACIONES ====================
+
+with tab_evaluaciones:
+    opciones = registro.valores_filtro()
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        rango = st.date_input("Fechas", value=(date.today() - timedelta(days=90), date.today()))
+    with col2:
+        sexo = st.selectbox("Sexo", [_TODOS] + opciones['sexo'])
+    with col3:
+        categoria_bf = st.selectbox("Categoría de grasa", [_TODOS] + opciones['categoria_bf'])
+    with col4:
+        psmf = st.selectbox("PSMF", [_TODOS, "Aplicable", "No aplicable"])
+    with col5:
+        nivel_recuperacion = st.selectbox("Recuperación", [_TODOS] + opciones['nivel_recuperacion'])
+
+    desde, hasta = (rango if isinstance(rango, (tuple, list)) and len(rango) == 2 else (None, None))
+    filtros = {
+        'sexo': None if sexo == _TODOS else sexo,
+        'categoria_bf': None if categoria_bf == _TODOS else categoria_bf,
+        'psmf_aplicable': None if psmf == _TODOS else psmf == "Aplicable",
+        'nivel_recuperacion': None if nivel_recuperacion == _TODOS else nivel_recuperacion,
+    }
+
+    agregados = registro.agregados(desde, hasta, **filtros)
+    graf1, graf2 = st.columns(2)
+    with graf1:
+        st.markdown("**Evaluaciones por día**")
+        st.line_chart(agregados['por_dia'])
+        st.markdown("**Por nivel de recuperación**")
+        st.bar_chart(agregados['por_recuperacion'])
+    with graf2:
+        st.markdown("**Por categoría de grasa**")
+        st.bar_chart(agregados['por_categoria'])
+        st.markdown("**Por sexo**")
+        st.dataframe(agregados['por_sexo'].rename(columns={
+            'evaluaciones': "Evaluaciones", 'grasa_media': "% grasa medio", 'pct_psmf': "% PSMF"}))
+
+    pagina = st.number_input("Página", min_value=1, value=1, step=1)
+    resultado = registro.buscar(desde, hasta, pagina=int(pagina), por_pagina=POR_PAGINA, **filtros)
+    st.caption(f"{resultado['total']} evaluaciones · página {resultado['pagina']} de {resultado['paginas']}")
+    st.dataframe(resultado['filas'], use_container_width=True, hide_index=True)
+
+    for fila in resultado['filas']:
+        col_datos, col_accion = st.columns([4, 1])
+        with col_datos:
+            st.markdown(f"{fila['fecha']} · **{fila['nombre'] or '—'}** · {fila['email'] or '—'}"
+                        + (f" · reenviado {fila['reenvios']}×" if fila['reenvios'] else ""))
+        with col_accion:
+            if st.button("📧 Reenviar", key=f"reenviar_{fila['id']}", disabled=not fila['email']):
+                ok, detalle = reenviar_reporte(registro.obtener(fila['id']))
+                if ok:
+                    registro.marcar_reenvio(fila['id'])
+                    st.success(detalle)
+                elif ok is None:
+                    st.info(detalle)
+                else:
+                    st.error(detalle)
+
+# ==================== RECUPERACIÓN (IR-SE) ====================
+
+with tab_recuperacion:
+    poblacion = registro.agregados()['ir_se']
+    st.caption(f"IR-SE de {len(poblacion)} evaluaciones")
+    percentiles = percentiles_poblacion(poblacion)
+    for columna, (percentil, valor) in zip(st.columns(len(percentiles)), percentiles.items()):
+        columna.metric(f"P{percentil}", "—" if valor is None else f"{valor:.1f}")
+
+    id_cliente = st.number_input("ID de evaluación", min_value=1, value=None, step=1)
+    if id_cliente:
+        evaluacion = registro.obtener(int(id_cliente))
+        ir_se_cliente = ((evaluacion or {}).get('suenyo_estres_data') or {}).get('ir_se')
+        if ir_se_cliente is None:
+            st.info("Esa evaluación no tiene IR-SE registrado.")
+        else:
+            st.markdown(f"**{evaluacion.get('nombre') or '—'}**: IR-SE {ir_se_cliente:.1f} · "
+                        f"igual o mayor que el {rango_percentil(ir_se_cliente, poblacion):.0f}% del gimnasio")
+
+    st.markdown("**Repuntuar histórico con otros pesos**")
+    peso_sueno = st.slider("Peso del sueño en el IR-SE", 0.0, 1.0, PESOS['sueno'], 0.05)
+    pesos = {'sueno': peso_sueno, 'estres': round(1 - peso_sueno, 2)}
+    vista = cargar_repuntuacion(registro, registro.version(), peso_sueno)
+    cambios = vista[vista['nivel_anterior'] != vista['nivel_recuperacion'].astype(str)]
+    st.caption(f"{len(vista)} evaluaciones con respuestas · {len(cambios)} cambiarían de nivel "
+               f"(sueño {pesos['sueno']:.0%}, estrés {pesos['estres']:.0%})")
+    st.dataframe(vista.groupby(['nivel_anterior', 'nivel_recuperacion'], observed=True).size()
+                 .unstack(fill_value=0), use_container_width=True)
+    if st.button("Aplicar a histórico", disabled=not len(cambios),
+                 help="Las evaluaciones nuevas se siguen puntuando con los pesos de la app"):
+        repuntuar_historico(registro, pesos=pesos, aplicar=True)
+        st.success(f"IR-SE actualizado en {len(vista)} evaluaciones")
+
+# ==================== COMPOSICIÓN ====================
+
+with tab_composicion:
+    datos = cargar_composicion(registro, registro.version())
+    todas, composicion, ensamble = datos['todas'], datos['composicion'], datos['ensamble']
+    st.markdown("**TMB por ecuación** (kcal/día; el plan usa Katch-McArdle)")
+    if composicion.empty:
+        st.info("Sin evaluaciones con peso, estatura, edad y MLG registrados.")
+    else:
+        st.caption(f"{len(composicion)} evaluaciones · dispersión media entre ecuaciones "
+                   f"{ensamble['rango_pct'].mean():.1f}% (máx. {ensamble['rango_pct'].max():.1f}%)")
+        st.dataframe(ensamble.groupby(composicion['sexo'])[list(ECUACIONES_TMB)].mean().round(0),
+                     use_container_width=True)
+
+    st.markdown(f"**% grasa no plausible** (corregido vs. circunferencias, más de {DIVERGENCIA_MAXIMA:.0f} puntos)")
+    contraste = datos['contraste']
+    con_circunferencias = contraste['circunferencias'].notna()
+    sospechosas = todas[['id', 'sexo', 'grasa_corregida']].join(
+        contraste[['navy', 'rfm', 'divergencia']])[contraste['implausible']]
+    st.caption(f"{con_circunferencias.sum()} evaluaciones con circunferencias · "
+               f"{len(sospechosas)} para volver a medir")
+    st.dataframe(sospechosas.round(1), use_container_width=True, hide_index=True)
+
+    st.markdown("**💪 Potencial muscular restante** (FFMI máximo por estatura y estructura ósea)")
+    ranking = datos['ranking']
+    if ranking.empty:
+        st.caption("Sin evaluaciones con estatura y MLG registradas.")
+    else:
+        st.caption(f"{len(ranking)} evaluaciones · {int(ranking['marco_medido'].sum())} con muñeca y tobillo "
+                   f"medidos · mediana {ranking['porc_potencial'].median():.0f}% del potencial")
+        st.dataframe(todas[['id', 'sexo', 'nivel_entrenamiento']].join(
+            ranking[['puesto', 'ffmi_actual', 'ffmi_max', 'porc_potencial', 'margen_ffmi', 'margen_mlg_kg',
+                     'anos_al_95']], how='inner').sort_values('puesto').round(1),
+                     use_container_width=True, hide_index=True)
+
+    st.markdown("**🎯 Calibración de masa muscular** (modelo por aparato vs. tabla de factores, error prequential)")
+    calibracion = obtener_calibracion_musculo()
+    informes = calibracion.informe()
+    if not informes:
+        st.caption("Sin lecturas de masa muscular del aparato todavía.")
+    else:
+        st.dataframe([{"Dispositivo": r['dispositivo'], "Lecturas": r['muestras'],
+                       "RMSE modelo (kg)": r['rmse_kg'], "RMSE tabla (kg)": r['rmse_tabla_kg'],
+                       "MAE modelo (kg)": r['mae_kg'], "Mejora (%)": r['mejora_pct'],
+                       "Apto": "✅" if r['apto'] else "—"} for r in informes],
+                     use_container_width=True, hide_index=True)
+    col_activar, col_reconstruir = st.columns(2)
+    with col_activar:
+        if st.button("Activar modelos aptos en el motor"):
+            st.success(f"Modelos activos: {', '.join(calibracion.activar_en_motor()) or 'ninguno (tabla)'}")
+    with col_reconstruir:
+        if st.button("Recalibrar desde el histórico"):
+            st.success(f"{calibracion.reconstruir(todas)} lecturas usadas; recarga para ver el informe")
+
+    st.markdown("**🚧 Cuarentena** (evaluaciones poco plausibles, fuera de los reportes)")
+    cuarentena = registro.en_cuarentena()
+    if not cuarentena:
+        st.caption("Sin evaluaciones en cuarentena.")
+    for apartada in cuarentena:
+        col_datos, col_liberar, col_descartar = st.columns([4, 1, 1])
+        with col_datos:
+            st.markdown(f"**{apartada['nombre'] or '—'}** · {apartada['email'] or '—'} · "
+                        f"plausibilidad {apartada['puntuacion'] or 0:.0f}/100")
+            st.caption(" · ".join(apartada['motivos']))
+        with col_liberar:
+            if st.button("Liberar", key=f"liberar_{apartada['id']}"):
+                registro.liberar(apartada['id'])
+                st.rerun()
+        with col_descartar:
+            if st.button("Descartar", key=f"descartar_{apartada['id']}"):
+                registro.descartar(apartada['id'])
+                st.rerun()
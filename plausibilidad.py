@@ -0,0 +1,256 @@
+"""
+Plausibilidad MUPAI - Detector de mediciones poco plausibles y atípicas
+
+Puntúa cada evaluación (0-100) antes de guardarla, con reglas cruzadas entre
+mediciones y z-scores robustos contra la población ya registrada, todo por
+columnas para importar lotes en una llamada:
+
+- imc_vs_grasa: % grasa lejos del esperado por IMC, edad y sexo (Deurenberg 1991)
+- ffmi_natural / ffmi_imposible: FFMI por encima del límite natural y del
+  máximo plausible (mismos umbrales que clasificar_ffmi)
+- visceral_vs_wthr: nivel de grasa visceral incompatible con el WtHR (solo
+  si el nivel se midió)
+- musculo_vs_mlg: % de masa muscular del aparato incompatible con la masa
+  muscular estimada desde la MLG (estimar_masa_muscular_desde_mlg)
+- atipico_<campo>: |z robusto| > Z_ROBUSTO_MAXIMO frente a la población del
+  mismo sexo (mediana y MAD)
+
+Las evaluaciones por debajo de UMBRAL_CUARENTENA no entran al registro: van a
+la cuarentena de RegistroEvaluaciones hasta que el equipo las libere o descarte.
+
+Uso:
+    resultado = puntuar_evaluacion(evaluacion, estadisticos=estadisticos_registro(registro))
+    aceptadas, en_cuarentena = registrar_con_cuarentena(registro, evaluaciones)
+"""
+
+from motor_calculo import estimar_masa_muscular_desde_mlg
+
+
+# Penalización por regla (la puntuación parte de 100)
+PENALIZACIONES = {
+    'imc_vs_grasa': 25,
+    'ffmi_natural': 15,
+    'ffmi_imposible': 60,
+    'visceral_vs_wthr': 20,
+    'musculo_vs_mlg': 25,
+    'atipico': 15,           # por cada campo atípico
+}
+UMBRAL_CUARENTENA = 60
+
+# Diferencia máxima (puntos) entre el % grasa y el esperado por IMC
+DESVIO_GRASA_IMC = 12.0
+FFMI_LIMITE_NATURAL = {'Hombre': 25.0, 'Mujer': 21.0}
+FFMI_MAXIMO = {'Hombre': 28.0, 'Mujer': 24.0}
+# (nivel visceral alto, WtHR bajo) y (nivel visceral bajo, WtHR alto) incompatibles
+VISCERAL_ALTO, WTHR_BAJO = 13, 0.45
+VISCERAL_BAJO, WTHR_ALTO = 4, 0.60
+# Masa muscular del aparato / estimada desde MLG fuera de este rango
+RAZON_MUSCULO = (0.6, 1.6)
+
+CAMPOS_ROBUSTOS = ('peso', 'estatura', 'imc', 'grasa_corregida', 'ffmi')
+Z_ROBUSTO_MAXIMO = 3.5       # Iglewicz & Hoaglin
+MINIMO_POBLACION = 30        # por sexo, para usar z-scores
+# Crecimiento relativo de la población que obliga a recalcular los estadísticos cacheados
+CRECIMIENTO_RECALCULO = 0.02
+
+_estadisticos_por_registro = {}
+
+MOTIVOS = {
+    'imc_vs_grasa': "% grasa incompatible con el IMC",
+    'ffmi_natural': "FFMI por encima del límite natural",
+    'ffmi_imposible': "FFMI no plausible",
+    'visceral_vs_wthr': "Grasa visceral incompatible con el WtHR",
+    'musculo_vs_mlg': "Masa muscular del aparato incompatible con la MLG",
+}
+
+
+def _numerica(evaluaciones, columna):
+    import numpy as np
+    import pandas as pd
+
+    if columna not in evaluaciones:
+        return np.full(len(evaluaciones), np.nan)
+    return pd.to_numeric(evaluaciones[columna], errors='coerce').to_numpy(dtype=float)
+
+
+def metricas_derivadas(evaluaciones):
+    """
+    IMC, FFMI y WtHR por columnas (MLG desde peso y % grasa si falta).
+
+    Returns:
+        dict de arreglos: peso, estatura, edad, grasa_corregida, mlg, imc, ffmi, wthr
+    """
+    import numpy as np
+
+    peso, estatura, edad, grasa = (_numerica(evaluaciones, c) for c in ('peso', 'estatura', 'edad',
+                                                                        'grasa_corregida'))
+    mlg = _numerica(evaluaciones, 'mlg')
+    mlg = np.where(np.isnan(mlg), peso * (1 - grasa / 100), mlg)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        estatura_m = np.where(estatura > 0, estatura / 100, np.nan)
+        cintura = _numerica(evaluaciones, 'circunferencia_cintura')
+        return {
+            'peso': peso, 'estatura': estatura, 'edad': edad, 'grasa_corregida': grasa, 'mlg': mlg,
+            'imc': peso / estatura_m ** 2,
+            # Misma fórmula que calcular_ffmi (normalizado a 1.80 m)
+            'ffmi': mlg / estatura_m ** 2 + 6.3 * (1.8 - estatura_m),
+            'wthr': np.where(cintura > 0, cintura / estatura, np.nan),
+        }
+
+
+def estadisticos_poblacion(poblacion):
+    """
+    Mediana y MAD por sexo de CAMPOS_ROBUSTOS.
+
+    Args:
+        poblacion: DataFrame como RegistroEvaluaciones.datos_composicion()
+
+    Returns:
+        DataFrame indexado por (sexo, campo) con 'mediana', 'mad' y 'n'
+        (solo sexos con al menos MINIMO_POBLACION evaluaciones)
+    """
+    import numpy as np
+    import pandas as pd
+
+    metricas = metricas_derivadas(poblacion)
+    sexo = poblacion['sexo'].to_numpy()
+    filas = []
+    for s in sorted({v for v in sexo if isinstance(v, str)}):
+        del_sexo = sexo == s
+        for campo in CAMPOS_ROBUSTOS:
+            valores = metricas[campo][del_sexo]
+            valores = valores[~np.isnan(valores)]
+            if len(valores):
+                mediana = np.median(valores)
+                filas.append((s, campo, mediana, len(valores), np.median(np.abs(valores - mediana))))
+    estadisticos = pd.DataFrame(filas, columns=['sexo', 'campo', 'mediana', 'n', 'mad'])
+    estadisticos = estadisticos.set_index(['sexo', 'campo']).sort_index()
+    return estadisticos[estadisticos['n'] >= MINIMO_POBLACION]
+
+
+def estadisticos_registro(registro):
+    """
+    estadisticos_poblacion() de la población de `registro`, reutilizados entre
+    envíos mientras la población no crezca más de CRECIMIENTO_RECALCULO (la
+    mediana y la MAD casi no se mueven con unas pocas evaluaciones más).
+    """
+    poblacion = registro.datos_composicion()
+    n, estadisticos = _estadisticos_por_registro.get(registro.ruta_db, (0, None))
+    if estadisticos is None or not n <= len(poblacion) <= n * (1 + CRECIMIENTO_RECALCULO):
+        n, estadisticos = len(poblacion), estadisticos_poblacion(poblacion)
+        _estadisticos_por_registro[registro.ruta_db] = (n, estadisticos)
+    return estadisticos
+
+
+def evaluar_plausibilidad(evaluaciones, poblacion=None, estadisticos=None):
+    """
+    Puntúa la plausibilidad de muchas evaluaciones a la vez.
+
+    Args:
+        evaluaciones: DataFrame con sexo, edad, peso, estatura, grasa_corregida y
+            opcionalmente mlg, circunferencia_cintura, grasa_visceral,
+            masa_muscular_aparato (%), nivel_entrenamiento
+        poblacion: DataFrame de referencia para los z-scores robustos
+        estadisticos: resultado de estadisticos_poblacion() (evita recalcularlo)
+
+    Returns:
+        DataFrame (mismo índice): una columna booleana por regla, z_<campo>,
+        'motivos' (lista de textos), 'puntuacion' (0-100) y 'cuarentena'
+    """
+    import numpy as np
+    import pandas as pd
+
+    m = metricas_derivadas(evaluaciones)
+    sexo = evaluaciones['sexo'].to_numpy() if 'sexo' in evaluaciones else np.full(len(evaluaciones), None)
+    hombre = sexo == "Hombre"
+    resultado = pd.DataFrame(index=evaluaciones.index)
+
+    with np.errstate(invalid='ignore'):
+        grasa_esperada = 1.2 * m['imc'] + 0.23 * m['edad'] - 10.8 * hombre - 5.4
+        resultado['imc_vs_grasa'] = np.abs(m['grasa_corregida'] - grasa_esperada) > DESVIO_GRASA_IMC
+
+        limite = np.where(hombre, FFMI_LIMITE_NATURAL['Hombre'], FFMI_LIMITE_NATURAL['Mujer'])
+        maximo = np.where(hombre, FFMI_MAXIMO['Hombre'], FFMI_MAXIMO['Mujer'])
+        resultado['ffmi_imposible'] = m['ffmi'] > maximo
+        resultado['ffmi_natural'] = (m['ffmi'] > limite) & ~resultado['ffmi_imposible'].to_numpy()
+
+        # Sin nivel visceral medido (None/NaN o 0) la regla no se evalúa
+        visceral = _numerica(evaluaciones, 'grasa_visceral')
+        medido = visceral >= 1
+        resultado['visceral_vs_wthr'] = medido & (((visceral >= VISCERAL_ALTO) & (m['wthr'] < WTHR_BAJO))
+                                                  | ((visceral <= VISCERAL_BAJO) & (m['wthr'] >= WTHR_ALTO)))
+
+        musculo_pct = _numerica(evaluaciones, 'masa_muscular_aparato')
+        niveles = (evaluaciones['nivel_entrenamiento'] if 'nivel_entrenamiento' in evaluaciones
+                   else pd.Series(None, index=evaluaciones.index)).to_numpy()
+        # Factor músculo/MLG por (sexo, nivel): la tabla de estimar_masa_muscular_desde_mlg,
+        # consultada una vez por combinación distinta
+        combinaciones = pd.Series(list(zip(sexo, [n if isinstance(n, str) else 'intermedio' for n in niveles])))
+        factores = {c: estimar_masa_muscular_desde_mlg(1.0, *c) for c in combinaciones.unique()}
+        factor = combinaciones.map(factores).to_numpy(dtype=float)
+        razon = (musculo_pct * m['peso'] / 100) / (m['mlg'] * factor)
+        resultado['musculo_vs_mlg'] = (musculo_pct > 0) & ((razon < RAZON_MUSCULO[0]) | (razon > RAZON_MUSCULO[1]))
+
+    if estadisticos is None and poblacion is not None and len(poblacion):
+        estadisticos = estadisticos_poblacion(poblacion)
+    atipicos = np.zeros(len(evaluaciones), dtype=int)
+    motivos_atipicos = [[] for _ in range(len(evaluaciones))]
+    for campo in CAMPOS_ROBUSTOS:
+        z = np.full(len(evaluaciones), np.nan)
+        if estadisticos is not None:
+            for s in ("Hombre", "Mujer"):
+                if (s, campo) not in estadisticos.index:
+                    continue
+                mediana, mad = estadisticos.loc[(s, campo), ['mediana', 'mad']]
+                if mad > 0:
+                    filas = sexo == s
+                    z[filas] = 0.6745 * (m[campo][filas] - mediana) / mad
+        resultado[f"z_{campo}"] = z
+        fuera = np.abs(np.nan_to_num(z)) > Z_ROBUSTO_MAXIMO
+        atipicos += fuera
+        for i in np.flatnonzero(fuera):
+            motivos_atipicos[i].append(f"{campo} atípico (z robusto {z[i]:+.1f})")
+
+    reglas = list(MOTIVOS)
+    banderas = resultado[reglas].to_numpy()
+    penalizacion = banderas @ np.array([PENALIZACIONES[r] for r in reglas]) + atipicos * PENALIZACIONES['atipico']
+    resultado['motivos'] = [[MOTIVOS[r] for r, b in zip(reglas, fila) if b] + extra
+                            for fila, extra in zip(banderas, motivos_atipicos)]
+    resultado['puntuacion'] = np.maximum(0, 100 - penalizacion)
+    resultado['cuarentena'] = resultado['puntuacion'] < UMBRAL_CUARENTENA
+    return resultado
+
+
+def puntuar_evaluacion(evaluacion, poblacion=None, estadisticos=None):
+    """evaluar_plausibilidad() para una sola evaluación (dict) → dict con puntuacion, cuarentena y motivos."""
+    import pandas as pd
+
+    fila = evaluar_plausibilidad(pd.DataFrame([evaluacion]), poblacion, estadisticos).iloc[0]
+    return {'puntuacion': float(fila['puntuacion']), 'cuarentena': bool(fila['cuarentena']),
+            'motivos': list(fila['motivos'])}
+
+
+def registrar_con_cuarentena(registro, evaluaciones, creado=None, calibracion=None):
+    """
+    Importa un lote: puntúa todas las evaluaciones contra la población del
+    registro en una llamada y guarda las plausibles; el resto va a cuarentena.
+    Con `calibracion` (calibracion_musculo.CalibracionMusculo), las plausibles
+    actualizan además la calibración de masa muscular.
+
+    Returns:
+        (evaluaciones registradas, ids en cuarentena)
+    """
+    import pandas as pd
+
+    if not evaluaciones:
+        return 0, []
+    puntuacion = evaluar_plausibilidad(pd.DataFrame(evaluaciones), estadisticos=estadisticos_registro(registro))
+    aceptadas = [e for e, c in zip(evaluaciones, puntuacion['cuarentena']) if not c]
+    if aceptadas:
+        registro.registrar_lote(aceptadas, creado)
+        if calibracion is not None:
+            calibracion.observar(aceptadas)
+    ids_cuarentena = [registro.poner_en_cuarentena(e, motivos, p, creado)
+                      for e, c, motivos, p in zip(evaluaciones, puntuacion['cuarentena'],
+                                                  puntuacion['motivos'], puntuacion['puntuacion']) if c]
+    return len(aceptadas), ids_cuarentena
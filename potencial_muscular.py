@@ -0,0 +1,291 @@
+"""
+Potencial Muscular MUPAI - FFMI máximo natural por estatura y estructura ósea
+
+Reemplaza el techo fijo por sexo y nivel (ffmi_genetico_max 22-25 / 19-21)
+con el modelo de Casey Butt (2009), que escala la masa libre de grasa máxima
+con la estatura y el grosor de muñeca y tobillo:
+
+    MLG_max (lb) = H^1.5 · (√muñeca / 22.6670 + √tobillo / 17.0104) · (% grasa / 224 + 1)
+
+con H, muñeca y tobillo en pulgadas. El FFMI máximo se normaliza a 1.80 m
+igual que calcular_ffmi(). Sin muñeca/tobillo medidos se estiman por
+estatura (PROPORCION_MUNECA / PROPORCION_TOBILLO, marco medio). El modelo es
+de hombres; para mujeres se escala para que la mujer de referencia llegue a
+FFMI_REFERENCIA_MUJER (el límite natural de plausibilidad.py).
+
+Los términos por estatura, muñeca y tobillo (potencias, raíces, la
+normalización del FFMI y el marco medio de cada estatura) se calculan una vez
+en tablas con paso de 0.1 cm y después solo se indexan, para puntuar toda la
+base en una llamada.
+
+Años hasta el potencial: la distancia al FFMI máximo se cierra a una tasa
+anual fija por nivel (TASA_CIERRE_ANUAL); los años hasta el 95% tienen forma
+cerrada y curva_anos_potencial() da la trayectoria completa.
+
+Todas aceptan escalares o arreglos.
+
+Uso:
+    p = potencial_muscular("Hombre", 178, 65.6, 18, nivel_entrenamiento='intermedio')
+    p['ffmi_max'], p['porc_potencial'], p['anos_al_95']
+    ranking = ranking_potencial(df)          # ordenado por margen de FFMI
+"""
+
+import math
+from functools import lru_cache
+
+PULGADA_CM = 2.54
+LIBRA_KG = 0.45359237
+
+# Constantes de Casey Butt (2009)
+BUTT_DIVISOR_MUNECA = 22.6670
+BUTT_DIVISOR_TOBILLO = 17.0104
+BUTT_DIVISOR_GRASA = 224.0
+
+# Muñeca y tobillo (cm) por cm de estatura cuando no se midieron (marco medio)
+PROPORCION_MUNECA = {'Hombre': 0.100, 'Mujer': 0.094}
+PROPORCION_TOBILLO = {'Hombre': 0.1286, 'Mujer': 0.127}
+
+# % grasa al que se evalúa el techo: el medido, acotado a la condición magra
+# en la que se alcanza el potencial
+GRASA_POTENCIAL = {'Hombre': (8.0, 15.0), 'Mujer': (16.0, 24.0)}
+
+# Mujer de referencia (marco medio) que llega al límite natural de FFMI
+FFMI_REFERENCIA_MUJER = 21.0
+ESTATURA_REFERENCIA_MUJER = 165.0
+GRASA_REFERENCIA_MUJER = 20.0
+
+# Fracción de la distancia al FFMI máximo que se cierra por año de
+# entrenamiento bien programado
+TASA_CIERRE_ANUAL = {
+    'principiante': 0.50,
+    'intermedio': 0.35,
+    'avanzado': 0.20,
+    'élite': 0.10,
+}
+FRACCION_OBJETIVO = 0.95
+ANOS_CURVA = 10
+
+# Tablas: (inicio, fin) en cm con paso PASO_TABLA; fuera del rango se usa el borde
+GRILLA_ESTATURA = (120.0, 230.0)
+GRILLA_MUNECA = (10.0, 25.0)
+GRILLA_TOBILLO = (14.0, 35.0)
+PASO_TABLA = 0.1
+
+
+def _grilla(inicio, fin):
+    import numpy as np
+
+    return inicio + PASO_TABLA * np.arange(int(round((fin - inicio) / PASO_TABLA)) + 1)
+
+
+@lru_cache(maxsize=1)
+def _tablas():
+    """Términos del modelo precalculados sobre las grillas (una vez por proceso)."""
+    import numpy as np
+
+    estatura = _grilla(*GRILLA_ESTATURA)
+    estatura_m = estatura / 100
+    muneca = lambda cm: np.sqrt(cm / PULGADA_CM) / BUTT_DIVISOR_MUNECA
+    tobillo = lambda cm: np.sqrt(cm / PULGADA_CM) / BUTT_DIVISOR_TOBILLO
+    tablas = {
+        'altura_15': (estatura / PULGADA_CM) ** 1.5,
+        'inverso_h2': 1 / estatura_m ** 2,
+        'normalizacion': 6.3 * (1.8 - estatura_m),
+        'muneca': muneca(_grilla(*GRILLA_MUNECA)),
+        'tobillo': tobillo(_grilla(*GRILLA_TOBILLO)),
+    }
+    # Marco medio por estatura (sin muñeca/tobillo medidos)
+    for sexo in ('Hombre', 'Mujer'):
+        tablas[f'muneca_{sexo}'] = muneca(PROPORCION_MUNECA[sexo] * estatura)
+        tablas[f'tobillo_{sexo}'] = tobillo(PROPORCION_TOBILLO[sexo] * estatura)
+    return tablas
+
+
+def _buscar(tabla, grilla, valores):
+    import numpy as np
+
+    indice = np.rint((np.nan_to_num(valores, nan=grilla[0]) - grilla[0]) / PASO_TABLA)
+    return tabla[np.clip(indice, 0, len(tabla) - 1).astype(int)]
+
+
+def _mlg_butt(estatura, muneca, tobillo, grasa):
+    """MLG máxima de Casey Butt en kg (escalares, cm): referencia sin tablas."""
+    pulgadas = lambda cm: cm / PULGADA_CM
+    return ((pulgadas(estatura) ** 1.5
+             * (math.sqrt(pulgadas(muneca)) / BUTT_DIVISOR_MUNECA
+                + math.sqrt(pulgadas(tobillo)) / BUTT_DIVISOR_TOBILLO)
+             * (grasa / BUTT_DIVISOR_GRASA + 1)) * LIBRA_KG)
+
+
+@lru_cache(maxsize=1)
+def factor_mujer():
+    """Escala de la MLG máxima femenina: la mujer de referencia llega a FFMI_REFERENCIA_MUJER."""
+    estatura = ESTATURA_REFERENCIA_MUJER
+    mlg = _mlg_butt(estatura, PROPORCION_MUNECA['Mujer'] * estatura, PROPORCION_TOBILLO['Mujer'] * estatura,
+                    GRASA_REFERENCIA_MUJER)
+    estatura_m = estatura / 100
+    mlg_referencia = (FFMI_REFERENCIA_MUJER - 6.3 * (1.8 - estatura_m)) * estatura_m ** 2
+    return mlg_referencia / mlg
+
+
+def _por_sexo(sexo, valores):
+    import numpy as np
+
+    return np.where(np.asarray(sexo) == "Mujer", valores['Mujer'], valores['Hombre'])
+
+
+def _positivos(*valores):
+    import numpy as np
+
+    arreglos = [np.asarray(np.nan if v is None else v, dtype=float) for v in valores]
+    return [np.where(a > 0, a, np.nan) for a in arreglos]
+
+
+def _salida(valor):
+    """Escalar → float o None; arreglo → tal cual."""
+    import numpy as np
+
+    if np.ndim(valor) == 0:
+        return None if np.isnan(valor) else float(valor)
+    return valor
+
+
+def _tasa(nivel_entrenamiento):
+    import numpy as np
+
+    niveles = np.asarray(nivel_entrenamiento, dtype=object)
+    return np.vectorize(lambda n: TASA_CIERRE_ANUAL.get(n, TASA_CIERRE_ANUAL['intermedio']),
+                        otypes=[float])(niveles)
+
+
+def ffmi_maximo(sexo, estatura, grasa_corregida=None, muneca=None, tobillo=None):
+    """
+    FFMI máximo natural y MLG máxima (kg).
+
+    Args:
+        sexo: "Hombre" / "Mujer" (escalar o arreglo)
+        estatura: cm
+        grasa_corregida: % grasa; se acota a GRASA_POTENCIAL (sin valor: el mínimo)
+        muneca / tobillo: circunferencias en cm (0/None/NaN: estimadas por estatura)
+
+    Returns:
+        (ffmi_max, mlg_max): arreglos (NaN sin estatura)
+    """
+    import numpy as np
+
+    tablas = _tablas()
+    grilla_estatura = _grilla(*GRILLA_ESTATURA)
+    estatura, grasa, muneca, tobillo = _positivos(estatura, grasa_corregida, muneca, tobillo)
+    grasa_min, grasa_max = (_por_sexo(sexo, {s: rango[i] for s, rango in GRASA_POTENCIAL.items()}) for i in (0, 1))
+    grasa = np.clip(np.where(np.isnan(grasa), grasa_min, grasa), grasa_min, grasa_max)
+
+    def _termino(nombre, grilla, medida):
+        estimado = _por_sexo(sexo, {s: _buscar(tablas[f'{nombre}_{s}'], grilla_estatura, estatura)
+                                    for s in ('Hombre', 'Mujer')})
+        return np.where(np.isnan(medida), estimado, _buscar(tablas[nombre], grilla, medida))
+
+    mlg_max = (_buscar(tablas['altura_15'], grilla_estatura, estatura)
+               * (_termino('muneca', _grilla(*GRILLA_MUNECA), muneca)
+                  + _termino('tobillo', _grilla(*GRILLA_TOBILLO), tobillo))
+               * (grasa / BUTT_DIVISOR_GRASA + 1) * LIBRA_KG)
+    mlg_max = np.where(np.asarray(sexo) == "Mujer", mlg_max * factor_mujer(), mlg_max)
+    mlg_max = np.where(np.isnan(estatura), np.nan, mlg_max)
+    ffmi_max = (mlg_max * _buscar(tablas['inverso_h2'], grilla_estatura, estatura)
+                + _buscar(tablas['normalizacion'], grilla_estatura, estatura))
+    return ffmi_max, mlg_max
+
+
+def anos_hasta_fraccion(ffmi_actual, ffmi_max, nivel_entrenamiento='intermedio', fraccion=FRACCION_OBJETIVO):
+    """
+    Años hasta llegar a `fraccion` del FFMI máximo: la distancia se multiplica
+    por (1 − tasa) cada año, así que t = ln(distancia objetivo / distancia) / ln(1 − tasa).
+    0 si ya se alcanzó.
+    """
+    import numpy as np
+
+    ffmi_actual, ffmi_max = (np.asarray(v, dtype=float) for v in (ffmi_actual, ffmi_max))
+    distancia = ffmi_max - ffmi_actual
+    objetivo = (1 - fraccion) * ffmi_max
+    with np.errstate(invalid='ignore', divide='ignore'):
+        anos = np.log(objetivo / distancia) / np.log(1 - _tasa(nivel_entrenamiento))
+    return np.where(distancia <= objetivo, 0.0, anos)
+
+
+def curva_anos_potencial(ffmi_actual, ffmi_max, nivel_entrenamiento='intermedio', anos=ANOS_CURVA,
+                         puntos_por_ano=4):
+    """
+    Trayectoria esperada del FFMI por años de entrenamiento.
+
+    Returns:
+        dict: 'anos' (m,) y 'ffmi' ((m,) para un cliente, (n, m) para un lote)
+    """
+    import numpy as np
+
+    t = np.linspace(0, anos, anos * puntos_por_ano + 1)
+    ffmi_actual, ffmi_max = (np.asarray(v, dtype=float) for v in (ffmi_actual, ffmi_max))
+    distancia = np.maximum(ffmi_max - ffmi_actual, 0)[..., None]
+    restante = (1 - _tasa(nivel_entrenamiento))[..., None] ** t
+    ffmi = np.maximum(ffmi_max[..., None] - distancia * restante, ffmi_actual[..., None])
+    return {'anos': t, 'ffmi': ffmi}
+
+
+def potencial_muscular(sexo, estatura, mlg, grasa_corregida=None, muneca=None, tobillo=None,
+                       nivel_entrenamiento='intermedio'):
+    """
+    Potencial muscular natural de uno o varios clientes.
+
+    Returns:
+        dict: ffmi_actual, ffmi_max, mlg_max, porc_potencial (tope 100),
+        margen_ffmi y margen_mlg_kg (0 si ya se superó), anos_al_95 y
+        marco_medido (muñeca y tobillo medidos); floats (o None sin
+        estatura) para un cliente, arreglos para un lote
+    """
+    import numpy as np
+
+    ffmi_max, mlg_max = ffmi_maximo(sexo, estatura, grasa_corregida, muneca, tobillo)
+    estatura, mlg, muneca, tobillo = _positivos(estatura, mlg, muneca, tobillo)
+    estatura_m = estatura / 100
+    ffmi_actual = mlg / estatura_m ** 2 + 6.3 * (1.8 - estatura_m)
+    resultado = {
+        'ffmi_actual': ffmi_actual,
+        'ffmi_max': ffmi_max,
+        'mlg_max': mlg_max,
+        'porc_potencial': np.minimum(ffmi_actual / ffmi_max * 100, 100),
+        'margen_ffmi': np.maximum(ffmi_max - ffmi_actual, 0),
+        'margen_mlg_kg': np.maximum(mlg_max - mlg, 0),
+        'anos_al_95': np.where(np.isnan(ffmi_actual), np.nan,
+                               anos_hasta_fraccion(ffmi_actual, ffmi_max, nivel_entrenamiento)),
+    }
+    resultado = {clave: _salida(valor) for clave, valor in resultado.items()}
+    marco = ~np.isnan(muneca) & ~np.isnan(tobillo)
+    resultado['marco_medido'] = bool(marco) if np.ndim(marco) == 0 else marco
+    return resultado
+
+
+def ranking_potencial(evaluaciones):
+    """
+    Clientes ordenados por potencial restante (margen de FFMI, mayor primero).
+
+    Args:
+        evaluaciones: DataFrame con sexo, estatura, mlg, grasa_corregida y
+                      opcionalmente nivel_entrenamiento, circunferencia_muneca
+                      y circunferencia_tobillo
+
+    Returns:
+        DataFrame (índice original, ordenado): puesto y las métricas de
+        potencial_muscular(); filas sin estatura o MLG al final
+    """
+    import numpy as np
+    import pandas as pd
+
+    columna = lambda c: (pd.to_numeric(evaluaciones[c], errors='coerce').to_numpy(dtype=float)
+                         if c in evaluaciones else np.full(len(evaluaciones), np.nan))
+    niveles = (evaluaciones['nivel_entrenamiento'].fillna('intermedio').to_numpy()
+               if 'nivel_entrenamiento' in evaluaciones else 'intermedio')
+    potencial = potencial_muscular(evaluaciones['sexo'].to_numpy(), columna('estatura'), columna('mlg'),
+                                   columna('grasa_corregida'), columna('circunferencia_muneca'),
+                                   columna('circunferencia_tobillo'), np.broadcast_to(niveles, len(evaluaciones)))
+    ranking = pd.DataFrame(potencial, index=evaluaciones.index).sort_values(
+        ['margen_ffmi', 'anos_al_95'], ascending=[False, False], na_position='last', kind='stable')
+    ranking.insert(0, 'puesto', np.arange(1, len(ranking) + 1))
+    return ranking
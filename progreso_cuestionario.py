@@ -0,0 +1,114 @@
+"""
+Progreso del Cuestionario MUPAI - Seguimiento de completitud por eventos
+
+Cada sección del formulario informa sus valores al terminar de dibujarse
+(`SeguimientoCompletitud.actualizar`). Solo se revalidan los campos cuyas
+entradas cambiaron, y el resultado queda en un entero usado como bitset (un
+bit por campo). La barra de progreso, los indicadores de cada paso y la lista
+de faltantes para el envío del email son lecturas de ese bitset, sin volver a
+recorrer session_state, el dict de ejercicios ni el de fotos en cada rerun.
+
+Los campos y sus requisitos vienen de cuestionario.json: agregar una pregunta
+obligatoria ahí agrega su bit sin tocar este módulo ni la app.
+
+Uso:
+    seguimiento = SeguimientoCompletitud()
+    seguimiento.actualizar(nombre="Ana", telefono="8661234567", ...)
+    seguimiento.progreso()          # (porcentaje, completados, total)
+    seguimiento.paso_completo(2)
+    seguimiento.faltantes_email()   # etiquetas de campos obligatorios faltantes
+"""
+
+from esquema_cuestionario import cargar_esquema
+
+
+# Campos y requisitos compilados de cuestionario.json (ver esquema_cuestionario.py)
+CAMPOS = cargar_esquema().campos
+BIT = {campo.nombre: 1 << i for i, campo in enumerate(CAMPOS)}
+
+# Campos que dependen de cada entrada (para revalidar solo esos)
+_POR_ENTRADA = {}
+for _indice, _campo in enumerate(CAMPOS):
+    for _entrada in _campo.entradas:
+        _POR_ENTRADA.setdefault(_entrada, []).append(_indice)
+
+MASCARA_PROGRESO = sum(BIT[c.nombre] for c in CAMPOS if c.progreso)
+MASCARA_GRUPO = {}
+MASCARA_PASO = {}
+for _campo in CAMPOS:
+    if _campo.grupo is not None:
+        MASCARA_GRUPO[_campo.grupo] = MASCARA_GRUPO.get(_campo.grupo, 0) | BIT[_campo.nombre]
+    if _campo.paso is not None:
+        MASCARA_PASO[_campo.paso] = MASCARA_PASO.get(_campo.paso, 0) | BIT[_campo.nombre]
+TOTAL_PROGRESO = bin(MASCARA_PROGRESO).count('1')
+
+
+class SeguimientoCompletitud:
+    """Bitset de campos completos, actualizado por las secciones del formulario."""
+
+    def __init__(self):
+        self.bits = 0
+        self._valores = {}
+
+    def actualizar(self, **valores):
+        """
+        Informa los valores actuales de una sección. Solo se revalidan los
+        campos cuyas entradas cambiaron desde la última actualización.
+
+        Returns:
+            int: bits que cambiaron (0 si nada cambió)
+        """
+        pendientes = set()
+        for entrada, valor in valores.items():
+            if entrada in self._valores and self._valores[entrada] == valor:
+                continue
+            # Copia de los dicts: session_state los modifica en el lugar
+            self._valores[entrada] = dict(valor) if isinstance(valor, dict) else valor
+            pendientes.update(_POR_ENTRADA.get(entrada, ()))
+
+        antes = self.bits
+        for indice in pendientes:
+            campo = CAMPOS[indice]
+            bit = BIT[campo.nombre]
+            if campo.validar(self._valores):
+                self.bits |= bit
+            else:
+                self.bits &= ~bit
+        return antes ^ self.bits
+
+    def completo(self, campo):
+        return bool(self.bits & BIT[campo])
+
+    def paso_completo(self, paso):
+        mascara = MASCARA_PASO.get(paso)
+        return bool(mascara) and self.bits & mascara == mascara
+
+    def progreso(self):
+        """Returns: (porcentaje, campos completados, campos totales) de la barra."""
+        completados = bin(self.bits & MASCARA_PROGRESO).count('1')
+        return int(completados / TOTAL_PROGRESO * 100), completados, TOTAL_PROGRESO
+
+    def faltantes_email(self, etiquetas=None):
+        """
+        Campos obligatorios para el envío que faltan, en orden del formulario.
+
+        Args:
+            etiquetas: textos a usar en lugar de los predeterminados, por nombre
+                de campo (p.ej. {'foto_front_relaxed': "Foto 1 - Frontal relajado"})
+
+        Returns:
+            list: etiquetas de los faltantes (vacía si todo está completo)
+        """
+        etiquetas = etiquetas or {}
+        faltantes = []
+        for campo in CAMPOS:
+            if campo.grupo is not None:
+                # Un solo aviso por grupo, con cuántos elementos lleva
+                if campo.etiqueta:
+                    mascara = MASCARA_GRUPO[campo.grupo]
+                    cuenta = bin(self.bits & mascara).count('1')
+                    if cuenta < bin(mascara).count('1'):
+                        faltantes.append(campo.etiqueta.format(cuenta=cuenta))
+            elif campo.etiqueta and not self.bits & BIT[campo.nombre]:
+                faltantes.append(etiquetas.get(campo.nombre, campo.etiqueta))
+        return faltantes
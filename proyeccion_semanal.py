@@ -0,0 +1,217 @@
+"""
+Simulador de Proyección Semanal - Composición Corporal
+
+Este módulo reemplaza la extrapolación lineal a 6 semanas de
+calcular_proyeccion_cientifica() por una simulación semana a semana.
+
+Características principales:
+- Actualiza peso, MLG y masa grasa en cada semana (partición de Forbes)
+- Recalcula el TMB con calcular_tmb_cunningham() sobre la MLG de cada semana
+- Aplica termogénesis adaptativa proporcional al peso perdido
+- Serie temporal completa de 4 a 52 semanas
+- Banda Monte-Carlo de escenarios de adherencia, vectorizada con NumPy
+  (todas las trayectorias avanzan en paralelo; pocos ms por cliente)
+"""
+
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from motor_calculo import calcular_mlg, calcular_tmb_cunningham
+
+
+# ==================== CONSTANTES DEL MODELO ====================
+
+# Densidad energética de los tejidos (Hall 2008)
+KCAL_POR_KG_GRASA = 9440.0
+KCAL_POR_KG_MLG = 1816.0
+
+# Constante de Forbes (kg): fracción de MLG en el cambio de peso = C / (C + masa grasa)
+CONSTANTE_FORBES = 10.4
+
+# Termogénesis adaptativa: reducción del gasto (kcal/día) por cada kg perdido
+# (Rosenbaum & Leibel 2010; Müller 2016)
+TERMOGENESIS_KCAL_POR_KG = 15.0
+
+# Límites de horizonte de simulación (semanas)
+SEMANAS_MIN = 4
+SEMANAS_MAX = 52
+
+# Percentiles reportados en la banda de confianza
+PERCENTILES_BANDA = (10, 50, 90)
+
+# Masa grasa mínima fisiológica (kg) para evitar valores no válidos
+MASA_GRASA_MINIMA_KG = 2.0
+
+# Coeficientes de calcular_tmb_cunningham() (TMB = intercepto + pendiente × MLG).
+# Se derivan de la propia función para que el simulador siga cualquier ajuste
+# de la fórmula sin duplicarla.
+_TMB_INTERCEPTO = calcular_tmb_cunningham(0)
+_TMB_PENDIENTE = calcular_tmb_cunningham(1) - _TMB_INTERCEPTO
+
+
+def _validar_entrada(nombre, valor, minimo, maximo=math.inf, incluir_minimo=False):
+    """Convierte una entrada a float finito dentro de (minimo, maximo) o lanza ValueError."""
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"{nombre} no es numérico: {valor!r}")
+    dentro = (numero >= minimo if incluir_minimo else numero > minimo) and numero < maximo
+    if not (math.isfinite(numero) and dentro):
+        raise ValueError(f"{nombre} fuera de rango: {valor!r}")
+    return numero
+
+
+def simular_proyeccion(peso, grasa_corregida, ingesta_kcal, gasto_energetico_kcal,
+                       semanas=12, n_escenarios=500, adherencia_media=0.85,
+                       adherencia_sd=0.10, semilla=None):
+    """
+    Simula semana a semana la evolución de la composición corporal.
+
+    Cada escenario Monte-Carlo tiene su propia adherencia media y un factor de
+    actividad ligeramente distinto; además, la adherencia varía semana a semana.
+    Todas las trayectorias se calculan en paralelo como arreglos NumPy.
+
+    Modelo por semana:
+    1. TMB = calcular_tmb_cunningham(MLG actual)
+    2. Gasto = TMB × (GE inicial / TMB inicial) - termogénesis adaptativa
+    3. Ingesta efectiva = GE inicial + adherencia × (ingesta plan - GE inicial)
+    4. Balance semanal = 7 × (ingesta efectiva - gasto)
+    5. Partición de Forbes del cambio de peso entre MLG y masa grasa
+
+    Args:
+        peso: Peso actual en kg
+        grasa_corregida: % de grasa corporal corregido
+        ingesta_kcal: Calorías diarias del plan
+        gasto_energetico_kcal: Gasto energético total inicial (GE) en kcal/día
+        semanas: Horizonte en semanas (se limita a 4-52)
+        n_escenarios: Número de escenarios Monte-Carlo de adherencia
+        adherencia_media: Adherencia media al plan (0-1)
+        adherencia_sd: Desviación estándar de la adherencia entre escenarios
+        semilla: Semilla del generador aleatorio (reproducibilidad)
+
+    Returns:
+        dict con:
+            'semanas': lista 0..N
+            'peso_kg', 'mlg_kg', 'masa_grasa_kg', 'grasa_pct', 'tmb_kcal':
+                {'p10': array, 'p50': array, 'p90': array} por semana
+            'adaptacion_kcal_final': termogénesis adaptativa mediana al final
+            'n_escenarios', 'semanas_simuladas'
+
+    Raises:
+        ValueError: si alguna entrada no es numérica o está fuera de rango. No
+        se sustituye por valores genéricos: una proyección inventada no debe
+        llegar al cliente, el llamador omite el bloque.
+    """
+    peso = _validar_entrada('peso', peso, minimo=0.0)
+    grasa_corregida = _validar_entrada('grasa_corregida', grasa_corregida, minimo=0.0, maximo=100.0,
+                                       incluir_minimo=True)
+    ingesta_kcal = _validar_entrada('ingesta_kcal', ingesta_kcal, minimo=0.0, incluir_minimo=True)
+    gasto_energetico_kcal = _validar_entrada('gasto_energetico_kcal', gasto_energetico_kcal, minimo=0.0)
+
+    semanas = max(SEMANAS_MIN, min(SEMANAS_MAX, int(semanas)))
+    n_escenarios = max(1, int(n_escenarios))
+
+    mlg_inicial = calcular_mlg(peso, grasa_corregida)
+    tmb_inicial = calcular_tmb_cunningham(mlg_inicial)
+    factor_actividad = gasto_energetico_kcal / tmb_inicial if tmb_inicial > 0 else 1.0
+
+    rng = np.random.default_rng(semilla)
+
+    # Variabilidad entre escenarios: adherencia media y factor de actividad
+    adherencia_escenario = np.clip(
+        rng.normal(adherencia_media, adherencia_sd, n_escenarios), 0.3, 1.0
+    )
+    factor_escenario = factor_actividad * rng.normal(1.0, 0.03, n_escenarios)
+    # Variabilidad semana a semana dentro de cada escenario
+    adherencia = np.clip(
+        adherencia_escenario + rng.normal(0.0, 0.05, (semanas, n_escenarios)), 0.0, 1.0
+    )
+    ingesta_efectiva = gasto_energetico_kcal + adherencia * (ingesta_kcal - gasto_energetico_kcal)
+
+    peso_t = np.full(n_escenarios, peso)
+    mlg_t = np.full(n_escenarios, mlg_inicial)
+    grasa_t = peso_t - mlg_t
+
+    forma = (semanas + 1, n_escenarios)
+    serie_peso = np.empty(forma)
+    serie_mlg = np.empty(forma)
+    serie_grasa = np.empty(forma)
+    serie_tmb = np.empty(forma)
+    serie_peso[0], serie_mlg[0], serie_grasa[0] = peso_t, mlg_t, grasa_t
+    serie_tmb[0] = _TMB_INTERCEPTO + _TMB_PENDIENTE * mlg_t
+    adaptacion = np.zeros(n_escenarios)
+
+    for semana in range(semanas):
+        tmb_t = _TMB_INTERCEPTO + _TMB_PENDIENTE * mlg_t
+        # Termogénesis adaptativa solo mientras hay pérdida de peso acumulada
+        adaptacion = TERMOGENESIS_KCAL_POR_KG * np.maximum(peso - peso_t, 0.0)
+        gasto_t = tmb_t * factor_escenario - adaptacion
+        balance_semanal = 7.0 * (ingesta_efectiva[semana] - gasto_t)
+
+        # Partición de Forbes
+        fraccion_mlg = CONSTANTE_FORBES / (CONSTANTE_FORBES + grasa_t)
+        kcal_por_kg = fraccion_mlg * KCAL_POR_KG_MLG + (1.0 - fraccion_mlg) * KCAL_POR_KG_GRASA
+        delta_peso = balance_semanal / kcal_por_kg
+
+        mlg_t = mlg_t + fraccion_mlg * delta_peso
+        grasa_t = np.maximum(grasa_t + (1.0 - fraccion_mlg) * delta_peso, MASA_GRASA_MINIMA_KG)
+        peso_t = mlg_t + grasa_t
+
+        serie_peso[semana + 1] = peso_t
+        serie_mlg[semana + 1] = mlg_t
+        serie_grasa[semana + 1] = grasa_t
+        serie_tmb[semana + 1] = _TMB_INTERCEPTO + _TMB_PENDIENTE * mlg_t
+
+    serie_grasa_pct = serie_grasa / serie_peso * 100
+
+    return {
+        'semanas': list(range(semanas + 1)),
+        'peso_kg': _banda(serie_peso),
+        'mlg_kg': _banda(serie_mlg),
+        'masa_grasa_kg': _banda(serie_grasa),
+        'grasa_pct': _banda(serie_grasa_pct),
+        'tmb_kcal': _banda(serie_tmb),
+        'adaptacion_kcal_final': float(np.median(adaptacion)),
+        'n_escenarios': n_escenarios,
+        'semanas_simuladas': semanas
+    }
+
+
+def _banda(serie):
+    """Calcula los percentiles de la banda por semana (una fila por semana)."""
+    valores = np.percentile(serie, PERCENTILES_BANDA, axis=1)
+    return {f"p{p}": valores[i] for i, p in enumerate(PERCENTILES_BANDA)}
+
+
+def resumir_horizontes(resultado, horizontes=(4, 8, 13)) -> List[Optional[Dict]]:
+    """
+    Extrae puntos de la serie simulada en horizontes concretos (por defecto
+    1, 2 y 3 meses) en un formato serializable para el reporte YAML.
+
+    Args:
+        resultado: Diccionario retornado por simular_proyeccion()
+        horizontes: Semanas a resumir
+
+    Returns:
+        list: Un dict por horizonte (None si excede la simulación)
+    """
+    resumen = []
+    for semana in horizontes:
+        if semana > resultado['semanas_simuladas']:
+            resumen.append(None)
+            continue
+        resumen.append({
+            'semana': semana,
+            'peso_kg': _punto(resultado['peso_kg'], semana),
+            'grasa_pct': _punto(resultado['grasa_pct'], semana),
+            'mlg_kg': _punto(resultado['mlg_kg'], semana),
+            'masa_grasa_kg': _punto(resultado['masa_grasa_kg'], semana)
+        })
+    return resumen
+
+
+def _punto(banda, semana):
+    return {clave: round(float(valores[semana]), 2) for clave, valores in banda.items()}
+
@@ -0,0 +1,257 @@
+"""
+Puntuación de Sueño + Estrés MUPAI - IR-SE individual y por lote
+
+Cálculo puro del Índice de Recuperación Sueño-Estrés a partir de las
+respuestas del cuestionario (los puntos por opción vienen de
+cuestionario.json):
+
+- puntuar_suenyo_estres(): una evaluación → sleep_raw, stress_raw,
+  sleep_score, stress_score, ir_se, nivel de recuperación y banderas
+  (lo que guarda formulario_suenyo_estres en session_state)
+- puntuar_lote(): DataFrame de respuestas → las mismas puntuaciones por
+  columnas, con búsquedas en arreglos (posición de la opción → tabla de puntos)
+- percentiles_poblacion() / rango_percentil(): IR-SE de un cliente frente a
+  toda la población del gimnasio
+- repuntuar_historico(): vuelve a puntuar las respuestas guardadas en el
+  registro de evaluaciones con otros pesos o puntos
+
+pandas y numpy se importan solo en las funciones por lote: la app usa
+puntuar_suenyo_estres() en cada rerun sin pagar ese arranque.
+
+Uso:
+    resultado = puntuar_suenyo_estres({'horas_sueno': "7-7.9 horas", ...})
+    df = puntuar_lote(respuestas_df, pesos={'sueno': 0.5, 'estres': 0.5})
+"""
+
+from esquema_cuestionario import cargar_esquema
+
+
+PREGUNTAS_SUENO = ('horas_sueno', 'tiempo_conciliar', 'veces_despierta', 'calidad_sueno')
+PREGUNTAS_ESTRES = ('sobrecarga', 'falta_control', 'dificultad_manejar', 'irritabilidad')
+PREGUNTAS = PREGUNTAS_SUENO + PREGUNTAS_ESTRES
+
+# El sueño pesa más: es el factor más crítico para la recuperación
+PESOS = {'sueno': 0.6, 'estres': 0.4}
+
+UMBRAL_ALTA = 70
+UMBRAL_MEDIA = 50
+
+# Banderas sobre la puntuación cruda (sueño 0-14, estrés 0-16)
+ROJA_SUENO = 10
+ROJA_ESTRES = 12
+AMARILLA_SUENO = 7
+AMARILLA_ESTRES = 8
+AMARILLA_HORAS = 3          # puntos de horas_sueno: menos de 6 horas
+
+NIVELES = {
+    "ALTA": ("#27AE60", "✅",
+             "Excelente estado de recuperación. Tu cuerpo está bien preparado para el entrenamiento."),
+    "MEDIA": ("#F39C12", "⚠️",
+              "Estado de recuperación moderado. Considera mejorar la calidad del sueño o reducir el estrés."),
+    "BAJA": ("#E74C3C", "🚨",
+             "Estado de recuperación comprometido. Es importante abordar problemas de sueño y/o estrés."),
+}
+
+_ROJA = "🔴 BANDERA ROJA"
+_AMARILLA = "🟡 BANDERA AMARILLA"
+
+
+def _maximos(puntos):
+    """Puntuación cruda máxima de sueño y de estrés según la tabla de puntos."""
+    return (sum(max(puntos[p].values()) for p in PREGUNTAS_SUENO),
+            sum(max(puntos[p].values()) for p in PREGUNTAS_ESTRES))
+
+
+def _ir_se(sleep_score, stress_score, pesos):
+    return ((sleep_score * pesos['sueno'] + stress_score * pesos['estres'])
+            / (pesos['sueno'] + pesos['estres']))
+
+
+def clasificar(ir_se):
+    """IR-SE → "ALTA", "MEDIA" o "BAJA"."""
+    if ir_se >= UMBRAL_ALTA:
+        return "ALTA"
+    if ir_se >= UMBRAL_MEDIA:
+        return "MEDIA"
+    return "BAJA"
+
+
+def _banderas(sleep_raw, stress_raw, puntos_horas, horas_sueno):
+    banderas = []
+    if sleep_raw >= ROJA_SUENO:
+        banderas.append((_ROJA, "Problemas graves de sueño detectados",
+                         "Tu calidad y cantidad de sueño están significativamente comprometidas. "
+                         "Considera consultar con un especialista en medicina del sueño."))
+    if stress_raw >= ROJA_ESTRES:
+        banderas.append((_ROJA, "Nivel de estrés crítico",
+                         "Tu nivel de estrés está en rango muy alto. "
+                         "Se recomienda buscar apoyo profesional (psicólogo o terapeuta)."))
+    if AMARILLA_SUENO <= sleep_raw < ROJA_SUENO:
+        banderas.append((_AMARILLA, "Calidad de sueño subóptima",
+                         "Tu sueño necesita atención. Implementa higiene del sueño: "
+                         "horarios regulares, ambiente oscuro, evitar pantallas antes de dormir."))
+    if AMARILLA_ESTRES <= stress_raw < ROJA_ESTRES:
+        banderas.append((_AMARILLA, "Nivel de estrés elevado",
+                         "Tu nivel de estrés está por encima del ideal. "
+                         "Considera técnicas de manejo: meditación, ejercicio, tiempo libre."))
+    if puntos_horas >= AMARILLA_HORAS:
+        banderas.append((_AMARILLA, "Duración de sueño insuficiente",
+                         f"Duermes {horas_sueno}. Se recomiendan al menos 7-8 horas para recuperación óptima."))
+    return banderas
+
+
+# ==================== EVALUACIÓN INDIVIDUAL ====================
+
+def puntuar_suenyo_estres(respuestas, puntos=None, pesos=None):
+    """
+    Puntúa las 8 respuestas de sueño y estrés de una evaluación.
+
+    Args:
+        respuestas: dict {pregunta: opción elegida} (ver PREGUNTAS)
+        puntos: tabla {pregunta: {opción: puntos}} (default cuestionario.json)
+        pesos: {'sueno': w, 'estres': w} del IR-SE (default PESOS)
+
+    Returns:
+        dict: sleep_raw, stress_raw, sleep_score, stress_score (0-100, mayor es
+        mejor), ir_se, nivel_recuperacion, color_nivel, emoji_nivel,
+        mensaje_nivel y banderas [(tipo, título, descripción)]
+    """
+    puntos = puntos or cargar_esquema().puntos
+    pesos = pesos or PESOS
+    max_sueno, max_estres = _maximos(puntos)
+
+    sleep_raw = sum(puntos[p][respuestas[p]] for p in PREGUNTAS_SUENO)
+    stress_raw = sum(puntos[p][respuestas[p]] for p in PREGUNTAS_ESTRES)
+    # Normalizado a 0-100 e invertido: menos puntos = mejor
+    sleep_score = max(0, 100 - (sleep_raw / max_sueno * 100))
+    stress_score = max(0, 100 - (stress_raw / max_estres * 100))
+    ir_se = _ir_se(sleep_score, stress_score, pesos)
+
+    nivel = clasificar(ir_se)
+    color, emoji, mensaje = NIVELES[nivel]
+    return {
+        'sleep_raw': sleep_raw,
+        'stress_raw': stress_raw,
+        'sleep_score': sleep_score,
+        'stress_score': stress_score,
+        'ir_se': ir_se,
+        'nivel_recuperacion': nivel,
+        'color_nivel': color,
+        'emoji_nivel': emoji,
+        'mensaje_nivel': mensaje,
+        'banderas': _banderas(sleep_raw, stress_raw, puntos['horas_sueno'][respuestas['horas_sueno']],
+                              respuestas['horas_sueno']),
+    }
+
+
+# ==================== LOTE ====================
+
+def puntuar_lote(respuestas, puntos=None, pesos=None):
+    """
+    Puntúa muchas evaluaciones a la vez.
+
+    Cada columna de respuestas se convierte en códigos (posición de la opción
+    en el esquema) y se indexa la tabla de puntos con ellos. Las
+    respuestas faltantes o que ya no existen en el esquema dan NaN y la fila
+    queda sin nivel.
+
+    Args:
+        respuestas: DataFrame con una columna por pregunta (ver PREGUNTAS)
+        puntos, pesos: como en puntuar_suenyo_estres()
+
+    Returns:
+        DataFrame (mismo índice): sleep_raw, stress_raw, sleep_score,
+        stress_score, ir_se, nivel_recuperacion, banderas_rojas, banderas_amarillas
+    """
+    import numpy as np
+    import pandas as pd
+
+    puntos = puntos or cargar_esquema().puntos
+    pesos = pesos or PESOS
+    max_sueno, max_estres = _maximos(puntos)
+
+    por_pregunta = {}
+    for pregunta in PREGUNTAS:
+        opciones = list(puntos[pregunta])
+        # El código -1 (sin respuesta) cae en el NaN agregado al final
+        tabla = np.array([puntos[pregunta][o] for o in opciones] + [np.nan], dtype=float)
+        codigos = pd.Index(opciones).get_indexer(respuestas[pregunta])
+        por_pregunta[pregunta] = tabla[codigos]
+
+    sleep_raw = sum(por_pregunta[p] for p in PREGUNTAS_SUENO)
+    stress_raw = sum(por_pregunta[p] for p in PREGUNTAS_ESTRES)
+    sleep_score = np.maximum(0, 100 - sleep_raw / max_sueno * 100)
+    stress_score = np.maximum(0, 100 - stress_raw / max_estres * 100)
+    ir_se = _ir_se(sleep_score, stress_score, pesos)
+
+    nivel = pd.cut(ir_se, [-np.inf, UMBRAL_MEDIA, UMBRAL_ALTA, np.inf], right=False,
+                   labels=["BAJA", "MEDIA", "ALTA"]).reorder_categories(list(NIVELES))
+    rojas = (sleep_raw >= ROJA_SUENO).astype(int) + (stress_raw >= ROJA_ESTRES).astype(int)
+    amarillas = (((sleep_raw >= AMARILLA_SUENO) & (sleep_raw < ROJA_SUENO)).astype(int)
+                 + ((stress_raw >= AMARILLA_ESTRES) & (stress_raw < ROJA_ESTRES)).astype(int)
+                 + (por_pregunta['horas_sueno'] >= AMARILLA_HORAS).astype(int))
+
+    return pd.DataFrame({
+        'sleep_raw': sleep_raw,
+        'stress_raw': stress_raw,
+        'sleep_score': sleep_score,
+        'stress_score': stress_score,
+        'ir_se': ir_se,
+        'nivel_recuperacion': nivel,
+        'banderas_rojas': rojas,
+        'banderas_amarillas': amarillas,
+    }, index=respuestas.index)
+
+
+# ==================== POBLACIÓN ====================
+
+def percentiles_poblacion(ir_se, cortes=(10, 25, 50, 75, 90)):
+    """IR-SE de la población en los percentiles pedidos: {percentil: valor} (NaN se ignoran)."""
+    import numpy as np
+
+    valores = np.asarray(ir_se, dtype=float)
+    valores = valores[~np.isnan(valores)]
+    if not len(valores):
+        return {c: None for c in cortes}
+    return dict(zip(cortes, np.percentile(valores, cortes).round(1).tolist()))
+
+
+def rango_percentil(valor, ir_se_poblacion):
+    """
+    Porcentaje de la población con IR-SE menor o igual a `valor`.
+
+    Acepta un número o un arreglo de valores (una búsqueda binaria sobre la
+    población ordenada por cada uno).
+    """
+    import numpy as np
+
+    poblacion = np.asarray(ir_se_poblacion, dtype=float)
+    poblacion = np.sort(poblacion[~np.isnan(poblacion)])
+    if not len(poblacion):
+        return None
+    rango = np.searchsorted(poblacion, valor, side='right') / len(poblacion) * 100
+    return float(rango) if np.ndim(rango) == 0 else rango
+
+
+def repuntuar_historico(registro, puntos=None, pesos=None, aplicar=False):
+    """
+    Vuelve a puntuar las respuestas guardadas en el registro de evaluaciones.
+
+    Args:
+        registro: RegistroEvaluaciones
+        puntos, pesos: tabla y pesos nuevos (default los vigentes)
+        aplicar: si es True, guarda el IR-SE y el nivel nuevos en el registro
+
+    Returns:
+        DataFrame: id, ir_se_anterior, nivel_anterior y las columnas de
+        puntuar_lote() (solo evaluaciones con respuestas de sueño y estrés)
+    """
+    historico = registro.respuestas_suenyo_estres()
+    nuevo = puntuar_lote(historico, puntos=puntos, pesos=pesos)
+    resultado = historico[['id', 'ir_se', 'nivel_recuperacion']].rename(
+        columns={'ir_se': 'ir_se_anterior', 'nivel_recuperacion': 'nivel_anterior'}).join(nuevo)
+    resultado = resultado[resultado['ir_se'].notna()]
+    if aplicar:
+        registro.actualizar_recuperacion(resultado['id'].tolist(), resultado['ir_se'].tolist(),
+                                         resultado['nivel_recuperacion'].astype(str).tolist())
+    return resultado
@@ -0,0 +1,402 @@
+"""
+Registro de Evaluaciones MUPAI - Almacén local para el panel de administración
+
+Cada evaluación enviada se guarda en SQLite con columnas indexadas para los
+filtros del panel (fecha, sexo, categoría de grasa, elegibilidad PSMF, nivel
+de recuperación) y el registro completo en JSON para poder reenviar el
+reporte al cliente sin volver a llenar el cuestionario.
+
+- buscar(): consulta paginada por índices (LIMIT/OFFSET sobre creado DESC)
+- agregados(): conteos y promedios con máscaras y group-by de pandas sobre las
+  columnas de filtro, cargadas una vez y extendidas solo con las filas nuevas
+- obtener(): evaluación completa, lista para reportes_lote.renderizar_reporte()
+- respuestas_suenyo_estres() / actualizar_recuperacion(): respuestas guardadas
+  para volver a puntuar el IR-SE (ver puntuacion_suenyo_estres.py)
+- poner_en_cuarentena() / en_cuarentena() / liberar() / descartar():
+  evaluaciones poco plausibles apartadas fuera de los reportes (ver
+  plausibilidad.py) hasta que el equipo las revise
+- datos_composicion(): peso, estatura, edad, sexo, MLG... de todas las
+  evaluaciones en un DataFrame (recálculo por lote, ver ecuaciones_tmb.py y
+  grasa_circunferencias.py); como agregados(), solo lee del JSON las filas nuevas
+
+Uso:
+    registro = RegistroEvaluaciones()
+    registro.registrar({'nombre': ..., 'email': ..., 'sexo': ..., ...})
+    registro.buscar(sexo="Mujer", psmf_aplicable=True, pagina=2)
+"""
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+
+RUTA_POR_DEFECTO = os.path.join('.mupai_sesiones', 'evaluaciones.db')
+
+POR_PAGINA = 50
+
+# Filtros del panel → columna indexada
+COLUMNAS_FILTRO = ('sexo', 'categoria_bf', 'psmf_aplicable', 'nivel_recuperacion')
+
+_COLUMNAS_LISTADO = ('id', 'fecha', 'nombre', 'email', 'telefono', 'sexo', 'edad', 'peso',
+                     'grasa_corregida', 'categoria_bf', 'psmf_aplicable', 'nivel_recuperacion',
+                     'ir_se', 'reenvios')
+
+# Campos del JSON de la evaluación que lee datos_composicion()
+CAMPOS_COMPOSICION = ('sexo', 'edad', 'peso', 'estatura', 'grasa_corregida', 'mlg', 'circunferencia_cintura',
+                      'circunferencia_cuello', 'circunferencia_cadera', 'grasa_visceral',
+                      'masa_muscular_aparato', 'nivel_entrenamiento', 'circunferencia_muneca',
+                      'circunferencia_tobillo', 'metodo_grasa')
+_CAMPOS_TEXTO = ('sexo', 'nivel_entrenamiento', 'metodo_grasa')
+
+_COLUMNAS_AGREGADOS = ('fecha', 'sexo', 'categoria_bf', 'psmf_aplicable', 'nivel_recuperacion',
+                       'grasa_corregida', 'ir_se')
+
+
+class RegistroEvaluaciones:
+    """Evaluaciones completadas sobre SQLite (una conexión por hilo)."""
+
+    def __init__(self, ruta_db=RUTA_POR_DEFECTO):
+        self.ruta_db = ruta_db
+        os.makedirs(os.path.dirname(os.path.abspath(ruta_db)), exist_ok=True)
+        self._local = threading.local()
+        # El registro se comparte entre sesiones (st.cache_resource): los marcos en
+        # memoria se leen y extienden bajo este lock
+        self._lock = threading.Lock()
+        self._marco = None
+        self._ultimo_id = 0
+        self._composicion = {}
+        self._revision = 0
+        with self._conexion() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS evaluaciones (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    creado REAL NOT NULL,
+                    fecha TEXT NOT NULL,
+                    nombre TEXT,
+                    email TEXT,
+                    telefono TEXT,
+                    sexo TEXT,
+                    edad REAL,
+                    peso REAL,
+                    grasa_corregida REAL,
+                    categoria_bf TEXT,
+                    psmf_aplicable INTEGER,
+                    nivel_recuperacion TEXT,
+                    ir_se REAL,
+                    reenvios INTEGER NOT NULL DEFAULT 0,
+                    datos TEXT NOT NULL
+                )
+            """)
+            # (filtro, creado): el listado se recorre en orden del índice sin ordenar aparte
+            con.execute("CREATE INDEX IF NOT EXISTS idx_eval_creado ON evaluaciones(creado)")
+            con.execute("CREATE INDEX IF NOT EXISTS idx_eval_fecha ON evaluaciones(fecha)")
+            for columna in COLUMNAS_FILTRO:
+                con.execute(f"CREATE INDEX IF NOT EXISTS idx_eval_{columna} ON evaluaciones({columna}, creado)")
+            # Evaluaciones poco plausibles: fuera de la tabla de reportes hasta revisarlas
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS cuarentena (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    creado REAL NOT NULL,
+                    nombre TEXT,
+                    email TEXT,
+                    puntuacion REAL,
+                    motivos TEXT NOT NULL,
+                    datos TEXT NOT NULL
+                )
+            """)
+
+    def _conexion(self):
+        con = getattr(self._local, 'conexion', None)
+        if con is None:
+            con = sqlite3.connect(self.ruta_db, timeout=10)
+            con.execute("PRAGMA busy_timeout=10000")
+            con.row_factory = sqlite3.Row
+            self._local.conexion = con
+        return con
+
+    # ---------- Escritura ----------
+
+    @staticmethod
+    def _fila(evaluacion, creado):
+        suenyo = evaluacion.get('suenyo_estres_data') or {}
+        psmf = evaluacion.get('psmf_aplicable')
+        return (
+            creado,
+            datetime.fromtimestamp(creado).strftime('%Y-%m-%d'),
+            evaluacion.get('nombre') or evaluacion.get('nombre_cliente'),
+            evaluacion.get('email'),
+            evaluacion.get('telefono'),
+            evaluacion.get('sexo'),
+            evaluacion.get('edad'),
+            evaluacion.get('peso'),
+            evaluacion.get('grasa_corregida'),
+            evaluacion.get('categoria_bf'),
+            None if psmf is None else int(bool(psmf)),
+            evaluacion.get('nivel_recuperacion') or suenyo.get('nivel_recuperacion'),
+            evaluacion.get('ir_se') if evaluacion.get('ir_se') is not None else suenyo.get('ir_se'),
+            json.dumps(evaluacion, ensure_ascii=False, default=str),
+        )
+
+    _INSERTAR = ("INSERT INTO evaluaciones (creado, fecha, nombre, email, telefono, sexo, edad, peso, "
+                 "grasa_corregida, categoria_bf, psmf_aplicable, nivel_recuperacion, ir_se, datos) "
+                 "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+    def registrar(self, evaluacion, creado=None):
+        """
+        Guarda una evaluación completada.
+
+        Args:
+            evaluacion: dict con al menos nombre y email; se reconocen sexo, edad,
+                peso, grasa_corregida, categoria_bf, psmf_aplicable, telefono y
+                suenyo_estres_data (nivel_recuperacion, ir_se)
+            creado: timestamp (default ahora)
+
+        Returns:
+            int: id de la evaluación
+        """
+        with self._conexion() as con:
+            cursor = con.execute(self._INSERTAR, self._fila(evaluacion, creado or time.time()))
+        return cursor.lastrowid
+
+    def registrar_lote(self, evaluaciones, creado=None):
+        """Guarda muchas evaluaciones en una sola transacción (p.ej. salida de mupai.py evaluate)."""
+        creado = creado or time.time()
+        with self._conexion() as con:
+            con.executemany(self._INSERTAR, (self._fila(ev, ev.get('creado') or creado) for ev in evaluaciones))
+
+    # ---------- Cuarentena ----------
+
+    def poner_en_cuarentena(self, evaluacion, motivos, puntuacion=None, creado=None):
+        """Aparta una evaluación poco plausible (no cuenta en buscar() ni en agregados())."""
+        with self._conexion() as con:
+            cursor = con.execute(
+                "INSERT INTO cuarentena (creado, nombre, email, puntuacion, motivos, datos) VALUES (?, ?, ?, ?, ?, ?)",
+                (creado or time.time(), evaluacion.get('nombre') or evaluacion.get('nombre_cliente'),
+                 evaluacion.get('email'), puntuacion, json.dumps(list(motivos), ensure_ascii=False),
+                 json.dumps(evaluacion, ensure_ascii=False, default=str)))
+        return cursor.lastrowid
+
+    def en_cuarentena(self):
+        """Evaluaciones en cuarentena, las más recientes primero (sin el JSON completo)."""
+        filas = self._conexion().execute(
+            "SELECT id, creado, nombre, email, puntuacion, motivos FROM cuarentena ORDER BY creado DESC").fetchall()
+        return [dict(f, motivos=json.loads(f['motivos'])) for f in filas]
+
+    def liberar(self, id_cuarentena):
+        """Pasa una evaluación de la cuarentena al registro. Returns: id nuevo (None si no existe)."""
+        fila = self._conexion().execute("SELECT creado, datos FROM cuarentena WHERE id = ?",
+                                        (id_cuarentena,)).fetchone()
+        if fila is None:
+            return None
+        with self._conexion() as con:
+            cursor = con.execute(self._INSERTAR, self._fila(json.loads(fila['datos']), fila['creado']))
+            con.execute("DELETE FROM cuarentena WHERE id = ?", (id_cuarentena,))
+        return cursor.lastrowid
+
+    def descartar(self, id_cuarentena):
+        with self._conexion() as con:
+            con.execute("DELETE FROM cuarentena WHERE id = ?", (id_cuarentena,))
+
+    def marcar_reenvio(self, id_evaluacion):
+        with self._conexion() as con:
+            con.execute("UPDATE evaluaciones SET reenvios = reenvios + 1 WHERE id = ?", (id_evaluacion,))
+
+    # ---------- Consultas ----------
+
+    def version(self):
+        """
+        Cambia al registrar evaluaciones o al reescribir la recuperación: clave
+        para cachear en el panel lo que se calcula sobre todo el registro.
+        """
+        ultimo = self._conexion().execute("SELECT MAX(id) FROM evaluaciones").fetchone()[0] or 0
+        return ultimo, self._revision
+
+    @staticmethod
+    def _where(desde=None, hasta=None, **filtros):
+        condiciones, parametros = [], []
+        if desde:
+            condiciones.append("fecha >= ?")
+            parametros.append(str(desde))
+        if hasta:
+            condiciones.append("fecha <= ?")
+            parametros.append(str(hasta))
+        for columna in COLUMNAS_FILTRO:
+            valor = filtros.get(columna)
+            if valor is None:
+                continue
+            condiciones.append(f"{columna} = ?")
+            parametros.append(int(bool(valor)) if columna == 'psmf_aplicable' else valor)
+        return (" WHERE " + " AND ".join(condiciones)) if condiciones else "", parametros
+
+    def buscar(self, desde=None, hasta=None, sexo=None, categoria_bf=None, psmf_aplicable=None,
+               nivel_recuperacion=None, pagina=1, por_pagina=POR_PAGINA):
+        """
+        Listado paginado, más reciente primero.
+
+        Returns:
+            dict: {'filas': [dict], 'total': n, 'pagina': p, 'paginas': m}
+        """
+        where, parametros = self._where(desde, hasta, sexo=sexo, categoria_bf=categoria_bf,
+                                        psmf_aplicable=psmf_aplicable,
+                                        nivel_recuperacion=nivel_recuperacion)
+        con = self._conexion()
+        total = con.execute(f"SELECT COUNT(*) FROM evaluaciones{where}", parametros).fetchone()[0]
+        paginas = max(1, math.ceil(total / por_pagina))
+        pagina = min(max(1, pagina), paginas)
+        filas = con.execute(
+            f"SELECT {', '.join(_COLUMNAS_LISTADO)} FROM evaluaciones{where} "
+            f"ORDER BY creado DESC LIMIT ? OFFSET ?",
+            parametros + [por_pagina, (pagina - 1) * por_pagina],
+        ).fetchall()
+        return {'filas': [dict(f) for f in filas], 'total': total, 'pagina': pagina, 'paginas': paginas}
+
+    def obtener(self, id_evaluacion):
+        """Evaluación completa tal como se registró (None si no existe)."""
+        fila = self._conexion().execute("SELECT datos FROM evaluaciones WHERE id = ?",
+                                        (id_evaluacion,)).fetchone()
+        return json.loads(fila['datos']) if fila else None
+
+    def respuestas_suenyo_estres(self):
+        """
+        Respuestas de sueño y estrés guardadas (para volver a puntuarlas).
+
+        Returns:
+            DataFrame: id, ir_se, nivel_recuperacion y una columna por pregunta
+        """
+        import pandas as pd
+        from puntuacion_suenyo_estres import PREGUNTAS
+
+        extraer = ", ".join(f"json_extract(datos, '$.suenyo_estres_data.{p}') AS {p}" for p in PREGUNTAS)
+        filas = self._conexion().execute(
+            f"SELECT id, ir_se, nivel_recuperacion, {extraer} FROM evaluaciones ORDER BY id").fetchall()
+        return pd.DataFrame.from_records([tuple(f) for f in filas],
+                                         columns=['id', 'ir_se', 'nivel_recuperacion', *PREGUNTAS])
+
+    def datos_composicion(self, campos=CAMPOS_COMPOSICION):
+        """
+        Datos de composición corporal guardados, uno por evaluación (para
+        recalcular métricas de toda la base en una llamada, p. ej. ecuaciones_tmb).
+
+        Returns:
+            DataFrame: id y una columna por campo (numéricas salvo sexo)
+        """
+        import pandas as pd
+
+        campos = tuple(campos)
+        con = self._conexion()
+        with self._lock:
+            ultimo = con.execute("SELECT MAX(id) FROM evaluaciones").fetchone()[0] or 0
+            ultimo_leido, marco = self._composicion.get(campos, (0, None))
+            if marco is None or ultimo != ultimo_leido:
+                # Los campos de composición no se modifican después de registrar: basta
+                # con extraer del JSON las filas nuevas
+                extraer = ", ".join(f"json_extract(datos, '$.{c}') AS {c}" for c in campos)
+                filas = con.execute(f"SELECT id, {extraer} FROM evaluaciones WHERE id > ? AND id <= ? ORDER BY id",
+                                    (ultimo_leido, ultimo)).fetchall()
+                nuevas = pd.DataFrame.from_records([tuple(f) for f in filas], columns=['id', *campos])
+                for columna in campos:
+                    if columna not in _CAMPOS_TEXTO:
+                        nuevas[columna] = pd.to_numeric(nuevas[columna], errors='coerce')
+                marco = nuevas if marco is None else pd.concat([marco, nuevas], ignore_index=True)
+                self._composicion[campos] = (ultimo, marco)
+            return marco.copy()
+
+    def actualizar_recuperacion(self, ids, ir_se, niveles):
+        """
+        Reemplaza IR-SE y nivel de recuperación de varias evaluaciones
+        (repuntuación), en las columnas de filtro y en el JSON que leen obtener()
+        y los reportes reenviados.
+        """
+        from puntuacion_suenyo_estres import NIVELES
+
+        filas = [(ir, nivel, ir, nivel, *NIVELES.get(nivel, (None, None, None)), ir, nivel, id_evaluacion)
+                 for id_evaluacion, ir, nivel in zip(ids, ir_se, niveles)]
+        with self._conexion() as con:
+            # json_replace en la raíz: solo si la evaluación traía ir_se / nivel fuera de suenyo_estres_data
+            con.executemany("""
+                UPDATE evaluaciones SET ir_se = ?, nivel_recuperacion = ?,
+                    datos = json_replace(json_set(datos,
+                        '$.suenyo_estres_data.ir_se', ?, '$.suenyo_estres_data.nivel_recuperacion', ?,
+                        '$.suenyo_estres_data.color_nivel', ?, '$.suenyo_estres_data.emoji_nivel', ?,
+                        '$.suenyo_estres_data.mensaje_nivel', ?),
+                        '$.ir_se', ?, '$.nivel_recuperacion', ?)
+                WHERE id = ?""", filas)
+        # Cambiaron filas ya cargadas: los agregados se vuelven a leer completos
+        with self._lock:
+            self._marco, self._ultimo_id = None, 0
+            self._revision += 1
+
+    def valores_filtro(self):
+        """Valores distintos de cada filtro (para los selectores del panel)."""
+        con = self._conexion()
+        return {columna: [f[0] for f in con.execute(
+                    f"SELECT DISTINCT {columna} FROM evaluaciones WHERE {columna} IS NOT NULL ORDER BY 1")]
+                for columna in ('sexo', 'categoria_bf', 'nivel_recuperacion')}
+
+    def _marco_agregados(self):
+        """
+        Columnas de filtro de todas las evaluaciones en un DataFrame. El registro
+        solo crece, así que en cada llamada se leen únicamente las filas nuevas.
+        """
+        import pandas as pd
+
+        con = self._conexion()
+        # Leer el último id, las filas nuevas y extender el marco es una sola
+        # operación: dos sesiones a la vez añadirían las mismas filas dos veces.
+        # Las filas se acotan a `ultimo` por si otra sesión registra entre ambas lecturas
+        with self._lock:
+            ultimo = con.execute("SELECT MAX(id) FROM evaluaciones").fetchone()[0] or 0
+            if self._marco is not None and ultimo == self._ultimo_id:
+                return self._marco
+            filas = con.execute(
+                f"SELECT {', '.join(_COLUMNAS_AGREGADOS)} FROM evaluaciones WHERE id > ? AND id <= ? ORDER BY id",
+                (self._ultimo_id, ultimo)).fetchall()
+            nuevas = pd.DataFrame.from_records([tuple(f) for f in filas], columns=list(_COLUMNAS_AGREGADOS))
+            marco = nuevas if self._marco is None else pd.concat([self._marco, nuevas], ignore_index=True)
+            for columna in ('psmf_aplicable', 'grasa_corregida', 'ir_se'):
+                marco[columna] = pd.to_numeric(marco[columna], errors='coerce')
+            for columna in ('sexo', 'categoria_bf', 'nivel_recuperacion'):
+                marco[columna] = marco[columna].astype('category')
+            self._marco, self._ultimo_id = marco, ultimo
+            return marco
+
+    def agregados(self, desde=None, hasta=None, **filtros):
+        """
+        Agregados para las gráficas del panel (filtros y group-by vectorizados).
+
+        Returns:
+            dict de DataFrames: 'por_dia', 'por_categoria', 'por_sexo' (n, grasa media,
+            % PSMF), 'por_recuperacion'; 'ir_se': Serie con el IR-SE de las
+            evaluaciones filtradas (población para percentiles)
+        """
+        df = self._marco_agregados()
+        mascara = df['fecha'].notna()
+        if desde:
+            mascara &= df['fecha'] >= str(desde)
+        if hasta:
+            mascara &= df['fecha'] <= str(hasta)
+        for columna in COLUMNAS_FILTRO:
+            valor = filtros.get(columna)
+            if valor is not None:
+                mascara &= df[columna] == (int(bool(valor)) if columna == 'psmf_aplicable' else valor)
+        df = df[mascara]
+
+        por_sexo = df.groupby('sexo', observed=True).agg(
+            evaluaciones=('fecha', 'size'),
+            grasa_media=('grasa_corregida', 'mean'),
+            pct_psmf=('psmf_aplicable', 'mean'),
+        )
+        por_sexo['grasa_media'] = por_sexo['grasa_media'].round(1)
+        por_sexo['pct_psmf'] = (por_sexo['pct_psmf'] * 100).round(1)
+        return {
+            'por_dia': df.groupby('fecha').size().rename('evaluaciones'),
+            'por_categoria': df.groupby('categoria_bf', observed=True).size().rename('evaluaciones'),
+            'por_sexo': por_sexo,
+            'por_recuperacion': df.groupby('nivel_recuperacion', observed=True).size().rename('evaluaciones'),
+            'ir_se': df['ir_se'].dropna(),
+        }
@@ -0,0 +1,189 @@
+"""
+Generación de Reportes por Lote - MUPAI
+
+Regenera los reportes de evaluación (mismo contenido que enviar_email_cliente
+y enviar_email_parte2) para muchos clientes a la vez, sin pasar por la app.
+
+- Entrada: evaluaciones guardadas (.jsonl, .json, .csv o .parquet), por ejemplo
+  la salida de `mupai.py evaluate`
+- Renderiza en un pool de procesos: cada proceso carga los logos una sola vez
+  (cargar_logos_email) y la hoja de estilos es una constante del módulo de
+  plantillas, así que el costo por reporte es solo el armado del contenido
+- Cada proceso escribe sus archivos directamente (no se envía el HTML de
+  vuelta al proceso principal)
+- Salida: .html o .eml por cliente y tipo de reporte, con progreso por callback
+"""
+
+import inspect
+import json
+import os
+import re
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+from plantillas_email import (
+    EMAIL_ADMINISTRACION,
+    cargar_logos_email,
+    construir_email_cliente,
+    construir_email_parte2,
+    construir_mensaje,
+)
+
+
+TIPOS_REPORTE = ('cliente', 'parte2')
+FORMATOS_SALIDA = ('html', 'eml')
+
+# Reportes por tarea enviada al pool (equilibrio entre reparto y overhead)
+REPORTES_POR_TAREA = 25
+
+# Campos que acepta cada constructor (el resto de la evaluación se ignora)
+_PARAMS_CLIENTE = set(inspect.signature(construir_email_cliente).parameters)
+_PARAMS_PARTE2 = set(inspect.signature(construir_email_parte2).parameters)
+
+
+# ==================== LECTURA ====================
+
+def leer_evaluaciones(ruta):
+    """
+    Lee evaluaciones guardadas como lista de dicts.
+
+    Formatos: .jsonl (una por línea), .json (lista u objeto), .csv, .parquet
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == '.jsonl':
+        with open(ruta, encoding='utf-8') as f:
+            return [json.loads(linea) for linea in f if linea.strip()]
+    if extension == '.json':
+        with open(ruta, encoding='utf-8') as f:
+            datos = json.load(f)
+        return datos if isinstance(datos, list) else [datos]
+    if extension == '.parquet':
+        df = pd.read_parquet(ruta)
+    else:
+        df = pd.read_csv(ruta)
+    # Celdas vacías → None (las plantillas tratan None como "no medido")
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def preparar_argumentos(evaluacion, tipo):
+    """
+    Convierte una evaluación guardada en los argumentos del constructor del
+    email. Acepta tanto la salida de evaluar_cliente() como filas de mupai.py.
+    """
+    datos = {k: v for k, v in evaluacion.items() if v is not None}
+    datos.setdefault('nombre_cliente', datos.get('nombre') or "Cliente")
+    datos.setdefault('fecha', datetime.now().strftime("%Y-%m-%d"))
+    if 'masa_grasa' not in datos and 'peso' in datos and 'mlg' in datos:
+        datos['masa_grasa'] = datos['peso'] - datos['mlg']
+    if 'imc' not in datos and datos.get('estatura'):
+        datos['imc'] = datos['peso'] / ((datos['estatura'] / 100) ** 2)
+    parametros = _PARAMS_CLIENTE if tipo == 'cliente' else _PARAMS_PARTE2
+    return {k: v for k, v in datos.items() if k in parametros}
+
+
+# ==================== RENDERIZADO ====================
+
+def _slug(texto):
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', '_', texto.lower()).strip('_') or 'cliente'
+
+
+def nombre_archivo_reporte(indice, evaluacion, tipo, formato):
+    nombre = evaluacion.get('nombre_cliente') or evaluacion.get('nombre') or ''
+    return f"{indice:05d}_{_slug(nombre)}_{tipo}.{formato}"
+
+
+def renderizar_reporte(evaluacion, tipo='cliente', formato='html'):
+    """
+    Construye un reporte.
+
+    Returns:
+        bytes: HTML en UTF-8 o el mensaje .eml completo
+    """
+    constructor = construir_email_cliente if tipo == 'cliente' else construir_email_parte2
+    asunto, contenido, contenido_html = constructor(**preparar_argumentos(evaluacion, tipo))
+    if formato == 'html':
+        return contenido_html.encode('utf-8')
+    destino = (evaluacion.get('email') or EMAIL_ADMINISTRACION) if tipo == 'cliente' else EMAIL_ADMINISTRACION
+    msg = construir_mensaje(asunto, contenido, contenido_html, destino)
+    return msg.as_bytes()
+
+
+def _inicializar_trabajador():
+    # Los logos se leen y codifican una sola vez por proceso
+    cargar_logos_email()
+
+
+def _renderizar_tarea(tarea, directorio, tipos, formato):
+    """Renderiza y escribe un grupo de reportes (se ejecuta en un proceso del pool)."""
+    escritos = []
+    errores = []
+    for indice, evaluacion in tarea:
+        for tipo in tipos:
+            archivo = nombre_archivo_reporte(indice, evaluacion, tipo, formato)
+            try:
+                contenido = renderizar_reporte(evaluacion, tipo, formato)
+            except Exception as e:
+                errores.append({'indice': indice, 'tipo': tipo, 'error': str(e)})
+                continue
+            with open(os.path.join(directorio, archivo), 'wb') as f:
+                f.write(contenido)
+            escritos.append(archivo)
+    return escritos, errores
+
+
+def generar_reportes_lote(evaluaciones, directorio, tipos=('cliente',), formato='html',
+                          workers=None, progreso=None):
+    """
+    Genera los reportes de todas las evaluaciones en paralelo.
+
+    Args:
+        evaluaciones: lista de dicts (ver preparar_argumentos)
+        directorio: carpeta de salida (se crea si no existe)
+        tipos: subconjunto de TIPOS_REPORTE
+        formato: 'html' o 'eml'
+        workers: procesos del pool (default: núcleos de CPU; 1 = sin pool)
+        progreso: callback opcional progreso(hechos, total) por tarea completada
+
+    Returns:
+        dict: {'archivos': [...], 'errores': [...], 'total': n}
+    """
+    tipos = tuple(tipos)
+    if not set(tipos) <= set(TIPOS_REPORTE):
+        raise ValueError(f"Tipos de reporte no válidos: {tipos}")
+    if formato not in FORMATOS_SALIDA:
+        raise ValueError(f"Formato no válido: {formato}")
+    os.makedirs(directorio, exist_ok=True)
+
+    indexadas = list(enumerate(evaluaciones, start=1))
+    tareas = [indexadas[i:i + REPORTES_POR_TAREA] for i in range(0, len(indexadas), REPORTES_POR_TAREA)]
+    total = len(indexadas)
+    archivos, errores = [], []
+    hechos = 0
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tareas) <= 1:
+        _inicializar_trabajador()
+        for tarea in tareas:
+            escritos, fallos = _renderizar_tarea(tarea, directorio, tipos, formato)
+            archivos += escritos
+            errores += fallos
+            hechos += len(tarea)
+            if progreso:
+                progreso(hechos, total)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_trabajador) as pool:
+            futuros = {pool.submit(_renderizar_tarea, tarea, directorio, tipos, formato): len(tarea)
+                       for tarea in tareas}
+            for futuro in as_completed(futuros):
+                escritos, fallos = futuro.result()
+                archivos += escritos
+                errores += fallos
+                hechos += futuros[futuro]
+                if progreso:
+                    progreso(hechos, total)
+
+    return {'archivos': sorted(archivos), 'errores': errores, 'total': total}
@@ -0,0 +1,154 @@
+"""
+Perfil de arranque en frío de streamlit_app.py
+
+Importa, en un intérprete nuevo, los módulos que el script de la app importa a
+nivel de módulo (las importaciones dentro de funciones o bloques se cargan
+solo cuando se usan) y reporta:
+
+- tiempo total de importación (ms, perf_counter)
+- módulos más costosos según `python -X importtime`
+- módulos pesados cargados al arranque (pandas, numpy, yaml, ...)
+
+Uso (desde la raíz del repo):
+    python scripts/perfil_arranque.py
+    python scripts/perfil_arranque.py --presupuesto-ms 150 --omitir streamlit
+
+Sale con código 1 si se excede el presupuesto o se carga un módulo pesado.
+
+Convención que mantiene el presupuesto: los módulos que la app importa al
+arrancar (motor_calculo.py y los que este importa, p. ej. ecuaciones_tmb.py,
+optimizador_macros.py, plausibilidad.py) no importan MODULOS_PESADOS a nivel
+de módulo, sino dentro de las funciones que los usan. Un módulo nuevo
+alcanzable desde el arranque sigue la misma regla; test_arranque.py la vigila.
+"""
+
+import argparse
+import ast
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_POR_DEFECTO = os.path.join(RAIZ_REPO, 'streamlit_app.py')
+
+# Módulos que no deben cargarse para dibujar el formulario
+MODULOS_PESADOS = ('pandas', 'numpy', 'yaml', 'scipy', 'pyarrow')
+
+# Presupuesto de importación de la app (sin contar el intérprete ni Streamlit)
+PRESUPUESTO_MS = 150
+
+
+def modulos_de_arranque(ruta_app=APP_POR_DEFECTO):
+    """Módulos importados a nivel de módulo por el script (en orden, sin duplicados)."""
+    with open(ruta_app, encoding='utf-8') as f:
+        arbol = ast.parse(f.read(), filename=ruta_app)
+    modulos = []
+    for nodo in arbol.body:
+        if isinstance(nodo, ast.Import):
+            nombres = [alias.name for alias in nodo.names]
+        elif isinstance(nodo, ast.ImportFrom) and nodo.level == 0:
+            nombres = [nodo.module]
+        else:
+            continue
+        for nombre in nombres:
+            if nombre not in modulos:
+                modulos.append(nombre)
+    return modulos
+
+
+def _codigo_medicion(modulos):
+    lineas = ["import time as _t", "_inicio = _t.perf_counter()"]
+    lineas += [f"import {m}" for m in modulos]
+    lineas += [
+        "_ms = (_t.perf_counter() - _inicio) * 1000",
+        "import json as _j, sys as _s",
+        f"print(_j.dumps({{'total_ms': _ms, 'pesados': [m for m in {MODULOS_PESADOS!r} if m in _s.modules]}}))",
+    ]
+    return "\n".join(lineas)
+
+
+def medir_arranque(ruta_app=APP_POR_DEFECTO, omitir=(), top=15):
+    """
+    Mide la importación de los módulos de arranque en un proceso nuevo.
+
+    Args:
+        ruta_app: script de la app
+        omitir: módulos a excluir (p.ej. 'streamlit' si no está instalado)
+        top: cantidad de módulos a listar por costo acumulado
+
+    Returns:
+        dict: {'modulos', 'omitidos', 'total_ms', 'pesados', 'mas_costosos': [(nombre, ms)]}
+    """
+    modulos, omitidos = [], []
+    directorio = os.path.dirname(os.path.abspath(ruta_app))
+    sys.path.insert(0, directorio)
+    try:
+        for modulo in modulos_de_arranque(ruta_app):
+            raiz = modulo.split('.')[0]
+            if raiz in omitir or importlib.util.find_spec(raiz) is None:
+                omitidos.append(modulo)
+            else:
+                modulos.append(modulo)
+    finally:
+        sys.path.remove(directorio)
+
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _codigo_medicion(modulos)],
+        cwd=directorio, capture_output=True, text=True, check=True,
+    )
+    resultado = json.loads(proceso.stdout.strip().splitlines()[-1])
+
+    # Líneas "import time: self [us] | cumulative | imported package"; nivel superior sin sangría
+    costos = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        _, acumulado, nombre = linea[len('import time:'):].split('|')
+        if not nombre.startswith('  '):
+            costos.append((nombre.strip(), int(acumulado) / 1000))
+    costos.sort(key=lambda x: -x[1])
+
+    return {
+        'modulos': modulos,
+        'omitidos': omitidos,
+        'total_ms': round(resultado['total_ms'], 1),
+        'pesados': resultado['pesados'],
+        'mas_costosos': [(n, round(ms, 1)) for n, ms in costos[:top]],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perfil de arranque en frío de la app")
+    parser.add_argument('--app', default=APP_POR_DEFECTO)
+    parser.add_argument('--presupuesto-ms', type=float, default=PRESUPUESTO_MS)
+    parser.add_argument('--omitir', nargs='*', default=['streamlit'],
+                        help="Módulos excluidos de la medición (default: streamlit)")
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args(argv)
+
+    perfil = medir_arranque(args.app, omitir=tuple(args.omitir), top=args.top)
+    print(f"Módulos de arranque: {', '.join(perfil['modulos'])}")
+    if perfil['omitidos']:
+        print(f"Omitidos: {', '.join(perfil['omitidos'])}")
+    print(f"\n{'Módulo':<40} {'ms':>8}")
+    for nombre, ms in perfil['mas_costosos']:
+        print(f"{nombre:<40} {ms:>8.1f}")
+    print(f"\nTotal importación: {perfil['total_ms']:.1f} ms (presupuesto {args.presupuesto_ms:.0f} ms)")
+
+    fallo = False
+    if perfil['pesados']:
+        print(f"✗ Módulos pesados cargados al arranque: {', '.join(perfil['pesados'])}")
+        fallo = True
+    if perfil['total_ms'] > args.presupuesto_ms:
+        print("✗ Presupuesto de arranque excedido")
+        fallo = True
+    if not fallo:
+        print("✓ Arranque dentro del presupuesto")
+    return 1 if fallo else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
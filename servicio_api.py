@@ -0,0 +1,389 @@
+"""
+Servicio API MUPAI - Evaluación REST/JSON sin interfaz
+
+Servicio ASGI ligero (sin framework) que expone el motor de cálculo de
+motor_calculo.py para gimnasios asociados y el kiosco del gimnasio.
+
+Endpoints (todos POST con cuerpo JSON):
+- /evaluate        Evaluación completa de un cliente (con "estrategia": "con_incertidumbre"
+                   agrega intervalos P10/P50/P90 por error de medición; con
+                   "macros_restringidas", macros con cierre calórico exacto)
+- /evaluate/batch  Lista de evaluaciones, repartida en un pool de procesos
+- /psmf            Parámetros PSMF (tiers, proteína, carb cap)
+- /macros          Macros del plan tradicional
+- /goal            Semanas y déficit para un "grasa_objetivo" o "peso_objetivo"
+                   (opcional "semanas_objetivo"); ver objetivo_inverso.py
+Además GET /health para verificaciones del balanceador.
+
+El motor es CPU puro (Monte-Carlo de con_incertidumbre, rejilla de /goal), así
+que todo cálculo corre en el pool de procesos y el event loop sólo atiende E/S.
+
+Validación equivalente al formulario: validate_name / validate_phone /
+validate_email para los datos personales y safe_float con los mismos rangos
+que los st.number_input de streamlit_app.py.
+
+Ejecución:
+    uvicorn servicio_api:app --workers 4
+
+El objeto `app` es un callable ASGI 3, por lo que se puede probar en proceso
+enviándole mensajes directamente (ver test_servicio_api.py).
+"""
+
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from motor_calculo import (
+    safe_float,
+    validate_name,
+    validate_phone,
+    validate_email,
+    corregir_porcentaje_grasa,
+    calcular_mlg,
+    calcular_tmb_cunningham,
+    calculate_psmf,
+    calcular_macros_tradicional,
+    evaluar_cliente,
+    AJUSTE_POR_RECUPERACION,
+    ETAPAS_POR_ESTRATEGIA,
+)
+from objetivo_inverso import SEMANAS_MAX, resolver_objetivo
+from potencial_muscular import GRILLA_MUNECA, GRILLA_TOBILLO
+
+
+# ==================== CONFIGURACIÓN ====================
+
+# Tamaño máximo del cuerpo de la solicitud (bytes)
+MAX_CUERPO_BYTES = 5 * 1024 * 1024
+
+# Máximo de evaluaciones por llamada a /evaluate/batch
+MAX_EVALUACIONES_LOTE = 5000
+
+# Por debajo de este tamaño el lote va entero a un solo proceso del pool
+# (repartirlo en porciones cuesta más que calcular)
+MIN_LOTE_PARA_REPARTIR = 64
+
+METODOS_GRASA = [
+    "Omron HBF-516 (BIA)",
+    "InBody 270 (BIA profesional)",
+    "Bod Pod (Pletismografía)",
+    "DEXA (Gold Standard)",
+]
+NIVELES_ACTIVIDAD = ["Sedentario", "Moderadamente-activo", "Activo", "Muy-activo"]
+NIVELES_ENTRENAMIENTO = ["principiante", "intermedio", "avanzado", "élite"]
+
+# Rangos válidos: (mínimo, máximo, obligatorio) - mismos que los st.number_input
+RANGOS_CAMPOS = {
+    'edad': (15, 80, True),
+    'peso': (30.0, 200.0, True),
+    'estatura': (120.0, 220.0, True),
+    'grasa_corporal': (3.0, 60.0, True),
+    'dias_fuerza': (0, 7, False),
+    'circunferencia_cintura': (0.0, 200.0, False),
+    'circunferencia_cuello': (0.0, 100.0, False),
+    'circunferencia_cadera': (0.0, 200.0, False),
+    # Estructura ósea para el potencial muscular: las mismas grillas de potencial_muscular.py
+    'circunferencia_muneca': (*GRILLA_MUNECA, False),
+    'circunferencia_tobillo': (*GRILLA_TOBILLO, False),
+    'ir_se': (0.0, 100.0, False),
+}
+
+# Metas de /goal: (mínimo, máximo)
+RANGOS_OBJETIVO = {
+    'grasa_objetivo': (3.0, 60.0),
+    'peso_objetivo': (30.0, 200.0),
+    'semanas_objetivo': (1, SEMANAS_MAX),
+}
+
+
+# ==================== VALIDACIÓN ====================
+
+def validar_datos_evaluacion(datos):
+    """
+    Valida y normaliza los datos de una evaluación.
+
+    Args:
+        datos: dict recibido en el cuerpo JSON
+
+    Returns:
+        (datos_limpios, errores): errores es una lista de {'campo', 'mensaje'}
+    """
+    if not isinstance(datos, dict):
+        return None, [{'campo': None, 'mensaje': "Se esperaba un objeto JSON"}]
+
+    errores = []
+    limpios = {}
+
+    # Datos personales opcionales: se validan solo si vienen
+    for campo, validador in (('nombre', validate_name), ('telefono', validate_phone),
+                             ('email', validate_email)):
+        if datos.get(campo) not in (None, ''):
+            valido, mensaje = validador(str(datos[campo]))
+            if valido:
+                limpios[campo] = str(datos[campo]).strip()
+            else:
+                errores.append({'campo': campo, 'mensaje': mensaje})
+
+    sexo = datos.get('sexo')
+    if sexo not in ("Hombre", "Mujer"):
+        errores.append({'campo': 'sexo', 'mensaje': "El sexo debe ser 'Hombre' o 'Mujer'"})
+    limpios['sexo'] = sexo
+
+    for campo, (minimo, maximo, obligatorio) in RANGOS_CAMPOS.items():
+        valor = datos.get(campo)
+        if valor in (None, ''):
+            if obligatorio:
+                errores.append({'campo': campo, 'mensaje': f"El campo {campo} es obligatorio"})
+            continue
+        # safe_float devuelve NaN como centinela para distinguir basura de 0.0
+        numero = safe_float(valor, float('nan'))
+        if numero != numero:
+            errores.append({'campo': campo, 'mensaje': f"El campo {campo} debe ser numérico"})
+        elif not minimo <= numero <= maximo:
+            errores.append({'campo': campo, 'mensaje': f"El campo {campo} debe estar entre {minimo} y {maximo}"})
+        else:
+            limpios[campo] = numero
+
+    for campo, opciones, defecto in (('metodo_grasa', METODOS_GRASA, METODOS_GRASA[0]),
+                                     ('nivel_actividad', NIVELES_ACTIVIDAD, NIVELES_ACTIVIDAD[0]),
+                                     ('nivel_entrenamiento', NIVELES_ENTRENAMIENTO, 'intermedio')):
+        valor = datos.get(campo) or defecto
+        if valor not in opciones:
+            errores.append({'campo': campo, 'mensaje': f"Valor no válido para {campo}: {valor}"})
+        limpios[campo] = valor
+
+    # Recuperación (cuestionario de sueño + estrés) y estrategia: opcionales
+    for campo, opciones in (('nivel_recuperacion', AJUSTE_POR_RECUPERACION),
+                            ('estrategia', ETAPAS_POR_ESTRATEGIA)):
+        valor = datos.get(campo)
+        if valor in (None, ''):
+            continue
+        if valor not in opciones:
+            errores.append({'campo': campo, 'mensaje': f"Valor no válido para {campo}: {valor}"})
+        limpios[campo] = valor
+
+    return limpios, errores
+
+
+# ==================== OPERACIONES ====================
+
+def _evaluar(datos):
+    limpios, errores = validar_datos_evaluacion(datos)
+    if errores:
+        return {'ok': False, 'errores': errores}
+    return {'ok': True, 'resultado': evaluar_cliente(limpios)}
+
+
+def _evaluar_lote(lote):
+    """Evalúa una porción del lote (se ejecuta dentro de un proceso del pool)."""
+    return [_evaluar(datos) for datos in lote]
+
+
+def _psmf(datos):
+    limpios, errores = validar_datos_evaluacion(datos)
+    if errores:
+        return {'ok': False, 'errores': errores}
+    grasa_corregida = corregir_porcentaje_grasa(limpios['grasa_corporal'], limpios['metodo_grasa'], limpios['sexo'])
+    mlg = calcular_mlg(limpios['peso'], grasa_corregida)
+    return {'ok': True, 'resultado': calculate_psmf(limpios['sexo'], limpios['peso'], grasa_corregida,
+                                                     mlg, limpios['estatura'])}
+
+
+def _macros(datos):
+    limpios, errores = validar_datos_evaluacion(datos)
+    ingesta = safe_float(datos.get('ingesta_kcal'), 0.0) if isinstance(datos, dict) else 0.0
+    if isinstance(datos, dict) and datos.get('ingesta_kcal') not in (None, '') and not 800 <= ingesta <= 8000:
+        errores.append({'campo': 'ingesta_kcal', 'mensaje': "El campo ingesta_kcal debe estar entre 800 y 8000"})
+    if errores:
+        return {'ok': False, 'errores': errores}
+    if ingesta <= 0:
+        # Sin ingesta explícita se usa la del flujo completo
+        evaluacion = evaluar_cliente(limpios)
+        return {'ok': True, 'resultado': evaluacion['macros'], 'ingesta_kcal': evaluacion['ingesta_calorica']}
+    grasa_corregida = corregir_porcentaje_grasa(limpios['grasa_corporal'], limpios['metodo_grasa'], limpios['sexo'])
+    mlg = calcular_mlg(limpios['peso'], grasa_corregida)
+    tmb = calcular_tmb_cunningham(mlg)
+    return {'ok': True,
+            'resultado': calcular_macros_tradicional(ingesta, tmb, limpios['sexo'], grasa_corregida,
+                                                     limpios['peso'], mlg),
+            'ingesta_kcal': ingesta}
+
+
+def _objetivo(datos):
+    limpios, errores = validar_datos_evaluacion(datos)
+    metas = {}
+    for campo, (minimo, maximo) in RANGOS_OBJETIVO.items():
+        valor = datos.get(campo) if isinstance(datos, dict) else None
+        if valor in (None, ''):
+            continue
+        numero = safe_float(valor, float('nan'))
+        if not minimo <= numero <= maximo:
+            errores.append({'campo': campo, 'mensaje': f"El campo {campo} debe estar entre {minimo} y {maximo}"})
+        else:
+            metas[campo] = numero
+    if isinstance(datos, dict) and ('grasa_objetivo' in metas) == ('peso_objetivo' in metas):
+        errores.append({'campo': 'grasa_objetivo', 'mensaje': "Indica exactamente uno: grasa_objetivo o peso_objetivo"})
+    if errores:
+        return {'ok': False, 'errores': errores}
+    evaluacion = evaluar_cliente(limpios)
+    return {'ok': True, 'resultado': resolver_objetivo(
+        limpios['peso'], evaluacion['grasa_corregida'], limpios['sexo'], evaluacion['gasto_energetico'],
+        estatura=limpios['estatura'], **metas)}
+
+
+# ==================== POOL DE PROCESOS ====================
+
+_pool = None
+
+
+def obtener_pool():
+    """Crea bajo demanda el pool de procesos compartido por todos los manejadores."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+    return _pool
+
+
+def cerrar_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+        _pool = None
+
+
+async def en_pool(funcion, *args):
+    """Ejecuta `funcion` en el pool sin bloquear el event loop."""
+    return await asyncio.get_running_loop().run_in_executor(obtener_pool(), funcion, *args)
+
+
+async def evaluar_lote_async(evaluaciones):
+    """
+    Evalúa un lote repartiéndolo en porciones entre los procesos del pool.
+    Los lotes pequeños van enteros a un solo proceso.
+    """
+    if len(evaluaciones) < MIN_LOTE_PARA_REPARTIR:
+        return await en_pool(_evaluar_lote, evaluaciones)
+
+    trabajadores = os.cpu_count() or 1
+    tam = -(-len(evaluaciones) // trabajadores)
+    porciones = [evaluaciones[i:i + tam] for i in range(0, len(evaluaciones), tam)]
+    resultados = await asyncio.gather(*(en_pool(_evaluar_lote, p) for p in porciones))
+    return [r for porcion in resultados for r in porcion]
+
+
+# ==================== MANEJADORES ====================
+
+async def manejar_evaluate(cuerpo):
+    resultado = await en_pool(_evaluar, cuerpo)
+    return (200 if resultado['ok'] else 422), resultado
+
+
+async def manejar_evaluate_batch(cuerpo):
+    evaluaciones = cuerpo.get('evaluaciones') if isinstance(cuerpo, dict) else None
+    if not isinstance(evaluaciones, list):
+        return 422, {'ok': False, 'errores': [{'campo': 'evaluaciones', 'mensaje': "Se esperaba una lista de evaluaciones"}]}
+    if len(evaluaciones) > MAX_EVALUACIONES_LOTE:
+        return 413, {'ok': False, 'errores': [{'campo': 'evaluaciones',
+                                              'mensaje': f"Máximo {MAX_EVALUACIONES_LOTE} evaluaciones por lote"}]}
+    resultados = await evaluar_lote_async(evaluaciones)
+    return 200, {'ok': True, 'total': len(resultados),
+                 'validos': sum(1 for r in resultados if r['ok']), 'resultados': resultados}
+
+
+async def manejar_psmf(cuerpo):
+    resultado = await en_pool(_psmf, cuerpo)
+    return (200 if resultado['ok'] else 422), resultado
+
+
+async def manejar_macros(cuerpo):
+    resultado = await en_pool(_macros, cuerpo)
+    return (200 if resultado['ok'] else 422), resultado
+
+
+async def manejar_goal(cuerpo):
+    resultado = await en_pool(_objetivo, cuerpo)
+    return (200 if resultado['ok'] else 422), resultado
+
+
+RUTAS = {
+    '/evaluate': manejar_evaluate,
+    '/evaluate/batch': manejar_evaluate_batch,
+    '/psmf': manejar_psmf,
+    '/macros': manejar_macros,
+    '/goal': manejar_goal,
+}
+
+
+# ==================== APLICACIÓN ASGI ====================
+
+async def _leer_cuerpo(receive):
+    partes = []
+    total = 0
+    while True:
+        mensaje = await receive()
+        fragmento = mensaje.get('body', b'')
+        total += len(fragmento)
+        if total > MAX_CUERPO_BYTES:
+            return None
+        partes.append(fragmento)
+        if not mensaje.get('more_body', False):
+            return b''.join(partes)
+
+
+async def _responder(send, estado, contenido):
+    cuerpo = json.dumps(contenido, ensure_ascii=False).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': estado,
+        'headers': [(b'content-type', b'application/json; charset=utf-8'),
+                    (b'content-length', str(len(cuerpo)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': cuerpo})
+
+
+async def app(scope, receive, send):
+    """Aplicación ASGI 3 del servicio de evaluación."""
+    if scope['type'] == 'lifespan':
+        while True:
+            mensaje = await receive()
+            if mensaje['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensaje['type'] == 'lifespan.shutdown':
+                cerrar_pool()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] != 'http':
+        return
+
+    ruta = scope['path'].rstrip('/') or '/'
+    metodo = scope['method']
+
+    if ruta == '/health':
+        await _responder(send, 200, {'ok': True})
+        return
+
+    manejador = RUTAS.get(ruta)
+    if manejador is None:
+        await _responder(send, 404, {'ok': False, 'error': f"Ruta no encontrada: {ruta}"})
+        return
+    if metodo != 'POST':
+        await _responder(send, 405, {'ok': False, 'error': "Método no permitido, usa POST"})
+        return
+
+    crudo = await _leer_cuerpo(receive)
+    if crudo is None:
+        await _responder(send, 413, {'ok': False, 'error': "Cuerpo de la solicitud demasiado grande"})
+        return
+    try:
+        cuerpo = json.loads(crudo or b'{}')
+    except (ValueError, UnicodeDecodeError):
+        await _responder(send, 400, {'ok': False, 'error': "JSON inválido"})
+        return
+
+    try:
+        estado, contenido = await manejador(cuerpo)
+    except Exception as e:
+        estado, contenido = 500, {'ok': False, 'error': f"Error interno: {str(e)}"}
+    await _responder(send, estado, contenido)
@@ -0,0 +1,464 @@
+"""
+Persistencia de Sesiones MUPAI - Almacén en servidor
+
+Guarda el estado del cuestionario fuera de la memoria del proceso para que una
+evaluación en curso sobreviva a una desconexión del websocket, a un reinicio
+del contenedor o a un cambio de réplica detrás del balanceador.
+
+- El estado se divide en secciones (SECCIONES_SESION) y cada checkpoint solo
+  escribe las secciones que cambiaron desde el anterior
+- Las fotos de progreso se guardan una vez por contenido (SHA-256) en disco y
+  el estado solo referencia el hash; al restaurar se leen bajo demanda
+  (FotoAlmacenada) en lugar de mantenerse en memoria
+- Memoria acotada: derramar_archivo() reemplaza el UploadedFile en el estado
+  por su referencia en disco, los archivos sin referencias vencen por TTL
+  (purgar_periodicamente) y medir_estado() contabiliza el tamaño de cada
+  sesión contra PRESUPUESTO_SESION_BYTES
+- El backend es intercambiable: crear_almacen(url) elige la clase registrada
+  para el esquema de la URL. Por defecto SQLite en disco (WAL), que pueden
+  compartir varias réplicas sobre el mismo volumen; para réplicas en distintos
+  hosts se registra otro backend con registrar_almacen()
+
+La sesión se identifica con un token aleatorio (p.ej. en la URL, ?sesion=...);
+quien tenga el token puede reanudar la evaluación, así que se trata como una
+cookie de sesión. Por eso el acceso (authenticated, access_stage, code_used)
+no se persiste: el token restaura las respuestas, pero el código de acceso
+de un solo uso se vuelve a canjear en cada sesión del navegador.
+
+Este módulo no depende de Streamlit.
+"""
+
+import hashlib
+import io
+import json
+import os
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, datetime
+
+
+# Claves de st.session_state persistidas, agrupadas por sección del cuestionario.
+# Solo datos: los widgets de archivo/botones no se pueden restaurar por clave.
+# El estado de autenticación no se guarda (ver arriba): una URL compartida no
+# salta el código de acceso.
+SECCIONES_SESION = {
+    'acceso': ('access_request_sent', 'access_user_name', 'access_user_email', 'access_user_whatsapp'),
+    'flujo': ('flow_phase', 'acepto_descargo', 'acepto_terminos', 'datos_completos', 'correo_enviado'),
+    'datos_personales': (
+        'nombre', 'telefono', 'email_cliente', 'edad', 'sexo', 'fecha_llenado',
+        'peso', 'estatura', 'grasa_corporal', 'metodo_grasa', 'masa_muscular', 'grasa_visceral',
+        'circunferencia_cintura', 'circunferencia_cuello', 'circunferencia_cadera',
+    ),
+    'experiencia': ('experiencia_seleccion', 'experiencia_respuestas', 'experiencia_completa'),
+    'ejercicios': ('datos_ejercicios', 'niveles_ejercicios'),
+    'actividad': ('nivel_actividad', 'actividad_diaria', 'frecuencia_entrenamiento',
+                  'dias_fuerza', 'minutos_por_sesion'),
+    'suenyo_estres': ('suenyo_estres_data', 'suenyo_estres_completado'),
+    'metas': (
+        'metas_personales', 'metas_personales_completado', 'metas_condiciones_medicas',
+        'metas_condiciones_otras', 'metas_lesiones', 'metas_lesiones_otras',
+        'metas_facilidad_muscular', 'metas_dificultad_muscular',
+        'metas_prioridades_muscular', 'metas_limitacion_muscular',
+    ),
+    'ciclo_menstrual': ('ciclo_menstrual', 'ciclo_menstrual_completado'),
+    'fotos': ('progress_photos',),
+}
+
+URL_POR_DEFECTO = 'sqlite:///.mupai_sesiones/sesiones.db'
+
+# Sesiones sin actividad por más de este tiempo se eliminan en purgar()
+TTL_SESION_DIAS = 14
+
+# Frecuencia de la purga de sesiones vencidas y archivos derramados sin referencias
+INTERVALO_PURGA_SEGUNDOS = 3600
+
+# Memoria objetivo por sesión; por encima se avisa (medir_estado)
+PRESUPUESTO_SESION_BYTES = 5 * 1024 * 1024
+
+# Clave interna en el estado para digests de secciones y hashes de fotos
+_CLAVE_CACHE = '_sesion_cache'
+
+
+def nuevo_id_sesion():
+    """Token aleatorio no adivinable para identificar (y reanudar) una sesión."""
+    return secrets.token_urlsafe(16)
+
+
+# ==================== FOTOS POR CONTENIDO ====================
+
+class FotoAlmacenada:
+    """
+    Foto restaurada desde el almacén, compatible con el uso que la app hace de
+    UploadedFile (name, type, size, seek, read, getvalue). El contenido se lee
+    del disco solo cuando se pide.
+
+    `restaurada` distingue una foto recuperada de una sesión anterior de una
+    derramada en esta sesión (la app solo conserva las primeras cuando el
+    uploader está vacío).
+    """
+
+    def __init__(self, almacen, hash_contenido, name, type, size, restaurada=False):
+        self.almacen = almacen
+        self.hash_contenido = hash_contenido
+        self.name = name
+        self.type = type
+        self.size = size
+        self.restaurada = restaurada
+        self._posicion = 0
+
+    def getvalue(self):
+        return self.almacen.leer_foto(self.hash_contenido)
+
+    def seek(self, posicion, desde=0):
+        self._posicion = posicion if desde == 0 else (self._posicion + posicion if desde == 1 else self.size + posicion)
+        return self._posicion
+
+    def read(self, n=-1):
+        datos = self.getvalue()
+        fin = len(datos) if n is None or n < 0 else self._posicion + n
+        parte = datos[self._posicion:fin]
+        self._posicion += len(parte)
+        return parte
+
+    def __repr__(self):
+        return f"FotoAlmacenada({self.name!r}, {self.hash_contenido[:12]})"
+
+
+# ==================== ALMACENES ====================
+
+class AlmacenSesion:
+    """
+    Interfaz de un backend de sesiones.
+
+    Secciones: JSON por (id_sesion, seccion). Fotos: bytes por hash de contenido.
+    """
+
+    def guardar_secciones(self, id_sesion, secciones):
+        """Escribe {seccion: datos_json_str} de una sesión (upsert)."""
+        raise NotImplementedError
+
+    def cargar_secciones(self, id_sesion):
+        """Returns: {seccion: datos_json_str} ({} si la sesión no existe)."""
+        raise NotImplementedError
+
+    def eliminar_sesion(self, id_sesion):
+        raise NotImplementedError
+
+    def guardar_foto(self, contenido):
+        """Guarda bytes por contenido. Returns: hash SHA-256 (hex)."""
+        raise NotImplementedError
+
+    def leer_foto(self, hash_contenido):
+        raise NotImplementedError
+
+    def purgar(self, ttl_dias=TTL_SESION_DIAS):
+        """Elimina sesiones inactivas y fotos sin referencias. Returns: sesiones eliminadas."""
+        raise NotImplementedError
+
+
+class AlmacenSQLite(AlmacenSesion):
+    """
+    SQLite (modo WAL) para secciones y archivos por hash para fotos.
+
+    Varias réplicas pueden compartir la base si están en el mismo host o
+    volumen local (WAL no es seguro sobre sistemas de archivos de red).
+    """
+
+    def __init__(self, ruta_db, directorio_fotos=None):
+        self.ruta_db = ruta_db
+        directorio = os.path.dirname(os.path.abspath(ruta_db))
+        self.directorio_fotos = directorio_fotos or os.path.join(directorio, 'fotos')
+        os.makedirs(directorio, exist_ok=True)
+        os.makedirs(self.directorio_fotos, exist_ok=True)
+        self._local = threading.local()
+        with self._conexion() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS secciones (
+                    id_sesion TEXT NOT NULL,
+                    seccion TEXT NOT NULL,
+                    datos TEXT NOT NULL,
+                    actualizado REAL NOT NULL,
+                    PRIMARY KEY (id_sesion, seccion)
+                )
+            """)
+            con.execute("CREATE INDEX IF NOT EXISTS idx_secciones_actualizado ON secciones(actualizado)")
+
+    def _conexion(self):
+        # Una conexión por hilo (cada sesión de Streamlit corre en su hilo)
+        con = getattr(self._local, 'conexion', None)
+        if con is None:
+            con = sqlite3.connect(self.ruta_db, timeout=10)
+            con.execute("PRAGMA busy_timeout=10000")
+            self._local.conexion = con
+        return con
+
+    def guardar_secciones(self, id_sesion, secciones):
+        if not secciones:
+            return
+        ahora = time.time()
+        with self._conexion() as con:
+            con.executemany(
+                "INSERT INTO secciones (id_sesion, seccion, datos, actualizado) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id_sesion, seccion) DO UPDATE SET datos=excluded.datos, actualizado=excluded.actualizado",
+                [(id_sesion, seccion, datos, ahora) for seccion, datos in secciones.items()],
+            )
+
+    def cargar_secciones(self, id_sesion):
+        filas = self._conexion().execute(
+            "SELECT seccion, datos FROM secciones WHERE id_sesion = ?", (id_sesion,)
+        ).fetchall()
+        return dict(filas)
+
+    def eliminar_sesion(self, id_sesion):
+        with self._conexion() as con:
+            con.execute("DELETE FROM secciones WHERE id_sesion = ?", (id_sesion,))
+
+    def _ruta_foto(self, hash_contenido):
+        return os.path.join(self.directorio_fotos, hash_contenido[:2], hash_contenido)
+
+    def guardar_foto(self, contenido):
+        hash_contenido = hashlib.sha256(contenido).hexdigest()
+        ruta = self._ruta_foto(hash_contenido)
+        if not os.path.exists(ruta):
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            temporal = f"{ruta}.{secrets.token_hex(4)}.tmp"
+            with open(temporal, 'wb') as f:
+                f.write(contenido)
+            os.replace(temporal, ruta)
+        return hash_contenido
+
+    def leer_foto(self, hash_contenido):
+        with open(self._ruta_foto(hash_contenido), 'rb') as f:
+            return f.read()
+
+    def purgar(self, ttl_dias=TTL_SESION_DIAS):
+        limite = time.time() - ttl_dias * 86400
+        with self._conexion() as con:
+            vencidas = [f[0] for f in con.execute(
+                "SELECT id_sesion FROM secciones GROUP BY id_sesion HAVING MAX(actualizado) < ?", (limite,))]
+            con.executemany("DELETE FROM secciones WHERE id_sesion = ?", [(s,) for s in vencidas])
+            referenciadas = set()
+            for (datos,) in con.execute("SELECT datos FROM secciones WHERE seccion = 'fotos'"):
+                referenciadas.update(_hashes_de_fotos(json.loads(datos)))
+        for subdirectorio in os.listdir(self.directorio_fotos):
+            ruta_sub = os.path.join(self.directorio_fotos, subdirectorio)
+            for nombre in os.listdir(ruta_sub):
+                ruta = os.path.join(ruta_sub, nombre)
+                # Los archivos recién escritos pueden pertenecer a un checkpoint en curso
+                if nombre not in referenciadas and os.path.getmtime(ruta) < limite:
+                    os.remove(ruta)
+        return len(vencidas)
+
+
+_ALMACENES = {'sqlite': AlmacenSQLite}
+
+
+def registrar_almacen(esquema, clase):
+    """Registra un backend para URLs '<esquema>://...'. La clase recibe la URL sin esquema."""
+    _ALMACENES[esquema] = clase
+
+
+def crear_almacen(url=None):
+    """
+    Crea el almacén configurado.
+
+    Args:
+        url: 'sqlite:///ruta/sesiones.db' (default URL_POR_DEFECTO) u otro esquema registrado
+    """
+    url = url or URL_POR_DEFECTO
+    esquema, separador, resto = url.partition('://')
+    if not separador or esquema not in _ALMACENES:
+        raise ValueError(f"Almacén de sesiones no soportado: {url}")
+    if esquema == 'sqlite':
+        # sqlite:///relativa.db o sqlite:////absoluta.db
+        return AlmacenSQLite(resto[1:] if resto.startswith('/') else resto)
+    return _ALMACENES[esquema](resto)
+
+
+# ==================== SERIALIZACIÓN DEL ESTADO ====================
+
+def _hashes_de_fotos(valor):
+    if isinstance(valor, dict):
+        if '__foto__' in valor:
+            return {valor['__foto__']}
+        return set().union(*(_hashes_de_fotos(v) for v in valor.values())) if valor else set()
+    return set()
+
+
+def _es_archivo(valor):
+    return hasattr(valor, 'getvalue') and hasattr(valor, 'name')
+
+
+def _a_json(valor, almacen, cache_fotos):
+    if isinstance(valor, (str, int, float, bool)) or valor is None:
+        return valor
+    if isinstance(valor, dict):
+        return {str(k): _a_json(v, almacen, cache_fotos) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_a_json(v, almacen, cache_fotos) for v in valor]
+    if isinstance(valor, datetime):
+        return {'__datetime__': valor.isoformat()}
+    if isinstance(valor, date):
+        return {'__date__': valor.isoformat()}
+    if isinstance(valor, FotoAlmacenada):
+        return {'__foto__': valor.hash_contenido, 'name': valor.name, 'type': valor.type, 'size': valor.size}
+    if _es_archivo(valor):
+        return _a_json(_derramar(almacen, valor, cache_fotos), almacen, cache_fotos)
+    raise TypeError(f"Valor no serializable: {type(valor).__name__}")
+
+
+def _desde_json(valor, almacen):
+    if isinstance(valor, list):
+        return [_desde_json(v, almacen) for v in valor]
+    if isinstance(valor, dict):
+        if '__foto__' in valor:
+            return FotoAlmacenada(almacen, valor['__foto__'], valor.get('name'), valor.get('type'),
+                                  valor.get('size'), restaurada=True)
+        if '__datetime__' in valor:
+            return datetime.fromisoformat(valor['__datetime__'])
+        if '__date__' in valor:
+            return date.fromisoformat(valor['__date__'])
+        return {k: _desde_json(v, almacen) for k, v in valor.items()}
+    return valor
+
+
+def _derramar(almacen, archivo, cache_fotos):
+    # El archivo se hashea y escribe una sola vez por archivo subido
+    clave = (getattr(archivo, 'file_id', None) or id(archivo), archivo.name, getattr(archivo, 'size', None))
+    if clave not in cache_fotos:
+        cache_fotos[clave] = almacen.guardar_foto(archivo.getvalue())
+    return FotoAlmacenada(almacen, cache_fotos[clave], archivo.name,
+                          getattr(archivo, 'type', None), getattr(archivo, 'size', None))
+
+
+def _cache_estado(estado):
+    cache = estado.get(_CLAVE_CACHE)
+    if cache is None:
+        cache = {'digests': {}, 'fotos': {}}
+        estado[_CLAVE_CACHE] = cache
+    return cache
+
+
+def derramar_archivo(almacen, archivo, estado):
+    """
+    Mueve un archivo subido a disco y devuelve su referencia (FotoAlmacenada)
+    para guardarla en el estado en lugar del UploadedFile.
+
+    Args:
+        almacen: AlmacenSesion
+        archivo: UploadedFile (o cualquier objeto con name/getvalue)
+        estado: mapping tipo st.session_state (memoriza el hash por archivo)
+    """
+    return _derramar(almacen, archivo, _cache_estado(estado)['fotos'])
+
+
+def guardar_estado(almacen, id_sesion, estado, secciones=SECCIONES_SESION):
+    """
+    Checkpoint incremental: escribe solo las secciones que cambiaron.
+
+    Args:
+        almacen: AlmacenSesion
+        id_sesion: token de la sesión
+        estado: mapping tipo st.session_state (guarda su caché interna en él)
+        secciones: {seccion: claves}
+
+    Returns:
+        list: secciones escritas
+    """
+    cache = _cache_estado(estado)
+
+    cambios = {}
+    for seccion, claves in secciones.items():
+        datos = {}
+        for clave in claves:
+            if clave not in estado:
+                continue
+            try:
+                datos[clave] = _a_json(estado[clave], almacen, cache['fotos'])
+            except TypeError:
+                # Valores no serializables (objetos de widgets, etc.) no se persisten
+                continue
+        texto = json.dumps(datos, ensure_ascii=False, sort_keys=True)
+        digest = hashlib.blake2b(texto.encode('utf-8'), digest_size=16).hexdigest()
+        if cache['digests'].get(seccion) != digest:
+            cambios[seccion] = texto
+            cache['digests'][seccion] = digest
+
+    almacen.guardar_secciones(id_sesion, cambios)
+    return sorted(cambios)
+
+
+def restaurar_estado(almacen, id_sesion, estado):
+    """
+    Carga en `estado` las claves guardadas de la sesión.
+
+    Returns:
+        list: secciones restauradas ([] si la sesión no existe)
+    """
+    guardadas = almacen.cargar_secciones(id_sesion)
+    cache = {'digests': {}, 'fotos': {}}
+    for seccion, texto in guardadas.items():
+        for clave, valor in json.loads(texto).items():
+            estado[clave] = _desde_json(valor, almacen)
+        cache['digests'][seccion] = hashlib.blake2b(texto.encode('utf-8'), digest_size=16).hexdigest()
+    estado[_CLAVE_CACHE] = cache
+    return sorted(guardadas)
+
+
+# ==================== MEMORIA POR SESIÓN ====================
+
+def tamano_profundo(valor, _vistos=None):
+    """Bytes aproximados de un valor, recorriendo contenedores y archivos en memoria."""
+    vistos = _vistos if _vistos is not None else set()
+    if id(valor) in vistos:
+        return 0
+    vistos.add(id(valor))
+    if isinstance(valor, FotoAlmacenada):
+        return sys.getsizeof(valor)
+    if isinstance(valor, io.BytesIO):
+        # UploadedFile es un BytesIO: getsizeof ya incluye el buffer
+        return sys.getsizeof(valor)
+    tamano = sys.getsizeof(valor)
+    if isinstance(valor, dict):
+        tamano += sum(tamano_profundo(k, vistos) + tamano_profundo(v, vistos) for k, v in valor.items())
+    elif isinstance(valor, (list, tuple, set, frozenset)) or type(valor).__name__ == 'deque':
+        tamano += sum(tamano_profundo(v, vistos) for v in valor)
+    elif hasattr(valor, '__dict__') and not isinstance(valor, type):
+        tamano += tamano_profundo(vars(valor), vistos)
+    return tamano
+
+
+def medir_estado(estado, presupuesto=PRESUPUESTO_SESION_BYTES):
+    """
+    Contabiliza la memoria de una sesión.
+
+    Returns:
+        dict: {'total': bytes, 'por_clave': [(clave, bytes)] de mayor a menor,
+               'excedido': bool}
+    """
+    vistos = set()
+    por_clave = [(str(clave), tamano_profundo(valor, vistos)) for clave, valor in estado.items()]
+    por_clave.sort(key=lambda x: -x[1])
+    total = sum(b for _, b in por_clave)
+    return {'total': total, 'por_clave': por_clave, 'excedido': total > presupuesto}
+
+
+_ultima_purga = {}
+
+
+def purgar_periodicamente(almacen, intervalo=INTERVALO_PURGA_SEGUNDOS, ttl_dias=TTL_SESION_DIAS):
+    """
+    Ejecuta almacen.purgar() como máximo una vez por intervalo en este proceso.
+
+    Returns:
+        int de sesiones eliminadas, o None si aún no correspondía
+    """
+    ahora = time.monotonic()
+    if ahora - _ultima_purga.get(id(almacen), float('-inf')) < intervalo:
+        return None
+    _ultima_purga[id(almacen)] = ahora
+    return almacen.purgar(ttl_dias)
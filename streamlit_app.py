@@ -1,6 +1,4 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 from datetime import datetime
 import smtplib
 from email.mime.text import MIMEText
@@ -9,123 +7,42 @@ from email.mime.base import MIMEBase
 from email.mime.image import MIMEImage
 from email import encoders
 import time
-import re
-import random
-import string
-from typing import Dict, Tuple, List, Optional
+# pandas/numpy (y proyeccion_semanal, que usa numpy) se importan en los puntos de uso:
+# el arranque en frío solo carga lo necesario para dibujar el formulario.
+# Ver scripts/perfil_arranque.py
+from plantillas_email import cargar_logos_email, construir_email_cliente, construir_email_parte2, construir_mensaje
+from trazas import activar_registro, obtener_registro, span, trazar
+from codigos_acceso import MENSAJES_CANJE, RUTA_POR_DEFECTO as RUTA_CODIGOS_ACCESO, TTL_CODIGO_HORAS, ServicioCodigos
+from registro_evaluaciones import RUTA_POR_DEFECTO as RUTA_EVALUACIONES, RegistroEvaluaciones
+from esquema_cuestionario import cargar_esquema
+from progreso_cuestionario import SeguimientoCompletitud
+from puntuacion_suenyo_estres import puntuar_suenyo_estres
+from motor_calculo import (
+    calcular_bf_operacional, calcular_fmi, calcular_macros_psmf, calcular_macros_tradicional,
+    calcular_proyeccion_cientifica, calculate_psmf, clasificar_bf, corregir_porcentaje_grasa,
+    determinar_fase_nutricional_refinada, esta_en_rango_saludable, etapa_recuperacion, obtener_geaf,
+    obtener_modo_interpretacion_ffmi, obtener_nombre_cliente, obtener_porcentaje_para_proyeccion,
+    propagar_incertidumbre, safe_float, safe_int, validate_email, validate_name, validate_phone,
+)
+from grafo_calculo import grafo_evaluacion
+from ecuaciones_tmb import tmb_ensamble
+from plausibilidad import registrar_con_cuarentena
+from calibracion_musculo import CalibracionMusculo
+from potencial_muscular import potencial_muscular
+from sesiones import (
+    FotoAlmacenada, PRESUPUESTO_SESION_BYTES, crear_almacen, derramar_archivo, guardar_estado,
+    medir_estado, nuevo_id_sesion, purgar_periodicamente, restaurar_estado,
+)
+import os
+
+# Esquema del cuestionario (cuestionario.json): opciones, puntos y requisitos, compilado una vez por proceso
+cuestionario = cargar_esquema()
 
 # Nota: REMOVIDAS importaciones de nueva_logica_macros e integracion_nueva_logica
 # Usando lógica tradicional: calcular_macros_tradicional()
 NUEVA_LOGICA_DISPONIBLE = False
 
 
-# ============================================================================
-# FUNCIONES AUXILIARES PARA BF Y CATEGORIZACIÓN (de nueva_logica_macros.py)
-# ============================================================================
-
-def calcular_bf_operacional(
-    bf_corr_pct: Optional[float] = None,
-    bf_measured_pct: Optional[float] = None
-) -> Tuple[float, str]:
-    """
-    Calcula el BF operacional para todos los cálculos posteriores.
-    
-    Args:
-        bf_corr_pct: BF corregido (ej: ajustado a DEXA)
-        bf_measured_pct: BF medido directo
-        
-    Returns:
-        (bf_operational, confiabilidad)
-    """
-    if bf_corr_pct is not None:
-        return float(bf_corr_pct), "alta"
-    elif bf_measured_pct is not None:
-        return float(bf_measured_pct), "media"
-    else:
-        raise ValueError("Se requiere al menos un valor de BF")
-
-
-def clasificar_bf(bf_operational: float, sexo: str) -> str:
-    """
-    Clasifica el BF en una de 5 categorías según sexo.
-    """
-    if sexo.lower() in ["hombre", "masculino", "male", "m"]:
-        if bf_operational <= 8:
-            return "preparacion"
-        elif bf_operational <= 15:
-            return "zona_triple"
-        elif bf_operational <= 21:
-            return "promedio"
-        elif bf_operational < 26:
-            return "sobrepeso"
-        else:
-            return "obesidad"
-    else:  # Mujer
-        if bf_operational <= 14:
-            return "preparacion"
-        elif bf_operational <= 24:
-            return "zona_triple"
-        elif bf_operational <= 33:
-            return "promedio"
-        elif bf_operational < 39:
-            return "sobrepeso"
-        else:
-            return "obesidad"
-
-
-def obtener_nombre_cliente(categoria_interna: str, sexo: str = "Hombre") -> Dict[str, str]:
-    """
-    Convierte categoría interna a nombres amigables para cliente.
-    """
-    nombres = {
-        "preparacion": {
-            "nombre_corto": "Muy Definido",
-            "nombre_completo": "Muy Definido / Nivel de Fisicoculturismo",
-            "icono": "🏆",
-            "descripcion_h": "Estás en nivel de competencia o fisicoculturismo.",
-            "descripcion_m": "Estás en nivel de competencia."
-        },
-        "zona_triple": {
-            "nombre_corto": "Atlético",
-            "nombre_completo": "Atlético",
-            "icono": "🎯",
-            "descripcion_h": "Tu composición corporal es atlética y óptima para rendimiento.",
-            "descripcion_m": "Tu composición corporal es atlética y óptima para rendimiento."
-        },
-        "promedio": {
-            "nombre_corto": "Saludable",
-            "nombre_completo": "Saludable",
-            "icono": "💪",
-            "descripcion_h": "Estás en un rango saludable con oportunidad de mejorar tu definición muscular.",
-            "descripcion_m": "Estás en un rango saludable con oportunidad de mejorar tu composición corporal."
-        },
-        "sobrepeso": {
-            "nombre_corto": "Sobrepeso",
-            "nombre_completo": "Sobrepeso",
-            "icono": "⚠️",
-            "descripcion_h": "Reducir grasa corporal mejorará significativamente tu salud.",
-            "descripcion_m": "Reducir grasa corporal mejorará significativamente tu salud."
-        },
-        "obesidad": {
-            "nombre_corto": "Obesidad",
-            "nombre_completo": "Obesidad",
-            "icono": "🚨",
-            "descripcion_h": "Tu salud se beneficiará de una reducción supervisada.",
-            "descripcion_m": "Tu salud se beneficiará de una reducción supervisada."
-        }
-    }
-    
-    info = nombres.get(categoria_interna, nombres["promedio"])
-    sexo_key = "descripcion_h" if sexo.lower() in ["hombre", "masculino", "male", "m"] else "descripcion_m"
-    
-    return {
-        "nombre_corto": info["nombre_corto"],
-        "nombre_completo": info["nombre_completo"],
-        "icono": info["icono"],
-        "descripcion": info[sexo_key]
-    }
-
-
 # ==================== CONSTANTES ====================
 
 # Global flag to control visibility of technical details in UI
@@ -155,132 +72,33 @@ EMAIL_ATTACHMENT_SIZE_LIMIT_MB = 15
 REQUIRED_PROGRESS_PHOTOS = ["front_relaxed", "side_relaxed_right", "back_relaxed"]
 OPTIONAL_PROGRESS_PHOTOS = ["pose_libre"]
 
-# Tabla de conversión Omron HBF-516 a modelo 4C (Siedler & Tinsley 2022)
-# Formula: gc_4c = 1.226167 + 0.838294 * gc_omron
-OMRON_HBF516_TO_4C = {
-    4: 4.6,
-    5: 5.4,
-    6: 6.3,
-    7: 7.1,
-    8: 7.9,
-    9: 8.8,
-    10: 9.6,
-    11: 10.4,
-    12: 11.3,
-    13: 12.1,
-    14: 13.0,
-    15: 13.8,
-    16: 14.6,
-    17: 15.5,
-    18: 16.3,
-    19: 17.2,
-    20: 18.0,
-    21: 18.8,
-    22: 19.7,
-    23: 20.5,
-    24: 21.3,
-    25: 22.2,
-    26: 23.0,
-    27: 23.9,
-    28: 24.7,
-    29: 25.5,
-    30: 26.4,
-    31: 27.2,
-    32: 28.1,
-    33: 28.9,
-    34: 29.7,
-    35: 30.6,
-    36: 31.4,
-    37: 32.2,
-    38: 33.1,
-    39: 33.9,
-    40: 34.8,
-    41: 35.6,
-    42: 36.4,
-    43: 37.3,
-    44: 38.1,
-    45: 38.9,
-    46: 39.8,
-    47: 40.6,
-    48: 41.5,
-    49: 42.3,
-    50: 43.1,
-    51: 44.0,
-    52: 44.8,
-    53: 45.7,
-    54: 46.5,
-    55: 47.3,
-    56: 48.2,
-    57: 49.0,
-    58: 49.8,
-    59: 50.7,
-    60: 51.5,
-}
-
-# ==================== FUNCIONES DE VALIDACIÓN ESTRICTA ====================
-def validate_name(name):
-    """
-    Valida que el nombre tenga al menos dos palabras.
-    Retorna (es_válido, mensaje_error)
-    """
-    if not name or not name.strip():
-        return False, "El nombre es obligatorio"
-    
-    # Limpiar espacios extra y dividir en palabras
-    words = name.strip().split()
-    
-    if len(words) < 2:
-        return False, "El nombre debe contener al menos dos palabras (nombre y apellido)"
-    
-    # Verificar que cada palabra tenga al menos 2 caracteres y solo contenga letras y espacios
-    for word in words:
-        if len(word) < 2:
-            return False, "Cada palabra del nombre debe tener al menos 2 caracteres"
-        if not re.match(r'^[a-zA-ZáéíóúÁÉÍÓÚüÜñÑ]+$', word):
-            return False, "El nombre solo puede contener letras y espacios"
-    
-    return True, ""
 
-def validate_phone(phone):
-    """
-    Valida que el teléfono tenga exactamente 10 dígitos.
-    Retorna (es_válido, mensaje_error)
+# ==================== FUNCIONES DEL SISTEMA DE ACCESO POR CÓDIGO ====================
+@st.cache_resource
+def obtener_servicio_codigos():
+    """Servicio de códigos compartido por todas las sesiones (y réplicas sobre el mismo volumen)."""
+    return ServicioCodigos(os.environ.get("MUPAI_CODIGOS_DB", RUTA_CODIGOS_ACCESO))
+
+@st.cache_resource
+def obtener_registro_evaluaciones():
+    """Registro de evaluaciones enviadas, consultado desde el panel de administración (pages/admin.py)."""
+    return RegistroEvaluaciones(os.environ.get("MUPAI_EVALUACIONES_DB", RUTA_EVALUACIONES))
+
+@st.cache_resource
+def obtener_calibracion_musculo():
+    """Calibración de masa muscular por dispositivo; activa en el motor los modelos ya aptos."""
+    calibracion = CalibracionMusculo(os.environ.get("MUPAI_EVALUACIONES_DB", RUTA_EVALUACIONES))
+    calibracion.activar_en_motor()
+    return calibracion
+
+def generate_access_code(user_name, user_email, user_whatsapp):
     """
-    if not phone or not phone.strip():
-        return False, "El teléfono es obligatorio"
-    
-    # Limpiar espacios y caracteres especiales
-    clean_phone = re.sub(r'[^0-9]', '', phone.strip())
-    
-    if len(clean_phone) != 10:
-        return False, "El teléfono debe tener exactamente 10 dígitos"
-    
-    # Verificar que todos sean dígitos
-    if not clean_phone.isdigit():
-        return False, "El teléfono solo puede contener números"
-    
-    return True, ""
+    Emite un código único de 6 caracteres alfanuméricos (un solo uso, con vencimiento).
 
-def validate_email(email):
-    """
-    Valida que el email tenga formato estándar.
-    Retorna (es_válido, mensaje_error)
+    Returns:
+        tuple: (codigo, error) - error es None si se emitió
     """
-    if not email or not email.strip():
-        return False, "El email es obligatorio"
-    
-    # Patrón regex para email estándar
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    
-    if not re.match(email_pattern, email.strip()):
-        return False, "El email debe tener un formato válido (ejemplo: usuario@dominio.com)"
-    
-    return True, ""
-
-# ==================== FUNCIONES DEL SISTEMA DE ACCESO POR CÓDIGO ====================
-def generate_access_code():
-    """Genera un código único de 6 caracteres alfanuméricos."""
-    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+    return obtener_servicio_codigos().emitir(user_name, user_email, user_whatsapp)
 
 def send_access_code_email(user_name, user_email, user_whatsapp, access_code):
     """
@@ -317,7 +135,7 @@ DATOS DEL SOLICITANTE:
 
 CÓDIGO DE ACCESO GENERADO: {access_code}
 
-Este código es válido para un solo uso. El usuario debe usar este código para acceder al sistema.
+Este código es válido para un solo uso y vence en {TTL_CODIGO_HORAS} horas. El usuario debe usar este código para acceder al sistema.
 
 ---
 Sistema MUPAI - Muscle Up GYM
@@ -341,9 +159,16 @@ Evaluación Fitness Personalizada
     except Exception as e:
         return False, f"Error al enviar email: {str(e)}"
 
-def verify_access_code(entered_code, stored_code):
-    """Verifica si el código ingresado coincide con el almacenado."""
-    return entered_code.upper().strip() == stored_code.upper().strip()
+def verify_access_code(entered_code, user_email):
+    """
+    Canjea el código ingresado para el email solicitante. El canje es atómico
+    en el servicio, así que el código no se puede reutilizar desde otra sesión.
+
+    Returns:
+        tuple: (valido, mensaje)
+    """
+    valido, motivo = obtener_servicio_codigos().canjear(entered_code, user_email)
+    return valido, MENSAJES_CANJE[motivo]
 
 # ==================== FLOW STATE MANAGEMENT & CONDITIONAL RENDERING ====================
 def get_flow_phase():
@@ -573,7 +398,17 @@ def limpiar_session_state_corrupto():
 # Ejecutar limpieza al inicio
 limpiar_session_state_corrupto()
 
-st.markdown("""
+# Modelos de masa muscular ya aptos activos en el motor desde el arranque (una vez por proceso)
+obtener_calibracion_musculo()
+
+# ==================== TRAZAS DE LATENCIA POR FASE ====================
+# Un registro por sesión; cada rerun ejecuta el script completo y abre un rerun nuevo
+registro_trazas = obtener_registro(st.session_state)
+activar_registro(registro_trazas)
+registro_trazas.nuevo_rerun()
+
+with span("ui.css"):
+    st.markdown("""
 <style>
 /* ========== TEMPORALMENTE VISIBLE - PERMITIR CLEAR CACHE ========== */
 /* NOTA: Comentado temporalmente para permitir a usuarios limpiar cache corrupto */
@@ -1608,7 +1443,6 @@ a:contains("Fork") {display: none !important;}
 </style>
 """, unsafe_allow_html=True)
 # Header principal visual con logos
-import base64
 
 # JavaScript para auto-scroll y manejo de navegación
 navigation_js = """
@@ -1714,18 +1548,8 @@ window.addEventListener('load', hideGitHubElements);
 
 st.markdown(github_hide_js, unsafe_allow_html=True)
 
-# Cargar y codificar los logos desde la raíz del repo
-try:
-    with open('LOGO MUPAI.png', 'rb') as f:
-        logo_mupai_b64 = base64.b64encode(f.read()).decode()
-except FileNotFoundError:
-    logo_mupai_b64 = ""
-
-try:
-    with open('LOGO MUP.png', 'rb') as f:
-        logo_gym_b64 = base64.b64encode(f.read()).decode()
-except FileNotFoundError:
-    logo_gym_b64 = ""
+# Logos en base64 (se leen y codifican una sola vez por proceso, no en cada rerun)
+logo_mupai_b64, logo_gym_b64 = cargar_logos_email()
 
 st.markdown(f"""
 <style>
@@ -1874,6 +1698,43 @@ for k, v in defaults.items():
     if k not in st.session_state:
         st.session_state[k] = v
 
+# ==================== PERSISTENCIA DE SESIÓN EN SERVIDOR ====================
+# El cuestionario se guarda por secciones en el almacén de sesiones (SQLite en
+# disco por defecto; MUPAI_SESIONES_URL para otro backend compartido entre
+# réplicas). El token va en la URL (?sesion=...) para reanudar tras una
+# desconexión o desde otra réplica; el acceso no se persiste, así que tras
+# restaurar se vuelve a canjear un código (sesiones.SECCIONES_SESION).
+@st.cache_resource
+def obtener_almacen_sesiones():
+    return crear_almacen(os.environ.get("MUPAI_SESIONES_URL"))
+
+def cerrar_sesion_persistida():
+    """Borra del almacén la evaluación ya enviada: sus datos y fotos no quedan accesibles por la URL."""
+    almacen_sesiones.eliminar_sesion(st.session_state._id_sesion)
+    st.session_state._sesion_cerrada = True
+    st.query_params.pop("sesion", None)
+
+def checkpoint_sesion():
+    """Guarda las secciones que cambiaron, salvo que la evaluación ya se haya enviado."""
+    if not st.session_state.get('_sesion_cerrada'):
+        with span("sesion.checkpoint"):
+            guardar_estado(almacen_sesiones, st.session_state._id_sesion, st.session_state)
+
+almacen_sesiones = obtener_almacen_sesiones()
+if '_id_sesion' not in st.session_state:
+    id_sesion_url = st.query_params.get("sesion")
+    with span("sesion.restaurar"):
+        restauradas = restaurar_estado(almacen_sesiones, id_sesion_url, st.session_state) if id_sesion_url else []
+    if restauradas:
+        st.session_state._id_sesion = id_sesion_url
+    else:
+        # Token desconocido o ausente: sesión nueva (no se adopta un token ajeno)
+        st.session_state._id_sesion = nuevo_id_sesion()
+        st.query_params["sesion"] = st.session_state._id_sesion
+
+# Checkpoint de lo que cambió en el rerun anterior (incluye valores de widgets)
+checkpoint_sesion()
+
 # ==================== SISTEMA ANTI-SLEEP - KEEP APP ALIVE ====================
 # Previene que Streamlit Cloud ponga la app en modo sleep
 # Funciona solo si hay usuario activo navegando
@@ -2009,27 +1870,29 @@ if not st.session_state.authenticated:
                         phone_valid, phone_error = validate_phone(user_whatsapp)
                         
                         if name_valid and email_valid and phone_valid:
-                            # Generar código único
-                            access_code = generate_access_code()
-                            
-                            # Guardar datos en sesión
-                            st.session_state.access_user_name = user_name
-                            st.session_state.access_user_email = user_email
-                            st.session_state.access_user_whatsapp = user_whatsapp
-                            st.session_state.access_code = access_code
-                            st.session_state.code_used = False
-                            
-                            # Enviar email
-                            success, message = send_access_code_email(
-                                user_name, user_email, user_whatsapp, access_code
-                            )
+                            # Generar código único (el código solo vive en el servicio, no en la sesión)
+                            access_code, error_codigo = generate_access_code(user_name, user_email, user_whatsapp)
                             
-                            if success:
-                                st.session_state.access_stage = "code_sent"
-                                st.success(f"✅ {message}")
-                                st.rerun()
+                            if error_codigo:
+                                st.error(f"❌ {error_codigo}")
                             else:
-                                st.error(f"❌ {message}")
+                                # Guardar datos en sesión
+                                st.session_state.access_user_name = user_name
+                                st.session_state.access_user_email = user_email
+                                st.session_state.access_user_whatsapp = user_whatsapp
+                                st.session_state.code_used = False
+                                
+                                # Enviar email
+                                success, message = send_access_code_email(
+                                    user_name, user_email, user_whatsapp, access_code
+                                )
+                                
+                                if success:
+                                    st.session_state.access_stage = "code_sent"
+                                    st.success(f"✅ {message}")
+                                    st.rerun()
+                                else:
+                                    st.error(f"❌ {message}")
                         else:
                             # Mostrar errores de validación
                             if not name_valid:
@@ -2082,17 +1945,19 @@ if not st.session_state.authenticated:
                     if st.button("🔓 Verificar Código", use_container_width=True, type="primary"):
                         if not entered_code:
                             st.error("❌ Debes ingresar el código de acceso")
-                        elif st.session_state.code_used:
-                            st.error("❌ Este código ya fue utilizado. Solicita un nuevo código.")
-                        elif verify_access_code(entered_code, st.session_state.access_code):
-                            # Código correcto - autenticar usuario
-                            st.session_state.authenticated = True
-                            st.session_state.code_used = True
-                            st.session_state.access_stage = "authenticated"
-                            st.success("✅ Acceso autorizado. Bienvenido al sistema MUPAI.")
-                            st.rerun()
                         else:
-                            st.error("❌ Código incorrecto. Verifica e intenta nuevamente.")
+                            valido, mensaje_codigo = verify_access_code(
+                                entered_code, st.session_state.access_user_email
+                            )
+                            if valido:
+                                # Código correcto - autenticar usuario
+                                st.session_state.authenticated = True
+                                st.session_state.code_used = True
+                                st.session_state.access_stage = "authenticated"
+                                st.success(mensaje_codigo)
+                                st.rerun()
+                            else:
+                                st.error(mensaje_codigo)
     
     # Mostrar información del sistema mientras no esté autenticado
     st.markdown("""
@@ -2164,4032 +2029,112 @@ referencias_funcionales = {
     }
 }
 
-# === Funciones auxiliares para cálculos ===
-
-def safe_float(value, default=0.0):
-    """Safely convert value to float, handling empty strings and None."""
-    try:
-        if value == '' or value is None:
-            return float(default)
-        return float(value)
-    except (ValueError, TypeError):
-        return float(default)
-
-def safe_int(value, default=0):
-    """Safely convert value to int, handling empty strings and None."""
-    try:
-        if value == '' or value is None:
-            return int(default)
-        return int(value)
-    except (ValueError, TypeError):
-        return int(default)
-
-def calcular_tmb_cunningham(mlg):
-    """Calcula el TMB usando la fórmula de Katch-McArdle."""
-    try:
-        mlg = float(mlg)
-    except (TypeError, ValueError):
-        mlg = 0.0
-    return 370 + (21.6 * mlg)
-
-def calcular_mlg(peso, porcentaje_grasa):
-    """Calcula la Masa Libre de Grasa."""
-    try:
-        peso = float(peso)
-        porcentaje_grasa = float(porcentaje_grasa)
-    except (TypeError, ValueError):
-        peso = 0.0
-        porcentaje_grasa = 0.0
-    return peso * (1 - porcentaje_grasa / 100)
-
-def corregir_porcentaje_grasa(medido, metodo, sexo):
-    """
-    Corrige el porcentaje de grasa según el método de medición.
-    Si el método es Omron HBF-516, convierte a modelo 4C (4-compartment body composition) 
-    usando la fórmula de Siedler & Tinsley (2022): gc_4c = 1.226167 + 0.838294 * gc_omron.
-    Validación de rango 4%-60%.
-    Si InBody, aplica factor.
-    Si BodPod, aplica factor por sexo.
-    Si DEXA, devuelve el valor medido.
-    """
-    try:
-        medido = float(medido)
-    except (TypeError, ValueError):
-        medido = 0.0
-
-    if metodo == "Omron HBF-516 (BIA)":
-        # Conversión unificada Omron→4C (sin dependencia de género)
-        # Validar rango: solo convertir si está entre 4% y 60%
-        grasa_redondeada = int(round(medido))
-        
-        # Si está fuera del rango 4%-60%, devolver el valor original
-        if grasa_redondeada < 4 or grasa_redondeada > 60:
-            return medido
-        
-        # Usar tabla de conversión OMRON_HBF516_TO_4C
-        return OMRON_HBF516_TO_4C.get(grasa_redondeada, medido)
-    elif metodo == "InBody 270 (BIA profesional)":
-        return medido * 1.02
-    elif metodo == "Bod Pod (Pletismografía)":
-        factor = 1.0 if sexo == "Mujer" else 1.03
-        return medido * factor
-    else:  # DEXA (Gold Standard) u otros
-        return medido
-
-def calcular_ffmi(mlg, estatura_cm):
-    """
-    Calcula el Fat-Free Mass Index (FFMI) - Índice de Masa Libre de Grasa.
-    
-    FFMI = MLG / estatura^2
-    
-    Parámetros:
-        mlg: Masa Libre de Grasa en kg
-        estatura_cm: Estatura en centímetros
-    
-    Retorna:
-        float: FFMI calculado
-    """
-    if not mlg or not estatura_cm or mlg <= 0 or estatura_cm <= 0:
-        return 0.0
-    
-    try:
-        estatura_m = estatura_cm / 100
-        mlg = float(mlg)
-    except:
-        return 0.0
-    
-    # Fórmula: FFMI = MLG (kg) / Estatura (m)^2
-    # Rango normal hombres: 18-22
-    # Rango normal mujeres: 15-18
-    # Límite natural superior: ~25-26 (hombres), ~20-21 (mujeres)
-    
-    # Masa Libre de Grasa en kg
-    # Se calcula como: MLG = Peso Total * (1 - Porcentaje_Grasa/100)
-    # O directamente si la báscula lo reporta
-    
-    # Validación: MLG no puede ser 0 o negativa
-    if mlg <= 0:
-        return 0.0
-    
-    # FFMI = MLG / (Estatura en metros)^2
-    # Similar al IMC pero usando MLG en vez de peso total
-    
-    # Normalizar por estatura
-    estatura_m = estatura_cm / 100.0
-    
-    if estatura_m <= 0:
-        return 0.0
-    
-    try:
-        mlg = float(mlg)
-    except:
-        mlg = 0.0
-    
-    ffmi = mlg / (estatura_m ** 2)
-    
-    return ffmi
-
-def estimar_masa_muscular_desde_mlg(mlg, sexo, nivel_entrenamiento='intermedio'):
-    """
-    Estima masa muscular esquelética desde MLG usando factores científicos.
-    
-    MLG incluye: músculo + huesos (~15%) + órganos (~10-15%) + agua (~30%)
-    Músculo esquelético ≈ 35-45% de MLG según nivel de entrenamiento
-    
-    Factores basados en literatura científica:
-    - Wang et al. (2000): distribución de tejidos en MLG
-    - Kim et al. (2002): masa muscular apendicular
-    - Janssen et al. (2000): ecuaciones de predicción
-    
-    Parámetros:
-        mlg: Masa Libre de Grasa en kg
-        sexo: 'Hombre' o 'Mujer'
-        nivel_entrenamiento: 'principiante', 'intermedio' o 'avanzado'
-    
-    Retorna:
-        float: Masa muscular estimada en kg
-    """
-    if not mlg or mlg <= 0:
-        return 0.0
-    
-    # Factores conservadores por nivel y sexo
-    factores = {
-        'Hombre': {
-            'principiante': 0.37,  # 37% de MLG es músculo
-            'intermedio': 0.40,    # 40% de MLG es músculo
-            'avanzado': 0.43       # 43% de MLG es músculo
-        },
-        'Mujer': {
-            'principiante': 0.33,  # 33% de MLG es músculo
-            'intermedio': 0.36,    # 36% de MLG es músculo  
-            'avanzado': 0.40       # 40% de MLG es músculo
-        }
-    }
-    
-    nivel = nivel_entrenamiento.lower() if nivel_entrenamiento else 'intermedio'
-    factor = factores.get(sexo, factores['Hombre']).get(nivel, 0.38)
-    
-    masa_muscular_estimada = mlg * factor
-    
-    return masa_muscular_estimada
-
-def calcular_ffmi(mlg, estatura_cm):
-    """
-    Calcula el FFMI (Fat-Free Mass Index) y lo normaliza a 1.80m de estatura.
-    
-    El FFMI es un indicador de la masa muscular ajustado por altura que permite
-    comparar el desarrollo muscular entre individuos de diferentes estaturas.
-    
-    PARAMETROS:
-    -----------
-    mlg : float
-        Masa Libre de Grasa (MLG) en kilogramos.
-        Se calcula como: MLG = Peso Total * (1 - Porcentaje_Grasa/100)
-        Representa todo el tejido corporal excepto la grasa (musculos, huesos, organos, agua).
-    
-    estatura_cm : float
-        Estatura del individuo en centimetros.
-    
-    CALCULO:
-    --------
-    1. FFMI Base = MLG / (Estatura_en_metros^2)
-       - Similar al IMC pero usando masa libre de grasa en lugar de peso total
-       - Refleja cuanta masa muscular tiene la persona por unidad de altura al cuadrado
-    
-    2. FFMI Normalizado = FFMI_Base + 6.3 * (1.8 - Estatura_en_metros)
-       - Formula de Kouri et al. (1995) para normalizar a 1.80m de referencia
-       - El factor 6.3 compensa las diferencias naturales de proporcion corporal
-       - Personas mas altas tienden a tener FFMI base mas bajo sin tener menos musculo
-       - La normalizacion permite comparaciones justas entre diferentes estaturas
-    
-    RETORNA:
-    --------
-    float
-        FFMI normalizado a 1.80m de estatura.
-        Valores tipicos:
-        - Hombres: 18-25 (natural), >25 (potencialmente no natural)
-        - Mujeres: 15-21 (natural), >21 (potencialmente no natural)
-    
-    REFERENCIAS:
-    -----------
-    - Kouri EM, et al. (1995). "Fat-free mass index in users and nonusers of 
-      anabolic-androgenic steroids." Clinical Journal of Sport Medicine.
-    """
-    # Validacion y conversion de parametros a valores numericos
-    try:
-        mlg = float(mlg)
-        estatura_m = float(estatura_cm) / 100
-    except (TypeError, ValueError):
-        # Si hay error en la conversion, usar valores por defecto seguros
-        mlg = 0.0
-        estatura_m = 1.80
-    
-    # Validar que la estatura sea positiva, usar 1.80m como fallback
-    if estatura_m <= 0:
-        estatura_m = 1.80
-    
-    # Paso 1: Calcular FFMI base (masa libre de grasa dividida por altura al cuadrado)
-    ffmi = mlg / (estatura_m ** 2)
-    
-    # Paso 2: Normalizar a 1.80m usando la formula de Kouri
-    # Esta normalizacion permite comparar el FFMI entre personas de diferentes alturas
-    ffmi_normalizado = ffmi + 6.3 * (1.8 - estatura_m)
-    
-    return ffmi_normalizado
-
-def clasificar_ffmi(ffmi, sexo):
-    """
-    Clasifica el FFMI (Fat-Free Mass Index) en categorias segun el sexo del usuario.
-    
-    El FFMI refleja el desarrollo muscular y varia significativamente entre hombres
-    y mujeres debido a diferencias biologicas en composicion hormonal, cantidad de
-    testosterona, y distribucion natural de masa muscular.
-    
-    PARAMETROS:
-    -----------
-    ffmi : float
-        Valor de FFMI normalizado calculado previamente.
-    
-    sexo : str
-        "Hombre" o "Mujer" - determina que escala de clasificacion usar.
-    
-    CLASIFICACION PARA HOMBRES:
-    ---------------------------
-    - Bajo (<18):      Desarrollo muscular insuficiente. Tipico en sedentarios o con
-                       nutricion inadecuada. Indica necesidad de entrenamiento de fuerza
-                       y optimizacion nutricional.
-    
-    - Promedio (18-20): Desarrollo muscular normal en poblacion general. Presente en
-                        personas con actividad fisica moderada o principiantes en
-                        entrenamiento de fuerza (0-2 anos de experiencia).
-    
-    - Bueno (20-22):   Buen desarrollo muscular. Alcanzable naturalmente con
-                       entrenamiento de fuerza consistente (2-4 anos) y nutricion
-                       adecuada. Representa un fisico atletico.
-    
-    - Avanzado (22-25): Desarrollo muscular muy avanzado. Requiere anos de entrenamiento
-                        disciplinado (4-8+ anos) y optimizacion de todos los factores
-                        (entrenamiento, nutricion, descanso, genetica favorable).
-                        Limite superior del potencial natural para mayoria.
-    
-    - Elite (>25):     Desarrollo muscular excepcional. Dificil de alcanzar naturalmente.
-                       Puede indicar genetica excepcional o uso de farmacologia.
-                       Valores >26-27 son casi imposibles sin ayuda ergogenica.
-    
-    CLASIFICACION PARA MUJERES:
-    ---------------------------
-    - Bajo (<15):      Desarrollo muscular insuficiente. Requiere entrenamiento de
-                       fuerza y nutricion adecuada para salud y funcionalidad.
-    
-    - Promedio (15-17): Desarrollo muscular normal. Tipico en poblacion femenina
-                        general activa o con entrenamiento basico (0-2 anos).
-    
-    - Bueno (17-19):   Buen desarrollo muscular. Alcanzable con entrenamiento
-                       consistente (2-4 anos) y nutricion optimizada. Fisico atletico.
-    
-    - Avanzado (19-21): Desarrollo muy avanzado. Requiere anos de dedicacion (4-8+ anos).
-                        Limite superior del potencial natural para mayoria de mujeres.
-    
-    - Elite (>21):     Desarrollo excepcional. Raro naturalmente. Puede indicar genetica
-                       superior o uso de farmacologia. Valores >22-23 son altamente
-                       improbables sin ayuda ergogenica.
-    
-    RAZON DE DIFERENCIAS POR SEXO:
-    ------------------------------
-    Los umbrales son aproximadamente 3 puntos mas bajos para mujeres debido a:
-    
-    1. HORMONAS: Las mujeres tienen ~10-20% de la testosterona de los hombres, limitando
-       la capacidad de sintesis proteica y ganancia muscular.
-    
-    2. COMPOSICION: Las mujeres tienen naturalmente 6-11% mas grasa corporal esencial
-       (necesaria para funciones reproductivas), reduciendo el porcentaje de masa magra.
-    
-    3. DISTRIBUCION: Los hombres tienen mayor masa muscular en torso y brazos, mientras
-       que las mujeres tienen distribucion mas uniforme o concentrada en piernas.
-    
-    4. GENETICA: Diferencias en expresion genica relacionada con miogenesis (formacion
-       de tejido muscular) favorecen mayor desarrollo en hombres.
-    
-    RETORNA:
-    --------
-    str
-        Categoria de clasificacion: "Bajo", "Promedio", "Bueno", "Avanzado" o "Elite"
-    
-    REFERENCIAS:
-    -----------
-    - Kouri EM, et al. (1995). Clinical Journal of Sport Medicine.
-    - Schoenfeld BJ, et al. (2020). Sports Medicine - sex differences in training.
-    """
-    # Validar y convertir FFMI a valor numerico
-    try:
-        ffmi = float(ffmi)
-    except (TypeError, ValueError):
-        ffmi = 0.0
-    
-    # Definir umbrales de clasificacion especificos por sexo
-    if sexo == "Hombre":
-        # Umbrales masculinos: reflejan mayor potencial de masa muscular
-        limites = [(18, "Bajo"), (20, "Promedio"), (22, "Bueno"), (25, "Avanzado"), (100, "Élite")]
-    else:
-        # Umbrales femeninos: ajustados ~3 puntos mas bajos por diferencias biologicas
-        limites = [(15, "Bajo"), (17, "Promedio"), (19, "Bueno"), (21, "Avanzado"), (100, "Élite")]
-    
-    # Iterar sobre los limites y retornar la primera clasificacion que aplique
-    for limite, clasificacion in limites:
-        if ffmi < limite:
-            return clasificacion
-    
-    # Si el FFMI supera todos los limites, clasificar como Elite
-    return "Élite"
-
-def calcular_fmi(peso, grasa_corregida, estatura_cm):
-    """
-    Calcula el FMI/BFMI (Fat Mass Index / Body Fat Mass Index).
-    
-    El FMI es un indicador de adiposidad ajustado por altura que complementa
-    al FFMI. Permite evaluar la cantidad de grasa corporal de forma normalizada
-    por la estatura del individuo.
-    
-    PARAMETROS:
-    -----------
-    peso : float
-        Peso total del individuo en kilogramos.
-    
-    grasa_corregida : float
-        Porcentaje de grasa corporal corregido (equivalente DEXA).
-    
-    estatura_cm : float
-        Estatura del individuo en centímetros.
-    
-    CALCULO:
-    --------
-    1. Masa Grasa (kg) = Peso Total * (Porcentaje_Grasa / 100)
-    2. FMI = Masa Grasa / (Estatura_en_metros^2)
-    
-    RETORNA:
-    --------
-    float
-        FMI (índice de masa grasa por altura al cuadrado).
-        Valores de referencia:
-        - Hombres: <3 (bajo), 3-6 (normal), 6-9 (elevado), >9 (muy elevado)
-        - Mujeres: <5 (bajo), 5-9 (normal), 9-13 (elevado), >13 (muy elevado)
-    
-    REFERENCIAS:
-    -----------
-    - Kelly TL, et al. (2009). "Dual energy X-Ray absorptiometry body composition
-      reference values from NHANES." PLoS ONE.
-    """
-    try:
-        peso = float(peso)
-        grasa_corregida = float(grasa_corregida)
-        estatura_m = float(estatura_cm) / 100
-    except (TypeError, ValueError):
-        return 0.0
-    
-    # Validar que la estatura sea positiva
-    if estatura_m <= 0:
-        return 0.0
-    
-    # Calcular masa grasa
-    masa_grasa = peso * (grasa_corregida / 100)
-    
-    # Calcular FMI
-    fmi = masa_grasa / (estatura_m ** 2)
-    
-    return fmi
+def obtener_datos_suenyo_estres_email():
+    """Datos de sueño/estrés para el reporte por email (None si no se completó)."""
+    if st.session_state.get('suenyo_estres_completado', False):
+        return st.session_state.get('suenyo_estres_data', {})
+    return None
 
-def obtener_modo_interpretacion_ffmi(grasa_corregida, sexo):
-    """
-    Determina el modo de interpretación del FFMI basado en el porcentaje de grasa
-    corporal corregido y el sexo del usuario.
-    
-    Este sistema controla cómo se interpreta y reporta el FFMI, reconociendo que
-    en casos de adiposidad elevada, la masa libre de grasa puede estar inflada por
-    componentes no musculares (agua corporal, órganos, masa estructural), haciendo
-    que el FFMI pierda validez como proxy de muscularidad atlética.
-    
-    PARAMETROS:
-    -----------
-    grasa_corregida : float
-        Porcentaje de grasa corporal corregido (equivalente DEXA).
-    
-    sexo : str
-        "Hombre" o "Mujer" - determina qué umbrales aplicar.
-    
-    MODOS DE INTERPRETACIÓN:
-    ------------------------
-    GREEN (Verde) - Interpretación válida como muscularidad:
-        - Hombres: 11.9% - 22.7% grasa corporal
-        - Mujeres: 20.8% - 31.0% grasa corporal
-        - El FFMI es un buen indicador de desarrollo muscular
-        - Se muestran clasificaciones atléticas (Bajo-Élite)
-        - Se incluyen módulos de potencial genético
-    
-    AMBER (Ámbar) - Interpretación limitada:
-        - Hombres: >22.7% - 26.5% grasa corporal
-        - Mujeres: >31.0% - 38.2% grasa corporal
-        - El FFMI comienza a ser menos confiable
-        - Se reporta valor numérico con advertencia
-        - Se ocultan o degradan clasificaciones atléticas
-        - Se reducen/ocultan módulos de potencial
-    
-    RED (Rojo) - No aplica clasificación atlética:
-        - Hombres: >26.5% grasa corporal
-        - Mujeres: >38.2% grasa corporal
-        - El FFMI pierde validez como indicador de muscularidad
-        - Se reporta valor pero con explicación clara
-        - No se muestran clasificaciones atléticas
-        - No se muestran módulos de potencial
-    
-    FUNDAMENTO CIENTÍFICO:
-    ---------------------
-    Con adiposidad elevada, la masa libre de grasa (MLG) incluye proporcionalmente
-    más agua corporal, masa de órganos y tejido estructural, no solo músculo. Esto
-    hace que el FFMI se eleve artificialmente y no refleje el desarrollo muscular
-    real. Los umbrales están diseñados para:
-    
-    - GREEN: Rango donde la MLG es principalmente músculo esquelético
-    - AMBER: Zona de transición donde comienza la inflación
-    - RED: Rango donde la inflación es significativa y el FFMI no es interpretable
-    
-    RETORNA:
-    --------
-    str
-        Modo de interpretación: "GREEN", "AMBER" o "RED"
-    
-    REFERENCIAS:
-    -----------
-    - Kouri EM, et al. (1995). Clinical Journal of Sport Medicine.
-    - VanItallie TB, et al. (1990). "Height-normalized indices of body's fat-free
-      mass and fat mass: potentially useful indicators of nutritional status."
-    - Kyle UG, et al. (2004). "Fat-free and fat mass percentiles in 5225 healthy
-      subjects aged 15 to 98 years." Nutrition.
-    """
-    try:
-        grasa = float(grasa_corregida)
-    except (TypeError, ValueError):
-        # Si no se puede determinar, usar GREEN por defecto (conservador)
-        return "GREEN"
-    
-    if sexo == "Hombre":
-        # Umbrales para hombres
-        if 11.9 <= grasa <= 22.7:
-            return "GREEN"
-        elif 22.7 < grasa <= 26.5:
-            return "AMBER"
-        else:  # grasa > 26.5 o grasa < 11.9
-            return "RED"
-    else:  # Mujer
-        # Umbrales para mujeres
-        if 20.8 <= grasa <= 31.0:
-            return "GREEN"
-        elif 31.0 < grasa <= 38.2:
-            return "AMBER"
-        else:  # grasa > 38.2 o grasa < 20.8
-            return "RED"
-
-def calculate_psmf(sexo, peso, grasa_corregida, mlg, estatura_cm=None):
-    """
-    Calcula los parámetros para PSMF (Very Low Calorie Diet) actualizada
-    según el nuevo protocolo basado en tiers de adiposidad.
-    
-    Requisitos actualizados con sistema de tiers:
-    - Tier 1 (baja adiposidad): Base = peso total
-    - Tier 2 (adiposidad moderada): Base = MLG
-    - Tier 3 (alta adiposidad): Base = peso ideal (IMC 25)
-    - Proteína según % grasa: 1.8g/kg (<25% grasa) o 1.6g/kg (≥25% grasa)
-    - Grasas según % grasa: 30g/día (<25% grasa) o 50g/día (≥25% grasa)
-    - Calorías objetivo = proteína (g) × multiplicador según % grasa
-    - Multiplicadores: 8.3 (alto % grasa), 9.0 (moderado), 9.5-9.7 (magro)
-    - Carb cap por tier: Tier 1=50g, Tier 2=40g, Tier 3=30g
-    - Carbohidratos: Calculados desde calorías restantes, limitados por carb cap
-    """
-    try:
-        peso = float(peso)
-        grasa_corregida = float(grasa_corregida)
-    except (TypeError, ValueError):
-        peso = 70.0
-        grasa_corregida = 20.0
-    
-    # Determinar elegibilidad para PSMF según sexo y % grasa
-    if sexo == "Hombre" and grasa_corregida > 18:
-        psmf_aplicable = True
-        criterio = "PSMF recomendado por % grasa >18%"
-        calorias_piso_dia = 800
-    elif sexo == "Mujer" and grasa_corregida > 23:
-        psmf_aplicable = True
-        criterio = "PSMF recomendado por % grasa >23%"
-        calorias_piso_dia = 700
-    else:
-        return {"psmf_aplicable": False}
-    
-    if psmf_aplicable:
-        # Calcular variables necesarias
-        if estatura_cm is not None:
-            estatura_m = estatura_cm / 100
-            imc = peso / (estatura_m ** 2)
-            peso_ideal_ref_kg = 25 * (estatura_m ** 2)
-        else:
-            estatura_m = None
-            imc = None
-            peso_ideal_ref_kg = None
-        
-        # DETERMINACIÓN DE TIER basado en adiposidad
-        # Tier 3 predomina - verificar primero
-        if (imc is not None and imc >= 40) or \
-           (sexo == "Hombre" and grasa_corregida >= 35) or \
-           (sexo == "Mujer" and grasa_corregida >= 45):
-            tier = 3
-        # Tier 2
-        elif (sexo == "Hombre" and 25 <= grasa_corregida < 35) or \
-             (sexo == "Mujer" and 35 <= grasa_corregida < 45):
-            tier = 2
-        # Tier 1
-        elif (sexo == "Hombre" and grasa_corregida < 25) or \
-             (sexo == "Mujer" and grasa_corregida < 35):
-            tier = 1
-        else:
-            tier = 1  # Default fallback
-        
-        # ELECCIÓN DE BASE DE PROTEÍNA según tier
-        if tier == 1:
-            base_proteina_kg = peso
-            base_proteina_nombre = "Peso total"
-        elif tier == 2:
-            base_proteina_kg = mlg
-            base_proteina_nombre = "MLG"
-        elif tier == 3:
-            base_proteina_kg = peso_ideal_ref_kg if peso_ideal_ref_kg is not None else mlg
-            base_proteina_nombre = "Peso ideal (IMC 25)"
-        else:
-            base_proteina_kg = peso
-            base_proteina_nombre = "Peso total"
-        
-        # FACTORES DE PROTEÍNA Y GRASAS según % grasa corporal corregida
-        if grasa_corregida < 25:
-            # < 25% grasa: 1.8g/kg proteína + 30g grasas
-            factor_proteina_psmf = 1.8
-            grasa_g_dia = 30.0
-        else:
-            # ≥ 25% grasa: 1.6g/kg proteína + 50g grasas
-            factor_proteina_psmf = 1.6
-            grasa_g_dia = 50.0
-        
-        proteina_g_dia = round(base_proteina_kg * factor_proteina_psmf, 1)
-        
-        # MULTIPLICADOR CALÓRICO según % grasa corporal (para calorías objetivo)
-        if grasa_corregida > 35:  # Alto % grasa - PSMF tradicional
-            multiplicador = 8.3
-            perfil_grasa = "alto % grasa (PSMF tradicional)"
-        elif grasa_corregida >= 25 and sexo == "Hombre":  # Moderado para hombres
-            multiplicador = 9.0
-            perfil_grasa = "% grasa moderado"
-        elif grasa_corregida >= 30 and sexo == "Mujer":  # Moderado para mujeres
-            multiplicador = 9.0
-            perfil_grasa = "% grasa moderado"
-        else:  # Casos más magros - visible abdominals/lower %
-            # Usar 9.6 como punto medio del rango 9.5-9.7
-            multiplicador = 9.6
-            perfil_grasa = "más magro (abdominales visibles)"
-        
-        # CALORÍAS OBJETIVO = proteína (g) × multiplicador
-        kcal_psmf_obj = round(proteina_g_dia * multiplicador, 0)
-        
-        # CARB CAP por tier
-        if tier == 1:
-            carb_cap_g = 50
-        elif tier == 2:
-            carb_cap_g = 40
-        elif tier == 3:
-            carb_cap_g = 30
-        else:
-            carb_cap_g = 50  # Default
-        
-        # CÁLCULO DE CARBOHIDRATOS con cap
-        kcal_prot = 4 * proteina_g_dia
-        kcal_grasa = 9 * grasa_g_dia
-        carbs_g_calculado = max((kcal_psmf_obj - (kcal_prot + kcal_grasa)) / 4, 0)
-        
-        carbs_g = min(carbs_g_calculado, carb_cap_g)
-        carb_cap_aplicado = carbs_g_calculado > carb_cap_g
-        
-        # CALORÍAS FINALES recalculadas por macros
-        calorias_dia = kcal_prot + kcal_grasa + (4 * carbs_g)
-        
-        # Verificar que no esté por debajo del piso mínimo
-        if calorias_dia < calorias_piso_dia:
-            calorias_dia = calorias_piso_dia
-        
-        # Calcular rango de pérdida semanal proyectada (estimación conservadora)
-        if sexo == "Hombre":
-            perdida_semanal_min = 0.8  # kg/semana
-            perdida_semanal_max = 1.2
-        else:  # Mujer
-            perdida_semanal_min = 0.6  # kg/semana
-            perdida_semanal_max = 1.0
-        
-        return {
-            "psmf_aplicable": True,
-            "proteina_g_dia": proteina_g_dia,
-            "grasa_g_dia": grasa_g_dia,
-            "carbs_g_dia": round(carbs_g, 1),
-            "calorias_dia": calorias_dia,
-            "calorias_piso_dia": calorias_piso_dia,
-            "multiplicador": multiplicador,
-            "perfil_grasa": perfil_grasa,
-            "perdida_semanal_kg": (perdida_semanal_min, perdida_semanal_max),
-            "criterio": f"{criterio} - Protocolo con tiers: {perfil_grasa}",
-            # Nuevos campos de explainabilidad
-            "tier_psmf": tier,
-            "base_proteina_usada": base_proteina_nombre,
-            "base_proteina_kg": round(base_proteina_kg, 2),
-            "carb_cap_aplicado_g": carb_cap_g,
-            "carb_cap_fue_aplicado": carb_cap_aplicado,
-            "factor_proteina_psmf": factor_proteina_psmf
-        }
-    else:
-        return {"psmf_aplicable": False}
 
-def sugerir_deficit(porcentaje_grasa, sexo):
-    """Sugiere el déficit calórico recomendado por % de grasa y sexo."""
-    try:
-        porcentaje_grasa = float(porcentaje_grasa)
-    except (TypeError, ValueError):
-        porcentaje_grasa = 0.0
-    rangos_hombre = [
-        (0, 8, 3), (8.1, 10.5, 5), (10.6, 13, 10), (13.1, 15.5, 15),
-        (15.6, 18, 20), (18.1, 20.5, 25), (20.6, 23, 27), (23.1, 25.5, 29),
-        (25.6, 30, 30), (30.1, 32.5, 35), (32.6, 40, 35), (40.1, 45, 40),
-        (45.1, 100, 50)
-    ]
-    rangos_mujer = [
-        (0, 14, 3), (14.1, 16.5, 5), (16.6, 19, 10), (19.1, 21.5, 15),
-        (21.6, 24, 20), (24.1, 26.5, 25), (26.6, 29, 27), (29.1, 31.5, 29),
-        (31.6, 35, 30), (35.1, 40, 30), (40.1, 45, 35), (45.1, 50, 40),
-        (50.1, 100, 50)
-    ]
-    tabla = rangos_hombre if sexo == "Hombre" else rangos_mujer
-    tope = 30
-    limite_extra = 30 if sexo == "Hombre" else 35
-    for minimo, maximo, deficit in tabla:
-        if minimo <= porcentaje_grasa <= maximo:
-            return min(deficit, tope) if porcentaje_grasa <= limite_extra else deficit
-    return 20  # Déficit por defecto
-
-def determinar_fase_nutricional_refinada(grasa_corregida, sexo):
-    """
-    Determina la fase nutricional refinada basada en % de grasa corporal y sexo.
-    Usa la tabla completa de rangos para decisiones más precisas.
-    """
-    try:
-        grasa_corregida = float(grasa_corregida)
-    except (TypeError, ValueError):
-        grasa_corregida = 0.0
-    
-    if sexo == "Hombre":
-        # Rangos refinados para hombres
-        if grasa_corregida < 6:
-            # Muy bajo - competición
-            fase = "Superávit recomendado: 10-15%"
-            porcentaje = 12.5
-        elif grasa_corregida <= 10:
-            # Bajo - atlético
-            fase = "Superávit recomendado: 5-10%"
-            porcentaje = 7.5
-        elif grasa_corregida <= 15:
-            # Fitness/atlético - puede mantener o ligero superávit
-            fase = "Mantenimiento o ligero superávit: 0-5%"
-            porcentaje = 2.5
-        elif grasa_corregida <= 18:
-            # Buena condición - mantenimiento
-            fase = "Mantenimiento"
-            porcentaje = 0
-        else:
-            # Sobrepeso - déficit según tabla
-            deficit_valor = sugerir_deficit(grasa_corregida, sexo)
-            porcentaje = -deficit_valor
-            fase = f"Déficit recomendado: {deficit_valor}%"
-    else:  # Mujer
-        # Rangos refinados para mujeres
-        if grasa_corregida < 12:
-            # Muy bajo - competición
-            fase = "Superávit recomendado: 10-15%"
-            porcentaje = 12.5
-        elif grasa_corregida <= 16:
-            # Bajo - atlético
-            fase = "Superávit recomendado: 5-10%"
-            porcentaje = 7.5
-        elif grasa_corregida <= 20:
-            # Fitness/atlético - puede mantener o ligero superávit
-            fase = "Mantenimiento o ligero superávit: 0-5%"
-            porcentaje = 2.5
-        elif grasa_corregida <= 23:
-            # Buena condición - mantenimiento
-            fase = "Mantenimiento"
-            porcentaje = 0
-        else:
-            # Sobrepeso - déficit según tabla
-            deficit_valor = sugerir_deficit(grasa_corregida, sexo)
-            porcentaje = -deficit_valor
-            fase = f"Déficit recomendado: {deficit_valor}%"
-    
-    return fase, porcentaje
+# Nodos del grafo de cálculo que reciben las plantillas de email, con el mismo
+# nombre que sus parámetros (la Parte 2 agrega el TMB)
+NODOS_EMAIL_CLIENTE = ('sexo', 'edad', 'peso', 'estatura', 'imc', 'grasa_corregida', 'mlg', 'ffmi',
+                       'nivel_entrenamiento', 'circunferencia_cintura', 'edad_metabolica', 'wthr',
+                       'masa_grasa', 'masa_muscular_aparato', 'masa_muscular_estimada')
+NODOS_EMAIL_PARTE2 = NODOS_EMAIL_CLIENTE + ('tmb',)
 
-def calcular_edad_metabolica(edad_cronologica, porcentaje_grasa, sexo):
-    """Calcula la edad metabólica ajustada por % de grasa."""
-    try:
-        edad_cronologica = float(edad_cronologica)
-        porcentaje_grasa = float(porcentaje_grasa)
-    except (TypeError, ValueError):
-        edad_cronologica = 18
-        porcentaje_grasa = 0.0
-    if sexo == "Hombre":
-        grasa_ideal = 15
-    else:
-        grasa_ideal = 22
-    diferencia_grasa = porcentaje_grasa - grasa_ideal
-    ajuste_edad = diferencia_grasa * 0.3
-    edad_metabolica = edad_cronologica + ajuste_edad
-    return max(18, min(80, round(edad_metabolica)))
-
-def obtener_geaf(nivel):
-    """Devuelve el factor de actividad física (GEAF) según el nivel."""
-    valores = {
-        "Sedentario": 1.00,
-        "Moderadamente-activo": 1.11,
-        "Activo": 1.25,
-        "Muy-activo": 1.45
-    }
-    return valores.get(nivel, 1.00)
 
-def esta_en_rango_saludable(porcentaje_grasa, sexo):
-    """
-    Determina si el porcentaje de grasa corporal está en rango saludable para ponderar FFMI.
-    
-    Args:
-        porcentaje_grasa: Porcentaje de grasa corporal
-        sexo: "Hombre" o "Mujer"
-    
-    Returns:
-        bool: True si está en rango saludable, False si no
-    """
-    try:
-        grasa = float(porcentaje_grasa)
-    except (TypeError, ValueError):
-        return True  # Si no se puede determinar, usar ponderación normal por seguridad
-    
-    if sexo == "Hombre":
-        return grasa <= 25.0
-    else:  # Mujer
-        return grasa <= 32.0
+def nodos_email():
+    """Nodos resueltos del grafo para los emails (None si falta alguna entrada del nodo)."""
+    nodos = {nombre: grafo().get(nombre) for nombre in NODOS_EMAIL_PARTE2}
+    # Las plantillas comparan la masa muscular con 0
+    nodos['masa_muscular_aparato'] = nodos['masa_muscular_aparato'] or 0
+    nodos['masa_muscular_estimada'] = nodos['masa_muscular_estimada'] or 0
+    return nodos
 
-def obtener_factor_proteina_tradicional(grasa_corregida):
-    """
-    Determina el factor de proteína en g/kg según el porcentaje de grasa corporal corregido
-    para el plan tradicional.
-    
-    Escala de distribución:
-    - Si grasa_corregida >= 35%: 1.6g/kg proteína
-    - Si grasa_corregida entre 25% y 34.9%: 1.8g/kg proteína
-    - Si grasa_corregida entre 15% y 24.9%: 2.0g/kg proteína
-    - Si grasa_corregida entre 4% y 14.9%: 2.2g/kg proteína
-    
-    GRASA: Ahora SIEMPRE 40% TMB (independiente del % grasa corporal)
-    
-    Args:
-        grasa_corregida: Porcentaje de grasa corporal corregido
-    
-    Returns:
-        float: Factor de proteína en g/kg peso corporal
-    """
-    try:
-        grasa = float(grasa_corregida)
-    except (TypeError, ValueError):
-        grasa = 20.0  # Valor por defecto
-    
-    if grasa >= 35:
-        return 1.6
-    elif grasa >= 25:
-        return 1.8
-    elif grasa >= 15:
-        return 2.0
-    else:  # grasa < 15 (includes 4-14.9%)
-        return 2.2
-
-def debe_usar_mlg_para_proteina(sexo, grasa_corregida):
-    """
-    Determina si se debe usar MLG como base para el cálculo de proteína
-    según las reglas 35/42 para alta adiposidad.
-    
-    Reglas:
-    - Hombres: usar MLG si grasa_corregida >= 35%
-    - Mujeres: usar MLG si grasa_corregida >= 42%
-    - De lo contrario: usar peso total
-    
-    Razón: En obesidad alta, usar peso total infla inapropiadamente la proteína.
-    
-    Args:
-        sexo: "Hombre" o "Mujer"
-        grasa_corregida: Porcentaje de grasa corporal corregido
-    
-    Returns:
-        bool: True si se debe usar MLG, False si se debe usar peso total
-    """
-    try:
-        grasa = float(grasa_corregida)
-    except (TypeError, ValueError):
-        return False
-    
-    if sexo == "Hombre" and grasa >= 35:
-        return True
-    elif sexo == "Mujer" and grasa >= 42:
-        return True
-    else:
-        return False
 
-def obtener_porcentaje_grasa_tmb_tradicional(grasa_corregida, sexo):
-    """
-    Determina el porcentaje del TMB/BMR que debe destinarse a grasas para el plan tradicional.
-    
-    NUEVA LÓGICA CIENTÍFICA (implementada según requerimientos):
-    - Fat intake se establece SIEMPRE en 40% del TMB/BMR para CUALQUIER % de grasa corporal
-    - Esto se basa en evidencia científica que demuestra beneficios metabólicos óptimos
-    - La ingesta mínima se garantiza mediante restricción del 20% del TEI (aplicada posteriormente)
-    
-    Referencias científicas:
-    - Hämäläinen et al., 1984: Efectos metabólicos de diferentes ratios de grasas
-    - Volek et al., 1997: Adaptaciones metabólicas al entrenamiento de resistencia
-    - Smith et al., 2011: Optimización de macronutrientes para composición corporal
-    - Riechman et al., 2007: Síntesis proteica y balance energético
-    - Burke et al., 2011: Estrategias nutricionales para deportistas
-    
-    Args:
-        grasa_corregida: Porcentaje de grasa corporal corregido (no utilizado en nueva lógica)
-        sexo: "Hombre" o "Mujer" (no utilizado en nueva lógica)
-    
-    Returns:
-        float: Porcentaje del TMB destinado a grasas (0.40 = 40%)
+def enviar_email_cliente(nodos, nombre_cliente, email_cliente, fecha, grasa_visceral=None, progress_photos=None):
     """
-    # Nueva lógica científica: SIEMPRE 40% del TMB/BMR para grasas
-    # independientemente del % de grasa corporal o sexo
-    return 0.40  # 40% TMB (aplicable a todos los usuarios del plan TRADICIONAL)
+    Envía email al cliente con resultados completos de evaluación corporal.
 
-def calcular_proyeccion_cientifica(sexo, grasa_corregida, nivel_entrenamiento, peso_actual, porcentaje_deficit_superavit):
-    """
-    Calcula la proyección científica realista de ganancia o pérdida de peso semanal y total.
-    
-    Args:
-        sexo: "Hombre" o "Mujer"
-        grasa_corregida: Porcentaje de grasa corporal corregido
-        nivel_entrenamiento: "principiante", "intermedio", "avanzado", "élite"
-        peso_actual: Peso actual en kg
-        porcentaje_deficit_superavit: Porcentaje de déficit (-) o superávit (+)
-    
-    Returns:
-        dict con rango_semanal_pct, rango_semanal_kg, rango_total_6sem_kg, explicacion_textual
-    """
-    try:
-        peso_actual = float(peso_actual)
-        grasa_corregida = float(grasa_corregida)
-        porcentaje = float(porcentaje_deficit_superavit)
-    except (ValueError, TypeError):
-        peso_actual = 70.0
-        grasa_corregida = 20.0
-        porcentaje = 0.0
-    
-    # Rangos científicos según objetivo, sexo y nivel
-    if porcentaje < 0:  # Déficit (pérdida) - valor negativo
-        if sexo == "Hombre":
-            if nivel_entrenamiento in ["principiante", "intermedio"]:
-                rango_pct_min, rango_pct_max = -1.0, -0.5
-            else:  # avanzado, élite
-                rango_pct_min, rango_pct_max = -0.7, -0.3
-        else:  # Mujer
-            if nivel_entrenamiento in ["principiante", "intermedio"]:
-                rango_pct_min, rango_pct_max = -0.8, -0.3
-            else:  # avanzado, élite
-                rango_pct_min, rango_pct_max = -0.6, -0.2
-        
-        # Ajuste por % grasa (personas con más grasa pueden perder más rápido inicialmente)
-        if grasa_corregida > (25 if sexo == "Hombre" else 30):
-            factor_grasa = 1.2  # 20% más rápido
-        elif grasa_corregida < (12 if sexo == "Hombre" else 18):
-            factor_grasa = 0.8  # 20% más conservador
-        else:
-            factor_grasa = 1.0
-        
-        rango_pct_min *= factor_grasa
-        rango_pct_max *= factor_grasa
-        
-        explicacion = f"Con {grasa_corregida:.1f}% de grasa y nivel {nivel_entrenamiento}, se recomienda una pérdida conservadora pero efectiva. {'Nivel alto de grasa permite pérdida inicial más rápida.' if factor_grasa > 1 else 'Nivel bajo de grasa requiere enfoque más conservador.' if factor_grasa < 1 else 'Nivel óptimo de grasa para pérdida sostenible.'}"
-        
-    elif porcentaje > 0:  # Superávit (ganancia) - valor positivo
-        if sexo == "Hombre":
-            if nivel_entrenamiento in ["principiante", "intermedio"]:
-                rango_pct_min, rango_pct_max = 0.2, 0.5
-            else:  # avanzado, élite
-                rango_pct_min, rango_pct_max = 0.1, 0.3
-        else:  # Mujer
-            if nivel_entrenamiento in ["principiante", "intermedio"]:
-                rango_pct_min, rango_pct_max = 0.1, 0.3
-            else:  # avanzado, élite
-                rango_pct_min, rango_pct_max = 0.05, 0.2
-        
-        explicacion = f"Como {sexo.lower()} con nivel {nivel_entrenamiento}, la ganancia muscular será gradual y sostenible. Los principiantes pueden ganar músculo más rápido que los avanzados."
-        
-    else:  # Mantenimiento
-        rango_pct_min, rango_pct_max = -0.1, 0.1
-        explicacion = f"En mantenimiento, el peso debe mantenerse estable con fluctuaciones menores del ±0.1% semanal debido a variaciones normales de hidratación y contenido intestinal."
-    
-    # Convertir porcentajes a kg
-    rango_kg_min = peso_actual * (rango_pct_min / 100)
-    rango_kg_max = peso_actual * (rango_pct_max / 100)
-    
-    # Proyección total 6 semanas
-    rango_total_min_6sem = rango_kg_min * 6
-    rango_total_max_6sem = rango_kg_max * 6
-    
-    return {
-        "rango_semanal_pct": (rango_pct_min, rango_pct_max),
-        "rango_semanal_kg": (rango_kg_min, rango_kg_max),
-        "rango_total_6sem_kg": (rango_total_min_6sem, rango_total_max_6sem),
-        "explicacion_textual": explicacion
-    }
-
-def calcular_macros_tradicional(ingesta_calorica_tradicional, tmb, sexo, grasa_corregida, peso, mlg):
-    """
-    Función centralizada para calcular macronutrientes del plan tradicional.
-    Garantiza consistencia en todos los cálculos (UI, email, reportes).
-    
-    Lógica de cálculo TRADICIONAL ADAPTABLE:
-    1. PROTEÍNA: Usar MLG si aplica regla 35/42, sino usar peso total
-       - Factor varía según % grasa: 1.6-2.2 g/kg
-    2. GRASA: SIEMPRE 40% del TMB (con restricciones 20-40% TEI)
-    3. CARBOHIDRATOS: Calorías restantes
-    
-    Args:
-        ingesta_calorica_tradicional: Calorías totales del plan tradicional
-        tmb: Tasa metabólica basal
-        sexo: "Hombre" o "Mujer"
-        grasa_corregida: % grasa corporal corregido
-        peso: Peso corporal en kg
-        mlg: Masa libre de grasa en kg
-    
-    Returns:
-        dict: {
-            'proteina_g': gramos de proteína,
-            'proteina_kcal': calorías de proteína,
-            'grasa_g': gramos de grasa,
-            'grasa_kcal': calorías de grasa,
-            'carbo_g': gramos de carbohidratos,
-            'carbo_kcal': calorías de carbohidratos,
-            'base_proteina': 'MLG' o 'Peso total',
-            'factor_proteina': factor usado para proteína
-        }
-    """
-    # 1. PROTEÍNA: Determinar base y calcular
-    usar_mlg = debe_usar_mlg_para_proteina(sexo, grasa_corregida)
-    base_proteina_kg = mlg if usar_mlg else peso
-    base_proteina_nombre = "MLG" if usar_mlg else "Peso total"
-    factor_proteina = obtener_factor_proteina_tradicional(grasa_corregida)
-    
-    proteina_g = round(base_proteina_kg * factor_proteina, 1)
-    proteina_kcal = proteina_g * 4
-    
-    # 2. GRASA: SIEMPRE 40% TMB con restricciones 20-40% TEI
-    grasa_min_kcal = ingesta_calorica_tradicional * 0.20  # Mínimo 20% TEI
-    grasa_max_kcal = ingesta_calorica_tradicional * 0.40  # Máximo 40% TEI
-    porcentaje_grasa_tmb = obtener_porcentaje_grasa_tmb_tradicional(grasa_corregida, sexo)
-    grasa_ideal_kcal = tmb * porcentaje_grasa_tmb  # 40% TMB
-    
-    # Aplicar restricciones
-    grasa_kcal = max(grasa_min_kcal, min(grasa_ideal_kcal, grasa_max_kcal))
-    grasa_g = round(grasa_kcal / 9, 1)
-    
-    # 3. CARBOHIDRATOS: Calorías restantes
-    carbo_kcal = ingesta_calorica_tradicional - proteina_kcal - grasa_kcal
-    carbo_g = round(max(0, carbo_kcal / 4), 1)
-    
-    return {
-        'proteina_g': proteina_g,
-        'proteina_kcal': proteina_kcal,
-        'grasa_g': grasa_g,
-        'grasa_kcal': grasa_kcal,
-        'carbo_g': carbo_g,
-        'carbo_kcal': carbo_kcal,
-        'base_proteina': base_proteina_nombre,
-        'base_proteina_kg': base_proteina_kg,
-        'factor_proteina': factor_proteina,
-        'usar_mlg': usar_mlg
-    }
-
-def calcular_macros_psmf(psmf_recs):
-    """
-    Función centralizada para calcular macronutrientes del plan PSMF.
-    Garantiza consistencia en todos los cálculos (UI, email, reportes).
-    
-    Los cálculos PSMF ya están centralizados en calculate_psmf(),
-    esta función simplemente extrae y formatea los resultados de forma consistente.
-    
-    Args:
-        psmf_recs: Diccionario retornado por calculate_psmf()
-    
-    Returns:
-        dict: {
-            'proteina_g': gramos de proteína,
-            'proteina_kcal': calorías de proteína,
-            'grasa_g': gramos de grasa,
-            'grasa_kcal': calorías de grasa,
-            'carbo_g': gramos de carbohidratos,
-            'carbo_kcal': calorías de carbohidratos,
-            'calorias_dia': calorías totales,
-            'aplicable': bool indicando si PSMF es aplicable
-        }
-    """
-    if not psmf_recs.get('psmf_aplicable', False):
-        return {
-            'proteina_g': 0,
-            'proteina_kcal': 0,
-            'grasa_g': 0,
-            'grasa_kcal': 0,
-            'carbo_g': 0,
-            'carbo_kcal': 0,
-            'calorias_dia': 0,
-            'aplicable': False
-        }
-    
-    proteina_g = psmf_recs.get('proteina_g_dia', 0)
-    grasa_g = psmf_recs.get('grasa_g_dia', 0)
-    carbo_g = psmf_recs.get('carbs_g_dia', 0)
-    
-    # Calcular calorías de cada macro
-    proteina_kcal = proteina_g * 4
-    grasa_kcal = grasa_g * 9
-    carbo_kcal = carbo_g * 4
-    
-    return {
-        'proteina_g': proteina_g,
-        'proteina_kcal': proteina_kcal,
-        'grasa_g': grasa_g,
-        'grasa_kcal': grasa_kcal,
-        'carbo_g': carbo_g,
-        'carbo_kcal': carbo_kcal,
-        'calorias_dia': psmf_recs.get('calorias_dia', 0),
-        'aplicable': True
-    }
-
-def obtener_porcentaje_para_proyeccion(plan_elegido, psmf_recs, GE, porcentaje):
-    """
-    Función centralizada para calcular el porcentaje correcto a usar en proyecciones,
-    garantizando sincronía perfecta entre todas las partes del código.
-    
-    Args:
-        plan_elegido: Plan seleccionado por el usuario
-        psmf_recs: Diccionario con recomendaciones PSMF
-        GE: Gasto energético total
-        porcentaje: Porcentaje tradicional calculado
-    
-    Returns:
-        float: Porcentaje correcto para usar en proyecciones
-    """
-    if plan_elegido and psmf_recs.get("psmf_aplicable") and "PSMF" in str(plan_elegido):
-        # Para PSMF, usar el déficit específico de PSMF
-        deficit_psmf_calc = int((1 - psmf_recs['calorias_dia']/GE) * 100) if GE > 0 else 40
-        return -deficit_psmf_calc  # Negativo para pérdida
-    else:
-        # Para plan tradicional, usar el porcentaje tradicional
-        return porcentaje if porcentaje is not None else 0
-
-def enviar_email_cliente(nombre_cliente, email_cliente, fecha, edad, sexo, peso, estatura, imc,
-                         grasa_corregida, mlg, ffmi=None, nivel_entrenamiento=None, 
-                         circunferencia_cintura=None, grasa_visceral=None, edad_metabolica=None,
-                         wthr=None, masa_grasa=None, progress_photos=None, masa_muscular_aparato=0, masa_muscular_estimada=0):
-    """
-    Envía email al cliente con resultados completos de evaluación corporal.
+    Las métricas llegan como nodos ya resueltos del grafo (nodos_email()), no
+    como argumentos sueltos que el llamador recalcula.
     
     Incluye:
-    - Datos personales básicos (incluye ciclo menstrual si aplica)
-    - Composición corporal completa
-    - Índices corporales (FFMI, WtHR, grasa visceral)
-    - Edad metabólica
-    - Nivel de entrenamiento
-    - Nivel de recuperación (sueño/estrés si disponible)
-    - Fotos de progreso
-    
-    NO incluye:
-    - Plan nutricional (macros/calorías) - cliente debe consultarte
-    - Proyección de progreso - cliente debe consultarte
-    - Ecuaciones científicas (TMB, cálculos GEAF, ETA, etc.)
-    - Metodología de cálculo
-    - Factores multiplicadores
-    """
-    try:
-        email_origen = "administracion@muscleupgym.fitness"
-        email_destino = email_cliente
-        password = st.secrets.get("zoho_password", "TU_PASSWORD_AQUI")
-        
-        # Cargar logos para emails
-        import base64
-        try:
-            with open('LOGO MUPAI.png', 'rb') as f:
-                logo_mupai_b64 = base64.b64encode(f.read()).decode()
-        except FileNotFoundError:
-            logo_mupai_b64 = ""
-        
-        try:
-            with open('LOGO MUP.png', 'rb') as f:
-                logo_gym_b64 = base64.b64encode(f.read()).decode()
-        except FileNotFoundError:
-            logo_gym_b64 = ""
-
-        # Calcular valores derivados
-        masa_grasa_calc = peso - mlg if masa_grasa is None else masa_grasa
-        pct_mlg = (mlg / peso * 100) if peso > 0 else 0
-        
-        # Calcular modo de interpretación FFMI
-        modo_ffmi_email = obtener_modo_interpretacion_ffmi(grasa_corregida, sexo)
-        
-        # Masa muscular: aparato viene como %, estimada como kg
-        # Convertir aparato de % a kg, y calcular % de estimada
-        masa_muscular_aparato_kg = (peso * masa_muscular_aparato / 100) if peso > 0 and masa_muscular_aparato > 0 else 0
-        pct_masa_muscular_aparato = masa_muscular_aparato  # Ya es porcentaje desde Omron
-        pct_masa_muscular_estimada = (masa_muscular_estimada / peso * 100) if peso > 0 and masa_muscular_estimada > 0 else 0
-        
-        # Clasificar WtHR si está disponible
-        wthr_clasificacion = ""
-        if wthr is not None:
-            if wthr < 0.40:
-                wthr_clasificacion = " - 🟢 Extremadamente delgado"
-            elif wthr < 0.50:
-                wthr_clasificacion = " - 🟢 Saludable"
-            elif wthr < 0.60:
-                wthr_clasificacion = " - 🟡 Sobrepeso"
-            else:
-                wthr_clasificacion = " - 🔴 Obesidad"
-        
-        # Clasificar grasa visceral si está disponible
-        grasa_visceral_clasificacion = ""
-        if grasa_visceral is not None:
-            if grasa_visceral < 10:
-                grasa_visceral_clasificacion = " - 🟢 Nivel saludable"
-            elif grasa_visceral < 15:
-                grasa_visceral_clasificacion = " - 🟡 Nivel elevado"
-            else:
-                grasa_visceral_clasificacion = " - 🔴 Nivel alto (riesgo)"
-        
-        # Categorizar grasa corporal con feedback detallado
-        if sexo == "Hombre":
-            if grasa_corregida < 6:
-                categoria_grasa = "Muy bajo (Competición)"
-                emoji_grasa = "⚠️"
-                feedback_grasa = "Nivel de competición. Difícil de mantener a largo plazo. Puede afectar hormonas y rendimiento."
-                rango_saludable = "Rango saludable: 12-18%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Hombres):</strong><br>
-                • 3-6%: Esencial (mínimo para sobrevivir)<br>
-                • 6-12%: Atlético/Competición (muy definido)<br>
-                • 12-18%: Fitness (saludable, estético)<br>
-                • 18-25%: Promedio aceptable<br>
-                • 25-30%: Sobrepeso (considerar reducir)<br>
-                • 30%+: Obesidad (riesgo metabólico alto)
-                """
-            elif grasa_corregida < 12:
-                categoria_grasa = "Atlético"
-                emoji_grasa = "💪"
-                feedback_grasa = "Excelente nivel. Buena definición muscular visible. Rendimiento deportivo óptimo."
-                rango_saludable = "Rango saludable: 12-18%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Hombres):</strong><br>
-                • 3-6%: Esencial (mínimo para sobrevivir)<br>
-                • <strong>6-12%: Atlético/Competición (muy definido) ← Tú estás aquí</strong><br>
-                • 12-18%: Fitness (saludable, estético)<br>
-                • 18-25%: Promedio aceptable<br>
-                • 25-30%: Sobrepeso (considerar reducir)<br>
-                • 30%+: Obesidad (riesgo metabólico alto)
-                """
-            elif grasa_corregida < 18:
-                categoria_grasa = "Fitness"
-                emoji_grasa = "🏃"
-                feedback_grasa = "Nivel fitness saludable. Buena relación salud-estética. Sostenible a largo plazo."
-                rango_saludable = "Rango saludable: 12-18%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Hombres):</strong><br>
-                • 3-6%: Esencial (mínimo para sobrevivir)<br>
-                • 6-12%: Atlético/Competición (muy definido)<br>
-                • <strong>12-18%: Fitness (saludable, estético) ← Tú estás aquí</strong><br>
-                • 18-25%: Promedio aceptable<br>
-                • 25-30%: Sobrepeso (considerar reducir)<br>
-                • 30%+: Obesidad (riesgo metabólico alto)
-                """
-            elif grasa_corregida < 25:
-                categoria_grasa = "Promedio"
-                emoji_grasa = "📊"
-                feedback_grasa = "Nivel promedio. Espacio para mejorar composición corporal con entrenamiento y nutrición."
-                rango_saludable = "Rango fitness: 12-18%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Hombres):</strong><br>
-                • 3-6%: Esencial (mínimo para sobrevivir)<br>
-                • 6-12%: Atlético/Competición (muy definido)<br>
-                • 12-18%: Fitness (saludable, estético)<br>
-                • <strong>18-25%: Promedio aceptable ← Tú estás aquí</strong><br>
-                • 25-30%: Sobrepeso (considerar reducir)<br>
-                • 30%+: Obesidad (riesgo metabólico alto)
-                """
-            elif grasa_corregida < 30:
-                categoria_grasa = "Sobrepeso"
-                emoji_grasa = "⚠️"
-                feedback_grasa = "Nivel de sobrepeso. Recomendable reducir para mejorar salud metabólica y reducir riesgos."
-                rango_saludable = "Rango fitness: 12-18%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Hombres):</strong><br>
-                • 3-6%: Esencial (mínimo para sobrevivir)<br>
-                • 6-12%: Atlético/Competición (muy definido)<br>
-                • 12-18%: Fitness (saludable, estético)<br>
-                • 18-25%: Promedio aceptable<br>
-                • <strong>25-30%: Sobrepeso (considerar reducir) ← Tú estás aquí</strong><br>
-                • 30%+: Obesidad (riesgo metabólico alto)
-                """
-            else:
-                categoria_grasa = "Obesidad"
-                emoji_grasa = "🚨"
-                feedback_grasa = "Nivel de obesidad. Alto riesgo metabólico. Urgente reducir con asesoría médica y nutricional."
-                rango_saludable = "Rango fitness: 12-18%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Hombres):</strong><br>
-                • 3-6%: Esencial (mínimo para sobrevivir)<br>
-                • 6-12%: Atlético/Competición (muy definido)<br>
-                • 12-18%: Fitness (saludable, estético)<br>
-                • 18-25%: Promedio aceptable<br>
-                • 25-30%: Sobrepeso (considerar reducir)<br>
-                • <strong>30%+: Obesidad (riesgo metabólico alto) ← Tú estás aquí</strong>
-                """
-        else:  # Mujer
-            if grasa_corregida < 12:
-                categoria_grasa = "Muy bajo (Competición)"
-                emoji_grasa = "⚠️"
-                feedback_grasa = "Nivel de competición. Muy difícil de mantener. Puede afectar ciclo menstrual y hormonas."
-                rango_saludable = "Rango saludable: 17-23%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Mujeres):</strong><br>
-                • 10-12%: Esencial (mínimo, puede afectar fertilidad)<br>
-                • 12-17%: Atlético/Competición (muy definido)<br>
-                • 17-23%: Fitness (saludable, estético)<br>
-                • 23-30%: Promedio aceptable<br>
-                • 30-35%: Sobrepeso (considerar reducir)<br>
-                • 35%+: Obesidad (riesgo metabólico alto)
-                """
-            elif grasa_corregida < 17:
-                categoria_grasa = "Atlético"
-                emoji_grasa = "💪"
-                feedback_grasa = "Excelente nivel atlético. Muy buena definición muscular. Rendimiento deportivo óptimo."
-                rango_saludable = "Rango saludable: 17-23%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Mujeres):</strong><br>
-                • 10-12%: Esencial (mínimo, puede afectar fertilidad)<br>
-                • <strong>12-17%: Atlético/Competición (muy definido) ← Tú estás aquí</strong><br>
-                • 17-23%: Fitness (saludable, estético)<br>
-                • 23-30%: Promedio aceptable<br>
-                • 30-35%: Sobrepeso (considerar reducir)<br>
-                • 35%+: Obesidad (riesgo metabólico alto)
-                """
-            elif grasa_corregida < 23:
-                categoria_grasa = "Fitness"
-                emoji_grasa = "🏃"
-                feedback_grasa = "Nivel fitness saludable. Buena relación salud-estética. Sostenible a largo plazo."
-                rango_saludable = "Rango saludable: 17-23%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Mujeres):</strong><br>
-                • 10-12%: Esencial (mínimo, puede afectar fertilidad)<br>
-                • 12-17%: Atlético/Competición (muy definido)<br>
-                • <strong>17-23%: Fitness (saludable, estético) ← Tú estás aquí</strong><br>
-                • 23-30%: Promedio aceptable<br>
-                • 30-35%: Sobrepeso (considerar reducir)<br>
-                • 35%+: Obesidad (riesgo metabólico alto)
-                """
-            elif grasa_corregida < 30:
-                categoria_grasa = "Promedio"
-                emoji_grasa = "📊"
-                feedback_grasa = "Nivel promedio. Espacio para mejorar composición corporal con entrenamiento y nutrición."
-                rango_saludable = "Rango fitness: 17-23%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Mujeres):</strong><br>
-                • 10-12%: Esencial (mínimo, puede afectar fertilidad)<br>
-                • 12-17%: Atlético/Competición (muy definido)<br>
-                • 17-23%: Fitness (saludable, estético)<br>
-                • <strong>23-30%: Promedio aceptable ← Tú estás aquí</strong><br>
-                • 30-35%: Sobrepeso (considerar reducir)<br>
-                • 35%+: Obesidad (riesgo metabólico alto)
-                """
-            elif grasa_corregida < 35:
-                categoria_grasa = "Sobrepeso"
-                emoji_grasa = "⚠️"
-                feedback_grasa = "Nivel de sobrepeso. Recomendable reducir para mejorar salud metabólica y reducir riesgos."
-                rango_saludable = "Rango fitness: 17-23%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Mujeres):</strong><br>
-                • 10-12%: Esencial (mínimo, puede afectar fertilidad)<br>
-                • 12-17%: Atlético/Competición (muy definido)<br>
-                • 17-23%: Fitness (saludable, estético)<br>
-                • 23-30%: Promedio aceptable<br>
-                • <strong>30-35%: Sobrepeso (considerar reducir) ← Tú estás aquí</strong><br>
-                • 35%+: Obesidad (riesgo metabólico alto)
-                """
-            else:
-                categoria_grasa = "Obesidad"
-                emoji_grasa = "🚨"
-                feedback_grasa = "Nivel de obesidad. Alto riesgo metabólico. Urgente reducir con asesoría médica y nutricional."
-                rango_saludable = "Rango fitness: 17-23%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Mujeres):</strong><br>
-                • 10-12%: Esencial (mínimo, puede afectar fertilidad)<br>
-                • 12-17%: Atlético/Competición (muy definido)<br>
-                • 17-23%: Fitness (saludable, estético)<br>
-                • 23-30%: Promedio aceptable<br>
-                • 30-35%: Sobrepeso (considerar reducir)<br>
-                • <strong>35%+: Obesidad (riesgo metabólico alto) ← Tú estás aquí</strong>
-                """
-        
-        # Feedback para FFMI si está disponible
-        feedback_ffmi = ""
-        rangos_ffmi = ""
-        if ffmi is not None:
-            if sexo == "Hombre":
-                if ffmi < 18:
-                    feedback_ffmi = "Por debajo del promedio. Potencial de ganancia muscular significativo con entrenamiento."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Hombres):</strong><br>
-                    • <strong>&lt;18: Por debajo del promedio ← Tú estás aquí</strong><br>
-                    • 18-20: Promedio (desarrollo natural normal)<br>
-                    • 20-22: Por encima del promedio (buen entrenamiento)<br>
-                    • 22-25: Excelente (años de entrenamiento)<br>
-                    • 25+: Elite/excepcional (límite natural ~25-26)
-                    """
-                elif ffmi < 20:
-                    feedback_ffmi = "Nivel promedio. Desarrollo muscular natural normal. Buen punto de partida."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Hombres):</strong><br>
-                    • &lt;18: Por debajo del promedio<br>
-                    • <strong>18-20: Promedio (desarrollo natural normal) ← Tú estás aquí</strong><br>
-                    • 20-22: Por encima del promedio (buen entrenamiento)<br>
-                    • 22-25: Excelente (años de entrenamiento)<br>
-                    • 25+: Elite/excepcional (límite natural ~25-26)
-                    """
-                elif ffmi < 22:
-                    feedback_ffmi = "Por encima del promedio. Buen desarrollo muscular. Nivel de entrenamiento intermedio-avanzado."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Hombres):</strong><br>
-                    • &lt;18: Por debajo del promedio<br>
-                    • 18-20: Promedio (desarrollo natural normal)<br>
-                    • <strong>20-22: Por encima del promedio (buen entrenamiento) ← Tú estás aquí</strong><br>
-                    • 22-25: Excelente (años de entrenamiento)<br>
-                    • 25+: Elite/excepcional (límite natural ~25-26)
-                    """
-                elif ffmi < 25:
-                    feedback_ffmi = "Excelente desarrollo. Nivel avanzado. Años de entrenamiento consistente."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Hombres):</strong><br>
-                    • &lt;18: Por debajo del promedio<br>
-                    • 18-20: Promedio (desarrollo natural normal)<br>
-                    • 20-22: Por encima del promedio (buen entrenamiento)<br>
-                    • <strong>22-25: Excelente (años de entrenamiento) ← Tú estás aquí</strong><br>
-                    • 25+: Elite/excepcional (límite natural ~25-26)
-                    """
-                else:
-                    feedback_ffmi = "Elite/excepcional. Desarrollo muscular muy avanzado. Genética favorable o entrenamiento de años."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Hombres):</strong><br>
-                    • &lt;18: Por debajo del promedio<br>
-                    • 18-20: Promedio (desarrollo natural normal)<br>
-                    • 20-22: Por encima del promedio (buen entrenamiento)<br>
-                    • 22-25: Excelente (años de entrenamiento)<br>
-                    • <strong>25+: Elite/excepcional (límite natural ~25-26) ← Tú estás aquí</strong>
-                    """
-            else:  # Mujer
-                if ffmi < 15:
-                    feedback_ffmi = "Por debajo del promedio. Potencial de ganancia muscular significativo con entrenamiento."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Mujeres):</strong><br>
-                    • <strong>&lt;15: Por debajo del promedio ← Tú estás aquí</strong><br>
-                    • 15-17: Promedio (desarrollo natural normal)<br>
-                    • 17-18: Por encima del promedio (buen entrenamiento)<br>
-                    • 18-20: Excelente (años de entrenamiento)<br>
-                    • 20+: Elite/excepcional (límite natural ~20-21)
-                    """
-                elif ffmi < 17:
-                    feedback_ffmi = "Nivel promedio. Desarrollo muscular natural normal. Buen punto de partida."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Mujeres):</strong><br>
-                    • &lt;15: Por debajo del promedio<br>
-                    • <strong>15-17: Promedio (desarrollo natural normal) ← Tú estás aquí</strong><br>
-                    • 17-18: Por encima del promedio (buen entrenamiento)<br>
-                    • 18-20: Excelente (años de entrenamiento)<br>
-                    • 20+: Elite/excepcional (límite natural ~20-21)
-                    """
-                elif ffmi < 18:
-                    feedback_ffmi = "Por encima del promedio. Buen desarrollo muscular. Nivel intermedio-avanzado."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Mujeres):</strong><br>
-                    • &lt;15: Por debajo del promedio<br>
-                    • 15-17: Promedio (desarrollo natural normal)<br>
-                    • <strong>17-18: Por encima del promedio (buen entrenamiento) ← Tú estás aquí</strong><br>
-                    • 18-20: Excelente (años de entrenamiento)<br>
-                    • 20+: Elite/excepcional (límite natural ~20-21)
-                    """
-                elif ffmi < 20:
-                    feedback_ffmi = "Excelente desarrollo. Nivel avanzado. Años de entrenamiento consistente."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Mujeres):</strong><br>
-                    • &lt;15: Por debajo del promedio<br>
-                    • 15-17: Promedio (desarrollo natural normal)<br>
-                    • 17-18: Por encima del promedio (buen entrenamiento)<br>
-                    • <strong>18-20: Excelente (años de entrenamiento) ← Tú estás aquí</strong><br>
-                    • 20+: Elite/excepcional (límite natural ~20-21)
-                    """
-                else:
-                    feedback_ffmi = "Elite/excepcional. Desarrollo muscular muy avanzado. Genética favorable o entrenamiento de años."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Mujeres):</strong><br>
-                    • &lt;15: Por debajo del promedio<br>
-                    • 15-17: Promedio (desarrollo natural normal)<br>
-                    • 17-18: Por encima del promedio (buen entrenamiento)<br>
-                    • 18-20: Excelente (años de entrenamiento)<br>
-                    • <strong>20+: Elite/excepcional (límite natural ~20-21) ← Tú estás aquí</strong>
-                    """
-        
-        # Feedback para IMC (Índice de Masa Corporal)
-        feedback_imc = ""
-        rangos_imc = ""
-        if imc < 16:
-            feedback_imc = "Delgadez severa. Por debajo del peso saludable. Considera consulta nutricional."
-            rangos_imc = """
-            <strong>Clasificación IMC (OMS):</strong><br>
-            • <strong>&lt;16: Delgadez severa ← Tú estás aquí</strong><br>
-            • 16-17: Delgadez moderada<br>
-            • 17-18.5: Delgadez leve<br>
-            • 18.5-25: Normopeso (saludable)<br>
-            • 25-30: Sobrepeso<br>
-            • 30-35: Obesidad grado I<br>
-            • 35-40: Obesidad grado II<br>
-            • 40+: Obesidad grado III (mórbida)
-            """
-        elif imc < 17:
-            feedback_imc = "Delgadez moderada. Por debajo del peso recomendado. Evalúa aumentar masa muscular."
-            rangos_imc = """
-            <strong>Clasificación IMC (OMS):</strong><br>
-            • &lt;16: Delgadez severa<br>
-            • <strong>16-17: Delgadez moderada ← Tú estás aquí</strong><br>
-            • 17-18.5: Delgadez leve<br>
-            • 18.5-25: Normopeso (saludable)<br>
-            • 25-30: Sobrepeso<br>
-            • 30-35: Obesidad grado I<br>
-            • 35-40: Obesidad grado II<br>
-            • 40+: Obesidad grado III (mórbida)
-            """
-        elif imc < 18.5:
-            feedback_imc = "Delgadez leve. Cerca del rango saludable. Considera ganar masa muscular."
-            rangos_imc = """
-            <strong>Clasificación IMC (OMS):</strong><br>
-            • &lt;16: Delgadez severa<br>
-            • 16-17: Delgadez moderada<br>
-            • <strong>17-18.5: Delgadez leve ← Tú estás aquí</strong><br>
-            • 18.5-25: Normopeso (saludable)<br>
-            • 25-30: Sobrepeso<br>
-            • 30-35: Obesidad grado I<br>
-            • 35-40: Obesidad grado II<br>
-            • 40+: Obesidad grado III (mórbida)
-            """
-        elif imc < 25:
-            feedback_imc = "¡Excelente! Normopeso. Rango saludable según OMS. Mantén buenos hábitos."
-            rangos_imc = """
-            <strong>Clasificación IMC (OMS):</strong><br>
-            • &lt;16: Delgadez severa<br>
-            • 16-17: Delgadez moderada<br>
-            • 17-18.5: Delgadez leve<br>
-            • <strong>18.5-25: Normopeso (saludable) ← Tú estás aquí</strong><br>
-            • 25-30: Sobrepeso<br>
-            • 30-35: Obesidad grado I<br>
-            • 35-40: Obesidad grado II<br>
-            • 40+: Obesidad grado III (mórbida)
-            """
-        elif imc < 30:
-            feedback_imc = "Sobrepeso. Riesgo moderado de complicaciones metabólicas. Beneficio de reducir grasa."
-            rangos_imc = """
-            <strong>Clasificación IMC (OMS):</strong><br>
-            • &lt;16: Delgadez severa<br>
-            • 16-17: Delgadez moderada<br>
-            • 17-18.5: Delgadez leve<br>
-            • 18.5-25: Normopeso (saludable)<br>
-            • <strong>25-30: Sobrepeso ← Tú estás aquí</strong><br>
-            • 30-35: Obesidad grado I<br>
-            • 35-40: Obesidad grado II<br>
-            • 40+: Obesidad grado III (mórbida)
-            """
-        elif imc < 35:
-            feedback_imc = "Obesidad grado I. Riesgo incrementado. Importante reducir grasa corporal para salud."
-            rangos_imc = """
-            <strong>Clasificación IMC (OMS):</strong><br>
-            • &lt;16: Delgadez severa<br>
-            • 16-17: Delgadez moderada<br>
-            • 17-18.5: Delgadez leve<br>
-            • 18.5-25: Normopeso (saludable)<br>
-            • 25-30: Sobrepeso<br>
-            • <strong>30-35: Obesidad grado I ← Tú estás aquí</strong><br>
-            • 35-40: Obesidad grado II<br>
-            • 40+: Obesidad grado III (mórbida)
-            """
-        elif imc < 40:
-            feedback_imc = "Obesidad grado II (severa). Alto riesgo. Prioritario trabajar en reducción de peso."
-            rangos_imc = """
-            <strong>Clasificación IMC (OMS):</strong><br>
-            • &lt;16: Delgadez severa<br>
-            • 16-17: Delgadez moderada<br>
-            • 17-18.5: Delgadez leve<br>
-            • 18.5-25: Normopeso (saludable)<br>
-            • 25-30: Sobrepeso<br>
-            • 30-35: Obesidad grado I<br>
-            • <strong>35-40: Obesidad grado II ← Tú estás aquí</strong><br>
-            • 40+: Obesidad grado III (mórbida)
-            """
-        else:
-            feedback_imc = "Obesidad grado III (mórbida). Riesgo muy alto. Urgente intervención médica y nutricional."
-            rangos_imc = """
-            <strong>Clasificación IMC (OMS):</strong><br>
-            • &lt;16: Delgadez severa<br>
-            • 16-17: Delgadez moderada<br>
-            • 17-18.5: Delgadez leve<br>
-            • 18.5-25: Normopeso (saludable)<br>
-            • 25-30: Sobrepeso<br>
-            • 30-35: Obesidad grado I<br>
-            • 35-40: Obesidad grado II<br>
-            • <strong>40+: Obesidad grado III (mórbida) ← Tú estás aquí</strong>
-            """
-        
-        # Feedback para edad metabólica
-        feedback_edad_metabolica = ""
-        rangos_edad_metabolica = ""
-        if edad_metabolica is not None:
-            diff_edad = edad - edad_metabolica
-            if diff_edad > 5:
-                feedback_edad_metabolica = "¡Excelente! Tu metabolismo está significativamente más joven. Refleja buenos hábitos y composición corporal saludable."
-                rangos_edad_metabolica = """
-                <strong>Interpretación Edad Metabólica:</strong><br>
-                • <strong>Tu edad real - metabólica = {diff:.0f} años (Excelente) ← Tú estás aquí</strong><br>
-                • Más de 5 años menor: Metabolismo juvenil, salud óptima<br>
-                • 1-5 años menor: Buen estado, por encima del promedio<br>
-                • Igual: Normal, hay espacio para mejorar<br>
-                • 1-5 años mayor: Atención, prioriza mejorar composición<br>
-                • Más de 5 años mayor: Urgente optimizar estilo de vida
-                """.format(diff=diff_edad)
-            elif diff_edad > 0:
-                feedback_edad_metabolica = "Bien. Tu metabolismo es ligeramente más joven. Continúa con buenos hábitos de entrenamiento y nutrición."
-                rangos_edad_metabolica = """
-                <strong>Interpretación Edad Metabólica:</strong><br>
-                • Más de 5 años menor: Metabolismo juvenil, salud óptima<br>
-                • <strong>1-5 años menor: Buen estado, por encima del promedio ← Tú estás aquí ({diff:.0f} años)</strong><br>
-                • Igual: Normal, hay espacio para mejorar<br>
-                • 1-5 años mayor: Atención, prioriza mejorar composición<br>
-                • Más de 5 años mayor: Urgente optimizar estilo de vida
-                """.format(diff=diff_edad)
-            elif diff_edad == 0:
-                feedback_edad_metabolica = "Tu edad metabólica coincide con tu edad cronológica. Hay espacio para mejorar con ejercicio y nutrición."
-                rangos_edad_metabolica = """
-                <strong>Interpretación Edad Metabólica:</strong><br>
-                • Más de 5 años menor: Metabolismo juvenil, salud óptima<br>
-                • 1-5 años menor: Buen estado, por encima del promedio<br>
-                • <strong>Igual: Normal, hay espacio para mejorar ← Tú estás aquí</strong><br>
-                • 1-5 años mayor: Atención, prioriza mejorar composición<br>
-                • Más de 5 años mayor: Urgente optimizar estilo de vida
-                """
-            elif diff_edad > -5:
-                feedback_edad_metabolica = "Tu metabolismo está ligeramente envejecido. Mejorar composición corporal ayudará a revertir esto."
-                rangos_edad_metabolica = """
-                <strong>Interpretación Edad Metabólica:</strong><br>
-                • Más de 5 años menor: Metabolismo juvenil, salud óptima<br>
-                • 1-5 años menor: Buen estado, por encima del promedio<br>
-                • Igual: Normal, hay espacio para mejorar<br>
-                • <strong>1-5 años mayor: Atención, prioriza mejorar composición ← Tú estás aquí ({diff:.0f} años)</strong><br>
-                • Más de 5 años mayor: Urgente optimizar estilo de vida
-                """.format(diff=abs(diff_edad))
-            else:
-                feedback_edad_metabolica = "Atención: metabolismo envejecido. Prioriza mejorar composición corporal, ejercicio y hábitos de sueño."
-                rangos_edad_metabolica = """
-                <strong>Interpretación Edad Metabólica:</strong><br>
-                • Más de 5 años menor: Metabolismo juvenil, salud óptima<br>
-                • 1-5 años menor: Buen estado, por encima del promedio<br>
-                • Igual: Normal, hay espacio para mejorar<br>
-                • 1-5 años mayor: Atención, prioriza mejorar composición<br>
-                • <strong>Más de 5 años mayor: Urgente optimizar estilo de vida ← Tú estás aquí ({diff:.0f} años)</strong>
-                """.format(diff=abs(diff_edad))
-        
-        # Feedback para WtHR
-        feedback_wthr = ""
-        rangos_wthr = ""
-        if wthr is not None:
-            if wthr < 0.40:
-                feedback_wthr = "Extremadamente delgado. Considera si es saludable para ti."
-                rangos_wthr = """
-                <strong>Rangos WtHR (Waist-to-Height Ratio):</strong><br>
-                • <strong>&lt;0.40: Muy delgado/Atlético ← Tú estás aquí</strong><br>
-                • 0.40-0.50: Saludable (riesgo CVD bajo)<br>
-                • 0.50-0.60: Sobrepeso (riesgo CVD incrementado)<br>
-                • 0.60+: Obesidad central (riesgo CVD alto)<br><br>
-                <em>CVD = Enfermedad cardiovascular. Recomendación general: mantener WtHR &lt;0.50</em>
-                """
-            elif wthr < 0.50:
-                feedback_wthr = "¡Excelente! Rango saludable. Bajo riesgo cardiovascular y metabólico."
-                rangos_wthr = """
-                <strong>Rangos WtHR (Waist-to-Height Ratio):</strong><br>
-                • &lt;0.40: Muy delgado/Atlético<br>
-                • <strong>0.40-0.50: Saludable (riesgo CVD bajo) ← Tú estás aquí</strong><br>
-                • 0.50-0.60: Sobrepeso (riesgo CVD incrementado)<br>
-                • 0.60+: Obesidad central (riesgo CVD alto)<br><br>
-                <em>CVD = Enfermedad cardiovascular. Recomendación general: mantener WtHR &lt;0.50</em>
-                """
-            elif wthr < 0.60:
-                feedback_wthr = "Atención: sobrepeso. Riesgo moderado. Reducir cintura mejorará salud metabólica."
-                rangos_wthr = """
-                <strong>Rangos WtHR (Waist-to-Height Ratio):</strong><br>
-                • &lt;0.40: Muy delgado/Atlético<br>
-                • 0.40-0.50: Saludable (riesgo CVD bajo)<br>
-                • <strong>0.50-0.60: Sobrepeso (riesgo CVD incrementado) ← Tú estás aquí</strong><br>
-                • 0.60+: Obesidad central (riesgo CVD alto)<br><br>
-                <em>CVD = Enfermedad cardiovascular. Recomendación general: mantener WtHR &lt;0.50</em>
-                """
-            else:
-                feedback_wthr = "Alerta: obesidad central. Alto riesgo cardiovascular. Prioriza reducir grasa abdominal."
-                rangos_wthr = """
-                <strong>Rangos WtHR (Waist-to-Height Ratio):</strong><br>
-                • &lt;0.40: Muy delgado/Atlético<br>
-                • 0.40-0.50: Saludable (riesgo CVD bajo)<br>
-                • 0.50-0.60: Sobrepeso (riesgo CVD incrementado)<br>
-                • <strong>0.60+: Obesidad central (riesgo CVD alto) ← Tú estás aquí</strong><br><br>
-                <em>CVD = Enfermedad cardiovascular. Recomendación general: mantener WtHR &lt;0.50</em>
-                """
-        
-        # Feedback para grasa visceral
-        feedback_visceral = ""
-        if grasa_visceral is not None:
-            if grasa_visceral < 10:
-                feedback_visceral = "¡Perfecto! Nivel saludable. La grasa visceral es la más peligrosa y la tuya está bien controlada."
-                info_visceral = "Nivel 1-9 = Saludable. Bajo riesgo de diabetes tipo 2, enfermedades cardíacas y síndrome metabólico."
-            elif grasa_visceral < 15:
-                feedback_visceral = "Atención: nivel elevado. Considera reducirlo con ejercicio cardiovascular y dieta antiinflamatoria."
-                info_visceral = "Nivel 10-14 = Elevado. Riesgo moderado. Prioriza ejercicio aeróbico y reducir calorías."
-            else:
-                feedback_visceral = "Alerta: nivel alto. Aumenta riesgo de diabetes, enfermedades cardíacas. Prioriza reducirlo urgentemente."
-                info_visceral = "Nivel 15+ = Alto riesgo. Requiere atención inmediata. La grasa visceral rodea órganos internos."
-        
-        # Feedback para masa muscular (priorizar aparato, fallback a estimada)
-        masa_muscular_para_feedback = masa_muscular_aparato if masa_muscular_aparato > 0 else masa_muscular_estimada
-        pct_masa_muscular_para_feedback = pct_masa_muscular_aparato if pct_masa_muscular_aparato > 0 else pct_masa_muscular_estimada
-        
-        feedback_masa_muscular = ""
-        if masa_muscular_para_feedback > 0 and pct_masa_muscular_para_feedback > 0:
-            if sexo == "Hombre":
-                if pct_masa_muscular_para_feedback < 33:
-                    feedback_masa_muscular = "Bajo. Potencial significativo de ganancia muscular con entrenamiento de fuerza."
-                    rango_masa_muscular = "Rango objetivo: 38-44%"
-                elif pct_masa_muscular_para_feedback < 38:
-                    feedback_masa_muscular = "Por debajo del promedio. Responderás bien al entrenamiento de fuerza."
-                    rango_masa_muscular = "Rango objetivo: 38-44%"
-                elif pct_masa_muscular_para_feedback < 44:
-                    feedback_masa_muscular = "Promedio saludable. Buen punto de partida para desarrollo muscular."
-                    rango_masa_muscular = "Rango objetivo: 38-44%"
-                elif pct_masa_muscular_para_feedback < 50:
-                    feedback_masa_muscular = "Por encima del promedio. Buen desarrollo muscular. Sigue con entrenamiento consistente."
-                    rango_masa_muscular = "Rango objetivo: 38-44%"
-                else:
-                    feedback_masa_muscular = "Excelente. Desarrollo muscular avanzado. Mantén con entrenamiento y nutrición óptimos."
-                    rango_masa_muscular = "Rango objetivo: 38-44%"
-            else:  # Mujer
-                if pct_masa_muscular_para_feedback < 28:
-                    feedback_masa_muscular = "Bajo. Gran potencial de ganancia muscular con entrenamiento de fuerza."
-                    rango_masa_muscular = "Rango objetivo: 31-37%"
-                elif pct_masa_muscular_para_feedback < 31:
-                    feedback_masa_muscular = "Por debajo del promedio. Responderás bien al entrenamiento de fuerza."
-                    rango_masa_muscular = "Rango objetivo: 31-37%"
-                elif pct_masa_muscular_para_feedback < 35:
-                    feedback_masa_muscular = "Promedio saludable. Buen punto de partida para desarrollo muscular."
-                    rango_masa_muscular = "Rango objetivo: 31-37%"
-                elif pct_masa_muscular_para_feedback < 40:
-                    feedback_masa_muscular = "Por encima del promedio. Buen desarrollo muscular. Sigue así."
-                    rango_masa_muscular = "Rango objetivo: 31-37%"
-                else:
-                    feedback_masa_muscular = "Excelente. Desarrollo muscular avanzado. Mantén con entrenamiento y nutrición óptimos."
-                    rango_masa_muscular = "Rango objetivo: 31-37%"
-        else:
-            feedback_masa_muscular = "No hay suficientes datos para evaluar masa muscular."
-            rango_masa_muscular = ""
-        
-        # Feedback para nivel de entrenamiento
-        feedback_nivel = ""
-        if nivel_entrenamiento:
-            if nivel_entrenamiento.lower() == 'principiante':
-                feedback_nivel = "Inicio del viaje. Gran potencial de mejora. Enfócate en aprender técnica y crear hábitos consistentes."
-            elif nivel_entrenamiento.lower() == 'intermedio':
-                feedback_nivel = "Nivel sólido. Ya tienes base. Enfócate en periodización, progresión e intensidad para seguir avanzando."
-            elif nivel_entrenamiento.lower() == 'avanzado':
-                feedback_nivel = "Nivel avanzado. Años de entrenamiento. Necesitas programación muy específica y recuperación óptima."
-            else:
-                feedback_nivel = "Tu nivel refleja tu experiencia, desarrollo muscular y capacidad funcional actual."
-        
-        # Obtener datos de ciclo menstrual si aplica
-        ciclo_menstrual_info = ""
-        if sexo == "Mujer":
-            ciclo = st.session_state.get('ciclo_menstrual', None)
-            if ciclo:
-                ciclo_menstrual_info = f"\n   • Fase del ciclo menstrual: {ciclo}"
-        
-        # Obtener datos de sueño y estrés si están disponibles
-        seccion_recuperacion = ""
-        if st.session_state.get('suenyo_estres_completado', False):
-            data_se = st.session_state.get('suenyo_estres_data', {})
-            if data_se and 'ir_se' in data_se:
-                ir_se = data_se.get('ir_se', 0)
-                nivel_recup = data_se.get('nivel_recuperacion', 'No determinado')
-                emoji_recup = data_se.get('emoji_nivel', '')
-                
-                seccion_recuperacion = f"""
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-😴 ESTADO DE RECUPERACIÓN (SUEÑO + ESTRÉS)
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-   ╔════════════════════════════════════════════════════════════════╗
-   ║  ÍNDICE DE RECUPERACIÓN (IR-SE): {ir_se:.1f}/100                   ║
-   ║  NIVEL: {nivel_recup} {emoji_recup}                                      ║
-   ╚════════════════════════════════════════════════════════════════╝
-
-   • Calidad de sueño: {data_se.get('sleep_score', 0):.1f}/100
-   • Nivel de estrés: {data_se.get('stress_score', 0):.1f}/100
-   
-   💡 Este índice refleja tu capacidad de recuperación y adaptación al
-      entrenamiento. Valores bajos pueden limitar tu progreso.
-"""
-
-        contenido = f"""
-╔═══════════════════════════════════════════════════════════════════════════════╗
-║                   REPORTE DE EVALUACIÓN CORPORAL                              ║
-╠═══════════════════════════════════════════════════════════════════════════════╣
-║  Muscle Up Performance Assessment Intelligence                               ║
-║  {datetime.now().strftime("%Y-%m-%d")}                                                              ║
-╚═══════════════════════════════════════════════════════════════════════════════╝
-
-Hola {nombre_cliente},
-
-¡Gracias por confiar en nosotros para tu evaluación! Aquí están los resultados
-completos de tu análisis de composición corporal y rendimiento.
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📊 DATOS DE EVALUACIÓN
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-👤 IDENTIFICACIÓN:
-   • Nombre: {nombre_cliente}
-   • Edad: {edad} años
-   • Sexo: {sexo}
-   • Fecha de evaluación: {fecha}{ciclo_menstrual_info}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📐 COMPOSICIÓN CORPORAL
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-📏 MEDIDAS BÁSICAS:
-   
-   ╔════════════════════════════════════════════════════════════════╗
-   ║  Peso corporal:         {peso:.1f} kg                              ║
-   ║  Estatura:              {estatura:.1f} cm                           ║
-   ║  IMC:                   {imc:.1f} kg/m²                         ║
-   ╚════════════════════════════════════════════════════════════════╝
-
-📊 ANÁLISIS DE TEJIDOS:
-
-   ╔════════════════════════════════════════════════════════════════╗
-   ║  % Grasa corporal:      {grasa_corregida:.1f}% {emoji_grasa}                        ║
-   ║  Categoría:             {categoria_grasa}                  ║
-   ║                                                                ║
-   ║  Masa Grasa:            {masa_grasa_calc:.1f} kg                            ║
-   ║  Masa Libre de Grasa (MLG): {mlg:.1f} kg ({pct_mlg:.1f}%)              ║
-   ╚════════════════════════════════════════════════════════════════╝
-   
-   💪 MASA MUSCULAR ESQUELÉTICA:
-   {f'   🔵 Omron (medido):      {masa_muscular_aparato_kg:.1f} kg ({pct_masa_muscular_aparato:.1f}%)' if masa_muscular_aparato > 0 else ''}
-   🟣 Estimado científico: {masa_muscular_estimada:.1f} kg ({pct_masa_muscular_estimada:.1f}%)
-   
-   📝 Nota: Omron mide directamente; estimado se calcula desde MLG.
-      Si difieren >15%, puede ser por hidratación o método.
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📈 ÍNDICES CORPORALES
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-💪 FFMI (Índice de Masa Libre de Grasa):
-   • Valor: {ffmi:.1f} {'(dato no disponible)' if ffmi is None else ''}
-   • Indicador: Desarrollo muscular ajustado por altura
-   
-⚕️ ÍNDICES DE SALUD:"""
-
-        # Agregar circunferencia de cintura y WtHR si están disponibles
-        if circunferencia_cintura is not None:
-            contenido += f"""
-   • Circunferencia de cintura: {circunferencia_cintura} cm"""
-        
-        if wthr is not None:
-            contenido += f"""
-   • Ratio Cintura-Altura (WtHR): {wthr:.3f}{wthr_clasificacion}"""
-        
-        if grasa_visceral is not None:
-            contenido += f"""
-   • Grasa visceral: Nivel {grasa_visceral}{grasa_visceral_clasificacion}"""
-        
-        if edad_metabolica is not None:
-            contenido += f"""
-
-🧬 EDAD METABÓLICA:
-   • Edad cronológica: {edad} años
-   • Edad metabólica: {edad_metabolica} años
-   • {'✅ Tu metabolismo es ' + str(edad - edad_metabolica) + ' años más joven' if edad_metabolica < edad else '⚠️ Tu metabolismo está ' + str(edad_metabolica - edad) + ' años por encima' if edad_metabolica > edad else '📊 Tu edad metabólica coincide con tu edad'}"""
-
-        # Agregar nivel de entrenamiento si está disponible
-        if nivel_entrenamiento:
-            contenido += f"""
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-💪 NIVEL DE ENTRENAMIENTO
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-   ╔════════════════════════════════════════════════════════════════╗
-   ║  NIVEL: {nivel_entrenamiento.upper()}                                       ║
-   ╚════════════════════════════════════════════════════════════════╝
-   
-   Este nivel se calcula evaluando tu desarrollo muscular, rendimiento
-   funcional y experiencia de entrenamiento."""
-
-        # Agregar sección de recuperación si está disponible
-        contenido += seccion_recuperacion
-
-        contenido += f"""
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📸 FOTOGRAFÍAS DE PROGRESO
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-Las fotografías de tu evaluación están adjuntas a este correo para tu registro.
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📱 PRÓXIMOS PASOS
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-Tu coach se pondrá en contacto contigo para:
-
-   ✅ Revisar en detalle tus resultados
-   ✅ Diseñar tu plan nutricional personalizado
-   ✅ Establecer objetivos específicos y proyecciones
-   ✅ Programar tu seguimiento y ajustes
-
-Si tienes alguna pregunta o inquietud, no dudes en contactarnos.
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-Muscle Up GYM
-Digital Training Science
-muscleupgym.fitness
-administracion@muscleupgym.fitness
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-"""
-
-        msg = MIMEMultipart('alternative')
-        msg['From'] = email_origen
-        msg['To'] = email_destino
-        msg['Subject'] = f"Resultados de tu Evaluación Corporal - {nombre_cliente}"
-
-        # Convertir contenido a HTML profesional
-        contenido_html = f"""
-<!DOCTYPE html>
-<html lang="es">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <style>
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-            line-height: 1.6;
-            color: #333333;
-            background-color: #f5f5f5;
-            margin: 0;
-            padding: 0;
-        }}
-        .container {{
-            max-width: 600px;
-            margin: 20px auto;
-            background-color: #ffffff;
-            border-radius: 10px;
-            overflow: hidden;
-            box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        }}
-        .header {{
-            background: linear-gradient(135deg, #1a1a1a 0%, #2d2d2d 100%);
-            color: #FFD700;
-            padding: 30px 20px;
-            text-align: center;
-            position: relative;
-        }}
-        .header-logos {{
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 20px;
-            padding: 0 20px;
-        }}
-        .header-logo {{
-            max-height: 60px;
-            max-width: 150px;
-            object-fit: contain;
-        }}
-        .header h1 {{
-            margin: 0;
-            font-size: 24px;
-            font-weight: 600;
-        }}
-        .header p {{
-            margin: 10px 0 0 0;
-            color: #cccccc;
-            font-size: 14px;
-        }}
-        .content {{
-            padding: 30px 20px;
-        }}
-        .section {{
-            margin-bottom: 30px;
-        }}
-        .section-title {{
-            background: linear-gradient(90deg, #FFD700 0%, #FFA500 100%);
-            color: #1a1a1a;
-            padding: 12px 15px;
-            margin: 0 -20px 20px -20px;
-            font-size: 18px;
-            font-weight: 600;
-            border-left: 5px solid #FF8C00;
-        }}
-        .info-row {{
-            display: table;
-            width: 100%;
-            margin-bottom: 10px;
-        }}
-        .info-label {{
-            font-weight: 600;
-            color: #555555;
-            margin-right: 10px;
-        }}
-        .info-value {{
-            color: #1a1a1a;
-        }}
-        .card {{
-            background-color: #f9f9f9;
-            border-left: 4px solid #FFD700;
-            padding: 15px;
-            margin-bottom: 15px;
-            border-radius: 5px;
-        }}
-        .card-highlight {{
-            background: linear-gradient(135deg, #FFD700 0%, #FFA500 100%);
-            color: #1a1a1a;
-            padding: 20px;
-            text-align: center;
-            border-radius: 8px;
-            margin-bottom: 15px;
-            font-weight: 600;
-            font-size: 18px;
-        }}
-        .metric-grid {{
-            display: table;
-            width: 100%;
-            border-collapse: collapse;
-        }}
-        .metric-row {{
-            display: table-row;
-        }}
-        .metric-cell {{
-            display: table-cell;
-            padding: 12px;
-            border-bottom: 1px solid #e0e0e0;
-            vertical-align: middle;
-        }}
-        .metric-label {{
-            font-weight: 600;
-            color: #555555;
-            width: 50%;
-        }}
-        .metric-value {{
-            color: #1a1a1a;
-            font-size: 16px;
-            text-align: right;
-        }}
-        .badge {{
-            display: inline-block;
-            padding: 4px 12px;
-            border-radius: 20px;
-            font-size: 14px;
-            font-weight: 600;
-            margin-left: 10px;
-        }}
-        .badge-green {{
-            background-color: #27AE60;
-            color: white;
-        }}
-        .badge-yellow {{
-            background-color: #F39C12;
-            color: white;
-        }}
-        .badge-red {{
-            background-color: #E74C3C;
-            color: white;
-        }}
-        .badge-blue {{
-            background-color: #3498DB;
-            color: white;
-        }}
-        .index-card {{
-            background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
-            border: 2px solid #FFD700;
-            border-radius: 8px;
-            padding: 20px;
-            margin-bottom: 15px;
-            text-align: center;
-        }}
-        .index-value {{
-            font-size: 32px;
-            font-weight: 700;
-            color: #1a1a1a;
-            margin: 10px 0;
-        }}
-        .index-label {{
-            font-size: 14px;
-            color: #555555;
-            margin-bottom: 5px;
-        }}
-        .cta-box {{
-            background-color: #f0f8ff;
-            border: 2px solid #3498DB;
-            border-radius: 8px;
-            padding: 20px;
-            margin: 20px 0;
-        }}
-        .cta-title {{
-            color: #3498DB;
-            font-size: 18px;
-            font-weight: 600;
-            margin-bottom: 15px;
-        }}
-        .cta-list {{
-            list-style: none;
-            padding: 0;
-            margin: 0;
-        }}
-        .cta-list li {{
-            padding: 8px 0 8px 30px;
-            position: relative;
-        }}
-        .cta-list li:before {{
-            content: "✅";
-            position: absolute;
-            left: 0;
-        }}
-        .footer {{
-            background-color: #1a1a1a;
-            color: #cccccc;
-            padding: 30px 20px;
-            text-align: center;
-            font-size: 14px;
-        }}
-        .footer-logos {{
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            gap: 40px;
-            margin-bottom: 20px;
-        }}
-        .footer-logo {{
-            max-height: 50px;
-            max-width: 120px;
-            object-fit: contain;
-            opacity: 0.9;
-        }}
-        .footer a {{
-            color: #FFD700;
-            text-decoration: none;
-        }}
-        @media only screen and (max-width: 600px) {{
-            .container {{
-                margin: 0;
-                border-radius: 0;
-            }}
-            .content {{
-                padding: 20px 15px;
-            }}
-            .section-title {{
-                font-size: 16px;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <div class="header-logos">
-                <img src="data:image/png;base64,{logo_mupai_b64}" alt="MUPAI Logo" class="header-logo" />
-                <img src="data:image/png;base64,{logo_gym_b64}" alt="Muscle Up GYM Logo" class="header-logo" />
-            </div>
-            <h1>REPORTE DE EVALUACIÓN CORPORAL</h1>
-            <p>Muscle Up Performance Assessment Intelligence</p>
-            <p>{datetime.now().strftime("%d de %B, %Y")}</p>
-        </div>
-        
-        <div class="content">
-            <p style="font-size: 16px; color: #555;">Hola <strong>{nombre_cliente}</strong>,</p>
-            <p style="font-size: 14px; color: #666; margin-bottom: 30px;">
-                ¡Gracias por confiar en nosotros para tu evaluación! Aquí están los resultados 
-                completos de tu análisis de composición corporal y rendimiento.
-            </p>
-            
-            <!-- DATOS DE EVALUACIÓN -->
-            <div class="section">
-                <div class="section-title">📊 Datos de Evaluación</div>
-                <div class="card">
-                    <div class="metric-grid">
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">Nombre</div>
-                            <div class="metric-cell metric-value">{nombre_cliente}</div>
-                        </div>
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">Edad</div>
-                            <div class="metric-cell metric-value">{edad} años</div>
-                        </div>
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">Sexo</div>
-                            <div class="metric-cell metric-value">{sexo}</div>
-                        </div>
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">Fecha de evaluación</div>
-                            <div class="metric-cell metric-value">{fecha}</div>
-                        </div>
-                        {f'''<div class="metric-row">
-                            <div class="metric-cell metric-label">Fase del ciclo</div>
-                            <div class="metric-cell metric-value">{st.session_state.get('ciclo_menstrual', '')}</div>
-                        </div>''' if sexo == "Mujer" and st.session_state.get('ciclo_menstrual') else ''}
-                    </div>
-                </div>
-            </div>
-            
-            <!-- COMPOSICIÓN CORPORAL -->
-            <div class="section">
-                <div class="section-title">📐 Composición Corporal</div>
-                
-                <div class="card">
-                    <h4 style="margin-top: 0; color: #555;">Medidas Básicas</h4>
-                    <div class="metric-grid">
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">Peso corporal</div>
-                            <div class="metric-cell metric-value"><strong>{peso:.1f} kg</strong></div>
-                        </div>
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">Estatura</div>
-                            <div class="metric-cell metric-value"><strong>{estatura:.1f} cm</strong></div>
-                        </div>
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">IMC</div>
-                            <div class="metric-cell metric-value"><strong>{imc:.1f} kg/m²</strong></div>
-                        </div>
-                    </div>
-                    <div style="margin-top: 15px; padding: 12px; background-color: #e3f2fd; border-radius: 5px; border-left: 4px solid #3498DB;">
-                        <p style="margin: 0 0 8px 0; font-size: 13px; color: #666; font-weight: 600;">📊 Sobre tu IMC:</p>
-                        <p style="margin: 0 0 8px 0; font-size: 13px; color: #444;">{feedback_imc}</p>
-                        <p style="margin: 0; font-size: 12px; color: #888; line-height: 1.6;">{rangos_imc}</p>
-                    </div>
-                </div>
-                
-                <div class="card">
-                    <h4 style="margin-top: 0; color: #555;">Análisis de Tejidos</h4>
-                    <div class="metric-grid">
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">% Grasa corporal</div>
-                            <div class="metric-cell metric-value">
-                                <strong>{grasa_corregida:.1f}%</strong>
-                                <span class="badge badge-{('green' if emoji_grasa == '💪' else 'yellow' if emoji_grasa == '🏃' else 'blue' if emoji_grasa == '📊' else 'red')}">{categoria_grasa}</span>
-                            </div>
-                        </div>
-                    </div>
-                    <div style="margin-top: 15px; padding: 12px; background-color: #f8f9fa; border-radius: 5px; border-left: 4px solid #FFD700;">
-                        <p style="margin: 0 0 8px 0; font-size: 13px; color: #666; font-weight: 600;">💡 Interpretación:</p>
-                        <p style="margin: 0 0 8px 0; font-size: 13px; color: #444;">{feedback_grasa}</p>
-                        <p style="margin: 0 0 8px 0; font-size: 12px; color: #888;">{rango_saludable}</p>
-                        <p style="margin: 0; font-size: 12px; color: #888; line-height: 1.6;">{rangos_detallados}</p>
-                    </div>
-                    <div class="metric-grid" style="margin-top: 15px;">
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">Masa Grasa</div>
-                            <div class="metric-cell metric-value"><strong>{masa_grasa_calc:.1f} kg</strong></div>
-                        </div>
-                        <div class="metric-row" style="background-color: #fff9e6;">
-                            <div class="metric-cell metric-label">Masa Libre de Grasa (MLG)</div>
-                            <div class="metric-cell metric-value"><strong>{mlg:.1f} kg ({pct_mlg:.1f}%)</strong></div>
-                        </div>
-                    </div>
-                    
-                    <!-- Sección de Masa Muscular -->
-                    <div style="margin-top: 20px; padding: 15px; background: linear-gradient(135deg, #e8f5e9 0%, #c8e6c9 100%); border-radius: 8px; border-left: 4px solid #27AE60;">
-                        <h4 style="margin: 0 0 12px 0; color: #27AE60; font-size: 16px;">💪 Masa Muscular Esquelética</h4>
-                        
-                        {f'''<div style="background-color: rgba(255,255,255,0.9); padding: 12px; border-radius: 5px; margin-bottom: 10px; border-left: 3px solid #2196F3;">
-                            <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 5px;">
-                                <span style="font-weight: 600; color: #555;">🔵 Omron (bioimpedancia):</span>
-                                <span style="font-size: 18px; font-weight: 700; color: #2196F3;">{masa_muscular_aparato_kg:.1f} kg ({pct_masa_muscular_aparato:.1f}%)</span>
-                            </div>
-                            <p style="margin: 5px 0 0 0; font-size: 11px; color: #666; font-style: italic;">Valor medido directamente por tu báscula de bioimpedancia</p>
-                        </div>''' if masa_muscular_aparato > 0 else ''}
-                        
-                        <div style="background-color: rgba(255,255,255,0.9); padding: 12px; border-radius: 5px; margin-bottom: 10px; border-left: 3px solid #9C27B0;">
-                            <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 5px;">
-                                <span style="font-weight: 600; color: #555;">🟣 Estimado científico:</span>
-                                <span style="font-size: 18px; font-weight: 700; color: #9C27B0;">{masa_muscular_estimada:.1f} kg ({pct_masa_muscular_estimada:.1f}%)</span>
-                            </div>
-                            <p style="margin: 5px 0 0 0; font-size: 11px; color: #666; font-style: italic;">Calculado desde MLG usando factores por nivel de entrenamiento</p>
-                        </div>
-                        
-                        <div style="background-color: rgba(255,193,7,0.15); padding: 10px; border-radius: 5px; font-size: 12px; color: #555; line-height: 1.5;">
-                            <p style="margin: 0 0 5px 0; font-weight: 600;">📊 ¿Por qué dos valores?</p>
-                            <p style="margin: 0 0 5px 0;">• <strong>Omron</strong>: Medición directa por corriente eléctrica (±3-5% error)</p>
-                            <p style="margin: 0 0 5px 0;">• <strong>Estimado</strong>: Cálculo desde MLG × factor ({('0.37-0.43' if sexo == 'Hombre' else '0.33-0.40')} según nivel)</p>
-                            <p style="margin: 0; font-style: italic; color: #777;">Ambos métodos son válidos. Si difieren mucho (>15%), puede indicar variación en hidratación o método de medición.</p>
-                        </div>
-                    </div>
-                    
-                    {f'''<div style="margin-top: 15px; padding: 12px; background-color: #e3f2fd; border-radius: 5px; border-left: 4px solid #3498DB;">
-                        <p style="margin: 0 0 8px 0; font-size: 13px; color: #666; font-weight: 600;">💡 Interpretación (usando {('Omron' if masa_muscular_aparato > 0 else 'valor estimado')}):</p>
-                        <p style="margin: 0 0 5px 0; font-size: 13px; color: #444;">{feedback_masa_muscular}</p>
-                        <p style="margin: 0; font-size: 12px; color: #888;">{rango_masa_muscular}</p>
-                    </div>''' if feedback_masa_muscular else ''}
-                    
-                    <div style="margin-top: 10px; padding: 10px; background-color: #fff3e0; border-radius: 5px; font-size: 12px; color: #555; line-height: 1.5;">
-                        <p style="margin: 0 0 5px 0; font-weight: 600;">🔬 Nota científica:</p>
-                        <p style="margin: 0;">La <strong>MLG incluye</strong>: músculo + huesos (~15%) + órganos (~12%) + agua (~30-35%). La masa muscular es solo el componente esquelético contráctil.</p>
-                    </div>
-                    <div style="margin-top: 15px; padding: 12px; background-color: #e8f5e9; border-radius: 5px; border-left: 4px solid #27AE60;">
-                        <p style="margin: 0 0 8px 0; font-size: 13px; color: #666; font-weight: 600;">💪 Sobre tu masa muscular:</p>
-                        <p style="margin: 0 0 5px 0; font-size: 13px; color: #444;">{feedback_masa_muscular}</p>
-                        <p style="margin: 0; font-size: 12px; color: #888;">{rango_masa_muscular}</p>
-                    </div>
-                </div>
-            </div>
-            
-            <!-- ÍNDICES CORPORALES -->
-            <div class="section">
-                <div class="section-title">📈 Índices Corporales</div>
-                
-                <div class="index-card">
-                    <div class="index-label">💪 FFMI (Índice de Masa Libre de Grasa)</div>
-                    <div class="index-value">{ffmi:.1f}</div>
-                    <p style="margin: 5px 0 0 0; font-size: 13px; color: #666;">Desarrollo muscular ajustado por altura</p>
-                    <div style="margin-top: 10px; padding: 10px; background-color: #fff9e6; border-radius: 5px; font-size: 12px; color: #555; line-height: 1.5;">
-                        <p style="margin: 0 0 5px 0; font-weight: 600;">📊 ¿Qué es el FFMI?</p>
-                        <p style="margin: 0;">El FFMI normaliza tu masa muscular según tu altura, permitiendo comparaciones justas entre personas de diferentes estaturas. Es el "IMC del músculo".</p>
-                    </div>
-                    <div style="margin-top: 15px; padding: 12px; background-color: rgba(255,215,0,0.1); border-radius: 5px;">
-                        <p style="margin: 0 0 8px 0; font-size: 13px; color: #444; font-weight: 600;">💡 Tu nivel:</p>
-                        <p style="margin: 0 0 8px 0; font-size: 13px; color: #444;">{feedback_ffmi}</p>
-                        <p style="margin: 0; font-size: 12px; color: #888; line-height: 1.6;">{rangos_ffmi}</p>
-                    </div>
-                    <div style="margin-top: 12px; padding: 12px; background-color: {('#d4edda' if modo_ffmi_email == 'GREEN' else '#fff3cd' if modo_ffmi_email == 'AMBER' else '#f8d7da')}; border-radius: 5px; border-left: 4px solid {('#28a745' if modo_ffmi_email == 'GREEN' else '#ffc107' if modo_ffmi_email == 'AMBER' else '#dc3545')};">
-                        <p style="margin: 0 0 8px 0; font-size: 13px; font-weight: 600; color: #333;">⚠️ Validez de interpretación:</p>
-                        <p style="margin: 0 0 8px 0; font-size: 12px; color: #555; line-height: 1.5;">
-                            <strong>{('🟢 ALTA' if modo_ffmi_email == 'GREEN' else '🟡 MODERADA' if modo_ffmi_email == 'AMBER' else '🔴 LIMITADA')}</strong> - 
-                            {('Tu % de grasa está en rango saludable. El FFMI refleja fielmente tu desarrollo muscular.' if modo_ffmi_email == 'GREEN' else 'Tu % de grasa está elevado. El FFMI puede estar ligeramente inflado por retención de agua/inflamación.' if modo_ffmi_email == 'AMBER' else 'Tu % de grasa está muy alto o muy bajo. El FFMI no es confiable en este rango debido a alteraciones en la composición de MLG.')}
-                        </p>
-                        <p style="margin: 0; font-size: 11px; color: #666; font-style: italic;">
-                            Rangos válidos: Hombres 12-23%, Mujeres 21-31%. Fuera de estos rangos, la MLG incluye más agua/inflamación que músculo real.
-                        </p>
-                    </div>
-                </div>
-                
-                <div class="card">
-                    <h4 style="margin-top: 0; color: #555;">Índices de Salud</h4>
-                    <div class="metric-grid">
-                        {f'''<div class="metric-row">
-                            <div class="metric-cell metric-label">Circunferencia cintura</div>
-                            <div class="metric-cell metric-value"><strong>{circunferencia_cintura} cm</strong></div>
-                        </div>''' if circunferencia_cintura is not None else ''}
-                        {f'''<div class="metric-row">
-                            <div class="metric-cell metric-label">Ratio Cintura-Altura</div>
-                            <div class="metric-cell metric-value">
-                                <strong>{wthr:.3f}</strong>
-                                <span class="badge badge-{('green' if '🟢' in wthr_clasificacion else 'yellow' if '🟡' in wthr_clasificacion else 'red')}">{wthr_clasificacion.replace(' - 🟢', '').replace(' - 🟡', '').replace(' - 🔴', '')}</span>
-                            </div>
-                        </div>''' if wthr is not None else ''}
-                        {f'''<div class="metric-row">
-                            <div class="metric-cell metric-label">Grasa visceral</div>
-                            <div class="metric-cell metric-value">
-                                <strong>Nivel {grasa_visceral}</strong>
-                                <span class="badge badge-{('green' if '🟢' in grasa_visceral_clasificacion else 'yellow' if '🟡' in grasa_visceral_clasificacion else 'red')}">{grasa_visceral_clasificacion.replace(' - 🟢', '').replace(' - 🟡', '').replace(' - 🔴', '')}</span>
-                            </div>
-                        </div>''' if grasa_visceral is not None else ''}
-                    </div>
-                </div>
-                
-                {f'''<div style="margin-top: 10px; padding: 12px; background-color: #f0f8ff; border-radius: 5px; border-left: 3px solid #3498DB; font-size: 13px; color: #555;">
-                    <p style="margin: 0 0 8px 0; font-weight: 600;">💡 Sobre estos índices:</p>
-                    {('<p style="margin: 0 0 5px 0;"><strong>WtHR:</strong> ' + feedback_wthr + '</p><p style="margin: 8px 0 0 0; font-size: 12px; color: #777; line-height: 1.6;">' + rangos_wthr + '</p>') if wthr is not None else ''}
-                    {('<p style="margin: 0 0 5px 0;"><strong>Grasa visceral:</strong> ' + feedback_visceral + '</p>') if grasa_visceral is not None else ''}
-                    {('<p style="margin: 8px 0 0 0; font-size: 12px; color: #777;"><em>' + info_visceral + '</em></p>') if grasa_visceral is not None else ''}
-                </div>''' if wthr is not None or grasa_visceral is not None else ''}
-                
-                {f'''<div class="card" style="background: linear-gradient(135deg, #f0f9ff 0%, #e0f2fe 100%); border-left-color: #3498DB;">
-                    <h4 style="margin-top: 0; color: #3498DB;">🧬 Edad Metabólica</h4>
-                    <div class="metric-grid">
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">Edad cronológica</div>
-                            <div class="metric-cell metric-value"><strong>{edad} años</strong></div>
-                        </div>
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">Edad metabólica</div>
-                            <div class="metric-cell metric-value"><strong>{edad_metabolica} años</strong></div>
-                        </div>
-                    </div>
-                    <p style="margin: 15px 0 0 0; padding: 10px; background-color: {'#d4edda' if edad_metabolica < edad else '#fff3cd' if edad_metabolica == edad else '#f8d7da'}; border-radius: 5px; font-size: 14px; text-align: center;">
-                        {'✅ Tu metabolismo es ' + str(edad - edad_metabolica) + ' años más joven' if edad_metabolica < edad else '⚠️ Tu metabolismo está ' + str(edad_metabolica - edad) + ' años por encima' if edad_metabolica > edad else '📊 Tu edad metabólica coincide con tu edad'}
-                    </p>
-                    <div style="margin-top: 12px; padding: 10px; background-color: rgba(255,255,255,0.7); border-radius: 5px; font-size: 12px; color: #555;">
-                        <p style="margin: 0 0 8px 0;"><strong>💡 Qué significa:</strong> {feedback_edad_metabolica}</p>
-                        <p style="margin: 0; font-size: 12px; color: #888; line-height: 1.6;">{rangos_edad_metabolica}</p>
-                    </div>
-                </div>''' if edad_metabolica is not None else ''}
-            </div>
-            
-            <!-- NIVEL DE ENTRENAMIENTO -->
-            {f'''<div class="section">
-                <div class="section-title">💪 Nivel de Entrenamiento</div>
-                <div class="card-highlight">
-                    NIVEL: {nivel_entrenamiento.upper()}
-                </div>
-                <p style="font-size: 14px; color: #666; text-align: center;">
-                    Este nivel se calcula evaluando tu desarrollo muscular, rendimiento funcional y experiencia de entrenamiento.
-                </p>
-                <div style="margin-top: 15px; padding: 12px; background-color: #fff9e6; border-radius: 5px; border-left: 3px solid #FFD700; font-size: 13px; color: #555;">
-                    <p style="margin: 0; font-weight: 600;">💡 Interpretación de tu nivel:</p>
-                    <p style="margin: 8px 0 0 0;">{feedback_nivel}</p>
-                </div>
-            </div>''' if nivel_entrenamiento else ''}
-            
-            <!-- ESTADO DE RECUPERACIÓN -->
-            {(lambda s: s.replace('━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━', '<div class="section">').replace('😴 ESTADO DE RECUPERACIÓN (SUEÑO + ESTRÉS)', '<div class="section-title">😴 Estado de Recuperación</div>').replace('   ╔════════════════════════════════════════════════════════════════╗' + chr(10) + '   ║  ÍNDICE DE RECUPERACIÓN (IR-SE):', '<div class="index-card"><div class="index-label">Índice de Recuperación (IR-SE)</div><div class="index-value">').replace('/100                   ║' + chr(10) + '   ║  NIVEL:', '/100</div><div style="font-size: 18px; font-weight: 600; margin-top: 10px;">NIVEL:').replace(' ║' + chr(10) + '   ╚════════════════════════════════════════════════════════════════╝' + chr(10) + chr(10) + '   • Calidad de sueño:', '</div></div><div class="card"><div class="metric-grid"><div class="metric-row"><div class="metric-cell metric-label">Calidad de sueño</div><div class="metric-cell metric-value"><strong>').replace('/100' + chr(10) + '   • Nivel de estrés:', '/100</strong></div></div><div class="metric-row"><div class="metric-cell metric-label">Nivel de estrés</div><div class="metric-cell metric-value"><strong>').replace('/100' + chr(10) + '   ' + chr(10) + '   💡 Este índice refleja tu capacidad de recuperación y adaptación al' + chr(10) + '      entrenamiento. Valores bajos pueden limitar tu progreso.', '/100</strong></div></div></div></div><p style="font-size: 14px; color: #666; padding: 15px; background-color: #f0f8ff; border-radius: 5px;">💡 Este índice refleja tu capacidad de recuperación y adaptación al entrenamiento. Valores bajos pueden limitar tu progreso.</p></div>'))(seccion_recuperacion) if seccion_recuperacion else ''}
-            
-            <!-- FOTOGRAFÍAS -->
-            <div class="section">
-                <div class="section-title">📸 Fotografías de Progreso</div>
-                <div class="card">
-                    <p style="margin: 0; font-size: 14px; color: #666;">
-                        Las fotografías de tu evaluación están adjuntas a este correo para tu registro personal.
-                    </p>
-                </div>
-            </div>
-            
-            <!-- PRÓXIMOS PASOS -->
-            <div class="section">
-                <div class="section-title">📱 Próximos Pasos</div>
-                <div class="cta-box">
-                    <div class="cta-title">Tu coach se pondrá en contacto contigo para:</div>
-                    <ul class="cta-list">
-                        <li>Revisar en detalle tus resultados</li>
-                        <li>Diseñar tu plan nutricional personalizado</li>
-                        <li>Establecer objetivos específicos y proyecciones</li>
-                        <li>Programar tu seguimiento y ajustes</li>
-                    </ul>
-                </div>
-                <p style="font-size: 14px; color: #666; text-align: center; margin-top: 20px;">
-                    Si tienes alguna pregunta o inquietud, no dudes en contactarnos.
-                </p>
-            </div>
-        </div>
-        
-        <div class="footer">
-            <div class="footer-logos">
-                <img src="data:image/png;base64,{logo_mupai_b64}" alt="MUPAI" class="footer-logo" />
-                <img src="data:image/png;base64,{logo_gym_b64}" alt="Muscle Up GYM" class="footer-logo" />
-            </div>
-            <p style="margin: 0 0 10px 0; font-weight: 600; color: #FFD700;">Muscle Up GYM</p>
-            <p style="margin: 0 0 10px 0;">Digital Training Science</p>
-            <p style="margin: 0;"><a href="https://muscleupgym.fitness">muscleupgym.fitness</a></p>
-            <p style="margin: 5px 0 0 0;"><a href="mailto:administracion@muscleupgym.fitness">administracion@muscleupgym.fitness</a></p>
-        </div>
-    </div>
-</body>
-</html>
-"""
-        
-        # IMPORTANTE: Para Gmail, el orden correcto es texto plano PRIMERO, luego HTML
-        # Gmail renderiza el último formato que entiende (HTML), pero necesita ambos en orden correcto
-        msg.attach(MIMEText(contenido, 'plain', 'utf-8'))
-        msg.attach(MIMEText(contenido_html, 'html', 'utf-8'))
-        
-        # Adjuntar fotos de progreso si están disponibles
-        if progress_photos:
-            success, total_size_mb, error_msg = attach_progress_photos_to_email(msg, progress_photos)
-            if not success:
-                st.warning(f"⚠️ No se pudieron adjuntar fotos al email del cliente: {error_msg}")
-
-        server = smtplib.SMTP('smtp.zoho.com', 587)
-        server.starttls()
-        server.login(email_origen, password)
-        server.send_message(msg)
-        server.quit()
-
-        return True
-    except Exception as e:
-        st.error(f"Error al enviar email al cliente: {str(e)}")
-        return False
-
-def enviar_email_resumen(contenido, nombre_cliente, email_cliente, fecha, edad, telefono, progress_photos=None):
-    """Envía el email COMPLETO CIENTÍFICO a administración."""
-    try:
-        email_origen = "administracion@muscleupgym.fitness"
-        email_destino = "administracion@muscleupgym.fitness"
-        password = st.secrets.get("zoho_password", "TU_PASSWORD_AQUI")
-
-        msg = MIMEMultipart()
-        msg['From'] = email_origen
-        msg['To'] = email_destino
-        msg['Subject'] = f"Resumen evaluación MUPAI - {nombre_cliente} ({fecha})"
-
-        msg.attach(MIMEText(contenido, 'plain'))
-        
-        # Attach progress photos if provided
-        if progress_photos:
-            success, total_size_mb, error_msg = attach_progress_photos_to_email(msg, progress_photos)
-            if not success:
-                st.error(f"Error al adjuntar fotos: {error_msg}")
-                return False
-            
-            # Check if total email size exceeds limit
-            if total_size_mb > EMAIL_ATTACHMENT_SIZE_LIMIT_MB:
-                st.warning(f"⚠️ El tamaño total de las fotos ({total_size_mb:.2f} MB) excede el límite de email ({EMAIL_ATTACHMENT_SIZE_LIMIT_MB} MB). Se recomienda implementar almacenamiento externo.")
-                # For now, we'll still try to send but log the warning
-
-        server = smtplib.SMTP('smtp.zoho.com', 587)
-        server.starttls()
-        server.login(email_origen, password)
-        server.send_message(msg)
-        server.quit()
-
-        return True
-    except Exception as e:
-        st.error(f"Error al enviar email: {str(e)}")
-        return False
-
-def clasificar_grasa_visceral(nivel):
-    """
-    Clasifica el nivel de grasa visceral según rangos saludables.
-    
-    Args:
-        nivel: Nivel de grasa visceral (1-59)
-        
-    Returns:
-        str: Clasificación (Saludable, Elevado, Alto riesgo, o N/D)
-    """
-    if nivel < 1:
-        return "N/D"
-    elif nivel <= 12:
-        return "Saludable"
-    elif nivel <= 15:
-        return "Elevado"
-    else:
-        return "Alto riesgo"
-
-def clasificar_wthr(wthr):
-    """
-    Clasifica el Waist-to-Height Ratio (Ratio cintura-altura) según rangos saludables.
-    
-    Args:
-        wthr: Waist-to-Height Ratio (circunferencia_cintura / estatura)
-        
-    Returns:
-        str: Clasificación (Saludable, Riesgo aumentado, Alto riesgo, o N/D)
-    """
-    if wthr <= 0:
-        return "N/D"
-    elif wthr < 0.5:
-        return "Saludable (<0.5)"
-    elif wthr < 0.6:
-        return "Riesgo aumentado (0.5-0.6)"
-    else:
-        return "Alto riesgo (≥0.6)"
-
-def clasificar_masa_muscular(porcentaje, edad, sexo):
-    """
-    Clasifica el porcentaje de masa muscular según edad y sexo.
-    Solo aplica cuando el campo está vacío o es N/D.
-    
-    Args:
-        porcentaje: Porcentaje de masa muscular (0-100)
-        edad: Edad del cliente
-        sexo: "Hombre" o "Mujer"
-        
-    Returns:
-        str: Clasificación (Bajo, Normal, Alto, o N/D)
-    """
-    # Values <= 0 indicate unmeasured/unavailable data
-    # (session state default "" converts to 0.0 via safe_float)
-    if porcentaje <= 0:
-        return "N/D"
-    
-    # Rangos aproximados basados en edad y sexo
-    if sexo == "Hombre":
-        if edad < 40:
-            if porcentaje < 33:
-                return "Bajo"
-            elif porcentaje < 40:
-                return "Normal"
-            else:
-                return "Alto"
-        elif edad < 60:
-            if porcentaje < 30:
-                return "Bajo"
-            elif porcentaje < 37:
-                return "Normal"
-            else:
-                return "Alto"
-        else:
-            if porcentaje < 27:
-                return "Bajo"
-            elif porcentaje < 34:
-                return "Normal"
-            else:
-                return "Alto"
-    else:  # Mujer
-        if edad < 40:
-            if porcentaje < 24:
-                return "Bajo"
-            elif porcentaje < 31:
-                return "Normal"
-            else:
-                return "Alto"
-        elif edad < 60:
-            if porcentaje < 22:
-                return "Bajo"
-            elif porcentaje < 28:
-                return "Normal"
-            else:
-                return "Alto"
-        else:
-            if porcentaje < 20:
-                return "Bajo"
-            elif porcentaje < 26:
-                return "Normal"
-            else:
-                return "Alto"
-
-def format_photo_status(progress_photos):
-    """
-    Format the photo status message for email body.
-    
-    Args:
-        progress_photos: Dictionary with photo files or None
-    
-    Returns:
-        str: Formatted status message
-    """
-    if not progress_photos:
-        return "✗ Sin fotografías adjuntas"
-    
-    # Check if optional photo is present
-    has_optional = progress_photos.get("pose_libre") is not None
-    
-    if has_optional:
-        return "✓ 4 fotografías adjuntas (frontal, lateral, posterior, pose libre)"
-    else:
-        return "✓ 3 fotografías adjuntas (frontal, lateral, posterior)"
-
-def enviar_email_parte2(nombre_cliente, fecha, edad, sexo, peso, estatura, imc, grasa_corregida, 
-                        mlg, ffmi=None, nivel_entrenamiento=None, circunferencia_cintura=None, grasa_visceral=None, 
-                        edad_metabolica=None, wthr=None, masa_grasa=None, progress_photos=None, 
-                        masa_muscular_aparato=0, masa_muscular_estimada=0, masa_muscular=None, tmb=None, ciclo_menstrual=None):
-    """
-    Envía el email interno (Parte 2) con TODO EL CONTENIDO IDÉNTICO del email cliente.
-    Destinatario exclusivo: administracion@muscleupgym.fitness (sin CC/BCC)
-    
-    IMPORTANTE: Este email contiene EXACTAMENTE el mismo contenido HTML que recibe el cliente,
-    para que el administrador pueda ver qué información se envió al usuario.
-    La única diferencia es el asunto del email que indica que es copia interna.
-    
-    Args:
-        Los mismos parámetros que enviar_email_cliente() para mantener sincronía total.
-    """
-    try:
-        email_origen = "administracion@muscleupgym.fitness"
-        email_destino = "administracion@muscleupgym.fitness"
-        password = st.secrets.get("zoho_password", "TU_PASSWORD_AQUI")
-        
-        # Cargar logos para emails (igual que en enviar_email_cliente)
-        import base64
-        try:
-            with open('LOGO MUPAI.png', 'rb') as f:
-                logo_mupai_b64 = base64.b64encode(f.read()).decode()
-        except FileNotFoundError:
-            logo_mupai_b64 = ""
-        
-        try:
-            with open('LOGO MUP.png', 'rb') as f:
-                logo_gym_b64 = base64.b64encode(f.read()).decode()
-        except FileNotFoundError:
-            logo_gym_b64 = ""
-
-        # === USAR TODO EL CÓDIGO DEL EMAIL CLIENTE (contenido idéntico) ===
-        # Este email contiene EXACTAMENTE el mismo HTML que el cliente recibe
-        
-        # Calcular valores derivados
-        masa_grasa_calc = peso - mlg if masa_grasa is None else masa_grasa
-        pct_mlg = (mlg / peso * 100) if peso > 0 else 0
-        
-        # Calcular modo de interpretación FFMI
-        modo_ffmi_email = obtener_modo_interpretacion_ffmi(grasa_corregida, sexo)
-        
-        # Masa muscular: aparato viene como %, estimada como kg
-        # Convertir aparato de % a kg, y calcular % de estimada
-        masa_muscular_aparato_kg = (peso * masa_muscular_aparato / 100) if peso > 0 and masa_muscular_aparato > 0 else 0
-        pct_masa_muscular_aparato = masa_muscular_aparato  # Ya es porcentaje desde Omron
-        pct_masa_muscular_estimada = (masa_muscular_estimada / peso * 100) if peso > 0 and masa_muscular_estimada > 0 else 0
-        
-        # Clasificar WtHR si está disponible
-        wthr_clasificacion = ""
-        if wthr is not None:
-            if wthr < 0.40:
-                wthr_clasificacion = " - 🟢 Extremadamente delgado"
-            elif wthr < 0.50:
-                wthr_clasificacion = " - 🟢 Saludable"
-            elif wthr < 0.60:
-                wthr_clasificacion = " - 🟡 Sobrepeso"
-            else:
-                wthr_clasificacion = " - 🔴 Obesidad"
-        
-        # Clasificar grasa visceral si está disponible
-        grasa_visceral_clasificacion = ""
-        if grasa_visceral is not None:
-            if grasa_visceral < 10:
-                grasa_visceral_clasificacion = " - 🟢 Nivel saludable"
-            elif grasa_visceral < 15:
-                grasa_visceral_clasificacion = " - 🟡 Nivel elevado"
-            else:
-                grasa_visceral_clasificacion = " - 🔴 Nivel alto (riesgo)"
-        
-        # Variables para compatibilidad con contenido texto plano (legacy)
-        circunferencia_cintura_val = circunferencia_cintura if circunferencia_cintura is not None else 0
-        circunferencia_cuello_val = circunferencia_cuello if circunferencia_cuello is not None else 0
-        circunferencia_cadera_val = circunferencia_cadera if circunferencia_cadera is not None else 0
-        masa_muscular_val = masa_muscular if masa_muscular is not None else 0
-        grasa_visceral_val = grasa_visceral if grasa_visceral is not None else 0
-        clasificacion_wthr = wthr_clasificacion.replace(' - ', '').replace('🟢 ', '').replace('🟡 ', '').replace('🔴 ', '')
-        clasificacion_grasa_visceral = grasa_visceral_clasificacion.replace(' - ', '').replace('🟢 ', '').replace('🟡 ', '').replace('🔴 ', '')
-        clasificacion_masa_muscular = "Normal"  # Placeholder para el texto plano
-
-        # Categorizar grasa corporal con feedback detallado
-        if sexo == "Hombre":
-            if grasa_corregida < 6:
-                categoria_grasa = "Muy bajo (Competición)"
-                emoji_grasa = "⚠️"
-                feedback_grasa = "Nivel de competición. Difícil de mantener a largo plazo. Puede afectar hormonas y rendimiento."
-                rango_saludable = "Rango saludable: 12-18%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Hombres):</strong><br>
-                • 3-6%: Esencial (mínimo para sobrevivir)<br>
-                • 6-12%: Atlético/Competición (muy definido)<br>
-                • 12-18%: Fitness (saludable, estético)<br>
-                • 18-25%: Promedio aceptable<br>
-                • 25-30%: Sobrepeso (considerar reducir)<br>
-                • 30%+: Obesidad (riesgo metabólico alto)
-                """
-            elif grasa_corregida < 12:
-                categoria_grasa = "Atlético"
-                emoji_grasa = "💪"
-                feedback_grasa = "Excelente nivel. Buena definición muscular visible. Rendimiento deportivo óptimo."
-                rango_saludable = "Rango saludable: 12-18%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Hombres):</strong><br>
-                • 3-6%: Esencial (mínimo para sobrevivir)<br>
-                • <strong>6-12%: Atlético/Competición (muy definido) ← Tú estás aquí</strong><br>
-                • 12-18%: Fitness (saludable, estético)<br>
-                • 18-25%: Promedio aceptable<br>
-                • 25-30%: Sobrepeso (considerar reducir)<br>
-                • 30%+: Obesidad (riesgo metabólico alto)
-                """
-            elif grasa_corregida < 18:
-                categoria_grasa = "Fitness"
-                emoji_grasa = "🏃"
-                feedback_grasa = "Nivel fitness saludable. Buena relación salud-estética. Sostenible a largo plazo."
-                rango_saludable = "Rango saludable: 12-18%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Hombres):</strong><br>
-                • 3-6%: Esencial (mínimo para sobrevivir)<br>
-                • 6-12%: Atlético/Competición (muy definido)<br>
-                • <strong>12-18%: Fitness (saludable, estético) ← Tú estás aquí</strong><br>
-                • 18-25%: Promedio aceptable<br>
-                • 25-30%: Sobrepeso (considerar reducir)<br>
-                • 30%+: Obesidad (riesgo metabólico alto)
-                """
-            elif grasa_corregida < 25:
-                categoria_grasa = "Promedio"
-                emoji_grasa = "📊"
-                feedback_grasa = "Nivel promedio. Espacio para mejorar composición corporal con entrenamiento y nutrición."
-                rango_saludable = "Rango fitness: 12-18%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Hombres):</strong><br>
-                • 3-6%: Esencial (mínimo para sobrevivir)<br>
-                • 6-12%: Atlético/Competición (muy definido)<br>
-                • 12-18%: Fitness (saludable, estético)<br>
-                • <strong>18-25%: Promedio aceptable ← Tú estás aquí</strong><br>
-                • 25-30%: Sobrepeso (considerar reducir)<br>
-                • 30%+: Obesidad (riesgo metabólico alto)
-                """
-            elif grasa_corregida < 30:
-                categoria_grasa = "Sobrepeso"
-                emoji_grasa = "⚠️"
-                feedback_grasa = "Nivel de sobrepeso. Recomendable reducir para mejorar salud metabólica y reducir riesgos."
-                rango_saludable = "Rango fitness: 12-18%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Hombres):</strong><br>
-                • 3-6%: Esencial (mínimo para sobrevivir)<br>
-                • 6-12%: Atlético/Competición (muy definido)<br>
-                • 12-18%: Fitness (saludable, estético)<br>
-                • 18-25%: Promedio aceptable<br>
-                • <strong>25-30%: Sobrepeso (considerar reducir) ← Tú estás aquí</strong><br>
-                • 30%+: Obesidad (riesgo metabólico alto)
-                """
-            else:
-                categoria_grasa = "Obesidad"
-                emoji_grasa = "🚨"
-                feedback_grasa = "Nivel de obesidad. Alto riesgo metabólico. Urgente reducir con asesoría médica y nutricional."
-                rango_saludable = "Rango fitness: 12-18%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Hombres):</strong><br>
-                • 3-6%: Esencial (mínimo para sobrevivir)<br>
-                • 6-12%: Atlético/Competición (muy definido)<br>
-                • 12-18%: Fitness (saludable, estético)<br>
-                • 18-25%: Promedio aceptable<br>
-                • 25-30%: Sobrepeso (considerar reducir)<br>
-                • <strong>30%+: Obesidad (riesgo metabólico alto) ← Tú estás aquí</strong>
-                """
-        else:  # Mujer
-            if grasa_corregida < 12:
-                categoria_grasa = "Muy bajo (Competición)"
-                emoji_grasa = "⚠️"
-                feedback_grasa = "Nivel de competición. Muy difícil de mantener. Puede afectar ciclo menstrual y hormonas."
-                rango_saludable = "Rango saludable: 17-23%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Mujeres):</strong><br>
-                • 10-12%: Esencial (mínimo, puede afectar fertilidad)<br>
-                • 12-17%: Atlético/Competición (muy definido)<br>
-                • 17-23%: Fitness (saludable, estético)<br>
-                • 23-30%: Promedio aceptable<br>
-                • 30-35%: Sobrepeso (considerar reducir)<br>
-                • 35%+: Obesidad (riesgo metabólico alto)
-                """
-            elif grasa_corregida < 17:
-                categoria_grasa = "Atlético"
-                emoji_grasa = "💪"
-                feedback_grasa = "Excelente nivel atlético. Muy buena definición muscular. Rendimiento deportivo óptimo."
-                rango_saludable = "Rango saludable: 17-23%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Mujeres):</strong><br>
-                • 10-12%: Esencial (mínimo, puede afectar fertilidad)<br>
-                • <strong>12-17%: Atlético/Competición (muy definido) ← Tú estás aquí</strong><br>
-                • 17-23%: Fitness (saludable, estético)<br>
-                • 23-30%: Promedio aceptable<br>
-                • 30-35%: Sobrepeso (considerar reducir)<br>
-                • 35%+: Obesidad (riesgo metabólico alto)
-                """
-            elif grasa_corregida < 23:
-                categoria_grasa = "Fitness"
-                emoji_grasa = "🏃"
-                feedback_grasa = "Nivel fitness saludable. Buena relación salud-estética. Sostenible a largo plazo."
-                rango_saludable = "Rango saludable: 17-23%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Mujeres):</strong><br>
-                • 10-12%: Esencial (mínimo, puede afectar fertilidad)<br>
-                • 12-17%: Atlético/Competición (muy definido)<br>
-                • <strong>17-23%: Fitness (saludable, estético) ← Tú estás aquí</strong><br>
-                • 23-30%: Promedio aceptable<br>
-                • 30-35%: Sobrepeso (considerar reducir)<br>
-                • 35%+: Obesidad (riesgo metabólico alto)
-                """
-            elif grasa_corregida < 30:
-                categoria_grasa = "Promedio"
-                emoji_grasa = "📊"
-                feedback_grasa = "Nivel promedio. Espacio para mejorar composición corporal con entrenamiento y nutrición."
-                rango_saludable = "Rango fitness: 17-23%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Mujeres):</strong><br>
-                • 10-12%: Esencial (mínimo, puede afectar fertilidad)<br>
-                • 12-17%: Atlético/Competición (muy definido)<br>
-                • 17-23%: Fitness (saludable, estético)<br>
-                • <strong>23-30%: Promedio aceptable ← Tú estás aquí</strong><br>
-                • 30-35%: Sobrepeso (considerar reducir)<br>
-                • 35%+: Obesidad (riesgo metabólico alto)
-                """
-            elif grasa_corregida < 35:
-                categoria_grasa = "Sobrepeso"
-                emoji_grasa = "⚠️"
-                feedback_grasa = "Nivel de sobrepeso. Recomendable reducir para mejorar salud metabólica y reducir riesgos."
-                rango_saludable = "Rango fitness: 17-23%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Mujeres):</strong><br>
-                • 10-12%: Esencial (mínimo, puede afectar fertilidad)<br>
-                • 12-17%: Atlético/Competición (muy definido)<br>
-                • 17-23%: Fitness (saludable, estético)<br>
-                • 23-30%: Promedio aceptable<br>
-                • <strong>30-35%: Sobrepeso (considerar reducir) ← Tú estás aquí</strong><br>
-                • 35%+: Obesidad (riesgo metabólico alto)
-                """
-            else:
-                categoria_grasa = "Obesidad"
-                emoji_grasa = "🚨"
-                feedback_grasa = "Nivel de obesidad. Alto riesgo metabólico. Urgente reducir con asesoría médica y nutricional."
-                rango_saludable = "Rango fitness: 17-23%"
-                rangos_detallados = """
-                <strong>Rangos de referencia (Mujeres):</strong><br>
-                • 10-12%: Esencial (mínimo, puede afectar fertilidad)<br>
-                • 12-17%: Atlético/Competición (muy definido)<br>
-                • 17-23%: Fitness (saludable, estético)<br>
-                • 23-30%: Promedio aceptable<br>
-                • 30-35%: Sobrepeso (considerar reducir)<br>
-                • <strong>35%+: Obesidad (riesgo metabólico alto) ← Tú estás aquí</strong>
-                """
-        
-        # Feedback para FFMI si está disponible
-        feedback_ffmi = ""
-        rangos_ffmi = ""
-        if ffmi is not None:
-            if sexo == "Hombre":
-                if ffmi < 18:
-                    feedback_ffmi = "Por debajo del promedio. Potencial de ganancia muscular significativo con entrenamiento."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Hombres):</strong><br>
-                    • <strong>&lt;18: Por debajo del promedio ← Tú estás aquí</strong><br>
-                    • 18-20: Promedio (desarrollo natural normal)<br>
-                    • 20-22: Por encima del promedio (buen entrenamiento)<br>
-                    • 22-25: Excelente (años de entrenamiento)<br>
-                    • 25+: Elite/excepcional (límite natural ~25-26)
-                    """
-                elif ffmi < 20:
-                    feedback_ffmi = "Nivel promedio. Desarrollo muscular natural normal. Buen punto de partida."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Hombres):</strong><br>
-                    • &lt;18: Por debajo del promedio<br>
-                    • <strong>18-20: Promedio (desarrollo natural normal) ← Tú estás aquí</strong><br>
-                    • 20-22: Por encima del promedio (buen entrenamiento)<br>
-                    • 22-25: Excelente (años de entrenamiento)<br>
-                    • 25+: Elite/excepcional (límite natural ~25-26)
-                    """
-                elif ffmi < 22:
-                    feedback_ffmi = "Por encima del promedio. Buen desarrollo muscular. Nivel de entrenamiento intermedio-avanzado."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Hombres):</strong><br>
-                    • &lt;18: Por debajo del promedio<br>
-                    • 18-20: Promedio (desarrollo natural normal)<br>
-                    • <strong>20-22: Por encima del promedio (buen entrenamiento) ← Tú estás aquí</strong><br>
-                    • 22-25: Excelente (años de entrenamiento)<br>
-                    • 25+: Elite/excepcional (límite natural ~25-26)
-                    """
-                elif ffmi < 25:
-                    feedback_ffmi = "Excelente desarrollo. Nivel avanzado. Años de entrenamiento consistente."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Hombres):</strong><br>
-                    • &lt;18: Por debajo del promedio<br>
-                    • 18-20: Promedio (desarrollo natural normal)<br>
-                    • 20-22: Por encima del promedio (buen entrenamiento)<br>
-                    • <strong>22-25: Excelente (años de entrenamiento) ← Tú estás aquí</strong><br>
-                    • 25+: Elite/excepcional (límite natural ~25-26)
-                    """
-                else:
-                    feedback_ffmi = "Elite/excepcional. Desarrollo muscular muy avanzado. Genética favorable o entrenamiento de años."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Hombres):</strong><br>
-                    • &lt;18: Por debajo del promedio<br>
-                    • 18-20: Promedio (desarrollo natural normal)<br>
-                    • 20-22: Por encima del promedio (buen entrenamiento)<br>
-                    • 22-25: Excelente (años de entrenamiento)<br>
-                    • <strong>25+: Elite/excepcional (límite natural ~25-26) ← Tú estás aquí</strong>
-                    """
-            else:  # Mujer
-                if ffmi < 15:
-                    feedback_ffmi = "Por debajo del promedio. Potencial de ganancia muscular significativo con entrenamiento."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Mujeres):</strong><br>
-                    • <strong>&lt;15: Por debajo del promedio ← Tú estás aquí</strong><br>
-                    • 15-17: Promedio (desarrollo natural normal)<br>
-                    • 17-18: Por encima del promedio (buen entrenamiento)<br>
-                    • 18-20: Excelente (años de entrenamiento)<br>
-                    • 20+: Elite/excepcional (límite natural ~20-21)
-                    """
-                elif ffmi < 17:
-                    feedback_ffmi = "Nivel promedio. Desarrollo muscular natural normal. Buen punto de partida."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Mujeres):</strong><br>
-                    • &lt;15: Por debajo del promedio<br>
-                    • <strong>15-17: Promedio (desarrollo natural normal) ← Tú estás aquí</strong><br>
-                    • 17-18: Por encima del promedio (buen entrenamiento)<br>
-                    • 18-20: Excelente (años de entrenamiento)<br>
-                    • 20+: Elite/excepcional (límite natural ~20-21)
-                    """
-                elif ffmi < 18:
-                    feedback_ffmi = "Por encima del promedio. Buen desarrollo muscular. Nivel intermedio-avanzado."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Mujeres):</strong><br>
-                    • &lt;15: Por debajo del promedio<br>
-                    • 15-17: Promedio (desarrollo natural normal)<br>
-                    • <strong>17-18: Por encima del promedio (buen entrenamiento) ← Tú estás aquí</strong><br>
-                    • 18-20: Excelente (años de entrenamiento)<br>
-                    • 20+: Elite/excepcional (límite natural ~20-21)
-                    """
-                elif ffmi < 20:
-                    feedback_ffmi = "Excelente desarrollo. Nivel avanzado. Años de entrenamiento consistente."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Mujeres):</strong><br>
-                    • &lt;15: Por debajo del promedio<br>
-                    • 15-17: Promedio (desarrollo natural normal)<br>
-                    • 17-18: Por encima del promedio (buen entrenamiento)<br>
-                    • <strong>18-20: Excelente (años de entrenamiento) ← Tú estás aquí</strong><br>
-                    • 20+: Elite/excepcional (límite natural ~20-21)
-                    """
-                else:
-                    feedback_ffmi = "Elite/excepcional. Desarrollo muscular muy avanzado. Genética favorable o entrenamiento de años."
-                    rangos_ffmi = """
-                    <strong>Rangos FFMI (Mujeres):</strong><br>
-                    • &lt;15: Por debajo del promedio<br>
-                    • 15-17: Promedio (desarrollo natural normal)<br>
-                    • 17-18: Por encima del promedio (buen entrenamiento)<br>
-                    • 18-20: Excelente (años de entrenamiento)<br>
-                    • <strong>20+: Elite/excepcional (límite natural ~20-21) ← Tú estás aquí</strong>
-                    """
-        
-        # Feedback para IMC (Índice de Masa Corporal)
-        feedback_imc = ""
-        rangos_imc = ""
-        if imc < 16:
-            feedback_imc = "Delgadez severa. Por debajo del peso saludable. Considera consulta nutricional."
-            rangos_imc = """
-            <strong>Clasificación IMC (OMS):</strong><br>
-            • <strong>&lt;16: Delgadez severa ← Tú estás aquí</strong><br>
-            • 16-17: Delgadez moderada<br>
-            • 17-18.5: Delgadez leve<br>
-            • 18.5-25: Normopeso (saludable)<br>
-            • 25-30: Sobrepeso<br>
-            • 30-35: Obesidad grado I<br>
-            • 35-40: Obesidad grado II<br>
-            • 40+: Obesidad grado III (mórbida)
-            """
-        elif imc < 17:
-            feedback_imc = "Delgadez moderada. Por debajo del peso recomendado. Evalúa aumentar masa muscular."
-            rangos_imc = """
-            <strong>Clasificación IMC (OMS):</strong><br>
-            • &lt;16: Delgadez severa<br>
-            • <strong>16-17: Delgadez moderada ← Tú estás aquí</strong><br>
-            • 17-18.5: Delgadez leve<br>
-            • 18.5-25: Normopeso (saludable)<br>
-            • 25-30: Sobrepeso<br>
-            • 30-35: Obesidad grado I<br>
-            • 35-40: Obesidad grado II<br>
-            • 40+: Obesidad grado III (mórbida)
-            """
-        elif imc < 18.5:
-            feedback_imc = "Delgadez leve. Cerca del rango saludable. Considera ganar masa muscular."
-            rangos_imc = """
-            <strong>Clasificación IMC (OMS):</strong><br>
-            • &lt;16: Delgadez severa<br>
-            • 16-17: Delgadez moderada<br>
-            • <strong>17-18.5: Delgadez leve ← Tú estás aquí</strong><br>
-            • 18.5-25: Normopeso (saludable)<br>
-            • 25-30: Sobrepeso<br>
-            • 30-35: Obesidad grado I<br>
-            • 35-40: Obesidad grado II<br>
-            • 40+: Obesidad grado III (mórbida)
-            """
-        elif imc < 25:
-            feedback_imc = "¡Excelente! Normopeso. Rango saludable según OMS. Mantén buenos hábitos."
-            rangos_imc = """
-            <strong>Clasificación IMC (OMS):</strong><br>
-            • &lt;16: Delgadez severa<br>
-            • 16-17: Delgadez moderada<br>
-            • 17-18.5: Delgadez leve<br>
-            • <strong>18.5-25: Normopeso (saludable) ← Tú estás aquí</strong><br>
-            • 25-30: Sobrepeso<br>
-            • 30-35: Obesidad grado I<br>
-            • 35-40: Obesidad grado II<br>
-            • 40+: Obesidad grado III (mórbida)
-            """
-        elif imc < 30:
-            feedback_imc = "Sobrepeso. Riesgo moderado de complicaciones metabólicas. Beneficio de reducir grasa."
-            rangos_imc = """
-            <strong>Clasificación IMC (OMS):</strong><br>
-            • &lt;16: Delgadez severa<br>
-            • 16-17: Delgadez moderada<br>
-            • 17-18.5: Delgadez leve<br>
-            • 18.5-25: Normopeso (saludable)<br>
-            • <strong>25-30: Sobrepeso ← Tú estás aquí</strong><br>
-            • 30-35: Obesidad grado I<br>
-            • 35-40: Obesidad grado II<br>
-            • 40+: Obesidad grado III (mórbida)
-            """
-        elif imc < 35:
-            feedback_imc = "Obesidad grado I. Riesgo incrementado. Importante reducir grasa corporal para salud."
-            rangos_imc = """
-            <strong>Clasificación IMC (OMS):</strong><br>
-            • &lt;16: Delgadez severa<br>
-            • 16-17: Delgadez moderada<br>
-            • 17-18.5: Delgadez leve<br>
-            • 18.5-25: Normopeso (saludable)<br>
-            • 25-30: Sobrepeso<br>
-            • <strong>30-35: Obesidad grado I ← Tú estás aquí</strong><br>
-            • 35-40: Obesidad grado II<br>
-            • 40+: Obesidad grado III (mórbida)
-            """
-        elif imc < 40:
-            feedback_imc = "Obesidad grado II (severa). Alto riesgo. Prioritario trabajar en reducción de peso."
-            rangos_imc = """
-            <strong>Clasificación IMC (OMS):</strong><br>
-            • &lt;16: Delgadez severa<br>
-            • 16-17: Delgadez moderada<br>
-            • 17-18.5: Delgadez leve<br>
-            • 18.5-25: Normopeso (saludable)<br>
-            • 25-30: Sobrepeso<br>
-            • 30-35: Obesidad grado I<br>
-            • <strong>35-40: Obesidad grado II ← Tú estás aquí</strong><br>
-            • 40+: Obesidad grado III (mórbida)
-            """
-        else:
-            feedback_imc = "Obesidad grado III (mórbida). Riesgo muy alto. Urgente intervención médica y nutricional."
-            rangos_imc = """
-            <strong>Clasificación IMC (OMS):</strong><br>
-            • &lt;16: Delgadez severa<br>
-            • 16-17: Delgadez moderada<br>
-            • 17-18.5: Delgadez leve<br>
-            • 18.5-25: Normopeso (saludable)<br>
-            • 25-30: Sobrepeso<br>
-            • 30-35: Obesidad grado I<br>
-            • 35-40: Obesidad grado II<br>
-            • <strong>40+: Obesidad grado III (mórbida) ← Tú estás aquí</strong>
-            """
-        
-        # Feedback para edad metabólica
-        feedback_edad_metabolica = ""
-        rangos_edad_metabolica = ""
-        if edad_metabolica is not None:
-            diff_edad = edad - edad_metabolica
-            if diff_edad > 5:
-                feedback_edad_metabolica = "¡Excelente! Tu metabolismo está significativamente más joven. Refleja buenos hábitos y composición corporal saludable."
-                rangos_edad_metabolica = """
-                <strong>Interpretación Edad Metabólica:</strong><br>
-                • <strong>Tu edad real - metabólica = {diff:.0f} años (Excelente) ← Tú estás aquí</strong><br>
-                • Más de 5 años menor: Metabolismo juvenil, salud óptima<br>
-                • 1-5 años menor: Buen estado, por encima del promedio<br>
-                • Igual: Normal, hay espacio para mejorar<br>
-                • 1-5 años mayor: Atención, prioriza mejorar composición<br>
-                • Más de 5 años mayor: Urgente optimizar estilo de vida
-                """.format(diff=diff_edad)
-            elif diff_edad > 0:
-                feedback_edad_metabolica = "Bien. Tu metabolismo es ligeramente más joven. Continúa con buenos hábitos de entrenamiento y nutrición."
-                rangos_edad_metabolica = """
-                <strong>Interpretación Edad Metabólica:</strong><br>
-                • Más de 5 años menor: Metabolismo juvenil, salud óptima<br>
-                • <strong>1-5 años menor: Buen estado, por encima del promedio ← Tú estás aquí ({diff:.0f} años)</strong><br>
-                • Igual: Normal, hay espacio para mejorar<br>
-                • 1-5 años mayor: Atención, prioriza mejorar composición<br>
-                • Más de 5 años mayor: Urgente optimizar estilo de vida
-                """.format(diff=diff_edad)
-            elif diff_edad == 0:
-                feedback_edad_metabolica = "Tu edad metabólica coincide con tu edad cronológica. Hay espacio para mejorar con ejercicio y nutrición."
-                rangos_edad_metabolica = """
-                <strong>Interpretación Edad Metabólica:</strong><br>
-                • Más de 5 años menor: Metabolismo juvenil, salud óptima<br>
-                • 1-5 años menor: Buen estado, por encima del promedio<br>
-                • <strong>Igual: Normal, hay espacio para mejorar ← Tú estás aquí</strong><br>
-                • 1-5 años mayor: Atención, prioriza mejorar composición<br>
-                • Más de 5 años mayor: Urgente optimizar estilo de vida
-                """
-            elif diff_edad > -5:
-                feedback_edad_metabolica = "Tu metabolismo está ligeramente envejecido. Mejorar composición corporal ayudará a revertir esto."
-                rangos_edad_metabolica = """
-                <strong>Interpretación Edad Metabólica:</strong><br>
-                • Más de 5 años menor: Metabolismo juvenil, salud óptima<br>
-                • 1-5 años menor: Buen estado, por encima del promedio<br>
-                • Igual: Normal, hay espacio para mejorar<br>
-                • <strong>1-5 años mayor: Atención, prioriza mejorar composición ← Tú estás aquí ({diff:.0f} años)</strong><br>
-                • Más de 5 años mayor: Urgente optimizar estilo de vida
-                """.format(diff=abs(diff_edad))
-            else:
-                feedback_edad_metabolica = "Atención: metabolismo envejecido. Prioriza mejorar composición corporal, ejercicio y hábitos de sueño."
-                rangos_edad_metabolica = """
-                <strong>Interpretación Edad Metabólica:</strong><br>
-                • Más de 5 años menor: Metabolismo juvenil, salud óptima<br>
-                • 1-5 años menor: Buen estado, por encima del promedio<br>
-                • Igual: Normal, hay espacio para mejorar<br>
-                • 1-5 años mayor: Atención, prioriza mejorar composición<br>
-                • <strong>Más de 5 años mayor: Urgente optimizar estilo de vida ← Tú estás aquí ({diff:.0f} años)</strong>
-                """.format(diff=abs(diff_edad))
-        
-        # Feedback para WtHR
-        feedback_wthr = ""
-        rangos_wthr = ""
-        if wthr is not None:
-            if wthr < 0.40:
-                feedback_wthr = "Extremadamente delgado. Considera si es saludable para ti."
-                rangos_wthr = """
-                <strong>Rangos WtHR (Waist-to-Height Ratio):</strong><br>
-                • <strong>&lt;0.40: Muy delgado/Atlético ← Tú estás aquí</strong><br>
-                • 0.40-0.50: Saludable (riesgo CVD bajo)<br>
-                • 0.50-0.60: Sobrepeso (riesgo CVD incrementado)<br>
-                • 0.60+: Obesidad central (riesgo CVD alto)<br><br>
-                <em>CVD = Enfermedad cardiovascular. Recomendación general: mantener WtHR &lt;0.50</em>
-                """
-            elif wthr < 0.50:
-                feedback_wthr = "¡Excelente! Rango saludable. Bajo riesgo cardiovascular y metabólico."
-                rangos_wthr = """
-                <strong>Rangos WtHR (Waist-to-Height Ratio):</strong><br>
-                • &lt;0.40: Muy delgado/Atlético<br>
-                • <strong>0.40-0.50: Saludable (riesgo CVD bajo) ← Tú estás aquí</strong><br>
-                • 0.50-0.60: Sobrepeso (riesgo CVD incrementado)<br>
-                • 0.60+: Obesidad central (riesgo CVD alto)<br><br>
-                <em>CVD = Enfermedad cardiovascular. Recomendación general: mantener WtHR &lt;0.50</em>
-                """
-            elif wthr < 0.60:
-                feedback_wthr = "Atención: sobrepeso. Riesgo moderado. Reducir cintura mejorará salud metabólica."
-                rangos_wthr = """
-                <strong>Rangos WtHR (Waist-to-Height Ratio):</strong><br>
-                • &lt;0.40: Muy delgado/Atlético<br>
-                • 0.40-0.50: Saludable (riesgo CVD bajo)<br>
-                • <strong>0.50-0.60: Sobrepeso (riesgo CVD incrementado) ← Tú estás aquí</strong><br>
-                • 0.60+: Obesidad central (riesgo CVD alto)<br><br>
-                <em>CVD = Enfermedad cardiovascular. Recomendación general: mantener WtHR &lt;0.50</em>
-                """
-            else:
-                feedback_wthr = "Alerta: obesidad central. Alto riesgo cardiovascular. Prioriza reducir grasa abdominal."
-                rangos_wthr = """
-                <strong>Rangos WtHR (Waist-to-Height Ratio):</strong><br>
-                • &lt;0.40: Muy delgado/Atlético<br>
-                • 0.40-0.50: Saludable (riesgo CVD bajo)<br>
-                • 0.50-0.60: Sobrepeso (riesgo CVD incrementado)<br>
-                • <strong>0.60+: Obesidad central (riesgo CVD alto) ← Tú estás aquí</strong><br><br>
-                <em>CVD = Enfermedad cardiovascular. Recomendación general: mantener WtHR &lt;0.50</em>
-                """
-        
-        # Feedback para grasa visceral
-        feedback_visceral = ""
-        if grasa_visceral is not None:
-            if grasa_visceral < 10:
-                feedback_visceral = "¡Perfecto! Nivel saludable. La grasa visceral es la más peligrosa y la tuya está bien controlada."
-                info_visceral = "Nivel 1-9 = Saludable. Bajo riesgo de diabetes tipo 2, enfermedades cardíacas y síndrome metabólico."
-            elif grasa_visceral < 15:
-                feedback_visceral = "Atención: nivel elevado. Considera reducirlo con ejercicio cardiovascular y dieta antiinflamatoria."
-                info_visceral = "Nivel 10-14 = Elevado. Riesgo moderado. Prioriza ejercicio aeróbico y reducir calorías."
-            else:
-                feedback_visceral = "Alerta: nivel alto. Aumenta riesgo de diabetes, enfermedades cardíacas. Prioriza reducirlo urgentemente."
-                info_visceral = "Nivel 15+ = Alto riesgo. Requiere atención inmediata. La grasa visceral rodea órganos internos."
-        
-        # Feedback para masa muscular (priorizar aparato, fallback a estimada)
-        masa_muscular_para_feedback = masa_muscular_aparato if masa_muscular_aparato > 0 else masa_muscular_estimada
-        pct_masa_muscular_para_feedback = pct_masa_muscular_aparato if pct_masa_muscular_aparato > 0 else pct_masa_muscular_estimada
-        
-        feedback_masa_muscular = ""
-        if masa_muscular_para_feedback > 0 and pct_masa_muscular_para_feedback > 0:
-            if sexo == "Hombre":
-                if pct_masa_muscular_para_feedback < 33:
-                    feedback_masa_muscular = "Bajo. Potencial significativo de ganancia muscular con entrenamiento de fuerza."
-                    rango_masa_muscular = "Rango objetivo: 38-44%"
-                elif pct_masa_muscular_para_feedback < 38:
-                    feedback_masa_muscular = "Por debajo del promedio. Responderás bien al entrenamiento de fuerza."
-                    rango_masa_muscular = "Rango objetivo: 38-44%"
-                elif pct_masa_muscular_para_feedback < 44:
-                    feedback_masa_muscular = "Promedio saludable. Buen punto de partida para desarrollo muscular."
-                    rango_masa_muscular = "Rango objetivo: 38-44%"
-                elif pct_masa_muscular_para_feedback < 50:
-                    feedback_masa_muscular = "Por encima del promedio. Buen desarrollo muscular. Sigue con entrenamiento consistente."
-                    rango_masa_muscular = "Rango objetivo: 38-44%"
-                else:
-                    feedback_masa_muscular = "Excelente. Desarrollo muscular avanzado. Mantén con entrenamiento y nutrición óptimos."
-                    rango_masa_muscular = "Rango objetivo: 38-44%"
-            else:  # Mujer
-                if pct_masa_muscular_para_feedback < 28:
-                    feedback_masa_muscular = "Bajo. Gran potencial de ganancia muscular con entrenamiento de fuerza."
-                    rango_masa_muscular = "Rango objetivo: 31-37%"
-                elif pct_masa_muscular_para_feedback < 31:
-                    feedback_masa_muscular = "Por debajo del promedio. Responderás bien al entrenamiento de fuerza."
-                    rango_masa_muscular = "Rango objetivo: 31-37%"
-                elif pct_masa_muscular_para_feedback < 35:
-                    feedback_masa_muscular = "Promedio saludable. Buen punto de partida para desarrollo muscular."
-                    rango_masa_muscular = "Rango objetivo: 31-37%"
-                elif pct_masa_muscular_para_feedback < 40:
-                    feedback_masa_muscular = "Por encima del promedio. Buen desarrollo muscular. Sigue así."
-                    rango_masa_muscular = "Rango objetivo: 31-37%"
-                else:
-                    feedback_masa_muscular = "Excelente. Desarrollo muscular avanzado. Mantén con entrenamiento y nutrición óptimos."
-                    rango_masa_muscular = "Rango objetivo: 31-37%"
-        else:
-            feedback_masa_muscular = "No hay suficientes datos para evaluar masa muscular."
-            rango_masa_muscular = ""
-        
-        # Feedback para nivel de entrenamiento
-        feedback_nivel = ""
-        if nivel_entrenamiento:
-            if nivel_entrenamiento.lower() == 'principiante':
-                feedback_nivel = "Inicio del viaje. Gran potencial de mejora. Enfócate en aprender técnica y crear hábitos consistentes."
-            elif nivel_entrenamiento.lower() == 'intermedio':
-                feedback_nivel = "Nivel sólido. Ya tienes base. Enfócate en periodización, progresión e intensidad para seguir avanzando."
-            elif nivel_entrenamiento.lower() == 'avanzado':
-                feedback_nivel = "Nivel avanzado. Años de entrenamiento. Necesitas programación muy específica y recuperación óptima."
-            else:
-                feedback_nivel = "Tu nivel refleja tu experiencia, desarrollo muscular y capacidad funcional actual."
-        
-        # Obtener datos de ciclo menstrual si aplica
-        ciclo_menstrual_info = ""
-        if sexo == "Mujer":
-            ciclo = st.session_state.get('ciclo_menstrual', None)
-            if ciclo:
-                ciclo_menstrual_info = f"\n   • Fase del ciclo menstrual: {ciclo}"
-        
-        # Obtener datos de sueño y estrés si están disponibles
-        seccion_recuperacion = ""
-        if st.session_state.get('suenyo_estres_completado', False):
-            data_se = st.session_state.get('suenyo_estres_data', {})
-            if data_se and 'ir_se' in data_se:
-                ir_se = data_se.get('ir_se', 0)
-                nivel_recup = data_se.get('nivel_recuperacion', 'No determinado')
-                emoji_recup = data_se.get('emoji_nivel', '')
-                
-                seccion_recuperacion = f"""
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-😴 ESTADO DE RECUPERACIÓN (SUEÑO + ESTRÉS)
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-   ╔════════════════════════════════════════════════════════════════╗
-   ║  ÍNDICE DE RECUPERACIÓN (IR-SE): {ir_se:.1f}/100                   ║
-   ║  NIVEL: {nivel_recup} {emoji_recup}                                      ║
-   ╚════════════════════════════════════════════════════════════════╝
-
-   • Calidad de sueño: {data_se.get('sleep_score', 0):.1f}/100
-   • Nivel de estrés: {data_se.get('stress_score', 0):.1f}/100
-   
-   💡 Este índice refleja tu capacidad de recuperación y adaptación al
-      entrenamiento. Valores bajos pueden limitar tu progreso.
-"""
-
-        contenido = f"""
-╔═══════════════════════════════════════════════════════════════════════════════╗
-║                   REPORTE DE EVALUACIÓN CORPORAL                              ║
-╠═══════════════════════════════════════════════════════════════════════════════╣
-║  Muscle Up Performance Assessment Intelligence                               ║
-║  {datetime.now().strftime("%Y-%m-%d")}                                                              ║
-╚═══════════════════════════════════════════════════════════════════════════════╝
-
-Hola {nombre_cliente},
-
-¡Gracias por confiar en nosotros para tu evaluación! Aquí están los resultados
-completos de tu análisis de composición corporal y rendimiento.
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📊 DATOS DE EVALUACIÓN
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-👤 IDENTIFICACIÓN:
-   • Nombre: {nombre_cliente}
-   • Edad: {edad} años
-   • Sexo: {sexo}
-   • Fecha de evaluación: {fecha}{ciclo_menstrual_info}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📐 COMPOSICIÓN CORPORAL
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-📏 MEDIDAS BÁSICAS:
-   
-   ╔════════════════════════════════════════════════════════════════╗
-   ║  Peso corporal:         {peso:.1f} kg                              ║
-   ║  Estatura:              {estatura:.1f} cm                           ║
-   ║  IMC:                   {imc:.1f} kg/m²                         ║
-   ╚════════════════════════════════════════════════════════════════╝
-
-📊 ANÁLISIS DE TEJIDOS:
-
-   ╔════════════════════════════════════════════════════════════════╗
-   ║  % Grasa corporal:      {grasa_corregida:.1f}% {emoji_grasa}                        ║
-   ║  Categoría:             {categoria_grasa}                  ║
-   ║                                                                ║
-   ║  Masa Grasa:            {masa_grasa_calc:.1f} kg                            ║
-   ║  Masa Libre de Grasa (MLG): {mlg:.1f} kg ({pct_mlg:.1f}%)              ║
-   ╚════════════════════════════════════════════════════════════════╝
-   
-   💪 MASA MUSCULAR ESQUELÉTICA:
-   {f'   🔵 Omron (medido):      {masa_muscular_aparato_kg:.1f} kg ({pct_masa_muscular_aparato:.1f}%)' if masa_muscular_aparato > 0 else ''}
-   🟣 Estimado científico: {masa_muscular_estimada:.1f} kg ({pct_masa_muscular_estimada:.1f}%)
-   
-   📝 Nota: Omron mide directamente; estimado se calcula desde MLG.
-      Si difieren >15%, puede ser por hidratación o método.
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📈 ÍNDICES CORPORALES
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-💪 FFMI (Índice de Masa Libre de Grasa):
-   • Valor: {ffmi:.1f} {'(dato no disponible)' if ffmi is None else ''}
-   • Indicador: Desarrollo muscular ajustado por altura
-   
-⚕️ ÍNDICES DE SALUD:"""
-
-        # Agregar circunferencia de cintura y WtHR si están disponibles
-        if circunferencia_cintura is not None:
-            contenido += f"""
-   • Circunferencia de cintura: {circunferencia_cintura} cm"""
-        
-        if wthr is not None:
-            contenido += f"""
-   • Ratio Cintura-Altura (WtHR): {wthr:.3f}{wthr_clasificacion}"""
-        
-        if grasa_visceral is not None:
-            contenido += f"""
-   • Grasa visceral: Nivel {grasa_visceral}{grasa_visceral_clasificacion}"""
-        
-        if edad_metabolica is not None:
-            contenido += f"""
-
-🧬 EDAD METABÓLICA:
-   • Edad cronológica: {edad} años
-   • Edad metabólica: {edad_metabolica} años
-   • {'✅ Tu metabolismo es ' + str(edad - edad_metabolica) + ' años más joven' if edad_metabolica < edad else '⚠️ Tu metabolismo está ' + str(edad_metabolica - edad) + ' años por encima' if edad_metabolica > edad else '📊 Tu edad metabólica coincide con tu edad'}"""
-
-        # Agregar nivel de entrenamiento si está disponible
-        if nivel_entrenamiento:
-            contenido += f"""
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-💪 NIVEL DE ENTRENAMIENTO
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-   ╔════════════════════════════════════════════════════════════════╗
-   ║  NIVEL: {nivel_entrenamiento.upper()}                                       ║
-   ╚════════════════════════════════════════════════════════════════╝
-   
-   Este nivel se calcula evaluando tu desarrollo muscular, rendimiento
-   funcional y experiencia de entrenamiento."""
-
-        # Agregar sección de recuperación si está disponible
-        contenido += seccion_recuperacion
-
-        contenido += f"""
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📸 FOTOGRAFÍAS DE PROGRESO
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-Las fotografías de tu evaluación están adjuntas a este correo para tu registro.
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📱 PRÓXIMOS PASOS
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-Tu coach se pondrá en contacto contigo para:
-
-   ✅ Revisar en detalle tus resultados
-   ✅ Diseñar tu plan nutricional personalizado
-   ✅ Establecer objetivos específicos y proyecciones
-   ✅ Programar tu seguimiento y ajustes
-
-Si tienes alguna pregunta o inquietud, no dudes en contactarnos.
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-Muscle Up GYM
-Digital Training Science
-muscleupgym.fitness
-administracion@muscleupgym.fitness
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-"""
-
-        msg = MIMEMultipart('alternative')
-        msg['From'] = email_origen
-        msg['To'] = email_destino
-        msg['Subject'] = f"Resultados de tu Evaluación Corporal - {nombre_cliente}"
-
-        
-        # Construir el cuerpo del email profesional (texto plano como fallback)
-        contenido = f"""
-=====================================
-REPORTE DE EVALUACIÓN — PARTE 2
-(Lectura Visual, Línea Base)
-=====================================
-Sistema: MUPAI v2.0 - Muscle Up Performance Assessment Intelligence
-Generado: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-
-=====================================
-INFORMACIÓN DEL CLIENTE
-=====================================
-Nombre completo: {nombre_cliente}
-Fecha de evaluación: {fecha}
-Edad: {edad} años
-Sexo: {sexo}
-{f"Fase del ciclo menstrual: {ciclo_menstrual}" if ciclo_menstrual else ""}
-
-=====================================
-COMPOSICIÓN CORPORAL — LÍNEA BASE
-=====================================
-
-📊 ANTROPOMETRÍA BÁSICA:
-   • Peso corporal: {peso:.1f} kg
-   • Estatura: {estatura:.1f} cm ({estatura/100:.2f} m)
-   • IMC: {imc:.1f} kg/m²
-   • Circunferencia de cintura: {f"{circunferencia_cintura_val:.1f} cm" if circunferencia_cintura_val > 0 else "[____]"}
-   • Circunferencia de cuello: {f"{circunferencia_cuello_val:.1f} cm" if circunferencia_cuello_val > 0 else "[____]"}
-   • Circunferencia de cadera: {f"{circunferencia_cadera_val:.1f} cm" if circunferencia_cadera_val > 0 else "[____]"}
-   • Ratio Cintura-Altura (WtHR): {f"{wthr:.3f}" if wthr > 0 else "[____]"}
-     {f"→ Clasificación: {clasificacion_wthr}" if wthr > 0 else ""}
-
-📊 COMPOSICIÓN CORPORAL (MÉTODO DEXA-EQUIVALENTE):
-   • % Grasa corporal (corregido DEXA): {grasa_corregida:.1f}%
-   • Masa Libre de Grasa (MLG): {mlg:.1f} kg
-   • Masa Grasa: {peso - mlg:.1f} kg
-
-📊 INDICADORES OPCIONALES MEDIDOS:
-   • % Masa muscular: {f"{masa_muscular_val:.1f}%" if masa_muscular_val > 0 else "[____]"}
-     {f"→ Clasificación: {clasificacion_masa_muscular}" if masa_muscular_val > 0 else ""}
-     
-   • Grasa visceral (nivel): {grasa_visceral_val if grasa_visceral_val >= 1 else "[____]"}
-     {f"→ Clasificación: {clasificacion_grasa_visceral}" if grasa_visceral_val >= 1 else ""}
-
-📊 METABOLISMO BASAL:
-   • TMB (Cunningham): {tmb:.0f} kcal/día
-
-📷 FOTOGRAFÍAS DE PROGRESO:
-   {format_photo_status(progress_photos)}
-
-=====================================
-NOTAS IMPORTANTES
-=====================================
-✓ Este es un reporte de LÍNEA BASE (baseline evaluation)
-✓ No incluye comparaciones con sesiones previas
-✓ Las clasificaciones automáticas se aplican SOLO cuando los campos están vacíos o marcados como N/D
-✓ Los datos existentes y sus clasificaciones originales se respetan sin sustitución
-
-=====================================
-RECORDATORIO PROFESIONAL
-=====================================
-• Este reporte es exclusivamente para uso interno administrativo
-• Basado en evaluación científica con corrección DEXA
-• Requiere interpretación por profesional calificado
-• Los valores [____] indican datos no medidos o no disponibles
-
-=====================================
-© 2025 MUPAI - Muscle Up GYM
-Digital Training Science
-muscleupgym.fitness
-=====================================
-"""
-
-        contenido_html = f"""
-
-<!DOCTYPE html>
-<html lang="es">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <style>
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-            line-height: 1.6;
-            color: #333333;
-            background-color: #f5f5f5;
-            margin: 0;
-            padding: 0;
-        }}
-        .container {{
-            max-width: 600px;
-            margin: 20px auto;
-            background-color: #ffffff;
-            border-radius: 10px;
-            overflow: hidden;
-            box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        }}
-        .header {{
-            background: linear-gradient(135deg, #1a1a1a 0%, #2d2d2d 100%);
-            color: #FFD700;
-            padding: 30px 20px;
-            text-align: center;
-            position: relative;
-        }}
-        .header-logos {{
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 20px;
-            padding: 0 20px;
-        }}
-        .header-logo {{
-            max-height: 60px;
-            max-width: 150px;
-            object-fit: contain;
-        }}
-        .header h1 {{
-            margin: 0;
-            font-size: 24px;
-            font-weight: 600;
-        }}
-        .header p {{
-            margin: 10px 0 0 0;
-            color: #cccccc;
-            font-size: 14px;
-        }}
-        .content {{
-            padding: 30px 20px;
-        }}
-        .section {{
-            margin-bottom: 30px;
-        }}
-        .section-title {{
-            background: linear-gradient(90deg, #FFD700 0%, #FFA500 100%);
-            color: #1a1a1a;
-            padding: 12px 15px;
-            margin: 0 -20px 20px -20px;
-            font-size: 18px;
-            font-weight: 600;
-            border-left: 5px solid #FF8C00;
-        }}
-        .info-row {{
-            display: table;
-            width: 100%;
-            margin-bottom: 10px;
-        }}
-        .info-label {{
-            font-weight: 600;
-            color: #555555;
-            margin-right: 10px;
-        }}
-        .info-value {{
-            color: #1a1a1a;
-        }}
-        .card {{
-            background-color: #f9f9f9;
-            border-left: 4px solid #FFD700;
-            padding: 15px;
-            margin-bottom: 15px;
-            border-radius: 5px;
-        }}
-        .card-highlight {{
-            background: linear-gradient(135deg, #FFD700 0%, #FFA500 100%);
-            color: #1a1a1a;
-            padding: 20px;
-            text-align: center;
-            border-radius: 8px;
-            margin-bottom: 15px;
-            font-weight: 600;
-            font-size: 18px;
-        }}
-        .metric-grid {{
-            display: table;
-            width: 100%;
-            border-collapse: collapse;
-        }}
-        .metric-row {{
-            display: table-row;
-        }}
-        .metric-cell {{
-            display: table-cell;
-            padding: 12px;
-            border-bottom: 1px solid #e0e0e0;
-            vertical-align: middle;
-        }}
-        .metric-label {{
-            font-weight: 600;
-            color: #555555;
-            width: 50%;
-        }}
-        .metric-value {{
-            color: #1a1a1a;
-            font-size: 16px;
-            text-align: right;
-        }}
-        .badge {{
-            display: inline-block;
-            padding: 4px 12px;
-            border-radius: 20px;
-            font-size: 14px;
-            font-weight: 600;
-            margin-left: 10px;
-        }}
-        .badge-green {{
-            background-color: #27AE60;
-            color: white;
-        }}
-        .badge-yellow {{
-            background-color: #F39C12;
-            color: white;
-        }}
-        .badge-red {{
-            background-color: #E74C3C;
-            color: white;
-        }}
-        .badge-blue {{
-            background-color: #3498DB;
-            color: white;
-        }}
-        .index-card {{
-            background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
-            border: 2px solid #FFD700;
-            border-radius: 8px;
-            padding: 20px;
-            margin-bottom: 15px;
-            text-align: center;
-        }}
-        .index-value {{
-            font-size: 32px;
-            font-weight: 700;
-            color: #1a1a1a;
-            margin: 10px 0;
-        }}
-        .index-label {{
-            font-size: 14px;
-            color: #555555;
-            margin-bottom: 5px;
-        }}
-        .cta-box {{
-            background-color: #f0f8ff;
-            border: 2px solid #3498DB;
-            border-radius: 8px;
-            padding: 20px;
-            margin: 20px 0;
-        }}
-        .cta-title {{
-            color: #3498DB;
-            font-size: 18px;
-            font-weight: 600;
-            margin-bottom: 15px;
-        }}
-        .cta-list {{
-            list-style: none;
-            padding: 0;
-            margin: 0;
-        }}
-        .cta-list li {{
-            padding: 8px 0 8px 30px;
-            position: relative;
-        }}
-        .cta-list li:before {{
-            content: "✅";
-            position: absolute;
-            left: 0;
-        }}
-        .footer {{
-            background-color: #1a1a1a;
-            color: #cccccc;
-            padding: 30px 20px;
-            text-align: center;
-            font-size: 14px;
-        }}
-        .footer-logos {{
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            gap: 40px;
-            margin-bottom: 20px;
-        }}
-        .footer-logo {{
-            max-height: 50px;
-            max-width: 120px;
-            object-fit: contain;
-            opacity: 0.9;
-        }}
-        .footer a {{
-            color: #FFD700;
-            text-decoration: none;
-        }}
-        @media only screen and (max-width: 600px) {{
-            .container {{
-                margin: 0;
-                border-radius: 0;
-            }}
-            .content {{
-                padding: 20px 15px;
-            }}
-            .section-title {{
-                font-size: 16px;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <div class="header-logos">
-                <img src="data:image/png;base64,{logo_mupai_b64}" alt="MUPAI Logo" class="header-logo" />
-                <img src="data:image/png;base64,{logo_gym_b64}" alt="Muscle Up GYM Logo" class="header-logo" />
-            </div>
-            <h1>REPORTE INTERNO — PARTE 2</h1>
-            <p>Muscle Up Performance Assessment Intelligence</p>
-            <p>{datetime.now().strftime("%d de %B, %Y")}</p>
-            <span class="badge-internal">🔒 CONFIDENCIAL - USO INTERNO</span>
-        </div>
-        
-        <div class="content">
-            <p style="font-size: 16px; color: #555;">Hola <strong>{nombre_cliente}</strong>,</p>
-            <p style="font-size: 14px; color: #666; margin-bottom: 20px; padding: 15px; background-color: #fff3cd; border-left: 4px solid #ffc107; border-radius: 5px;">
-                <strong>⚠️ Nota administrativa:</strong> Este reporte contiene TODA la información enviada al cliente para referencia interna.
-            </p>
-            <p style="font-size: 14px; color: #666; margin-bottom: 30px;">
-                ¡Gracias por confiar en nosotros para tu evaluación! Aquí están los resultados 
-                completos de tu análisis de composición corporal y rendimiento.
-            </p>
-            
-            <!-- DATOS DE EVALUACIÓN -->
-            <div class="section">
-                <div class="section-title">📊 Datos de Evaluación</div>
-                <div class="card">
-                    <div class="metric-grid">
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">Nombre</div>
-                            <div class="metric-cell metric-value">{nombre_cliente}</div>
-                        </div>
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">Edad</div>
-                            <div class="metric-cell metric-value">{edad} años</div>
-                        </div>
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">Sexo</div>
-                            <div class="metric-cell metric-value">{sexo}</div>
-                        </div>
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">Fecha de evaluación</div>
-                            <div class="metric-cell metric-value">{fecha}</div>
-                        </div>
-                        {f'''<div class="metric-row">
-                            <div class="metric-cell metric-label">Fase del ciclo</div>
-                            <div class="metric-cell metric-value">{st.session_state.get('ciclo_menstrual', '')}</div>
-                        </div>''' if sexo == "Mujer" and st.session_state.get('ciclo_menstrual') else ''}
-                    </div>
-                </div>
-            </div>
-            
-            <!-- COMPOSICIÓN CORPORAL -->
-            <div class="section">
-                <div class="section-title">📐 Composición Corporal</div>
-                
-                <div class="card">
-                    <h4 style="margin-top: 0; color: #555;">Medidas Básicas</h4>
-                    <div class="metric-grid">
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">Peso corporal</div>
-                            <div class="metric-cell metric-value"><strong>{peso:.1f} kg</strong></div>
-                        </div>
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">Estatura</div>
-                            <div class="metric-cell metric-value"><strong>{estatura:.1f} cm</strong></div>
-                        </div>
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">IMC</div>
-                            <div class="metric-cell metric-value"><strong>{imc:.1f} kg/m²</strong></div>
-                        </div>
-                    </div>
-                    <div style="margin-top: 15px; padding: 12px; background-color: #e3f2fd; border-radius: 5px; border-left: 4px solid #3498DB;">
-                        <p style="margin: 0 0 8px 0; font-size: 13px; color: #666; font-weight: 600;">📊 Sobre tu IMC:</p>
-                        <p style="margin: 0 0 8px 0; font-size: 13px; color: #444;">{feedback_imc}</p>
-                        <p style="margin: 0; font-size: 12px; color: #888; line-height: 1.6;">{rangos_imc}</p>
-                    </div>
-                </div>
-                
-                <div class="card">
-                    <h4 style="margin-top: 0; color: #555;">Análisis de Tejidos</h4>
-                    <div class="metric-grid">
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">% Grasa corporal</div>
-                            <div class="metric-cell metric-value">
-                                <strong>{grasa_corregida:.1f}%</strong>
-                                <span class="badge badge-{('green' if emoji_grasa == '💪' else 'yellow' if emoji_grasa == '🏃' else 'blue' if emoji_grasa == '📊' else 'red')}">{categoria_grasa}</span>
-                            </div>
-                        </div>
-                    </div>
-                    <div style="margin-top: 15px; padding: 12px; background-color: #f8f9fa; border-radius: 5px; border-left: 4px solid #FFD700;">
-                        <p style="margin: 0 0 8px 0; font-size: 13px; color: #666; font-weight: 600;">💡 Interpretación:</p>
-                        <p style="margin: 0 0 8px 0; font-size: 13px; color: #444;">{feedback_grasa}</p>
-                        <p style="margin: 0 0 8px 0; font-size: 12px; color: #888;">{rango_saludable}</p>
-                        <p style="margin: 0; font-size: 12px; color: #888; line-height: 1.6;">{rangos_detallados}</p>
-                    </div>
-                    <div class="metric-grid" style="margin-top: 15px;">
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">Masa Grasa</div>
-                            <div class="metric-cell metric-value"><strong>{masa_grasa_calc:.1f} kg</strong></div>
-                        </div>
-                        <div class="metric-row" style="background-color: #fff9e6;">
-                            <div class="metric-cell metric-label">Masa Libre de Grasa (MLG)</div>
-                            <div class="metric-cell metric-value"><strong>{mlg:.1f} kg ({pct_mlg:.1f}%)</strong></div>
-                        </div>
-                    </div>
-                    
-                    <!-- Sección de Masa Muscular -->
-                    <div style="margin-top: 20px; padding: 15px; background: linear-gradient(135deg, #e8f5e9 0%, #c8e6c9 100%); border-radius: 8px; border-left: 4px solid #27AE60;">
-                        <h4 style="margin: 0 0 12px 0; color: #27AE60; font-size: 16px;">💪 Masa Muscular Esquelética</h4>
-                        
-                        {f'''<div style="background-color: rgba(255,255,255,0.9); padding: 12px; border-radius: 5px; margin-bottom: 10px; border-left: 3px solid #2196F3;">
-                            <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 5px;">
-                                <span style="font-weight: 600; color: #555;">🔵 Omron (bioimpedancia):</span>
-                                <span style="font-size: 18px; font-weight: 700; color: #2196F3;">{masa_muscular_aparato_kg:.1f} kg ({pct_masa_muscular_aparato:.1f}%)</span>
-                            </div>
-                            <p style="margin: 5px 0 0 0; font-size: 11px; color: #666; font-style: italic;">Valor medido directamente por tu báscula de bioimpedancia</p>
-                        </div>''' if masa_muscular_aparato > 0 else ''}
-                        
-                        <div style="background-color: rgba(255,255,255,0.9); padding: 12px; border-radius: 5px; margin-bottom: 10px; border-left: 3px solid #9C27B0;">
-                            <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 5px;">
-                                <span style="font-weight: 600; color: #555;">🟣 Estimado científico:</span>
-                                <span style="font-size: 18px; font-weight: 700; color: #9C27B0;">{masa_muscular_estimada:.1f} kg ({pct_masa_muscular_estimada:.1f}%)</span>
-                            </div>
-                            <p style="margin: 5px 0 0 0; font-size: 11px; color: #666; font-style: italic;">Calculado desde MLG usando factores por nivel de entrenamiento</p>
-                        </div>
-                        
-                        <div style="background-color: rgba(255,193,7,0.15); padding: 10px; border-radius: 5px; font-size: 12px; color: #555; line-height: 1.5;">
-                            <p style="margin: 0 0 5px 0; font-weight: 600;">📊 ¿Por qué dos valores?</p>
-                            <p style="margin: 0 0 5px 0;">• <strong>Omron</strong>: Medición directa por corriente eléctrica (±3-5% error)</p>
-                            <p style="margin: 0 0 5px 0;">• <strong>Estimado</strong>: Cálculo desde MLG × factor ({('0.37-0.43' if sexo == 'Hombre' else '0.33-0.40')} según nivel)</p>
-                            <p style="margin: 0; font-style: italic; color: #777;">Ambos métodos son válidos. Si difieren mucho (>15%), puede indicar variación en hidratación o método de medición.</p>
-                        </div>
-                    </div>
-                    
-                    {f'''<div style="margin-top: 15px; padding: 12px; background-color: #e3f2fd; border-radius: 5px; border-left: 4px solid #3498DB;">
-                        <p style="margin: 0 0 8px 0; font-size: 13px; color: #666; font-weight: 600;">💡 Interpretación (usando {('Omron' if masa_muscular_aparato > 0 else 'valor estimado')}):</p>
-                        <p style="margin: 0 0 5px 0; font-size: 13px; color: #444;">{feedback_masa_muscular}</p>
-                        <p style="margin: 0; font-size: 12px; color: #888;">{rango_masa_muscular}</p>
-                    </div>''' if feedback_masa_muscular else ''}
-                    
-                    <div style="margin-top: 10px; padding: 10px; background-color: #fff3e0; border-radius: 5px; font-size: 12px; color: #555; line-height: 1.5;">
-                        <p style="margin: 0 0 5px 0; font-weight: 600;">🔬 Nota científica:</p>
-                        <p style="margin: 0;">La <strong>MLG incluye</strong>: músculo + huesos (~15%) + órganos (~12%) + agua (~30-35%). La masa muscular es solo el componente esquelético contráctil.</p>
-                    </div>
-                    <div style="margin-top: 15px; padding: 12px; background-color: #e8f5e9; border-radius: 5px; border-left: 4px solid #27AE60;">
-                        <p style="margin: 0 0 8px 0; font-size: 13px; color: #666; font-weight: 600;">💪 Sobre tu masa muscular:</p>
-                        <p style="margin: 0 0 5px 0; font-size: 13px; color: #444;">{feedback_masa_muscular}</p>
-                        <p style="margin: 0; font-size: 12px; color: #888;">{rango_masa_muscular}</p>
-                    </div>
-                </div>
-            </div>
-            
-            <!-- ÍNDICES CORPORALES -->
-            <div class="section">
-                <div class="section-title">📈 Índices Corporales</div>
-                
-                <div class="index-card">
-                    <div class="index-label">💪 FFMI (Índice de Masa Libre de Grasa)</div>
-                    <div class="index-value">{ffmi:.1f}</div>
-                    <p style="margin: 5px 0 0 0; font-size: 13px; color: #666;">Desarrollo muscular ajustado por altura</p>
-                    <div style="margin-top: 10px; padding: 10px; background-color: #fff9e6; border-radius: 5px; font-size: 12px; color: #555; line-height: 1.5;">
-                        <p style="margin: 0 0 5px 0; font-weight: 600;">📊 ¿Qué es el FFMI?</p>
-                        <p style="margin: 0;">El FFMI normaliza tu masa muscular según tu altura, permitiendo comparaciones justas entre personas de diferentes estaturas. Es el "IMC del músculo".</p>
-                    </div>
-                    <div style="margin-top: 15px; padding: 12px; background-color: rgba(255,215,0,0.1); border-radius: 5px;">
-                        <p style="margin: 0 0 8px 0; font-size: 13px; color: #444; font-weight: 600;">💡 Tu nivel:</p>
-                        <p style="margin: 0 0 8px 0; font-size: 13px; color: #444;">{feedback_ffmi}</p>
-                        <p style="margin: 0; font-size: 12px; color: #888; line-height: 1.6;">{rangos_ffmi}</p>
-                    </div>
-                    <div style="margin-top: 12px; padding: 12px; background-color: {('#d4edda' if modo_ffmi_email == 'GREEN' else '#fff3cd' if modo_ffmi_email == 'AMBER' else '#f8d7da')}; border-radius: 5px; border-left: 4px solid {('#28a745' if modo_ffmi_email == 'GREEN' else '#ffc107' if modo_ffmi_email == 'AMBER' else '#dc3545')};">
-                        <p style="margin: 0 0 8px 0; font-size: 13px; font-weight: 600; color: #333;">⚠️ Validez de interpretación:</p>
-                        <p style="margin: 0 0 8px 0; font-size: 12px; color: #555; line-height: 1.5;">
-                            <strong>{('🟢 ALTA' if modo_ffmi_email == 'GREEN' else '🟡 MODERADA' if modo_ffmi_email == 'AMBER' else '🔴 LIMITADA')}</strong> - 
-                            {('Tu % de grasa está en rango saludable. El FFMI refleja fielmente tu desarrollo muscular.' if modo_ffmi_email == 'GREEN' else 'Tu % de grasa está elevado. El FFMI puede estar ligeramente inflado por retención de agua/inflamación.' if modo_ffmi_email == 'AMBER' else 'Tu % de grasa está muy alto o muy bajo. El FFMI no es confiable en este rango debido a alteraciones en la composición de MLG.')}
-                        </p>
-                        <p style="margin: 0; font-size: 11px; color: #666; font-style: italic;">
-                            Rangos válidos: Hombres 12-23%, Mujeres 21-31%. Fuera de estos rangos, la MLG incluye más agua/inflamación que músculo real.
-                        </p>
-                    </div>
-                </div>
-                
-                <div class="card">
-                    <h4 style="margin-top: 0; color: #555;">Índices de Salud</h4>
-                    <div class="metric-grid">
-                        {f'''<div class="metric-row">
-                            <div class="metric-cell metric-label">Circunferencia cintura</div>
-                            <div class="metric-cell metric-value"><strong>{circunferencia_cintura} cm</strong></div>
-                        </div>''' if circunferencia_cintura is not None else ''}
-                        {f'''<div class="metric-row">
-                            <div class="metric-cell metric-label">Ratio Cintura-Altura</div>
-                            <div class="metric-cell metric-value">
-                                <strong>{wthr:.3f}</strong>
-                                <span class="badge badge-{('green' if '🟢' in wthr_clasificacion else 'yellow' if '🟡' in wthr_clasificacion else 'red')}">{wthr_clasificacion.replace(' - 🟢', '').replace(' - 🟡', '').replace(' - 🔴', '')}</span>
-                            </div>
-                        </div>''' if wthr is not None else ''}
-                        {f'''<div class="metric-row">
-                            <div class="metric-cell metric-label">Grasa visceral</div>
-                            <div class="metric-cell metric-value">
-                                <strong>Nivel {grasa_visceral}</strong>
-                                <span class="badge badge-{('green' if '🟢' in grasa_visceral_clasificacion else 'yellow' if '🟡' in grasa_visceral_clasificacion else 'red')}">{grasa_visceral_clasificacion.replace(' - 🟢', '').replace(' - 🟡', '').replace(' - 🔴', '')}</span>
-                            </div>
-                        </div>''' if grasa_visceral is not None else ''}
-                    </div>
-                </div>
-                
-                {f'''<div style="margin-top: 10px; padding: 12px; background-color: #f0f8ff; border-radius: 5px; border-left: 3px solid #3498DB; font-size: 13px; color: #555;">
-                    <p style="margin: 0 0 8px 0; font-weight: 600;">💡 Sobre estos índices:</p>
-                    {('<p style="margin: 0 0 5px 0;"><strong>WtHR:</strong> ' + feedback_wthr + '</p><p style="margin: 8px 0 0 0; font-size: 12px; color: #777; line-height: 1.6;">' + rangos_wthr + '</p>') if wthr is not None else ''}
-                    {('<p style="margin: 0 0 5px 0;"><strong>Grasa visceral:</strong> ' + feedback_visceral + '</p>') if grasa_visceral is not None else ''}
-                    {('<p style="margin: 8px 0 0 0; font-size: 12px; color: #777;"><em>' + info_visceral + '</em></p>') if grasa_visceral is not None else ''}
-                </div>''' if wthr is not None or grasa_visceral is not None else ''}
-                
-                {f'''<div class="card" style="background: linear-gradient(135deg, #f0f9ff 0%, #e0f2fe 100%); border-left-color: #3498DB;">
-                    <h4 style="margin-top: 0; color: #3498DB;">🧬 Edad Metabólica</h4>
-                    <div class="metric-grid">
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">Edad cronológica</div>
-                            <div class="metric-cell metric-value"><strong>{edad} años</strong></div>
-                        </div>
-                        <div class="metric-row">
-                            <div class="metric-cell metric-label">Edad metabólica</div>
-                            <div class="metric-cell metric-value"><strong>{edad_metabolica} años</strong></div>
-                        </div>
-                    </div>
-                    <p style="margin: 15px 0 0 0; padding: 10px; background-color: {'#d4edda' if edad_metabolica < edad else '#fff3cd' if edad_metabolica == edad else '#f8d7da'}; border-radius: 5px; font-size: 14px; text-align: center;">
-                        {'✅ Tu metabolismo es ' + str(edad - edad_metabolica) + ' años más joven' if edad_metabolica < edad else '⚠️ Tu metabolismo está ' + str(edad_metabolica - edad) + ' años por encima' if edad_metabolica > edad else '📊 Tu edad metabólica coincide con tu edad'}
-                    </p>
-                    <div style="margin-top: 12px; padding: 10px; background-color: rgba(255,255,255,0.7); border-radius: 5px; font-size: 12px; color: #555;">
-                        <p style="margin: 0 0 8px 0;"><strong>💡 Qué significa:</strong> {feedback_edad_metabolica}</p>
-                        <p style="margin: 0; font-size: 12px; color: #888; line-height: 1.6;">{rangos_edad_metabolica}</p>
-                    </div>
-                </div>''' if edad_metabolica is not None else ''}
-            </div>
-            
-            <!-- NIVEL DE ENTRENAMIENTO -->
-            {f'''<div class="section">
-                <div class="section-title">💪 Nivel de Entrenamiento</div>
-                <div class="card-highlight">
-                    NIVEL: {nivel_entrenamiento.upper()}
-                </div>
-                <p style="font-size: 14px; color: #666; text-align: center;">
-                    Este nivel se calcula evaluando tu desarrollo muscular, rendimiento funcional y experiencia de entrenamiento.
-                </p>
-                <div style="margin-top: 15px; padding: 12px; background-color: #fff9e6; border-radius: 5px; border-left: 3px solid #FFD700; font-size: 13px; color: #555;">
-                    <p style="margin: 0; font-weight: 600;">💡 Interpretación de tu nivel:</p>
-                    <p style="margin: 8px 0 0 0;">{feedback_nivel}</p>
-                </div>
-            </div>''' if nivel_entrenamiento else ''}
-            
-            <!-- ESTADO DE RECUPERACIÓN -->
-            {(lambda s: s.replace('━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━', '<div class="section">').replace('😴 ESTADO DE RECUPERACIÓN (SUEÑO + ESTRÉS)', '<div class="section-title">😴 Estado de Recuperación</div>').replace('   ╔════════════════════════════════════════════════════════════════╗' + chr(10) + '   ║  ÍNDICE DE RECUPERACIÓN (IR-SE):', '<div class="index-card"><div class="index-label">Índice de Recuperación (IR-SE)</div><div class="index-value">').replace('/100                   ║' + chr(10) + '   ║  NIVEL:', '/100</div><div style="font-size: 18px; font-weight: 600; margin-top: 10px;">NIVEL:').replace(' ║' + chr(10) + '   ╚════════════════════════════════════════════════════════════════╝' + chr(10) + chr(10) + '   • Calidad de sueño:', '</div></div><div class="card"><div class="metric-grid"><div class="metric-row"><div class="metric-cell metric-label">Calidad de sueño</div><div class="metric-cell metric-value"><strong>').replace('/100' + chr(10) + '   • Nivel de estrés:', '/100</strong></div></div><div class="metric-row"><div class="metric-cell metric-label">Nivel de estrés</div><div class="metric-cell metric-value"><strong>').replace('/100' + chr(10) + '   ' + chr(10) + '   💡 Este índice refleja tu capacidad de recuperación y adaptación al' + chr(10) + '      entrenamiento. Valores bajos pueden limitar tu progreso.', '/100</strong></div></div></div></div><p style="font-size: 14px; color: #666; padding: 15px; background-color: #f0f8ff; border-radius: 5px;">💡 Este índice refleja tu capacidad de recuperación y adaptación al entrenamiento. Valores bajos pueden limitar tu progreso.</p></div>'))(seccion_recuperacion) if seccion_recuperacion else ''}
-            
-            <!-- FOTOGRAFÍAS -->
-            <div class="section">
-                <div class="section-title">📸 Fotografías de Progreso</div>
-                <div class="card">
-                    <p style="margin: 0; font-size: 14px; color: #666;">
-                        Las fotografías de tu evaluación están adjuntas a este correo para tu registro personal.
-                    </p>
-                </div>
-            </div>
-            
-            <!-- PRÓXIMOS PASOS -->
-            <div class="section">
-                <div class="section-title">📱 Próximos Pasos</div>
-                <div class="cta-box">
-                    <div class="cta-title">Tu coach se pondrá en contacto contigo para:</div>
-                    <ul class="cta-list">
-                        <li>Revisar en detalle tus resultados</li>
-                        <li>Diseñar tu plan nutricional personalizado</li>
-                        <li>Establecer objetivos específicos y proyecciones</li>
-                        <li>Programar tu seguimiento y ajustes</li>
-                    </ul>
-                </div>
-                <p style="font-size: 14px; color: #666; text-align: center; margin-top: 20px;">
-                    Si tienes alguna pregunta o inquietud, no dudes en contactarnos.
-                </p>
-            </div>
-        </div>
+    - Datos personales básicos (incluye ciclo menstrual si aplica)
+    - Composición corporal completa
+    - Índices corporales (FFMI, WtHR, grasa visceral)
+    - Edad metabólica
+    - Nivel de entrenamiento
+    - Nivel de recuperación (sueño/estrés si disponible)
+    - Fotos de progreso
+    
+    NO incluye:
+    - Plan nutricional (macros/calorías) - cliente debe consultarte
+    - Proyección de progreso - cliente debe consultarte
+    - Ecuaciones científicas (TMB, cálculos GEAF, ETA, etc.)
+    - Metodología de cálculo
+    - Factores multiplicadores
+    """
+    try:
+        email_origen = "administracion@muscleupgym.fitness"
+        email_destino = email_cliente
+        password = st.secrets.get("zoho_password", "TU_PASSWORD_AQUI")
         
-        <div class="footer">
-            <div class="footer-logos">
-                <img src="data:image/png;base64,{logo_mupai_b64}" alt="MUPAI" class="footer-logo" />
-                <img src="data:image/png;base64,{logo_gym_b64}" alt="Muscle Up GYM" class="footer-logo" />
-            </div>
-            <p style="margin: 0 0 10px 0; font-weight: 600; color: #FFD700;">Muscle Up GYM</p>
-            <p style="margin: 0 0 10px 0;">Digital Training Science</p>
-            <p style="margin: 0;"><a href="https://muscleupgym.fitness">muscleupgym.fitness</a></p>
-            <p style="margin: 5px 0 0 0;"><a href="mailto:administracion@muscleupgym.fitness">administracion@muscleupgym.fitness</a></p>
-        </div>
-    </div>
-</body>
-</html>"""
+        # Construir contenido (texto plano + HTML) del reporte
+        with span("email.plantilla", tipo="cliente"):
+            asunto, contenido, contenido_html = construir_email_cliente(
+                nombre_cliente, fecha, grasa_visceral=grasa_visceral, progress_photos=progress_photos,
+                ciclo_menstrual=st.session_state.get('ciclo_menstrual', None),
+                suenyo_estres_data=obtener_datos_suenyo_estres_email(),
+                **{nombre: nodos[nombre] for nombre in NODOS_EMAIL_CLIENTE}
+            )
+        with span("email.mime", tipo="cliente"):
+            msg = construir_mensaje(asunto, contenido, contenido_html, email_destino, email_origen)
+            
+            # Adjuntar fotos de progreso si están disponibles
+            if progress_photos:
+                success, total_size_mb, error_msg = attach_progress_photos_to_email(msg, progress_photos)
+                if not success:
+                    st.warning(f"⚠️ No se pudieron adjuntar fotos al email del cliente: {error_msg}")
+
+        with span("email.smtp", tipo="cliente"):
+            server = smtplib.SMTP('smtp.zoho.com', 587)
+            server.starttls()
+            server.login(email_origen, password)
+            server.send_message(msg)
+            server.quit()
+
+        return True
+    except Exception as e:
+        st.error(f"Error al enviar email al cliente: {str(e)}")
+        return False
+
+def enviar_email_resumen(contenido, nombre_cliente, email_cliente, fecha, edad, telefono, progress_photos=None):
+    """Envía el email COMPLETO CIENTÍFICO a administración."""
+    try:
+        email_origen = "administracion@muscleupgym.fitness"
+        email_destino = "administracion@muscleupgym.fitness"
+        password = st.secrets.get("zoho_password", "TU_PASSWORD_AQUI")
 
-        msg = MIMEMultipart('alternative')
+        msg = MIMEMultipart()
         msg['From'] = email_origen
         msg['To'] = email_destino
-        msg['Subject'] = f"[COPIA INTERNA] Reporte de Evaluación Corporal — {nombre_cliente} — {fecha}"
+        msg['Subject'] = f"Resumen evaluación MUPAI - {nombre_cliente} ({fecha})"
 
-        # Adjuntar versión texto plano como fallback
-        msg.attach(MIMEText(contenido, 'plain', 'utf-8'))
-        # Adjuntar versión HTML (preferida)
-        msg.attach(MIMEText(contenido_html, 'html', 'utf-8'))
+        msg.attach(MIMEText(contenido, 'plain'))
         
         # Attach progress photos if provided
         if progress_photos:
             success, total_size_mb, error_msg = attach_progress_photos_to_email(msg, progress_photos)
             if not success:
-                st.error(f"Error al adjuntar fotos en Parte 2: {error_msg}")
+                st.error(f"Error al adjuntar fotos: {error_msg}")
                 return False
+            
+            # Check if total email size exceeds limit
+            if total_size_mb > EMAIL_ATTACHMENT_SIZE_LIMIT_MB:
+                st.warning(f"⚠️ El tamaño total de las fotos ({total_size_mb:.2f} MB) excede el límite de email ({EMAIL_ATTACHMENT_SIZE_LIMIT_MB} MB). Se recomienda implementar almacenamiento externo.")
+                # For now, we'll still try to send but log the warning
 
         server = smtplib.SMTP('smtp.zoho.com', 587)
         server.starttls()
@@ -6197,6 +2142,159 @@ muscleupgym.fitness
         server.send_message(msg)
         server.quit()
 
+        return True
+    except Exception as e:
+        st.error(f"Error al enviar email: {str(e)}")
+        return False
+
+def clasificar_grasa_visceral(nivel):
+    """
+    Clasifica el nivel de grasa visceral según rangos saludables.
+    
+    Args:
+        nivel: Nivel de grasa visceral (1-59)
+        
+    Returns:
+        str: Clasificación (Saludable, Elevado, Alto riesgo, o N/D)
+    """
+    if nivel < 1:
+        return "N/D"
+    elif nivel <= 12:
+        return "Saludable"
+    elif nivel <= 15:
+        return "Elevado"
+    else:
+        return "Alto riesgo"
+
+def clasificar_wthr(wthr):
+    """
+    Clasifica el Waist-to-Height Ratio (Ratio cintura-altura) según rangos saludables.
+    
+    Args:
+        wthr: Waist-to-Height Ratio (circunferencia_cintura / estatura)
+        
+    Returns:
+        str: Clasificación (Saludable, Riesgo aumentado, Alto riesgo, o N/D)
+    """
+    if wthr <= 0:
+        return "N/D"
+    elif wthr < 0.5:
+        return "Saludable (<0.5)"
+    elif wthr < 0.6:
+        return "Riesgo aumentado (0.5-0.6)"
+    else:
+        return "Alto riesgo (≥0.6)"
+
+def clasificar_masa_muscular(porcentaje, edad, sexo):
+    """
+    Clasifica el porcentaje de masa muscular según edad y sexo.
+    Solo aplica cuando el campo está vacío o es N/D.
+    
+    Args:
+        porcentaje: Porcentaje de masa muscular (0-100)
+        edad: Edad del cliente
+        sexo: "Hombre" o "Mujer"
+        
+    Returns:
+        str: Clasificación (Bajo, Normal, Alto, o N/D)
+    """
+    # Values <= 0 indicate unmeasured/unavailable data
+    # (session state default "" converts to 0.0 via safe_float)
+    if porcentaje <= 0:
+        return "N/D"
+    
+    # Rangos aproximados basados en edad y sexo
+    if sexo == "Hombre":
+        if edad < 40:
+            if porcentaje < 33:
+                return "Bajo"
+            elif porcentaje < 40:
+                return "Normal"
+            else:
+                return "Alto"
+        elif edad < 60:
+            if porcentaje < 30:
+                return "Bajo"
+            elif porcentaje < 37:
+                return "Normal"
+            else:
+                return "Alto"
+        else:
+            if porcentaje < 27:
+                return "Bajo"
+            elif porcentaje < 34:
+                return "Normal"
+            else:
+                return "Alto"
+    else:  # Mujer
+        if edad < 40:
+            if porcentaje < 24:
+                return "Bajo"
+            elif porcentaje < 31:
+                return "Normal"
+            else:
+                return "Alto"
+        elif edad < 60:
+            if porcentaje < 22:
+                return "Bajo"
+            elif porcentaje < 28:
+                return "Normal"
+            else:
+                return "Alto"
+        else:
+            if porcentaje < 20:
+                return "Bajo"
+            elif porcentaje < 26:
+                return "Normal"
+            else:
+                return "Alto"
+
+def enviar_email_parte2(nodos, nombre_cliente, fecha, grasa_visceral=None, progress_photos=None, ciclo_menstrual=None):
+    """
+    Envía el email interno (Parte 2) con TODO EL CONTENIDO IDÉNTICO del email cliente.
+    Destinatario exclusivo: administracion@muscleupgym.fitness (sin CC/BCC)
+    
+    IMPORTANTE: Este email contiene EXACTAMENTE el mismo contenido HTML que recibe el cliente,
+    para que el administrador pueda ver qué información se envió al usuario.
+    La única diferencia es el asunto del email que indica que es copia interna.
+    
+    Args:
+        Los mismos parámetros que enviar_email_cliente() para mantener sincronía total
+        (nodos de nodos_email(), que incluyen el TMB).
+    """
+    try:
+        email_origen = "administracion@muscleupgym.fitness"
+        email_destino = "administracion@muscleupgym.fitness"
+        password = st.secrets.get("zoho_password", "TU_PASSWORD_AQUI")
+        
+        # === MISMO CONTENIDO DEL EMAIL CLIENTE (HTML idéntico + encabezado interno) ===
+        with span("email.plantilla", tipo="parte2"):
+            asunto, contenido, contenido_html = construir_email_parte2(
+                nombre_cliente, fecha, grasa_visceral=grasa_visceral, progress_photos=progress_photos,
+                masa_muscular=nodos['masa_muscular_aparato'],
+                ciclo_menstrual=ciclo_menstrual or st.session_state.get('ciclo_menstrual', None),
+                **{nombre: nodos[nombre] for nombre in NODOS_EMAIL_PARTE2},
+                suenyo_estres_data=obtener_datos_suenyo_estres_email(),
+                circunferencia_cuello=st.session_state.get('circunferencia_cuello'),
+                circunferencia_cadera=st.session_state.get('circunferencia_cadera')
+            )
+        with span("email.mime", tipo="parte2"):
+            msg = construir_mensaje(asunto, contenido, contenido_html, email_destino, email_origen)
+            
+            # Attach progress photos if provided
+            if progress_photos:
+                success, total_size_mb, error_msg = attach_progress_photos_to_email(msg, progress_photos)
+                if not success:
+                    st.error(f"Error al adjuntar fotos en Parte 2: {error_msg}")
+                    return False
+
+        with span("email.smtp", tipo="parte2"):
+            server = smtplib.SMTP('smtp.zoho.com', 587)
+            server.starttls()
+            server.login(email_origen, password)
+            server.send_message(msg)
+            server.quit()
+
         return True
     except Exception as e:
         st.error(f"Error al enviar email Parte 2: {str(e)}")
@@ -6302,6 +2400,7 @@ muscleupgym.fitness
 
 # ==================== CUESTIONARIO SUEÑO + ESTRÉS ====================
 
+@trazar("form.suenyo_estres")
 def formulario_suenyo_estres():
     """
     Cuestionario modular para evaluar el Estado de Recuperación (Sueño + Estrés).
@@ -6315,7 +2414,7 @@ def formulario_suenyo_estres():
     - StressScore: Puntuación de nivel de estrés (0-100)
     - IR-SE: Índice de Recuperación Sueño-Estrés
     - Clasificación: ALTA, MEDIA, BAJA recuperación
-    - Banderas de alerta: Detección de problemas graves
+    - Banderas de alerta: BANDERA ROJA (problemas graves) y BANDERA AMARILLA (moderados)
     
     Returns:
         dict: Diccionario con resultados calculados para incluir en email
@@ -6341,25 +2440,14 @@ def formulario_suenyo_estres():
         # Pregunta 1: Horas de sueño
         horas_sueno = st.selectbox(
             "¿Cuántas horas duermes en promedio por noche?",
-            options=[
-                "≥8 horas",
-                "7-7.9 horas",
-                "6-6.9 horas",
-                "5-5.9 horas",
-                "<5 horas"
-            ],
+            options=cuestionario.opciones("horas_sueno"),
             help="Selecciona el rango que mejor describe tu promedio de sueño"
         )
         
         # Pregunta 2: Tiempo para conciliar el sueño
         tiempo_conciliar = st.selectbox(
             "¿Cuánto tiempo tardas en quedarte dormido?",
-            options=[
-                "Menos de 15 minutos",
-                "15-30 minutos",
-                "30-60 minutos",
-                "Más de 60 minutos"
-            ],
+            options=cuestionario.opciones("tiempo_conciliar"),
             help="Tiempo promedio desde que te acuestas hasta que te duermes"
         )
     
@@ -6367,25 +2455,14 @@ def formulario_suenyo_estres():
         # Pregunta 3: Despertares nocturnos
         veces_despierta = st.selectbox(
             "¿Cuántas veces te despiertas durante la noche?",
-            options=[
-                "Ninguna",
-                "1 vez",
-                "2 veces",
-                "3 o más veces"
-            ],
+            options=cuestionario.opciones("veces_despierta"),
             help="Número promedio de despertares por noche"
         )
         
         # Pregunta 4: Calidad del sueño
         calidad_sueno = st.selectbox(
             "¿Cómo calificarías la calidad general de tu sueño?",
-            options=[
-                "Excelente",
-                "Buena",
-                "Regular",
-                "Mala",
-                "Muy mala"
-            ],
+            options=cuestionario.opciones("calidad_sueno"),
             help="Calificación subjetiva de qué tan reparador es tu sueño"
         )
     
@@ -6398,26 +2475,14 @@ def formulario_suenyo_estres():
         # Pregunta 5: Sensación de sobrecarga
         sobrecarga = st.selectbox(
             "¿Con qué frecuencia te sientes sobrecargado o abrumado?",
-            options=[
-                "Nunca",
-                "Casi nunca",
-                "A veces",
-                "Frecuentemente",
-                "Muy frecuentemente"
-            ],
+            options=cuestionario.opciones("sobrecarga"),
             help="Evalúa tu sensación de estar desbordado por responsabilidades"
         )
         
         # Pregunta 6: Falta de control
         falta_control = st.selectbox(
             "¿Con qué frecuencia sientes que no puedes controlar las cosas importantes de tu vida?",
-            options=[
-                "Nunca",
-                "Casi nunca",
-                "A veces",
-                "Frecuentemente",
-                "Muy frecuentemente"
-            ],
+            options=cuestionario.opciones("falta_control"),
             help="Sensación de control sobre tu vida y circunstancias"
         )
     
@@ -6425,26 +2490,14 @@ def formulario_suenyo_estres():
         # Pregunta 7: Dificultad para manejar
         dificultad_manejar = st.selectbox(
             "¿Con qué frecuencia sientes que las dificultades se acumulan tanto que no puedes manejarlas?",
-            options=[
-                "Nunca",
-                "Casi nunca",
-                "A veces",
-                "Frecuentemente",
-                "Muy frecuentemente"
-            ],
+            options=cuestionario.opciones("dificultad_manejar"),
             help="Capacidad para enfrentar problemas y desafíos"
         )
         
         # Pregunta 8: Irritabilidad
         irritabilidad = st.selectbox(
             "¿Con qué frecuencia te sientes irritable o molesto sin razón aparente?",
-            options=[
-                "Nunca",
-                "Casi nunca",
-                "A veces",
-                "Frecuentemente",
-                "Muy frecuentemente"
-            ],
+            options=cuestionario.opciones("irritabilidad"),
             help="Nivel de irritabilidad en tu día a día"
         )
     
@@ -6452,121 +2505,7 @@ def formulario_suenyo_estres():
     # Los cálculos se realizan cada vez que se ejecuta el formulario
     # No se muestran resultados al usuario, solo se capturan para el reporte
     
-    # Puntuaciones de sueño
-    puntos_horas = {
-        "≥8 horas": 0,
-        "7-7.9 horas": 1,
-        "6-6.9 horas": 2,
-        "5-5.9 horas": 3,
-        "<5 horas": 4
-    }
-    
-    puntos_conciliar = {
-        "Menos de 15 minutos": 0,
-        "15-30 minutos": 1,
-        "30-60 minutos": 2,
-        "Más de 60 minutos": 3
-    }
-    
-    puntos_despertares = {
-        "Ninguna": 0,
-        "1 vez": 1,
-        "2 veces": 2,
-        "3 o más veces": 3
-    }
-    
-    puntos_calidad = {
-        "Excelente": 0,
-        "Buena": 1,
-        "Regular": 2,
-        "Mala": 3,
-        "Muy mala": 4
-    }
-    
-    # Puntuaciones de estrés
-    puntos_estres = {
-        "Nunca": 0,
-        "Casi nunca": 1,
-        "A veces": 2,
-        "Frecuentemente": 3,
-        "Muy frecuentemente": 4
-    }
-    
-    # Calcular puntuación total de sueño (0-14 puntos)
-    sleep_raw = (
-        puntos_horas[horas_sueno] +
-        puntos_conciliar[tiempo_conciliar] +
-        puntos_despertares[veces_despierta] +
-        puntos_calidad[calidad_sueno]
-    )
-    
-    # Calcular puntuación total de estrés (0-16 puntos)
-    stress_raw = (
-        puntos_estres[sobrecarga] +
-        puntos_estres[falta_control] +
-        puntos_estres[dificultad_manejar] +
-        puntos_estres[irritabilidad]
-    )
-    
-    # Normalizar a 0-100 (invertido: menor puntuación = mejor)
-    # Para sueño: 0 puntos = 100 score, 14 puntos = 0 score
-    sleep_score = max(0, 100 - (sleep_raw / 14 * 100))
-    
-    # Para estrés: 0 puntos = 100 score, 16 puntos = 0 score
-    stress_score = max(0, 100 - (stress_raw / 16 * 100))
-    
-    # Calcular IR-SE (Índice de Recuperación Sueño-Estrés)
-    # Ponderación: 60% sueño, 40% estrés (el sueño es más crítico para recuperación)
-    ir_se = (sleep_score * 0.6) + (stress_score * 0.4)
-    
-    # Clasificar recuperación
-    if ir_se >= 70:
-        nivel_recuperacion = "ALTA"
-        color_nivel = "#27AE60"
-        emoji_nivel = "✅"
-        mensaje_nivel = "Excelente estado de recuperación. Tu cuerpo está bien preparado para el entrenamiento."
-    elif ir_se >= 50:
-        nivel_recuperacion = "MEDIA"
-        color_nivel = "#F39C12"
-        emoji_nivel = "⚠️"
-        mensaje_nivel = "Estado de recuperación moderado. Considera mejorar la calidad del sueño o reducir el estrés."
-    else:
-        nivel_recuperacion = "BAJA"
-        color_nivel = "#E74C3C"
-        emoji_nivel = "🚨"
-        mensaje_nivel = "Estado de recuperación comprometido. Es importante abordar problemas de sueño y/o estrés."
-    
-    # Detectar banderas rojas y amarillas
-    banderas = []
-    
-    # Banderas rojas (problemas graves)
-    if sleep_raw >= 10:  # Sueño muy problemático
-        banderas.append(("🔴 BANDERA ROJA", "Problemas graves de sueño detectados", 
-                       "Tu calidad y cantidad de sueño están significativamente comprometidas. "
-                       "Considera consultar con un especialista en medicina del sueño."))
-    
-    if stress_raw >= 12:  # Estrés muy alto
-        banderas.append(("🔴 BANDERA ROJA", "Nivel de estrés crítico", 
-                       "Tu nivel de estrés está en rango muy alto. "
-                       "Se recomienda buscar apoyo profesional (psicólogo o terapeuta)."))
-    
-    # Banderas amarillas (problemas moderados)
-    if 7 <= sleep_raw < 10:
-        banderas.append(("🟡 BANDERA AMARILLA", "Calidad de sueño subóptima", 
-                       "Tu sueño necesita atención. Implementa higiene del sueño: "
-                       "horarios regulares, ambiente oscuro, evitar pantallas antes de dormir."))
-    
-    if 8 <= stress_raw < 12:
-        banderas.append(("🟡 BANDERA AMARILLA", "Nivel de estrés elevado", 
-                       "Tu nivel de estrés está por encima del ideal. "
-                       "Considera técnicas de manejo: meditación, ejercicio, tiempo libre."))
-    
-    if puntos_horas[horas_sueno] >= 3:  # Menos de 6 horas
-        banderas.append(("🟡 BANDERA AMARILLA", "Duración de sueño insuficiente", 
-                       f"Duermes {horas_sueno}. Se recomiendan al menos 7-8 horas para recuperación óptima."))
-    
-    # Guardar en session state (silenciosamente - no mostrar al usuario)
-    st.session_state.suenyo_estres_data = {
+    respuestas = {
         'horas_sueno': horas_sueno,
         'tiempo_conciliar': tiempo_conciliar,
         'veces_despierta': veces_despierta,
@@ -6575,17 +2514,12 @@ def formulario_suenyo_estres():
         'falta_control': falta_control,
         'dificultad_manejar': dificultad_manejar,
         'irritabilidad': irritabilidad,
-        'sleep_raw': sleep_raw,
-        'stress_raw': stress_raw,
-        'sleep_score': sleep_score,
-        'stress_score': stress_score,
-        'ir_se': ir_se,
-        'nivel_recuperacion': nivel_recuperacion,
-        'color_nivel': color_nivel,
-        'emoji_nivel': emoji_nivel,
-        'mensaje_nivel': mensaje_nivel,
-        'banderas': banderas
     }
+    # sleep_score, stress_score, ir_se, nivel y banderas (puntuacion_suenyo_estres.py)
+    resultado = puntuar_suenyo_estres(respuestas, puntos=cuestionario.puntos)
+    
+    # Guardar en session state (silenciosamente - no mostrar al usuario)
+    st.session_state.suenyo_estres_data = {**respuestas, **resultado}
     st.session_state.suenyo_estres_completado = True
     
     # Mensaje de confirmación (sin mostrar puntuaciones)
@@ -6596,6 +2530,7 @@ def formulario_suenyo_estres():
     # Return data for integration into main email
     return st.session_state.suenyo_estres_data if st.session_state.suenyo_estres_completado else None
 
+@trazar("form.metas_personales")
 def formulario_metas_personales():
     """
     Cuestionario modular para capturar objetivos personales, condiciones médicas, lesiones y preferencias musculares.
@@ -6961,6 +2896,7 @@ def formulario_metas_personales():
 
 # ==================== CUESTIONARIO CICLO MENSTRUAL ====================
 
+@trazar("form.ciclo_menstrual")
 def formulario_ciclo_menstrual(sexo):
     """
     Cuestionario para recoger información sobre la fase del ciclo menstrual.
@@ -7284,6 +3220,18 @@ def validate_progress_photo(uploaded_file):
     
     return True, ""
 
+def foto_restaurada(clave):
+    """
+    Foto recuperada del almacén de sesiones (tras reconectar el uploader está
+    vacío pero la foto sigue guardada), o None si no hay. Las fotos subidas en
+    esta sesión y luego quitadas del uploader no se conservan.
+    """
+    foto = st.session_state.progress_photos.get(clave)
+    if isinstance(foto, FotoAlmacenada) and foto.restaurada:
+        st.success(f"✓ {foto.name} recuperada de tu sesión")
+        return foto
+    return None
+
 def render_progress_photos_section():
     """
     Renders the progress photos upload section with validation.
@@ -7327,7 +3275,7 @@ def render_progress_photos_section():
         if front_photo:
             is_valid, error_msg = validate_progress_photo(front_photo)
             if is_valid:
-                st.session_state.progress_photos["front_relaxed"] = front_photo
+                st.session_state.progress_photos["front_relaxed"] = derramar_archivo(almacen_sesiones, front_photo, st.session_state)
                 st.image(front_photo, caption="✅ Foto frontal cargada", use_container_width=True)
                 st.success(f"✓ {front_photo.size / (1024*1024):.2f} MB")
             else:
@@ -7335,8 +3283,9 @@ def render_progress_photos_section():
                 st.error(f"❌ {error_msg}")
                 validation_errors.append(f"Foto 1 (Frontal): {error_msg}")
         else:
-            st.session_state.progress_photos["front_relaxed"] = None
-            st.warning("⚠️ Foto frontal requerida")
+            st.session_state.progress_photos["front_relaxed"] = foto_restaurada("front_relaxed")
+            if st.session_state.progress_photos["front_relaxed"] is None:
+                st.warning("⚠️ Foto frontal requerida")
     
         with col2:
             st.markdown("#### 📷 Foto 2 – Perfil lateral relajado")
@@ -7351,7 +3300,7 @@ def render_progress_photos_section():
             if side_photo:
                 is_valid, error_msg = validate_progress_photo(side_photo)
                 if is_valid:
-                    st.session_state.progress_photos["side_relaxed_right"] = side_photo
+                    st.session_state.progress_photos["side_relaxed_right"] = derramar_archivo(almacen_sesiones, side_photo, st.session_state)
                     st.image(side_photo, caption="✅ Foto lateral cargada", use_container_width=True)
                     st.success(f"✓ {side_photo.size / (1024*1024):.2f} MB")
                 else:
@@ -7359,8 +3308,9 @@ def render_progress_photos_section():
                     st.error(f"❌ {error_msg}")
                     validation_errors.append(f"Foto 2 (Lateral): {error_msg}")
             else:
-                st.session_state.progress_photos["side_relaxed_right"] = None
-                st.warning("⚠️ Foto lateral requerida")
+                st.session_state.progress_photos["side_relaxed_right"] = foto_restaurada("side_relaxed_right")
+                if st.session_state.progress_photos["side_relaxed_right"] is None:
+                    st.warning("⚠️ Foto lateral requerida")
         
         with col3:
             st.markdown("#### 📷 Foto 3 – Posterior relajado")
@@ -7375,7 +3325,7 @@ def render_progress_photos_section():
             if back_photo:
                 is_valid, error_msg = validate_progress_photo(back_photo)
                 if is_valid:
-                    st.session_state.progress_photos["back_relaxed"] = back_photo
+                    st.session_state.progress_photos["back_relaxed"] = derramar_archivo(almacen_sesiones, back_photo, st.session_state)
                     st.image(back_photo, caption="✅ Foto posterior cargada", use_container_width=True)
                     st.success(f"✓ {back_photo.size / (1024*1024):.2f} MB")
                 else:
@@ -7383,8 +3333,9 @@ def render_progress_photos_section():
                     st.error(f"❌ {error_msg}")
                     validation_errors.append(f"Foto 3 (Posterior): {error_msg}")
             else:
-                st.session_state.progress_photos["back_relaxed"] = None
-                st.warning("⚠️ Foto posterior requerida")
+                st.session_state.progress_photos["back_relaxed"] = foto_restaurada("back_relaxed")
+                if st.session_state.progress_photos["back_relaxed"] is None:
+                    st.warning("⚠️ Foto posterior requerida")
     
     # Add spacing between rows
     st.markdown("<br>", unsafe_allow_html=True)
@@ -7415,7 +3366,7 @@ def render_progress_photos_section():
         if libre_photo:
             is_valid, error_msg = validate_progress_photo(libre_photo)
             if is_valid:
-                st.session_state.progress_photos["pose_libre"] = libre_photo
+                st.session_state.progress_photos["pose_libre"] = derramar_archivo(almacen_sesiones, libre_photo, st.session_state)
                 st.image(libre_photo, caption="✅ Foto pose libre cargada", use_container_width=True)
                 st.success(f"✓ {libre_photo.size / (1024*1024):.2f} MB")
             else:
@@ -7423,8 +3374,9 @@ def render_progress_photos_section():
                 st.error(f"❌ {error_msg}")
                 validation_errors.append(f"Foto 4 (Pose Libre): {error_msg}")
         else:
-            st.session_state.progress_photos["pose_libre"] = None
-            st.info("💡 Foto opcional - No requerida")
+            st.session_state.progress_photos["pose_libre"] = foto_restaurada("pose_libre")
+            if st.session_state.progress_photos["pose_libre"] is None:
+                st.info("💡 Foto opcional - No requerida")
     
     # Show validation summary
     if validation_errors:
@@ -7470,23 +3422,21 @@ def render_progress_photos_section():
 
         # ==================== FUNCIONES DE PROGRESO ====================
 
+def completitud():
+    """Seguimiento de completitud de la sesión: cada sección informa sus valores al dibujarse."""
+    if '_completitud' not in st.session_state:
+        st.session_state._completitud = SeguimientoCompletitud()
+    return st.session_state._completitud
+
+def grafo():
+    """Métricas derivadas de la sesión (MLG, TMB, FFMI, WtHR, ...), calculadas una vez por versión de sus entradas."""
+    if '_grafo_evaluacion' not in st.session_state:
+        st.session_state._grafo_evaluacion = grafo_evaluacion()
+    return st.session_state._grafo_evaluacion
+
 def check_step_completion(step_number):
     """Verificar si un paso específico está completo"""
-    if step_number == 1:  # Datos personales
-        required = ['nombre', 'telefono', 'email_cliente', 'edad', 'sexo', 'acepto_descargo']
-        return all(st.session_state.get(field) for field in required)
-    elif step_number == 2:  # Composición corporal
-        required = ['peso', 'estatura', 'grasa_corporal', 'masa_muscular']
-        return all(st.session_state.get(field) for field in required)
-    elif step_number == 3:  # Evaluación funcional
-        return (st.session_state.get('experiencia_completa', False) and 
-                len(st.session_state.get('datos_ejercicios', {})) >= 5)
-    elif step_number == 4:  # Actividad física
-        return bool(st.session_state.get('actividad_diaria'))
-    elif step_number == 5:  # Entrenamiento
-        return (st.session_state.get('frecuencia_entrenamiento') and
-                st.session_state.get('minutos_por_sesion'))
-    return False
+    return completitud().paso_completo(step_number)
 
 def get_step_status_indicator(step_number):
     """Obtener indicador visual del estado del paso"""
@@ -7497,68 +3447,12 @@ def get_step_status_indicator(step_number):
 
 def calculate_dynamic_progress():
     """Calcular progreso dinámico basado en campos completados"""
-    total_required = 0
-    completed = 0
-    
-    # Datos personales básicos (6 campos)
-    personal_fields = {'nombre': st.session_state.get('nombre', ''),
-                      'telefono': st.session_state.get('telefono', ''),
-                      'email_cliente': st.session_state.get('email_cliente', ''),
-                      'edad': st.session_state.get('edad', 0),
-                      'sexo': st.session_state.get('sexo', ''),
-                      'acepto_descargo': st.session_state.get('acepto_descargo', False)}
-    
-    for key, val in personal_fields.items():
-        total_required += 1
-        if val and str(val).strip():
-            completed += 1
-    
-    # Composición corporal (5 campos principales)
-    body_fields = {'peso': st.session_state.get('peso', 0),
-                   'estatura': st.session_state.get('estatura', 0),
-                   'grasa_corporal': st.session_state.get('grasa_corporal', 0),
-                   'masa_muscular': st.session_state.get('masa_muscular', 0)}
-    
-    for key, val in body_fields.items():
-        total_required += 1
-        if val and val > 0:
-            completed += 1
-    
-    # Experiencia de entrenamiento
-    total_required += 1
-    if st.session_state.get('experiencia_completa', False):
-        completed += 1
-    
-    # Ejercicios funcionales (5 ejercicios)
-    total_required += 5
-    ejercicios = st.session_state.get('datos_ejercicios', {})
-    completed += min(len(ejercicios), 5)
-    
-    # Actividad diaria
-    total_required += 1
-    if st.session_state.get('actividad_diaria'):
-        completed += 1
-    
-    # Frecuencia de entrenamiento (checkear strings, no números)
-    total_required += 1
-    if st.session_state.get('frecuencia_entrenamiento'):
-        completed += 1
-    
-    # Fotos de progreso (3 requeridas)
-    total_required += 3
-    photos = st.session_state.get('progress_photos', {})
-    for key in REQUIRED_PROGRESS_PHOTOS:
-        if photos.get(key):
-            completed += 1
-    
-    percentage = int((completed / total_required) * 100) if total_required > 0 else 0
-    return percentage, completed, total_required
-
-# ==================== VISUALES INICIALES ====================
+    return completitud().progreso()
 
-# Progreso dinámico en tiempo real
-progress_pct, fields_done, fields_total = calculate_dynamic_progress()
-st.markdown(f'''
+def render_dynamic_progress(contenedor):
+    """Dibuja la barra de progreso en su contenedor (reservado arriba, llenado tras las secciones)"""
+    progress_pct, fields_done, fields_total = calculate_dynamic_progress()
+    contenedor.markdown(f'''
 <div style="background: linear-gradient(135deg, #1E1E1E 0%, #2A2A2A 100%); padding: 1.5rem; border-radius: 12px; margin-bottom: 2rem; border-left: 5px solid #F4C430;">
     <h3 style="color: #F4C430; margin: 0 0 1rem 0;">📊 Progreso de Evaluación</h3>
     <div style="background: #0A0A0A; border-radius: 10px; height: 30px; overflow: hidden; margin-bottom: 0.5rem;">
@@ -7570,6 +3464,12 @@ st.markdown(f'''
 </div>
 ''', unsafe_allow_html=True)
 
+# ==================== VISUALES INICIALES ====================
+
+# Progreso dinámico en tiempo real: el lugar se reserva aquí y se llena cuando
+# todas las secciones ya informaron sus valores (ver render_dynamic_progress)
+contenedor_progreso = st.empty()
+
 # Misión, Visión y Compromiso con diseño mejorado
 with st.expander("🎯 **Misión, Visión y Compromiso MUPAI**", expanded=False):
     col1, col2, col3 = st.columns(3)
@@ -7672,6 +3572,9 @@ with st.expander("⚖️ **Descargo de Responsabilidad Profesional** (Requerido)
         help="Debes confirmar que has leído y entiendes las limitaciones de esta evaluación"
     )
 
+completitud().actualizar(nombre=nombre, telefono=telefono, email_cliente=email_cliente, edad=edad,
+                         sexo=sexo, acepto_descargo=acepto_descargo)
+
 # Checkbox principal con diseño destacado (solo se habilita si se acepta el descargo)
 st.markdown(f"""
 <div class="content-card" style="border-left-color: var(--mupai-warning); margin: 1.5rem 0; background: linear-gradient(135deg, #1E1E1E 0%, #252525 100%); border: 2px solid var(--mupai-yellow); box-shadow: 0 8px 25px rgba(244, 196, 48, 0.15);">
@@ -7939,18 +3842,22 @@ if datos_personales_completos and st.session_state.datos_completos:
     
     # Manually save to the correct key after validation
     st.session_state["masa_muscular"] = masa_muscular
+    completitud().actualizar(peso=peso, estatura=estatura, grasa_corporal=grasa_corporal,
+                             masa_muscular=masa_muscular)
 
     # Campo opcional - Grasa visceral (no afecta cálculos)
+    # Vacío por defecto: sin medición se guarda None (no un nivel 1 que la
+    # plausibilidad tomaría como medido)
     grasa_visceral_key = "grasa_visceral_temp"
     if "grasa_visceral" in st.session_state:
         try:
-            grasa_visceral_default = safe_int(st.session_state["grasa_visceral"], 1)
+            grasa_visceral_default = safe_int(st.session_state["grasa_visceral"], 0)
             if grasa_visceral_default < 1 or grasa_visceral_default > 59:
-                grasa_visceral_default = 1
+                grasa_visceral_default = None
         except:
-            grasa_visceral_default = 1
+            grasa_visceral_default = None
     else:
-        grasa_visceral_default = 1
+        grasa_visceral_default = None
     
     grasa_visceral = st.number_input(
         "🫀 Grasa visceral (nivel, opcional)",
@@ -7959,7 +3866,8 @@ if datos_personales_completos and st.session_state.datos_completos:
         value=grasa_visceral_default,
         step=1,
         key=grasa_visceral_key,
-        help="La grasa visceral es la grasa que rodea los órganos internos. Valores saludables: 1-12. Valores altos (≥13) indican mayor riesgo de enfermedades metabólicas. Este dato se guarda y se incluye en el reporte, pero no afecta los cálculos."
+        placeholder="No medido",
+        help="La grasa visceral es la grasa que rodea los órganos internos. Valores saludables: 1-12. Valores altos (≥13) indican mayor riesgo de enfermedades metabólicas. Este dato se guarda y se incluye en el reporte, pero no afecta los cálculos. Si no lo conoces, déjalo vacío."
     )
     st.session_state["grasa_visceral"] = grasa_visceral
 
@@ -8050,18 +3958,24 @@ if datos_personales_completos and st.session_state.datos_completos:
     circunferencia_cadera = st.session_state.get("circunferencia_cadera", 0.0)
 
     grasa_corregida = corregir_porcentaje_grasa(grasa_corporal, metodo_grasa, sexo)
-    mlg = calcular_mlg(peso, grasa_corregida)
-    tmb = calcular_tmb_cunningham(mlg)
+    # Entradas del grafo de cálculo: las métricas derivadas se resuelven una vez
+    # por versión y el envío de emails lee los mismos nodos (grafo_calculo.py)
+    grafo().fijar(sexo=sexo, edad=edad, peso=peso, estatura=estatura, grasa_corregida=grasa_corregida,
+                  circunferencia_cintura=circunferencia_cintura, circunferencia_cuello=circunferencia_cuello,
+                  circunferencia_cadera=circunferencia_cadera, masa_muscular_aparato=masa_muscular,
+                  nivel_entrenamiento=st.session_state.get('nivel_entrenamiento'), metodo_grasa=metodo_grasa)
+    mlg = grafo()['mlg']
+    tmb = grafo()['tmb']
 
     # Validar estatura > 0
     if estatura <= 0:
         st.error("Error: La estatura debe ser mayor que cero para calcular FFMI.")
         ffmi = 0
     else:
-        ffmi = calcular_ffmi(mlg, estatura)
+        ffmi = grafo()['ffmi']
 
-    nivel_ffmi = clasificar_ffmi(ffmi, sexo)
-    edad_metabolica = calcular_edad_metabolica(edad, grasa_corregida, sexo)
+    nivel_ffmi = grafo()['nivel_ffmi']
+    edad_metabolica = grafo()['edad_metabolica']
 
     # Display results to user (controlled by USER_VIEW flag)
     if USER_VIEW:
@@ -8089,6 +4003,34 @@ if datos_personales_completos and st.session_state.datos_completos:
                 edad_num = 25
                 diferencia_edad = 0
             st.metric("Edad Metabólica", f"{edad_metabolica} años", f"{'+' if diferencia_edad > 0 else ''}{diferencia_edad} años")
+
+        # Rango probable por el error de medición del método (Monte-Carlo, motor_calculo.py)
+        if peso > 0 and estatura > 0:
+            rango = propagar_incertidumbre({'sexo': sexo, 'peso': peso, 'estatura': estatura,
+                                            'grasa_corregida': grasa_corregida, 'metodo_grasa': metodo_grasa},
+                                           semilla=0)
+            st.caption(
+                f"Rango probable P10–P90 (error del método ±{rango['error_grasa']:.1f}% grasa): "
+                f"MLG {rango['mlg']['p10']:.1f}–{rango['mlg']['p90']:.1f} kg · "
+                f"TMB {rango['tmb']['p10']:.0f}–{rango['tmb']['p90']:.0f} kcal · "
+                f"FFMI {rango['ffmi']['p10']:.1f}–{rango['ffmi']['p90']:.1f}"
+            )
+
+        # Technical details: TMB de cada ecuación del ensamble (el plan usa Katch-McArdle)
+        if SHOW_TECH_DETAILS and peso > 0 and estatura > 0:
+            ensamble_tmb = tmb_ensamble(peso, estatura, safe_int(edad, 30), sexo, mlg)
+            st.caption(
+                "TMB por ecuación: "
+                f"Katch-McArdle {ensamble_tmb['katch_mcardle']:.0f} · Cunningham {ensamble_tmb['cunningham']:.0f} · "
+                f"Mifflin-St Jeor {ensamble_tmb['mifflin_st_jeor']:.0f} · "
+                f"Harris-Benedict {ensamble_tmb['harris_benedict']:.0f} kcal "
+                f"(dispersión {ensamble_tmb['rango_pct']:.0f}%)"
+            )
+
+        # Technical details: % grasa por circunferencias (US Navy / RFM) frente al valor corregido
+        contraste_grasa = grafo()['contraste_grasa']
+        if SHOW_TECH_DETAILS and contraste_grasa['implausible']:
+            st.warning(f"⚠️ {contraste_grasa['aviso']}")
         
         # Mostrar masa muscular y grasa visceral si están disponibles
         try:
@@ -8416,7 +4358,9 @@ metodo_grasa = st.session_state.get("metodo_grasa", "Omron HBF-516 (BIA)")
 
 # --- Recalcula variables críticas para PSMF ---
 grasa_corregida = corregir_porcentaje_grasa(grasa_corporal, metodo_grasa, sexo)
-mlg = calcular_mlg(peso, grasa_corregida)
+grafo().fijar(sexo=sexo, edad=edad, peso=peso, estatura=estatura, grasa_corregida=grasa_corregida,
+              metodo_grasa=metodo_grasa)
+mlg = grafo()['mlg']
 
 # --- Cálculo PSMF ---
 # PSMF calculations ALWAYS run to ensure backend processing and reporting
@@ -8492,7 +4436,7 @@ if fuera_rango:
 # Los datos se capturan y se incluirán automáticamente en el email final
 step3_icon, step3_color, step3_status = get_step_status_indicator(1)
 step3_title = f"😴 **Paso 3: Estado de Recuperación (Sueño + Estrés)** {step3_icon}"
-with st.expander(step3_title, expanded=True):
+with st.expander(step3_title, expanded=True), span("form.paso3"):
     st.markdown(f'<p style="color: {step3_color}; font-size: 0.9rem; margin-bottom: 1rem; font-weight: bold;">Estado: {step3_status}</p>', unsafe_allow_html=True)
     st.markdown('<p style="color: #F4C430; font-size: 0.9rem; margin-bottom: 1rem;">✓ Evalúa tu calidad de sueño y nivel de estrés</p>', unsafe_allow_html=True)
     if 'progress' in locals():
@@ -8504,11 +4448,15 @@ with st.expander(step3_title, expanded=True):
 # Ubicado después de datos antropométricos para contexto completo
 # La información se captura y se incluirá en el reporte sin afectar cálculos
 ciclo_menstrual = formulario_ciclo_menstrual(sexo)
+# El reporte envía la fase guardada en session_state (obligatoria solo para mujeres)
+if sexo == "Mujer":
+    ciclo_menstrual = st.session_state.get('ciclo_menstrual')
+completitud().actualizar(sexo=sexo, ciclo_menstrual=ciclo_menstrual)
 
 # PASO 4: Evaluación funcional (Obligatorio - Siempre expandido)
 step4_icon, step4_color, step4_status = get_step_status_indicator(2)
 step4_title = f"💪 **Paso 4: Evaluación Funcional y Nivel de Entrenamiento** {step4_icon}"
-with st.expander(step4_title, expanded=True):
+with st.expander(step4_title, expanded=True), span("form.paso4"):
     st.markdown(f'<p style="color: {step4_color}; font-size: 0.9rem; margin-bottom: 1rem; font-weight: bold;">Estado: {step4_status}</p>', unsafe_allow_html=True)
     st.markdown('<p style="color: #F4C430; font-size: 0.9rem; margin-bottom: 1rem;">✓ Evalúa tu capacidad funcional y experiencia de entrenamiento</p>', unsafe_allow_html=True)
     if 'progress' in locals():
@@ -8524,56 +4472,16 @@ with st.expander(step4_title, expanded=True):
     **Responde las siguientes preguntas sobre tu historial de entrenamiento:**
     """)
     
-    # Pregunta 1: Frecuencia real de entrenamiento
-    st.markdown("#### 1️⃣ Frecuencia de entrenamiento")
-    frecuencia = st.radio(
-        "En los **últimos 6 meses**, ¿con qué frecuencia has entrenado de manera consistente?",
-        [
-            "Menos de 1 vez por semana o con pausas largas (más de 2 semanas sin entrenar)",
-            "1-2 veces por semana de forma irregular",
-            "2-3 veces por semana de forma consistente",
-            "4 o más veces por semana de forma consistente"
-        ],
-        help="Sé honesto. La consistencia real es más importante que la intención.",
-        key="frecuencia_entrenamiento"
-    )
-    
-    # Pregunta 2: Tiempo total de experiencia
-    st.markdown("#### 2️⃣ Tiempo de experiencia acumulada")
-    tiempo_experiencia = st.radio(
-        "¿Cuánto tiempo **acumulado** llevas entrenando de forma consistente en tu vida? (suma todos los períodos en los que entrenaste regularmente)",
-        [
-            "Menos de 6 meses",
-            "6 meses a 1 año",
-            "1 a 2 años",
-            "Más de 2 años"
-        ],
-        help="Cuenta solo los períodos donde entrenaste al menos 2 veces por semana de forma regular.",
-        key="tiempo_experiencia"
-    )
-    
-    # Pregunta 3: Tipo de entrenamiento
-    st.markdown("#### 3️⃣ Tipo de entrenamiento y progresión")
-    tipo_entrenamiento = st.radio(
-        "¿Qué describe mejor tu forma de entrenar actualmente?",
-        [
-            "Hago ejercicios variados sin llevar registro ni plan específico",
-            "Sigo rutinas de internet o apps pero no registro mis cargas ni progresión",
-            "Sigo un programa con progresión de cargas y llevo registro de mis entrenamientos",
-            "Planeo mi entrenamiento considerando periodización, volumen, intensidad y ajusto según mi progreso"
-        ],
-        help="Selecciona la opción que refleje tu realidad actual, no tus aspiraciones.",
-        key="tipo_entrenamiento"
-    )
+    # Preguntas 1-3 (frecuencia, tiempo acumulado, tipo de entrenamiento) desde cuestionario.json
+    respuestas_experiencia = cuestionario.renderizar_seccion("experiencia", st)
+    frecuencia = respuestas_experiencia["frecuencia_entrenamiento"]
+    tiempo_experiencia = respuestas_experiencia["tiempo_experiencia"]
+    tipo_entrenamiento = respuestas_experiencia["tipo_entrenamiento"]
     
     # Guardar respuestas en session state
     if frecuencia and tiempo_experiencia and tipo_entrenamiento:
         st.session_state.experiencia_completa = True
-        st.session_state.experiencia_respuestas = {
-            'frecuencia': frecuencia,
-            'tiempo': tiempo_experiencia,
-            'tipo': tipo_entrenamiento
-        }
+        st.session_state.experiencia_respuestas = cuestionario.respuestas("experiencia", respuestas_experiencia)
         
         # Mostrar confirmación
         st.success("✅ Cuestionario de experiencia completado")
@@ -8581,6 +4489,9 @@ with st.expander(step4_title, expanded=True):
     else:
         st.session_state.experiencia_completa = False
         experiencia = False
+    completitud().actualizar(experiencia_completa=st.session_state.experiencia_completa,
+                             experiencia_seleccion=st.session_state.get("experiencia_seleccion"),
+                             frecuencia_entrenamiento=frecuencia)
 
     # Allow all users to access functional exercises regardless of experience level
     st.markdown("### 🏆 Evaluación de rendimiento por categoría")
@@ -8822,6 +4733,7 @@ with st.expander(step4_title, expanded=True):
 
 # Guardar datos
 st.session_state.datos_ejercicios = ejercicios_data
+completitud().actualizar(datos_ejercicios=ejercicios_data)
 
 # Initialize variables with safe defaults
 if 'nivel_ffmi' not in locals() or nivel_ffmi is None:
@@ -8844,29 +4756,10 @@ puntos_ffmi = {"Bajo": 1, "Promedio": 2, "Bueno": 3, "Avanzado": 4, "Élite": 5}
 if st.session_state.get('experiencia_completa', False):
     respuestas = st.session_state.get('experiencia_respuestas', {})
     
-    # Frecuencia (0-1.5 puntos)
-    frecuencia_puntos = {
-        "Menos de 1 vez por semana o con pausas largas (más de 2 semanas sin entrenar)": 0.25,
-        "1-2 veces por semana de forma irregular": 0.5,
-        "2-3 veces por semana de forma consistente": 1.0,
-        "4 o más veces por semana de forma consistente": 1.5
-    }.get(respuestas.get('frecuencia', ''), 0.25)
-    
-    # Tiempo de experiencia (0-1.5 puntos)
-    tiempo_puntos = {
-        "Menos de 6 meses": 0.25,
-        "6 meses a 1 año": 0.5,
-        "1 a 2 años": 1.0,
-        "Más de 2 años": 1.5
-    }.get(respuestas.get('tiempo', ''), 0.25)
-    
-    # Tipo de entrenamiento (0-1 punto)
-    tipo_puntos = {
-        "Hago ejercicios variados sin llevar registro ni plan específico": 0.25,
-        "Sigo rutinas de internet o apps pero no registro mis cargas ni progresión": 0.5,
-        "Sigo un programa con progresión de cargas y llevo registro de mis entrenamientos": 0.75,
-        "Planeo mi entrenamiento considerando periodización, volumen, intensidad y ajusto según mi progreso": 1.0
-    }.get(respuestas.get('tipo', ''), 0.25)
+    # Frecuencia (0-1.5), tiempo de experiencia (0-1.5) y tipo de entrenamiento (0-1): cuestionario.json
+    frecuencia_puntos = cuestionario.puntos['frecuencia_entrenamiento'].get(respuestas.get('frecuencia', ''), 0.25)
+    tiempo_puntos = cuestionario.puntos['tiempo_experiencia'].get(respuestas.get('tiempo', ''), 0.25)
+    tipo_puntos = cuestionario.puntos['tipo_entrenamiento'].get(respuestas.get('tipo', ''), 0.25)
     
     # Total: 1-4 puntos (similar al sistema anterior)
     puntos_exp = frecuencia_puntos + tiempo_puntos + tipo_puntos
@@ -8949,6 +4842,7 @@ else:
 
 # Store in session_state for consistent access
 st.session_state.nivel_entrenamiento = nivel_entrenamiento
+grafo().fijar(nivel_entrenamiento=nivel_entrenamiento)
 
 # Validar si todos los ejercicios funcionales y experiencia están completos
 ejercicios_funcionales_completos = len(ejercicios_data) >= 5  # Debe tener los 5 ejercicios
@@ -9073,16 +4967,12 @@ if 'porc_potencial' not in locals():
 # Mostrar potencial genético solo en modo GREEN
 # En modo AMBER se degrada, en modo RED se oculta completamente
 if 'ffmi' in locals() and 'nivel_entrenamiento' in locals() and ffmi > 0 and 'modo_ffmi' in locals():
-    if sexo == "Hombre":
-        ffmi_genetico_max = {
-            "principiante": 22, "intermedio": 23.5,
-            "avanzado": 24.5, "élite": 25
-        }.get(nivel_entrenamiento, 22)
-    else:
-        ffmi_genetico_max = {
-            "principiante": 19, "intermedio": 20,
-            "avanzado": 20.5, "élite": 21
-        }.get(nivel_entrenamiento, 19)
+    # Techo por estatura y estructura ósea (Casey Butt, ver potencial_muscular.py)
+    potencial = potencial_muscular(sexo, estatura, mlg, grasa_corregida,
+                                   nivel_entrenamiento=nivel_entrenamiento)
+    if potencial['ffmi_max']:
+        ffmi_genetico_max = potencial['ffmi_max']
+    anos_al_95 = potencial['anos_al_95']
 
     porc_potencial = min((ffmi / ffmi_genetico_max) * 100, 100) if ffmi_genetico_max > 0 else 0
 
@@ -9097,6 +4987,7 @@ if 'ffmi' in locals() and 'nivel_entrenamiento' in locals() and ffmi > 0 and 'mo
         - FFMI actual: {ffmi:.2f}
         - FFMI máximo estimado: {ffmi_genetico_max:.1f}
         - Margen de crecimiento: {max(0, ffmi_genetico_max - ffmi):.1f} puntos
+        - Años estimados hasta el 95% del potencial: {anos_al_95 or 0:.1f} (nivel {nivel_entrenamiento})
         """)
         st.markdown('</div>', unsafe_allow_html=True)
     elif modo_ffmi == "AMBER":
@@ -9134,7 +5025,7 @@ else:
 # PASO 5: Actividad física diaria (Obligatorio - Siempre expandido)
 step5_icon, step5_color, step5_status = get_step_status_indicator(4)
 step5_title = f"🚶 **Paso 5: Nivel de Actividad Física Diaria** {step5_icon}"
-with st.expander(step5_title, expanded=True):
+with st.expander(step5_title, expanded=True), span("form.paso5"):
     st.markdown(f'<p style="color: {step5_color}; font-size: 0.9rem; margin-bottom: 1rem; font-weight: bold;">Estado: {step5_status}</p>', unsafe_allow_html=True)
     st.markdown('<p style="color: #F4C430; font-size: 0.9rem; margin-bottom: 1rem;">✓ Indica tu nivel de actividad física en el día a día</p>', unsafe_allow_html=True)
     if 'progress' in locals():
@@ -9193,6 +5084,7 @@ with st.expander(step5_title, expanded=True):
     geaf = obtener_geaf(nivel_actividad_text)
     st.session_state.nivel_actividad = nivel_actividad_text
     st.session_state.geaf = geaf
+    completitud().actualizar(actividad_diaria=nivel_actividad_text)
 
     # Technical details: Display GEAF factor details (controlled by SHOW_TECH_DETAILS flag)
     if SHOW_TECH_DETAILS:
@@ -9250,7 +5142,7 @@ step6_icon, step6_color, step6_status = get_step_status_indicator(3)
 if MOSTRAR_ETA_AL_USUARIO:
     # BLOQUE 4: ETA (Efecto Térmico de los Alimentos)
     step6_title = f"⚡ **Paso 6: Análisis Metabólico Personalizado** {step6_icon}"
-    with st.expander(step6_title, expanded=True):
+    with st.expander(step6_title, expanded=True), span("form.paso6"):
         st.markdown(f'<p style="color: {step6_color}; font-size: 0.9rem; margin-bottom: 1rem; font-weight: bold;">Estado: {step6_status}</p>', unsafe_allow_html=True)
         if 'progress' in locals():
             progress.progress(70)
@@ -9298,7 +5190,7 @@ else:
 # PASO 7: Entrenamiento de fuerza (Obligatorio - Siempre expandido)
 step7_icon, step7_color, step7_status = get_step_status_indicator(5)
 step7_title = f"🏋️ **Paso 7: Gasto Energético del Ejercicio (GEE)** {step7_icon}"
-with st.expander(step7_title, expanded=True):
+with st.expander(step7_title, expanded=True), span("form.paso7"):
     st.markdown(f'<p style="color: {step7_color}; font-size: 0.9rem; margin-bottom: 1rem; font-weight: bold;">Estado: {step7_status}</p>', unsafe_allow_html=True)
     st.markdown('<p style="color: #F4C430; font-size: 0.9rem; margin-bottom: 1rem;">✓ Proporciona información sobre tu rutina de entrenamiento</p>', unsafe_allow_html=True)
     if 'progress' in locals():
@@ -9931,69 +5823,17 @@ else:
 def datos_completos_para_email():
     """
     Valida que todos los campos obligatorios del cuestionario estén completos.
+    Lee el seguimiento de completitud que ya actualizaron las secciones.
     
     Returns:
         list: Lista de nombres de campos faltantes. Lista vacía si todo está completo.
     """
-    faltantes = []
-    
-    # Validar datos personales básicos
-    if not nombre or not nombre.strip():
-        faltantes.append("Nombre completo")
-    if not telefono or not telefono.strip():
-        faltantes.append("Teléfono")
-    if not email_cliente or not email_cliente.strip():
-        faltantes.append("Email")
-    if not edad or edad <= 0:
-        faltantes.append("Edad")
-    
-    # Validar ciclo menstrual (obligatorio solo para mujeres)
-    if sexo == "Mujer":
-        ciclo_menstrual = st.session_state.get('ciclo_menstrual')
-        if not ciclo_menstrual or ciclo_menstrual == "Selecciona una opción...":
-            faltantes.append("Fase del ciclo menstrual")
-    
-    # Validar datos antropométricos
-    if not peso or peso <= 0:
-        faltantes.append("Peso corporal")
-    if not estatura or estatura <= 0:
-        faltantes.append("Estatura")
-    if not grasa_corporal or grasa_corporal <= 0:
-        faltantes.append("Porcentaje de grasa corporal")
-    
-    # Validar experiencia de entrenamiento
-    # Check both the new system and old system for backward compatibility
-    if st.session_state.get('experiencia_completa', False):
-        # Nuevo sistema - validar que esté completo
-        pass  # Ya está validado
-    else:
-        # Sistema antiguo
-        experiencia_valor = st.session_state.get("experiencia_seleccion", "") or st.session_state.get("experiencia", "")
-        if not experiencia_valor or not isinstance(experiencia_valor, str) or len(experiencia_valor) < 3:
-            faltantes.append("Nivel de experiencia en entrenamiento")
-    
-    # Validar ejercicios funcionales (deben ser 5)
-    ejercicios_data = st.session_state.get("datos_ejercicios", {})
-    if not ejercicios_data or len(ejercicios_data) < 5:
-        faltantes.append(f"Ejercicios funcionales completos (tienes {len(ejercicios_data) if ejercicios_data else 0} de 5 requeridos)")
-    
-    # Validar fotografías de progreso (obligatorias)
-    progress_photos = st.session_state.get("progress_photos", {})
     photo_labels = {
         "front_relaxed": "Foto 1 - Frontal relajado",
         "side_relaxed_right": "Foto 2 - Perfil lateral relajado (derecho)",
         "back_relaxed": "Foto 3 - Posterior relajado"
     }
-    for key in REQUIRED_PROGRESS_PHOTOS:
-        if not progress_photos.get(key):
-            faltantes.append(photo_labels.get(key, f"Foto requerida: {key}"))
-    
-    # Validar metas personales (obligatorio)
-    metas_personales = st.session_state.get("metas_personales", "")
-    if not metas_personales or len(metas_personales.strip()) < 50:
-        faltantes.append("Metas Personales - Objetivos a mediano y largo plazo (mínimo 50 caracteres)")
-    
-    return faltantes
+    return completitud().faltantes_email({f"foto_{key}": label for key, label in photo_labels.items()})
 
 # Construir tabla_resumen robusta para el email (idéntica a tu estructura, NO resumida)
 # Calculate safe values
@@ -10141,10 +5981,19 @@ wthr_report = 0.0
 wthr_str = 'No medido'
 wthr_clasificacion_str = ''
 if circunferencia_cintura_report > 0 and estatura > 0:
-    wthr_report = circunferencia_cintura_report / estatura
+    wthr_report = grafo().get('wthr') or circunferencia_cintura_report / estatura
     wthr_str = f"{wthr_report:.3f}"
     wthr_clasificacion_str = f" → {clasificar_wthr(wthr_report)}"
 
+# % grasa por circunferencias (US Navy / RFM) como control del valor corregido
+contraste_grasa_report = grafo().get('contraste_grasa') or {}
+contraste_grasa_str = 'No medido (faltan circunferencias)'
+if contraste_grasa_report.get('circunferencias') is not None:
+    contraste_grasa_str = (f"{contraste_grasa_report['circunferencias']:.1f}% "
+                           f"(diferencia {contraste_grasa_report['divergencia']:+.1f} puntos)"
+                           + (" ⚠️ DIVERGENCIA NO PLAUSIBLE: revisar la medición"
+                              if contraste_grasa_report['implausible'] else ""))
+
 # Agregar secciones adicionales del cuestionario - mover antes de tabla_resumen
 experiencia_text = experiencia if 'experiencia' in locals() and experiencia else "No especificado"
 nivel_actividad_text = nivel_actividad.split('(')[0].strip() if 'nivel_actividad' in locals() and nivel_actividad else "No especificado"
@@ -10181,25 +6030,11 @@ categoria_grasa_corporal = (
 # ✅ INICIALIZAR VARIABLES GLOBALES DE EMAIL (CRÍTICO: prevenir NameError en reenvío)
 # Esto es crucial porque estas variables se usan en enviar_email_parte2()
 # incluso cuando el usuario sólo hace click en "Reenviar Email" sin pasar por el flujo completo
-if 'ffmi' in locals():
-    ffmi_para_email = calcular_ffmi(mlg, estatura) if mlg > 0 and estatura > 0 else None
-else:
-    ffmi_para_email = calcular_ffmi(mlg, estatura) if mlg > 0 and estatura > 0 else None
-
-if 'masa_muscular' in st.session_state:
-    masa_muscular_aparato = st.session_state.get('masa_muscular', 0)
-else:
-    masa_muscular_aparato = 0
-
-if 'circunferencia_cintura' in locals() and circunferencia_cintura:
-    wthr = circunferencia_cintura / estatura if estatura > 0 else None
-else:
-    wthr = None
-
-if 'masa_muscular' in st.session_state:
-    masa_muscular_estimada_email = estimar_masa_muscular_desde_mlg(mlg, sexo) if mlg > 0 else None
-else:
-    masa_muscular_estimada_email = estimar_masa_muscular_desde_mlg(mlg, sexo) if mlg > 0 else None
+# FFMI, WtHR y masa muscular estimada: nodos del grafo ya resueltos en el render
+ffmi_para_email = grafo().get('ffmi')
+masa_muscular_aparato = st.session_state.get('masa_muscular', 0)
+wthr = grafo().get('wthr')
+masa_muscular_estimada_email = grafo().get('masa_muscular_estimada')
 
 # Variables que podrían no estar definidas si el usuario solo hace click en "Reenviar"
 if 'nivel_entrenamiento' not in locals():
@@ -10263,6 +6098,7 @@ SECCIÓN 2: COMPOSICIÓN CORPORAL COMPLETA
    • % Grasa corporal medido: {grasa_corporal}%
    • % Grasa corregido (equivalente DEXA): {grasa_corregida:.1f}%
    • Ajuste aplicado: {grasa_corregida - grasa_corporal:+.1f}%
+   • % Grasa por circunferencias (Navy/RFM): {contraste_grasa_str}
    • Categoría de adiposidad: {categoria_grasa_corporal}
    
    • Masa Libre de Grasa (MLG): {mlg:.1f} kg
@@ -10367,16 +6203,10 @@ SECCIÓN 4: ESTADO DE RECUPERACIÓN (SUEÑO + ESTRÉS)
    adaptación al entrenamiento.
 
 🌙 4.1 CALIDAD DEL SUEÑO:
-   • Horas por noche: {data_se.get('horas_sueno', 'No reportado')}
-   • Tiempo para conciliar: {data_se.get('tiempo_conciliar', 'No reportado')}
-   • Despertares nocturnos: {data_se.get('veces_despierta', 'No reportado')}
-   • Calidad percibida: {data_se.get('calidad_sueno', 'No reportado')}
+{cuestionario.lineas_reporte('suenyo', data_se)}
 
 🧠 4.2 NIVEL DE ESTRÉS:
-   • Sensación de sobrecarga: {data_se.get('sobrecarga', 'No reportado')}
-   • Falta de control: {data_se.get('falta_control', 'No reportado')}
-   • Dificultad para manejar: {data_se.get('dificultad_manejar', 'No reportado')}
-   • Irritabilidad: {data_se.get('irritabilidad', 'No reportado')}
+{cuestionario.lineas_reporte('estres', data_se)}
 
 📊 4.3 PUNTUACIONES CALCULADAS:
 
@@ -10428,6 +6258,26 @@ except:
         'explicacion_textual': 'Error en cálculo'
     }
 
+# Proyecciones a 1, 2 y 3 meses (simulación semana a semana con banda P10/P50/P90)
+try:
+    GE_proyeccion = GE if 'GE' in locals() else 0
+    if GE_proyeccion > 0 and peso > 0:
+        with span("motor.proyeccion"):
+            from proyeccion_semanal import simular_proyeccion, resumir_horizontes
+            simulacion_proyeccion = simular_proyeccion(
+                peso,
+                grasa_corregida,
+                GE_proyeccion * (1 + porcentaje_email / 100),
+                GE_proyeccion,
+                semanas=13
+            )
+            proyecciones = resumir_horizontes(simulacion_proyeccion, horizontes=(4, 8, 13))
+    else:
+        proyecciones = []
+except Exception:
+    # Entradas inválidas (ValueError): el reporte se envía sin bloque de proyección
+    proyecciones = []
+
 tabla_resumen += f"""
 
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -10482,7 +6332,7 @@ SECCIÓN 5: GASTO ENERGÉTICO (MOTOR METABÓLICO)
 suenyo_estres_data = st.session_state.get('suenyo_estres_data', {})
 calidad_suenyo_valor = suenyo_estres_data.get('horas_sueno', 7.0)
 nivel_estres_valor = suenyo_estres_data.get('nivel_estres_percibido', 'moderado')
-ir_se_valor = suenyo_estres_data.get('ir_se', 60.0)  # IR-SE para guardrails
+ir_se_valor = suenyo_estres_data.get('ir_se')  # IR-SE para el ajuste por recuperación
 
 # Validar tipos
 try:
@@ -10498,9 +6348,9 @@ if not nivel_estres_valor or not isinstance(nivel_estres_valor, str):
     nivel_estres_valor = 'moderado'
 
 try:
-    ir_se_valor = float(ir_se_valor) if ir_se_valor is not None else 60.0
+    ir_se_valor = float(ir_se_valor) if ir_se_valor is not None else None
 except (TypeError, ValueError):
-    ir_se_valor = 60.0
+    ir_se_valor = None
 
 # Inicializar variables de fase y porcentaje
 if 'fase' not in locals():
@@ -10516,12 +6366,13 @@ if 'fbeo' not in locals():
 
 # Determinar fase y porcentaje según % grasa corporal (lógica automática)
 fase, porcentaje = determinar_fase_nutricional_refinada(grasa_corregida, sexo)
-fbeo = 1 + porcentaje / 100  # Factor de balance energético
 
 # Calcular ingesta con déficit/superávit determinado automáticamente
-ingesta_calorica_tradicional = GE * fbeo if 'GE' in locals() and GE > 0 else 0
+ingesta_calorica_tradicional = GE * (1 + porcentaje / 100) if 'GE' in locals() and GE > 0 else 0
 
 # Calcular macros con la lógica tradicional
+ajuste_recuperacion = None
+plan_recuperacion = {}
 if ingesta_calorica_tradicional > 0:
     macros_tradicional = calcular_macros_tradicional(
         ingesta_calorica_tradicional=ingesta_calorica_tradicional,
@@ -10531,8 +6382,20 @@ if ingesta_calorica_tradicional > 0:
         peso=peso,
         mlg=mlg
     )
+    # Ajuste por recuperación (IR-SE del cuestionario de sueño + estrés): la misma
+    # etapa que evaluar_cliente() aplica tope de déficit, refeeds y ciclaje 4-3
+    plan_recuperacion = etapa_recuperacion(
+        {'porcentaje': porcentaje, 'fase': fase, 'gasto_energetico': GE, 'ingesta_calorica': ingesta_calorica_tradicional,
+         'macros': macros_tradicional, 'tmb': tmb, 'sexo': sexo, 'grasa_corregida': grasa_corregida, 'peso': peso,
+         'mlg': mlg, 'nivel_entrenamiento': nivel_entrenamiento},
+        {'ir_se': ir_se_valor, 'nivel_recuperacion': suenyo_estres_data.get('nivel_recuperacion')})
+    ajuste_recuperacion = plan_recuperacion['recuperacion']
+    fase, porcentaje = plan_recuperacion['fase'], plan_recuperacion['porcentaje']
+    ingesta_calorica_tradicional = plan_recuperacion['ingesta_calorica']
+    macros_tradicional = plan_recuperacion['macros']
 else:
     macros_tradicional = {}
+fbeo = 1 + porcentaje / 100  # Factor de balance energético
 
 # Crear estructura compatible para el resto del código
 # ✅ USAR MACROS DE LÓGICA TRADICIONAL
@@ -10547,11 +6410,12 @@ if macros_tradicional:
     plan_tradicional_calorias = ingesta_calorica_tradicional
     base_proteina_nombre_email = macros_tradicional.get('base_proteina', 'peso')
     deficit_pct_aplicado = abs(porcentaje)  # Déficit/superávit determinado automáticamente
-    deficit_warning = ""
+    deficit_warning = ajuste_recuperacion['aviso'] if ajuste_recuperacion else ""
     factor_proteina_tradicional_email = macros_tradicional.get('factor_proteina', 1.6)
     usar_mlg_para_proteina_email = False  # La lógica tradicional no usa MLG por defecto
     base_proteina_kg_email = peso
-    tiene_ciclaje = False  # No hay ciclaje en lógica tradicional
+    # Ciclaje 4-3 solo cuando la recuperación lo pide
+    tiene_ciclaje = 'ciclaje_4_3' in plan_recuperacion
 else:
     proteina_g_tradicional = 0
     grasa_g_tradicional = 0
@@ -10594,6 +6458,10 @@ ciclaje_low_days = 4
 ciclaje_low_kcal = plan_tradicional_calorias * 0.8 if plan_tradicional_calorias > 0 else 0
 ciclaje_high_days = 3
 ciclaje_high_kcal = plan_tradicional_calorias * 1.2 if plan_tradicional_calorias > 0 else 0
+if tiene_ciclaje:
+    macros_fase['ciclaje_4_3'] = plan_recuperacion['ciclaje_4_3']
+    ciclaje_low_kcal = macros_fase['ciclaje_4_3']['low_days']['kcal']
+    ciclaje_high_kcal = macros_fase['ciclaje_4_3']['high_days']['kcal']
 
 USANDO_NUEVA_LOGICA = False
 print(f"✅ Nueva lógica activada correctamente")
@@ -11039,7 +6907,13 @@ if st.session_state.datos_completos and 'peso' in locals() and peso > 0:
 resultado_metas_personales = formulario_metas_personales()
 
 # --- Progress Photos Section (placed before final submission) ---
-render_progress_photos_section()
+with span("ui.fotos_progreso"):
+    render_progress_photos_section()
+
+completitud().actualizar(metas_personales=st.session_state.get("metas_personales", ""),
+                         progress_photos=st.session_state.get("progress_photos", {}))
+with span("ui.progreso"):
+    render_dynamic_progress(contenedor_progreso)
 
 # --- Botón para enviar email (solo si no se ha enviado y todo completo) ---
 if not st.session_state.get("correo_enviado", False):
@@ -11065,50 +6939,61 @@ if not st.session_state.get("correo_enviado", False):
                 progress_photos = st.session_state.get("progress_photos", {})
                 
                 # Definir variables opcionales para evitar errores de Pylance
-                wthr = None
                 GEAF = None
-                proyecciones = []  # Inicializar como lista vacía en lugar de None
-                
-                # Calcular wthr si tenemos circunferencia_cintura
-                if 'circunferencia_cintura' in locals() and circunferencia_cintura and circunferencia_cintura > 0 and estatura > 0:
-                    wthr = circunferencia_cintura / estatura
+                if 'proyecciones' not in locals():
+                    proyecciones = []  # Inicializar como lista vacía en lugar de None
                 
                 # Enviar email completo a administración
                 ok = enviar_email_resumen(tabla_resumen, nombre, email_cliente, fecha_llenado, edad, telefono, progress_photos)
                 
-                # Calcular FFMI antes de enviar (asegurar que siempre existe)
-                ffmi_para_email = calcular_ffmi(mlg, estatura) if 'ffmi' not in locals() or ffmi is None else ffmi
-                
-                # Recuperar masa muscular original del aparato (dato ingresado por usuario)
+                # FFMI, WtHR y masa muscular estimada: nodos ya resueltos del grafo (sin recalcular)
+                ffmi_para_email = grafo().get('ffmi')
+                wthr = grafo().get('wthr')
                 masa_muscular_aparato = st.session_state.get('masa_muscular', 0)
-                
-                # Calcular masa muscular estimada científicamente
-                masa_muscular_estimada_email = estimar_masa_muscular_desde_mlg(
-                    mlg, 
-                    sexo, 
-                    nivel_entrenamiento if 'nivel_entrenamiento' in locals() else 'intermedio'
-                )
+                masa_muscular_estimada_email = grafo().get('masa_muscular_estimada')
                 
                 # Enviar reporte de evaluación corporal completo al cliente
                 ok_cliente = enviar_email_cliente(
-                    nombre, email_cliente, fecha_llenado, edad, sexo, peso, estatura, imc,
-                    grasa_corregida, mlg, 
-                    ffmi_para_email,  # Siempre enviamos FFMI calculado
-                    nivel_entrenamiento if 'nivel_entrenamiento' in locals() else None,
-                    circunferencia_cintura if 'circunferencia_cintura' in locals() else None,
-                    grasa_visceral if 'grasa_visceral' in locals() else None,
-                    edad_metabolica if 'edad_metabolica' in locals() else None,
-                    wthr if 'wthr' in locals() else None,
-                    peso - mlg,  # masa_grasa
-                    progress_photos,
-                    masa_muscular_aparato,  # Masa muscular del Omron
-                    masa_muscular_estimada_email  # Masa muscular estimada
+                    nodos_email(), nombre, email_cliente, fecha_llenado,
+                    grasa_visceral=grasa_visceral if 'grasa_visceral' in locals() else None,
+                    progress_photos=progress_photos
                 )
                 
                 if ok:
                     st.session_state["correo_enviado"] = True
+                    cerrar_sesion_persistida()
                     st.success("✅ Email completo enviado exitosamente a administración")
                     
+                    # Guardar la evaluación para el panel de administración (reenvío y estadísticas);
+                    # si no es plausible frente a la población queda en cuarentena (plausibilidad.py)
+                    # y, si lo es, su lectura de masa muscular actualiza la calibración del aparato
+                    try:
+                        registrar_con_cuarentena(obtener_registro_evaluaciones(), [{
+                            'nombre': nombre, 'email': email_cliente, 'telefono': telefono,
+                            'fecha': str(fecha_llenado), 'edad': edad, 'sexo': sexo, 'peso': peso,
+                            'metodo_grasa': metodo_grasa,
+                            'estatura': estatura, 'imc': imc, 'grasa_corregida': grasa_corregida,
+                            'mlg': mlg, 'ffmi': ffmi_para_email,
+                            'nivel_entrenamiento': nivel_entrenamiento if 'nivel_entrenamiento' in locals() else None,
+                            'circunferencia_cintura': circunferencia_cintura if 'circunferencia_cintura' in locals() else None,
+                            'circunferencia_cuello': circunferencia_cuello if 'circunferencia_cuello' in locals() else None,
+                            'circunferencia_cadera': circunferencia_cadera if 'circunferencia_cadera' in locals() else None,
+                            'contraste_grasa': grafo().get('contraste_grasa'),
+                            'grasa_visceral': (grasa_visceral or None) if 'grasa_visceral' in locals() else None,
+                            'edad_metabolica': edad_metabolica if 'edad_metabolica' in locals() else None,
+                            'wthr': wthr if 'wthr' in locals() else None,
+                            'masa_grasa': peso - mlg,
+                            'masa_muscular_aparato': masa_muscular_aparato,
+                            'masa_muscular_estimada': masa_muscular_estimada_email,
+                            'categoria_bf': categoria_bf if 'categoria_bf' in locals() else None,
+                            'psmf_aplicable': st.session_state.get('psmf_aplicable'),
+                            'suenyo_estres_data': st.session_state.get('suenyo_estres_data'),
+                            'ciclo_menstrual': st.session_state.get('ciclo_menstrual'),
+                        }], calibracion=obtener_calibracion_musculo())
+                    except Exception as e:
+                        # El registro es auxiliar: nunca debe impedir el envío
+                        print(f"[MUPAI] No se pudo registrar la evaluación: {e}")
+                    
                     if ok_cliente:
                         st.success(f"✅ Reporte de evaluación enviado exitosamente a {email_cliente}")
                     else:
@@ -11116,21 +7001,10 @@ if not st.session_state.get("correo_enviado", False):
                     
                     # Enviar email Parte 2 (interno) con TODO EL CONTENIDO del email cliente
                     ok_parte2 = enviar_email_parte2(
-                        nombre, fecha_llenado, edad, sexo, peso, estatura, imc,
-                        grasa_corregida, mlg,
-                        ffmi_para_email,  # FFMI completo
-                        nivel_entrenamiento if 'nivel_entrenamiento' in locals() else None,
-                        circunferencia_cintura if 'circunferencia_cintura' in locals() else None,
-                        grasa_visceral if 'grasa_visceral' in locals() else None,
-                        edad_metabolica if 'edad_metabolica' in locals() else None,
-                        wthr if 'wthr' in locals() else None,
-                        peso - mlg,  # masa_grasa
-                        progress_photos,
-                        masa_muscular_aparato,  # Masa muscular del Omron
-                        masa_muscular_estimada_email,  # Masa muscular estimada
-                        masa_muscular if 'masa_muscular' in locals() else None,  # Fallback legacy
-                        tmb if 'tmb' in locals() else None,  # TMB
-                        st.session_state.get('ciclo_menstrual')
+                        nodos_email(), nombre, fecha_llenado,
+                        grasa_visceral=grasa_visceral if 'grasa_visceral' in locals() else None,
+                        progress_photos=progress_photos,
+                        ciclo_menstrual=st.session_state.get('ciclo_menstrual')
                     )
                     if ok_parte2:
                         st.success("✅ Reporte interno (Parte 2) enviado exitosamente")
@@ -11291,20 +7165,14 @@ if st.button("📧 Reenviar Email", key="reenviar_email", disabled=button_reenvi
             
             # Reenviar reporte de evaluación corporal completo al cliente
             ok_cliente = enviar_email_cliente(
-                nombre, email_cliente, fecha_llenado, edad, sexo, peso, estatura, imc,
-                grasa_corregida, mlg,
-                ffmi if 'ffmi' in locals() else None,
-                nivel_entrenamiento if 'nivel_entrenamiento' in locals() else None,
-                circunferencia_cintura if 'circunferencia_cintura' in locals() else None,
-                grasa_visceral if 'grasa_visceral' in locals() else None,
-                edad_metabolica if 'edad_metabolica' in locals() else None,
-                wthr if 'wthr' in locals() else None,
-                peso - mlg,  # masa_grasa
-                progress_photos
+                nodos_email(), nombre, email_cliente, fecha_llenado,
+                grasa_visceral=grasa_visceral if 'grasa_visceral' in locals() else None,
+                progress_photos=progress_photos
             )
             
             if ok:
                 st.session_state["correo_enviado"] = True
+                cerrar_sesion_persistida()
                 st.success("✅ Email completo reenviado exitosamente a administración")
                 
                 if ok_cliente:
@@ -11314,21 +7182,10 @@ if st.button("📧 Reenviar Email", key="reenviar_email", disabled=button_reenvi
                 
                 # Reenviar email Parte 2 (interno)
                 ok_parte2 = enviar_email_parte2(
-                    nombre, fecha_llenado, edad, sexo, peso, estatura, imc,
-                    grasa_corregida, mlg,
-                    ffmi_para_email,  # FFMI completo
-                    nivel_entrenamiento if 'nivel_entrenamiento' in locals() else None,
-                    circunferencia_cintura if 'circunferencia_cintura' in locals() else None,
-                    grasa_visceral if 'grasa_visceral' in locals() else None,
-                    edad_metabolica if 'edad_metabolica' in locals() else None,
-                    wthr if 'wthr' in locals() else None,
-                    peso - mlg,  # masa_grasa
-                    progress_photos,
-                    masa_muscular_aparato,  # Masa muscular del Omron
-                    masa_muscular_estimada_email,  # Masa muscular estimada
-                    masa_muscular if 'masa_muscular' in locals() else None,  # Fallback legacy
-                    tmb if 'tmb' in locals() else None,  # TMB
-                    st.session_state.get('ciclo_menstrual')
+                    nodos_email(), nombre, fecha_llenado,
+                    grasa_visceral=grasa_visceral if 'grasa_visceral' in locals() else None,
+                    progress_photos=progress_photos,
+                    ciclo_menstrual=st.session_state.get('ciclo_menstrual')
                 )
                 if ok_parte2:
                     st.success("✅ Reporte interno (Parte 2) reenviado exitosamente")
@@ -11456,10 +7313,65 @@ if st.button("📧 Reenviar Email", key="reenviar_email", disabled=button_reenvi
 
 # --- Limpieza de sesión y botón de nueva evaluación ---
 if st.button("🔄 Nueva Evaluación", key="nueva"):
+    almacen_sesiones.eliminar_sesion(st.session_state._id_sesion)
+    st.query_params.clear()
     for key in list(st.session_state.keys()):
         del st.session_state[key]
     st.rerun()
 
+# Checkpoint final del rerun (valores calculados por el script en esta pasada)
+checkpoint_sesion()
+
+# Contabilidad de memoria por sesión: las fotos ya viven en disco (derramar_archivo);
+# si algo más hace crecer el estado se avisa una vez en el log del servidor
+with span("sesion.memoria"):
+    memoria_sesion = medir_estado(st.session_state)
+if memoria_sesion['excedido'] and not st.session_state.get('_aviso_memoria'):
+    st.session_state._aviso_memoria = True
+    mayores = ", ".join(f"{clave}={b / 1024:.0f} KB" for clave, b in memoria_sesion['por_clave'][:3])
+    print(f"⚠️ Sesión {st.session_state._id_sesion[:8]} excede el presupuesto de memoria: "
+          f"{memoria_sesion['total'] / (1024 * 1024):.1f} MB ({mayores})")
+
+# Limpieza por TTL de sesiones vencidas y archivos derramados sin referencias
+purgar_periodicamente(almacen_sesiones)
+
+# ==================== PANEL DE LATENCIAS (SOLO ADMIN) ====================
+# MUPAI_TRAZAS_JSONL=<ruta> agrega los spans de cada rerun al archivo para análisis offline
+ruta_trazas_jsonl = os.environ.get("MUPAI_TRAZAS_JSONL")
+if ruta_trazas_jsonl:
+    try:
+        registro_trazas.exportar_jsonl(ruta_trazas_jsonl, solo_nuevos=True)
+    except OSError:
+        pass
+
+if should_render_technical():
+    with st.expander("⏱️ Latencias por fase (admin)", expanded=False):
+        histogramas_trazas = registro_trazas.histogramas()
+        if histogramas_trazas:
+            import pandas as pd
+            st.caption(f"Rerun #{registro_trazas.rerun} · {len(registro_trazas.spans)} spans en esta sesión")
+            st.dataframe(pd.DataFrame([
+                {'Fase': nombre, 'N': h['conteo'], 'Media (ms)': h['media_ms'],
+                 'p50 (ms)': h['p50_ms'], 'p95 (ms)': h['p95_ms'], 'Máx (ms)': h['max_ms'],
+                 'Total (ms)': h['total_ms']}
+                for nombre, h in histogramas_trazas.items()
+            ]), use_container_width=True)
+            fase_detalle = st.selectbox("Histograma de la fase", list(histogramas_trazas), key="trazas_fase")
+            st.bar_chart(pd.Series(histogramas_trazas[fase_detalle]['cubetas'], name="spans"))
+            st.download_button("📥 Exportar trazas (JSON-lines)", registro_trazas.exportar_jsonl(),
+                               file_name=f"trazas_mupai_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl",
+                               mime="application/jsonl", key="trazas_export")
+        else:
+            st.info("Sin spans registrados todavía.")
+
+        st.markdown("**Grafo de cálculo** (cálculos por métrica en esta sesión)")
+        st.table([{'Métrica': nombre, 'Cálculos': n} for nombre, n in grafo().conteos().items()])
+
+        st.markdown("**Memoria de la sesión**")
+        st.caption(f"{memoria_sesion['total'] / 1024:.0f} KB de {PRESUPUESTO_SESION_BYTES / 1024:.0f} KB"
+                   + (" · ⚠️ presupuesto excedido" if memoria_sesion['excedido'] else ""))
+        st.table([{'Clave': clave, 'KB': round(b / 1024, 1)} for clave, b in memoria_sesion['por_clave'][:10]])
+
 # Footer moderno
 st.markdown("""
 <div class="footer-mupai">
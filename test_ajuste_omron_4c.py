@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Test para el re-ajuste de la tabla Omron→4C (ajuste_omron_4c.py).
+
+Valida:
+- Ajuste lineal por sexo recupera la recta y su IC bootstrap la cubre
+- Bootstrap vectorizado igual al ajuste remuestra por remuestra
+- Isotónica monótona e igual al algoritmo clásico de bloques adyacentes, con
+  extrapolación lineal fuera del rango medido
+- `mupai fit-omron` lee el CSV por bloques y versiona las tablas (v1 → v2 → v3)
+- Una tabla parcial se mezcla con la base y queda monótona
+- El motor carga la tabla nueva en caliente, por sexo, sin editar código
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import mupai
+from ajuste_omron_4c import (
+    AcumuladorPares, _conteos_bootstrap, _isotonica, _lineal, ajustar_tabla, guardar_tabla, versiones_tablas,
+)
+from motor_calculo import OMRON_HBF516_TO_4C, corregir_porcentaje_grasa, recargar_tablas_omron, tabla_omron_4c
+
+OMRON = "Omron HBF-516 (BIA)"
+RECTAS = {"Hombre": (2.0, 0.80), "Mujer": (4.5, 0.74)}
+
+
+def _pares(n, semilla=4, ruido=1.5):
+    rng = np.random.default_rng(semilla)
+    sexo = np.where(rng.random(n) < 0.5, "Hombre", "Mujer")
+    omron = np.where(sexo == "Hombre", rng.uniform(8, 35, n), rng.uniform(18, 48, n))
+    a = np.where(sexo == "Hombre", RECTAS["Hombre"][0], RECTAS["Mujer"][0])
+    b = np.where(sexo == "Hombre", RECTAS["Hombre"][1], RECTAS["Mujer"][1])
+    return pd.DataFrame({'Sex': sexo, 'Omron %': omron, 'DEXA %': a + b * omron + rng.normal(0, ruido, n)})
+
+
+def _pava(y, w):
+    """Regresión isotónica clásica (pool adjacent violators), bloque a bloque."""
+    bloques = []
+    for valor, peso in zip(y, w):
+        bloques.append([valor * peso, peso, 1])
+        while len(bloques) > 1 and bloques[-2][0] / bloques[-2][1] > bloques[-1][0] / bloques[-1][1]:
+            s, p, c = bloques.pop()
+            bloques[-1] = [bloques[-1][0] + s, bloques[-1][1] + p, bloques[-1][2] + c]
+    return np.concatenate([[s / p] * c for s, p, c in bloques])
+
+
+def test_lineal_por_sexo():
+    df = _pares(3000)
+    acumulador = AcumuladorPares()
+    for inicio in range(0, len(df), 700):
+        bloque = df.iloc[inicio:inicio + 700]
+        acumulador.agregar(bloque['Sex'], bloque['Omron %'], bloque['DEXA %'])
+    acumulador.agregar("Hombre", [2.0, np.nan, 70.0], [5.0, 10.0, 60.0])   # fuera de rango / faltante
+    assert acumulador.descartados == 3 and acumulador.muestras("Hombre") + acumulador.muestras("Mujer") == 3000
+
+    tabla = ajustar_tabla(acumulador, 'lineal', remuestreos=1000, semilla=1)
+    for sexo, (a, b) in RECTAS.items():
+        ajuste = tabla['sexos'][sexo]
+        lineal = ajuste['lineal']
+        assert lineal['ic95_intercepto'][0] < a < lineal['ic95_intercepto'][1], (sexo, lineal)
+        assert lineal['ic95_pendiente'][0] < b < lineal['ic95_pendiente'][1], (sexo, lineal)
+        assert abs(lineal['pendiente'] - b) < 0.02
+        assert set(ajuste['tabla']) == {str(v) for v in range(4, 61)}
+        assert abs(ajuste['tabla']['30'] - (a + 30 * b)) < 0.3
+        bajo, alto = ajuste['ic95']['30']
+        assert bajo <= ajuste['tabla']['30'] <= alto
+        assert ajuste['rmse'] < ajuste['rmse_tabla_actual']
+    print(f"✓ Lineal por sexo: Mujer {tabla['sexos']['Mujer']['lineal']['pendiente']:.3f} "
+          f"(IC95 {tabla['sexos']['Mujer']['lineal']['ic95_pendiente'][0]:.3f}-"
+          f"{tabla['sexos']['Mujer']['lineal']['ic95_pendiente'][1]:.3f})")
+
+
+def test_bootstrap_vectorizado():
+    df = _pares(400)
+    x, y = df['Omron %'].to_numpy(), df['DEXA %'].to_numpy()
+    rng = np.random.default_rng(0)
+    conteos = _conteos_bootstrap(rng, 50, len(x))
+    assert (conteos.sum(axis=1) == len(x)).all()
+    intercepto, pendiente = _lineal(conteos, x, y)
+    for r in (0, 17, 49):
+        indices = np.repeat(np.arange(len(x)), conteos[r].astype(int))
+        b, a = np.polyfit(x[indices], y[indices], 1)
+        assert abs(a - intercepto[r]) < 1e-8 and abs(b - pendiente[r]) < 1e-10
+    print("✓ Bootstrap vectorizado = ajuste por remuestreo")
+
+
+def test_isotonica_monotona():
+    rng = np.random.default_rng(2)
+    pesos = rng.integers(0, 5, size=(30, 25)).astype(float)
+    pesos[:, 0] = 1.0
+    sumas = pesos * (np.linspace(5, 40, 25) + rng.normal(0, 6, (30, 25)))
+    ajuste = _isotonica(pesos, sumas)
+    assert np.all(np.diff(ajuste, axis=1) >= -1e-9)
+    for r in range(30):
+        con_peso = pesos[r] > 0
+        esperado = _pava(sumas[r][con_peso] / pesos[r][con_peso], pesos[r][con_peso])
+        assert np.allclose(ajuste[r][con_peso], esperado), r
+
+    acumulador = AcumuladorPares()
+    df = _pares(2000, ruido=3.0)
+    acumulador.agregar(df['Sex'], df['Omron %'], df['DEXA %'])
+    tabla = ajustar_tabla(acumulador, 'isotonica', remuestreos=300, semilla=3)
+    for ajuste in tabla['sexos'].values():
+        valores = [ajuste['tabla'][str(v)] for v in sorted(map(int, ajuste['tabla']))]
+        assert np.all(np.diff(valores) >= 0) and ajuste['rmse'] < ajuste['rmse_tabla_actual']
+
+    # Fuera del rango medido (15-35) sigue la pendiente lineal desde el borde, sin saltos
+    acumulador = AcumuladorPares()
+    omron = np.repeat(np.arange(15, 36), 5).astype(float)
+    acumulador.agregar("Hombre", omron, omron + 8)
+    ajuste = ajustar_tabla(acumulador, 'isotonica', remuestreos=50, semilla=4)['sexos']['Hombre']
+    valores = [ajuste['tabla'][str(v)] for v in range(4, 61)]
+    assert np.all(np.diff(valores) >= 0) and len(valores) == 57
+    for v in (4, 14, 15, 35, 36, 60):
+        assert abs(ajuste['tabla'][str(v)] - (v + 8)) < 0.05, (v, ajuste['tabla'][str(v)])
+    print("✓ Isotónica monótona = bloques adyacentes (PAVA), extrapolada con la pendiente lineal")
+
+
+def test_cli_versionado_y_recarga_en_caliente():
+    anterior = os.environ.get('MUPAI_TABLAS_OMRON')
+    with tempfile.TemporaryDirectory() as tmp:
+        directorio = os.path.join(tmp, 'tablas')
+        os.environ['MUPAI_TABLAS_OMRON'] = directorio
+        try:
+            assert recargar_tablas_omron() is None
+            base = corregir_porcentaje_grasa(30.0, OMRON, "Mujer")
+            assert base == OMRON_HBF516_TO_4C[30]
+
+            ruta = os.path.join(tmp, 'pares.csv')
+            df = _pares(1500)
+            df.loc[df['Sex'] == "Hombre", 'Sex'] = 'M'
+            df.loc[df['Sex'] == "Mujer", 'Sex'] = 'female'
+            df.to_csv(ruta, index=False)
+            # 'M' es male o mujer según el idioma: sin --sexo-letras no se ajusta nada
+            try:
+                mupai.main(['fit-omron', '--input', ruta, '--remuestreos', '20'])
+                assert False, "fit-omron aceptó 'M' sin --sexo-letras"
+            except SystemExit as e:
+                assert "ambiguo" in str(e)
+            assert versiones_tablas(directorio) == {}
+            assert mupai.main(['fit-omron', '--input', ruta, '--chunk-size', '400', '--remuestreos', '200',
+                               '--semilla', '5', '--sexo-letras', 'en']) == 0
+            assert sorted(versiones_tablas(directorio)) == [1]
+
+            # El motor ve la tabla nueva por sexo sin reiniciar
+            assert recargar_tablas_omron() == 1
+            for sexo, (a, b) in RECTAS.items():
+                assert abs(corregir_porcentaje_grasa(30.0, OMRON, sexo) - (a + 30 * b)) < 0.3
+                assert tabla_omron_4c(sexo)[30] == corregir_porcentaje_grasa(30.4, OMRON, sexo)
+
+            # Una tabla solo de mujeres: v2, los hombres vuelven a la tabla base
+            acumulador = AcumuladorPares()
+            solo_mujeres = _pares(600, semilla=8)
+            solo_mujeres = solo_mujeres[solo_mujeres['Sex'] == "Mujer"]
+            acumulador.agregar(solo_mujeres['Sex'], solo_mujeres['Omron %'], solo_mujeres['DEXA %'])
+            version, _ = guardar_tabla(ajustar_tabla(acumulador, 'isotonica', remuestreos=100, semilla=6), directorio)
+            assert version == 2 and recargar_tablas_omron() == 2
+            assert corregir_porcentaje_grasa(30.0, OMRON, "Hombre") == OMRON_HBF516_TO_4C[30]
+            assert corregir_porcentaje_grasa(30.0, OMRON, "Mujer") != OMRON_HBF516_TO_4C[30]
+
+            # Una tabla parcial escrita a mano se mezcla con la base y se fuerza monótona
+            parcial = {str(v): v + 8.0 for v in range(15, 36)}
+            guardar_tabla({'sexos': {"Mujer": {'tabla': parcial}}}, directorio)
+            assert recargar_tablas_omron() == 3
+            mezcla = tabla_omron_4c("Mujer")
+            assert all(mezcla[v] <= mezcla[v + 1] for v in range(4, 60))
+            assert mezcla[14] == OMRON_HBF516_TO_4C[14] and mezcla[36] == 43.0 and mezcla[60] == 51.5
+
+            # Una versión ilegible no tumba al motor: se conserva la vigente
+            with open(os.path.join(directorio, 'omron_hbf516_4c_v4.json'), 'w') as f:
+                f.write('{"sexos": ')
+            assert recargar_tablas_omron() == 3
+        finally:
+            if anterior is None:
+                os.environ.pop('MUPAI_TABLAS_OMRON', None)
+            else:
+                os.environ['MUPAI_TABLAS_OMRON'] = anterior
+            recargar_tablas_omron()
+    assert corregir_porcentaje_grasa(30.0, OMRON, "Mujer") == base
+    print("✓ fit-omron por bloques, versiones v1 → v3 y recarga en caliente por sexo")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_lineal_por_sexo,
+        test_bootstrap_vectorizado,
+        test_isotonica_monotona,
+        test_cli_versionado_y_recarga_en_caliente,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
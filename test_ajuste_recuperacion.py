@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test para el ajuste del plan por recuperación (IR-SE) en motor_calculo.py.
+
+Valida:
+- Tope de déficit, frecuencia de refeeds y ciclaje 4-3 por nivel de recuperación
+- Sin ajuste en mantenimiento/superávit ni sin datos de recuperación (None, vacío o NaN)
+- Ciclaje 4-3 con el mismo promedio semanal
+- Etapa de posproceso en evaluar_cliente() activable por estrategia
+- Cada etapa se mide como span "motor.<etapa>"
+"""
+
+import sys
+
+from motor_calculo import (
+    ajustar_por_recuperacion, calcular_ciclaje_4_3, evaluar_cliente,
+)
+from trazas import RegistroTrazas, activar_registro
+
+
+# 30% de grasa (Hombre) → déficit sugerido de 30%
+CLIENTE = {'sexo': "Hombre", 'edad': 40, 'peso': 100.0, 'estatura': 178.0, 'grasa_corporal': 30.0,
+           'metodo_grasa': "DEXA (Gold Standard)", 'nivel_actividad': "Sedentario", 'dias_fuerza': 3}
+
+
+def test_ajuste_por_nivel():
+    alta = ajustar_por_recuperacion(-30, ir_se=85)
+    assert alta['nivel'] == "ALTA" and alta['porcentaje'] == -30 and alta['tope_deficit'] is None
+    assert alta['refeed_cada_dias'] == 14 and not alta['ciclaje_4_3'] and alta['aviso'] == ""
+
+    media = ajustar_por_recuperacion(-30, ir_se=58.3)
+    assert (media['porcentaje'], media['tope_deficit'], media['refeed_cada_dias']) == (-25, 25, 10)
+    assert media['ciclaje_4_3'] and "IR-SE 58" in media['aviso'] and "antes 30%" in media['aviso']
+
+    baja = ajustar_por_recuperacion(-30, nivel_recuperacion="BAJA")
+    assert (baja['porcentaje'], baja['refeed_cada_dias']) == (-20, 7)
+
+    # Déficit por debajo del tope: se conserva, pero con refeeds y ciclaje
+    suave = ajustar_por_recuperacion(-15, nivel_recuperacion="BAJA")
+    assert suave['porcentaje'] == -15 and suave['tope_deficit'] is None and suave['ciclaje_4_3']
+    print("✓ Tope de déficit, refeeds y ciclaje por nivel de recuperación")
+
+
+def test_sin_ajuste():
+    assert ajustar_por_recuperacion(-30) is None
+    superavit = ajustar_por_recuperacion(7.5, ir_se=30)
+    assert superavit['nivel'] == "BAJA" and superavit['porcentaje'] == 7.5
+    assert superavit['refeed_cada_dias'] is None and not superavit['ciclaje_4_3']
+    print("✓ Sin ajuste en superávit ni sin datos de recuperación")
+
+
+def test_ciclaje_promedio_semanal():
+    ciclaje = calcular_ciclaje_4_3(2000, proteina_g=180, grasa_g=60)
+    low, high = ciclaje['low_days'], ciclaje['high_days']
+    assert (low['dias'], high['dias']) == (4, 3) and low['kcal'] == 1600
+    assert abs((4 * low['kcal'] + 3 * high['kcal']) / 7 - 2000) < 1e-9
+    assert low['protein_g'] == high['protein_g'] == 180
+    assert high['carb_g'] - low['carb_g'] == round((high['kcal'] - low['kcal']) / 4, 1)
+    print(f"✓ Ciclaje 4-3: LOW {low['kcal']:.0f} / HIGH {high['kcal']:.0f} kcal, promedio 2000")
+
+
+def test_etapa_por_estrategia():
+    base = evaluar_cliente(CLIENTE)
+    assert base['porcentaje'] == -30 and base['recuperacion'] is None and 'ciclaje_4_3' not in base
+
+    datos = dict(CLIENTE, suenyo_estres_data={'ir_se': 42.0, 'nivel_recuperacion': "BAJA"})
+    ajustada = evaluar_cliente(datos)
+    assert ajustada['porcentaje'] == -20 and ajustada['recuperacion']['nivel'] == "BAJA"
+    assert abs(ajustada['ingesta_calorica'] - ajustada['gasto_energetico'] * 0.8) < 1e-9
+    assert ajustada['macros']['carbo_g'] > base['macros']['carbo_g']
+    assert ajustada['fase'] == "Déficit recomendado: 20% (tope por recuperación BAJA)"
+    assert ajustada['ciclaje_4_3']['low_days']['kcal'] == ajustada['ingesta_calorica'] * 0.8
+
+    sin_ajustes = evaluar_cliente(datos, estrategia='sin_ajustes')
+    assert sin_ajustes == {k: v for k, v in base.items() if k != 'recuperacion'}
+    assert evaluar_cliente(dict(datos, estrategia='sin_ajustes'))['porcentaje'] == -30
+    print("✓ Etapa de recuperación activable por estrategia")
+
+
+def test_ir_se_vacio_en_lote():
+    """Una fila de DataFrame con ir_se en blanco (NaN) no se trata como recuperación BAJA."""
+    import pandas as pd
+
+    for valor in (float('nan'), "", "n/d"):
+        assert ajustar_por_recuperacion(-30, ir_se=valor) is None
+
+    filas = pd.DataFrame([dict(CLIENTE, ir_se=None), dict(CLIENTE, ir_se=42.0)]).to_dict('records')
+    vacia, baja = (evaluar_cliente(fila) for fila in filas)
+    assert vacia['recuperacion'] is None and vacia['porcentaje'] == -30 and 'ciclaje_4_3' not in vacia
+    assert baja['recuperacion']['nivel'] == "BAJA" and baja['porcentaje'] == -20
+    print("✓ ir_se en blanco (NaN) sin ajuste por recuperación")
+
+
+def test_etapa_medida():
+    registro = RegistroTrazas()
+    activar_registro(registro)
+    try:
+        for ir_se in (30, 60, 90):
+            evaluar_cliente(dict(CLIENTE, ir_se=ir_se))
+    finally:
+        activar_registro(None)
+    assert registro.histogramas()['motor.etapa_recuperacion']['conteo'] == 3
+    print("✓ Etapa medida como span motor.etapa_recuperacion")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_ajuste_por_nivel,
+        test_sin_ajuste,
+        test_ciclaje_promedio_semanal,
+        test_etapa_por_estrategia,
+        test_ir_se_vacio_en_lote,
+        test_etapa_medida,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
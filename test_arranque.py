@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test de arranque en frío de streamlit_app.py (scripts/perfil_arranque.py).
+
+Valida:
+- pandas/numpy/yaml no se importan a nivel de módulo en la app
+- La importación de los módulos de arranque queda dentro del presupuesto
+- Los puntos de uso diferidos siguen importando lo que necesitan
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+
+from perfil_arranque import PRESUPUESTO_MS, medir_arranque, modulos_de_arranque
+
+
+def test_sin_modulos_pesados_al_arranque():
+    modulos = modulos_de_arranque()
+    assert 'streamlit' in modulos
+    for pesado in ('pandas', 'numpy', 'yaml', 'proyeccion_semanal'):
+        assert pesado not in modulos, f"{pesado} se importa a nivel de módulo"
+    print("✓ La app no importa pandas/numpy/yaml al arrancar")
+
+
+def test_presupuesto_de_arranque():
+    perfil = medir_arranque(omitir=('streamlit',))
+    assert perfil['pesados'] == [], perfil['pesados']
+    assert perfil['total_ms'] <= PRESUPUESTO_MS, perfil
+    print(f"✓ Importación de arranque: {perfil['total_ms']:.1f} ms (presupuesto {PRESUPUESTO_MS} ms)")
+
+
+def test_importaciones_diferidas_en_puntos_de_uso():
+    with open('streamlit_app.py', 'r', encoding='utf-8') as f:
+        content = f.read()
+    assert "from proyeccion_semanal import simular_proyeccion, resumir_horizontes" in content
+    assert content.count("import pandas as pd") >= 2
+    assert "logo_mupai_b64, logo_gym_b64 = cargar_logos_email()" in content
+    print("✓ Importaciones diferidas presentes en los puntos de uso")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_sin_modulos_pesados_al_arranque,
+        test_presupuesto_de_arranque,
+        test_importaciones_diferidas_en_puntos_de_uso,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test para la calibración de masa muscular (calibracion_musculo.py).
+
+Valida:
+- RLS incremental igual a mínimos cuadrados con la misma previa
+- Error prequential: el modelo calibrado supera a la tabla con un aparato sesgado
+- Estado por dispositivo persistido en SQLite y lecturas sin aparato ignoradas
+- Activación en el motor: evaluar_cliente() usa el modelo del metodo_grasa
+- registrar_con_cuarentena() actualiza la calibración solo con las plausibles
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from calibracion_musculo import (
+    COEFICIENTES_INICIALES, MUESTRAS_MINIMAS, VARIANZA_PREVIA, CalibracionMusculo, CalibradorRLS,
+    lectura_musculo,
+)
+from motor_calculo import (
+    MODELOS_MASA_MUSCULAR, activar_modelo_masa_muscular, caracteristicas_masa_muscular,
+    estimar_masa_muscular_desde_mlg, evaluar_cliente,
+)
+from plausibilidad import registrar_con_cuarentena
+from registro_evaluaciones import RegistroEvaluaciones
+
+NIVELES = ('principiante', 'intermedio', 'avanzado', 'élite')
+
+
+def _lecturas(n, semilla=6, metodo="Omron HBF-516 (BIA)"):
+    """Aparato que lee 0.46 de la MLG en hombres y 0.41 en mujeres (+0.01 por nivel) con ruido de 1 kg."""
+    rng = np.random.default_rng(semilla)
+    evaluaciones = []
+    for _ in range(n):
+        sexo = "Mujer" if rng.random() < 0.5 else "Hombre"
+        nivel = NIVELES[rng.integers(0, 4)]
+        peso = rng.uniform(55, 110)
+        grasa = rng.uniform(10, 35)
+        mlg = peso * (1 - grasa / 100)
+        musculo = mlg * (0.46 - 0.05 * (sexo == "Mujer") + 0.01 * NIVELES.index(nivel)) + rng.normal(0, 1)
+        evaluaciones.append({'sexo': sexo, 'nivel_entrenamiento': nivel, 'peso': peso, 'grasa_corregida': grasa,
+                             'mlg': mlg, 'masa_muscular_aparato': musculo / peso * 100, 'metodo_grasa': metodo})
+    return evaluaciones
+
+
+def test_rls_igual_a_minimos_cuadrados():
+    evaluaciones = _lecturas(200)
+    calibrador = CalibradorRLS()
+    for e in evaluaciones:
+        _, x, y, _ = lectura_musculo(e)
+        calibrador.actualizar(x, y)
+    # Mínimos cuadrados regularizados hacia la previa: (XᵀX + P0⁻¹) θ = Xᵀy + P0⁻¹ θ0
+    X = np.array([lectura_musculo(e)[1] for e in evaluaciones])
+    y = np.array([lectura_musculo(e)[2] for e in evaluaciones])
+    previa = np.diag(1 / np.array(VARIANZA_PREVIA))
+    esperado = np.linalg.solve(X.T @ X + previa, X.T @ y + previa @ np.array(COEFICIENTES_INICIALES))
+    assert np.allclose(calibrador.theta, esperado, rtol=1e-6, atol=1e-8), (calibrador.theta, esperado)
+    assert np.allclose(calibrador.P, np.linalg.inv(X.T @ X + previa), rtol=1e-6, atol=1e-10)
+    print(f"✓ RLS incremental = mínimos cuadrados (θ = {np.round(calibrador.theta, 3).tolist()})")
+
+
+def test_error_prequential():
+    calibrador = CalibradorRLS()
+    for e in _lecturas(300):
+        _, x, y, tabla = lectura_musculo(e)
+        calibrador.actualizar(x, y, tabla)
+    informe = calibrador.informe()
+    assert informe['muestras'] == 300 and informe['muestras_error'] == 290
+    assert informe['rmse_kg'] < 1.5 < informe['rmse_tabla_kg'] and informe['mejora_pct'] > 50
+    assert calibrador.apto()
+    print(f"✓ Error prequential: RMSE {informe['rmse_kg']:.2f} kg vs tabla {informe['rmse_tabla_kg']:.2f} kg")
+
+
+def test_persistencia_por_dispositivo():
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'evaluaciones.db')
+        calibracion = CalibracionMusculo(ruta)
+        lecturas = _lecturas(60) + _lecturas(5, semilla=9, metodo="InBody 270 (BIA profesional)")
+        sin_aparato = [dict(lecturas[0], masa_muscular_aparato=0), dict(lecturas[1], masa_muscular_aparato=None),
+                       dict(lecturas[2], peso=float('nan'))]
+        # En dos tandas: igual que todo de una vez
+        assert calibracion.observar(lecturas[:30] + sin_aparato) == 30
+        assert calibracion.observar(lecturas[30:]) == 35
+        todo = CalibradorRLS()
+        for e in lecturas[:60]:
+            _, x, y, tabla = lectura_musculo(e)
+            todo.actualizar(x, y, tabla)
+
+        reabierta = CalibracionMusculo(ruta)
+        omron = reabierta.calibrador("Omron HBF-516 (BIA)")
+        assert np.allclose(omron.theta, todo.theta) and omron.errores == todo.errores
+        informes = {r['dispositivo']: r for r in reabierta.informe()}
+        assert informes["InBody 270 (BIA profesional)"]['muestras'] == 5
+        assert not informes["InBody 270 (BIA profesional)"]['apto']
+        assert reabierta.calibrador("DEXA (Gold Standard)") is None
+        reabierta.reiniciar("InBody 270 (BIA profesional)")
+        assert [r['dispositivo'] for r in reabierta.informe()] == ["Omron HBF-516 (BIA)"]
+    print("✓ Estado por dispositivo persistido; lecturas sin aparato ignoradas")
+
+
+def test_activacion_en_motor():
+    datos = {'sexo': "Hombre", 'edad': 30, 'peso': 80.0, 'estatura': 178.0, 'grasa_corporal': 18.0,
+             'metodo_grasa': "DEXA (Gold Standard)", 'nivel_entrenamiento': 'avanzado'}
+    base = evaluar_cliente(datos)
+    assert base['masa_muscular_estimada'] == estimar_masa_muscular_desde_mlg(base['mlg'], "Hombre", 'avanzado')
+    with tempfile.TemporaryDirectory() as tmp:
+        calibracion = CalibracionMusculo(os.path.join(tmp, 'evaluaciones.db'))
+        calibracion.observar(_lecturas(MUESTRAS_MINIMAS + 40, metodo="DEXA (Gold Standard)")
+                             + _lecturas(20, metodo="Omron HBF-516 (BIA)"))
+        try:
+            activos = calibracion.activar_en_motor()
+            assert list(activos) == ["DEXA (Gold Standard)"] and "Omron HBF-516 (BIA)" not in MODELOS_MASA_MUSCULAR
+            calibrada = evaluar_cliente(datos)['masa_muscular_estimada']
+            esperada = np.dot(activos["DEXA (Gold Standard)"],
+                              caracteristicas_masa_muscular(base['mlg'], "Hombre", 'avanzado'))
+            assert abs(calibrada - esperada) < 1e-9 and abs(calibrada - base['mlg'] * 0.48) < 1.0
+            # Otro aparato sigue con la tabla
+            omron = evaluar_cliente(dict(datos, metodo_grasa="Omron HBF-516 (BIA)"))
+            assert omron['masa_muscular_estimada'] == estimar_masa_muscular_desde_mlg(omron['mlg'], "Hombre",
+                                                                                       'avanzado')
+        finally:
+            activar_modelo_masa_muscular("DEXA (Gold Standard)", None)
+    assert evaluar_cliente(datos)['masa_muscular_estimada'] == base['masa_muscular_estimada']
+    print(f"✓ evaluar_cliente usa el modelo calibrado del aparato ({base['masa_muscular_estimada']:.1f} → {calibrada:.1f} kg)")
+
+
+def test_registro_con_cuarentena():
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'evaluaciones.db')
+        registro = RegistroEvaluaciones(ruta)
+        calibracion = CalibracionMusculo(ruta)
+        plausible = dict(_lecturas(1)[0], nombre="Ok", email="ok@example.com", edad=30, estatura=175.0)
+        sospechosa = dict(plausible, nombre="Dudosa", email="d@example.com", peso=110.0, grasa_corregida=5.0,
+                          mlg=104.5, masa_muscular_aparato=60.0)
+        registradas, apartadas = registrar_con_cuarentena(registro, [plausible, sospechosa], calibracion=calibracion)
+        assert registradas == 1 and len(apartadas) == 1
+        assert calibracion.calibrador("Omron HBF-516 (BIA)").muestras == 1
+        # El histórico del registro reconstruye la misma calibración
+        assert calibracion.reconstruir(registro.datos_composicion()) == 1
+        assert calibracion.calibrador("Omron HBF-516 (BIA)").muestras == 1
+    print("✓ Solo las evaluaciones plausibles calibran; reconstrucción desde el registro")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_rls_igual_a_minimos_cuadrados,
+        test_error_prequential,
+        test_persistencia_por_dispositivo,
+        test_activacion_en_motor,
+        test_registro_con_cuarentena,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test para el servicio de códigos de acceso (codigos_acceso.py).
+
+Valida:
+- Código de 6 caracteres A-Z0-9, guardado solo como hash
+- Un solo uso, también entre réplicas y canjes simultáneos
+- Vencimiento por TTL y código ligado al email solicitante
+- Límite de solicitudes por email
+- Búsqueda por índice (clave primaria)
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+
+from codigos_acceso import (
+    CANJE_EXPIRADO,
+    CANJE_INEXISTENTE,
+    CANJE_OK,
+    CANJE_USADO,
+    ServicioCodigos,
+)
+
+
+class _Reloj:
+    def __init__(self):
+        self.ahora = 1_000_000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+def test_emitir_y_canjear_una_vez():
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'codigos.db')
+        servicio = ServicioCodigos(ruta)
+        codigo, error = servicio.emitir("Ana López", "Ana@Example.com ", "8661234567")
+        assert error is None and re.fullmatch(r'[A-Z0-9]{6}', codigo)
+        with sqlite3.connect(ruta) as con:
+            assert codigo not in str(con.execute("SELECT * FROM codigos").fetchall())
+
+        assert servicio.canjear(f" {codigo.lower()} ", "ana@example.com") == (True, CANJE_OK)
+        assert servicio.canjear(codigo, "ana@example.com") == (False, CANJE_USADO)
+        # Otra réplica ve el mismo estado
+        assert ServicioCodigos(ruta).canjear(codigo) == (False, CANJE_USADO)
+        assert servicio.canjear("ZZZZZZ") == (False, CANJE_INEXISTENTE)
+    print("✓ Código de un solo uso, también desde otra réplica")
+
+
+def test_canjes_simultaneos_solo_uno_entra():
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'codigos.db')
+        codigo, _ = ServicioCodigos(ruta).emitir("Ana", "ana@example.com")
+        replicas = [ServicioCodigos(ruta) for _ in range(8)]
+        resultados = []
+        barrera = threading.Barrier(len(replicas))
+
+        def canjear(servicio):
+            barrera.wait()
+            resultados.append(servicio.canjear(codigo)[0])
+
+        hilos = [threading.Thread(target=canjear, args=(s,)) for s in replicas]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        assert resultados.count(True) == 1, resultados
+    print("✓ 8 canjes simultáneos: exactamente uno autorizado")
+
+
+def test_vencimiento_y_email():
+    with tempfile.TemporaryDirectory() as tmp:
+        reloj = _Reloj()
+        servicio = ServicioCodigos(os.path.join(tmp, 'codigos.db'), ttl_horas=48, reloj=reloj)
+        codigo, _ = servicio.emitir("Ana", "ana@example.com")
+        assert servicio.canjear(codigo, "otro@example.com") == (False, CANJE_INEXISTENTE)
+        reloj.ahora += 49 * 3600
+        assert servicio.canjear(codigo, "ana@example.com") == (False, CANJE_EXPIRADO)
+        assert servicio.purgar(retencion_horas=0) == 1
+    print("✓ Código ligado al email y vencido tras el TTL")
+
+
+def test_limite_de_solicitudes_por_email():
+    with tempfile.TemporaryDirectory() as tmp:
+        reloj = _Reloj()
+        servicio = ServicioCodigos(os.path.join(tmp, 'codigos.db'), max_solicitudes=3,
+                                   ventana_minutos=60, reloj=reloj)
+        for _ in range(3):
+            assert servicio.emitir("Ana", "ana@example.com")[1] is None
+        codigo, error = servicio.emitir("Ana", "ANA@example.com")
+        assert codigo is None and "Demasiadas solicitudes" in error
+        assert servicio.emitir("Beto", "beto@example.com")[1] is None
+        reloj.ahora += 61 * 60
+        assert servicio.emitir("Ana", "ana@example.com")[1] is None
+    print("✓ Límite de 3 solicitudes por email por hora")
+
+
+def test_canje_usa_indice():
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'codigos.db')
+        ServicioCodigos(ruta)
+        with sqlite3.connect(ruta) as con:
+            plan = " ".join(str(f) for f in con.execute(
+                "EXPLAIN QUERY PLAN UPDATE codigos SET usado = 1 WHERE hash_codigo = 'x' AND usado IS NULL"))
+        assert "USING INDEX" in plan or "PRIMARY KEY" in plan, plan
+    print("✓ Canje por búsqueda indexada")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_emitir_y_canjear_una_vez,
+        test_canjes_simultaneos_solo_uno_entra,
+        test_vencimiento_y_email,
+        test_limite_de_solicitudes_por_email,
+        test_canje_usa_indice,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Test para el spool de emails (cola_email.py) contra un servidor SMTP local.
+
+Valida:
+- Todos los mensajes se envían por una sola conexión SMTP
+- El limitador espacia los envíos según mensajes por minuto
+- Reanudación de mensajes que quedaron en enviando/ tras un fallo
+- Destinatarios rechazados van a fallidos/ y quedan registrados
+- Reconexión cuando el servidor cierra la sesión entre mensajes
+- Estado de un mensaje concreto (el que encoló el panel), no del lote
+- Errores transitorios: espera exponencial y conteo de intentos que sobrevive a un reinicio
+"""
+
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+from email.mime.text import MIMEText
+
+from cola_email import EnviadorSpool, LimitadorTasa, encolar_mensaje, estado_mensaje
+
+
+class _SumideroSMTP(socketserver.StreamRequestHandler):
+    """Servidor SMTP mínimo: acepta todo salvo destinatarios 'rechazado@'."""
+
+    def _responder(self, linea):
+        self.wfile.write((linea + "\r\n").encode())
+
+    def handle(self):
+        servidor = self.server
+        servidor.conexiones += 1
+        enviados_en_sesion = 0
+        self._responder("220 sumidero listo")
+        while True:
+            linea = self.rfile.readline().decode(errors='replace').strip()
+            if not linea:
+                return
+            comando = linea[:4].upper()
+            if comando in ('EHLO', 'HELO'):
+                self._responder("250 sumidero")
+            elif comando == 'MAIL':
+                if servidor.cerrar_tras and enviados_en_sesion >= servidor.cerrar_tras:
+                    # Simula un servidor que corta la sesión tras N mensajes
+                    return
+                self._responder("250 OK")
+            elif comando == 'RCPT':
+                if 'rechazado@' in linea:
+                    self._responder("550 buzón inexistente")
+                else:
+                    self._responder("250 OK")
+            elif comando == 'DATA':
+                self._responder("354 fin con .")
+                datos = []
+                while True:
+                    parte = self.rfile.readline().decode(errors='replace')
+                    if parte.rstrip("\r\n") == '.':
+                        break
+                    datos.append(parte)
+                servidor.mensajes.append(''.join(datos))
+                enviados_en_sesion += 1
+                self._responder("250 encolado")
+            elif comando == 'QUIT':
+                self._responder("221 adiós")
+                return
+            else:
+                self._responder("250 OK")
+
+
+class _Servidor(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, cerrar_tras=None):
+        super().__init__(('127.0.0.1', 0), _SumideroSMTP)
+        self.mensajes = []
+        self.conexiones = 0
+        self.cerrar_tras = cerrar_tras
+
+
+def _iniciar_servidor(cerrar_tras=None):
+    servidor = _Servidor(cerrar_tras)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def _mensaje(destino, asunto):
+    msg = MIMEText("Reporte actualizado", 'plain', 'utf-8')
+    msg['From'] = "administracion@muscleupgym.fitness"
+    msg['To'] = destino
+    msg['Subject'] = asunto
+    return msg
+
+
+def _enviador(spool, servidor, **kwargs):
+    return EnviadorSpool(spool, host='127.0.0.1', puerto=servidor.server_address[1],
+                         password=None, usar_starttls=False,
+                         limitador=kwargs.pop('limitador', LimitadorTasa(0)), **kwargs)
+
+
+def _resultados(spool):
+    with open(os.path.join(spool, 'resultados.jsonl'), encoding='utf-8') as f:
+        return [json.loads(l) for l in f]
+
+
+def test_una_conexion_para_todo_el_lote():
+    servidor = _iniciar_servidor()
+    try:
+        with tempfile.TemporaryDirectory() as spool:
+            for i in range(25):
+                encolar_mensaje(_mensaje(f"cliente{i}@example.com", f"Reporte {i}"), spool)
+            conteo = _enviador(spool, servidor).procesar()
+            assert conteo == {'enviado': 25, 'reintento': 0, 'fallido': 0}
+            assert servidor.conexiones == 1
+            assert len(os.listdir(os.path.join(spool, 'enviados'))) == 25
+            assert os.listdir(os.path.join(spool, 'pendientes')) == []
+            # Orden FIFO
+            assert "Reporte 0" in servidor.mensajes[0] and "Reporte 24" in servidor.mensajes[-1]
+    finally:
+        servidor.shutdown()
+    print("✓ 25 mensajes por una sola conexión SMTP")
+
+
+def test_limitador_de_tasa():
+    reloj = [0.0]
+    esperas = []
+
+    def dormir(segundos):
+        esperas.append(segundos)
+        reloj[0] += segundos
+
+    limitador = LimitadorTasa(30, reloj=lambda: reloj[0], dormir=dormir)
+    for _ in range(4):
+        limitador.esperar_turno()
+    assert esperas == [2.0, 2.0, 2.0]
+
+    # Si ya pasó el intervalo no se espera
+    reloj[0] += 10
+    limitador.esperar_turno()
+    assert len(esperas) == 3
+    print("✓ Limitador: 30 mensajes/minuto → 2 s entre envíos")
+
+
+def test_reanuda_tras_fallo_y_registra_rechazos():
+    servidor = _iniciar_servidor()
+    try:
+        with tempfile.TemporaryDirectory() as spool:
+            encolar_mensaje(_mensaje("ok@example.com", "Normal"), spool)
+            encolar_mensaje(_mensaje("rechazado@example.com", "Rechazado"), spool)
+            # Mensaje reclamado por un enviador que se interrumpió
+            nombre = encolar_mensaje(_mensaje("huerfano@example.com", "Huérfano"), spool)
+            os.replace(os.path.join(spool, 'pendientes', nombre), os.path.join(spool, 'enviando', nombre))
+
+            conteo = _enviador(spool, servidor).procesar()
+            assert conteo == {'enviado': 2, 'reintento': 0, 'fallido': 1}
+            assert len(os.listdir(os.path.join(spool, 'fallidos'))) == 1
+            estados = {r['destinatarios'][0]: r['estado'] for r in _resultados(spool)}
+            assert estados == {'ok@example.com': 'enviado', 'rechazado@example.com': 'fallido',
+                               'huerfano@example.com': 'enviado'}
+    finally:
+        servidor.shutdown()
+    print("✓ Reanudación tras fallo y rechazos registrados")
+
+
+def test_reconecta_si_el_servidor_corta():
+    servidor = _iniciar_servidor(cerrar_tras=2)
+    try:
+        with tempfile.TemporaryDirectory() as spool:
+            for i in range(5):
+                encolar_mensaje(_mensaje(f"c{i}@example.com", f"R{i}"), spool)
+            conteo = _enviador(spool, servidor).procesar()
+            assert conteo['enviado'] == 5
+            assert servidor.conexiones == 3
+    finally:
+        servidor.shutdown()
+    print("✓ Reconexión automática cuando el servidor cierra la sesión")
+
+
+def test_estado_del_mensaje_encolado():
+    servidor = _iniciar_servidor()
+    try:
+        with tempfile.TemporaryDirectory() as spool:
+            ok = encolar_mensaje(_mensaje("ok@example.com", "Normal"), spool)
+            rechazado = encolar_mensaje(_mensaje("rechazado@example.com", "Rechazado"), spool)
+            assert estado_mensaje(spool, ok) == {'estado': 'pendiente', 'intentos': 0, 'detalle': None}
+
+            # Un lote con un envío correcto no hace "enviado" al mensaje rechazado
+            assert _enviador(spool, servidor).procesar()['enviado'] == 1
+            assert estado_mensaje(spool, ok)['estado'] == 'enviado'
+            fallido = estado_mensaje(spool, rechazado)
+            assert fallido['estado'] == 'fallido' and fallido['intentos'] == 1
+            assert "rechazados" in fallido['detalle']
+            assert estado_mensaje(spool, "inexistente.eml")['estado'] is None
+    finally:
+        servidor.shutdown()
+    print("✓ Estado por mensaje: enviado / fallido con su detalle")
+
+
+def test_reintento_con_espera_persistida():
+    # Puerto sin servidor: cada intento falla con un error de conexión (transitorio)
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        puerto_cerrado = s.getsockname()[1]
+    ahora = [1000.0]
+    reloj = lambda: ahora[0]
+
+    def enviador_caido(spool):
+        return EnviadorSpool(spool, host='127.0.0.1', puerto=puerto_cerrado, usar_starttls=False,
+                             limitador=LimitadorTasa(0), timeout=1, reloj=reloj)
+
+    servidor = _iniciar_servidor()
+    try:
+        with tempfile.TemporaryDirectory() as spool:
+            nombre = encolar_mensaje(_mensaje("cliente@example.com", "Reporte"), spool)
+            sidecar = os.path.join(spool, 'reintentos', f"{nombre}.json")
+
+            assert enviador_caido(spool).procesar() == {'enviado': 0, 'reintento': 1, 'fallido': 0}
+            with open(sidecar) as f:
+                assert json.load(f) == {'intentos': 1, 'siguiente': 1060.0}
+            # Sin vencer la espera no se vuelve a intentar
+            assert enviador_caido(spool).procesar() == {'enviado': 0, 'reintento': 0, 'fallido': 0}
+
+            # Un enviador nuevo (reinicio) continúa el conteo y duplica la espera
+            ahora[0] = 1060.0
+            assert enviador_caido(spool).procesar()['reintento'] == 1
+            with open(sidecar) as f:
+                assert json.load(f) == {'intentos': 2, 'siguiente': 1180.0}
+            assert estado_mensaje(spool, nombre)['intentos'] == 2
+
+            ahora[0] = 1180.0
+            assert _enviador(spool, servidor, reloj=reloj).procesar()['enviado'] == 1
+            assert not os.path.exists(sidecar)
+    finally:
+        servidor.shutdown()
+    print("✓ Reintentos: espera exponencial persistida entre reinicios")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_una_conexion_para_todo_el_lote,
+        test_limitador_de_tasa,
+        test_reanuda_tras_fallo_y_registra_rechazos,
+        test_reconecta_si_el_servidor_corta,
+        test_estado_del_mensaje_encolado,
+        test_reintento_con_espera_persistida,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test para el ensamble de ecuaciones de TMB (ecuaciones_tmb.py).
+
+Valida:
+- Valores de cada ecuación para un cliente (Katch-McArdle = calcular_tmb_cunningham)
+- Dispersión del ensamble (media, mínimo, máximo, rango %)
+- Lote vectorizado igual al cálculo por cliente, desde el registro de evaluaciones
+- Estrategias "tmb_<ecuación>" de evaluar_cliente()
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from ecuaciones_tmb import ECUACIONES_TMB, tmb_ensamble, tmb_ensamble_lote
+from motor_calculo import calcular_tmb_cunningham, evaluar_cliente
+from registro_evaluaciones import RegistroEvaluaciones
+
+
+CLIENTE = {'sexo': "Mujer", 'edad': 30, 'peso': 60.0, 'estatura': 165.0, 'grasa_corporal': 28.0,
+           'metodo_grasa': "DEXA (Gold Standard)", 'nivel_actividad': "Sedentario", 'dias_fuerza': 3}
+
+
+def test_valores_por_ecuacion():
+    hombre = tmb_ensamble(peso=80, estatura=180, edad=30, sexo="Hombre", mlg=65)
+    assert hombre['katch_mcardle'] == calcular_tmb_cunningham(65) == 370 + 21.6 * 65
+    assert hombre['cunningham'] == 500 + 22 * 65
+    assert hombre['mifflin_st_jeor'] == 10 * 80 + 6.25 * 180 - 5 * 30 + 5
+    assert abs(hombre['harris_benedict'] - (88.362 + 13.397 * 80 + 4.799 * 180 - 5.677 * 30)) < 1e-9
+
+    mujer = tmb_ensamble(peso=60, estatura=165, edad=30, sexo="Mujer", mlg=43.2)
+    assert mujer['mifflin_st_jeor'] == 10 * 60 + 6.25 * 165 - 5 * 30 - 161
+    assert abs(mujer['harris_benedict'] - (447.593 + 9.247 * 60 + 3.098 * 165 - 4.330 * 30)) < 1e-9
+    assert all(isinstance(v, float) for v in mujer.values())
+    print(f"✓ TMB por ecuación (Hombre: {', '.join(f'{n} {hombre[n]:.0f}' for n in ECUACIONES_TMB)})")
+
+
+def test_dispersion():
+    ensamble = tmb_ensamble(peso=80, estatura=180, edad=30, sexo="Hombre", mlg=65)
+    valores = [ensamble[n] for n in ECUACIONES_TMB]
+    assert ensamble['minimo'] == min(valores) and ensamble['maximo'] == max(valores)
+    assert abs(ensamble['media'] - sum(valores) / len(valores)) < 1e-9
+    assert abs(ensamble['rango_pct'] - (max(valores) - min(valores)) / ensamble['media'] * 100) < 1e-9
+
+    solo = tmb_ensamble(80, 180, 30, "Hombre", 65, ecuaciones=['cunningham'])
+    assert set(solo) == {'cunningham', 'media', 'minimo', 'maximo', 'rango_pct'} and solo['rango_pct'] == 0
+    print(f"✓ Dispersión del ensamble: {ensamble['rango_pct']:.1f}%")
+
+
+def test_lote_desde_registro():
+    rng = np.random.default_rng(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        registro = RegistroEvaluaciones(os.path.join(tmp, 'evaluaciones.db'))
+        evaluaciones = []
+        for i in range(500):
+            peso = float(rng.uniform(50, 110))
+            grasa = float(rng.uniform(10, 40))
+            evaluaciones.append({'nombre': f"Cliente {i}", 'email': f"c{i}@example.com",
+                                 'sexo': "Hombre" if i % 2 else "Mujer", 'edad': int(rng.integers(18, 70)),
+                                 'peso': peso, 'estatura': float(rng.uniform(150, 195)),
+                                 'grasa_corregida': grasa, 'mlg': peso * (1 - grasa / 100)})
+        evaluaciones.append({'nombre': "Sin datos", 'email': "x@example.com"})
+        registro.registrar_lote(evaluaciones)
+        composicion = registro.datos_composicion()
+
+    assert len(composicion) == 501 and composicion['mlg'].isna().sum() == 1
+    lote = tmb_ensamble_lote(composicion)
+    assert isinstance(lote, pd.DataFrame) and list(lote.index) == list(composicion.index)
+    for i in (0, 1, 250, 499):
+        fila = composicion.iloc[i]
+        individual = tmb_ensamble(fila['peso'], fila['estatura'], fila['edad'], fila['sexo'], fila['mlg'])
+        for columna, valor in individual.items():
+            assert abs(lote[columna].iloc[i] - valor) < 1e-9, (i, columna)
+    assert lote.iloc[500].isna().all()
+    print(f"✓ Lote de {len(lote)} evaluaciones en una llamada, igual al cálculo por cliente")
+
+
+def test_estrategia_por_ecuacion():
+    base = evaluar_cliente(CLIENTE)
+    for ecuacion in ECUACIONES_TMB:
+        evaluacion = evaluar_cliente(CLIENTE, estrategia=f"tmb_{ecuacion}")
+        ensamble = evaluacion['tmb_ensamble']
+        assert evaluacion['ecuacion_tmb'] == ecuacion and evaluacion['tmb'] == ensamble[ecuacion]
+        assert abs(evaluacion['ingesta_calorica']
+                   - evaluacion['gasto_energetico'] * (1 + evaluacion['porcentaje'] / 100)) < 1e-9
+    katch = evaluar_cliente(CLIENTE, estrategia="tmb_katch_mcardle")
+    assert katch['tmb'] == base['tmb'] and katch['ingesta_calorica'] == base['ingesta_calorica']
+    cunningham = evaluar_cliente(CLIENTE, estrategia="tmb_cunningham")
+    assert cunningham['gasto_energetico'] > base['gasto_energetico']
+    assert cunningham['macros']['carbo_g'] > base['macros']['carbo_g']
+    print("✓ Estrategias tmb_<ecuación>: el plan usa la ecuación elegida")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_valores_por_ecuacion,
+        test_dispersion,
+        test_lote_desde_registro,
+        test_estrategia_por_ecuacion,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
@@ -12,6 +12,10 @@ streamlit_app_path = os.path.join(script_dir, "streamlit_app.py")
 with open(streamlit_app_path, "r") as f:
     content = f.read()
 
+# El contenido de los emails se construye en plantillas_email.py
+with open(os.path.join(script_dir, "plantillas_email.py"), "r") as f:
+    content += f.read()
+
 print("Testing enviar_email_parte2 function integration...")
 print("=" * 60)
 
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test para el esquema del cuestionario (cuestionario.json + esquema_cuestionario.py).
+
+Valida:
+- El esquema se compila una sola vez por proceso
+- Tablas de puntos por opción (sueño, estrés, experiencia)
+- Renderizado de una sección desde el esquema
+- Serialización de respuestas para el reporte
+- Una pregunta obligatoria nueva en el esquema agrega su bit sin tocar código
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+from esquema_cuestionario import RUTA_ESQUEMA, cargar_esquema
+from progreso_cuestionario import SeguimientoCompletitud
+
+
+class _StFalso:
+    """Registra las llamadas a widgets y devuelve la primera opción."""
+
+    def __init__(self):
+        self.llamadas = []
+
+    def markdown(self, texto):
+        self.llamadas.append(('markdown', texto))
+
+    def radio(self, etiqueta, opciones, help=None, key=None):
+        self.llamadas.append(('radio', key))
+        return opciones[0]
+
+
+def test_compilado_una_vez():
+    assert cargar_esquema() is cargar_esquema()
+    esquema = cargar_esquema()
+    assert esquema.version == 1
+    nombres = [c.nombre for c in esquema.campos]
+    assert nombres[:3] == ['nombre', 'telefono', 'email_cliente']
+    assert [n for n in nombres if n.startswith('ejercicio_')] == [f'ejercicio_{i}' for i in range(1, 6)]
+    print(f"✓ Esquema compilado una vez: {len(esquema.campos)} bits de seguimiento")
+
+
+def test_puntos_por_opcion():
+    puntos = cargar_esquema().puntos
+    assert puntos['horas_sueno'] == {"≥8 horas": 0, "7-7.9 horas": 1, "6-6.9 horas": 2,
+                                     "5-5.9 horas": 3, "<5 horas": 4}
+    assert max(puntos['calidad_sueno'].values()) == 4 and max(puntos['tiempo_conciliar'].values()) == 3
+    sueno = sum(max(puntos[c].values()) for c in ('horas_sueno', 'tiempo_conciliar', 'veces_despierta',
+                                                    'calidad_sueno'))
+    estres = sum(max(puntos[c].values()) for c in ('sobrecarga', 'falta_control', 'dificultad_manejar',
+                                                     'irritabilidad'))
+    assert (sueno, estres) == (14, 16)
+    assert puntos['frecuencia_entrenamiento']["4 o más veces por semana de forma consistente"] == 1.5
+    assert cargar_esquema().opciones('veces_despierta') == ["Ninguna", "1 vez", "2 veces", "3 o más veces"]
+    print("✓ Puntos por opción (sueño 0-14, estrés 0-16, experiencia)")
+
+
+def test_renderizado_y_reporte():
+    esquema = cargar_esquema()
+    st = _StFalso()
+    valores = esquema.renderizar_seccion('experiencia', st)
+    assert [k for t, k in st.llamadas if t == 'radio'] == ['frecuencia_entrenamiento', 'tiempo_experiencia',
+                                                           'tipo_entrenamiento']
+    assert esquema.respuestas('experiencia', valores) == {
+        'frecuencia': esquema.opciones('frecuencia_entrenamiento')[0],
+        'tiempo': "Menos de 6 meses",
+        'tipo': esquema.opciones('tipo_entrenamiento')[0],
+    }
+
+    lineas = esquema.lineas_reporte('suenyo', {'horas_sueno': "≥8 horas"}).split("\n")
+    assert lineas[0] == "   • Horas por noche: ≥8 horas"
+    assert lineas[1] == "   • Tiempo para conciliar: No reportado" and len(lineas) == 4
+    print("✓ Sección dibujada desde el esquema y respuestas serializadas para el reporte")
+
+
+def test_pregunta_nueva_sin_tocar_codigo():
+    with open(RUTA_ESQUEMA, encoding='utf-8') as f:
+        datos = json.load(f)
+    datos['secciones'][0]['campos'].append({
+        'clave': 'ocupacion', 'progreso': True, 'requerido': {'regla': 'texto'}, 'faltante': "Ocupación"})
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'cuestionario.json')
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False)
+        esquema = cargar_esquema(ruta)
+    campo = next(c for c in esquema.campos if c.nombre == 'ocupacion')
+    assert campo.paso == 1 and campo.etiqueta == "Ocupación"
+    assert not campo.validar({'ocupacion': "  "}) and campo.validar({'ocupacion': "Ingeniera"})
+
+    ciclo = next(c for c in esquema.campos if c.nombre == 'ciclo_menstrual')
+    assert ciclo.entradas == ('ciclo_menstrual', 'sexo')
+    assert ciclo.validar({'sexo': "Hombre"})
+    assert not ciclo.validar({'sexo': "Mujer", 'ciclo_menstrual': "Selecciona una opción..."})
+
+    # El esquema de la app no cambió
+    assert 'ocupacion' not in [c.nombre for c in cargar_esquema().campos]
+    assert SeguimientoCompletitud().progreso()[2] == 21
+    print("✓ Pregunta obligatoria nueva agregada solo en el esquema")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_compilado_una_vez,
+        test_puntos_por_opcion,
+        test_renderizado_y_reporte,
+        test_pregunta_nueva_sin_tocar_codigo,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
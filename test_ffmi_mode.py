@@ -15,6 +15,10 @@ streamlit_app_path = os.path.join(script_dir, "streamlit_app.py")
 with open(streamlit_app_path, "r", encoding="utf-8") as f:
     content = f.read()
 
+# Las funciones del motor se definen en motor_calculo.py (streamlit_app.py las importa)
+with open(os.path.join(script_dir, "motor_calculo.py"), "r", encoding="utf-8") as f:
+    content += f.read()
+
 # Extract and execute just the functions we need
 # We'll do basic string pattern matching to verify implementation
 
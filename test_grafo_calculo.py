@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Test para el grafo de cálculo de métricas derivadas (grafo_calculo.py).
+
+Valida:
+- Cada métrica se calcula una sola vez por versión de sus entradas
+- Fijar los mismos valores no recalcula nada
+- Cambiar una entrada recalcula solo los nodos que dependen de ella
+- Corte temprano: un nodo recalculado con el mismo valor no propaga
+- Ciclos y entradas sin fijar
+- Mismos valores que motor_calculo.py, con el modelo de masa muscular calibrado
+  del dispositivo (metodo_grasa) cuando está activo
+- Los nodos que streamlit_app.py pasa a los emails existen en el grafo y son
+  parámetros de las plantillas
+"""
+
+import ast
+import inspect
+import sys
+
+from grafo_calculo import ENTRADAS_EVALUACION, GrafoCalculo, grafo_evaluacion
+from plantillas_email import construir_email_cliente, construir_email_parte2
+from motor_calculo import (
+    activar_modelo_masa_muscular, calcular_edad_metabolica, calcular_ffmi, calcular_mlg, calcular_tmb_cunningham,
+    clasificar_ffmi, estimar_masa_muscular_desde_mlg,
+)
+
+
+CLIENTE = {'sexo': "Hombre", 'edad': 35, 'peso': 82.0, 'estatura': 178.0, 'grasa_corregida': 18.0,
+           'nivel_entrenamiento': 'avanzado', 'circunferencia_cintura': 84.0, 'circunferencia_cuello': 38.0,
+           'circunferencia_cadera': 0.0, 'masa_muscular_aparato': 35.0, 'metodo_grasa': "Omron HBF-516 (BIA)"}
+
+
+def _grafo():
+    grafo = grafo_evaluacion()
+    grafo.fijar(**CLIENTE)
+    return grafo
+
+
+def test_una_vez_por_version():
+    grafo = _grafo()
+    for _ in range(5):
+        grafo['ffmi'], grafo['tmb'], grafo['wthr'], grafo['masa_muscular_estimada']
+        grafo.resolver('mlg', 'nivel_ffmi', 'edad_metabolica', 'masa_grasa', 'imc')
+    conteos = grafo.conteos()
+    assert conteos['mlg'] == 1 and conteos['ffmi'] == 1 and conteos['tmb'] == 1, conteos
+    assert conteos['categoria_bf'] == 0 and conteos['modo_ffmi'] == 0
+    assert set(CLIENTE) == set(ENTRADAS_EVALUACION)
+
+    assert grafo.fijar(**CLIENTE) == []
+    grafo['ffmi'], grafo['masa_muscular_estimada']
+    assert grafo.conteos()['mlg'] == 1 and grafo.conteos()['ffmi'] == 1
+    print(f"✓ Cada métrica calculada una vez en 5 lecturas ({sum(conteos.values())} cálculos)")
+
+
+def test_invalidacion_selectiva():
+    grafo = _grafo()
+    grafo.resolver('mlg', 'tmb', 'ffmi', 'nivel_ffmi', 'wthr', 'imc', 'edad_metabolica')
+    antes = grafo.conteos()
+
+    assert grafo.fijar(estatura=180.0, peso=82.0) == ['estatura']
+    grafo.resolver('mlg', 'tmb', 'ffmi', 'nivel_ffmi', 'wthr', 'imc', 'edad_metabolica')
+    recalculados = {n for n, c in grafo.conteos().items() if c != antes[n]}
+    assert recalculados == {'ffmi', 'nivel_ffmi', 'wthr', 'imc'}, recalculados
+    print(f"✓ Cambiar la estatura recalcula solo {sorted(recalculados)}")
+
+
+def test_corte_temprano():
+    grafo = GrafoCalculo()
+    grafo.fijar(x=3)
+
+    @grafo.nodo()
+    def signo(x):
+        return x > 0
+
+    @grafo.nodo()
+    def etiqueta(signo):
+        return "positivo" if signo else "no positivo"
+
+    assert grafo['etiqueta'] == "positivo"
+    grafo.fijar(x=7)
+    assert grafo['etiqueta'] == "positivo"
+    assert grafo.calculos['signo'] == 2 and grafo.calculos['etiqueta'] == 1
+    print("✓ Corte temprano: mismo valor intermedio no recalcula los dependientes")
+
+
+def test_errores():
+    grafo = GrafoCalculo()
+
+    @grafo.nodo(dependencias=('b',))
+    def a(b):
+        return b
+
+    @grafo.nodo(dependencias=('a',))
+    def b(a):
+        return a
+
+    try:
+        grafo['a']
+        assert False, "debió detectar el ciclo"
+    except ValueError as e:
+        assert "Ciclo" in str(e)
+    try:
+        grafo.fijar(a=1)
+        assert False, "un nodo derivado no se puede fijar"
+    except ValueError:
+        pass
+
+    incompleto = grafo_evaluacion()
+    incompleto.fijar(peso=80.0)
+    assert incompleto.get('mlg') is None and incompleto.get('ffmi', 0) == 0
+    print("✓ Ciclos y entradas sin fijar")
+
+
+def test_valores_motor_calculo():
+    grafo = _grafo()
+    mlg = calcular_mlg(CLIENTE['peso'], CLIENTE['grasa_corregida'])
+    ffmi = calcular_ffmi(mlg, CLIENTE['estatura'])
+    assert grafo['mlg'] == mlg and grafo['ffmi'] == ffmi
+    assert grafo['tmb'] == calcular_tmb_cunningham(mlg)
+    assert grafo['nivel_ffmi'] == clasificar_ffmi(ffmi, "Hombre")
+    assert grafo['edad_metabolica'] == calcular_edad_metabolica(35, 18.0, "Hombre")
+    assert grafo['masa_muscular_estimada'] == estimar_masa_muscular_desde_mlg(mlg, "Hombre", 'avanzado')
+    assert grafo['wthr'] == 84.0 / 178.0 and grafo['masa_grasa'] == CLIENTE['peso'] - mlg
+
+    # Con un modelo calibrado activo para el dispositivo, el nodo lo usa
+    coeficientes = (1.5, 0.4, -0.04, 0.02)
+    activar_modelo_masa_muscular("InBody 270 (BIA)", coeficientes)
+    try:
+        grafo.fijar(metodo_grasa="InBody 270 (BIA)")
+        assert grafo['masa_muscular_estimada'] == estimar_masa_muscular_desde_mlg(mlg, "Hombre", 'avanzado',
+                                                                                  coeficientes)
+        assert grafo['masa_muscular_estimada'] != estimar_masa_muscular_desde_mlg(mlg, "Hombre", 'avanzado')
+    finally:
+        activar_modelo_masa_muscular("InBody 270 (BIA)", None)
+
+    grafo.fijar(estatura=0, circunferencia_cintura=None)
+    assert grafo['ffmi'] is None and grafo['wthr'] is None and grafo['imc'] == 0
+    print(f"✓ Mismos valores que motor_calculo (FFMI {ffmi:.2f}, TMB {grafo['tmb']:.0f})")
+
+
+def _nodos_email_de_la_app():
+    """NODOS_EMAIL_CLIENTE / NODOS_EMAIL_PARTE2 de streamlit_app.py (no se puede importar sin streamlit)."""
+    with open('streamlit_app.py', encoding='utf-8') as f:
+        arbol = ast.parse(f.read())
+    valores = {}
+    for nodo in arbol.body:
+        if isinstance(nodo, ast.Assign) and isinstance(nodo.targets[0], ast.Name):
+            nombre = nodo.targets[0].id
+            if nombre == 'NODOS_EMAIL_CLIENTE':
+                valores[nombre] = ast.literal_eval(nodo.value)
+            elif nombre == 'NODOS_EMAIL_PARTE2':
+                valores[nombre] = valores[nodo.value.left.id] + ast.literal_eval(nodo.value.right)
+    return valores['NODOS_EMAIL_CLIENTE'], valores['NODOS_EMAIL_PARTE2']
+
+
+def test_nodos_de_los_emails():
+    cliente, parte2 = _nodos_email_de_la_app()
+    grafo = _grafo()
+    resueltos = grafo.resolver(*parte2)
+    assert resueltos['masa_grasa'] == CLIENTE['peso'] - grafo['mlg'] and resueltos['tmb'] == grafo['tmb']
+    assert set(cliente) <= set(inspect.signature(construir_email_cliente).parameters)
+    assert set(parte2) <= set(inspect.signature(construir_email_parte2).parameters)
+    print(f"✓ {len(parte2)} nodos del grafo alimentan los emails con el nombre de su parámetro")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_una_vez_por_version,
+        test_invalidacion_selectiva,
+        test_corte_temprano,
+        test_errores,
+        test_valores_motor_calculo,
+        test_nodos_de_los_emails,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test para el % grasa por circunferencias (grasa_circunferencias.py).
+
+Valida:
+- Ecuaciones US Navy (hombre/mujer) y RFM con valores de referencia
+- Medidas faltantes o en 0 dejan el canal sin valor
+- Contraste con el valor corregido y bandera de divergencia no plausible
+- Lote vectorizado igual al contraste individual
+- Contraste incluido en evaluar_cliente()
+"""
+
+import math
+import sys
+
+import numpy as np
+import pandas as pd
+
+from grasa_circunferencias import (
+    DIVERGENCIA_MAXIMA, contrastar_grasa, contrastar_lote, grasa_navy, grasa_rfm,
+)
+from motor_calculo import evaluar_cliente
+
+
+def test_ecuaciones():
+    hombre = grasa_navy("Hombre", estatura=178, cintura=84, cuello=38)
+    esperado = 495 / (1.0324 - 0.19077 * math.log10(84 - 38) + 0.15456 * math.log10(178)) - 450
+    assert abs(hombre - esperado) < 1e-9 and 14 < hombre < 17
+
+    mujer = grasa_navy("Mujer", estatura=165, cintura=80, cuello=32, cadera=100)
+    esperado = 495 / (1.29579 - 0.35004 * math.log10(80 + 100 - 32) + 0.22100 * math.log10(165)) - 450
+    assert abs(mujer - esperado) < 1e-9
+
+    assert grasa_rfm("Hombre", 178, 89) == 64 - 20 * 2
+    assert grasa_rfm("Mujer", 165, 82.5) == 64 - 20 * 2 + 12
+    print(f"✓ US Navy (H {hombre:.1f}%, M {mujer:.1f}%) y RFM")
+
+
+def test_medidas_faltantes():
+    assert grasa_navy("Mujer", 165, 80, 32) is None          # mujer sin cadera
+    assert grasa_navy("Hombre", 178, 0, 38) is None
+    assert grasa_navy("Hombre", 178, 35, 38) is None         # cuello > cintura: sin logaritmo
+    assert grasa_rfm("Hombre", 178, None) is None
+
+    sin_datos = contrastar_grasa(20.0, "Hombre", 178, 0.0, 0.0, 0.0)
+    assert sin_datos['circunferencias'] is None and not sin_datos['implausible'] and sin_datos['aviso'] == ""
+    solo_rfm = contrastar_grasa(20.0, "Mujer", 165, 80, 32)
+    assert solo_rfm['navy'] is None and solo_rfm['circunferencias'] == solo_rfm['rfm']
+    print("✓ Medidas faltantes dejan el canal sin valor")
+
+
+def test_divergencia():
+    plausible = contrastar_grasa(18.0, "Hombre", 178, 84, 38)
+    assert abs(plausible['circunferencias'] - (plausible['navy'] + plausible['rfm']) / 2) < 1e-9
+    assert abs(plausible['divergencia'] - (18.0 - plausible['circunferencias'])) < 1e-9
+    assert not plausible['implausible'] and plausible['aviso'] == ""
+
+    # Escaneo BIA con la mitad de la grasa que indican las circunferencias
+    mal_escaneo = contrastar_grasa(12.0, "Mujer", 165, 80, 32, 100)
+    assert mal_escaneo['implausible'] and mal_escaneo['divergencia'] < -DIVERGENCIA_MAXIMA
+    assert "revisar la medición" in mal_escaneo['aviso']
+    assert not contrastar_grasa(12.0, "Mujer", 165, 80, 32, 100, umbral=30)['implausible']
+    print(f"✓ Divergencia {mal_escaneo['divergencia']:+.1f} puntos marcada como no plausible")
+
+
+def test_lote():
+    rng = np.random.default_rng(9)
+    n = 1000
+    df = pd.DataFrame({
+        'sexo': np.where(rng.random(n) < 0.5, "Hombre", "Mujer"),
+        'estatura': rng.uniform(150, 195, n),
+        'grasa_corregida': rng.uniform(8, 45, n),
+        'circunferencia_cintura': rng.uniform(60, 120, n),
+        'circunferencia_cuello': rng.uniform(28, 45, n),
+        'circunferencia_cadera': rng.uniform(85, 130, n),
+    })
+    df.loc[3, 'circunferencia_cintura'] = 0.0
+    df.loc[4, 'circunferencia_cadera'] = None
+    lote = contrastar_lote(df)
+    assert list(lote.columns) == ['navy', 'rfm', 'circunferencias', 'divergencia', 'implausible']
+
+    for i in (0, 1, 3, 4, 500):
+        fila = df.iloc[i]
+        individual = contrastar_grasa(fila['grasa_corregida'], fila['sexo'], fila['estatura'],
+                                      fila['circunferencia_cintura'], fila['circunferencia_cuello'],
+                                      None if pd.isna(fila['circunferencia_cadera']) else fila['circunferencia_cadera'])
+        for columna in ('navy', 'rfm', 'circunferencias', 'divergencia'):
+            valor = lote[columna].iloc[i]
+            assert (individual[columna] is None and np.isnan(valor)) or abs(valor - individual[columna]) < 1e-9
+        assert bool(lote['implausible'].iloc[i]) == individual['implausible']
+    assert not lote['implausible'].iloc[3]
+    print(f"✓ Lote de {n}: {int(lote['implausible'].sum())} no plausibles, igual al contraste individual")
+
+
+def test_en_evaluar_cliente():
+    datos = {'sexo': "Hombre", 'edad': 30, 'peso': 80.0, 'estatura': 178.0, 'grasa_corporal': 8.0,
+             'metodo_grasa': "DEXA (Gold Standard)", 'circunferencia_cintura': 100.0,
+             'circunferencia_cuello': 38.0}
+    contraste = evaluar_cliente(datos)['contraste_grasa']
+    assert contraste['implausible'] and contraste['navy'] > 20
+    assert not evaluar_cliente(dict(datos, circunferencia_cintura=None))['contraste_grasa']['implausible']
+    print("✓ Contraste incluido en evaluar_cliente()")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_ecuaciones,
+        test_medidas_faltantes,
+        test_divergencia,
+        test_lote,
+        test_en_evaluar_cliente,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test para la propagación del error de medición (propagar_incertidumbre en motor_calculo.py).
+
+Valida:
+- P10 ≤ P50 ≤ P90 alrededor del valor puntual de MLG, TMB, FFMI y kcal
+- Métodos más precisos dan intervalos más estrechos; modelo de error propio
+- Resultados reproducibles con semilla y percentiles iguales a np.percentile
+- Tope por recuperación aplicado a cada sorteo
+- Estrategia 'con_incertidumbre' de evaluar_cliente() y tiempo por cliente
+"""
+
+import json
+import sys
+import time
+
+import numpy as np
+
+from motor_calculo import ERROR_MEDICION_GRASA, evaluar_cliente, propagar_incertidumbre
+
+
+CLIENTE = {'sexo': "Hombre", 'edad': 40, 'peso': 100.0, 'estatura': 178.0, 'grasa_corporal': 30.0,
+           'metodo_grasa': "Omron HBF-516 (BIA)", 'nivel_actividad': "Sedentario", 'dias_fuerza': 3}
+
+
+def _ancho(intervalo):
+    return intervalo['p90'] - intervalo['p10']
+
+
+def test_intervalos_alrededor_del_valor():
+    evaluacion = evaluar_cliente(CLIENTE)
+    rango = propagar_incertidumbre(evaluacion, semilla=1)
+    assert rango['muestras'] == 10_000 and rango['error_grasa'] == ERROR_MEDICION_GRASA[CLIENTE['metodo_grasa']]
+    for metrica in ('mlg', 'tmb', 'ffmi', 'gasto_energetico', 'ingesta_calorica'):
+        intervalo = rango[metrica]
+        assert intervalo['p10'] < intervalo['p50'] < intervalo['p90'], (metrica, intervalo)
+        assert abs(intervalo['p50'] - evaluacion[metrica]) / evaluacion[metrica] < 0.01, (metrica, intervalo)
+    # ±4 puntos de grasa en 100 kg ≈ ±5 kg de MLG entre P10 y P50
+    assert 4 < rango['mlg']['p50'] - rango['mlg']['p10'] < 6
+    print(f"✓ MLG {rango['mlg']['p10']:.1f}–{rango['mlg']['p90']:.1f} kg alrededor de {evaluacion['mlg']:.1f}")
+
+
+def test_error_por_metodo():
+    base = evaluar_cliente(CLIENTE)
+    omron = propagar_incertidumbre(base, semilla=2)
+    dexa = propagar_incertidumbre(dict(base, metodo_grasa="DEXA (Gold Standard)"), semilla=2)
+    assert _ancho(dexa['mlg']) < _ancho(omron['mlg']) and _ancho(dexa['tmb']) < _ancho(omron['tmb'])
+
+    propio = propagar_incertidumbre(base, semilla=2, modelo_error={CLIENTE['metodo_grasa']: 0.0})
+    assert propio['error_grasa'] == 0.0 and _ancho(propio['mlg']) < 1.0
+    print("✓ Intervalo más estrecho con DEXA que con Omron; modelo de error propio")
+
+
+def test_reproducible_y_percentiles():
+    evaluacion = evaluar_cliente(CLIENTE)
+    assert propagar_incertidumbre(evaluacion, semilla=7) == propagar_incertidumbre(evaluacion, semilla=7)
+
+    rango = propagar_incertidumbre(evaluacion, muestras=501, semilla=7)
+    rng = np.random.default_rng(7)
+    ruido = rng.standard_normal((3, 501))
+    grasa = np.clip(evaluacion['grasa_corregida'] + 4.0 * ruido[0], 3.0, 60.0)
+    mlg = (evaluacion['peso'] + 0.2 * ruido[1]) * (1 - grasa / 100)
+    esperado = np.percentile(mlg, (10, 50, 90))
+    assert np.allclose([rango['mlg'][k] for k in ('p10', 'p50', 'p90')], esperado)
+    print("✓ Reproducible con semilla; percentiles iguales a np.percentile")
+
+
+def test_tope_por_recuperacion():
+    libre = evaluar_cliente(CLIENTE)
+    baja = evaluar_cliente(dict(CLIENTE, nivel_recuperacion="BAJA"))
+    rango_libre = propagar_incertidumbre(libre, semilla=3)
+    rango_baja = propagar_incertidumbre(baja, semilla=3)
+    # Con tope del 20% la ingesta de cada sorteo es al menos el 80% de su gasto
+    assert rango_baja['ingesta_calorica']['p10'] >= rango_baja['gasto_energetico']['p10'] * 0.8 - 1e-6
+    assert rango_baja['ingesta_calorica']['p50'] > rango_libre['ingesta_calorica']['p50']
+    assert rango_baja['mlg'] == rango_libre['mlg']
+    print("✓ Tope de déficit por recuperación aplicado a cada sorteo")
+
+
+def test_estrategia_y_tiempo():
+    evaluacion = evaluar_cliente(CLIENTE, estrategia='con_incertidumbre')
+    assert set(evaluacion['incertidumbre']) >= {'mlg', 'tmb', 'ffmi', 'ingesta_calorica'}
+    json.dumps(evaluacion)
+    assert 'incertidumbre' not in evaluar_cliente(CLIENTE)
+
+    # Sin gasto energético solo hay métricas de composición
+    parcial = propagar_incertidumbre({k: evaluacion[k] for k in
+                                      ('sexo', 'peso', 'estatura', 'grasa_corregida', 'metodo_grasa')})
+    assert 'ingesta_calorica' not in parcial and 'ffmi' in parcial
+
+    inicio = time.perf_counter()
+    for _ in range(20):
+        propagar_incertidumbre(evaluacion)
+    ms = (time.perf_counter() - inicio) / 20 * 1000
+    assert ms < 25, f"{ms:.1f} ms por cliente"
+    print(f"✓ Estrategia con_incertidumbre; {ms:.1f} ms por cliente (10k sorteos)")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_intervalos_alrededor_del_valor,
+        test_error_por_metodo,
+        test_reproducible_y_percentiles,
+        test_tope_por_recuperacion,
+        test_estrategia_y_tiempo,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
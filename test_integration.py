@@ -15,6 +15,10 @@ streamlit_app_path = os.path.join(script_dir, "streamlit_app.py")
 with open(streamlit_app_path, "r") as f:
     content = f.read()
 
+# Las funciones del motor se definen en motor_calculo.py (streamlit_app.py las importa)
+with open(os.path.join(script_dir, "motor_calculo.py"), "r", encoding="utf-8") as f:
+    content += f.read()
+
 # Check that OMRON_HBF516_TO_4C is defined
 if "OMRON_HBF516_TO_4C = {" in content:
     print("✓ OMRON_HBF516_TO_4C constant found in streamlit_app.py")
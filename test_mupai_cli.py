@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Test para la línea de comandos de evaluación por lotes (mupai.py).
+
+Valida:
+- Mapeo de columnas de exportaciones Omron / InBody
+- Conversión a 4C según --method y motor completo por fila
+- Lectura por bloques con pool de procesos conservando el orden
+- Filas inválidas reportadas sin detener el lote
+- Reportes HTML por cliente
+- Letra de sexo 'M' (male / mujer) rechazada sin --sexo-letras
+- .xlsx leído por bloques y .parquet escrito bloque a bloque con esquema fijo
+"""
+
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+from mupai import main, mapear_columnas, COLUMNAS_SALIDA, METODOS_CLI
+from motor_calculo import evaluar_cliente
+
+
+def _escribir_csv(ruta, n=10):
+    filas = []
+    for i in range(n):
+        filas.append({
+            'Name': f"Cliente {i}",
+            'Gender': 'M' if i % 2 == 0 else 'F',
+            'Age': 25 + i,
+            'Weight (kg)': 60 + i,
+            'Height (cm)': 165 + i,
+            'Body Fat %': 15 + i,
+        })
+    pd.DataFrame(filas).to_csv(ruta, index=False)
+    return filas
+
+
+def test_mapeo_columnas():
+    mapa = mapear_columnas(['Name', 'Gender', 'Age', 'Weight (kg)', 'Height (cm)', 'PBF', 'Otra'])
+    assert mapa == {'Name': 'nombre', 'Gender': 'sexo', 'Age': 'edad', 'Weight (kg)': 'peso',
+                    'Height (cm)': 'estatura', 'PBF': 'grasa_corporal'}
+    print("✓ Columnas de exportación mapeadas")
+
+
+def test_evaluate_csv_coincide_con_motor():
+    """Cada fila de salida coincide con evaluar_cliente() usando el método elegido."""
+    with tempfile.TemporaryDirectory() as tmp:
+        entrada = os.path.join(tmp, 'scans.csv')
+        salida = os.path.join(tmp, 'results.csv')
+        filas = _escribir_csv(entrada, n=25)
+
+        assert main(['evaluate', '--input', entrada, '--method', 'inbody', '--out', salida,
+                     '--chunk-size', '4', '--workers', '2', '--sexo-letras', 'en']) == 0
+        df = pd.read_csv(salida)
+
+        assert list(df['fila']) == list(range(1, 26))
+        assert df['error'].isna().all()
+        for i in (0, 7, 24):
+            esperado = evaluar_cliente({
+                'sexo': "Hombre" if i % 2 == 0 else "Mujer", 'edad': filas[i]['Age'],
+                'peso': filas[i]['Weight (kg)'], 'estatura': filas[i]['Height (cm)'],
+                'grasa_corporal': filas[i]['Body Fat %'], 'metodo_grasa': METODOS_CLI['inbody'],
+            })
+            assert abs(df.loc[i, 'grasa_corregida'] - esperado['grasa_corregida']) < 1e-9
+            assert abs(df.loc[i, 'ingesta_calorica'] - esperado['ingesta_calorica']) < 1e-6
+            assert abs(df.loc[i, 'macros_proteina_g'] - esperado['macros']['proteina_g']) < 1e-6
+    print("✓ Lote por bloques en procesos coincide con el motor")
+
+
+def test_filas_invalidas_y_html():
+    """Las filas inválidas quedan marcadas y se genera un HTML por cliente válido."""
+    with tempfile.TemporaryDirectory() as tmp:
+        entrada = os.path.join(tmp, 'scans.csv')
+        salida = os.path.join(tmp, 'results.csv')
+        reportes = os.path.join(tmp, 'html')
+        _escribir_csv(entrada, n=3)
+        df = pd.read_csv(entrada)
+        df.loc[1, 'Weight (kg)'] = 5
+        df.to_csv(entrada, index=False)
+
+        assert main(['evaluate', '--input', entrada, '--method', 'omron', '--out', salida,
+                     '--html-dir', reportes, '--workers', '1', '--sexo-letras', 'en']) == 0
+        resultado = pd.read_csv(salida)
+        assert resultado['error'].notna().tolist() == [False, True, False]
+        assert 'peso' in resultado.loc[1, 'error']
+
+        archivos = sorted(os.listdir(reportes))
+        assert len(archivos) == 2
+        with open(os.path.join(reportes, archivos[0]), encoding='utf-8') as f:
+            contenido = f.read()
+        assert "Cliente 0" in contenido and "REPORTE DE EVALUACIÓN CORPORAL" in contenido
+    print("✓ Filas inválidas marcadas y reportes HTML generados")
+
+
+def test_letra_de_sexo_ambigua():
+    """'M' es Hombre en inglés y Mujer en español: sin convención la fila no se evalúa."""
+    with tempfile.TemporaryDirectory() as tmp:
+        entrada = os.path.join(tmp, 'scans.csv')
+        salida = os.path.join(tmp, 'results.csv')
+        _escribir_csv(entrada, n=4)
+        assert main(['evaluate', '--input', entrada, '--method', 'omron', '--out', salida, '--workers', '1']) == 0
+        resultado = pd.read_csv(salida)
+        assert resultado['error'].notna().tolist() == [True, False, True, False]
+        assert "ambiguo" in resultado.loc[0, 'error'] and resultado.loc[1, 'sexo'] == "Mujer"
+
+        df = pd.read_csv(entrada)
+        df['Gender'] = ['H', 'M', 'H', 'M']
+        df.to_csv(entrada, index=False)
+        assert main(['evaluate', '--input', entrada, '--method', 'omron', '--out', salida, '--workers', '1',
+                     '--sexo-letras', 'es']) == 0
+        assert pd.read_csv(salida)['sexo'].tolist() == ["Hombre", "Mujer", "Hombre", "Mujer"]
+    print("✓ 'M' ambigua rechazada sin --sexo-letras; H/M con --sexo-letras es")
+
+
+def test_xlsx_a_parquet_por_bloques():
+    """Un primer bloque sólo con errores no cambia el esquema de los siguientes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv = os.path.join(tmp, 'scans.csv')
+        entrada = os.path.join(tmp, 'scans.xlsx')
+        salida = os.path.join(tmp, 'results.parquet')
+        _escribir_csv(csv, n=9)
+        df = pd.read_csv(csv)
+        df.loc[[0, 1, 2], 'Weight (kg)'] = 5
+        df.to_excel(entrada, index=False)
+
+        assert main(['evaluate', '--input', entrada, '--method', 'omron', '--out', salida,
+                     '--chunk-size', '3', '--workers', '1', '--sexo-letras', 'en']) == 0
+        resultado = pd.read_parquet(salida)
+        assert list(resultado.columns) == COLUMNAS_SALIDA
+        assert list(resultado['fila']) == list(range(1, 10))
+        assert resultado['error'].notna().tolist() == [True] * 3 + [False] * 6
+        assert resultado['nivel_ffmi'].iloc[3:].notna().all()
+        assert resultado['macros_proteina_g'].iloc[3:].gt(0).all()
+    print("✓ .xlsx por bloques → .parquet con el mismo esquema en cada bloque")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_mapeo_columnas,
+        test_evaluate_csv_coincide_con_motor,
+        test_filas_invalidas_y_html,
+        test_letra_de_sexo_ambigua,
+        test_xlsx_a_parquet_por_bloques,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
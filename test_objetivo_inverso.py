@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test para el solucionador de objetivo inverso (objetivo_inverso.py).
+
+Valida:
+- psmf_vectorizado reproduce tier y calorías de calculate_psmf()
+- Tope de déficit interpolado por % grasa (máximo 35%)
+- Semanas hasta la meta coherentes con la simulación semana a semana
+- PSMF con transiciones de tier y conjunto de Pareto
+- Porcentaje requerido para un plazo y metas de peso en superávit
+- Meta igual al valor actual: un solo resultado "ya alcanzada"
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from motor_calculo import calculate_psmf
+from objetivo_inverso import (
+    DEFICIT_MAXIMO_PCT, psmf_vectorizado, resolver_objetivo, resumir_pareto, tope_deficit,
+)
+
+
+def test_psmf_vectorizado_igual_a_calculate_psmf():
+    for sexo in ("Hombre", "Mujer"):
+        for estatura in (None, 150.0, 178.0):
+            for grasa in np.arange(10, 55, 0.7):
+                for peso in (60.0, 85.0, 130.0):
+                    mlg = peso * (1 - grasa / 100)
+                    esperado = calculate_psmf(sexo, peso, grasa, mlg, estatura)
+                    aplicable, tier, calorias = psmf_vectorizado(sexo, [peso], [grasa], [mlg], estatura)
+                    assert aplicable[0] == esperado['psmf_aplicable'], (sexo, grasa)
+                    if aplicable[0]:
+                        assert tier[0] == esperado['tier_psmf'], (sexo, grasa, peso, estatura)
+                        assert abs(calorias[0] - esperado['calorias_dia']) < 1e-6, (sexo, grasa, peso, estatura)
+    print("✓ psmf_vectorizado igual a calculate_psmf (tiers y calorías)")
+
+
+def test_tope_deficit():
+    assert tope_deficit(40, "Hombre") == DEFICIT_MAXIMO_PCT and tope_deficit(60, "Mujer") == DEFICIT_MAXIMO_PCT
+    assert tope_deficit(5, "Hombre") == 15 and abs(tope_deficit(17.5, "Hombre") - 22.5) < 1e-9
+    assert tope_deficit(28, "Mujer") == 25
+    print("✓ Tope de déficit interpolado (máximo 35%)")
+
+
+def test_semanas_hasta_la_meta():
+    r = resolver_objetivo(85, 22, "Hombre", 2700, grasa_objetivo=16, estatura=178)
+    assert r['direccion'] == "pérdida" and r['objetivo'] == {'tipo': 'grasa', 'valor': 16.0, 'actual': 22.0}
+    tradicional = [p for p in r['planes'] if p['plan'] == 'tradicional' and p['semanas'] is not None]
+    assert tradicional
+    # Más déficit nunca tarda más; el plan llega cerca de la meta
+    semanas = [p['semanas'] for p in sorted(tradicional, key=lambda p: -p['porcentaje'])]
+    assert all(a >= b for a, b in zip(semanas, semanas[1:]))
+    assert all(abs(p['grasa_final'] - 16) < 0.6 for p in tradicional)
+    # El déficit efectivo nunca supera el tope del % grasa inicial
+    assert max(p['deficit_medio_pct'] for p in tradicional) <= tope_deficit(22, "Hombre") + 1e-6
+    # Meta imposible en el horizonte
+    assert resolver_objetivo(85, 22, "Hombre", 2700, grasa_objetivo=4)['mas_rapido'] is None
+
+    inicio = time.perf_counter()
+    for _ in range(20):
+        resolver_objetivo(95, 30, "Hombre", 2900, grasa_objetivo=15, estatura=178)
+    ms = (time.perf_counter() - inicio) / 20 * 1000
+    assert ms < 50, ms
+    print(f"✓ Semanas hasta la meta coherentes ({ms:.1f} ms por resolución)")
+
+
+def test_psmf_tiers_y_pareto():
+    r = resolver_objetivo(95, 30, "Hombre", 2900, grasa_objetivo=15, estatura=178)
+    psmf = next(p for p in r['planes'] if p['plan'] == 'psmf')
+    assert [t for _, t in psmf['tiers']] == [2, 1, 0]          # tier 2 → 1 → tradicional
+    assert r['mas_rapido'] is psmf
+    assert psmf in r['pareto'] and r['pareto'] == sorted(r['pareto'], key=lambda p: p['semanas'])
+    for a in r['pareto']:
+        for b in r['pareto']:
+            assert not (a['semanas'] < b['semanas'] and a['deficit_medio_pct'] < b['deficit_medio_pct']
+                        and a['mlg_perdida_kg'] < b['mlg_perdida_kg'])
+    assert resumir_pareto(r)[0].startswith("PSMF:")
+    # Sin elegibilidad no hay PSMF
+    assert all(p['plan'] == 'tradicional' for p in
+               resolver_objetivo(80, 16, "Hombre", 2600, grasa_objetivo=12)['planes'])
+    print(f"✓ PSMF con tiers {psmf['tiers']} y Pareto de {len(r['pareto'])} planes")
+
+
+def test_porcentaje_requerido_y_superavit():
+    r = resolver_objetivo(85, 22, "Hombre", 2700, grasa_objetivo=18, semanas_objetivo=20)
+    requerido = r['porcentaje_requerido']
+    assert requerido is not None and -DEFICIT_MAXIMO_PCT <= requerido < 0
+    plazos = sorted((p['semanas'], p['porcentaje']) for p in r['planes'] if p['semanas'] is not None)
+    assert any(s <= 20 for s, _ in plazos) and any(s >= 20 for s, _ in plazos)
+    assert resolver_objetivo(85, 22, "Hombre", 2700, grasa_objetivo=18, semanas_objetivo=1)['porcentaje_requerido'] is None
+
+    ganancia = resolver_objetivo(70, 12, "Hombre", 2600, peso_objetivo=74, semanas_objetivo=20)
+    assert ganancia['direccion'] == "ganancia" and ganancia['porcentaje_requerido'] > 0
+    assert ganancia['mas_rapido']['porcentaje'] == 20.0
+    try:
+        resolver_objetivo(70, 12, "Hombre", 2600)
+        assert False, "sin meta debe fallar"
+    except ValueError:
+        pass
+    print(f"✓ Déficit requerido para 20 semanas: {requerido}%; superávit {ganancia['porcentaje_requerido']}%")
+
+
+def test_meta_ya_alcanzada():
+    for meta in ({'grasa_objetivo': 22}, {'peso_objetivo': 85.0}, {'grasa_objetivo': 22.04}):
+        r = resolver_objetivo(85, 22, "Hombre", 2700, semanas_objetivo=12, **meta)
+        assert r['alcanzado'] and r['direccion'] == "mantenimiento"
+        assert len(r['planes']) == 1 and r['pareto'] == r['planes'] and r['mas_rapido'] is r['planes'][0]
+        plan = r['mas_rapido']
+        assert plan['semanas'] == 0.0 and plan['porcentaje'] == 0.0 and plan['kcal_inicial'] == 2700
+        assert r['porcentaje_requerido'] == 0.0
+    assert resumir_pareto(r) == ["Meta ya alcanzada: 22% (2700 kcal/día de mantenimiento)"]
+
+    cerca = resolver_objetivo(85, 22, "Hombre", 2700, grasa_objetivo=21.9)
+    assert not cerca['alcanzado'] and cerca['direccion'] == "pérdida" and len(cerca['planes']) > 1
+    print("✓ Meta igual al valor actual: un solo resultado \"ya alcanzada\"")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_psmf_vectorizado_igual_a_calculate_psmf,
+        test_tope_deficit,
+        test_semanas_hasta_la_meta,
+        test_psmf_tiers_y_pareto,
+        test_porcentaje_requerido_y_superavit,
+        test_meta_ya_alcanzada,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test para el optimizador de macros con restricciones (optimizador_macros.py).
+
+Valida:
+- Sin restricciones activas reproduce calcular_macros_tradicional()
+- Cierre calórico exacto y restricciones activas reportadas
+- Relajación en orden (de la banda de carbohidratos solo el límite que no cabe)
+  y caso sin solución
+- PSMF con piso calórico y ciclaje 4-3 cerrando en cada tipo de día
+- Lote vectorizado igual al cálculo individual y estrategia "macros_restringidas"
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from motor_calculo import (
+    calculate_psmf, calcular_ciclaje_4_3, calcular_macros_restringidas, calcular_macros_restringidas_lote,
+    calcular_macros_psmf_restringidas, calcular_macros_tradicional, evaluar_cliente,
+)
+from optimizador_macros import resolver_ciclaje_4_3, resolver_macros, restricciones_tradicionales
+
+INF = float('inf')
+
+
+def validar_cierre_calorico(protein_g, fat_g, carb_g, target_kcal):
+    """Mismo criterio que validacion_coherencia_completa.validar_cierre_calorico (±10 kcal)."""
+    diferencia = abs(4 * protein_g + 9 * fat_g + 4 * carb_g - target_kcal)
+    return diferencia <= 10, diferencia
+
+
+def _cierra(m, kcal):
+    return validar_cierre_calorico(m['proteina_g'], m['grasa_g'], m['carbo_g'], kcal)[0]
+
+
+def test_sin_restricciones_activas_igual_a_tradicional():
+    r = resolver_macros(2000, [150, 70, 192.5], [150, 0, 0], [INF, INF, INF])
+    assert r['activas'] == [] and r['relajadas'] == [] and r['factible']
+    assert abs(r['proteina_g'] - 150) < 1e-9 and abs(r['grasa_g'] - 70) < 1e-9 and abs(r['carbo_g'] - 192.5) < 1e-9
+
+    tradicional = calcular_macros_tradicional(2800, 1800, "Hombre", 18, 80, 65.6)
+    restringida = calcular_macros_restringidas(2800, 1800, "Hombre", 18, 80, 65.6, 'principiante')
+    assert restringida['factible'] and restringida['relajadas'] == []
+    for clave in ('proteina_g', 'grasa_g', 'carbo_g'):
+        assert abs(restringida[clave] - tradicional[clave]) <= 0.1, clave
+    print("✓ Sin restricciones activas = calcular_macros_tradicional")
+
+
+def test_cierre_y_restricciones_activas():
+    # El resto no llega al mínimo de carbohidratos: la grasa baja hasta su piso
+    r = resolver_macros(2000, [150, 80, 170], [150, 45, 200], [INF, 90, 400])
+    assert abs(4 * r['proteina_g'] + 9 * r['grasa_g'] + 4 * r['carbo_g'] - 2000) < 1e-6
+    assert r['activas'] == ['proteina_min', 'carbos_min'] and r['proteina_g'] == 150
+    assert abs(r['carbo_g'] - 200) < 1e-9 and 45 < r['grasa_g'] < 80
+
+    # El resto excede el máximo de carbohidratos: sube la grasa hasta su techo
+    r = resolver_macros(3200, [150, 70, 492.5], [150, 40, 0], [300, 90, 400])
+    assert 'carbos_max' in r['activas'] and 'grasa_max' in r['activas']
+    assert abs(4 * r['proteina_g'] + 9 * r['grasa_g'] + 4 * r['carbo_g'] - 3200) < 1e-6
+    print("✓ Cierre exacto y restricciones activas reportadas")
+
+
+def test_relajacion_y_sin_solucion():
+    # La banda de carbohidratos no cabe: se relaja primero
+    r = resolver_macros(1500, [170, 70, 47], [170, 33, 425], [260, 66, 595])
+    assert r['relajadas'] == ['banda_carbos'] and r['factible']
+    assert abs(4 * r['proteina_g'] + 9 * r['grasa_g'] + 4 * r['carbo_g'] - 1500) < 1e-6
+
+    # Déficit típico: solo baja el piso de la banda, hasta el valor que cabe (no al resto)
+    for kcal, tmb, sexo, grasa, peso, mlg in ((1672, 1925, "Hombre", 20, 90, 72.0),
+                                              (1350, 1400, "Mujer", 28, 62, 44.6)):
+        m = calcular_macros_restringidas(kcal, tmb, sexo, grasa, peso, mlg, 'intermedio')
+        _, minimos, maximos = m['restricciones']
+        grasa_min = kcal * 0.20 / 9
+        assert m['relajadas'] == ['banda_carbos'] and 'carbos_min' in m['activas'], m
+        assert abs(m['grasa_g'] - grasa_min) <= 0.05 and m['carbo_g'] < minimos[2] < maximos[2]
+        assert abs(m['carbo_g'] - (kcal - 4 * m['proteina_g'] - 9 * grasa_min) / 4) <= 0.1
+        assert m['carbo_g'] > (kcal - 4 * m['proteina_g'] - 9 * m['restricciones'][0][1]) / 4 + 50
+        assert _cierra(m, kcal)
+
+    # Superávit: solo sube el techo de la banda, con proteína y grasa en sus techos
+    r = resolver_macros(5200, [186, 120, 0], [186, 115, 240], [186, 231, 420])
+    assert r['relajadas'] == ['banda_carbos'] and abs(r['grasa_g'] - 231) < 1e-6
+    assert abs(r['carbo_g'] - (5200 - 4 * 186 - 9 * 231) / 4) < 1e-6
+
+    # Ni con la proteína sola: sin solución, se devuelven los pisos
+    r = resolver_macros(500, [170, 30, 0], [170, 30, 0], [INF, INF, INF])
+    assert not r['factible'] and r['proteina_g'] == 170 and r['carbo_g'] == 0
+    print("✓ Relajación en orden y caso sin solución")
+
+
+def test_psmf_y_ciclaje():
+    # Mujer magra: el piso de 700 kcal supera los macros del protocolo
+    psmf = calculate_psmf("Mujer", 35, 24, 26.6, 145)
+    assert psmf['calorias_dia'] == psmf['calorias_piso_dia']
+    assert not _cierra({'proteina_g': psmf['proteina_g_dia'], 'grasa_g': psmf['grasa_g_dia'],
+                        'carbo_g': psmf['carbs_g_dia']}, psmf['calorias_dia'])
+    macros = calcular_macros_psmf_restringidas(psmf)
+    assert _cierra(macros, psmf['calorias_dia']) and macros['proteina_g'] == psmf['proteina_g_dia']
+    assert psmf['carbs_g_dia'] < macros['carbo_g'] <= psmf['carb_cap_aplicado_g']
+
+    # Día bajo con carbohidratos que no alcanzan: el ciclaje clásico no cierra, el restringido sí
+    objetivos, minimos, maximos = restricciones_tradicionales(1900, 2000, 118, 216.0)
+    clasico = calcular_ciclaje_4_3(1900, 216.0, objetivos[0][1])
+    restringido = resolver_ciclaje_4_3(1900, objetivos[0], minimos[0], maximos[0])
+    bajo = clasico['low_days']
+    assert not validar_cierre_calorico(bajo['protein_g'], bajo['fat_g'], bajo['carb_g'], bajo['kcal'])[0]
+    for dia in restringido.values():
+        assert validar_cierre_calorico(dia['protein_g'], dia['fat_g'], dia['carb_g'], dia['kcal'])[0]
+    assert restringido['low_days']['kcal'] == bajo['kcal'] and 'carbos_min' in restringido['low_days']['activas']
+    print("✓ PSMF con piso calórico y ciclaje 4-3 cierran en kcal")
+
+
+def test_lote_y_estrategia():
+    rng = np.random.default_rng(3)
+    n = 2000
+    df = pd.DataFrame({'sexo': np.where(rng.random(n) < 0.5, "Hombre", "Mujer"), 'peso': rng.uniform(50, 130, n),
+                       'grasa_corregida': rng.uniform(8, 45, n),
+                       'nivel_entrenamiento': rng.choice(['principiante', 'intermedio', 'avanzado', 'élite'], n)})
+    df['mlg'] = df['peso'] * (1 - df['grasa_corregida'] / 100)
+    df['tmb'] = 370 + 21.6 * df['mlg']
+    df['ingesta_calorica'] = df['tmb'] * rng.uniform(1.1, 2.2, n)
+    lote = calcular_macros_restringidas_lote(df)
+    assert lote['factible'].all() and (lote['kcal'] - df['ingesta_calorica']).abs().max() < 1e-6
+    for i in (0, 7, 1500):
+        fila = df.iloc[i]
+        individual = calcular_macros_restringidas(fila['ingesta_calorica'], fila['tmb'], fila['sexo'],
+                                                  fila['grasa_corregida'], fila['peso'], fila['mlg'],
+                                                  fila['nivel_entrenamiento'])
+        for clave in ('proteina_g', 'grasa_g', 'carbo_g'):
+            assert abs(lote[clave].iloc[i] - individual[clave]) <= 0.05 + 1e-9, (i, clave)
+        assert lote['activas'].iloc[i] == individual['activas']
+
+    datos = {'sexo': "Hombre", 'edad': 30, 'peso': 120.0, 'estatura': 178.0, 'grasa_corporal': 38.0, 'ir_se': 30}
+    evaluacion = evaluar_cliente(datos, 'macros_restringidas')
+    assert _cierra(evaluacion['macros'], evaluacion['ingesta_calorica'])
+    for dia in evaluacion['ciclaje_4_3'].values():
+        assert validar_cierre_calorico(dia['protein_g'], dia['fat_g'], dia['carb_g'], dia['kcal'])[0]
+    assert 'activas' in evaluacion['macros_psmf']
+    print(f"✓ Lote de {n} igual al individual; estrategia macros_restringidas cierra en kcal")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_sin_restricciones_activas_igual_a_tradicional,
+        test_cierre_y_restricciones_activas,
+        test_relajacion_y_sin_solucion,
+        test_psmf_y_ciclaje,
+        test_lote_y_estrategia,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
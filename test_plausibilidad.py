@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Test para el detector de plausibilidad (plausibilidad.py) y la cuarentena del registro.
+
+Valida:
+- Una evaluación coherente puntúa 100
+- Reglas cruzadas: IMC vs % grasa, FFMI, visceral vs WtHR, masa muscular vs MLG
+- Sin grasa visceral medida la regla visceral/WtHR no se evalúa
+- z-scores robustos contra la población del mismo sexo
+- Lote vectorizado igual a la puntuación individual
+- Importación con cuarentena: las poco plausibles no cuentan en los reportes
+  hasta liberarlas
+- Estadísticos del registro cacheados entre envíos, recalculados al crecer la población
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from plausibilidad import (
+    CRECIMIENTO_RECALCULO, UMBRAL_CUARENTENA, estadisticos_poblacion, estadisticos_registro,
+    evaluar_plausibilidad, puntuar_evaluacion, registrar_con_cuarentena,
+)
+from registro_evaluaciones import RegistroEvaluaciones
+
+
+COHERENTE = {'sexo': "Hombre", 'edad': 30, 'peso': 80.0, 'estatura': 178.0, 'grasa_corregida': 18.0,
+             'circunferencia_cintura': 84.0, 'grasa_visceral': 6, 'masa_muscular_aparato': 36.0,
+             'nivel_entrenamiento': 'intermedio'}
+
+
+def _poblacion(n=600, semilla=4):
+    """Población realista: % grasa correlacionado con el IMC (Deurenberg) y ruido."""
+    rng = np.random.default_rng(semilla)
+    hombre = rng.random(n) < 0.5
+    edad = rng.integers(18, 65, n)
+    estatura = np.where(hombre, rng.normal(176, 7, n), rng.normal(163, 6, n))
+    imc = rng.normal(25, 3, n)
+    grasa = 1.2 * imc + 0.23 * edad - 10.8 * hombre - 5.4 + rng.normal(0, 3, n)
+    return pd.DataFrame({'sexo': np.where(hombre, "Hombre", "Mujer"), 'edad': edad,
+                         'peso': imc * (estatura / 100) ** 2, 'estatura': estatura, 'grasa_corregida': grasa})
+
+
+def test_coherente():
+    resultado = puntuar_evaluacion(COHERENTE, _poblacion())
+    assert resultado == {'puntuacion': 100.0, 'cuarentena': False, 'motivos': []}, resultado
+    print("✓ Evaluación coherente: plausibilidad 100")
+
+
+def test_reglas_cruzadas():
+    casos = {
+        "% grasa incompatible con el IMC": dict(COHERENTE, grasa_corregida=45.0),
+        "FFMI por encima del límite natural": dict(COHERENTE, peso=95.0, grasa_corregida=12.0),
+        "FFMI no plausible": dict(COHERENTE, peso=110.0, grasa_corregida=8.0),
+        "Grasa visceral incompatible con el WtHR": dict(COHERENTE, grasa_visceral=18, circunferencia_cintura=76.0),
+        "Masa muscular del aparato incompatible con la MLG": dict(COHERENTE, masa_muscular_aparato=75.0),
+    }
+    for motivo, evaluacion in casos.items():
+        resultado = puntuar_evaluacion(evaluacion)
+        assert motivo in resultado['motivos'], (motivo, resultado)
+    assert puntuar_evaluacion(casos["FFMI no plausible"])['cuarentena']
+    assert not puntuar_evaluacion(casos["FFMI por encima del límite natural"])['cuarentena']
+    print("✓ Reglas cruzadas: IMC/grasa, FFMI, visceral/WtHR, músculo/MLG")
+
+
+def test_visceral_no_medida():
+    # WtHR 0.62: un nivel 1 medido es incompatible; sin medir (None, vacío, 0) no penaliza
+    cintura_alta = dict(COHERENTE, circunferencia_cintura=110.0)
+    motivo = "Grasa visceral incompatible con el WtHR"
+    assert motivo in puntuar_evaluacion(dict(cintura_alta, grasa_visceral=1))['motivos']
+    for sin_medir in (None, "", 0):
+        resultado = puntuar_evaluacion(dict(cintura_alta, grasa_visceral=sin_medir))
+        assert motivo not in resultado['motivos'], (sin_medir, resultado)
+    lote = evaluar_plausibilidad(pd.DataFrame([dict(cintura_alta, grasa_visceral=None),
+                                               dict(cintura_alta, grasa_visceral=2)]))
+    assert lote['motivos'].tolist() == [[], [motivo]], lote['motivos'].tolist()
+    print("✓ Grasa visceral no medida: la regla visceral/WtHR no se evalúa")
+
+
+def test_z_robusto():
+    poblacion = _poblacion()
+    estadisticos = estadisticos_poblacion(poblacion)
+    assert ("Hombre", 'peso') in estadisticos.index and (estadisticos['mad'] > 0).all()
+
+    # Estatura de 2.15 m: legítima por rangos, atípica frente al gimnasio
+    alto = puntuar_evaluacion(dict(COHERENTE, estatura=215.0, peso=118.0), estadisticos=estadisticos)
+    assert any(m.startswith("estatura atípico") for m in alto['motivos']), alto
+    # Sin población suficiente no hay z-scores
+    assert not any("atípico" in m for m in puntuar_evaluacion(dict(COHERENTE, estatura=215.0, peso=118.0),
+                                                              poblacion.head(10))['motivos'])
+    print("✓ z-scores robustos contra la población del mismo sexo")
+
+
+def test_lote_igual_a_individual():
+    poblacion = _poblacion()
+    lote_df = _poblacion(300, semilla=8)
+    lote_df.loc[5, 'grasa_corregida'] = 55.0
+    lote_df.loc[6, 'peso'] = 0.0                         # safe_float convirtió basura en 0
+    lote = evaluar_plausibilidad(lote_df, poblacion)
+    for i in (0, 5, 6, 150):
+        individual = puntuar_evaluacion(lote_df.iloc[i].to_dict(), poblacion)
+        assert lote['puntuacion'].iloc[i] == individual['puntuacion'], i
+        assert lote['motivos'].iloc[i] == individual['motivos'], i
+    assert lote['cuarentena'].iloc[5] and lote['puntuacion'].iloc[6] < 100
+    assert lote['cuarentena'].mean() < 0.1
+    print(f"✓ Lote de {len(lote)}: {int(lote['cuarentena'].sum())} en cuarentena, igual al individual")
+
+
+def test_cuarentena_en_registro():
+    with tempfile.TemporaryDirectory() as tmp:
+        registro = RegistroEvaluaciones(os.path.join(tmp, 'evaluaciones.db'))
+        base = [dict(fila, nombre=f"Cliente {i}", email=f"c{i}@example.com")
+                for i, fila in enumerate(_poblacion(200).to_dict('records'))]
+        registradas, apartadas = registrar_con_cuarentena(registro, base)
+        assert registradas + len(apartadas) == 200
+
+        sospechosa = dict(COHERENTE, nombre="Escaneo dudoso", email="d@example.com", peso=110.0,
+                          grasa_corregida=5.0)
+        registradas, apartadas = registrar_con_cuarentena(registro, [dict(COHERENTE, nombre="Ok",
+                                                                          email="ok@example.com"), sospechosa])
+        assert registradas == 1 and len(apartadas) == 1
+        total = registro.buscar(por_pagina=1000)['total']
+        assert "Escaneo dudoso" not in [f['nombre'] for f in registro.buscar(por_pagina=1000)['filas']]
+
+        pendientes = registro.en_cuarentena()
+        dudoso = next(p for p in pendientes if p['nombre'] == "Escaneo dudoso")
+        assert dudoso['puntuacion'] < UMBRAL_CUARENTENA and "FFMI no plausible" in dudoso['motivos']
+
+        nuevo_id = registro.liberar(dudoso['id'])
+        assert registro.obtener(nuevo_id)['grasa_corregida'] == 5.0
+        assert registro.buscar(por_pagina=1000)['total'] == total + 1
+        assert all(p['id'] != dudoso['id'] for p in registro.en_cuarentena())
+        assert registro.liberar(dudoso['id']) is None
+
+        otro = registro.poner_en_cuarentena({'nombre': "X"}, ["prueba"])
+        registro.descartar(otro)
+        assert all(p['id'] != otro for p in registro.en_cuarentena())
+    print("✓ Cuarentena fuera de los reportes hasta liberarla o descartarla")
+
+
+def test_estadisticos_registro_cacheados():
+    with tempfile.TemporaryDirectory() as tmp:
+        registro = RegistroEvaluaciones(os.path.join(tmp, 'evaluaciones.db'))
+        registro.registrar_lote([dict(fila, nombre=f"Cliente {i}") for i, fila in
+                                 enumerate(_poblacion(300).to_dict('records'))])
+        primeros = estadisticos_registro(registro)
+        # Unas pocas evaluaciones más reutilizan los estadísticos sin releer la población completa
+        registro.registrar_lote([dict(COHERENTE, nombre="Nueva")])
+        assert estadisticos_registro(registro) is primeros
+        assert len(registro.datos_composicion()) == 301
+
+        # Al crecer más de CRECIMIENTO_RECALCULO se recalculan con todas las filas
+        extra = int(300 * CRECIMIENTO_RECALCULO) + 5
+        registro.registrar_lote([dict(fila, nombre=f"Extra {i}") for i, fila in
+                                 enumerate(_poblacion(extra, semilla=9).to_dict('records'))])
+        recalculados = estadisticos_registro(registro)
+        assert recalculados is not primeros
+        esperado = estadisticos_poblacion(registro.datos_composicion())
+        pd.testing.assert_frame_equal(recalculados, esperado)
+        assert int(recalculados['n'].groupby(level='sexo').max().sum()) == 301 + extra
+    print("✓ Estadísticos del registro cacheados y recalculados al crecer la población")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_coherente,
+        test_reglas_cruzadas,
+        test_visceral_no_medida,
+        test_z_robusto,
+        test_lote_igual_a_individual,
+        test_cuarentena_en_registro,
+        test_estadisticos_registro_cacheados,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
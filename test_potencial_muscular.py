@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test para el modelo de potencial muscular (potencial_muscular.py).
+
+Valida:
+- Las tablas precalculadas reproducen la fórmula de Casey Butt
+- El techo crece con la estructura ósea y la mujer de referencia llega al límite natural
+- Años hasta el 95% del potencial coherentes con la curva por nivel
+- Ranking vectorizado igual al cálculo individual
+- evaluar_cliente() agrega el potencial muscular
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from motor_calculo import calcular_ffmi, evaluar_cliente
+from potencial_muscular import (
+    FFMI_REFERENCIA_MUJER, LIBRA_KG, PROPORCION_MUNECA, PROPORCION_TOBILLO, TASA_CIERRE_ANUAL,
+    curva_anos_potencial, factor_mujer, ffmi_maximo, potencial_muscular, ranking_potencial,
+)
+
+
+def _butt(estatura, muneca, tobillo, grasa):
+    """Fórmula original en pulgadas y libras."""
+    h, w, a = estatura / 2.54, muneca / 2.54, tobillo / 2.54
+    return h ** 1.5 * (np.sqrt(w) / 22.6670 + np.sqrt(a) / 17.0104) * (grasa / 224 + 1) * LIBRA_KG
+
+
+def test_tablas_igual_a_formula():
+    for estatura, muneca, tobillo, grasa in ((178.0, 18.0, 23.0, 10.0), (165.3, 16.4, 21.7, 12.0),
+                                             (191.0, 19.5, 25.1, 14.0)):
+        ffmi_max, mlg_max = ffmi_maximo("Hombre", estatura, grasa, muneca, tobillo)
+        esperado = _butt(estatura, muneca, tobillo, grasa)
+        assert abs(mlg_max - esperado) < 1e-9, (estatura, mlg_max, esperado)
+        assert abs(ffmi_max - calcular_ffmi(esperado, estatura)) < 1e-9
+    # Sin medidas: marco medio estimado por estatura
+    estimado = ffmi_maximo("Hombre", 180.0, 10.0)[1]
+    assert abs(estimado - _butt(180.0, PROPORCION_MUNECA['Hombre'] * 180, PROPORCION_TOBILLO['Hombre'] * 180, 10)) < 1e-9
+    print("✓ Tablas precalculadas = fórmula de Casey Butt")
+
+
+def test_estructura_y_sexo():
+    fino = potencial_muscular("Hombre", 178, 65, 12, muneca=16.0, tobillo=21.0)
+    grueso = potencial_muscular("Hombre", 178, 65, 12, muneca=19.5, tobillo=25.0)
+    assert grueso['ffmi_max'] > fino['ffmi_max'] and grueso['marco_medido'] and fino['porc_potencial'] > grueso['porc_potencial']
+    # % grasa acotado a la condición magra: 30% evalúa igual que 15%
+    assert potencial_muscular("Hombre", 178, 65, 30)['ffmi_max'] == potencial_muscular("Hombre", 178, 65, 15)['ffmi_max']
+    referencia = ffmi_maximo("Mujer", 165.0, 20.0)[0]
+    assert abs(referencia - FFMI_REFERENCIA_MUJER) < 1e-6 and 0 < factor_mujer() < 1
+    assert potencial_muscular("Mujer", 0, 45, 25)['ffmi_max'] is None
+    print(f"✓ Techo por estructura ósea ({fino['ffmi_max']:.1f} → {grueso['ffmi_max']:.1f}); mujer de referencia {referencia:.2f}")
+
+
+def test_anos_al_potencial():
+    anos = {}
+    for nivel in TASA_CIERRE_ANUAL:
+        p = potencial_muscular("Hombre", 178, 62, 14, nivel_entrenamiento=nivel)
+        curva = curva_anos_potencial(p['ffmi_actual'], p['ffmi_max'], nivel, anos=30, puntos_por_ano=100)
+        cruce = curva['anos'][np.argmax(curva['ffmi'] >= 0.95 * p['ffmi_max'])]
+        assert abs(cruce - p['anos_al_95']) <= 0.01, (nivel, cruce, p['anos_al_95'])
+        assert np.all(np.diff(curva['ffmi']) >= 0) and curva['ffmi'][0] == p['ffmi_actual']
+        anos[nivel] = p['anos_al_95']
+    assert anos['principiante'] < anos['intermedio'] < anos['avanzado'] < anos['élite']
+    cerca = potencial_muscular("Hombre", 178, 82, 10)
+    assert cerca['anos_al_95'] == 0 and cerca['porc_potencial'] >= 95
+    print("✓ Años al 95%: " + ", ".join(f"{n} {a:.1f}" for n, a in anos.items()))
+
+
+def test_ranking_igual_a_individual():
+    rng = np.random.default_rng(5)
+    n = 20000
+    hombre = rng.random(n) < 0.5
+    df = pd.DataFrame({'sexo': np.where(hombre, "Hombre", "Mujer"),
+                       'estatura': np.where(hombre, rng.normal(176, 7, n), rng.normal(163, 6, n)),
+                       'grasa_corregida': rng.uniform(8, 40, n),
+                       'nivel_entrenamiento': rng.choice(list(TASA_CIERRE_ANUAL) + [None], n)})
+    df['mlg'] = (df['estatura'] / 100) ** 2 * np.where(hombre, rng.normal(19.5, 2, n), rng.normal(15.5, 1.5, n))
+    df['circunferencia_muneca'] = np.where(rng.random(n) < 0.3, df['estatura'] * 0.1, np.nan)
+    df['circunferencia_tobillo'] = np.where(df['circunferencia_muneca'].notna(), df['estatura'] * 0.13, np.nan)
+    df.loc[3, 'estatura'] = np.nan
+
+    inicio = time.perf_counter()
+    ranking = ranking_potencial(df)
+    ms = (time.perf_counter() - inicio) * 1000
+    assert list(ranking['puesto']) == list(range(1, n + 1)) and ranking.index[-1] == 3
+    assert ranking['margen_ffmi'].dropna().is_monotonic_decreasing
+    for i in (0, 7, 1234):
+        fila = df.loc[i]
+        individual = potencial_muscular(fila['sexo'], fila['estatura'], fila['mlg'], fila['grasa_corregida'],
+                                        fila['circunferencia_muneca'], fila['circunferencia_tobillo'],
+                                        fila['nivel_entrenamiento'] or 'intermedio')
+        for clave, valor in individual.items():
+            assert abs(float(ranking.loc[i, clave]) - float(valor)) < 1e-9, (i, clave)
+    assert ms < 1000, ms
+    print(f"✓ Ranking de {n} clientes igual al individual ({ms:.0f} ms)")
+
+
+def test_evaluar_cliente():
+    datos = {'sexo': "Hombre", 'edad': 30, 'peso': 80.0, 'estatura': 178.0, 'grasa_corporal': 18.0,
+             'nivel_entrenamiento': 'avanzado', 'circunferencia_muneca': 18.0, 'circunferencia_tobillo': 23.0}
+    evaluacion = evaluar_cliente(datos)
+    potencial = evaluacion['potencial_muscular']
+    assert potencial['marco_medido'] and abs(potencial['ffmi_actual'] - evaluacion['ffmi']) < 1e-9
+    assert potencial == potencial_muscular("Hombre", 178.0, evaluacion['mlg'], evaluacion['grasa_corregida'],
+                                           18.0, 23.0, 'avanzado')
+    assert not evaluar_cliente(dict(datos, circunferencia_muneca=None))['potencial_muscular']['marco_medido']
+    print(f"✓ evaluar_cliente: {potencial['porc_potencial']:.0f}% del potencial, FFMI máx. {potencial['ffmi_max']:.1f}")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_tablas_igual_a_formula,
+        test_estructura_y_sexo,
+        test_anos_al_potencial,
+        test_ranking_igual_a_individual,
+        test_evaluar_cliente,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test para el seguimiento de completitud del cuestionario (progreso_cuestionario.py).
+
+Valida:
+- Barra de progreso con los mismos 21 campos que antes
+- Indicadores por paso
+- Solo se revalida lo que cambió, incluidos dicts modificados en el lugar
+- Faltantes para el email en el orden del formulario
+- Ciclo menstrual obligatorio solo para mujeres
+"""
+
+import sys
+
+from progreso_cuestionario import SeguimientoCompletitud, TOTAL_PROGRESO
+
+
+_FOTOS = {'front_relaxed': object(), 'side_relaxed_right': object(), 'back_relaxed': object()}
+
+
+def _completo():
+    seguimiento = SeguimientoCompletitud()
+    seguimiento.actualizar(nombre="Ana López", telefono="8661234567", email_cliente="ana@example.com",
+                           edad=30, sexo="Mujer", acepto_descargo=True)
+    seguimiento.actualizar(sexo="Mujer", ciclo_menstrual="Estoy en mi periodo")
+    seguimiento.actualizar(peso=62.5, estatura=165, grasa_corporal=24.0, masa_muscular=30.1)
+    seguimiento.actualizar(experiencia_completa=True, experiencia_seleccion=None,
+                           frecuencia_entrenamiento="2-3 veces por semana de forma consistente")
+    seguimiento.actualizar(datos_ejercicios={f"ej{i}": i for i in range(5)})
+    seguimiento.actualizar(actividad_diaria="Activo")
+    seguimiento.actualizar(metas_personales="x" * 60, progress_photos=dict(_FOTOS))
+    return seguimiento
+
+
+def test_progreso_y_pasos():
+    seguimiento = SeguimientoCompletitud()
+    assert seguimiento.progreso() == (0, 0, 21) and TOTAL_PROGRESO == 21
+    seguimiento.actualizar(nombre="Ana", telefono=" ", email_cliente="ana@example.com", edad=30,
+                           sexo="Mujer", acepto_descargo=False)
+    assert seguimiento.progreso()[1] == 4
+    assert not seguimiento.paso_completo(1)
+    seguimiento.actualizar(telefono="8661234567", acepto_descargo=True)
+    assert seguimiento.paso_completo(1) and not seguimiento.paso_completo(2)
+
+    completo = _completo()
+    assert completo.progreso() == (100, 21, 21)
+    assert all(completo.paso_completo(p) for p in (1, 2, 3, 4, 5))
+    assert not completo.paso_completo(9)
+    print("✓ Progreso (21 campos) e indicadores por paso")
+
+
+def test_solo_revalida_lo_que_cambia():
+    seguimiento = _completo()
+    assert seguimiento.actualizar(nombre="Ana López", peso=62.5) == 0
+    # session_state modifica el dict de fotos en el lugar
+    fotos = dict(_FOTOS)
+    seguimiento.actualizar(progress_photos=fotos)
+    fotos['back_relaxed'] = None
+    assert seguimiento.actualizar(progress_photos=fotos) != 0
+    assert seguimiento.progreso()[1] == 20
+
+    llamadas = []
+    import progreso_cuestionario
+    original = progreso_cuestionario.CAMPOS
+    try:
+        progreso_cuestionario.CAMPOS = tuple(
+            c._replace(validar=lambda v, c=c: llamadas.append(c.nombre) or c.validar(v)) for c in original)
+        seguimiento.actualizar(peso=70.0, estatura=165)
+    finally:
+        progreso_cuestionario.CAMPOS = original
+    assert llamadas == ['peso'], llamadas
+    print("✓ Solo se revalidan los campos cuyas entradas cambiaron")
+
+
+def test_faltantes_email():
+    seguimiento = SeguimientoCompletitud()
+    seguimiento.actualizar(nombre="Ana", telefono="8661234567", email_cliente="", edad=30, sexo="Mujer")
+    seguimiento.actualizar(datos_ejercicios={'a': 1, 'b': 2}, progress_photos={'front_relaxed': object()})
+    etiquetas = {'foto_side_relaxed_right': "Foto 2 - Perfil lateral relajado (derecho)"}
+    faltantes = seguimiento.faltantes_email(etiquetas)
+    assert faltantes[:2] == ["Email", "Fase del ciclo menstrual"]
+    indice = faltantes.index("Ejercicios funcionales completos (tienes 2 de 5 requeridos)")
+    assert faltantes[indice + 1] == "Foto 2 - Perfil lateral relajado (derecho)"
+    assert faltantes[indice + 2] == "Foto requerida: back_relaxed"
+    assert faltantes[-1].startswith("Metas Personales")
+
+    assert _completo().faltantes_email() == []
+    print("✓ Faltantes para el email en orden del formulario")
+
+
+def test_ciclo_solo_para_mujeres():
+    seguimiento = _completo()
+    seguimiento.actualizar(sexo="Mujer", ciclo_menstrual="Selecciona una opción...")
+    assert seguimiento.faltantes_email() == ["Fase del ciclo menstrual"]
+    seguimiento.actualizar(sexo="Hombre", ciclo_menstrual=None)
+    assert seguimiento.faltantes_email() == []
+    print("✓ Ciclo menstrual obligatorio solo para mujeres")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_progreso_y_pasos,
+        test_solo_revalida_lo_que_cambia,
+        test_faltantes_email,
+        test_ciclo_solo_para_mujeres,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test para el simulador de proyección semana a semana.
+
+Valida:
+- Serie temporal completa y límites de horizonte (4-52 semanas)
+- Dirección del cambio según déficit / superávit / mantenimiento
+- Recalculo de TMB con la MLG de cada semana
+- Banda Monte-Carlo ordenada (P10 <= P50 <= P90) y reproducible con semilla
+- Resumen por horizontes para el reporte YAML
+- Entradas inválidas (no numéricas, NaN, peso <= 0) rechazadas con ValueError
+"""
+
+import sys
+
+import numpy as np
+
+from motor_calculo import calcular_mlg, calcular_tmb_cunningham
+from proyeccion_semanal import simular_proyeccion, resumir_horizontes
+
+
+def test_serie_y_limites_de_horizonte():
+    """La serie incluye la semana 0 y el horizonte se limita a 4-52 semanas."""
+    r = simular_proyeccion(85, 25, 2000, 2600, semanas=20, semilla=1)
+    assert r['semanas'] == list(range(21))
+    assert len(r['peso_kg']['p50']) == 21
+
+    assert simular_proyeccion(85, 25, 2000, 2600, semanas=1, semilla=1)['semanas_simuladas'] == 4
+    assert simular_proyeccion(85, 25, 2000, 2600, semanas=200, semilla=1)['semanas_simuladas'] == 52
+    print("✓ Serie temporal y límites de horizonte correctos")
+
+
+def test_semana_cero_es_estado_actual():
+    """La semana 0 reproduce exactamente el estado actual del cliente."""
+    r = simular_proyeccion(85, 25, 2000, 2600, semilla=1)
+    mlg = calcular_mlg(85, 25)
+    for banda in ('p10', 'p50', 'p90'):
+        assert abs(r['peso_kg'][banda][0] - 85) < 1e-9
+        assert abs(r['mlg_kg'][banda][0] - mlg) < 1e-9
+        assert abs(r['grasa_pct'][banda][0] - 25) < 1e-9
+        assert abs(r['tmb_kcal'][banda][0] - calcular_tmb_cunningham(mlg)) < 1e-9
+    print("✓ Semana 0 = estado actual")
+
+
+def test_direccion_del_cambio():
+    """Déficit pierde peso y grasa, superávit gana, mantenimiento se mantiene."""
+    deficit = simular_proyeccion(90, 28, 1900, 2600, semanas=12, semilla=3)
+    superavit = simular_proyeccion(70, 14, 2900, 2600, semanas=12, semilla=3)
+    mantenimiento = simular_proyeccion(75, 18, 2500, 2500, semanas=12, semilla=3)
+
+    assert deficit['peso_kg']['p50'][-1] < 90
+    assert deficit['grasa_pct']['p50'][-1] < 28
+    assert superavit['peso_kg']['p50'][-1] > 70
+    assert abs(mantenimiento['peso_kg']['p50'][-1] - 75) < 0.5
+    print("✓ Dirección del cambio coherente con el balance energético")
+
+
+def test_tmb_y_termogenesis_en_deficit():
+    """En déficit el TMB cae con la MLG y aparece termogénesis adaptativa."""
+    r = simular_proyeccion(90, 28, 1900, 2600, semanas=24, semilla=5)
+    tmb = r['tmb_kcal']['p50']
+    assert tmb[-1] < tmb[0]
+    assert r['adaptacion_kcal_final'] > 0
+
+    # La pérdida semanal se desacelera (no es una extrapolación lineal)
+    perdida_inicial = r['peso_kg']['p50'][0] - r['peso_kg']['p50'][4]
+    perdida_final = r['peso_kg']['p50'][20] - r['peso_kg']['p50'][24]
+    assert perdida_final < perdida_inicial
+    print(f"✓ TMB {tmb[0]:.0f} → {tmb[-1]:.0f} kcal, adaptación {r['adaptacion_kcal_final']:.0f} kcal")
+
+
+def test_banda_ordenada_y_reproducible():
+    """P10 <= P50 <= P90 en cada semana y la semilla hace el resultado reproducible."""
+    a = simular_proyeccion(90, 28, 1900, 2600, semanas=16, n_escenarios=300, semilla=7)
+    b = simular_proyeccion(90, 28, 1900, 2600, semanas=16, n_escenarios=300, semilla=7)
+    assert np.all(a['peso_kg']['p10'] <= a['peso_kg']['p50'])
+    assert np.all(a['peso_kg']['p50'] <= a['peso_kg']['p90'])
+    assert a['peso_kg']['p90'][-1] - a['peso_kg']['p10'][-1] > 0
+    assert np.array_equal(a['peso_kg']['p50'], b['peso_kg']['p50'])
+    print("✓ Banda P10/P50/P90 ordenada y reproducible")
+
+
+def test_resumen_horizontes():
+    """resumir_horizontes devuelve 1, 2 y 3 meses y None fuera de la simulación."""
+    r = simular_proyeccion(90, 28, 1900, 2600, semanas=13, semilla=9)
+    resumen = resumir_horizontes(r)
+    assert [p['semana'] for p in resumen] == [4, 8, 13]
+    assert set(resumen[0]['peso_kg']) == {'p10', 'p50', 'p90'}
+    assert isinstance(resumen[2]['grasa_pct']['p50'], float)
+
+    assert resumir_horizontes(r, horizontes=(4, 26))[1] is None
+    print("✓ Resumen por horizontes serializable")
+
+
+def test_entradas_invalidas_lanzan_error():
+    """Una entrada no numérica, NaN o fuera de rango no produce una proyección inventada."""
+    invalidas = [
+        ("", 25, 2000, 2600), (85, None, 2000, 2600), (85, 25, "abc", 2600),
+        (0, 25, 2000, 2600), (-80, 25, 2000, 2600), (float('nan'), 25, 2000, 2600),
+        (85, 100, 2000, 2600), (85, 25, 2000, float('inf')), (85, 25, 2000, 0),
+    ]
+    for entradas in invalidas:
+        try:
+            simular_proyeccion(*entradas, semilla=1)
+        except ValueError:
+            continue
+        raise AssertionError(f"Se aceptó {entradas}")
+    print("✓ Entradas inválidas rechazadas con ValueError")
+
+if __name__ == "__main__":
+    tests = [
+        test_serie_y_limites_de_horizonte,
+        test_semana_cero_es_estado_actual,
+        test_direccion_del_cambio,
+        test_tmb_y_termogenesis_en_deficit,
+        test_banda_ordenada_y_reproducible,
+        test_resumen_horizontes,
+        test_entradas_invalidas_lanzan_error,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test para la puntuación de sueño + estrés (puntuacion_suenyo_estres.py).
+
+Valida:
+- Puntuación individual igual a la fórmula del formulario (sueño 0-14, estrés 0-16)
+- Banderas rojas y amarillas
+- Lote vectorizado igual a la puntuación individual, con respuestas faltantes
+- Percentiles de población y percentil de un cliente
+- Repuntuación del histórico del registro de evaluaciones con otros pesos, también
+  en el JSON que leen los reportes reenviados
+"""
+
+import itertools
+import os
+import random
+import sys
+import tempfile
+
+import pandas as pd
+
+from esquema_cuestionario import cargar_esquema
+from puntuacion_suenyo_estres import (
+    NIVELES, PREGUNTAS, percentiles_poblacion, puntuar_lote, puntuar_suenyo_estres, rango_percentil,
+    repuntuar_historico,
+)
+from registro_evaluaciones import RegistroEvaluaciones
+
+
+def _respuestas_aleatorias(rng):
+    esquema = cargar_esquema()
+    return {p: rng.choice(esquema.opciones(p)) for p in PREGUNTAS}
+
+
+def _mejores():
+    return {p: cargar_esquema().opciones(p)[0] for p in PREGUNTAS}
+
+
+def test_puntuacion_individual():
+    mejor = puntuar_suenyo_estres(_mejores())
+    assert (mejor['sleep_raw'], mejor['stress_raw'], mejor['ir_se']) == (0, 0, 100)
+    assert mejor['nivel_recuperacion'] == "ALTA" and mejor['banderas'] == []
+
+    peor = puntuar_suenyo_estres({p: cargar_esquema().opciones(p)[-1] for p in PREGUNTAS})
+    assert (peor['sleep_raw'], peor['stress_raw'], peor['ir_se']) == (14, 16, 0)
+    assert peor['nivel_recuperacion'] == "BAJA" and peor['emoji_nivel'] == "🚨"
+
+    respuestas = dict(_mejores(), horas_sueno="6-6.9 horas", calidad_sueno="Mala",
+                      tiempo_conciliar="30-60 minutos", sobrecarga="A veces", irritabilidad="Frecuentemente")
+    resultado = puntuar_suenyo_estres(respuestas)
+    assert resultado['sleep_raw'] == 7 and resultado['stress_raw'] == 5
+    esperado = max(0, 100 - 7 / 14 * 100) * 0.6 + max(0, 100 - 5 / 16 * 100) * 0.4
+    assert abs(resultado['ir_se'] - esperado) < 1e-9 and resultado['nivel_recuperacion'] == "MEDIA"
+    print(f"✓ Puntuación individual (IR-SE {resultado['ir_se']:.1f}, {resultado['nivel_recuperacion']})")
+
+
+def test_banderas():
+    respuestas = dict(_mejores(), horas_sueno="<5 horas", tiempo_conciliar="Más de 60 minutos",
+                      veces_despierta="3 o más veces", sobrecarga="Frecuentemente",
+                      falta_control="Frecuentemente", dificultad_manejar="A veces")
+    banderas = puntuar_suenyo_estres(respuestas)['banderas']
+    titulos = [(tipo, titulo) for tipo, titulo, _ in banderas]
+    assert titulos == [("🔴 BANDERA ROJA", "Problemas graves de sueño detectados"),
+                       ("🟡 BANDERA AMARILLA", "Nivel de estrés elevado"),
+                       ("🟡 BANDERA AMARILLA", "Duración de sueño insuficiente")], titulos
+    assert "<5 horas" in banderas[-1][2]
+    print("✓ Banderas rojas y amarillas")
+
+
+def test_lote_igual_a_individual():
+    rng = random.Random(3)
+    filas = [_respuestas_aleatorias(rng) for _ in range(2000)]
+    filas[5]['calidad_sueno'] = None
+    filas[6]['sobrecarga'] = "Opción retirada del esquema"
+    lote = puntuar_lote(pd.DataFrame(filas))
+
+    for i, respuestas in itertools.islice(enumerate(filas), 0, 200):
+        if i in (5, 6):
+            assert pd.isna(lote['ir_se'][i]) and pd.isna(lote['nivel_recuperacion'][i])
+            continue
+        individual = puntuar_suenyo_estres(respuestas)
+        assert abs(lote['ir_se'][i] - individual['ir_se']) < 1e-9
+        assert lote['nivel_recuperacion'][i] == individual['nivel_recuperacion']
+        rojas = sum(tipo.endswith("ROJA") for tipo, _, _ in individual['banderas'])
+        assert (lote['banderas_rojas'][i], lote['banderas_amarillas'][i]) == (
+            rojas, len(individual['banderas']) - rojas)
+
+    pesos = {'sueno': 0.5, 'estres': 0.5}
+    otro = puntuar_lote(pd.DataFrame(filas[:10]), pesos=pesos)
+    assert abs(otro['ir_se'][0] - puntuar_suenyo_estres(filas[0], pesos=pesos)['ir_se']) < 1e-9
+    print(f"✓ Lote vectorizado igual al individual ({len(lote)} evaluaciones, faltantes → NaN)")
+
+
+def test_percentiles():
+    poblacion = list(range(1, 101)) + [float('nan')]
+    assert percentiles_poblacion(poblacion, cortes=(50, 90)) == {50: 50.5, 90: 90.1}
+    assert rango_percentil(25, poblacion) == 25.0
+    assert rango_percentil(0, poblacion) == 0.0 and rango_percentil(100, poblacion) == 100.0
+    assert list(rango_percentil([10, 80], poblacion)) == [10.0, 80.0]
+    assert rango_percentil(50, []) is None and percentiles_poblacion([]) == {
+        10: None, 25: None, 50: None, 75: None, 90: None}
+    print("✓ Percentiles de población y percentil de un cliente")
+
+
+def test_repuntuar_historico():
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as tmp:
+        registro = RegistroEvaluaciones(os.path.join(tmp, 'evaluaciones.db'))
+        evaluaciones = []
+        for i in range(300):
+            respuestas = _respuestas_aleatorias(rng)
+            evaluaciones.append({'nombre': f"Cliente {i}", 'email': f"c{i}@example.com",
+                                 'suenyo_estres_data': {**respuestas, **puntuar_suenyo_estres(respuestas)}})
+        evaluaciones.append({'nombre': "Sin cuestionario", 'email': "x@example.com"})
+        registro.registrar_lote(evaluaciones)
+
+        igual = repuntuar_historico(registro)
+        assert len(igual) == 300
+        assert (igual['ir_se'] - igual['ir_se_anterior']).abs().max() < 1e-9
+        assert (igual['nivel_anterior'] == igual['nivel_recuperacion'].astype(str)).all()
+
+        antes = registro.agregados()['por_recuperacion']
+        pesos = {'sueno': 0.2, 'estres': 0.8}
+        version = registro.version()
+        nuevo = repuntuar_historico(registro, pesos=pesos, aplicar=True)
+        # Sin evaluaciones nuevas la versión cambia igual (caché del panel)
+        assert registro.version() != version
+        fila = registro.buscar(por_pagina=1000)['filas']
+        por_id = {f['id']: f for f in fila}
+        primero = nuevo.iloc[0]
+        assert abs(por_id[int(primero['id'])]['ir_se'] - primero['ir_se']) < 1e-9
+        # El JSON (obtener(), reportes reenviados) refleja la repuntuación
+        for _, fila_nueva in nuevo.iloc[[0, 150, -1]].iterrows():
+            guardada = registro.obtener(int(fila_nueva['id']))['suenyo_estres_data']
+            assert abs(guardada['ir_se'] - fila_nueva['ir_se']) < 1e-9
+            assert guardada['nivel_recuperacion'] == str(fila_nueva['nivel_recuperacion'])
+            assert guardada['emoji_nivel'] == NIVELES[guardada['nivel_recuperacion']][1]
+        assert 'suenyo_estres_data' not in registro.obtener(301) and 'ir_se' not in registro.obtener(1)
+        despues = registro.agregados()['por_recuperacion']
+        assert despues.sum() == antes.sum() == 300
+        assert despues.to_dict() == nuevo['nivel_recuperacion'].value_counts().to_dict()
+        assert len(registro.agregados()['ir_se']) == 300
+    print(f"✓ Histórico repuntuado con pesos nuevos (por nivel: {despues.to_dict()})")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_puntuacion_individual,
+        test_banderas,
+        test_lote_igual_a_individual,
+        test_percentiles,
+        test_repuntuar_historico,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
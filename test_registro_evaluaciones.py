@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Test para el registro de evaluaciones del panel de administración
+(registro_evaluaciones.py) y las acciones de administración de códigos.
+
+Valida:
+- Filtros por fecha, sexo, categoría, PSMF y recuperación con paginación
+- Consultas indexadas bajo 100 ms con decenas de miles de evaluaciones
+- Agregados vectorizados e incrementales (solo se leen las filas nuevas)
+- Marcos en memoria consistentes con varias sesiones concurrentes
+- Evaluación guardada lista para reenviar el reporte
+- Solicitudes pendientes y reemisión de códigos
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from codigos_acceso import CANJE_EXPIRADO, CANJE_OK, ServicioCodigos
+from registro_evaluaciones import RegistroEvaluaciones
+from reportes_lote import renderizar_reporte
+
+
+_DIA = 86400
+_INICIO = time.mktime((2026, 1, 1, 12, 0, 0, 0, 0, -1))
+
+
+def _evaluacion(i, rng):
+    sexo = rng.choice(["Hombre", "Mujer"])
+    return {
+        'nombre': f"Cliente {i}", 'email': f"cliente{i}@example.com", 'telefono': "8660000000",
+        'sexo': sexo, 'edad': rng.randint(18, 65), 'peso': round(rng.uniform(50, 110), 1),
+        'estatura': rng.randint(150, 195), 'grasa_corregida': round(rng.uniform(8, 40), 1),
+        'mlg': round(rng.uniform(40, 80), 1), 'ffmi': round(rng.uniform(15, 24), 1),
+        'categoria_bf': rng.choice(["Atlético", "Fitness", "Promedio", "Alto"]),
+        'psmf_aplicable': rng.random() < 0.3,
+        'suenyo_estres_data': {'nivel_recuperacion': rng.choice(["ALTA", "MEDIA", "BAJA"]),
+                               'ir_se': rng.randint(20, 95)},
+        'creado': _INICIO + (i % 120) * _DIA + i,
+    }
+
+
+def _registro_poblado(tmp, n):
+    rng = random.Random(7)
+    registro = RegistroEvaluaciones(os.path.join(tmp, 'evaluaciones.db'))
+    registro.registrar_lote([_evaluacion(i, rng) for i in range(n)])
+    return registro
+
+
+def test_filtros_y_paginacion():
+    with tempfile.TemporaryDirectory() as tmp:
+        registro = _registro_poblado(tmp, 500)
+        todo = registro.buscar(por_pagina=50)
+        assert todo['total'] == 500 and todo['paginas'] == 10 and len(todo['filas']) == 50
+        ultima = registro.buscar(pagina=99, por_pagina=50)
+        assert ultima['pagina'] == 10
+
+        filtrado = registro.buscar(sexo="Mujer", psmf_aplicable=True, nivel_recuperacion="BAJA", por_pagina=1000)
+        assert filtrado['total'] == len(filtrado['filas']) > 0
+        assert all(f['sexo'] == "Mujer" and f['psmf_aplicable'] == 1 and f['nivel_recuperacion'] == "BAJA"
+                   for f in filtrado['filas'])
+        creados = [f['fecha'] for f in todo['filas']]
+        assert creados == sorted(creados, reverse=True)
+
+        en_rango = registro.buscar(desde="2026-01-10", hasta="2026-01-19", por_pagina=1000)
+        assert en_rango['total'] > 0 and all("2026-01-10" <= f['fecha'] <= "2026-01-19" for f in en_rango['filas'])
+
+        valores = registro.valores_filtro()
+        assert valores['nivel_recuperacion'] == ["ALTA", "BAJA", "MEDIA"]
+    print("✓ Filtros combinados y paginación")
+
+
+def test_consultas_rapidas_con_muchas_evaluaciones():
+    with tempfile.TemporaryDirectory() as tmp:
+        registro = _registro_poblado(tmp, 30_000)
+        registro.agregados()  # carga inicial del marco (incluye importar pandas)
+
+        consultas = [
+            {},
+            {'sexo': "Mujer"},
+            {'categoria_bf': "Alto", 'psmf_aplicable': True},
+            {'nivel_recuperacion': "BAJA", 'desde': "2026-02-01", 'hasta': "2026-02-28"},
+        ]
+        peor = 0.0
+        for filtros in consultas:
+            inicio = time.perf_counter()
+            registro.buscar(pagina=3, **filtros)
+            registro.agregados(**filtros)
+            peor = max(peor, (time.perf_counter() - inicio) * 1000)
+        assert peor < 100, f"{peor:.1f} ms"
+
+        with sqlite3.connect(registro.ruta_db) as con:
+            plan = " ".join(str(f) for f in con.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM evaluaciones WHERE sexo = 'Mujer' ORDER BY creado DESC LIMIT 50"))
+        assert "USING INDEX" in plan or "USING COVERING INDEX" in plan, plan
+    print(f"✓ 30.000 evaluaciones: listado + agregados en {peor:.1f} ms (peor caso)")
+
+
+def test_agregados_incrementales():
+    with tempfile.TemporaryDirectory() as tmp:
+        registro = _registro_poblado(tmp, 200)
+        antes = registro.agregados()
+        assert int(antes['por_sexo']['evaluaciones'].sum()) == 200
+        marco = registro._marco
+        version = registro.version()
+
+        registro.registrar({'nombre': "Nueva", 'email': "nueva@example.com", 'sexo': "Mujer",
+                            'grasa_corregida': 25.0, 'categoria_bf': "Fitness", 'psmf_aplicable': False,
+                            'suenyo_estres_data': {'nivel_recuperacion': "ALTA"}})
+        despues = registro.agregados()
+        assert int(despues['por_sexo']['evaluaciones'].sum()) == 201
+        assert registro._marco is not marco and len(registro._marco) == 201
+        assert registro.version() != version and registro.version() == registro.version()
+        # Sin filas nuevas se reutiliza el marco en memoria
+        registro.agregados(sexo="Mujer")
+        assert len(registro._marco) == 201
+
+        solo_psmf = registro.agregados(psmf_aplicable=True)
+        assert set(solo_psmf['por_sexo']['pct_psmf']) == {100.0}
+    print("✓ Agregados por group-by, extendidos solo con filas nuevas")
+
+
+def test_agregados_con_sesiones_concurrentes():
+    """Varias sesiones registran y leen agregados a la vez sobre el mismo registro."""
+    with tempfile.TemporaryDirectory() as tmp:
+        registro = _registro_poblado(tmp, 100)
+        hilos, por_hilo = 8, 25
+        barrera = threading.Barrier(hilos)
+
+        def sesion(h):
+            rng = random.Random(h)
+            barrera.wait()
+            for i in range(por_hilo):
+                registro.registrar(_evaluacion(1000 + h * por_hilo + i, rng))
+                registro.agregados()
+                registro.datos_composicion()
+
+        trabajadores = [threading.Thread(target=sesion, args=(h,)) for h in range(hilos)]
+        for t in trabajadores:
+            t.start()
+        for t in trabajadores:
+            t.join()
+
+        total = 100 + hilos * por_hilo
+        assert int(registro.agregados()['por_sexo']['evaluaciones'].sum()) == total
+        composicion = registro.datos_composicion()
+        assert len(composicion) == total and composicion['id'].is_unique
+    print(f"✓ {hilos} sesiones concurrentes: marcos sin filas duplicadas ({total})")
+
+
+def test_evaluacion_guardada_se_puede_reenviar():
+    with tempfile.TemporaryDirectory() as tmp:
+        registro = RegistroEvaluaciones(os.path.join(tmp, 'evaluaciones.db'))
+        id_evaluacion = registro.registrar(_evaluacion(1, random.Random(1)))
+        evaluacion = registro.obtener(id_evaluacion)
+        assert evaluacion['suenyo_estres_data']['ir_se'] is not None
+        eml = renderizar_reporte(evaluacion, 'cliente', 'eml')
+        assert b"cliente1@example.com" in eml
+
+        registro.marcar_reenvio(id_evaluacion)
+        assert registro.buscar()['filas'][0]['reenvios'] == 1
+        assert registro.obtener(999) is None
+    print("✓ Evaluación guardada lista para reenviar el reporte")
+
+
+def test_solicitudes_pendientes_y_reemision():
+    with tempfile.TemporaryDirectory() as tmp:
+        servicio = ServicioCodigos(os.path.join(tmp, 'codigos.db'), max_solicitudes=1)
+        anterior, _ = servicio.emitir("Ana", "ana@example.com", "8661234567")
+        usado, _ = servicio.emitir("Beto", "beto@example.com")
+        servicio.canjear(usado)
+
+        pendientes = servicio.solicitudes_pendientes()
+        assert pendientes['total'] == 1 and pendientes['filas'][0]['email'] == "ana@example.com"
+
+        # La reemisión ignora el límite de solicitudes e invalida el código anterior
+        nuevo = servicio.reemitir("ANA@example.com")
+        assert nuevo and nuevo != anterior
+        assert servicio.canjear(anterior) == (False, CANJE_EXPIRADO)
+        assert servicio.canjear(nuevo, "ana@example.com") == (True, CANJE_OK)
+        assert servicio.reemitir("nadie@example.com") is None
+    print("✓ Solicitudes pendientes y reemisión de código")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_filtros_y_paginacion,
+        test_consultas_rapidas_con_muchas_evaluaciones,
+        test_agregados_incrementales,
+        test_agregados_con_sesiones_concurrentes,
+        test_evaluacion_guardada_se_puede_reenviar,
+        test_solicitudes_pendientes_y_reemision,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
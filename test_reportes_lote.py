@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test para la generación de reportes por lote (reportes_lote.py) y las
+plantillas de email compartidas con la app (plantillas_email.py).
+
+Valida:
+- Email cliente y Parte 2 comparten el HTML; Parte 2 agrega el encabezado interno
+- Ciclo menstrual y sueño/estrés llegan como parámetros (sin session_state)
+- Parte 2 funciona sin medidas opcionales (cuello, cadera, WtHR, TMB)
+- Lote en pool de procesos: un archivo por cliente y tipo, progreso reportado
+- Salida .eml con asunto y destinatario correctos
+"""
+
+import email
+import email.policy
+import json
+import os
+import sys
+import tempfile
+
+from motor_calculo import evaluar_cliente
+from plantillas_email import construir_email_cliente, construir_email_parte2, cargar_logos_email
+from reportes_lote import generar_reportes_lote, leer_evaluaciones, preparar_argumentos
+
+
+BASE = dict(nombre_cliente="Ana López", fecha="2026-03-01", edad=30, sexo="Mujer", peso=62.0,
+            estatura=165.0, imc=22.8, grasa_corregida=27.0, mlg=45.3, ffmi=16.6,
+            nivel_entrenamiento="intermedio", edad_metabolica=31)
+
+
+def _evaluaciones(n):
+    evaluaciones = []
+    for i in range(n):
+        ev = evaluar_cliente({'sexo': "Hombre" if i % 2 else "Mujer", 'edad': 25 + i % 30,
+                              'peso': 60 + i % 40, 'estatura': 160 + i % 30, 'grasa_corporal': 15 + i % 20})
+        ev['nombre'] = f"Cliente {i}"
+        ev['email'] = f"cliente{i}@example.com"
+        evaluaciones.append(ev)
+    return evaluaciones
+
+
+def test_cliente_y_parte2_comparten_html():
+    asunto, texto, html = construir_email_cliente(
+        **BASE, ciclo_menstrual="Fase folicular",
+        suenyo_estres_data={'ir_se': 62.5, 'nivel_recuperacion': "Media", 'emoji_nivel': "🟡",
+                            'sleep_score': 70, 'stress_score': 40})
+    assert asunto == "Resultados de tu Evaluación Corporal - Ana López"
+    assert "Fase del ciclo menstrual: Fase folicular" in texto
+    assert "ÍNDICE DE RECUPERACIÓN (IR-SE): 62.5/100" in texto
+    assert "REPORTE DE EVALUACIÓN CORPORAL" in html and "CONFIDENCIAL" not in html
+
+    asunto2, texto2, html2 = construir_email_parte2(**BASE, ciclo_menstrual="Fase folicular")
+    assert asunto2.startswith("[COPIA INTERNA]")
+    assert "REPORTE DE EVALUACIÓN — PARTE 2" in texto2
+    assert "REPORTE INTERNO — PARTE 2" in html2 and "CONFIDENCIAL - USO INTERNO" in html2
+    # Mismo logo (cargado una vez por proceso) en ambos
+    assert cargar_logos_email()[0][:50] in html and cargar_logos_email()[0][:50] in html2
+    print("✓ Email cliente y Parte 2 construidos desde la misma plantilla")
+
+
+def test_parte2_sin_medidas_opcionales():
+    """Antes fallaba con NameError (cuello/cadera) o TypeError (WtHR/TMB None)."""
+    _, texto, _ = construir_email_parte2(**BASE)
+    assert "Circunferencia de cuello: [____]" in texto
+    assert "Ratio Cintura-Altura (WtHR): [____]" in texto
+    print("✓ Parte 2 sin medidas opcionales")
+
+
+def test_preparar_argumentos_desde_evaluacion():
+    ev = _evaluaciones(1)[0]
+    args = preparar_argumentos(ev, 'parte2')
+    assert args['nombre_cliente'] == "Cliente 0"
+    assert args['tmb'] == ev['tmb'] and 'macros' not in args
+    print("✓ Evaluaciones guardadas convertidas a argumentos de plantilla")
+
+
+def test_lote_en_pool_con_progreso():
+    evaluaciones = _evaluaciones(60)
+    avances = []
+    with tempfile.TemporaryDirectory() as tmp:
+        resultado = generar_reportes_lote(evaluaciones, tmp, tipos=('cliente', 'parte2'), workers=2,
+                                          progreso=lambda hechos, total: avances.append((hechos, total)))
+        assert resultado['errores'] == []
+        assert len(resultado['archivos']) == 120
+        assert sorted(os.listdir(tmp)) == resultado['archivos']
+        assert resultado['archivos'][0] == "00001_cliente_0_cliente.html"
+        with open(os.path.join(tmp, "00002_cliente_1_parte2.html"), encoding='utf-8') as f:
+            assert "Cliente 1" in f.read()
+    assert avances[-1] == (60, 60)
+    print(f"✓ 120 reportes generados en pool, {len(avances)} avisos de progreso")
+
+
+def test_salida_eml_y_lectura_jsonl():
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'evaluaciones.jsonl')
+        with open(ruta, 'w', encoding='utf-8') as f:
+            for ev in _evaluaciones(3):
+                f.write(json.dumps(ev, ensure_ascii=False, default=list) + "\n")
+        evaluaciones = leer_evaluaciones(ruta)
+        salida = os.path.join(tmp, 'eml')
+        resultado = generar_reportes_lote(evaluaciones, salida, tipos=('cliente',), formato='eml', workers=1)
+        with open(os.path.join(salida, resultado['archivos'][2]), 'rb') as f:
+            msg = email.message_from_binary_file(f, policy=email.policy.default)
+        assert msg['To'] == "cliente2@example.com"
+        assert "Cliente 2" in msg['Subject']
+        assert [p.get_content_type() for p in msg.iter_parts()] == ['text/plain', 'text/html']
+    print("✓ Reportes .eml desde evaluaciones .jsonl")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_cliente_y_parte2_comparten_html,
+        test_parte2_sin_medidas_opcionales,
+        test_preparar_argumentos_desde_evaluacion,
+        test_lote_en_pool_con_progreso,
+        test_salida_eml_y_lectura_jsonl,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
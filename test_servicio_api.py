@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Test para el servicio API de evaluación (servicio_api.py).
+
+Valida:
+- /evaluate devuelve la evaluación completa del motor
+- Errores de validación con 422 y detalle por campo
+- Muñeca y tobillo medidos llegan al potencial muscular (marco medido)
+- /evaluate/batch en un proceso del pool o repartido entre varios
+- /psmf y /macros (con y sin ingesta explícita)
+- /goal con meta de % grasa o de peso
+- Los cálculos corren en el pool sin bloquear el event loop
+- Rutas y métodos no válidos, JSON inválido y /health
+"""
+
+import asyncio
+import json
+import sys
+
+import servicio_api
+from servicio_api import app, validar_datos_evaluacion
+from motor_calculo import evaluar_cliente
+
+
+CLIENTE = {
+    'nombre': "Juan Pérez",
+    'email': "juan@example.com",
+    'sexo': "Hombre",
+    'edad': 32,
+    'peso': 85,
+    'estatura': 178,
+    'grasa_corporal': 22,
+    'metodo_grasa': "Omron HBF-516 (BIA)",
+    'nivel_entrenamiento': "intermedio",
+    'nivel_actividad': "Activo",
+    'dias_fuerza': 4,
+}
+
+
+def llamar(metodo, ruta, cuerpo=None, crudo=None):
+    """Cliente ASGI mínimo: envía una solicitud a `app` y devuelve (estado, json)."""
+    datos = crudo if crudo is not None else json.dumps(cuerpo or {}).encode('utf-8')
+    mensajes = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': datos, 'more_body': False}
+
+    async def send(mensaje):
+        mensajes.append(mensaje)
+
+    scope = {'type': 'http', 'method': metodo, 'path': ruta, 'headers': []}
+    asyncio.run(app(scope, receive, send))
+    estado = mensajes[0]['status']
+    return estado, json.loads(mensajes[1]['body'].decode('utf-8'))
+
+
+def test_evaluate_coincide_con_motor():
+    """/evaluate devuelve lo mismo que evaluar_cliente()."""
+    estado, r = llamar('POST', '/evaluate', CLIENTE)
+    assert estado == 200 and r['ok']
+    esperado = evaluar_cliente(validar_datos_evaluacion(CLIENTE)[0])
+    assert r['resultado']['ffmi'] == esperado['ffmi']
+    assert r['resultado']['ingesta_calorica'] == esperado['ingesta_calorica']
+    assert 'macros' in r['resultado'] and 'psmf' in r['resultado']
+    print(f"✓ /evaluate: FFMI {r['resultado']['ffmi']}, ingesta {r['resultado']['ingesta_calorica']} kcal")
+
+
+def test_errores_de_validacion():
+    """Datos fuera de rango o inválidos devuelven 422 con el campo afectado."""
+    malo = dict(CLIENTE, peso=500, sexo="Otro", email="no-es-email", metodo_grasa="Báscula")
+    del malo['estatura']
+    estado, r = llamar('POST', '/evaluate', malo)
+    assert estado == 422 and not r['ok']
+    campos = {e['campo'] for e in r['errores']}
+    assert campos == {'peso', 'sexo', 'email', 'metodo_grasa', 'estatura'}
+
+    estado, r = llamar('POST', '/evaluate', dict(CLIENTE, edad="treinta"))
+    assert estado == 422 and r['errores'][0]['campo'] == 'edad'
+    print("✓ Validación con 422 y detalle por campo")
+
+
+def test_marco_oseo_medido():
+    """Con muñeca y tobillo el potencial usa el marco medido, no el estimado por estatura."""
+    estado, r = llamar('POST', '/evaluate', dict(CLIENTE, circunferencia_muneca=19, circunferencia_tobillo=25))
+    assert estado == 200
+    medido = r['resultado']['potencial_muscular']
+    estimado = llamar('POST', '/evaluate', CLIENTE)[1]['resultado']['potencial_muscular']
+    assert medido['marco_medido'] and not estimado['marco_medido']
+    assert medido['ffmi_max'] != estimado['ffmi_max']
+
+    estado, r = llamar('POST', '/evaluate', dict(CLIENTE, circunferencia_muneca=40))
+    assert estado == 422 and r['errores'][0]['campo'] == 'circunferencia_muneca'
+    print(f"✓ Marco óseo medido: FFMI máximo {medido['ffmi_max']:.1f} (estimado {estimado['ffmi_max']:.1f})")
+
+
+def test_batch_en_proceso_y_en_pool():
+    """Los lotes pequeños van a un proceso del pool y los grandes se reparten."""
+    lote = [dict(CLIENTE, peso=60 + i) for i in range(5)] + [dict(CLIENTE, peso=10)]
+    estado, r = llamar('POST', '/evaluate/batch', {'evaluaciones': lote})
+    assert estado == 200
+    assert r['total'] == 6 and r['validos'] == 5
+    assert r['resultados'][-1]['ok'] is False
+
+    grande = [dict(CLIENTE, peso=60 + (i % 80)) for i in range(servicio_api.MIN_LOTE_PARA_REPARTIR * 2)]
+    try:
+        estado, r = llamar('POST', '/evaluate/batch', {'evaluaciones': grande})
+    finally:
+        servicio_api.cerrar_pool()
+    assert estado == 200 and r['validos'] == len(grande)
+    # El orden del lote se conserva
+    assert [x['resultado']['peso'] for x in r['resultados']] == [d['peso'] for d in grande]
+    print(f"✓ Lote de {len(grande)} evaluaciones procesado en el pool")
+
+
+def test_batch_invalido():
+    estado, _ = llamar('POST', '/evaluate/batch', {'evaluaciones': "x"})
+    assert estado == 422
+    print("✓ Lote sin lista rechazado")
+
+
+def test_psmf_y_macros():
+    """/psmf y /macros responden con los cálculos del motor."""
+    estado, r = llamar('POST', '/psmf', dict(CLIENTE, grasa_corporal=32))
+    assert estado == 200 and 'psmf_aplicable' in r['resultado']
+
+    estado, r = llamar('POST', '/macros', CLIENTE)
+    assert estado == 200 and r['ingesta_kcal'] > 0
+
+    estado, r = llamar('POST', '/macros', dict(CLIENTE, ingesta_kcal=2200))
+    assert estado == 200 and r['ingesta_kcal'] == 2200
+    m = r['resultado']
+    assert abs(m['proteina_kcal'] + m['grasa_kcal'] + m['carbo_kcal'] - 2200) < 50
+
+    estado, _ = llamar('POST', '/macros', dict(CLIENTE, ingesta_kcal=100))
+    assert estado == 422
+    print("✓ /psmf y /macros correctos")
+
+
+def test_goal():
+    """/goal resuelve semanas y déficit para la meta pedida."""
+    estado, r = llamar('POST', '/goal', dict(CLIENTE, grasa_objetivo=15, semanas_objetivo=40))
+    assert estado == 200 and r['ok']
+    assert r['resultado']['direccion'] == "pérdida" and r['resultado']['pareto']
+
+    estado, r = llamar('POST', '/goal', CLIENTE)
+    assert estado == 422 and r['errores'][0]['campo'] == 'grasa_objetivo'
+    estado, _ = llamar('POST', '/goal', dict(CLIENTE, grasa_objetivo=15, peso_objetivo=80))
+    assert estado == 422
+    estado, _ = llamar('POST', '/goal', dict(CLIENTE, peso_objetivo=500))
+    assert estado == 422
+    print("✓ /goal correcto")
+
+
+def test_calculo_no_bloquea_el_event_loop():
+    """Mientras /evaluate calcula, el loop sigue atendiendo otras tareas."""
+    async def escenario():
+        vueltas = 0
+        tarea = asyncio.ensure_future(servicio_api.manejar_evaluate(dict(CLIENTE, estrategia="con_incertidumbre")))
+        while not tarea.done():
+            vueltas += 1
+            await asyncio.sleep(0)
+        return vueltas, await tarea
+
+    try:
+        vueltas, (estado, _) = asyncio.run(escenario())
+    finally:
+        servicio_api.cerrar_pool()
+    assert estado == 200
+    # Un cálculo síncrono terminaría antes de que el loop diera una segunda vuelta
+    assert vueltas > 1
+    print(f"✓ Event loop libre durante el cálculo ({vueltas} vueltas)")
+
+
+def test_rutas_metodos_y_json():
+    assert llamar('GET', '/health')[0] == 200
+    assert llamar('POST', '/no-existe', {})[0] == 404
+    assert llamar('GET', '/evaluate')[0] == 405
+    assert llamar('POST', '/evaluate', crudo=b'{no json')[0] == 400
+    print("✓ 404 / 405 / 400 y /health correctos")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_evaluate_coincide_con_motor,
+        test_errores_de_validacion,
+        test_marco_oseo_medido,
+        test_batch_en_proceso_y_en_pool,
+        test_batch_invalido,
+        test_psmf_y_macros,
+        test_goal,
+        test_calculo_no_bloquea_el_event_loop,
+        test_rutas_metodos_y_json,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
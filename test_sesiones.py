@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Test para la persistencia de sesiones en servidor (sesiones.py).
+
+Valida:
+- Checkpoint incremental: solo se escriben las secciones que cambiaron
+- La autenticación no se persiste: el token de la URL no salta el código de acceso
+- Otra réplica (otro almacén sobre la misma base) reanuda la sesión
+- Fotos guardadas una vez por contenido y leídas bajo demanda
+- Purga de sesiones vencidas y fotos sin referencias
+- Selección de backend por URL
+- Archivos subidos derramados a disco y memoria contabilizada por sesión
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+from sesiones import (
+    AlmacenSQLite,
+    FotoAlmacenada,
+    crear_almacen,
+    derramar_archivo,
+    guardar_estado,
+    medir_estado,
+    nuevo_id_sesion,
+    purgar_periodicamente,
+    registrar_almacen,
+    restaurar_estado,
+)
+
+
+class _ArchivoSubido(io.BytesIO):
+    """Imita streamlit UploadedFile (BytesIO con name/type/size/file_id)."""
+
+    def __init__(self, contenido, name, file_id):
+        super().__init__(contenido)
+        self.name = name
+        self.type = 'image/jpeg'
+        self.size = len(contenido)
+        self.file_id = file_id
+
+
+def _estado_inicial():
+    return {
+        'authenticated': True,
+        'access_stage': "authenticated",
+        'code_used': True,
+        'access_user_email': "ana@example.com",
+        'flow_phase': 'intake',
+        'nombre': "Ana López",
+        'peso': 62.5,
+        'fecha_llenado': date(2026, 3, 1),
+        'datos_ejercicios': {'flexiones': 20, 'dominadas': 4},
+        'suenyo_estres_data': {'horas_sueno': '7-8 horas'},
+        'widget_no_persistido': object(),
+    }
+
+
+def test_checkpoint_incremental_y_reanudacion_en_otra_replica():
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'sesiones.db')
+        replica_a = AlmacenSQLite(ruta)
+        id_sesion = nuevo_id_sesion()
+        estado = _estado_inicial()
+
+        escritas = guardar_estado(replica_a, id_sesion, estado)
+        assert {'acceso', 'flujo', 'datos_personales', 'ejercicios', 'suenyo_estres'} <= set(escritas)
+        # Sin cambios: no se escribe nada
+        assert guardar_estado(replica_a, id_sesion, estado) == []
+        estado['datos_ejercicios']['dominadas'] = 6
+        assert guardar_estado(replica_a, id_sesion, estado) == ['ejercicios']
+
+        # La conexión se cae; otra réplica reanuda con el token
+        replica_b = AlmacenSQLite(ruta)
+        nuevo = {}
+        restauradas = restaurar_estado(replica_b, id_sesion, nuevo)
+        assert 'ejercicios' in restauradas
+        assert nuevo['datos_ejercicios'] == {'flexiones': 20, 'dominadas': 6}
+        assert nuevo['fecha_llenado'] == date(2026, 3, 1) and nuevo['peso'] == 62.5
+        assert 'widget_no_persistido' not in nuevo
+        # Con el token solo se reanudan las respuestas; el acceso se vuelve a canjear
+        assert nuevo['access_user_email'] == "ana@example.com"
+        assert not {'authenticated', 'access_stage', 'code_used'} & set(nuevo)
+        # Tras restaurar no hay nada pendiente de escribir
+        assert guardar_estado(replica_b, id_sesion, nuevo) == []
+        assert restaurar_estado(replica_b, nuevo_id_sesion(), {}) == []
+    print("✓ Checkpoint incremental y reanudación desde otra réplica")
+
+
+def test_fotos_por_contenido_bajo_demanda():
+    with tempfile.TemporaryDirectory() as tmp:
+        almacen = AlmacenSQLite(os.path.join(tmp, 'sesiones.db'))
+        contenido = b'\xff\xd8' + os.urandom(50_000)
+        estado = {'progress_photos': {
+            'front_relaxed': _ArchivoSubido(contenido, 'frente.jpg', 'f1'),
+            'side_relaxed_right': _ArchivoSubido(contenido, 'lado.jpg', 'f2'),
+            'pose_libre': None,
+        }}
+        guardar_estado(almacen, 's1', estado)
+        archivos = [os.path.join(r, n) for r, _, ns in os.walk(almacen.directorio_fotos) for n in ns]
+        assert len(archivos) == 1, "El mismo contenido se guarda una sola vez"
+
+        restaurado = {}
+        restaurar_estado(almacen, 's1', restaurado)
+        foto = restaurado['progress_photos']['front_relaxed']
+        assert isinstance(foto, FotoAlmacenada)
+        assert foto.name == 'frente.jpg' and foto.size == len(contenido)
+        assert restaurado['progress_photos']['pose_libre'] is None
+        # Uso de attach_progress_photos_to_email: seek/read/seek
+        foto.seek(0)
+        assert foto.read() == contenido
+        foto.seek(0)
+        assert foto.read(2) == b'\xff\xd8'
+    print("✓ Fotos guardadas por hash y leídas bajo demanda")
+
+
+def test_purga_de_sesiones_vencidas():
+    with tempfile.TemporaryDirectory() as tmp:
+        almacen = AlmacenSQLite(os.path.join(tmp, 'sesiones.db'))
+        guardar_estado(almacen, 'vieja', {'progress_photos': {'front_relaxed': _ArchivoSubido(b'a' * 10, 'a.jpg', 'a')}})
+        guardar_estado(almacen, 'actual', {'nombre': "Activo"})
+        hace_un_mes = time.time() - 30 * 86400
+        with almacen._conexion() as con:
+            con.execute("UPDATE secciones SET actualizado = ? WHERE id_sesion = 'vieja'", (hace_un_mes,))
+        for raiz, _, nombres in os.walk(almacen.directorio_fotos):
+            for nombre in nombres:
+                os.utime(os.path.join(raiz, nombre), (hace_un_mes, hace_un_mes))
+
+        assert almacen.purgar(ttl_dias=14) == 1
+        assert almacen.cargar_secciones('vieja') == {}
+        assert almacen.cargar_secciones('actual') != {}
+        assert [n for _, _, ns in os.walk(almacen.directorio_fotos) for n in ns] == []
+    print("✓ Purga de sesiones vencidas y fotos huérfanas")
+
+
+def test_backend_por_url():
+    with tempfile.TemporaryDirectory() as tmp:
+        almacen = crear_almacen(f"sqlite:///{os.path.join(tmp, 'x.db')}")
+        assert isinstance(almacen, AlmacenSQLite)
+
+        class _AlmacenPrueba(AlmacenSQLite):
+            def __init__(self, resto):
+                super().__init__(os.path.join(tmp, resto))
+
+        registrar_almacen('prueba', _AlmacenPrueba)
+        assert isinstance(crear_almacen('prueba://y.db'), _AlmacenPrueba)
+    try:
+        crear_almacen('redis://localhost')
+    except ValueError:
+        pass
+    else:
+        assert False, "Esquema no registrado debía fallar"
+    print("✓ Backend elegido por URL y registrable")
+
+
+def test_derrame_y_memoria_por_sesion():
+    with tempfile.TemporaryDirectory() as tmp:
+        almacen = AlmacenSQLite(os.path.join(tmp, 'sesiones.db'))
+        subido = _ArchivoSubido(os.urandom(3 * 1024 * 1024), 'frente.jpg', 'f1')
+        estado = {'nombre': "Ana", 'progress_photos': {'front_relaxed': subido}}
+        antes = medir_estado(estado, presupuesto=1024 * 1024)
+        assert antes['excedido'] and antes['por_clave'][0][0] == 'progress_photos'
+
+        foto = derramar_archivo(almacen, subido, estado)
+        assert derramar_archivo(almacen, subido, estado).hash_contenido == foto.hash_contenido
+        assert not foto.restaurada and foto.getvalue() == subido.getvalue()
+        estado['progress_photos']['front_relaxed'] = foto
+        despues = medir_estado(estado, presupuesto=1024 * 1024)
+        assert not despues['excedido'] and despues['total'] < 64 * 1024
+
+        # La purga periódica corre una vez por intervalo
+        assert purgar_periodicamente(almacen, intervalo=3600) == 0
+        assert purgar_periodicamente(almacen, intervalo=3600) is None
+    print(f"✓ Foto derramada a disco: {antes['total'] // 1024} KB → {despues['total'] // 1024} KB en sesión")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_checkpoint_incremental_y_reanudacion_en_otra_replica,
+        test_fotos_por_contenido_bajo_demanda,
+        test_purga_de_sesiones_vencidas,
+        test_backend_por_url,
+        test_derrame_y_memoria_por_sesion,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test para la instrumentación de latencia por fase (trazas.py).
+
+Valida:
+- span() registra duración, rerun y span padre en el registro activo
+- Sin registro activo, span() y trazar() no registran nada
+- Histogramas por nombre con conteo, percentiles y cubetas
+- Errores dentro del span se registran y se propagan
+- Exportación JSON-lines completa e incremental
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+import trazas
+from trazas import RegistroTrazas, activar_registro, obtener_registro, span, trazar
+
+
+def test_span_anidado_en_registro_activo():
+    registro = RegistroTrazas()
+    activar_registro(registro)
+    try:
+        registro.nuevo_rerun()
+        with span("email.envio", tipo="cliente"):
+            with span("email.smtp"):
+                time.sleep(0.002)
+        nombres = [s['nombre'] for s in registro.spans]
+        assert nombres == ["email.smtp", "email.envio"]
+        smtp, envio = registro.spans
+        assert smtp['padre'] == "email.envio" and envio['padre'] is None
+        assert smtp['duracion_ms'] >= 2 and envio['duracion_ms'] >= smtp['duracion_ms']
+        assert envio['rerun'] == 1 and envio['atributos'] == {'tipo': "cliente"}
+    finally:
+        activar_registro(None)
+    print("✓ Spans anidados con padre, rerun y atributos")
+
+
+def test_sin_registro_activo_no_registra():
+    activar_registro(None)
+
+    @trazar("motor.prueba")
+    def sumar(a, b):
+        return a + b
+
+    with span("ui.css"):
+        pass
+    assert sumar(2, 3) == 5
+    assert trazas.registro_activo() is None
+    print("✓ Sin registro activo: span() y trazar() no registran")
+
+
+def test_histogramas_y_decorador():
+    registro = RegistroTrazas()
+    activar_registro(registro)
+    try:
+        @trazar("motor.macros")
+        def calcular():
+            return 42
+
+        for _ in range(10):
+            assert calcular() == 42
+        for duracion in (0.5, 3, 30, 300, 9000):
+            registro.registrar("ui.progreso", duracion)
+
+        resumen = registro.histogramas()
+        assert resumen["motor.macros"]['conteo'] == 10
+        progreso = resumen["ui.progreso"]
+        assert progreso['conteo'] == 5 and progreso['max_ms'] == 9000
+        assert progreso['p50_ms'] == 30
+        assert progreso['cubetas']['<=1'] == 1 and progreso['cubetas']['>5000'] == 1
+        # Ordenado por tiempo total: el más costoso primero
+        assert list(resumen)[0] == "ui.progreso"
+    finally:
+        activar_registro(None)
+    print("✓ Histogramas por fase con percentiles y cubetas")
+
+
+def test_error_se_registra_y_propaga():
+    registro = RegistroTrazas()
+    try:
+        with registro.span("email.smtp"):
+            raise ConnectionError("sin red")
+    except ConnectionError:
+        pass
+    else:
+        assert False, "El error debía propagarse"
+    assert registro.spans[-1]['error'] == "ConnectionError"
+    print("✓ Errores dentro del span registrados y propagados")
+
+
+def test_exportar_jsonl_incremental():
+    estado = {}
+    registro = obtener_registro(estado)
+    assert obtener_registro(estado) is registro
+    registro.registrar("ui.css", 1.5)
+    registro.registrar("ui.fotos", 8.0)
+    texto = registro.exportar_jsonl()
+    assert [json.loads(l)['nombre'] for l in texto.splitlines()] == ["ui.css", "ui.fotos"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'trazas.jsonl')
+        registro.registrar("email.mime", 0.7)
+        assert registro.exportar_jsonl(ruta, solo_nuevos=True) == 1
+        assert registro.exportar_jsonl(ruta, solo_nuevos=True) == 0
+        with open(ruta, encoding='utf-8') as f:
+            assert [json.loads(l)['nombre'] for l in f] == ["email.mime"]
+    print("✓ Exportación JSON-lines completa e incremental")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_span_anidado_en_registro_activo,
+        test_sin_registro_activo_no_registra,
+        test_histogramas_y_decorador,
+        test_error_se_registra_y_propaga,
+        test_exportar_jsonl_incremental,
+    ]
+    fallos = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            fallos += 1
+            print(f"✗ {test.__name__}: {e}")
+    sys.exit(1 if fallos else 0)
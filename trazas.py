@@ -0,0 +1,206 @@
+"""
+Trazas de Latencia MUPAI - Instrumentación por fase
+
+Capa ligera de medición para saber qué parte de cada rerun o envío es lenta
+(inyección de CSS, motor de cálculo, progreso dinámico, fotos, construcción
+del email, MIME, SMTP).
+
+- span(nombre): context manager con temporizador monotónico (perf_counter)
+- trazar(nombre): decorador equivalente para funciones
+- RegistroTrazas: acumula los spans de una sesión en histogramas por nombre
+  y exporta JSON-lines para análisis offline
+- activar_registro(): fija el registro de la sesión actual (ContextVar, cada
+  sesión de Streamlit corre en su propio hilo)
+
+Si no hay registro activo, span() no registra nada y su costo es mínimo.
+Este módulo no depende de Streamlit.
+"""
+
+import bisect
+import contextvars
+import functools
+import io
+import json
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+
+
+# Límites superiores (ms) de las cubetas del histograma; la última es abierta
+LIMITES_HISTOGRAMA_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Muestras conservadas por nombre para percentiles y spans para exportar
+MAX_MUESTRAS_POR_NOMBRE = 500
+MAX_SPANS = 1000
+
+_registro_activo = contextvars.ContextVar('registro_trazas', default=None)
+
+
+class _Histograma:
+    __slots__ = ('conteo', 'total_ms', 'min_ms', 'max_ms', 'cubetas', 'muestras')
+
+    def __init__(self):
+        self.conteo = 0
+        self.total_ms = 0.0
+        self.min_ms = float('inf')
+        self.max_ms = 0.0
+        self.cubetas = [0] * (len(LIMITES_HISTOGRAMA_MS) + 1)
+        self.muestras = deque(maxlen=MAX_MUESTRAS_POR_NOMBRE)
+
+    def agregar(self, duracion_ms):
+        self.conteo += 1
+        self.total_ms += duracion_ms
+        self.min_ms = min(self.min_ms, duracion_ms)
+        self.max_ms = max(self.max_ms, duracion_ms)
+        self.cubetas[bisect.bisect_left(LIMITES_HISTOGRAMA_MS, duracion_ms)] += 1
+        self.muestras.append(duracion_ms)
+
+    def percentil(self, p):
+        ordenadas = sorted(self.muestras)
+        if not ordenadas:
+            return 0.0
+        return ordenadas[min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))]
+
+
+class RegistroTrazas:
+    """Spans e histogramas de latencia de una sesión."""
+
+    def __init__(self):
+        self.rerun = 0
+        self.spans = deque(maxlen=MAX_SPANS)
+        self._histogramas = defaultdict(_Histograma)
+        self._pila = []
+        self._exportados = 0
+
+    def nuevo_rerun(self):
+        """Marca el inicio de un rerun (los spans siguientes llevan este número)."""
+        self.rerun += 1
+        self._pila.clear()
+        return self.rerun
+
+    @contextmanager
+    def span(self, nombre, **atributos):
+        padre = self._pila[-1] if self._pila else None
+        self._pila.append(nombre)
+        inicio = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duracion_ms = (time.perf_counter() - inicio) * 1000
+            if self._pila and self._pila[-1] == nombre:
+                self._pila.pop()
+            self.registrar(nombre, duracion_ms, padre=padre, error=error, **atributos)
+
+    def registrar(self, nombre, duracion_ms, padre=None, error=None, **atributos):
+        self._histogramas[nombre].agregar(duracion_ms)
+        self.spans.append({
+            'nombre': nombre,
+            'duracion_ms': round(duracion_ms, 3),
+            'rerun': self.rerun,
+            'padre': padre,
+            'error': error,
+            'fecha': datetime.now().isoformat(timespec='milliseconds'),
+            'atributos': atributos or None,
+        })
+
+    def histogramas(self):
+        """
+        Resumen por nombre de span.
+
+        Returns:
+            dict: {nombre: {'conteo', 'total_ms', 'media_ms', 'min_ms', 'max_ms',
+                            'p50_ms', 'p95_ms', 'cubetas'}}, ordenado por tiempo total
+        """
+        resumen = {}
+        for nombre, h in sorted(self._histogramas.items(), key=lambda x: -x[1].total_ms):
+            resumen[nombre] = {
+                'conteo': h.conteo,
+                'total_ms': round(h.total_ms, 3),
+                'media_ms': round(h.total_ms / h.conteo, 3),
+                'min_ms': round(h.min_ms, 3),
+                'max_ms': round(h.max_ms, 3),
+                'p50_ms': round(h.percentil(50), 3),
+                'p95_ms': round(h.percentil(95), 3),
+                'cubetas': dict(zip([f"<={l}" for l in LIMITES_HISTOGRAMA_MS] + ['>5000'], h.cubetas)),
+            }
+        return resumen
+
+    def exportar_jsonl(self, destino=None, solo_nuevos=False):
+        """
+        Exporta los spans como JSON-lines.
+
+        Args:
+            destino: ruta de archivo (se agrega al final) o None para devolver el texto
+            solo_nuevos: exportar solo los spans no exportados en llamadas previas
+
+        Returns:
+            str con el contenido si destino es None; si no, número de spans escritos
+        """
+        spans = list(self.spans)
+        if solo_nuevos:
+            # Los spans descartados por MAX_SPANS no se pueden exportar
+            pendientes = min(len(spans), self._total_registrados() - self._exportados)
+            spans = spans[len(spans) - pendientes:] if pendientes > 0 else []
+        self._exportados = self._total_registrados()
+
+        buffer = io.StringIO()
+        for s in spans:
+            buffer.write(json.dumps(s, ensure_ascii=False, default=str) + "\n")
+        if destino is None:
+            return buffer.getvalue()
+        with open(destino, 'a', encoding='utf-8') as f:
+            f.write(buffer.getvalue())
+        return len(spans)
+
+    def _total_registrados(self):
+        return sum(h.conteo for h in self._histogramas.values())
+
+
+# ==================== REGISTRO ACTIVO ====================
+
+def obtener_registro(estado, clave='_registro_trazas'):
+    """Devuelve (creándolo si hace falta) el registro guardado en `estado` (p.ej. st.session_state)."""
+    if clave not in estado:
+        estado[clave] = RegistroTrazas()
+    return estado[clave]
+
+
+def activar_registro(registro):
+    """Fija el registro que usarán span() y trazar() en el contexto actual."""
+    _registro_activo.set(registro)
+
+
+def registro_activo():
+    return _registro_activo.get()
+
+
+@contextmanager
+def span(nombre, **atributos):
+    """Mide el bloque y lo registra en el registro activo (no-op si no hay)."""
+    registro = _registro_activo.get()
+    if registro is None:
+        yield
+        return
+    with registro.span(nombre, **atributos):
+        yield
+
+
+def trazar(nombre=None):
+    """Decorador: mide cada llamada a la función como un span."""
+    def decorador(funcion):
+        etiqueta = nombre or funcion.__name__
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            registro = _registro_activo.get()
+            if registro is None:
+                return funcion(*args, **kwargs)
+            with registro.span(etiqueta):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador